@@ -0,0 +1,71 @@
+"""Create device_metric_samples time-series table
+
+Revision ID: 20261018_1000
+Revises: 20260210_1600
+Create Date: 2026-10-18 10:00:00.000000
+
+Epic 7.1: Edge Device Management - narrow typed table for heartbeat
+metrics, written with COPY by the heartbeat ingest path.
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '20261018_1000'
+down_revision = '20260210_1600'
+branch_labels = None
+depends_on = None
+
+
+MONTHS = [
+    ('2026_10', '2026-10-01', '2026-11-01'),
+    ('2026_11', '2026-11-01', '2026-12-01'),
+    ('2026_12', '2026-12-01', '2027-01-01'),
+    ('2027_01', '2027-01-01', '2027-02-01'),
+    ('2027_02', '2027-02-01', '2027-03-01'),
+    ('2027_03', '2027-03-01', '2027-04-01'),
+    ('2027_04', '2027-04-01', '2027-05-01'),
+    ('2027_05', '2027-05-01', '2027-06-01'),
+    ('2027_06', '2027-06-01', '2027-07-01'),
+    ('2027_07', '2027-07-01', '2027-08-01'),
+    ('2027_08', '2027-08-01', '2027-09-01'),
+    ('2027_09', '2027-09-01', '2027-10-01'),
+    ('2027_10', '2027-10-01', '2027-11-01'),
+    ('2027_11', '2027-11-01', '2027-12-01'),
+    ('2027_12', '2027-12-01', '2028-01-01'),
+]
+
+
+def upgrade():
+    # No primary key or foreign key: append-only samples loaded with COPY.
+    # The device delete endpoint removes a device's samples itself.
+    op.execute("""
+        CREATE TABLE device_metric_samples (
+            device_id UUID NOT NULL,
+            timestamp TIMESTAMP WITH TIME ZONE NOT NULL,
+            metric_name VARCHAR(100) NOT NULL,
+            value DOUBLE PRECISION NOT NULL
+        ) PARTITION BY RANGE (timestamp);
+    """)
+
+    op.execute("""
+        CREATE INDEX idx_device_metric_samples_device_time
+        ON device_metric_samples(device_id, timestamp DESC);
+    """)
+
+    for month_name, start_date, end_date in MONTHS:
+        op.execute(f"""
+            CREATE TABLE device_metric_samples_{month_name} PARTITION OF device_metric_samples
+            FOR VALUES FROM ('{start_date}') TO ('{end_date}');
+        """)
+
+    # Samples outside the monthly partitions must not fail a whole COPY batch
+    op.execute("""
+        CREATE TABLE device_metric_samples_default PARTITION OF device_metric_samples DEFAULT;
+    """)
+
+
+def downgrade():
+    op.execute("DROP TABLE IF EXISTS device_metric_samples_default")
+    for month_name, _, _ in MONTHS:
+        op.execute(f"DROP TABLE IF EXISTS device_metric_samples_{month_name}")
+    op.execute("DROP TABLE IF EXISTS device_metric_samples")
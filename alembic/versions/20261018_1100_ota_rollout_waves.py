@@ -0,0 +1,34 @@
+"""Add staged rollout waves to OTA deployments
+
+Revision ID: 20261018_1100
+Revises: 20261018_1000
+Create Date: 2026-10-18 11:00:00.000000
+
+Epic 7.2: OTA Updates - every target device is assigned a wave when the
+deployment is created; devices only see the update once their wave has
+been released.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261018_1100'
+down_revision = '20261018_1000'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('ota_deployments',
+        sa.Column('current_wave', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('ota_deployment_devices',
+        sa.Column('wave', sa.Integer(), server_default='0', nullable=False))
+
+    # Device update checks look up pending work by device
+    op.create_index('idx_ota_deployment_devices_device', 'ota_deployment_devices', ['device_id', 'status'])
+
+
+def downgrade():
+    op.drop_index('idx_ota_deployment_devices_device', table_name='ota_deployment_devices')
+    op.drop_column('ota_deployment_devices', 'wave')
+    op.drop_column('ota_deployments', 'current_wave')
@@ -0,0 +1,68 @@
+"""Create cross-tenant analytics rollup tables
+
+Revision ID: 20261018_1200
+Revises: 20261018_1100
+Create Date: 2026-10-18 12:00:00.000000
+
+Per-tenant counters and daily per-tier snapshots maintained by
+backend/tenant_rollups.py and read by the cross-tenant analytics API.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261018_1200'
+down_revision = '20261018_1100'
+branch_labels = None
+depends_on = None
+
+
+COUNTERS = ['users', 'devices', 'webhooks', 'api_keys']
+
+
+def upgrade():
+    op.create_table('tenant_rollups',
+        sa.Column('organization_id', sa.String(length=64), nullable=False),
+        sa.Column('organization_name', sa.String(length=255), nullable=True),
+        sa.Column('plan_tier', sa.String(length=50), server_default='trial', nullable=False),
+        sa.Column('is_active', sa.Boolean(), server_default='true', nullable=False),
+        sa.Column('users', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('devices', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('webhooks', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('api_keys', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('refreshed_at', sa.DateTime(timezone=True), server_default=sa.text('NOW()'), nullable=False),
+        sa.PrimaryKeyConstraint('organization_id')
+    )
+
+    # Top-tenant rankings: index scan + LIMIT over active tenants
+    for counter in COUNTERS:
+        op.execute(f"""
+            CREATE INDEX idx_tenant_rollups_{counter}
+            ON tenant_rollups ({counter} DESC) WHERE is_active
+        """)
+
+    # Totals are NULL on days backfilled from creation timestamps only
+    op.create_table('tenant_rollup_daily',
+        sa.Column('snapshot_date', sa.Date(), nullable=False),
+        sa.Column('plan_tier', sa.String(length=50), nullable=False),
+        sa.Column('tenants', sa.Integer(), nullable=True),
+        sa.Column('active_tenants', sa.Integer(), nullable=True),
+        sa.Column('users', sa.BigInteger(), nullable=True),
+        sa.Column('devices', sa.BigInteger(), nullable=True),
+        sa.Column('webhooks', sa.BigInteger(), nullable=True),
+        sa.Column('api_keys', sa.BigInteger(), nullable=True),
+        sa.Column('new_tenants', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('churned_tenants', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('new_users', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('new_devices', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('refreshed_at', sa.DateTime(timezone=True), server_default=sa.text('NOW()'), nullable=False),
+        sa.PrimaryKeyConstraint('snapshot_date', 'plan_tier')
+    )
+
+
+def downgrade():
+    op.drop_table('tenant_rollup_daily')
+    for counter in COUNTERS:
+        op.execute(f"DROP INDEX IF EXISTS idx_tenant_rollups_{counter}")
+    op.drop_table('tenant_rollups')
@@ -0,0 +1,47 @@
+"""Create usage log bucket and offset tables
+
+Revision ID: 20261018_1300
+Revises: 20261018_1200
+Create Date: 2026-10-18 13:00:00.000000
+
+Hourly request buckets and per-host log read offsets maintained by
+backend/usage_log_aggregator.py and read by the usage analytics API.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '20261018_1300'
+down_revision = '20261018_1200'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Primary key leads with bucket_start, so window reads are range scans
+    op.create_table('usage_log_buckets',
+        sa.Column('bucket_start', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('service', sa.String(length=50), nullable=False),
+        sa.Column('endpoint', sa.Text(), nullable=False),
+        sa.Column('user_id', sa.String(length=255), nullable=False),
+        sa.Column('status_class', sa.SmallInteger(), nullable=False),
+        sa.Column('calls', sa.BigInteger(), server_default='0', nullable=False),
+        sa.Column('total_duration_ms', sa.Float(), server_default='0', nullable=False),
+        sa.Column('duration_hist', postgresql.ARRAY(sa.BigInteger()), nullable=False),
+        sa.PrimaryKeyConstraint('bucket_start', 'service', 'endpoint', 'user_id', 'status_class')
+    )
+
+    op.create_table('usage_log_offsets',
+        sa.Column('host', sa.String(length=255), nullable=False),
+        sa.Column('file_path', sa.Text(), nullable=False),
+        sa.Column('inode', sa.BigInteger(), nullable=False),
+        sa.Column('byte_offset', sa.BigInteger(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('NOW()'), nullable=False),
+        sa.PrimaryKeyConstraint('host', 'file_path')
+    )
+
+
+def downgrade():
+    op.drop_table('usage_log_offsets')
+    op.drop_table('usage_log_buckets')
@@ -0,0 +1,43 @@
+"""Create cost cube watermark table
+
+Revision ID: 20261018_1400
+Revises: 20261018_1300
+Create Date: 2026-10-18 14:00:00.000000
+
+Watermark for the incremental rollup of credit_transactions into the
+hourly and daily cost_analysis rows (backend/cost_cubes.py), plus the
+index the dashboards read those rows through.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261018_1400'
+down_revision = '20261018_1300'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('cost_cube_watermarks',
+        sa.Column('source', sa.String(length=64), nullable=False),
+        sa.Column('watermark', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('NOW()'), nullable=False),
+        sa.PrimaryKeyConstraint('source')
+    )
+
+    # cost_analysis is created by the Epic 14 SQL, not by Alembic
+    op.execute("""
+        DO $$
+        BEGIN
+            IF to_regclass('cost_analysis') IS NOT NULL THEN
+                CREATE INDEX IF NOT EXISTS idx_cost_analysis_org_grain_period
+                ON cost_analysis (organization_id, period_type, period_start);
+            END IF;
+        END $$
+    """)
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS idx_cost_analysis_org_grain_period")
+    op.drop_table('cost_cube_watermarks')
@@ -0,0 +1,38 @@
+"""Create job lease table
+
+Revision ID: 20261018_1500
+Revises: 20261018_1400
+Create Date: 2026-10-18 15:00:00.000000
+
+Leases and run statistics of the background jobs (backend/job_runner.py),
+so each job runs in one process across all API and worker processes.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20261018_1500'
+down_revision = '20261018_1400'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('job_leases',
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('owner', sa.String(length=255), nullable=False),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('running', sa.Boolean(), server_default=sa.text('false'), nullable=False),
+        sa.Column('runs', sa.BigInteger(), server_default=sa.text('0'), nullable=False),
+        sa.Column('failures', sa.BigInteger(), server_default=sa.text('0'), nullable=False),
+        sa.Column('last_status', sa.String(length=16), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('last_duration_ms', sa.BigInteger(), nullable=True),
+        sa.Column('last_started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade():
+    op.drop_table('job_leases')
@@ -25,6 +25,7 @@ from pydantic import BaseModel
 import os
 
 from auth_dependencies import require_authenticated_user, require_admin_user
+from db_manager import db_manager
 
 logger = logging.getLogger(__name__)
 
@@ -305,17 +306,8 @@ async def get_tier_features():
     - Feature description
     """
     try:
-        import asyncpg
-        import os
-
         # Create database connection
-        conn = await asyncpg.connect(
-            host=os.getenv("POSTGRES_HOST", "unicorn-postgresql"),
-            port=int(os.getenv("POSTGRES_PORT", "5432")),
-            user=os.getenv("POSTGRES_USER", "unicorn"),
-            password=os.getenv("POSTGRES_PASSWORD", "unicorn"),
-            database=os.getenv("POSTGRES_DB", "unicorn_db")
-        )
+        conn = await db_manager.connect('default')
 
         try:
             # Query tier features
@@ -560,27 +552,26 @@ async def list_organizations(
 
         user_id = user.get("user_id") or user.get("sub")
 
-        conn = await get_db_connection()
-
-        # Get organizations where user is a member
-        rows = await conn.fetch("""
-            SELECT
-                o.id,
-                o.name,
-                o.slug,
-                o.subscription_tier,
-                o.created_at,
-                o.is_active,
-                COUNT(om.user_id) as member_count
-            FROM organizations o
-            LEFT JOIN organization_members om ON o.id = om.org_id
-            WHERE o.id IN (
-                SELECT org_id FROM organization_members WHERE user_id = $1
-            )
-            GROUP BY o.id, o.name, o.slug, o.subscription_tier, o.created_at, o.is_active
-            ORDER BY o.created_at DESC
-            LIMIT $2 OFFSET $3
-        """, user_id, limit, offset)
+        async with await get_db_connection() as conn:
+            # Get organizations where user is a member
+            rows = await conn.fetch("""
+                SELECT
+                    o.id,
+                    o.name,
+                    o.slug,
+                    o.subscription_tier,
+                    o.created_at,
+                    o.is_active,
+                    COUNT(om.user_id) as member_count
+                FROM organizations o
+                LEFT JOIN organization_members om ON o.id = om.org_id
+                WHERE o.id IN (
+                    SELECT org_id FROM organization_members WHERE user_id = $1
+                )
+                GROUP BY o.id, o.name, o.slug, o.subscription_tier, o.created_at, o.is_active
+                ORDER BY o.created_at DESC
+                LIMIT $2 OFFSET $3
+            """, user_id, limit, offset)
 
         organizations = [
             {
@@ -595,8 +586,6 @@ async def list_organizations(
             for row in rows
         ]
 
-        await conn.close()
-
         logger.info(f"User {user.get('email')} retrieved {len(organizations)} organizations")
         return {"organizations": organizations}
 
@@ -0,0 +1,207 @@
+"""
+ACME Certificate Inventory Cache
+
+Parsed view of Traefik's acme.json shared by the certificate endpoints.
+acme.json is only re-read when its (mtime, ctime, size, inode) changes,
+and each certificate is decoded once per fingerprint (sha256 of the
+stored certificate blob), so a renewal that replaces one certificate
+decodes just that one.
+
+Two indexes are kept per load:
+- domain -> certificate (main domain and SANs, first entry wins)
+- certificates ordered by expiry, so "expiring within N days" and
+  "expired" are bisect lookups instead of full scans
+"""
+
+import json
+import bisect
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (mtime_ns, ctime_ns, size, inode)
+FileKey = Tuple[int, int, int, int]
+
+
+def parse_expiry(value: Optional[str]) -> Optional[datetime]:
+    """ISO timestamp (with or without zone) -> naive UTC datetime"""
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+@dataclass
+class AcmeCertificate:
+    """One certificate entry from acme.json plus its decoded metadata"""
+    resolver: str
+    domain: str
+    sans: List[str]
+    fingerprint: Optional[str]
+    entry: Dict[str, Any]
+    decoded: Dict[str, Any] = field(default_factory=dict)
+    expires_at: Optional[datetime] = None
+
+    def days_remaining(self, now: Optional[datetime] = None) -> Optional[int]:
+        if self.expires_at is None:
+            return None
+        return (self.expires_at - (now or datetime.utcnow())).days
+
+
+class AcmeInventory:
+    """Change-aware, decoded inventory of one acme.json file"""
+
+    def __init__(self, acme_file: Path, decoder: Callable[[str], Optional[Dict[str, Any]]]):
+        self.acme_file = Path(acme_file)
+        self.decoder = decoder
+
+        self._key: Optional[FileKey] = None
+        self._data: Dict[str, Any] = {}
+        self._certificates: List[AcmeCertificate] = []
+        self._by_domain: Dict[str, AcmeCertificate] = {}
+        self._by_expiry: List[AcmeCertificate] = []
+        self._expiry_keys: List[datetime] = []
+        self._decoded: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+        self.stats = {"loads": 0, "decodes": 0}
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def refresh(self) -> bool:
+        """Reload if acme.json changed; returns whether the file exists"""
+        try:
+            st = self.acme_file.stat()
+        except FileNotFoundError:
+            with self._lock:
+                self._reset()
+            return False
+
+        key = (st.st_mtime_ns, st.st_ctime_ns, st.st_size, st.st_ino)
+        with self._lock:
+            if key != self._key:
+                with open(self.acme_file, 'r') as f:
+                    data = json.load(f)
+                self._load(data if isinstance(data, dict) else {})
+                self._key = key
+                self.stats["loads"] += 1
+        return True
+
+    def _reset(self):
+        self._key = None
+        self._data = {}
+        self._certificates = []
+        self._by_domain = {}
+        self._by_expiry = []
+        self._expiry_keys = []
+        self._decoded = {}
+
+    def _load(self, data: Dict[str, Any]):
+        certificates = []
+        decoded: Dict[str, Dict[str, Any]] = {}
+
+        for resolver_name, resolver_data in data.items():
+            if not isinstance(resolver_data, dict):
+                continue
+            for entry in resolver_data.get('Certificates') or []:
+                blob = entry.get('certificate')
+                fingerprint = hashlib.sha256(blob.encode()).hexdigest() if blob else None
+                metadata: Dict[str, Any] = {}
+                if fingerprint:
+                    if fingerprint in decoded:
+                        metadata = decoded[fingerprint]
+                    elif fingerprint in self._decoded:
+                        metadata = self._decoded[fingerprint]
+                    else:
+                        metadata = self._decode(blob)
+                    decoded[fingerprint] = metadata
+
+                domain = entry.get('domain') or {}
+                certificates.append(AcmeCertificate(
+                    resolver=resolver_name,
+                    domain=domain.get('main', 'unknown'),
+                    sans=domain.get('sans') or [],
+                    fingerprint=fingerprint,
+                    entry=entry,
+                    decoded=metadata,
+                    expires_at=parse_expiry(metadata.get('not_after')) or parse_expiry(entry.get('notAfter')),
+                ))
+
+        by_domain: Dict[str, AcmeCertificate] = {}
+        for cert in certificates:
+            by_domain.setdefault(cert.domain, cert)
+            for san in cert.sans:
+                by_domain.setdefault(san, cert)
+
+        by_expiry = sorted(
+            (c for c in certificates if c.expires_at is not None),
+            key=lambda c: c.expires_at,
+        )
+
+        self._data = data
+        self._certificates = certificates
+        self._by_domain = by_domain
+        self._by_expiry = by_expiry
+        self._expiry_keys = [c.expires_at for c in by_expiry]
+        # Only fingerprints still present are kept
+        self._decoded = decoded
+
+    def _decode(self, blob: str) -> Dict[str, Any]:
+        self.stats["decodes"] += 1
+        try:
+            return self.decoder(blob) or {}
+        except Exception as e:
+            logger.debug(f"Certificate decode failed: {e}")
+            return {}
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def certificates(self) -> List[AcmeCertificate]:
+        self.refresh()
+        return list(self._certificates)
+
+    def find(self, domain: str) -> Optional[AcmeCertificate]:
+        """Certificate whose main domain or SANs include `domain`"""
+        self.refresh()
+        return self._by_domain.get(domain)
+
+    def expiring_within(self, days: int, now: Optional[datetime] = None) -> List[AcmeCertificate]:
+        """Not yet expired certificates expiring in the next `days` days, soonest first"""
+        self.refresh()
+        now = now or datetime.utcnow()
+        start = bisect.bisect_right(self._expiry_keys, now)
+        end = bisect.bisect_right(self._expiry_keys, now + timedelta(days=days))
+        return self._by_expiry[start:end]
+
+    def expired(self, now: Optional[datetime] = None) -> List[AcmeCertificate]:
+        self.refresh()
+        end = bisect.bisect_right(self._expiry_keys, now or datetime.utcnow())
+        return self._by_expiry[:end]
+
+    def resolvers(self) -> List[Dict[str, Any]]:
+        """Per-resolver summary (account email, CA server, certificate count)"""
+        self.refresh()
+        return [
+            {
+                'name': name,
+                'certificates': len(data.get('Certificates') or []),
+                'email': data.get('Email', 'unknown'),
+                'ca_server': data.get('CAServer', 'https://acme-v02.api.letsencrypt.org/directory')
+            }
+            for name, data in self._data.items() if isinstance(data, dict)
+        ]
@@ -9,9 +9,7 @@ from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 import logging
-import asyncpg
-import os
-from webhook_manager import WebhookManager
+from webhook_manager import webhook_manager
 from keycloak_integration import (
     get_all_users,
     get_user_by_email,
@@ -202,23 +200,18 @@ async def update_user_subscription(
 
         # Trigger webhook for subscription.updated event
         try:
-            db_url = os.getenv("DATABASE_URL")
-            if db_url and db_url.startswith("postgresql://"):
-                pool = await asyncpg.create_pool(db_url)
-                webhook_manager = WebhookManager(pool)
-                await webhook_manager.trigger_event(
-                    org_id=None,
-                    event='subscription.updated',
-                    data={
-                        'email': email,
-                        'tier': update.tier,
-                        'status': update.status,
-                        'updated_at': datetime.utcnow().isoformat(),
-                        'updated_by': admin.get('email', 'admin'),
-                        'notes': update.notes
-                    }
-                )
-                await pool.close()
+            await webhook_manager.trigger_event(
+                event_type='subscription.updated',
+                organization_id=None,
+                payload={
+                    'email': email,
+                    'tier': update.tier,
+                    'status': update.status,
+                    'updated_at': datetime.utcnow().isoformat(),
+                    'updated_by': admin.get('email', 'admin'),
+                    'notes': update.notes
+                }
+            )
         except Exception as e:
             logger.warning(f"Webhook trigger failed for subscription.updated: {e}")
 
@@ -0,0 +1,445 @@
+"""
+Streaming Alert Correlator
+
+Incremental replacement for re-grouping the whole recent-alert window on
+every correlation run. Alerts are fed in as they arrive and each one
+touches only the groups it belongs to:
+
+- temporal: the currently open 5-minute bucket (anchored at its first alert)
+- device_cascade: one group per topology key (rack_*, network_*, service_*)
+  looked up from a device -> keys adjacency index
+- metric_pattern: one group per metric name
+
+Each group keeps its alerts in created_at order together with running
+counters (devices, severities, categories), so impact scores are O(1)
+and expiring old alerts pops from the front of the groups they were in.
+Groups that changed since the last drain() are returned as correlations
+with a stable id, so a growing incident updates one record instead of
+producing a new one per run.
+
+Epic 13: Smart Alerts - Alert Correlation Engine
+"""
+
+import bisect
+import logging
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
+from uuid import UUID, uuid4
+
+logger = logging.getLogger(__name__)
+
+SEVERITY_ROOT_SCORES = {'critical': 30, 'error': 20, 'warning': 10, 'info': 5}
+SEVERITY_IMPACT_WEIGHTS = {'critical': 10, 'error': 7, 'warning': 4, 'info': 1}
+
+TOPOLOGY_FIELDS = (('rack', 'rack_id'), ('network', 'network_segment'), ('service', 'service'))
+
+
+def root_cause_score(alert: Dict[str, Any], first: datetime, last: datetime) -> float:
+    """
+    Root cause likelihood of one alert in a group spanning [first, last].
+
+    Earlier (40), more severe (30), infrastructure-level (20) and higher
+    priority (10) alerts score higher.
+    """
+    score = 0.0
+
+    max_time_diff = (last - first).total_seconds()
+    if max_time_diff > 0:
+        time_diff = (last - alert['created_at']).total_seconds()
+        score += 40 * (1 - time_diff / max_time_diff)
+    else:
+        score += 40
+
+    score += SEVERITY_ROOT_SCORES.get(alert.get('severity', 'info'), 5)
+
+    category = alert.get('alert_category', '')
+    if category in ['network', 'infrastructure', 'hardware']:
+        score += 20
+    elif category in ['database', 'storage']:
+        score += 15
+    elif category in ['application', 'service']:
+        score += 10
+
+    priority = alert.get('priority_score', 50)
+    score += ((priority if priority is not None else 50) / 100) * 10
+
+    return score
+
+
+def find_root_cause(alerts: List[Dict[str, Any]]) -> Optional[UUID]:
+    """Highest scoring alert of a group (first one wins on ties)"""
+    if not alerts:
+        return None
+    first = min(a['created_at'] for a in alerts)
+    last = max(a['created_at'] for a in alerts)
+    best = max(alerts, key=lambda a: root_cause_score(a, first, last))
+    return best['id']
+
+
+def impact_score(
+    unique_devices: int,
+    alert_count: int,
+    severity_weight: float,
+    unique_categories: int
+) -> float:
+    """Impact 0-100 from devices (30), alert count (20), severity (30), category spread (20)"""
+    impact = min(30, unique_devices * 3)
+    impact += min(20, alert_count * 2)
+    impact += min(30, severity_weight)
+    impact += min(20, unique_categories * 5)
+    return float(min(100.0, impact))
+
+
+class TopologyIndex:
+    """
+    Device topology as an adjacency index.
+
+    Each device maps to its topology keys (rack_<id>, network_<segment>,
+    service_<name>) and each key maps back to its devices, so the groups
+    an alert joins and the size of a rack/segment/service are both
+    dictionary lookups.
+    """
+
+    def __init__(self):
+        self._keys_by_device: Dict[Any, Tuple[str, ...]] = {}
+        self._devices_by_key: Dict[str, Set[Any]] = {}
+
+    def update(self, topology: Dict[Any, Dict[str, Any]]):
+        keys_by_device: Dict[Any, Tuple[str, ...]] = {}
+        devices_by_key: Dict[str, Set[Any]] = {}
+        for device_id, info in topology.items():
+            keys = self._keys(info)
+            keys_by_device[device_id] = keys
+            for key in keys:
+                devices_by_key.setdefault(key, set()).add(device_id)
+        self._keys_by_device = keys_by_device
+        self._devices_by_key = devices_by_key
+
+    @staticmethod
+    def _keys(info: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(
+            f"{prefix}_{info.get(name) or 'unknown'}" for prefix, name in TOPOLOGY_FIELDS
+        )
+
+    def keys_for(self, device_id: Any) -> Tuple[str, ...]:
+        keys = self._keys_by_device.get(device_id)
+        if keys is None:
+            keys = self._keys({})
+        return keys
+
+    def devices_in(self, key: str) -> Set[Any]:
+        return self._devices_by_key.get(key, set())
+
+    def neighbours(self, device_id: Any) -> Set[Any]:
+        """Devices sharing a rack, network segment or service with `device_id`"""
+        related: Set[Any] = set()
+        for key in self._keys_by_device.get(device_id, ()):
+            related |= self._devices_by_key.get(key, set())
+        related.discard(device_id)
+        return related
+
+    def __len__(self) -> int:
+        return len(self._keys_by_device)
+
+
+@dataclass
+class CorrelationGroup:
+    """Alerts of one correlation group in created_at order, with running counters"""
+    key: str
+    correlation_type: str
+    id: UUID = field(default_factory=uuid4)
+    alerts: List[Dict[str, Any]] = field(default_factory=list)
+    created: List[datetime] = field(default_factory=list)
+    devices: Counter = field(default_factory=Counter)
+    severities: Counter = field(default_factory=Counter)
+    categories: Counter = field(default_factory=Counter)
+    severity_weight: float = 0.0
+    changed: bool = False
+
+    def add(self, alert: Dict[str, Any]):
+        index = bisect.bisect_right(self.created, alert['created_at'])
+        self.created.insert(index, alert['created_at'])
+        self.alerts.insert(index, alert)
+        self._count(alert, 1)
+        self.changed = True
+
+    def expire(self, cutoff: datetime) -> int:
+        """Drop alerts created before `cutoff`; returns how many were dropped"""
+        count = bisect.bisect_left(self.created, cutoff)
+        if count:
+            for alert in self.alerts[:count]:
+                self._count(alert, -1)
+            del self.alerts[:count]
+            del self.created[:count]
+        return count
+
+    def _count(self, alert: Dict[str, Any], sign: int):
+        device_id = alert.get('device_id')
+        if device_id:
+            self.devices[device_id] += sign
+            if self.devices[device_id] <= 0:
+                del self.devices[device_id]
+        severity = alert.get('severity', 'info')
+        self.severities[severity] += sign
+        if self.severities[severity] <= 0:
+            del self.severities[severity]
+        category = alert.get('alert_category', 'unknown')
+        self.categories[category] += sign
+        if self.categories[category] <= 0:
+            del self.categories[category]
+        self.severity_weight += sign * SEVERITY_IMPACT_WEIGHTS.get(severity, 1)
+
+    @property
+    def first(self) -> datetime:
+        return self.created[0]
+
+    @property
+    def last(self) -> datetime:
+        return self.created[-1]
+
+    @property
+    def span(self) -> timedelta:
+        return self.last - self.first
+
+    def impact_score(self) -> float:
+        return impact_score(
+            len(self.devices), len(self.alerts), self.severity_weight, len(self.categories)
+        )
+
+
+class StreamingCorrelator:
+    """
+    Incremental alert correlator over a sliding time window.
+
+    add() places an alert into its temporal bucket, topology groups and
+    metric group; expire() drops alerts older than the window from the
+    front of every group; drain() returns correlations for groups that
+    changed since the previous drain and meet their size/span rules.
+    """
+
+    def __init__(
+        self,
+        topology: TopologyIndex,
+        metric_extractor: Callable[[Dict[str, Any]], Optional[str]],
+        window: timedelta = timedelta(minutes=15),
+        temporal_window: timedelta = timedelta(minutes=5),
+        cascade_span: timedelta = timedelta(minutes=30),
+        pattern_span: timedelta = timedelta(minutes=15),
+    ):
+        self.topology = topology
+        self.metric_extractor = metric_extractor
+        self.window = window
+        self.temporal_window = temporal_window
+        self.cascade_span = cascade_span
+        self.pattern_span = pattern_span
+
+        # Alerts in the window, oldest first, for eviction and dedup
+        self._window: Deque[Tuple[datetime, UUID]] = deque()
+        self._seen: Set[UUID] = set()
+        self.latest: Optional[datetime] = None
+
+        self._temporal: Optional[CorrelationGroup] = None
+        self._closed_temporal: List[CorrelationGroup] = []
+        self._cascade: Dict[str, CorrelationGroup] = {}
+        self._patterns: Dict[str, CorrelationGroup] = {}
+
+        self.stats = {'alerts': 0, 'duplicates': 0, 'expired': 0, 'emitted': 0}
+
+    def __len__(self) -> int:
+        return len(self._window)
+
+    # ------------------------------------------------------------------
+    # Ingest
+    # ------------------------------------------------------------------
+
+    def add(self, alert: Dict[str, Any]) -> bool:
+        """Add one alert; returns False if it was already seen"""
+        alert_id = alert['id']
+        if alert_id in self._seen:
+            self.stats['duplicates'] += 1
+            return False
+
+        created_at = alert['created_at']
+        self._seen.add(alert_id)
+        if self._window and created_at < self._window[-1][0]:
+            self._window.insert(self._insert_index(created_at), (created_at, alert_id))
+        else:
+            self._window.append((created_at, alert_id))
+        if self.latest is None or created_at > self.latest:
+            self.latest = created_at
+        self.stats['alerts'] += 1
+
+        self._add_temporal(alert)
+
+        device_id = alert.get('device_id')
+        if device_id:
+            for key in self.topology.keys_for(device_id):
+                group = self._cascade.get(key)
+                if group is None:
+                    group = self._cascade[key] = CorrelationGroup(key, 'device_cascade')
+                group.add(alert)
+
+        metric = self.metric_extractor(alert)
+        if metric:
+            group = self._patterns.get(metric)
+            if group is None:
+                group = self._patterns[metric] = CorrelationGroup(
+                    f"metric_pattern_{metric}", 'metric_pattern'
+                )
+            group.add(alert)
+
+        return True
+
+    def add_many(self, alerts: Iterable[Dict[str, Any]]) -> int:
+        return sum(1 for alert in sorted(alerts, key=lambda a: a['created_at']) if self.add(alert))
+
+    def _insert_index(self, created_at: datetime) -> int:
+        # Late arrival: walk back from the newest entry (late alerts are
+        # only ever a little late)
+        index = len(self._window)
+        while index > 0 and self._window[index - 1][0] > created_at:
+            index -= 1
+        return index
+
+    def _add_temporal(self, alert: Dict[str, Any]):
+        group = self._temporal
+        created_at = alert['created_at']
+        if group is not None and group.first <= created_at <= group.first + self.temporal_window:
+            group.add(alert)
+            return
+
+        if group is not None and created_at < group.first:
+            # Late alert from before the open bucket: it belongs to an
+            # already closed bucket if one covers it, otherwise it stands alone
+            for closed in reversed(self._closed_temporal):
+                if closed.first <= created_at <= closed.first + self.temporal_window:
+                    closed.add(alert)
+                    return
+            return
+
+        if group is not None:
+            self._closed_temporal.append(group)
+        self._temporal = CorrelationGroup('temporal', 'temporal')
+        self._temporal.add(alert)
+
+    # ------------------------------------------------------------------
+    # Expiry
+    # ------------------------------------------------------------------
+
+    def expire(self, now: Optional[datetime] = None) -> int:
+        """Forget alerts older than the window (relative to `now` or the newest alert)"""
+        reference = now or self.latest
+        if reference is None:
+            return 0
+        cutoff = reference - self.window
+
+        expired = 0
+        while self._window and self._window[0][0] < cutoff:
+            _, alert_id = self._window.popleft()
+            self._seen.discard(alert_id)
+            expired += 1
+        if not expired:
+            return 0
+
+        for groups in (self._cascade, self._patterns):
+            for key in list(groups):
+                group = groups[key]
+                if group.expire(cutoff) and not group.alerts:
+                    del groups[key]
+
+        self._closed_temporal = [
+            g for g in self._closed_temporal if g.first + self.temporal_window >= cutoff
+        ]
+        if self._temporal is not None and self._temporal.first + self.temporal_window < cutoff:
+            self._temporal = None
+
+        self.stats['expired'] += expired
+        return expired
+
+    # ------------------------------------------------------------------
+    # Emit
+    # ------------------------------------------------------------------
+
+    def drain(self) -> List['CorrelationSnapshot']:
+        """Groups that changed since the last drain and qualify as correlations"""
+        snapshots: List[CorrelationSnapshot] = []
+
+        temporal = list(self._closed_temporal)
+        if self._temporal is not None:
+            temporal.append(self._temporal)
+        for group in temporal:
+            if group.changed and len(group.alerts) >= 2:
+                snapshots.append(self._snapshot(group, 0.7, {
+                    'alert_count': len(group.alerts),
+                    'time_span_seconds': group.span.total_seconds(),
+                    'unique_devices': len(group.devices),
+                }, window_end=group.first + self.temporal_window))
+            group.changed = False
+
+        for key, group in self._cascade.items():
+            if group.changed and len(group.alerts) >= 2 and group.span <= self.cascade_span:
+                group_type, _, group_id = key.partition('_')
+                snapshots.append(self._snapshot(group, 0.85, {
+                    'group_type': group_type,
+                    'group_id': group_id,
+                    'alert_count': len(group.alerts),
+                    'unique_devices': len(group.devices),
+                    'topology_devices': len(self.topology.devices_in(key)),
+                }))
+            group.changed = False
+
+        for key, group in self._patterns.items():
+            if group.changed and len(group.alerts) >= 3 and group.span <= self.pattern_span:
+                # All alerts at one severity = likely coordinated
+                severity_similarity = len(group.severities) / len(group.alerts)
+                snapshots.append(self._snapshot(group, 0.6 + 0.3 * (1 - severity_similarity), {
+                    'metric_name': key,
+                    'alert_count': len(group.alerts),
+                    'unique_devices': len(group.devices),
+                    'severity_pattern': list(group.severities),
+                    'time_span_seconds': group.span.total_seconds(),
+                }))
+            group.changed = False
+
+        self.stats['emitted'] += len(snapshots)
+        return snapshots
+
+    def _snapshot(
+        self,
+        group: CorrelationGroup,
+        confidence: float,
+        metadata: Dict[str, Any],
+        window_end: Optional[datetime] = None
+    ) -> 'CorrelationSnapshot':
+        return CorrelationSnapshot(
+            id=group.id,
+            group_key=(
+                f"temporal_{group.first.isoformat()}" if group.correlation_type == 'temporal'
+                else group.key
+            ),
+            correlation_type=group.correlation_type,
+            alert_ids=[a['id'] for a in group.alerts],
+            root_cause_alert_id=find_root_cause(group.alerts),
+            confidence=confidence,
+            window_start=group.first,
+            window_end=window_end or group.last,
+            impact_score=group.impact_score(),
+            metadata=metadata,
+        )
+
+
+@dataclass
+class CorrelationSnapshot:
+    """Emitted state of one correlation group"""
+    id: UUID
+    group_key: str
+    correlation_type: str
+    alert_ids: List[UUID]
+    root_cause_alert_id: Optional[UUID]
+    confidence: float
+    window_start: datetime
+    window_end: datetime
+    impact_score: float
+    metadata: Dict[str, Any]
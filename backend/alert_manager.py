@@ -8,12 +8,13 @@ Monitors system health and generates alerts for issues requiring attention.
 from typing import List, Dict, Optional, Set
 from datetime import datetime, timedelta
 from enum import Enum
-import psutil
-import docker
 import asyncio
 import logging
 import json
 
+from docker_engine import docker_state
+from host_telemetry import host_telemetry
+
 logger = logging.getLogger(__name__)
 
 
@@ -171,7 +172,7 @@ class AlertManager:
         alerts = []
 
         try:
-            cpu_percent = psutil.cpu_percent(interval=1)
+            cpu_percent = host_telemetry.latest().cpu_percent
 
             if cpu_percent >= self.CPU_CRITICAL:
                 alerts.append(Alert(
@@ -211,8 +212,9 @@ class AlertManager:
         alerts = []
 
         try:
-            mem = psutil.virtual_memory()
-            swap = psutil.swap_memory()
+            sample = host_telemetry.latest()
+            mem = sample.memory
+            swap = sample.swap
 
             # Check memory
             if mem.percent >= self.MEMORY_CRITICAL:
@@ -263,7 +265,7 @@ class AlertManager:
         alerts = []
 
         try:
-            disk = psutil.disk_usage('/')
+            disk = host_telemetry.latest().disk
 
             if disk.percent >= self.DISK_CRITICAL:
                 alerts.append(Alert(
@@ -300,19 +302,18 @@ class AlertManager:
         alerts = []
 
         try:
-            client = docker.from_env()
-            containers = client.containers.list(all=True)
+            if not await docker_state.ensure_started():
+                logger.warning(f"Service alert check skipped: {docker_state.error or 'Docker state not ready'}")
+                return alerts
 
             stopped_services = []
             unhealthy_services = []
 
-            for container in containers:
-                if container.status != 'running':
+            for container in docker_state.containers(all=True):
+                if not container.running:
                     stopped_services.append(container.name)
-                else:
-                    health = container.attrs.get('State', {}).get('Health', {}).get('Status')
-                    if health == 'unhealthy':
-                        unhealthy_services.append(container.name)
+                elif container.health == 'unhealthy':
+                    unhealthy_services.append(container.name)
 
             # Alert for stopped services
             if stopped_services:
@@ -350,7 +351,7 @@ class AlertManager:
         alerts = []
 
         try:
-            net_io = psutil.net_io_counters()
+            net_io = host_telemetry.latest().net_io
 
             # Calculate error rate
             total_packets = net_io.packets_sent + net_io.packets_recv
@@ -383,8 +384,8 @@ class AlertManager:
 
         try:
             # Try CPU temperatures
-            if hasattr(psutil, 'sensors_temperatures'):
-                sensors = psutil.sensors_temperatures()
+            sensors = host_telemetry.latest().temperatures
+            if sensors:
                 for name, entries in sensors.items():
                     for entry in entries:
                         if entry.current >= self.TEMPERATURE_CRITICAL:
@@ -0,0 +1,275 @@
+"""
+Alert Noise Index - O(1) Structures for the Noise Reduction Engine
+
+In-memory state behind NoiseReductionEngine.should_suppress_alert so an
+alert storm costs a handful of dictionary operations per alert:
+
+- SuppressionRuleIndex: active rules compiled once (regex compiled,
+  substring lowered, days as a set) and bucketed by device, metric and
+  severity; an alert only checks the rules in its 8 candidate buckets
+- FingerprintCache: blake2b fingerprints of (device, type, message) with
+  a TTL, expired from a FIFO queue instead of scanning the whole cache
+- RateLimiter: per-key timestamp deques bounded by the threshold, with
+  idle keys dropped in least-recently-used order
+- FlapTracker: per-key bounded ring of state transition times; flapping
+  is "the ring is full and its oldest transition is inside the window"
+
+Epic 13: Smart Alerts - Noise Reduction Engine
+"""
+
+import hashlib
+import logging
+import re
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from itertools import product
+from typing import Any, Deque, Dict, FrozenSet, Hashable, Iterable, List, Optional, Pattern, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CompiledRule:
+    """A suppression rule reduced to what matching needs"""
+    order: int
+    rule: Any  # SuppressionRule
+    start_time: Optional[datetime]
+    end_time: Optional[datetime]
+    days: Optional[FrozenSet[int]]
+    regex: Optional[Pattern]
+    substring: Optional[str]
+
+    def matches(self, now: datetime, weekday: int, message: str, lowered: str) -> bool:
+        if self.start_time and self.end_time and not (self.start_time <= now <= self.end_time):
+            return False
+        if self.days is not None and weekday not in self.days:
+            return False
+        if self.regex is not None:
+            return self.regex.search(message) is not None
+        if self.substring is not None:
+            return self.substring in lowered
+        return True
+
+
+def _rule_scope(rule: Any) -> Tuple[Optional[Hashable], Optional[str], Optional[str]]:
+    """(device_id, metric_name, severity) a rule is restricted to; None = any"""
+    metadata = rule.metadata if isinstance(rule.metadata, dict) else {}
+    return rule.device_id, metadata.get('metric_name'), metadata.get('severity')
+
+
+class SuppressionRuleIndex:
+    """
+    Active suppression rules compiled and indexed by (device, metric, severity).
+
+    Rules that do not restrict a dimension sit under None for it, so an
+    alert looks up at most 2 x 2 x 2 buckets. Within the candidates the
+    first rule in the original (newest first) order wins, as before.
+    """
+
+    def __init__(self, rules: Iterable[Any] = ()):
+        self._buckets: Dict[Tuple, List[CompiledRule]] = {}
+        self.size = 0
+        self.build(rules)
+
+    def build(self, rules: Iterable[Any]):
+        buckets: Dict[Tuple, List[CompiledRule]] = {}
+        size = 0
+        for order, rule in enumerate(rules):
+            if not rule.is_active:
+                continue
+            compiled = self._compile(order, rule)
+            if compiled is None:
+                continue
+            buckets.setdefault(_rule_scope(rule), []).append(compiled)
+            size += 1
+        self._buckets = buckets
+        self.size = size
+
+    @staticmethod
+    def _compile(order: int, rule: Any) -> Optional[CompiledRule]:
+        regex = substring = None
+        if rule.alert_pattern:
+            if rule.rule_type == 'regex':
+                try:
+                    regex = re.compile(rule.alert_pattern, re.IGNORECASE)
+                except re.error as e:
+                    logger.warning(f"Skipping suppression rule {rule.rule_name}: bad pattern ({e})")
+                    return None
+            else:
+                substring = rule.alert_pattern.lower()
+        return CompiledRule(
+            order=order,
+            rule=rule,
+            start_time=rule.start_time,
+            end_time=rule.end_time,
+            days=frozenset(rule.days_of_week) if rule.days_of_week else None,
+            regex=regex,
+            substring=substring,
+        )
+
+    def match(
+        self,
+        device_id: Optional[Hashable],
+        alert_message: str,
+        metric_name: Optional[str] = None,
+        severity: Optional[str] = None,
+        now: Optional[datetime] = None
+    ) -> Optional[Any]:
+        """First matching rule for this alert, or None"""
+        if not self._buckets:
+            return None
+        now = now or datetime.utcnow()
+        weekday = now.weekday()
+        lowered = alert_message.lower()
+
+        best: Optional[CompiledRule] = None
+        for scope in product(
+            (device_id, None) if device_id is not None else (None,),
+            (metric_name, None) if metric_name is not None else (None,),
+            (severity, None) if severity is not None else (None,),
+        ):
+            for compiled in self._buckets.get(scope, ()):
+                if best is not None and compiled.order > best.order:
+                    break  # buckets are in rule order; nothing better left here
+                if compiled.matches(now, weekday, alert_message, lowered):
+                    best = compiled
+                    break
+        return best.rule if best else None
+
+
+class FingerprintCache:
+    """Set of hashed fingerprints that each expire `ttl` after insertion"""
+
+    def __init__(self, ttl: timedelta):
+        self.ttl = ttl
+        self._expires: Dict[bytes, datetime] = {}
+        self._queue: Deque[Tuple[datetime, bytes]] = deque()
+
+    @staticmethod
+    def fingerprint(*parts: Any) -> bytes:
+        return hashlib.blake2b(
+            '\x1f'.join(str(p) for p in parts).encode(), digest_size=16
+        ).digest()
+
+    def seen(self, fingerprint: bytes, now: Optional[datetime] = None) -> bool:
+        """True if `fingerprint` was added within the TTL; otherwise add it"""
+        now = now or datetime.utcnow()
+        self._expire(now)
+        if fingerprint in self._expires:
+            return True
+        expires = now + self.ttl
+        self._expires[fingerprint] = expires
+        self._queue.append((expires, fingerprint))
+        return False
+
+    def _expire(self, now: datetime):
+        queue = self._queue
+        while queue and queue[0][0] <= now:
+            expires, fingerprint = queue.popleft()
+            if self._expires.get(fingerprint) == expires:
+                del self._expires[fingerprint]
+
+    def __len__(self) -> int:
+        return len(self._expires)
+
+
+class RateLimiter:
+    """At most `threshold` events per key within `window`"""
+
+    def __init__(self, threshold: int, window: timedelta):
+        self.threshold = threshold
+        self.window = window
+        # key -> timestamps, least recently used first
+        self._events: 'OrderedDict[Hashable, Deque[datetime]]' = OrderedDict()
+
+    def hit(self, key: Hashable, now: Optional[datetime] = None) -> Tuple[bool, int]:
+        """
+        Record an event for `key` unless it is over the limit.
+
+        Returns (limited, recent_count); a limited event is not recorded.
+        """
+        now = now or datetime.utcnow()
+        cutoff = now - self.window
+        self._drop_idle(cutoff)
+
+        events = self._events.get(key)
+        if events is None:
+            events = self._events[key] = deque(maxlen=self.threshold)
+        else:
+            self._events.move_to_end(key)
+            while events and events[0] <= cutoff:
+                events.popleft()
+
+        if len(events) >= self.threshold:
+            return True, len(events)
+        events.append(now)
+        return False, len(events)
+
+    def _drop_idle(self, cutoff: datetime):
+        # Keys are in least-recently-used order; a key whose newest event
+        # is outside the window has nothing left to count
+        while self._events:
+            key, events = next(iter(self._events.items()))
+            if events and events[-1] > cutoff:
+                break
+            del self._events[key]
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+
+class FlapTracker:
+    """Per-key ring of the last `threshold` state transition times"""
+
+    def __init__(self, threshold: int, window: timedelta):
+        self.threshold = threshold
+        self.window = window
+        self._state: Dict[Hashable, str] = {}
+        self._rings: Dict[Hashable, Deque[datetime]] = {}
+        self._seen: Dict[Hashable, datetime] = {}
+
+    def observe(self, key: Hashable, state: str, at: Optional[datetime] = None):
+        """Record the key's current state; a change of state is a transition"""
+        at = at or datetime.utcnow()
+        previous = self._state.get(key)
+        self._state[key] = state
+        self._seen[key] = at
+        if previous is not None and previous != state:
+            ring = self._rings.get(key)
+            if ring is None:
+                ring = self._rings[key] = deque(maxlen=self.threshold)
+            ring.append(at)
+
+    def is_flapping(self, key: Hashable, now: Optional[datetime] = None) -> bool:
+        ring = self._rings.get(key)
+        if ring is None or len(ring) < self.threshold:
+            return False
+        return ring[0] > (now or datetime.utcnow()) - self.window
+
+    def transitions(self, key: Hashable, now: Optional[datetime] = None) -> int:
+        cutoff = (now or datetime.utcnow()) - self.window
+        return sum(1 for at in self._rings.get(key, ()) if at > cutoff)
+
+    def merge(self, other: 'FlapTracker', since: datetime):
+        """
+        Adopt state rebuilt from history that was loaded at `since`, keeping
+        whatever this tracker observed after that point on top of it.
+        """
+        for key, seen in self._seen.items():
+            if seen < since:
+                continue
+            other._state[key] = self._state[key]
+            other._seen[key] = seen
+            recent = [at for at in self._rings.get(key, ()) if at >= since]
+            if recent:
+                ring = other._rings.get(key)
+                if ring is None:
+                    ring = other._rings[key] = deque(maxlen=self.threshold)
+                ring.extend(recent)
+        self._state = other._state
+        self._rings = other._rings
+        self._seen = other._seen
+
+    def __len__(self) -> int:
+        return len(self._state)
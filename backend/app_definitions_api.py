@@ -3,14 +3,13 @@ App Definitions API
 Management endpoints for app definitions and toggles.
 """
 
-import os
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 
-import asyncpg
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from pydantic import BaseModel, Field
 from auth_dependencies import require_admin_user
+from db_manager import db_manager
 
 # Router configuration
 router = APIRouter(prefix="/api/v1/admin/apps", tags=["admin", "apps"])
@@ -116,13 +115,7 @@ class AppReorderRequest(BaseModel):
 
 async def get_db_connection():
     """Create database connection."""
-    return await asyncpg.connect(
-        host=os.getenv("POSTGRES_HOST", "postgresql"),
-        port=int(os.getenv("POSTGRES_PORT", "5432")),
-        user=os.getenv("POSTGRES_USER", "unicorn"),
-        password=os.getenv("POSTGRES_PASSWORD", "change-me"),
-        database=os.getenv("POSTGRES_DB", "unicorn_db")
-    )
+    return await db_manager.connect('default')
 
 
 # =============================================================================
@@ -5,9 +5,8 @@ Add these to server.py
 from pydantic import BaseModel
 from fastapi import HTTPException, Response
 import secrets
-import asyncpg
 from datetime import datetime
-from webhook_manager import WebhookManager
+from webhook_manager import webhook_manager
 
 
 class RegisterRequest(BaseModel):
@@ -59,24 +58,18 @@ def add_password_auth_endpoints(app, password_auth, session_manager, get_db):
         
         # Trigger webhook for user.created event (async, non-blocking)
         try:
-            import os
-            db_url = os.getenv("DATABASE_URL")
-            if db_url and db_url.startswith("postgresql://"):
-                pool = await asyncpg.create_pool(db_url)
-                webhook_manager = WebhookManager(pool)
-                # Get org_id if available (default to None for now)
-                await webhook_manager.trigger_event(
-                    org_id=None,  # Will be set when org context is available
-                    event='user.created',
-                    data={
-                        'user_id': user_id,
-                        'email': data.email,
-                        'name': data.name,
-                        'subscription_tier': 'trial',
-                        'created_at': datetime.utcnow().isoformat()
-                    }
-                )
-                await pool.close()
+            # Get org_id if available (default to None for now)
+            await webhook_manager.trigger_event(
+                event_type='user.created',
+                organization_id=None,  # Will be set when org context is available
+                payload={
+                    'user_id': user_id,
+                    'email': data.email,
+                    'name': data.name,
+                    'subscription_tier': 'trial',
+                    'created_at': datetime.utcnow().isoformat()
+                }
+            )
         except Exception as e:
             # Don't fail registration if webhook fails
             print(f"Webhook trigger failed for user.created: {e}")
@@ -137,21 +130,15 @@ def add_password_auth_endpoints(app, password_auth, session_manager, get_db):
         
         # Trigger webhook for user.login event (async, non-blocking)
         try:
-            import os
-            db_url = os.getenv("DATABASE_URL")
-            if db_url and db_url.startswith("postgresql://"):
-                pool = await asyncpg.create_pool(db_url)
-                webhook_manager = WebhookManager(pool)
-                await webhook_manager.trigger_event(
-                    org_id=None,
-                    event='user.login',
-                    data={
-                        'user_id': user["id"],
-                        'email': user["email"],
-                        'login_at': datetime.utcnow().isoformat()
-                    }
-                )
-                await pool.close()
+            await webhook_manager.trigger_event(
+                event_type='user.login',
+                organization_id=None,
+                payload={
+                    'user_id': user["id"],
+                    'email': user["email"],
+                    'login_at': datetime.utcnow().isoformat()
+                }
+            )
         except Exception as e:
             print(f"Webhook trigger failed for user.login: {e}")
         
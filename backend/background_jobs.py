@@ -0,0 +1,148 @@
+"""
+Background Job Registrations
+
+The scheduled and long-running background work of Ops-Center, registered
+on the shared job runner (job_runner.py). The same registrations are used
+by the API process (JOB_RUNNER_MODE=embedded) and by `ops-center worker`
+processes; the job leases make every job run in only one of them.
+
+Jobs resolve their database pools when they run, so db_manager must be
+started first.
+"""
+
+import asyncio
+import logging
+import os
+
+from job_runner import JobRunner
+
+logger = logging.getLogger(__name__)
+
+
+async def _hold_worker(start, stop):
+    """Run a start_*/stop_* style worker until it ends or the job is cancelled"""
+    worker = await start()
+    try:
+        await worker.task
+    finally:
+        await stop()
+
+
+# ==================== Email (Epic 2.3) ====================
+
+async def _email_job(method_name: str):
+    from email_scheduler import email_scheduler
+    await email_scheduler.initialize()
+    await getattr(email_scheduler, method_name)()
+
+
+# ==================== Billing (Epic 5.0 / 6.0) ====================
+
+async def check_trials():
+    from trial_scheduler import trial_scheduler
+    await trial_scheduler.run_once()
+
+
+async def process_payment_retries():
+    from dunning_scheduler import dunning_scheduler
+    await dunning_scheduler._process_retries()
+
+
+async def check_grace_periods():
+    from dunning_scheduler import dunning_scheduler
+    await dunning_scheduler._check_grace_periods()
+
+
+# ==================== Backups ====================
+
+async def run_database_backup():
+    from database_backup_service import get_backup_service
+    result = await asyncio.to_thread(
+        get_backup_service().create_backup, description="Automated scheduled backup"
+    )
+    if not result['success']:
+        raise RuntimeError(f"Scheduled backup failed: {result.get('error')}")
+    logger.info(f"✅ Scheduled backup completed: {result['backup_file']}")
+
+
+# ==================== Host monitoring (Epic 2.5) ====================
+
+async def collect_host_metrics():
+    from metrics_collector import MetricsCollector
+    await MetricsCollector().start()
+
+
+async def check_alerts():
+    from alert_manager import alert_manager
+    await alert_manager.check_alerts()
+
+
+# ==================== Fleet (Epic 15) ====================
+
+async def run_fleet_health_worker():
+    from db_manager import db_manager
+    from fleet_health_worker import start_health_worker, stop_health_worker
+    await _hold_worker(
+        lambda: start_health_worker(db_manager.subsystem('fleet'), interval=30),
+        stop_health_worker
+    )
+
+
+async def run_fleet_metrics_worker():
+    from db_manager import db_manager
+    from fleet_metrics_worker import start_metrics_worker, stop_metrics_worker
+    await _hold_worker(
+        lambda: start_metrics_worker(db_manager.subsystem('fleet'), interval=60),
+        stop_metrics_worker
+    )
+
+
+# ==================== Kubernetes (Epic 16) ====================
+
+async def run_k8s_sync_worker():
+    from db_manager import db_manager
+    from k8s_sync_worker import start_k8s_sync_worker, stop_k8s_sync_worker
+    await _hold_worker(
+        lambda: start_k8s_sync_worker(db_manager.subsystem('core'), interval=30),
+        stop_k8s_sync_worker
+    )
+
+
+async def run_k8s_cost_calculator():
+    from db_manager import db_manager
+    from k8s_cost_calculator import start_k8s_cost_calculator, stop_k8s_cost_calculator
+    await _hold_worker(
+        lambda: start_k8s_cost_calculator(db_manager.subsystem('core'), interval=3600),
+        stop_k8s_cost_calculator
+    )
+
+
+def register_jobs(runner: JobRunner):
+    """Register every background job on runner (once per process)"""
+    if runner.jobs:
+        return
+
+    # Email notifications (times as in the former APScheduler setup)
+    runner.register('email.low_balance_check', lambda: _email_job('_check_low_balances'),
+                    cron={'hour': 9, 'minute': 0})
+    runner.register('email.monthly_credit_reset', lambda: _email_job('_send_monthly_reset_notifications'),
+                    cron={'day': 1, 'hour': 0, 'minute': 0})
+    runner.register('email.weekly_usage_summary', lambda: _email_job('_send_weekly_usage_summaries'),
+                    cron={'day_of_week': 'mon', 'hour': 9, 'minute': 0})
+
+    runner.register('billing.trial_expiration', check_trials, interval=3600)
+    runner.register('billing.payment_retries', process_payment_retries, interval=21600)
+    runner.register('billing.grace_periods', check_grace_periods, interval=86400)
+
+    if os.getenv('BACKUP_AUTO_ENABLED', 'true').lower() == 'true':
+        runner.register('backup.database', run_database_backup,
+                        interval=int(os.getenv('BACKUP_INTERVAL_HOURS', '24')) * 3600)
+
+    # Local host sampling and alerting run once per node
+    runner.register('monitoring.host_metrics', collect_host_metrics, scope='host')
+    runner.register('monitoring.alert_check', check_alerts, interval=60, scope='host')
+
+    runner.register('fleet.health_worker', run_fleet_health_worker)
+    runner.register('fleet.metrics_worker', run_fleet_metrics_worker)
+    runner.register('k8s.sync_worker', run_k8s_sync_worker)
+    runner.register('k8s.cost_calculator', run_k8s_cost_calculator)
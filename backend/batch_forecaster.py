@@ -0,0 +1,328 @@
+"""
+Batch Forecaster - Vectorized Forecast Math for the Prediction Engine
+
+Every (device, metric) series in a prediction cycle is laid out as one
+row of an aligned matrix (rows = series, columns = fixed time buckets,
+NaN where a bucket has no sample). Trend fits, exponential smoothing,
+model selection and threshold-crossing times are then computed for all
+rows at once with numpy instead of one Python-level fit per series.
+
+- OLS slope/intercept/r/p: closed-form sums over the masked matrix
+  (same results as scipy.stats.linregress per row)
+- Exponential smoothing: scipy.signal.lfilter along the time axis
+- Crossing time: solved from the fitted line for every row at once
+
+Epic 13: Smart Alerts - Prediction Engine
+"""
+
+import logging
+import warnings
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+import numpy as np
+from scipy import signal, stats
+
+logger = logging.getLogger(__name__)
+
+SMOOTHING_ALPHA = 0.3
+CONFIDENCE_Z = 1.96  # 95% interval
+
+SeriesKey = Tuple[Hashable, str]  # (device_id, metric_name)
+
+
+@dataclass
+class SeriesBatch:
+    """Aligned history for many series: values[i, j] is series i at bucket j"""
+    keys: List[SeriesKey]
+    start: datetime
+    step_seconds: float
+    values: np.ndarray  # shape (n_series, n_buckets), NaN = missing
+
+    @property
+    def mask(self) -> np.ndarray:
+        return ~np.isnan(self.values)
+
+    @property
+    def counts(self) -> np.ndarray:
+        return self.mask.sum(axis=1)
+
+    @property
+    def hours(self) -> np.ndarray:
+        """Bucket offsets from `start` in hours, shape (n_buckets,)"""
+        return np.arange(self.values.shape[1]) * (self.step_seconds / 3600.0)
+
+    def last_index(self) -> np.ndarray:
+        """Column of each row's most recent sample (-1 for empty rows)"""
+        mask = self.mask
+        last = mask.shape[1] - 1 - np.argmax(mask[:, ::-1], axis=1)
+        return np.where(mask.any(axis=1), last, -1)
+
+    def last_values(self) -> np.ndarray:
+        idx = self.last_index()
+        rows = np.arange(len(idx))
+        return np.where(idx >= 0, self.values[rows, np.maximum(idx, 0)], np.nan)
+
+    def tail(self, seconds: float) -> 'SeriesBatch':
+        """Same series restricted to the last `seconds` of the window"""
+        keep = max(1, int(round(seconds / self.step_seconds)))
+        if keep >= self.values.shape[1]:
+            return self
+        skipped = self.values.shape[1] - keep
+        return SeriesBatch(
+            keys=self.keys,
+            start=self.start + timedelta(seconds=skipped * self.step_seconds),
+            step_seconds=self.step_seconds,
+            values=self.values[:, skipped:],
+        )
+
+    def select(self, rows: np.ndarray) -> 'SeriesBatch':
+        """Subset of rows by boolean mask"""
+        return SeriesBatch(
+            keys=[self.keys[i] for i in np.flatnonzero(rows)],
+            start=self.start,
+            step_seconds=self.step_seconds,
+            values=self.values[rows],
+        )
+
+    def series(self, row: int) -> List[Tuple[datetime, float]]:
+        """One row back as (timestamp, value) pairs, missing buckets skipped"""
+        return [
+            (self.start + timedelta(seconds=float(j) * self.step_seconds), float(self.values[row, j]))
+            for j in np.flatnonzero(~np.isnan(self.values[row]))
+        ]
+
+
+def align_series(
+    rows: Iterable[Tuple[Hashable, str, datetime, float]],
+    keys: List[SeriesKey],
+    start: datetime,
+    end: datetime,
+    step_seconds: float = 3600,
+) -> SeriesBatch:
+    """
+    Bucket (device_id, metric_name, timestamp, value) rows into a SeriesBatch.
+
+    Rows are expected in timestamp order (as the history query returns
+    them); when several samples fall in one bucket the latest wins. Rows
+    for keys not in `keys` or outside [start, end) are ignored.
+    """
+    n_buckets = max(1, int(np.ceil((end - start).total_seconds() / step_seconds)))
+    index = {key: i for i, key in enumerate(keys)}
+    values = np.full((len(keys), n_buckets), np.nan)
+
+    for device_id, metric_name, timestamp, value in rows:
+        i = index.get((device_id, metric_name))
+        if i is None or value is None:
+            continue
+        j = int((timestamp - start).total_seconds() // step_seconds)
+        if 0 <= j < n_buckets:
+            values[i, j] = value
+
+    return SeriesBatch(keys=list(keys), start=start, step_seconds=step_seconds, values=values)
+
+
+def batch_from_series(
+    series: List[Tuple[datetime, float]],
+    key: SeriesKey = (None, ''),
+) -> SeriesBatch:
+    """Wrap one (timestamp, value) series as a single-row batch on its own sampling step"""
+    start = series[0][0]
+    offsets = np.array([(t - start).total_seconds() for t, _ in series])
+    steps = np.diff(offsets)
+    steps = steps[steps > 0]
+    step = float(np.median(steps)) if len(steps) else 3600.0
+
+    buckets = np.rint(offsets / step).astype(int)
+    values = np.full((1, buckets[-1] + 1), np.nan)
+    values[0, buckets] = [v for _, v in series]
+    return SeriesBatch(keys=[key], start=start, step_seconds=step, values=values)
+
+
+# ----------------------------------------------------------------------
+# Vectorized statistics
+# ----------------------------------------------------------------------
+
+def linear_fit(x: np.ndarray, values: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Row-wise least squares of values against x, ignoring NaNs.
+
+    Returns arrays (one entry per row) of slope, intercept, r_value,
+    p_value, n and mse (mean squared residual). Rows with fewer than two
+    points or no variance in x get NaN slope.
+    """
+    mask = ~np.isnan(values)
+    w = mask.astype(float)
+    y = np.where(mask, values, 0.0)
+    x = np.broadcast_to(x, values.shape)
+
+    n = w.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mx = (w * x).sum(axis=1) / n
+        my = y.sum(axis=1) / n
+        dx = (x - mx[:, None]) * w
+        dy = (y - my[:, None]) * w
+        sxx = (dx * dx).sum(axis=1)
+        syy = (dy * dy).sum(axis=1)
+        sxy = (dx * dy).sum(axis=1)
+
+        slope = np.where(sxx > 0, sxy / sxx, np.nan)
+        intercept = my - slope * mx
+        r = np.where((sxx > 0) & (syy > 0), sxy / np.sqrt(sxx * syy), 0.0)
+        r = np.clip(r, -1.0, 1.0)
+
+        df = n - 2
+        t = r * np.sqrt(df / np.maximum((1.0 - r) * (1.0 + r), 1e-300))
+        p = np.where(df > 0, 2 * stats.t.sf(np.abs(t), np.maximum(df, 1)), np.nan)
+
+        residuals = np.where(mask, values - (slope[:, None] * x + intercept[:, None]), 0.0)
+        mse = (residuals ** 2).sum(axis=1) / n
+
+    return {
+        'slope': slope,
+        'intercept': intercept,
+        'r_value': r,
+        'p_value': p,
+        'n': n,
+        'mse': mse,
+    }
+
+
+def forward_fill(values: np.ndarray) -> np.ndarray:
+    """Carry the last observed value across NaN gaps (leading NaNs stay NaN)"""
+    mask = ~np.isnan(values)
+    idx = np.where(mask, np.arange(values.shape[1]), 0)
+    np.maximum.accumulate(idx, axis=1, out=idx)
+    filled = values[np.arange(values.shape[0])[:, None], idx]
+    filled[~np.maximum.accumulate(mask, axis=1)] = np.nan
+    return filled
+
+
+def exponential_smooth(values: np.ndarray, alpha: float = SMOOTHING_ALPHA) -> np.ndarray:
+    """
+    Simple exponential smoothing of every row, seeded with its first sample.
+
+    Gaps are forward-filled first; leading NaNs are smoothed as the first
+    observed value and masked back out afterwards.
+    """
+    filled = forward_fill(values)
+    leading = np.isnan(filled)
+    first = np.nan_to_num(filled[np.arange(filled.shape[0]), np.argmax(~leading, axis=1)])
+    filled = np.where(leading, first[:, None], filled)
+
+    # s[t] = alpha * y[t] + (1 - alpha) * s[t-1], with s[-1] = y[0] so s[0] = y[0]
+    zi = ((1 - alpha) * first)[:, None]
+    smoothed, _ = signal.lfilter([alpha], [1.0, -(1 - alpha)], filled, axis=1, zi=zi)
+    smoothed[leading] = np.nan
+    return smoothed
+
+
+def select_models(values: np.ndarray, fit: Dict[str, np.ndarray]) -> np.ndarray:
+    """
+    Per-row model choice: 'linear' for strong trends (|r| > 0.7),
+    'exponential' for volatile series (coefficient of variation > 0.3),
+    'linear' otherwise.
+    """
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cv = np.nanstd(values, axis=1) / (np.nanmean(values, axis=1) + 1e-10)
+    exponential = (np.abs(fit['r_value']) <= 0.7) & (cv > 0.3)
+    return np.where(exponential, 'exponential', 'linear')
+
+
+def forecast(
+    batch: SeriesBatch,
+    horizons_minutes: List[int],
+    fit: Optional[Dict[str, np.ndarray]] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Forecast every row of `batch` at every horizon.
+
+    Returns predicted/lower/upper arrays of shape (n_series, n_horizons)
+    and the chosen model per row.
+    """
+    values = batch.values
+    hours = batch.hours
+    fit = fit or linear_fit(hours, values)
+    models = select_models(values, fit)
+    horizons_h = np.asarray(horizons_minutes, dtype=float) / 60.0
+
+    # Linear: extrapolate from each row's last sample
+    last_h = hours[np.maximum(batch.last_index(), 0)]
+    future_h = last_h[:, None] + horizons_h[None, :]
+    linear_pred = fit['slope'][:, None] * future_h + fit['intercept'][:, None]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        linear_margin = CONFIDENCE_Z * np.sqrt(fit['mse'] * (1 + 1 / fit['n']))
+
+    # Exponential: flat forecast at the last smoothed level
+    smoothed = exponential_smooth(values)
+    mask = batch.mask
+    resid = np.where(mask[:, 1:], values[:, 1:] - smoothed[:, 1:], np.nan)
+    with warnings.catch_warnings():
+        # All-NaN rows (too short to have residuals) just get a NaN margin
+        warnings.simplefilter('ignore', RuntimeWarning)
+        exp_margin = CONFIDENCE_Z * np.nanstd(resid, axis=1)
+    rows = np.arange(values.shape[0])
+    level = smoothed[rows, np.maximum(batch.last_index(), 0)]
+    exp_pred = np.repeat(level[:, None], len(horizons_h), axis=1)
+
+    use_exp = (models == 'exponential')[:, None]
+    predicted = np.where(use_exp, exp_pred, linear_pred)
+    margin = np.where(use_exp, exp_margin[:, None], linear_margin[:, None])
+
+    return {
+        'model_type': models,
+        'predicted': predicted,
+        'lower': predicted - margin,
+        'upper': predicted + margin,
+    }
+
+
+def trend_labels(slope: np.ndarray, stable_below: float = 0.1) -> np.ndarray:
+    """'stable' / 'increasing' / 'decreasing' per row (slope per hour)"""
+    return np.where(
+        np.isnan(slope) | (np.abs(slope) < stable_below), 'stable',
+        np.where(slope > 0, 'increasing', 'decreasing')
+    )
+
+
+def crossing_hours(
+    batch: SeriesBatch,
+    fit: Dict[str, np.ndarray],
+    upper: np.ndarray,
+    lower: np.ndarray,
+    min_confidence: float = 0.5,
+) -> Dict[str, np.ndarray]:
+    """
+    Hours from each row's last sample until its fitted line crosses the
+    relevant threshold (upper for rising rows, lower for falling rows).
+
+    Rows that are stable, already past the threshold, low-confidence
+    (|r| < min_confidence) or moving away from it get NaN.
+    """
+    slope = fit['slope']
+    trend = trend_labels(slope)
+    current = batch.last_values()
+    current_h = batch.hours[np.maximum(batch.last_index(), 0)]
+
+    rising = trend == 'increasing'
+    threshold = np.where(rising, upper, lower)
+    threshold_type = np.where(rising, 'upper', 'lower')
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        hours = (threshold - fit['intercept']) / slope - current_h
+
+    valid = (
+        (trend != 'stable')
+        & np.where(rising, current < threshold, current > threshold)
+        & (np.abs(fit['r_value']) >= min_confidence)
+        & (hours > 0)
+    )
+
+    return {
+        'hours': np.where(valid, hours, np.nan),
+        'threshold': threshold,
+        'threshold_type': threshold_type,
+        'trend': trend,
+        'current': current,
+    }
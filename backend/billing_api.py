@@ -14,6 +14,7 @@ from lago_integration import (
     get_subscription,
     get_customer
 )
+from db_manager import db_manager
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/v1/billing", tags=["billing-lago"])
@@ -103,17 +104,8 @@ async def get_subscription_plans():
 
     # Try to fetch from database first
     try:
-        import asyncpg
-        import os
-
         # Get database connection
-        conn = await asyncpg.connect(
-            host=os.getenv("POSTGRES_HOST", "unicorn-postgresql"),
-            port=int(os.getenv("POSTGRES_PORT", "5432")),
-            user=os.getenv("POSTGRES_USER", "unicorn"),
-            password=os.getenv("POSTGRES_PASSWORD", "unicorn"),
-            database=os.getenv("POSTGRES_DB", "unicorn_db")
-        )
+        conn = await db_manager.connect('billing')
 
         try:
             # Query subscription tiers
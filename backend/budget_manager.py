@@ -184,6 +184,8 @@ class BudgetManager:
         
         logger.info(f"Created budget {row['id']} for organization {organization_id}")
         
+        await self._notify_tracker(row=row)
+        
         return self._row_to_budget(row)
     
     async def update_budget(
@@ -243,6 +245,8 @@ class BudgetManager:
         
         logger.info(f"Updated budget {budget_id}")
         
+        await self._notify_tracker(row=row)
+        
         return self._row_to_budget(row)
     
     async def get_budget(self, budget_id: str) -> Budget:
@@ -255,7 +259,10 @@ class BudgetManager:
         if not row:
             raise ValueError(f"Budget {budget_id} not found")
         
-        return self._row_to_budget(row)
+        budget = self._row_to_budget(row)
+        await self._apply_live_spend([budget])
+        
+        return budget
     
     async def list_budgets(
         self,
@@ -292,7 +299,10 @@ class BudgetManager:
         
         rows = await self.db.fetch(query, *params)
         
-        return [self._row_to_budget(row) for row in rows]
+        budgets = [self._row_to_budget(row) for row in rows]
+        await self._apply_live_spend(budgets)
+        
+        return budgets
     
     async def delete_budget(self, budget_id: str) -> bool:
         """
@@ -313,6 +323,7 @@ class BudgetManager:
         
         if deleted:
             logger.info(f"Deleted budget {budget_id}")
+            await self._notify_tracker(budget_id=budget_id)
         
         return deleted
     
@@ -347,8 +358,11 @@ class BudgetManager:
         
         budget = self._row_to_budget(row)
         
-        # Check if alert level changed
-        await self._update_alert_level(budget)
+        # Tracked budgets alert on the threshold crossing itself; marking the
+        # level here first would suppress that alert
+        from budget_tracker import budget_tracker
+        if not await budget_tracker.adjust(budget_id, additional_cost):
+            await self._update_alert_level(budget)
         
         return budget
     
@@ -382,6 +396,7 @@ class BudgetManager:
             WHERE organization_id = $1
               AND period_start >= $2
               AND period_end <= $3
+              AND period_type = 'daily'
         """
         
         row = await self.db.fetchrow(
@@ -406,6 +421,10 @@ class BudgetManager:
         updated_row = await self.db.fetchrow(update_query, current_spend, budget_id)
         updated_budget = self._row_to_budget(updated_row)
         
+        # The recalculated total replaces the streaming one
+        from budget_tracker import budget_tracker
+        await budget_tracker.reset(budget_id, current_spend)
+        
         # Check alert level
         await self._update_alert_level(updated_budget)
         
@@ -651,6 +670,7 @@ class BudgetManager:
             WHERE organization_id = $1
               AND period_start >= $2
               AND period_start <= $3
+              AND period_type = 'daily'
             GROUP BY DATE(period_start)
             ORDER BY date ASC
         """
@@ -706,6 +726,29 @@ class BudgetManager:
                 budget.id
             )
     
+    async def _apply_live_spend(self, budgets: List[Budget]) -> None:
+        """Replace stored spend with the streaming tracker's running totals"""
+        from budget_tracker import budget_tracker
+        
+        try:
+            live = await budget_tracker.live_spend(b.id for b in budgets)
+        except Exception as e:
+            logger.warning(f"Failed to read live budget spend: {e}")
+            return
+        
+        for budget in budgets:
+            if str(budget.id) in live:
+                budget.current_spend = live[str(budget.id)]
+    
+    async def _notify_tracker(self, row: Optional[asyncpg.Record] = None, budget_id: Optional[str] = None) -> None:
+        """Start, update or stop streaming spend tracking for a written budget"""
+        from budget_tracker import budget_tracker
+        
+        try:
+            await budget_tracker.budget_changed(row, budget_id)
+        except Exception as e:
+            logger.warning(f"Failed to update budget tracker: {e}")
+    
     def _row_to_budget(self, row: asyncpg.Record) -> Budget:
         """Convert database row to Budget object"""
         alert_contacts = None
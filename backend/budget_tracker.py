@@ -0,0 +1,412 @@
+"""
+Streaming Budget Tracker for Epic 14: Cost Optimization Dashboard
+
+Keeps a running spend total for every active budget and moves it as usage
+is charged, instead of waiting for recalculate_budget_spend() to re-sum the
+usage tables:
+
+- LiteLLMCreditSystem.debit_credits() calls record_spend() after each
+  committed debit; that is one INCRBYFLOAT per active budget of the org and
+  a comparison against precomputed threshold amounts
+- the worker whose increment crosses the warning, critical or limit amount
+  triggers the budget alert right away (BudgetManager.trigger_budget_alerts)
+- every BUDGET_RECONCILE_INTERVAL seconds the totals are written back to
+  budgets.current_spend and the active budget list is reloaded; budget
+  writes bump a Redis generation so other workers reload within
+  BUDGET_SYNC_INTERVAL seconds
+
+Totals live in Redis (budget:spend:<id>) so all workers share them. A total
+lost from Redis (eviction, restart) is re-seeded from the stored spend on
+the next charge, and flushes never lower budgets.current_spend except for
+an explicit reset(). Without Redis each worker adds the spend it counted
+since its last flush to budgets.current_spend and refreshes its view of
+the total from the database on every reconcile.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from budget_manager import AlertLevel, get_budget_manager
+
+logger = logging.getLogger(__name__)
+
+BUDGET_RECONCILE_INTERVAL = float(os.getenv('BUDGET_RECONCILE_INTERVAL', '30'))
+BUDGET_SYNC_INTERVAL = float(os.getenv('BUDGET_SYNC_INTERVAL', '5'))
+
+SPEND_KEY = 'budget:spend:{}'
+GENERATION_KEY = 'budget:generation'
+
+# KEYS[1] running total; ARGV: amount, stored spend, ttl (s). Seeds a missing
+# total from the stored spend so a lost key does not restart from zero.
+_REDIS_ADD = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+end
+return redis.call('INCRBYFLOAT', KEYS[1], ARGV[1])
+"""
+
+LEVELS = (AlertLevel.NONE, AlertLevel.WARNING, AlertLevel.CRITICAL, AlertLevel.EXCEEDED)
+
+
+@dataclass
+class TrackedBudget:
+    """The parts of a budget needed to account spend against it"""
+    id: str
+    organization_id: str
+    start_date: date
+    end_date: date
+    alert_enabled: bool
+    thresholds: Tuple[float, float, float]  # warning, critical and limit amounts
+
+    @classmethod
+    def from_row(cls, row) -> 'TrackedBudget':
+        limit = float(row['total_limit'])
+        return cls(
+            id=str(row['id']),
+            organization_id=str(row['organization_id']),
+            start_date=row['start_date'],
+            end_date=row['end_date'],
+            alert_enabled=row['alert_enabled'],
+            thresholds=(
+                limit * float(row['warning_threshold']),
+                limit * float(row['critical_threshold']),
+                limit
+            )
+        )
+
+    def level(self, spend: float) -> int:
+        """Index into LEVELS for a spend amount"""
+        if self.thresholds[2] <= 0:
+            return 0
+        return bisect_right(self.thresholds, spend)
+
+    def covers(self, day: date) -> bool:
+        return self.start_date <= day <= self.end_date
+
+    def ttl(self) -> timedelta:
+        """How long to keep the running total"""
+        return timedelta(days=(self.end_date - date.today()).days + 2)
+
+
+class BudgetTracker:
+    """Running per-budget spend with threshold crossing alerts"""
+
+    def __init__(
+        self,
+        reconcile_interval: float = BUDGET_RECONCILE_INTERVAL,
+        sync_interval: float = BUDGET_SYNC_INTERVAL
+    ):
+        self.reconcile_interval = reconcile_interval
+        self.sync_interval = sync_interval
+        self.db_pool = None
+        self.redis = None
+
+        self.budgets: Dict[str, TrackedBudget] = {}
+        self.by_org: Dict[str, List[TrackedBudget]] = {}
+        self._stored: Dict[str, float] = {}  # last known budgets.current_spend
+        # Used when Redis is unavailable: this worker's view of the totals and
+        # the spend it counted since its last flush
+        self._totals: Dict[str, float] = {}
+        self._pending: Dict[str, float] = {}
+        self._generation: Optional[str] = None
+        self._reconciled_at: Optional[float] = None
+
+        self._task: Optional[asyncio.Task] = None
+        self._start_lock = asyncio.Lock()
+        self._reconcile_lock = asyncio.Lock()
+        self._alert_tasks: set = set()
+
+        self.events = 0
+        self.crossings = 0
+        self.alerts_sent = 0
+        self.reconciles = 0
+        self.reconcile_errors = 0
+        self.last_reconcile: Optional[datetime] = None
+
+    async def start(self, db_pool, redis_client=None):
+        async with self._start_lock:
+            if self._task is not None:
+                return
+            self.db_pool = db_pool
+            self.redis = redis_client
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"Budget tracker started (reconcile every {self.reconcile_interval}s)")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        # Persist what was counted since the last reconcile
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Failed to flush budget spend on shutdown: {e}")
+        logger.info("Budget tracker stopped")
+
+    async def _run(self):
+        while True:
+            try:
+                if (self._reconciled_at is None
+                        or time.monotonic() - self._reconciled_at >= self.reconcile_interval
+                        or await self._generation_changed()):
+                    await self.reconcile()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.reconcile_errors += 1
+                logger.error(f"Budget reconciliation failed: {e}")
+                self._reconciled_at = time.monotonic()
+            await asyncio.sleep(self.sync_interval)
+
+    # ==================== Event path ====================
+
+    async def record_spend(self, organization_id: Optional[str], cost: float):
+        """Account a committed usage charge against the org's active budgets"""
+        if not organization_id or not cost or cost <= 0:
+            return
+        budgets = self.by_org.get(str(organization_id))
+        if not budgets:
+            return
+
+        self.events += 1
+        today = date.today()
+        for budget in budgets:
+            if budget.covers(today):
+                try:
+                    await self._add(budget, float(cost))
+                except Exception as e:
+                    logger.warning(f"Failed to record spend for budget {budget.id}: {e}")
+
+    async def adjust(self, budget_id: str, amount: Decimal) -> bool:
+        """Add a manual spend adjustment; False if the budget is not tracked"""
+        budget = self.budgets.get(str(budget_id))
+        if budget is None:
+            return False
+        # BudgetManager.add_spend() already added it to current_spend
+        await self._add(budget, float(amount), stored=True)
+        return True
+
+    async def _add(self, budget: TrackedBudget, cost: float, stored: bool = False):
+        if self.redis is not None:
+            total = float(await self.redis.eval(
+                _REDIS_ADD, 1, SPEND_KEY.format(budget.id),
+                cost, self._stored.get(budget.id, 0.0), int(budget.ttl().total_seconds())
+            ))
+        else:
+            total = self._totals.get(budget.id, 0.0) + cost
+            self._totals[budget.id] = total
+            if not stored:
+                self._pending[budget.id] = self._pending.get(budget.id, 0.0) + cost
+
+        # Only the increment that crosses a threshold sees the level change
+        if budget.level(total) > budget.level(total - cost):
+            self.crossings += 1
+            logger.info(
+                f"Budget {budget.id} crossed {LEVELS[budget.level(total)].value}: ${total:.2f}"
+            )
+            if budget.alert_enabled:
+                task = asyncio.create_task(self._alert(budget.id))
+                self._alert_tasks.add(task)
+                task.add_done_callback(self._alert_tasks.discard)
+
+    async def _alert(self, budget_id: str):
+        try:
+            await self.flush([budget_id])
+            manager = await get_budget_manager(self.db_pool)
+            if await manager.trigger_budget_alerts(budget_id):
+                self.alerts_sent += 1
+        except Exception as e:
+            logger.error(f"Failed to send budget alert for {budget_id}: {e}")
+
+    # ==================== Totals ====================
+
+    async def live_spend(self, budget_ids: Iterable[str]) -> Dict[str, Decimal]:
+        """Current running totals for the tracked budgets among budget_ids"""
+        ids = [str(i) for i in budget_ids if str(i) in self.budgets]
+        if not ids:
+            return {}
+        totals = await self._read_totals(ids)
+        return {i: Decimal(str(round(v, 8))) for i, v in totals.items()}
+
+    async def reset(self, budget_id: str, spend: Decimal):
+        """Replace a running total, e.g. after a full recalculation"""
+        budget_id = str(budget_id)
+        if budget_id not in self.budgets:
+            return
+        self._stored[budget_id] = float(spend)
+        if self.redis is not None:
+            await self.redis.set(SPEND_KEY.format(budget_id), str(spend))
+            # The only write allowed to lower current_spend
+            await self.flush([budget_id], allow_decrease=True)
+        else:
+            self._totals[budget_id] = float(spend)
+            self._pending.pop(budget_id, None)
+
+    async def _read_totals(self, ids: List[str]) -> Dict[str, float]:
+        if self.redis is not None:
+            values = await self.redis.mget([SPEND_KEY.format(i) for i in ids])
+            return {i: float(v) for i, v in zip(ids, values) if v is not None}
+        return {i: self._totals[i] for i in ids if i in self._totals}
+
+    # ==================== Reconciliation ====================
+
+    async def flush(self, budget_ids: Optional[List[str]] = None, allow_decrease: bool = False):
+        """Write running totals back to budgets.current_spend"""
+        if self.db_pool is None:
+            return
+        ids = list(budget_ids or self.budgets)
+        if self.redis is None:
+            await self._flush_pending(ids)
+            return
+
+        totals = await self._read_totals(ids)
+        if not totals:
+            return
+        new_spend = "$2" if allow_decrease else "GREATEST(current_spend, $2)"
+        async with self.db_pool.acquire() as conn:
+            await conn.executemany(
+                f"""
+                UPDATE budgets
+                SET current_spend = {new_spend}, last_calculated_at = NOW()
+                WHERE id = $1 AND current_spend IS DISTINCT FROM {new_spend}
+                """,
+                [(budget_id, Decimal(str(round(total, 8)))) for budget_id, total in totals.items()]
+            )
+        for budget_id, total in totals.items():
+            if allow_decrease or total > self._stored.get(budget_id, 0.0):
+                self._stored[budget_id] = total
+
+    async def _flush_pending(self, ids: List[str]):
+        """Add the spend this worker counted since its last flush"""
+        deltas = {i: self._pending[i] for i in ids if self._pending.get(i)}
+        if not deltas:
+            return
+        async with self.db_pool.acquire() as conn:
+            await conn.executemany(
+                """
+                UPDATE budgets
+                SET current_spend = current_spend + $2, last_calculated_at = NOW()
+                WHERE id = $1
+                """,
+                [(budget_id, Decimal(str(round(delta, 8)))) for budget_id, delta in deltas.items()]
+            )
+        # Spend counted while the update ran stays pending
+        for budget_id, delta in deltas.items():
+            remaining = self._pending.get(budget_id, 0.0) - delta
+            if abs(remaining) > 1e-9:
+                self._pending[budget_id] = remaining
+            else:
+                self._pending.pop(budget_id, None)
+
+    async def reconcile(self):
+        """Flush running totals, then reload the active budgets"""
+        async with self._reconcile_lock:
+            await self.flush()
+
+            async with self.db_pool.acquire() as conn:
+                rows = await conn.fetch(
+                    """
+                    SELECT id, organization_id, total_limit, warning_threshold,
+                           critical_threshold, start_date, end_date, current_spend, alert_enabled
+                    FROM budgets
+                    WHERE is_active AND CURRENT_DATE BETWEEN start_date AND end_date
+                    """
+                )
+
+            budgets = {}
+            for row in rows:
+                budget = TrackedBudget.from_row(row)
+                budgets[budget.id] = budget
+                await self._seed(budget, row['current_spend'])
+            self._install(budgets)
+
+            self._reconciled_at = time.monotonic()
+            self.reconciles += 1
+            self.last_reconcile = datetime.now()
+
+    async def _seed(self, budget: TrackedBudget, spend: Decimal):
+        """Start a running total from the stored spend unless one exists"""
+        self._stored[budget.id] = float(spend)
+        if self.redis is not None:
+            await self.redis.set(SPEND_KEY.format(budget.id), str(spend), ex=budget.ttl(), nx=True)
+        else:
+            # The stored spend includes every worker's flushed spend
+            self._totals[budget.id] = float(spend) + self._pending.get(budget.id, 0.0)
+
+    def _install(self, budgets: Dict[str, TrackedBudget]):
+        by_org: Dict[str, List[TrackedBudget]] = {}
+        for budget in budgets.values():
+            by_org.setdefault(budget.organization_id, []).append(budget)
+        self.budgets = budgets
+        self.by_org = by_org
+        for values in (self._totals, self._pending, self._stored):
+            for budget_id in list(values):
+                if budget_id not in budgets:
+                    del values[budget_id]
+
+    # ==================== Budget changes ====================
+
+    async def budget_changed(self, row=None, budget_id: Optional[str] = None):
+        """
+        Start, update or stop tracking a budget after it was written
+
+        Pass the budget's row after create/update, or just its id after delete.
+        """
+        budgets = dict(self.budgets)
+        if row is not None and row['is_active'] and row['start_date'] <= date.today() <= row['end_date']:
+            budget = TrackedBudget.from_row(row)
+            budgets[budget.id] = budget
+            await self._seed(budget, row['current_spend'])
+        else:
+            budget_id = str(row['id']) if row is not None else str(budget_id)
+            budgets.pop(budget_id, None)
+            if self.redis is not None and row is None:
+                await self.redis.delete(SPEND_KEY.format(budget_id))
+        self._install(budgets)
+
+        if self.redis is not None:
+            try:
+                self._generation = str(await self.redis.incr(GENERATION_KEY))
+            except Exception as e:
+                logger.warning(f"Failed to publish budget change: {e}")
+
+    async def _generation_changed(self) -> bool:
+        if self.redis is None:
+            return False
+        generation = await self.redis.get(GENERATION_KEY)
+        generation = None if generation is None else str(generation)
+        if generation == self._generation:
+            return False
+        self._generation = generation
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None,
+            "shared": self.redis is not None,
+            "budgets": len(self.budgets),
+            "organizations": len(self.by_org),
+            "events": self.events,
+            "crossings": self.crossings,
+            "alerts_sent": self.alerts_sent,
+            "reconciles": self.reconciles,
+            "reconcile_errors": self.reconcile_errors,
+            "last_reconcile": self.last_reconcile.isoformat() if self.last_reconcile else None,
+        }
+
+
+# Global instance
+budget_tracker = BudgetTracker()
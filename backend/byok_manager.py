@@ -294,6 +294,35 @@ class BYOKManager:
             logger.error(f"Error listing providers: {e}")
             return []
 
+    async def list_enabled_providers(self, user_id: str) -> List[str]:
+        """
+        Names of the providers the user has an enabled key for
+
+        Same providers as list_user_providers without decrypting any key.
+
+        Args:
+            user_id: User identifier
+
+        Returns:
+            Lowercased provider names, sorted
+        """
+        try:
+            async with self.db_pool.acquire() as conn:
+                rows = await conn.fetch(
+                    """
+                    SELECT DISTINCT LOWER(provider) AS provider
+                    FROM user_provider_keys
+                    WHERE user_id = $1 AND enabled = TRUE
+                    ORDER BY 1
+                    """,
+                    user_id
+                )
+                return [row['provider'] for row in rows]
+
+        except Exception as e:
+            logger.error(f"Error listing enabled providers: {e}")
+            return []
+
     async def toggle_provider(
         self,
         user_id: str,
@@ -0,0 +1,435 @@
+"""
+Churn Feature Store
+
+Precomputed churn scores behind /api/v1/analytics/users/churn/*, so the
+churn dashboards page through a ready ranking instead of pulling every
+user from Keycloak and scoring them one by one per request.
+
+- Every CHURN_FEATURE_REFRESH_HOURS the users are fetched once and their
+  raw churn inputs (signup and last login timestamps, login count, 30-day
+  activity from one grouped activity_logs query, plan tier) are written
+  column-wise to a compressed .npz file (CHURN_FEATURE_FILE). Timestamps
+  are stored absolute, so the file stays valid as days pass.
+- Every CHURN_SCORE_INTERVAL seconds the whole matrix is scored in one
+  vectorized pass: with the trained ChurnPredictor when a model is saved,
+  otherwise with the login-recency heuristic. The ranking by probability,
+  per-risk-level rankings and a user_id -> row index are kept in memory.
+- Other workers on the host load the file when it changes; an flock keeps
+  them from fetching at the same time.
+"""
+
+import asyncio
+import fcntl
+import logging
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FEATURE_FILE = Path(os.getenv(
+    'CHURN_FEATURE_FILE', str(Path(__file__).parent / 'data' / 'churn_features.npz')
+))
+REFRESH_HOURS = float(os.getenv('CHURN_FEATURE_REFRESH_HOURS', '24'))
+SCORE_INTERVAL = float(os.getenv('CHURN_SCORE_INTERVAL', '3600'))
+
+# Saved by ChurnPredictor.save_model()
+MODEL_FILE = Path(__file__).parent / 'data' / 'churn_model.pkl'
+
+PLAN_TIER_MAP = {"trial": 0, "starter": 1, "professional": 2, "enterprise": 3}
+
+# Stored columns, one value per user
+RAW_COLUMNS = [
+    "created_ts",            # signup, epoch seconds
+    "last_login_ts",         # epoch seconds, NaN if never
+    "login_count",
+    "feature_usage_score",
+    "plan_tier",
+    "session_duration_avg",  # minutes
+    "api_calls_30d",
+]
+
+RISK_LEVELS = ("low", "medium", "high")
+
+
+@dataclass
+class FeatureMatrix:
+    """Churn inputs for all users, column-wise"""
+    user_ids: np.ndarray   # str
+    usernames: np.ndarray  # str
+    raw: np.ndarray        # float64, (users, len(RAW_COLUMNS))
+    built_at: float
+
+    def __len__(self):
+        return len(self.user_ids)
+
+    def column(self, name: str) -> np.ndarray:
+        return self.raw[:, RAW_COLUMNS.index(name)]
+
+    def save(self, path: Path):
+        """Write atomically so readers never see a partial file"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + '.tmp')
+        with open(tmp, 'wb') as f:
+            np.savez_compressed(
+                f, user_ids=self.user_ids, usernames=self.usernames,
+                raw=self.raw, built_at=np.array(self.built_at)
+            )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path) -> 'FeatureMatrix':
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                user_ids=data['user_ids'],
+                usernames=data['usernames'],
+                raw=data['raw'],
+                built_at=float(data['built_at']),
+            )
+
+
+def _epoch(value: Optional[datetime]) -> float:
+    return value.timestamp() if value else np.nan
+
+
+def build_feature_matrix(users: List[Dict], activity: Dict[str, Dict]) -> FeatureMatrix:
+    """
+    Feature matrix from user dicts (as returned by query_keycloak_users) and
+    per-user 30-day activity; users without a signup date are skipped
+    """
+    users = [u for u in users if u.get('created_at') and u.get('user_id')]
+    raw = np.zeros((len(users), len(RAW_COLUMNS)))
+    for i, user in enumerate(users):
+        usage = activity.get(user['user_id'], {})
+        actions = usage.get('total_actions', 0) or 0
+        raw[i] = (
+            _epoch(user['created_at']),
+            _epoch(user.get('last_login')),
+            user.get('login_count', 0) or 0,
+            min(100, actions * 2 + (usage.get('active_days', 0) or 0) * 5),
+            PLAN_TIER_MAP.get(user.get('plan_tier'), 0),
+            (usage.get('avg_duration', 0) or 0) / 60,
+            actions,
+        )
+    return FeatureMatrix(
+        user_ids=np.array([u['user_id'] for u in users], dtype=str),
+        usernames=np.array([u.get('username') or 'unknown' for u in users], dtype=str),
+        raw=raw,
+        built_at=time.time(),
+    )
+
+
+def model_features(matrix: FeatureMatrix, now: float) -> np.ndarray:
+    """ChurnPredictor.FEATURE_COLUMNS as of `now`, for all users"""
+    days_since_signup = np.floor((now - matrix.column('created_ts')) / 86400)
+    last_login = np.floor((now - matrix.column('last_login_ts')) / 86400)
+    return np.column_stack([
+        days_since_signup,
+        matrix.column('login_count'),
+        matrix.column('feature_usage_score'),
+        matrix.column('plan_tier'),
+        np.nan_to_num(last_login, nan=999),
+        matrix.column('session_duration_avg'),
+        matrix.column('api_calls_30d'),
+    ])
+
+
+def heuristic_scores(matrix: FeatureMatrix, now: float) -> np.ndarray:
+    """Churn probability (0-100) from login recency alone"""
+    days_since_signup = np.floor((now - matrix.column('created_ts')) / 86400)
+    last_login = matrix.column('last_login_ts')
+    idle = np.where(np.isnan(last_login), days_since_signup, np.floor((now - last_login) / 86400))
+    return np.select(
+        [idle > 60, idle > 30],
+        [np.minimum(95.0, 50.0 + (idle - 60) * 0.5), 30.0 + (idle - 30)],
+        default=idle * 0.5
+    )
+
+
+@dataclass
+class ChurnScores:
+    """One scoring pass over the feature matrix"""
+    matrix: FeatureMatrix
+    probability: np.ndarray    # 0-100
+    risk: np.ndarray           # index into RISK_LEVELS
+    days_since_signup: np.ndarray
+    last_login_days_ago: np.ndarray
+    order: np.ndarray          # rows by probability, highest first
+    by_risk: Dict[str, np.ndarray]
+    index: Dict[str, int]      # user_id -> row
+    scored_at: float
+    method: str
+
+    def row(self, i: int) -> Dict[str, Any]:
+        return {
+            "user_id": str(self.matrix.user_ids[i]),
+            "username": str(self.matrix.usernames[i]),
+            "churn_probability": round(float(self.probability[i]), 2),
+            "risk_level": RISK_LEVELS[self.risk[i]],
+            "days_since_signup": int(self.days_since_signup[i]),
+            "last_login_days_ago": int(self.last_login_days_ago[i]),
+            "login_count": int(self.matrix.column('login_count')[i]),
+        }
+
+
+def score_matrix(matrix: FeatureMatrix, predictor=None, now: Optional[float] = None) -> ChurnScores:
+    """Score every user at once and precompute the rankings"""
+    now = now or time.time()
+    days_since_signup = np.floor((now - matrix.column('created_ts')) / 86400)
+    last_login = matrix.column('last_login_ts')
+    last_login_days_ago = np.where(
+        np.isnan(last_login), days_since_signup, np.floor((now - last_login) / 86400)
+    )
+
+    if predictor is not None and len(matrix):
+        probability = predictor.predict_proba_matrix(model_features(matrix, now)) * 100
+        risk = np.select([probability >= 70, probability >= 40], [2, 1], default=0)
+        method = "model"
+    else:
+        probability = heuristic_scores(matrix, now)
+        risk = np.select([last_login_days_ago > 60, last_login_days_ago > 30], [2, 1], default=0)
+        method = "heuristic"
+
+    order = np.argsort(-probability, kind='stable')
+    return ChurnScores(
+        matrix=matrix,
+        probability=probability,
+        risk=risk,
+        days_since_signup=days_since_signup,
+        last_login_days_ago=last_login_days_ago,
+        order=order,
+        by_risk={level: order[risk[order] == code] for code, level in enumerate(RISK_LEVELS)},
+        index={user_id: i for i, user_id in enumerate(matrix.user_ids.tolist())},
+        scored_at=now,
+        method=method,
+    )
+
+
+class ChurnFeatureStore:
+    """Materialized churn features and scores with a background refresh"""
+
+    def __init__(
+        self,
+        path: Path = FEATURE_FILE,
+        refresh_hours: float = REFRESH_HOURS,
+        score_interval: float = SCORE_INTERVAL
+    ):
+        self.path = Path(path)
+        self.refresh_seconds = refresh_hours * 3600
+        self.score_interval = score_interval
+        self.fetch_users: Optional[Callable[[], Awaitable[List[Dict]]]] = None
+
+        self.matrix: Optional[FeatureMatrix] = None
+        self.scores: Optional[ChurnScores] = None
+        self._loaded_mtime: Optional[float] = None
+        self._predictor = None
+        self._predictor_mtime: Optional[float] = None
+
+        self._task: Optional[asyncio.Task] = None
+        self._start_lock = asyncio.Lock()
+        self._refresh_lock = asyncio.Lock()
+
+        self.builds = 0
+        self.build_errors = 0
+        self.last_build_duration: Optional[float] = None
+
+    async def start(self, fetch_users: Callable[[], Awaitable[List[Dict]]]):
+        async with self._start_lock:
+            if self._task is not None:
+                return
+            self.fetch_users = fetch_users
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"Churn feature store started ({self.path})")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        logger.info("Churn feature store stopped")
+
+    async def ensure_scored(self, fetch_users: Callable[[], Awaitable[List[Dict]]]):
+        """Score once in the request path if the background task has not yet"""
+        if self.scores is None:
+            self.fetch_users = self.fetch_users or fetch_users
+            await self.refresh()
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.build_errors += 1
+                logger.error(f"Churn feature refresh failed: {e}")
+            await asyncio.sleep(min(self.score_interval, self.refresh_seconds))
+
+    async def refresh(self, force: bool = False):
+        """Rebuild the file when stale, adopt a newer file, rescore when due"""
+        async with self._refresh_lock:
+            mtime = self._file_mtime()
+            if force or mtime is None or time.time() - mtime >= self.refresh_seconds:
+                await self._build_locked(force)
+                mtime = self._file_mtime()
+
+            if mtime is not None and mtime != self._loaded_mtime:
+                self.matrix = await asyncio.to_thread(FeatureMatrix.load, self.path)
+                self._loaded_mtime = mtime
+                self.scores = None
+
+            if self.matrix is not None and (
+                self.scores is None
+                or time.time() - self.scores.scored_at >= self.score_interval
+                or self._predictor_changed()
+            ):
+                await self.rescore()
+
+    async def rescore(self):
+        """Score the loaded matrix again, e.g. after the model was retrained"""
+        if self.matrix is None:
+            return
+        predictor = await asyncio.to_thread(self.get_predictor)
+        self.scores = await asyncio.to_thread(score_matrix, self.matrix, predictor)
+        logger.info(f"Scored churn for {len(self.matrix)} users ({self.scores.method})")
+
+    async def _build_locked(self, force: bool):
+        """Fetch and write the matrix unless another worker on the host is doing it"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path.with_name(self.path.name + '.lock'), 'w') as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return
+            mtime = self._file_mtime()
+            if not force and mtime is not None and time.time() - mtime < self.refresh_seconds:
+                return  # another worker just built it
+            await self._build()
+
+    async def _build(self):
+        started = time.monotonic()
+        users = await self.fetch_users()
+        activity = await self._fetch_activity()
+        matrix = await asyncio.to_thread(build_feature_matrix, users, activity)
+        await asyncio.to_thread(matrix.save, self.path)
+        self.builds += 1
+        self.last_build_duration = time.monotonic() - started
+        logger.info(f"Churn features built for {len(matrix)} users in {self.last_build_duration:.1f}s")
+
+    async def _fetch_activity(self) -> Dict[str, Dict]:
+        """30-day activity per user in one grouped query (empty if unavailable)"""
+        try:
+            from db_manager import db_manager
+            await db_manager.start()
+            pool = db_manager.subsystem('analytics', readonly=True)
+            async with pool.acquire() as conn:
+                rows = await conn.fetch(
+                    """
+                    SELECT user_id,
+                           COUNT(*) AS total_actions,
+                           COUNT(DISTINCT DATE(created_at)) AS active_days,
+                           AVG(EXTRACT(EPOCH FROM (updated_at - created_at))) AS avg_duration
+                    FROM activity_logs
+                    WHERE created_at >= NOW() - INTERVAL '30 days'
+                    GROUP BY user_id
+                    """
+                )
+            return {
+                str(row['user_id']): {
+                    "total_actions": row['total_actions'],
+                    "active_days": row['active_days'],
+                    "avg_duration": float(row['avg_duration'] or 0),
+                }
+                for row in rows
+            }
+        except Exception as e:
+            logger.debug(f"Activity query failed (table may not exist): {e}")
+            return {}
+
+    # ==================== Model ====================
+
+    def get_predictor(self, create: bool = False):
+        """
+        The ChurnPredictor, loaded when a trained model is saved
+
+        Returns None without a trained model unless create is set (training).
+        sklearn/pandas are only imported once a model file exists.
+        """
+        if self._predictor is None:
+            if not create and not MODEL_FILE.exists():
+                return None
+            from models.churn_predictor import ChurnPredictor
+
+            predictor = ChurnPredictor(model_path=MODEL_FILE)
+            self._predictor_mtime = self._model_mtime()
+            if self._predictor_mtime is not None:
+                predictor.load_model()
+            self._predictor = predictor
+        if not self._predictor.trained and not create:
+            return None
+        return self._predictor
+
+    def _predictor_changed(self) -> bool:
+        """Drop the loaded model when the model file was replaced"""
+        if self._model_mtime() == self._predictor_mtime:
+            return False
+        self._predictor = None
+        return True
+
+    @staticmethod
+    def _model_mtime() -> Optional[float]:
+        try:
+            return MODEL_FILE.stat().st_mtime
+        except FileNotFoundError:
+            return None
+
+    # ==================== Reads ====================
+
+    def page(self, risk_level: Optional[str] = None, offset: int = 0, limit: int = 100) -> List[Dict]:
+        """Users by churn probability (highest first)"""
+        if self.scores is None:
+            return []
+        rows = self.scores.order if risk_level is None else self.scores.by_risk.get(risk_level, [])
+        return [self.scores.row(i) for i in rows[offset:offset + limit]]
+
+    def count(self, risk_level: Optional[str] = None) -> int:
+        if self.scores is None:
+            return 0
+        return len(self.scores.order if risk_level is None else self.scores.by_risk.get(risk_level, []))
+
+    def get_user(self, user_id: str) -> Optional[Dict]:
+        if self.scores is None or user_id not in self.scores.index:
+            return None
+        return self.scores.row(self.scores.index[user_id])
+
+    def _file_mtime(self) -> Optional[float]:
+        try:
+            return self.path.stat().st_mtime
+        except FileNotFoundError:
+            return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None,
+            "users": len(self.matrix) if self.matrix is not None else 0,
+            "built_at": datetime.fromtimestamp(self.matrix.built_at).isoformat() if self.matrix is not None else None,
+            "scored_at": datetime.fromtimestamp(self.scores.scored_at).isoformat() if self.scores else None,
+            "method": self.scores.method if self.scores else None,
+            "by_risk": {level: self.count(level) for level in RISK_LEVELS},
+            "builds": self.builds,
+            "build_errors": self.build_errors,
+            "last_build_duration_seconds": self.last_build_duration,
+        }
+
+
+# Global instance
+churn_feature_store = ChurnFeatureStore()
@@ -22,6 +22,7 @@ except ImportError:
     logger.warning("boto3 not installed - cloud backup features disabled")
 
 from audit_logger import audit_logger
+from multipart_transfer import MultipartTransferEngine, MiB, file_sha256
 
 logger = logging.getLogger(__name__)
 
@@ -33,6 +34,8 @@ class CloudBackupManager:
         self.provider = os.getenv("CLOUD_BACKUP_PROVIDER", "s3")
         self.bucket_name = os.getenv("CLOUD_BACKUP_BUCKET", "uc-cloud-backups")
         self.region = os.getenv("CLOUD_BACKUP_REGION", "us-west-2")
+        self.multipart_threshold = int(os.getenv("CLOUD_BACKUP_MULTIPART_THRESHOLD_MB", "100")) * MiB
+        self.transfer = None
 
         if not BOTO3_AVAILABLE:
             self.enabled = False
@@ -46,6 +49,14 @@ class CloudBackupManager:
         # Initialize S3 client
         try:
             self._init_s3_client()
+            self.transfer = MultipartTransferEngine(
+                self.s3_client,
+                self.bucket_name,
+                state_dir=os.getenv("CLOUD_BACKUP_STATE_DIR", "/app/backups/.upload-state"),
+                concurrency=int(os.getenv("CLOUD_BACKUP_CONCURRENCY", "4")),
+                min_part_size=int(os.getenv("CLOUD_BACKUP_PART_SIZE_MB", "8")) * MiB,
+                max_buffer_bytes=int(os.getenv("CLOUD_BACKUP_MAX_BUFFER_MB", "256")) * MiB,
+            )
             logger.info(f"Cloud backup initialized: {self.provider} ({self.bucket_name})")
         except Exception as e:
             logger.error(f"Failed to initialize cloud backup: {e}")
@@ -178,29 +189,35 @@ class CloudBackupManager:
             # Get file size for progress tracking
             file_size = os.path.getsize(local_path)
 
-            # Upload with multipart for large files
-            if file_size > 100 * 1024 * 1024:  # > 100MB
-                await self._multipart_upload(
+            # Upload with concurrent, resumable multipart for large files
+            if file_size > self.multipart_threshold:
+                transfer = await self._multipart_upload(
                     local_path,
                     s3_key,
                     s3_metadata,
                     progress_callback
                 )
+                sha256 = transfer["sha256"]
             else:
                 # Simple upload for smaller files
-                with open(local_path, 'rb') as f:
-                    self.s3_client.upload_fileobj(
-                        f,
-                        self.bucket_name,
-                        s3_key,
-                        ExtraArgs={'Metadata': s3_metadata}
-                    )
+                sha256 = await self.transfer.run_in_pool(file_sha256, local_path)
+                s3_metadata['sha256'] = sha256
+                await self.transfer.run_in_pool(self._simple_upload, local_path, s3_key, s3_metadata)
+
+            # Checksum sidecar so restores can verify the download
+            await self.transfer.run_in_pool(
+                self.s3_client.put_object,
+                Bucket=self.bucket_name,
+                Key=f"{s3_key}.sha256",
+                Body=sha256.encode()
+            )
 
             end_time = datetime.now()
             duration = end_time - start_time
 
             # Get uploaded object details
-            response = self.s3_client.head_object(
+            response = await self.transfer.run_in_pool(
+                self.s3_client.head_object,
                 Bucket=self.bucket_name,
                 Key=s3_key
             )
@@ -215,6 +232,7 @@ class CloudBackupManager:
                 "upload_duration": str(duration),
                 "etag": response.get('ETag', '').strip('"'),
                 "version_id": response.get('VersionId'),
+                "sha256": sha256,
                 "timestamp": end_time.isoformat()
             }
 
@@ -233,73 +251,49 @@ class CloudBackupManager:
             logger.error(f"Cloud backup upload failed: {e}")
             raise Exception(f"Failed to upload backup to cloud: {str(e)}")
 
+    def _simple_upload(self, local_path: str, s3_key: str, metadata: Dict):
+        """Single-request upload for small files (runs in the transfer pool)"""
+        with open(local_path, 'rb') as f:
+            self.s3_client.upload_fileobj(
+                f,
+                self.bucket_name,
+                s3_key,
+                ExtraArgs={'Metadata': metadata}
+            )
+
     async def _multipart_upload(
         self,
         local_path: str,
         s3_key: str,
         metadata: Dict,
         progress_callback: Optional[callable] = None
-    ):
-        """Upload large file using multipart upload"""
-        try:
-            # Initialize multipart upload
-            multipart_upload = self.s3_client.create_multipart_upload(
-                Bucket=self.bucket_name,
-                Key=s3_key,
-                Metadata=metadata
-            )
-            upload_id = multipart_upload['UploadId']
-
-            # Upload parts (5MB chunks)
-            part_size = 5 * 1024 * 1024
-            parts = []
-            part_number = 1
-
-            with open(local_path, 'rb') as f:
-                while True:
-                    data = f.read(part_size)
-                    if not data:
-                        break
-
-                    part = self.s3_client.upload_part(
-                        Bucket=self.bucket_name,
-                        Key=s3_key,
-                        PartNumber=part_number,
-                        UploadId=upload_id,
-                        Body=data
-                    )
-
-                    parts.append({
-                        'PartNumber': part_number,
-                        'ETag': part['ETag']
-                    })
-
-                    if progress_callback:
-                        await progress_callback(part_number * part_size)
+    ) -> Dict[str, Any]:
+        """
+        Upload large file using concurrent multipart upload.
 
-                    part_number += 1
+        Parts are uploaded from a thread pool so the event loop is never
+        blocked. Progress is persisted after every part; if the upload is
+        interrupted the multipart upload is kept open and the next call for
+        the same key resumes from the parts already stored.
+        """
+        return await self.transfer.upload_file(
+            local_path,
+            s3_key,
+            metadata=metadata,
+            progress_callback=progress_callback
+        )
 
-            # Complete multipart upload
-            self.s3_client.complete_multipart_upload(
+    async def _get_checksum(self, s3_key: str) -> Optional[str]:
+        """Fetch the SHA-256 sidecar written at upload time, if present"""
+        try:
+            response = await self.transfer.run_in_pool(
+                self.s3_client.get_object,
                 Bucket=self.bucket_name,
-                Key=s3_key,
-                UploadId=upload_id,
-                MultipartUpload={'Parts': parts}
+                Key=f"{s3_key}.sha256"
             )
-
-            logger.info(f"Multipart upload completed: {s3_key} ({part_number-1} parts)")
-
-        except Exception as e:
-            # Abort multipart upload on error
-            try:
-                self.s3_client.abort_multipart_upload(
-                    Bucket=self.bucket_name,
-                    Key=s3_key,
-                    UploadId=upload_id
-                )
-            except Exception:
-                pass
-            raise e
+            return response['Body'].read().decode().strip()
+        except ClientError:
+            return None
 
     async def download_backup(
         self,
@@ -330,13 +324,14 @@ class CloudBackupManager:
             # Ensure local directory exists
             os.makedirs(os.path.dirname(local_path), exist_ok=True)
 
-            # Download file
-            with open(local_path, 'wb') as f:
-                self.s3_client.download_fileobj(
-                    self.bucket_name,
-                    s3_key,
-                    f
-                )
+            # Download in parallel byte ranges, verified against the upload checksum
+            expected_sha256 = await self._get_checksum(s3_key)
+            await self.transfer.download_file(
+                s3_key,
+                local_path,
+                expected_sha256=expected_sha256,
+                progress_callback=progress_callback
+            )
 
             end_time = datetime.now()
             duration = end_time - start_time
@@ -350,6 +345,7 @@ class CloudBackupManager:
                 "s3_key": s3_key,
                 "local_path": local_path,
                 "size": file_size,
+                "verified": expected_sha256 is not None,
                 "download_duration": str(duration),
                 "timestamp": end_time.isoformat()
             }
@@ -367,7 +363,7 @@ class CloudBackupManager:
 
         except ClientError as e:
             error_code = e.response['Error']['Code']
-            if error_code == 'NoSuchKey':
+            if error_code in ('NoSuchKey', '404'):
                 raise FileNotFoundError(f"Backup not found in cloud: {backup_id}")
             else:
                 raise Exception(f"Failed to download backup: {str(e)}")
@@ -445,11 +441,18 @@ class CloudBackupManager:
             # Prepare S3 object key
             s3_key = f"backups/{backup_id}.tar.gz"
 
-            # Delete object
-            self.s3_client.delete_object(
+            # Delete object (boto3 blocks, so use the transfer pool)
+            await self.transfer.run_in_pool(
+                self.s3_client.delete_object,
                 Bucket=self.bucket_name,
                 Key=s3_key
             )
+            await self.transfer.run_in_pool(
+                self.s3_client.delete_object,
+                Bucket=self.bucket_name,
+                Key=f"{s3_key}.sha256"
+            )
+            await self.transfer.abort_upload(s3_key)
 
             result = {
                 "success": True,
@@ -574,6 +577,8 @@ class CloudBackupManager:
             for page in pages:
                 if 'Contents' in page:
                     for obj in page['Contents']:
+                        if obj['Key'].endswith('.sha256'):
+                            continue
                         total_size += obj['Size']
                         object_count += 1
 
@@ -18,6 +18,10 @@ from dataclasses import dataclass
 from enum import Enum
 import logging
 
+import numpy as np
+
+from cost_cubes import cost_cubes, cube_grain, score_anomalies, series_stats, severity_for
+
 try:
     from cachetools import TTLCache
 except ImportError:
@@ -36,6 +40,14 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Cube columns a cost trend can be drawn for
+TREND_METRICS = {"total_cost", "total_requests", "total_tokens", "input_tokens", "output_tokens"}
+
+
+def _decimal(value: float) -> Decimal:
+    """Decimal from a numpy/float statistic"""
+    return Decimal(str(round(float(value), 8)))
+
 
 class PeriodType(str, Enum):
     """Time period aggregation types"""
@@ -218,6 +230,7 @@ class CostAnalysisEngine:
             WHERE organization_id = $1
               AND period_start >= $2
               AND period_end <= $3
+              AND period_type = $4
         """
         
         group_clause = ""
@@ -234,7 +247,9 @@ class CostAnalysisEngine:
         
         query += f" {group_clause} ORDER BY total_cost DESC"
         
-        rows = await self.db.fetch(query, organization_id, start_date, end_date)
+        rows = await self.db.fetch(
+            query, organization_id, start_date, end_date, cube_grain(start_date, end_date)
+        )
         
         result = {
             "organization_id": organization_id,
@@ -288,11 +303,14 @@ class CostAnalysisEngine:
             WHERE organization_id = $1
               AND period_start >= $2
               AND period_end <= $3
+              AND period_type = $4
             GROUP BY model_name, provider
             ORDER BY total_cost DESC
         """
         
-        rows = await self.db.fetch(query, organization_id, start_date, end_date)
+        rows = await self.db.fetch(
+            query, organization_id, start_date, end_date, cube_grain(start_date, end_date)
+        )
         
         # Calculate total for percentages
         total_cost = sum(row["total_cost"] for row in rows)
@@ -338,35 +356,45 @@ class CostAnalysisEngine:
         Returns:
             List of UserCostBreakdown sorted by total cost
         """
+        # One pass over the (user, model) cells; the top model is the first
+        # cell of each user's partition
         query = """
-            WITH user_costs AS (
+            WITH user_models AS (
                 SELECT 
                     user_id,
-                    SUM(total_cost) as total_cost,
-                    SUM(total_requests) as total_requests,
-                    SUM(total_tokens) as total_tokens,
-                    (
-                        SELECT model_name 
-                        FROM cost_analysis ca2 
-                        WHERE ca2.user_id = ca.user_id 
-                          AND ca2.organization_id = ca.organization_id
-                        GROUP BY model_name 
-                        ORDER BY SUM(total_cost) DESC 
-                        LIMIT 1
-                    ) as top_model
-                FROM cost_analysis ca
+                    model_name,
+                    SUM(total_cost) as model_cost,
+                    SUM(total_requests) as model_requests,
+                    SUM(total_tokens) as model_tokens
+                FROM cost_analysis
                 WHERE organization_id = $1
                   AND period_start >= $2
                   AND period_end <= $3
+                  AND period_type = $5
                   AND user_id IS NOT NULL
-                GROUP BY user_id, organization_id
-                ORDER BY total_cost DESC
-                LIMIT $4
+                GROUP BY user_id, model_name
+            ),
+            ranked AS (
+                SELECT 
+                    user_id,
+                    model_name,
+                    SUM(model_cost) OVER w as total_cost,
+                    SUM(model_requests) OVER w as total_requests,
+                    SUM(model_tokens) OVER w as total_tokens,
+                    ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY model_cost DESC) as model_rank
+                FROM user_models
+                WINDOW w AS (PARTITION BY user_id)
             )
-            SELECT * FROM user_costs
+            SELECT user_id, total_cost, total_requests, total_tokens, model_name as top_model
+            FROM ranked
+            WHERE model_rank = 1
+            ORDER BY total_cost DESC
+            LIMIT $4
         """
         
-        rows = await self.db.fetch(query, organization_id, start_date, end_date, limit)
+        rows = await self.db.fetch(
+            query, organization_id, start_date, end_date, limit, cube_grain(start_date, end_date)
+        )
         
         # Calculate total for percentages
         total_cost = sum(row["total_cost"] for row in rows)
@@ -409,21 +437,31 @@ class CostAnalysisEngine:
         Returns:
             TrendAnalysis with statistics and predictions
         """
+        if metric not in TREND_METRICS:
+            raise ValueError(f"Unsupported trend metric: {metric}")
+        
         end_date = datetime.now()
         start_date = end_date - timedelta(days=days)
         
+        # Weekly and monthly series are rolled up from the daily cube
+        grain = "hourly" if period_type == PeriodType.HOURLY else "daily"
+        bucket = {
+            PeriodType.WEEKLY: "date_trunc('week', period_start)",
+            PeriodType.MONTHLY: "date_trunc('month', period_start)",
+        }.get(period_type, "period_start")
+        
         # Query time series data
         query = f"""
             SELECT 
-                period_start,
+                {bucket} as period_start,
                 SUM({metric}) as value
             FROM cost_analysis
             WHERE organization_id = $1
               AND period_start >= $2
               AND period_end <= $3
               AND period_type = $4
-            GROUP BY period_start
-            ORDER BY period_start ASC
+            GROUP BY 1
+            ORDER BY 1 ASC
         """
         
         rows = await self.db.fetch(
@@ -431,7 +469,7 @@ class CostAnalysisEngine:
             organization_id, 
             start_date, 
             end_date,
-            period_type.value
+            grain
         )
         
         if not rows:
@@ -451,68 +489,42 @@ class CostAnalysisEngine:
                 confidence_interval=None
             )
         
-        # Extract data points
         data_points = [(row["period_start"], row["value"]) for row in rows]
-        values = [row["value"] for row in rows]
+        values = np.array([float(row["value"]) for row in rows])
+        stats = series_stats(values)
         
-        # Calculate statistics
-        total = sum(values)
-        average = total / len(values)
-        minimum = min(values)
-        maximum = max(values)
-        
-        # Standard deviation
-        variance = sum((x - average) ** 2 for x in values) / len(values)
-        std_deviation = Decimal(str(variance ** 0.5))
+        if stats.trend_percentage > 5:
+            trend_direction = "increasing"
+        elif stats.trend_percentage < -5:
+            trend_direction = "decreasing"
+        else:
+            trend_direction = "stable"
         
-        # Trend analysis
         if len(values) >= 2:
-            first_half_avg = sum(values[:len(values)//2]) / (len(values)//2)
-            second_half_avg = sum(values[len(values)//2:]) / (len(values) - len(values)//2)
-            
-            trend_percentage = (
-                ((second_half_avg - first_half_avg) / first_half_avg) * 100
-                if first_half_avg > 0 else Decimal("0")
-            )
-            
-            if trend_percentage > 5:
-                trend_direction = "increasing"
-            elif trend_percentage < -5:
-                trend_direction = "decreasing"
-            else:
-                trend_direction = "stable"
-            
-            # Simple growth rate (average daily change)
-            growth_rate = (values[-1] - values[0]) / len(values) if len(values) > 1 else Decimal("0")
-            
-            # Simple prediction (last value + growth rate)
-            predicted_next = values[-1] + growth_rate
-            confidence_margin = std_deviation * Decimal("1.96")  # 95% CI
-            
-            predicted_next_period = max(Decimal("0"), predicted_next)
+            # Simple prediction (last value + growth rate), 95% CI
+            predicted_next = values[-1] + stats.growth_rate
+            confidence_margin = stats.std * 1.96
+            predicted_next_period = _decimal(max(0.0, predicted_next))
             confidence_interval = (
-                max(Decimal("0"), predicted_next - confidence_margin),
-                predicted_next + confidence_margin
+                _decimal(max(0.0, predicted_next - confidence_margin)),
+                _decimal(predicted_next + confidence_margin)
             )
         else:
-            trend_direction = "stable"
-            trend_percentage = Decimal("0")
-            growth_rate = Decimal("0")
-            predicted_next_period = average
-            confidence_interval = (average, average)
+            predicted_next_period = _decimal(stats.mean)
+            confidence_interval = (predicted_next_period, predicted_next_period)
         
         return TrendAnalysis(
             metric=metric,
             period_type=period_type,
             data_points=data_points,
-            total=total,
-            average=average,
-            minimum=minimum,
-            maximum=maximum,
-            std_deviation=std_deviation,
+            total=_decimal(stats.total),
+            average=_decimal(stats.mean),
+            minimum=_decimal(stats.minimum),
+            maximum=_decimal(stats.maximum),
+            std_deviation=_decimal(stats.std),
             trend_direction=trend_direction,
-            trend_percentage=trend_percentage,
-            growth_rate=growth_rate,
+            trend_percentage=_decimal(stats.trend_percentage),
+            growth_rate=_decimal(stats.growth_rate),
             predicted_next_period=predicted_next_period,
             confidence_interval=confidence_interval
         )
@@ -525,7 +537,8 @@ class CostAnalysisEngine:
         """
         Detect cost anomalies using statistical methods.
         
-        Uses Epic 13's anomaly detection approach with Z-score.
+        Uses Epic 13's anomaly detection approach with Z-score, computed for
+        all models at once over a (model x day) slice of the daily cube.
         
         Returns:
             List of detected cost anomalies
@@ -545,74 +558,56 @@ class CostAnalysisEngine:
               AND period_start >= $2
               AND period_type = 'daily'
             GROUP BY period_start, model_name
-            ORDER BY period_start ASC
         """
         
         rows = await self.db.fetch(query, organization_id, start_date)
+        if not rows:
+            return []
+        
+        models = sorted({row["model_name"] for row in rows})
+        days = sorted({row["period_start"] for row in rows})
+        model_index = {model: i for i, model in enumerate(models)}
+        day_index = {day: i for i, day in enumerate(days)}
         
-        # Group by model
-        model_data = {}
+        # Days without usage stay NaN and do not count as observations
+        costs = np.full((len(models), len(days)), np.nan)
+        requests = np.full((len(models), len(days)), np.nan)
         for row in rows:
-            model = row["model_name"]
-            if model not in model_data:
-                model_data[model] = []
-            model_data[model].append({
-                "timestamp": row["period_start"],
-                "cost": row["daily_cost"],
-                "requests": row["daily_requests"]
-            })
+            cell = (model_index[row["model_name"]], day_index[row["period_start"]])
+            costs[cell] = float(row["daily_cost"])
+            requests[cell] = float(row["daily_requests"])
         
-        anomalies = []
+        recent = min(2, len(days))
+        scores = score_anomalies(costs, recent=recent)
+        with np.errstate(invalid='ignore'):
+            flagged = np.argwhere(scores.z > 3)  # 3 standard deviations
+            mean_requests = np.nanmean(requests, axis=1)
+        severities = severity_for(scores.z)
         
-        # Detect anomalies for each model
-        for model, data_points in model_data.items():
-            if len(data_points) < 3:
-                continue  # Need at least 3 points for meaningful detection
-            
-            costs = [dp["cost"] for dp in data_points]
-            mean_cost = sum(costs) / len(costs)
-            
-            # Calculate standard deviation
-            variance = sum((c - mean_cost) ** 2 for c in costs) / len(costs)
-            std_dev = Decimal(str(variance ** 0.5))
+        anomalies = []
+        for model_i, recent_i in flagged:
+            day_i = len(days) - recent + recent_i
+            actual = costs[model_i, day_i]
+            mean_cost = scores.mean[model_i]
+            model = models[model_i]
             
-            if std_dev == 0:
-                continue  # No variation
+            # Identify contributing factors
+            factors = []
+            if actual > mean_cost * 1.5:
+                factors.append("Unusually high cost")
+            if requests[model_i, day_i] > mean_requests[model_i] * 1.5:
+                factors.append("High request volume")
             
-            # Check recent points for anomalies (last 2 days)
-            for dp in data_points[-2:]:
-                z_score = abs((dp["cost"] - mean_cost) / std_dev)
-                
-                if z_score > 3:  # 3 standard deviations
-                    deviation_pct = ((dp["cost"] - mean_cost) / mean_cost) * 100
-                    
-                    # Determine severity
-                    if z_score > 5:
-                        severity = "critical"
-                    elif z_score > 4:
-                        severity = "high"
-                    elif z_score > 3.5:
-                        severity = "medium"
-                    else:
-                        severity = "low"
-                    
-                    # Identify contributing factors
-                    factors = []
-                    if dp["cost"] > mean_cost * Decimal("1.5"):
-                        factors.append("Unusually high cost")
-                    if dp["requests"] > sum(d["requests"] for d in data_points) / len(data_points) * 1.5:
-                        factors.append("High request volume")
-                    
-                    anomalies.append(CostAnomaly(
-                        timestamp=dp["timestamp"],
-                        model_name=model,
-                        actual_cost=dp["cost"],
-                        expected_cost=mean_cost,
-                        deviation_percentage=deviation_pct,
-                        severity=severity,
-                        description=f"Cost spike detected for {model}: ${dp['cost']:.2f} vs expected ${mean_cost:.2f}",
-                        contributing_factors=factors or ["Statistical anomaly"]
-                    ))
+            anomalies.append(CostAnomaly(
+                timestamp=days[day_i],
+                model_name=model,
+                actual_cost=_decimal(actual),
+                expected_cost=_decimal(mean_cost),
+                deviation_percentage=_decimal((actual - mean_cost) / mean_cost * 100),
+                severity=str(severities[model_i, recent_i]),
+                description=f"Cost spike detected for {model}: ${actual:.2f} vs expected ${mean_cost:.2f}",
+                contributing_factors=factors or ["Statistical anomaly"]
+            ))
         
         return sorted(anomalies, key=lambda x: x.deviation_percentage, reverse=True)
     
@@ -736,23 +731,22 @@ class CostAnalysisEngine:
         period_type: PeriodType
     ) -> int:
         """
-        Aggregate raw usage data into cost_analysis table.
+        Roll usage recorded since the last run into the cost_analysis cube.
         
-        This would normally pull from api_usage_logs table.
-        For now, returns 0 as api_usage_logs doesn't exist yet.
+        The cube is maintained incrementally from a watermark for all
+        organizations at once (see cost_cubes.py), so the arguments only
+        identify the caller's period; the cost_cubes background task
+        normally does this every COST_CUBE_INTERVAL seconds.
         
         Returns:
-            Number of records created
+            Number of cube rows created or updated
         """
-        # TODO: Implement when api_usage_logs table exists
-        # This will be called by the background aggregation task
-        
         logger.info(
-            f"Cost aggregation scheduled for {organization_id} "
-            f"from {period_start} to {period_end}"
+            f"Cost aggregation requested for {organization_id} "
+            f"({period_type.value}, {period_start} to {period_end})"
         )
         
-        return 0
+        return await cost_cubes.refresh(self.db)
 
 
 # Singleton instance
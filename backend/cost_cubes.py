@@ -0,0 +1,280 @@
+"""
+Cost Cubes for Epic 14: Cost Optimization Dashboard
+
+Maintains the hourly and daily rows of cost_analysis, one per
+(organization, user, model, period), from the credit ledger, and
+provides the vectorized statistics CostAnalysisEngine computes over them.
+
+Every COST_CUBE_INTERVAL seconds the usage debits recorded in
+credit_transactions since the stored watermark are grouped by hour and by
+day and added onto the existing cube rows; the watermark moves in the same
+transaction. Rows newer than COST_CUBE_SETTLE_SECONDS are left for the next
+run so debits committed slightly out of timestamp order are not skipped.
+The first run backfills COST_CUBE_BACKFILL_DAYS. A Postgres advisory lock
+keeps concurrent app instances from rolling the same debits twice.
+
+Dashboards then read a few indexed cube rows per period instead of
+grouping raw usage.
+"""
+
+import asyncio
+import logging
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+REFRESH_INTERVAL = float(os.getenv('COST_CUBE_INTERVAL', '60'))
+SETTLE_SECONDS = int(os.getenv('COST_CUBE_SETTLE_SECONDS', '60'))
+BACKFILL_DAYS = int(os.getenv('COST_CUBE_BACKFILL_DAYS', '90'))
+
+ADVISORY_LOCK_KEY = 0x3C0B5  # arbitrary, shared by all app instances
+WATERMARK_SOURCE = 'credit_transactions'
+
+# Cube grain -> date_trunc unit
+GRAINS = {'hourly': 'hour', 'daily': 'day'}
+
+# Windows up to this long are answered from hourly rows, longer ones from daily
+HOURLY_WINDOW_DAYS = 3
+
+# One row per cost_analysis unique key (organization, user, period, model);
+# a model billed through several providers keeps one of their names. Ids
+# that are not UUIDs (e.g. "org_..." or local users) cannot go into the
+# uuid columns and are left out rather than failing the whole rollup.
+ROLLUP_QUERY = """
+    INSERT INTO cost_analysis (
+        organization_id, user_id, period_start, period_end, period_type,
+        model_name, provider, total_requests, total_tokens, input_tokens,
+        output_tokens, total_cost, input_cost, output_cost, error_count, error_rate
+    )
+    SELECT
+        org.org_id::uuid,
+        ct.user_id::uuid,
+        date_trunc($3, ct.created_at AT TIME ZONE 'UTC'),
+        date_trunc($3, ct.created_at AT TIME ZONE 'UTC') + ('1 ' || $3)::interval,
+        $4,
+        COALESCE(ct.model, 'unknown'),
+        MIN(COALESCE(ct.provider, 'unknown')),
+        COUNT(*),
+        COALESCE(SUM(ct.tokens_used), 0),
+        COALESCE(SUM((ct.metadata->>'input_tokens')::bigint), 0),
+        COALESCE(SUM((ct.metadata->>'output_tokens')::bigint), 0),
+        COALESCE(SUM(COALESCE(ct.cost, -ct.amount)), 0),
+        0, 0, 0, 0
+    FROM credit_transactions ct
+    CROSS JOIN LATERAL (
+        SELECT COALESCE(
+            ct.metadata->>'org_id',
+            (SELECT om.org_id::text FROM organization_members om
+             WHERE om.user_id = ct.user_id ORDER BY om.joined_at LIMIT 1)
+        ) AS org_id
+    ) org
+    WHERE ct.transaction_type = 'usage'
+      AND ct.created_at > $1
+      AND ct.created_at <= $2
+      AND org.org_id ~* '^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$'
+      AND ct.user_id::text ~* '^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$'
+    GROUP BY 1, 2, 3, 4, 5, 6
+    ON CONFLICT (organization_id, user_id, period_start, period_type, model_name) DO UPDATE SET
+        total_requests = cost_analysis.total_requests + EXCLUDED.total_requests,
+        total_tokens = cost_analysis.total_tokens + EXCLUDED.total_tokens,
+        input_tokens = cost_analysis.input_tokens + EXCLUDED.input_tokens,
+        output_tokens = cost_analysis.output_tokens + EXCLUDED.output_tokens,
+        total_cost = cost_analysis.total_cost + EXCLUDED.total_cost,
+        updated_at = NOW()
+"""
+
+
+def cube_grain(start_date: datetime, end_date: datetime) -> str:
+    """Cube grain to answer a [start_date, end_date] window from"""
+    return 'hourly' if end_date - start_date <= timedelta(days=HOURLY_WINDOW_DAYS) else 'daily'
+
+
+@dataclass
+class SeriesStats:
+    """Summary statistics of one time series"""
+    total: float
+    mean: float
+    minimum: float
+    maximum: float
+    std: float
+    trend_percentage: float  # second half mean vs first half mean
+    growth_rate: float       # average change per period
+
+
+def series_stats(values: np.ndarray) -> SeriesStats:
+    """Statistics for a 1-D series with at least one value"""
+    n = len(values)
+    half = n // 2
+    if n >= 2:
+        first, second = values[:half].mean(), values[half:].mean()
+        trend = (second - first) / first * 100 if first > 0 else 0.0
+        growth = (values[-1] - values[0]) / n
+    else:
+        trend = growth = 0.0
+    return SeriesStats(
+        total=float(values.sum()),
+        mean=float(values.mean()),
+        minimum=float(values.min()),
+        maximum=float(values.max()),
+        std=float(values.std()),
+        trend_percentage=float(trend),
+        growth_rate=float(growth),
+    )
+
+
+@dataclass
+class AnomalyScores:
+    """Z-scores of the most recent periods of every series in a cube slice"""
+    z: np.ndarray      # (series, recent periods); NaN where no data
+    mean: np.ndarray   # (series,)
+    std: np.ndarray    # (series,)
+
+
+def score_anomalies(costs: np.ndarray, recent: int = 2, min_points: int = 3) -> AnomalyScores:
+    """
+    Z-score the last `recent` periods of each row of costs
+
+    costs has shape (series, periods) with NaN for periods without usage.
+    Mean and standard deviation are taken over each row's observed values;
+    rows with fewer than min_points values or no variation score NaN.
+    """
+    observed = ~np.isnan(costs)
+    counts = observed.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.nansum(costs, axis=1) / counts
+        variance = np.nansum((costs - mean[:, None]) ** 2, axis=1) / counts
+        std = np.sqrt(variance)
+        usable = (counts >= min_points) & (std > 0)
+        z = np.abs(costs[:, -recent:] - mean[:, None]) / std[:, None]
+    z[~usable] = np.nan
+    return AnomalyScores(z=z, mean=mean, std=std)
+
+
+def severity_for(z: np.ndarray) -> np.ndarray:
+    """Severity labels for z-scores above 3"""
+    return np.select([z > 5, z > 4, z > 3.5], ['critical', 'high', 'medium'], default='low')
+
+
+class CostCubes:
+    """Watermark-driven rollup of credit debits into the cost_analysis cube"""
+
+    def __init__(self, interval: float = REFRESH_INTERVAL):
+        self.interval = interval
+        self.db_pool = None
+
+        self._task: Optional[asyncio.Task] = None
+        self._start_lock = asyncio.Lock()
+
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.rows_upserted = 0
+        self.watermark: Optional[datetime] = None
+        self.last_refresh: Optional[datetime] = None
+        self.last_refresh_duration: Optional[float] = None
+
+    async def start(self, db_pool):
+        async with self._start_lock:
+            if self._task is not None:
+                return
+            self.db_pool = db_pool
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"Cost cube rollups started (every {self.interval}s)")
+
+    async def ensure_started(self):
+        """Start lazily on the shared pool"""
+        if self._task is None:
+            from db_manager import db_manager
+            await db_manager.start()
+            await self.start(db_manager.subsystem('analytics'))
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        logger.info("Cost cube rollups stopped")
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.refresh_errors += 1
+                logger.error(f"Cost cube refresh failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def refresh(self, db_pool=None) -> int:
+        """Roll debits newer than the watermark into the cube; returns rows upserted"""
+        pool = db_pool or self.db_pool
+        started = asyncio.get_running_loop().time()
+
+        async with pool.acquire() as conn:
+            if not await conn.fetchval("SELECT pg_try_advisory_lock($1)", ADVISORY_LOCK_KEY):
+                return 0
+            try:
+                async with conn.transaction():
+                    watermark, upper = await conn.fetchrow(
+                        """
+                        SELECT COALESCE(
+                                   (SELECT watermark FROM cost_cube_watermarks WHERE source = $1),
+                                   NOW() - make_interval(days => $2)
+                               ),
+                               NOW() - make_interval(secs => $3)
+                        """,
+                        WATERMARK_SOURCE, BACKFILL_DAYS, SETTLE_SECONDS
+                    )
+                    if upper <= watermark:
+                        return 0
+
+                    upserted = 0
+                    for period_type, unit in GRAINS.items():
+                        status = await conn.execute(ROLLUP_QUERY, watermark, upper, unit, period_type)
+                        upserted += int(status.split()[-1])
+
+                    await conn.execute(
+                        """
+                        INSERT INTO cost_cube_watermarks (source, watermark, updated_at)
+                        VALUES ($1, $2, NOW())
+                        ON CONFLICT (source) DO UPDATE SET
+                            watermark = EXCLUDED.watermark,
+                            updated_at = NOW()
+                        """,
+                        WATERMARK_SOURCE, upper
+                    )
+            finally:
+                await conn.execute("SELECT pg_advisory_unlock($1)", ADVISORY_LOCK_KEY)
+
+        self.refreshes += 1
+        self.rows_upserted += upserted
+        self.watermark = upper
+        self.last_refresh = datetime.now()
+        self.last_refresh_duration = asyncio.get_running_loop().time() - started
+        if upserted:
+            logger.info(f"Cost cubes: {upserted} rows updated up to {upper.isoformat()}")
+        return upserted
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None,
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "rows_upserted": self.rows_upserted,
+            "watermark": self.watermark.isoformat() if self.watermark else None,
+            "last_refresh": self.last_refresh.isoformat() if self.last_refresh else None,
+            "last_refresh_duration_seconds": self.last_refresh_duration,
+        }
+
+
+# Global instance
+cost_cubes = CostCubes()
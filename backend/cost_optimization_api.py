@@ -52,19 +52,7 @@ from cost_recommendation_engine import (
 
 # Auth dependencies
 from auth_dependencies import require_authenticated_user, require_admin_user
-try:
-    from database import get_db_pool
-except ImportError:
-    # Database might not be set up the same way
-    import os
-    async def get_db_pool():
-        return await asyncpg.create_pool(
-            host=os.getenv("POSTGRES_HOST", "localhost"),
-            port=int(os.getenv("POSTGRES_PORT", 5432)),
-            user=os.getenv("POSTGRES_USER", "unicorn"),
-            password=os.getenv("POSTGRES_PASSWORD", "change-me"),
-            database=os.getenv("POSTGRES_DB", "unicorn_db")
-        )
+from database import get_db_pool
 
 import logging
 
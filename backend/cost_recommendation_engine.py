@@ -234,6 +234,7 @@ class CostRecommendationEngine:
             JOIN model_pricing mp ON ca.model_name = mp.model_name AND ca.provider = mp.provider
             WHERE ca.organization_id = $1
               AND ca.period_start >= NOW() - INTERVAL '%s days'
+              AND ca.period_type = 'daily'
               AND mp.model_tier IN ('premium', 'advanced')
             GROUP BY ca.model_name, ca.provider
             HAVING SUM(ca.total_cost) > 10.0  -- Only if spending > $10
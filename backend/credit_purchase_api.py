@@ -19,7 +19,6 @@ from decimal import Decimal
 import logging
 import os
 import stripe
-import asyncpg
 import json
 
 # Import credit system components
@@ -29,6 +28,7 @@ from email_notifications import EmailNotificationService
 
 # Import authentication
 from credit_api import get_current_user_from_request, require_admin_from_request
+from db_manager import db_manager
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/v1/billing/credits", tags=["credit-purchases"])
@@ -42,17 +42,9 @@ email_service = EmailNotificationService()
 
 # Database connection
 async def get_db_connection():
-    """Get database connection"""
-    pool = await asyncpg.create_pool(
-        host=os.getenv("POSTGRES_HOST", "unicorn-postgresql"),
-        port=int(os.getenv("POSTGRES_PORT", 5432)),
-        user=os.getenv("POSTGRES_USER", "unicorn"),
-        password=os.getenv("POSTGRES_PASSWORD", "unicorn"),
-        database=os.getenv("POSTGRES_DB", "unicorn_db"),
-        min_size=2,
-        max_size=10
-    )
-    return pool
+    """Get the billing view of the shared database pool"""
+    await db_manager.start()
+    return db_manager.subsystem('billing')
 
 
 # ============================================================================
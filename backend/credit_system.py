@@ -15,10 +15,10 @@ from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime, timedelta
 from decimal import Decimal
 import logging
-import os
 from contextlib import asynccontextmanager
 from audit_logger import audit_logger
 from email_notifications import EmailNotificationService
+from db_manager import db_manager
 
 # Logging setup
 logger = logging.getLogger(__name__)
@@ -66,15 +66,8 @@ class CreditManager:
             return
 
         try:
-            self.db_pool = await asyncpg.create_pool(
-                host=os.getenv("POSTGRES_HOST", "unicorn-postgresql"),
-                port=int(os.getenv("POSTGRES_PORT", 5432)),
-                user=os.getenv("POSTGRES_USER", "unicorn"),
-                password=os.getenv("POSTGRES_PASSWORD", "unicorn"),
-                database=os.getenv("POSTGRES_DB", "unicorn_db"),
-                min_size=5,
-                max_size=20
-            )
+            await db_manager.start()
+            self.db_pool = db_manager.subsystem('billing')
             logger.info("CreditManager database pool initialized")
         except Exception as e:
             logger.error(f"Failed to initialize database pool: {e}")
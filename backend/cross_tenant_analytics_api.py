@@ -3,16 +3,20 @@ Cross-Tenant Analytics API
 
 Provides platform-wide analytics and monitoring across all tenants.
 Only accessible by platform administrators.
+
+Platform stats, rankings, utilization, growth and tier comparison read the
+precomputed rollups maintained by tenant_rollups.py instead of scanning the
+tenant tables per request.
 """
 
 import logging
-import os
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timedelta
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from pydantic import BaseModel, Field
-import asyncpg
 from auth_dependencies import require_admin_user
+from db_manager import db_manager
+from tenant_rollups import COUNTERS as ROLLUP_COUNTERS, tenant_rollups
 
 logger = logging.getLogger(__name__)
 
@@ -30,6 +34,7 @@ class PlatformStats(BaseModel):
     total_api_keys: int
     tier_distribution: Dict[str, int]
     growth_stats: Dict[str, Any]
+    as_of: Optional[datetime] = None
 
 
 class TenantMetric(BaseModel):
@@ -70,24 +75,26 @@ class GrowthMetrics(BaseModel):
 
 
 # Database helpers
-async def get_db_pool() -> asyncpg.Pool:
-    """Get database connection pool"""
-    db_url = os.getenv("DATABASE_URL")
-    if not db_url:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="DATABASE_URL not configured"
-        )
-    
-    try:
-        pool = await asyncpg.create_pool(db_url)
-        return pool
-    except Exception as e:
-        logger.error(f"Failed to create database pool: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Database connection failed"
-        )
+async def get_db_pool():
+    """Get the analytics view of the shared pool (served by the read replica when configured)"""
+    await db_manager.start()
+    return db_manager.subsystem('analytics', readonly=True)
+
+
+async def get_write_pool():
+    """Analytics pool on the primary, for endpoints that write"""
+    await db_manager.start()
+    return db_manager.subsystem('analytics')
+
+
+async def get_rollup_pool():
+    """Analytics pool for rollup reads, after the rollups have been computed at least once"""
+    await tenant_rollups.ensure_ready()
+    return await get_db_pool()
+
+
+def _tier_totals(tiers: List[Dict[str, Any]], column: str) -> int:
+    return sum(row[column] or 0 for row in tiers)
 
 
 # API endpoints
@@ -98,166 +105,75 @@ async def get_platform_stats(
     """
     Get platform-wide statistics
     
-    Includes total counts, tier distribution, and growth metrics
+    Includes total counts, tier distribution, and growth metrics.
+    Served from the per-tier rollups (see tenant_rollups.py).
     """
-    pool = await get_db_pool()
+    pool = await get_rollup_pool()
+    today = datetime.utcnow().date()
     
-    try:
-        async with pool.acquire() as conn:
-            # Total tenants
-            total_tenants = await conn.fetchval(
-                "SELECT COUNT(*) FROM organizations"
-            )
-            
-            active_tenants = await conn.fetchval(
-                "SELECT COUNT(*) FROM organizations WHERE is_active = true"
-            )
-            
-            # Total users
-            total_users = await conn.fetchval(
-                "SELECT COUNT(*) FROM organization_members"
-            )
-            
-            # Total devices (table may not exist)
-            try:
-                total_devices = await conn.fetchval(
-                    "SELECT COUNT(*) FROM edge_devices"
-                )
-            except Exception:
-                total_devices = 0
-            
-            # Total webhooks (table may not exist)
-            try:
-                total_webhooks = await conn.fetchval(
-                    "SELECT COUNT(*) FROM webhooks"
-                )
-            except Exception:
-                total_webhooks = 0
-            
-            # Total API keys (table may not exist)
-            try:
-                total_api_keys = await conn.fetchval(
-                    "SELECT COUNT(*) FROM api_keys"
-                )
-            except Exception:
-                total_api_keys = 0
-            
-            # Tier distribution - extract from metadata_json
-            tier_rows = await conn.fetch(
-                "SELECT metadata_json FROM organizations WHERE metadata_json IS NOT NULL"
-            )
-            tier_distribution = {}
-            for row in tier_rows:
-                metadata = row['metadata_json']
-                if isinstance(metadata, str):
-                    import json
-                    metadata = json.loads(metadata)
-                tier = metadata.get('plan_tier', 'trial') if isinstance(metadata, dict) else 'trial'
-                tier_distribution[tier] = tier_distribution.get(tier, 0) + 1
-            
-            # Growth stats (last 30 days)
-            thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-            
-            new_tenants_30d = await conn.fetchval(
-                "SELECT COUNT(*) FROM organizations WHERE created_at >= $1",
-                thirty_days_ago
-            )
-            
-            new_users_30d = await conn.fetchval(
-                "SELECT COUNT(*) FROM organization_members WHERE joined_at >= $1",
-                thirty_days_ago
-            )
-            
-            growth_stats = {
-                "new_tenants_30d": new_tenants_30d,
-                "new_users_30d": new_users_30d,
-                "avg_users_per_tenant": total_users / total_tenants if total_tenants > 0 else 0,
-                "avg_devices_per_tenant": total_devices / total_tenants if total_tenants > 0 else 0
-            }
-            
-            return PlatformStats(
-                total_tenants=total_tenants,
-                active_tenants=active_tenants,
-                total_users=total_users,
-                total_devices=total_devices,
-                total_webhooks=total_webhooks,
-                total_api_keys=total_api_keys,
-                tier_distribution=tier_distribution,
-                growth_stats=growth_stats
-            )
-        
-    finally:
-        await pool.close()
+    async with pool.acquire() as conn:
+        tiers = await tenant_rollups.latest_tiers(conn)
+        growth_30d = await tenant_rollups.growth(conn, today - timedelta(days=30), today)
+    
+    total_tenants = _tier_totals(tiers, 'tenants')
+    total_users = _tier_totals(tiers, 'users')
+    total_devices = _tier_totals(tiers, 'devices')
+    
+    growth_stats = {
+        "new_tenants_30d": growth_30d['new_tenants'],
+        "new_users_30d": growth_30d['new_users'],
+        "avg_users_per_tenant": total_users / total_tenants if total_tenants > 0 else 0,
+        "avg_devices_per_tenant": total_devices / total_tenants if total_tenants > 0 else 0
+    }
+    
+    return PlatformStats(
+        total_tenants=total_tenants,
+        active_tenants=_tier_totals(tiers, 'active_tenants'),
+        total_users=total_users,
+        total_devices=total_devices,
+        total_webhooks=_tier_totals(tiers, 'webhooks'),
+        total_api_keys=_tier_totals(tiers, 'api_keys'),
+        tier_distribution={row['plan_tier']: row['tenants'] for row in tiers},
+        growth_stats=growth_stats,
+        as_of=max((row['refreshed_at'] for row in tiers), default=None)
+    )
 
 
 @router.get("/top-tenants")
 async def get_top_tenants(
-    metric: str = Query("users", description="Metric to rank by: users, devices, webhooks, api_calls"),
+    metric: str = Query("users", description="Metric to rank by: users, devices, webhooks, api_keys"),
     limit: int = Query(10, ge=1, le=100),
     user: dict = Depends(require_admin_user)
 ):
     """
     Get top tenants by specified metric
     """
-    pool = await get_db_pool()
+    if metric not in ROLLUP_COUNTERS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid metric. Choose from: {list(ROLLUP_COUNTERS)}"
+        )
     
-    try:
-        async with pool.acquire() as conn:
-            # Map metric to table and column
-            metric_queries = {
-                'users': "SELECT organization_id, COUNT(*) as count FROM organization_members GROUP BY organization_id",
-                'devices': "SELECT organization_id, COUNT(*) as count FROM edge_devices GROUP BY organization_id",
-                'webhooks': "SELECT organization_id, COUNT(*) as count FROM webhooks GROUP BY organization_id",
-                'api_keys': "SELECT organization_id, COUNT(*) as count FROM api_keys GROUP BY organization_id"
-            }
-            
-            if metric not in metric_queries:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Invalid metric. Choose from: {list(metric_queries.keys())}"
-                )
-            
-            # Get metric counts with error handling for non-existent tables
-            try:
-                query = f"""
-                    WITH metric_counts AS (
-                        {metric_queries[metric]}
-                    )
-                    SELECT 
-                        o.id as organization_id,
-                        o.name as organization_name,
-                        COALESCE(mc.count, 0) as metric_value,
-                        ROW_NUMBER() OVER (ORDER BY COALESCE(mc.count, 0) DESC) as rank
-                    FROM organizations o
-                    LEFT JOIN metric_counts mc ON o.id = mc.organization_id
-                    WHERE o.is_active = true
-                    ORDER BY metric_value DESC
-                    LIMIT $1
-                """
-                
-                rows = await conn.fetch(query, limit)
-            except Exception as e:
-                # If table doesn't exist, return empty results
-                rows = []
-            
-            rankings = [
-                TenantRanking(
-                    organization_id=row['organization_id'],
-                    organization_name=row['organization_name'],
-
-                    metric_value=float(row['metric_value']),
-                    rank=row['rank']
-                )
-                for row in rows
-            ]
-            
-            return {
-                "metric": metric,
-                "rankings": rankings
-            }
-        
-    finally:
-        await pool.close()
+    pool = await get_rollup_pool()
+    
+    async with pool.acquire() as conn:
+        rows = await tenant_rollups.top_tenants(conn, metric, limit)
+    
+    rankings = [
+        TenantRanking(
+            organization_id=row['organization_id'],
+            organization_name=row['organization_name'] or '',
+            plan_tier=row['plan_tier'],
+            metric_value=float(row['metric_value']),
+            rank=row['rank']
+        )
+        for row in rows
+    ]
+    
+    return {
+        "metric": metric,
+        "rankings": rankings
+    }
 
 
 @router.get("/resource-utilization")
@@ -267,64 +183,27 @@ async def get_resource_utilization(
     """
     Get resource utilization across all tenants
     """
-    pool = await get_db_pool()
+    pool = await get_rollup_pool()
     
-    try:
-        async with pool.acquire() as conn:
-            resources = []
-            
-            # Resource types to check
-            resource_types = [
-                ('users', 'organization_members'),
-                ('devices', 'edge_devices'),
-                ('webhooks', 'webhooks'),
-                ('api_keys', 'api_keys')
-            ]
-            
-            for resource_name, table_name in resource_types:
-                # Total usage with error handling
-                try:
-                    total_query = f"SELECT COUNT(*) FROM {table_name}"
-                    total_usage = await conn.fetchval(total_query)
-                except Exception:
-                    total_usage = 0
-                
-                # Usage by tier - skip for non-existent tables
-                by_tier = {}
-                if total_usage > 0:
-                    try:
-                        tier_query = f"""
-                            SELECT metadata_json, COUNT(t.*) as count
-                            FROM organizations o
-                            LEFT JOIN {table_name} t ON o.id = t.organization_id
-                            GROUP BY metadata_json
-                        """
-                        tier_rows = await conn.fetch(tier_query)
-                        for row in tier_rows:
-                            metadata = row['metadata_json']
-                            if isinstance(metadata, str):
-                                import json
-                                metadata = json.loads(metadata)
-                            tier = metadata.get('plan_tier', 'trial') if isinstance(metadata, dict) else 'trial'
-                            by_tier[tier] = by_tier.get(tier, 0) + row['count']
-                    except Exception:
-                        by_tier = {}
-                
-                # Placeholder quota limit (would come from tier definitions)
-                quota_limit = 10000
-                
-                resources.append(ResourceUtilization(
-                    resource_type=resource_name,
-                    total_usage=total_usage,
-                    quota_limit=quota_limit,
-                    utilization_percent=(total_usage / quota_limit * 100) if quota_limit > 0 else 0,
-                    by_tier=by_tier
-                ))
-            
-            return {"resources": resources}
+    async with pool.acquire() as conn:
+        tiers = await tenant_rollups.latest_tiers(conn)
+    
+    resources = []
+    for resource_name in ROLLUP_COUNTERS:
+        total_usage = _tier_totals(tiers, resource_name)
+        
+        # Placeholder quota limit (would come from tier definitions)
+        quota_limit = 10000
         
-    finally:
-        await pool.close()
+        resources.append(ResourceUtilization(
+            resource_type=resource_name,
+            total_usage=total_usage,
+            quota_limit=quota_limit,
+            utilization_percent=(total_usage / quota_limit * 100) if quota_limit > 0 else 0,
+            by_tier={row['plan_tier']: row[resource_name] or 0 for row in tiers if total_usage > 0}
+        ))
+    
+    return {"resources": resources}
 
 
 @router.get("/growth-metrics")
@@ -334,81 +213,47 @@ async def get_growth_metrics(
 ):
     """
     Get growth metrics for specified period
+    
+    Periods are whole UTC days ending today, summed from the daily rollups.
     """
-    pool = await get_db_pool()
+    # Determine time window
+    period_days = {
+        'day': 1,
+        'week': 7,
+        'month': 30
+    }
     
-    try:
-        # Determine time window
-        period_days = {
-            'day': 1,
-            'week': 7,
-            'month': 30
-        }
-        
-        if period not in period_days:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid period. Choose: day, week, month"
-            )
-        
-        days = period_days[period]
-        start_date = datetime.utcnow() - timedelta(days=days)
-        prev_start_date = start_date - timedelta(days=days)
-        
-        async with pool.acquire() as conn:
-            # New tenants in current period
-            new_tenants = await conn.fetchval(
-                "SELECT COUNT(*) FROM organizations WHERE created_at >= $1",
-                start_date
-            )
-            
-            # Churned tenants (deactivated)
-            churned_tenants = await conn.fetchval(
-                """
-                SELECT COUNT(*) FROM organizations 
-                WHERE is_active = false 
-                AND updated_at >= $1
-                """,
-                start_date
-            )
-            
-            # New users
-            new_users = await conn.fetchval(
-                "SELECT COUNT(*) FROM organization_members WHERE joined_at >= $1",
-                start_date
-            )
-            
-            # New devices (handle table not existing)
-            try:
-                new_devices = await conn.fetchval(
-                    "SELECT COUNT(*) FROM edge_devices WHERE registered_at >= $1",
-                    start_date
-                )
-            except Exception:
-                new_devices = 0
-            
-            # Previous period counts for growth rate
-            prev_tenants = await conn.fetchval(
-                "SELECT COUNT(*) FROM organizations WHERE created_at >= $1 AND created_at < $2",
-                prev_start_date, start_date
-            )
-            
-            # Calculate growth rate
-            growth_rate = 0.0
-            if prev_tenants > 0:
-                growth_rate = ((new_tenants - prev_tenants) / prev_tenants) * 100
-            
-            return GrowthMetrics(
-                period=period,
-                new_tenants=new_tenants,
-                churned_tenants=churned_tenants,
-                new_users=new_users,
-                new_devices=new_devices,
-                growth_rate_percent=growth_rate
-            )
-        
-    finally:
-        await pool.close()
+    if period not in period_days:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid period. Choose: day, week, month"
+        )
+    
+    pool = await get_rollup_pool()
+    
+    days = period_days[period]
+    end_date = datetime.utcnow().date()
+    start_date = end_date - timedelta(days=days)
+    prev_start_date = start_date - timedelta(days=days)
+    
+    async with pool.acquire() as conn:
+        current = await tenant_rollups.growth(conn, start_date, end_date)
+        previous = await tenant_rollups.growth(conn, prev_start_date, start_date)
+    
+    # Calculate growth rate
+    growth_rate = 0.0
+    prev_tenants = previous['new_tenants']
+    if prev_tenants > 0:
+        growth_rate = ((current['new_tenants'] - prev_tenants) / prev_tenants) * 100
+    
+    return GrowthMetrics(
+        period=period,
+        new_tenants=current['new_tenants'],
+        churned_tenants=current['churned_tenants'],
+        new_users=current['new_users'],
+        new_devices=current['new_devices'],
+        growth_rate_percent=growth_rate
+    )
 
 
 @router.post("/record-metric")
@@ -424,36 +269,32 @@ async def record_tenant_metric(
     
     Used for tracking custom analytics events
     """
-    pool = await get_db_pool()
+    pool = await get_write_pool()
     
-    try:
-        async with pool.acquire() as conn:
-            query = """
-                INSERT INTO tenant_analytics (
-                    organization_id, metric_type, metric_value, metadata, timestamp
-                )
-                VALUES ($1, $2, $3, $4, $5)
-                RETURNING id
-            """
-            
-            metric_id = await conn.fetchval(
-                query,
-                organization_id,
-                metric_type,
-                metric_value,
-                metadata or {},
-                datetime.utcnow()
+    async with pool.acquire() as conn:
+        query = """
+            INSERT INTO tenant_analytics (
+                organization_id, metric_type, metric_value, metadata, timestamp
             )
-            
-            return {
-                "message": "Metric recorded successfully",
-                "metric_id": metric_id,
-                "organization_id": organization_id,
-                "metric_type": metric_type
-            }
+            VALUES ($1, $2, $3, $4, $5)
+            RETURNING id
+        """
         
-    finally:
-        await pool.close()
+        metric_id = await conn.fetchval(
+            query,
+            organization_id,
+            metric_type,
+            metric_value,
+            metadata or {},
+            datetime.utcnow()
+        )
+        
+        return {
+            "message": "Metric recorded successfully",
+            "metric_id": metric_id,
+            "organization_id": organization_id,
+            "metric_type": metric_type
+        }
 
 
 @router.get("/tenant-metrics/{organization_id}")
@@ -470,58 +311,54 @@ async def get_tenant_metrics(
     """
     pool = await get_db_pool()
     
-    try:
-        async with pool.acquire() as conn:
-            # Build query
-            conditions = ["ta.organization_id = $1"]
-            params = [organization_id]
-            param_count = 2
-            
-            if metric_type:
-                conditions.append(f"ta.metric_type = ${param_count}")
-                params.append(metric_type)
-                param_count += 1
-            
-            if start_date:
-                conditions.append(f"ta.timestamp >= ${param_count}")
-                params.append(start_date)
-                param_count += 1
-            
-            if end_date:
-                conditions.append(f"ta.timestamp <= ${param_count}")
-                params.append(end_date)
-                param_count += 1
-            
-            params.append(limit)
-            
-            query = f"""
-                SELECT 
-                    ta.*,
-                    o.name as organization_name
-                FROM tenant_analytics ta
-                JOIN organizations o ON ta.organization_id = o.organization_id
-                WHERE {' AND '.join(conditions)}
-                ORDER BY ta.timestamp DESC
-                LIMIT ${param_count}
-            """
-            
-            rows = await conn.fetch(query, *params)
-            
-            metrics = [
-                TenantMetric(
-                    organization_id=row['organization_id'],
-                    organization_name=row['organization_name'],
-                    metric_type=row['metric_type'],
-                    metric_value=row['metric_value'],
-                    timestamp=row['timestamp']
-                )
-                for row in rows
-            ]
-            
-            return {"metrics": metrics, "count": len(metrics)}
+    async with pool.acquire() as conn:
+        # Build query
+        conditions = ["ta.organization_id = $1"]
+        params = [organization_id]
+        param_count = 2
+        
+        if metric_type:
+            conditions.append(f"ta.metric_type = ${param_count}")
+            params.append(metric_type)
+            param_count += 1
+        
+        if start_date:
+            conditions.append(f"ta.timestamp >= ${param_count}")
+            params.append(start_date)
+            param_count += 1
+        
+        if end_date:
+            conditions.append(f"ta.timestamp <= ${param_count}")
+            params.append(end_date)
+            param_count += 1
+        
+        params.append(limit)
         
-    finally:
-        await pool.close()
+        query = f"""
+            SELECT 
+                ta.*,
+                o.name as organization_name
+            FROM tenant_analytics ta
+            JOIN organizations o ON ta.organization_id = o.organization_id
+            WHERE {' AND '.join(conditions)}
+            ORDER BY ta.timestamp DESC
+            LIMIT ${param_count}
+        """
+        
+        rows = await conn.fetch(query, *params)
+        
+        metrics = [
+            TenantMetric(
+                organization_id=row['organization_id'],
+                organization_name=row['organization_name'],
+                metric_type=row['metric_type'],
+                metric_value=row['metric_value'],
+                timestamp=row['timestamp']
+            )
+            for row in rows
+        ]
+        
+        return {"metrics": metrics, "count": len(metrics)}
 
 
 @router.get("/tier-comparison")
@@ -531,48 +368,22 @@ async def get_tier_comparison(
     """
     Compare metrics across subscription tiers
     """
-    pool = await get_db_pool()
+    pool = await get_rollup_pool()
     
-    try:
-        async with pool.acquire() as conn:
-            query = """
-                SELECT 
-                    o.plan_tier,
-                    COUNT(DISTINCT o.organization_id) as tenant_count,
-                    COUNT(DISTINCT u.user_id) as total_users,
-                    COUNT(DISTINCT d.device_id) as total_devices,
-                    COUNT(DISTINCT w.webhook_id) as total_webhooks,
-                    AVG((SELECT COUNT(*) FROM users WHERE organization_id = o.organization_id)) as avg_users_per_tenant,
-                    AVG((SELECT COUNT(*) FROM edge_devices WHERE organization_id = o.organization_id)) as avg_devices_per_tenant
-                FROM organizations o
-                LEFT JOIN users u ON o.organization_id = u.organization_id
-                LEFT JOIN edge_devices d ON o.organization_id = d.organization_id
-                LEFT JOIN webhooks w ON o.organization_id = w.webhook_id
-                WHERE o.is_active = true
-                GROUP BY o.plan_tier
-                ORDER BY 
-                    CASE o.plan_tier
-                        WHEN 'trial' THEN 1
-                        WHEN 'starter' THEN 2
-                        WHEN 'professional' THEN 3
-                        WHEN 'enterprise' THEN 4
-                    END
-            """
-            
-            rows = await conn.fetch(query)
-            
-            comparison = {}
-            for row in rows:
-                comparison[row['plan_tier']] = {
-                    'tenant_count': row['tenant_count'],
-                    'total_users': row['total_users'] or 0,
-                    'total_devices': row['total_devices'] or 0,
-                    'total_webhooks': row['total_webhooks'] or 0,
-                    'avg_users_per_tenant': float(row['avg_users_per_tenant'] or 0),
-                    'avg_devices_per_tenant': float(row['avg_devices_per_tenant'] or 0)
-                }
-            
-            return {"tier_comparison": comparison}
-        
-    finally:
-        await pool.close()
+    async with pool.acquire() as conn:
+        tiers = await tenant_rollups.latest_tiers(conn)
+    
+    comparison = {}
+    for row in tiers:
+        tenant_count = row['tenants'] or 0
+        comparison[row['plan_tier']] = {
+            'tenant_count': tenant_count,
+            'active_tenants': row['active_tenants'] or 0,
+            'total_users': row['users'] or 0,
+            'total_devices': row['devices'] or 0,
+            'total_webhooks': row['webhooks'] or 0,
+            'avg_users_per_tenant': (row['users'] or 0) / tenant_count if tenant_count else 0.0,
+            'avg_devices_per_tenant': (row['devices'] or 0) / tenant_count if tenant_count else 0.0
+        }
+    
+    return {"tier_comparison": comparison}
@@ -7,26 +7,22 @@ Author: Backend API Developer Agent
 Created: 2025-11-26
 """
 
-import asyncpg
-import os
 import logging
 
-logger = logging.getLogger(__name__)
+from db_manager import PooledConnection, db_manager
 
-# Database configuration
-DB_HOST = os.getenv("POSTGRES_HOST", "unicorn-postgresql")
-DB_PORT = int(os.getenv("POSTGRES_PORT", "5432"))
-DB_USER = os.getenv("POSTGRES_USER", "unicorn")
-DB_PASSWORD = os.getenv("POSTGRES_PASSWORD", "unicorn")
-DB_NAME = os.getenv("POSTGRES_DB", "unicorn_db")
+logger = logging.getLogger(__name__)
 
 
-async def get_db_connection() -> asyncpg.Connection:
+async def get_db_connection() -> PooledConnection:
     """
     Get an async PostgreSQL database connection.
 
+    The connection comes from the app-wide pool in db_manager; close()
+    returns it to the pool instead of tearing down the socket.
+
     Returns:
-        asyncpg.Connection: Database connection
+        PooledConnection: Database connection
 
     Raises:
         Exception: If connection fails
@@ -40,14 +36,7 @@ async def get_db_connection() -> asyncpg.Connection:
             await conn.close()
     """
     try:
-        conn = await asyncpg.connect(
-            host=DB_HOST,
-            port=DB_PORT,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_NAME
-        )
-        return conn
+        return await db_manager.connect()
     except Exception as e:
         logger.error(f"Failed to connect to database: {e}")
         raise
@@ -67,11 +56,8 @@ async def execute_query(query: str, *args):
     Usage:
         results = await execute_query("SELECT * FROM users WHERE id = $1", user_id)
     """
-    conn = await get_db_connection()
-    try:
+    async with db_manager.acquire() as conn:
         return await conn.fetch(query, *args)
-    finally:
-        await conn.close()
 
 
 async def execute_one(query: str, *args):
@@ -88,8 +74,5 @@ async def execute_one(query: str, *args):
     Usage:
         user = await execute_one("SELECT * FROM users WHERE id = $1", user_id)
     """
-    conn = await get_db_connection()
-    try:
+    async with db_manager.acquire() as conn:
         return await conn.fetchrow(query, *args)
-    finally:
-        await conn.close()
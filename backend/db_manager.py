@@ -0,0 +1,492 @@
+"""
+Database Manager - One PostgreSQL Pool for the Whole Backend
+
+Every module takes its connections from the `db_manager` singleton instead
+of running asyncpg.connect per call or building its own pool:
+
+- One primary asyncpg pool (plus an optional read replica) sized for the
+  whole process, so the backend's share of Postgres max_connections is
+  DB_POOL_MAX_SIZE (+ the replica's) no matter how many modules use it
+- Named subsystem budgets: each subsystem ("billing", "analytics",
+  "webhooks", ...) may hold at most its budget of connections at once, so
+  one busy subsystem queues on its own budget instead of starving the rest
+- Statement caching: pooled connections keep asyncpg's prepared statement
+  cache (DB_STATEMENT_CACHE_SIZE, set 0 behind pgbouncer transaction mode)
+- Read-replica routing: readonly acquisitions (analytics) go to
+  DATABASE_REPLICA_URL when configured and healthy, else to the primary
+- Health and saturation metrics per subsystem and per pool
+
+Usage:
+    from db_manager import db_manager
+
+    async with db_manager.acquire("billing") as conn:
+        await conn.fetchrow(...)
+
+    pool = db_manager.subsystem("analytics", readonly=True)  # pool-like facade
+    conn = await db_manager.connect("fleet")  # released by conn.close()
+"""
+
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+from urllib.parse import quote
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+# Concurrent connections each subsystem may hold; None = the whole pool.
+# Overridable with DB_BUDGETS="analytics=2,billing=10"
+DEFAULT_BUDGETS: Dict[str, Optional[int]] = {
+    'core': None,        # server startup wiring (credit system, BYOK, RBAC, ...)
+    'default': 10,       # database.get_db_pool / get_db_connection callers
+    'billing': 8,        # credits, coupons, purchases, usage metering
+    'usage': 6,          # usage tracking
+    'fleet': 6,          # edge devices, OTA, fleet workers
+    'llm_routing': 6,
+    'analytics': 4,      # routed to the read replica when available
+    'auth': 4,
+    'extensions': 4,
+    'webhooks': 3,
+    'email': 2,
+    'jobs': 2,           # background job leases
+}
+UNLISTED_BUDGET = 5
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        logger.warning(f"Ignoring invalid {name}={os.getenv(name)!r}")
+        return default
+
+
+def _primary_dsn() -> str:
+    """DATABASE_URL if it is a Postgres URL, otherwise built from POSTGRES_*"""
+    url = os.getenv("DATABASE_URL", "")
+    if url.startswith(("postgresql", "postgres://")):
+        return url.replace("postgresql+asyncpg://", "postgresql://", 1)
+    return "postgresql://{user}:{password}@{host}:{port}/{db}".format(
+        user=quote(os.getenv("POSTGRES_USER", "unicorn"), safe=""),
+        password=quote(os.getenv("POSTGRES_PASSWORD", "unicorn"), safe=""),
+        host=os.getenv("POSTGRES_HOST", "unicorn-postgresql"),
+        port=os.getenv("POSTGRES_PORT", "5432"),
+        db=os.getenv("POSTGRES_DB", "unicorn_db"),
+    )
+
+
+def _parse_budgets(spec: str) -> Dict[str, int]:
+    budgets = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, value = item.partition("=")
+        try:
+            budgets[name.strip()] = max(1, int(value))
+        except ValueError:
+            logger.warning(f"Ignoring invalid DB_BUDGETS entry {item!r}")
+    return budgets
+
+
+@dataclass
+class SubsystemStats:
+    """Budget and usage counters for one subsystem"""
+    name: str
+    budget: int
+    semaphore: asyncio.Semaphore = field(repr=False)
+    in_use: int = 0
+    peak: int = 0
+    acquired: int = 0
+    waits: int = 0
+    wait_seconds: float = 0.0
+    timeouts: int = 0
+    replica_acquired: int = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'budget': self.budget,
+            'in_use': self.in_use,
+            'peak': self.peak,
+            'saturation': round(self.in_use / self.budget, 3),
+            'acquired': self.acquired,
+            'waits': self.waits,
+            'avg_wait_ms': round(1000 * self.wait_seconds / self.acquired, 2) if self.acquired else 0.0,
+            'timeouts': self.timeouts,
+            'replica_acquired': self.replica_acquired,
+        }
+
+
+class DatabaseManager:
+    """Process-wide connection pools with per-subsystem budgets"""
+
+    def __init__(
+        self,
+        dsn: Optional[str] = None,
+        replica_dsn: Optional[str] = None,
+        min_size: Optional[int] = None,
+        max_size: Optional[int] = None,
+        budgets: Optional[Dict[str, int]] = None,
+        statement_cache_size: Optional[int] = None,
+        acquire_timeout: Optional[float] = None,
+    ):
+        self.dsn = dsn
+        self.replica_dsn = replica_dsn if replica_dsn is not None else os.getenv("DATABASE_REPLICA_URL") or None
+        self.min_size = min_size if min_size is not None else _env_int("DB_POOL_MIN_SIZE", 2)
+        self.max_size = max_size if max_size is not None else _env_int("DB_POOL_MAX_SIZE", 20)
+        self.statement_cache_size = (
+            statement_cache_size if statement_cache_size is not None
+            else _env_int("DB_STATEMENT_CACHE_SIZE", 256)
+        )
+        self.acquire_timeout = (
+            acquire_timeout if acquire_timeout is not None
+            else float(_env_int("DB_ACQUIRE_TIMEOUT", 10))
+        )
+        self.command_timeout = _env_int("DB_COMMAND_TIMEOUT", 60)
+        self.max_inactive_lifetime = _env_int("DB_POOL_MAX_IDLE_SECONDS", 300)
+
+        self.budgets: Dict[str, Optional[int]] = dict(DEFAULT_BUDGETS)
+        self.budgets.update(_parse_budgets(os.getenv("DB_BUDGETS", "")))
+        self.budgets.update(budgets or {})
+
+        self.pool: Optional[asyncpg.Pool] = None
+        self.replica: Optional[asyncpg.Pool] = None
+        self.replica_healthy = False
+        self.replica_fallbacks = 0
+
+        self._stats: Dict[str, SubsystemStats] = {}
+        self._holders: Dict[int, tuple] = {}  # id(conn) -> (stats, pool)
+        self._start_lock: Optional[asyncio.Lock] = None
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    @property
+    def started(self) -> bool:
+        return self.pool is not None
+
+    async def _create_pool(self, dsn: str) -> asyncpg.Pool:
+        return await asyncpg.create_pool(
+            dsn,
+            min_size=min(self.min_size, self.max_size),
+            max_size=self.max_size,
+            statement_cache_size=self.statement_cache_size,
+            max_inactive_connection_lifetime=self.max_inactive_lifetime,
+            command_timeout=self.command_timeout,
+            timeout=self.acquire_timeout,
+        )
+
+    async def start(self):
+        """Create the pools; safe to call repeatedly and concurrently"""
+        if self.pool is not None:
+            return
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self.pool is not None:
+                return
+            try:
+                pool = await self._create_pool(self.dsn or _primary_dsn())
+            except Exception as e:
+                logger.error(f"Failed to create database pool: {e}")
+                raise RuntimeError(f"Database connection failed: {e}")
+
+            if self.replica_dsn:
+                try:
+                    self.replica = await self._create_pool(self.replica_dsn)
+                    self.replica_healthy = True
+                except Exception as e:
+                    logger.warning(f"Read replica unavailable, analytics will use the primary: {e}")
+            self.pool = pool
+            logger.info(
+                f"Database pool started (max {self.max_size} connections, "
+                f"replica {'on' if self.replica else 'off'})"
+            )
+
+    async def close(self):
+        """Close the pools; used at application shutdown"""
+        pools, self.pool, self.replica = (self.pool, self.replica), None, None
+        self.replica_healthy = False
+        self._holders.clear()
+        for pool in pools:
+            if pool is not None:
+                await pool.close()
+        if any(pools):
+            logger.info("Database pool closed")
+
+    # ------------------------------------------------------------------
+    # Acquiring connections
+    # ------------------------------------------------------------------
+
+    def _stats_for(self, subsystem: str) -> SubsystemStats:
+        stats = self._stats.get(subsystem)
+        if stats is None:
+            budget = self.budgets.get(subsystem, UNLISTED_BUDGET)
+            budget = min(budget or self.max_size, self.max_size)
+            stats = self._stats[subsystem] = SubsystemStats(subsystem, budget, asyncio.Semaphore(budget))
+        return stats
+
+    async def acquire_connection(
+        self,
+        subsystem: str = 'default',
+        readonly: bool = False,
+        timeout: Optional[float] = None
+    ):
+        """
+        Take a connection within the subsystem's budget.
+
+        Must be handed back with release_connection(); prefer acquire().
+        Raises asyncio.TimeoutError if none frees up within the timeout.
+        """
+        await self.start()
+        stats = self._stats_for(subsystem)
+        timeout = self.acquire_timeout if timeout is None else timeout
+        started = time.monotonic()
+
+        if not stats.semaphore.locked():
+            await stats.semaphore.acquire()  # free slot: no suspension
+        else:
+            stats.waits += 1
+            try:
+                await asyncio.wait_for(stats.semaphore.acquire(), timeout)
+            except asyncio.TimeoutError:
+                stats.timeouts += 1
+                logger.warning(f"Database budget for '{subsystem}' exhausted ({stats.budget} in use)")
+                raise
+
+        try:
+            remaining = max(timeout - (time.monotonic() - started), 0.001)
+            pool = self.pool
+            conn = None
+            if readonly and self.replica is not None and self.replica_healthy:
+                try:
+                    conn = await self.replica.acquire(timeout=remaining)
+                    pool = self.replica
+                    stats.replica_acquired += 1
+                except (OSError, asyncpg.PostgresConnectionError, asyncpg.InterfaceError) as e:
+                    logger.warning(f"Read replica failed, falling back to primary: {e}")
+                    self.replica_healthy = False
+                    self.replica_fallbacks += 1
+            if conn is None:
+                conn = await pool.acquire(timeout=remaining)
+        except asyncio.TimeoutError:
+            stats.semaphore.release()
+            stats.timeouts += 1
+            raise
+        except BaseException:
+            stats.semaphore.release()
+            raise
+
+        stats.wait_seconds += time.monotonic() - started
+        stats.acquired += 1
+        stats.in_use += 1
+        stats.peak = max(stats.peak, stats.in_use)
+        self._holders[id(conn)] = (stats, pool)
+        return conn
+
+    async def release_connection(self, conn):
+        """Hand a connection back to its pool and budget; idempotent"""
+        holder = self._holders.pop(id(conn), None)
+        if holder is None:
+            return
+        stats, pool = holder
+        try:
+            await pool.release(conn)
+        finally:
+            stats.in_use -= 1
+            stats.semaphore.release()
+
+    @asynccontextmanager
+    async def acquire(self, subsystem: str = 'default', readonly: bool = False, timeout: Optional[float] = None):
+        """`async with db_manager.acquire("billing") as conn:`"""
+        conn = await self.acquire_connection(subsystem, readonly, timeout)
+        try:
+            yield conn
+        finally:
+            await self.release_connection(conn)
+
+    async def connect(self, subsystem: str = 'default', readonly: bool = False) -> 'PooledConnection':
+        """
+        Drop-in for asyncpg.connect(): a pooled connection whose close()
+        returns it to the pool. Also usable as `async with`.
+        """
+        conn = await self.acquire_connection(subsystem, readonly)
+        return PooledConnection(self, conn)
+
+    def subsystem(self, name: str, readonly: bool = False) -> 'SubsystemPool':
+        """Pool-like view for code written against asyncpg.Pool"""
+        return SubsystemPool(self, name, readonly)
+
+    # ------------------------------------------------------------------
+    # Health and metrics
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _pool_metrics(pool: Optional[asyncpg.Pool]) -> Optional[Dict[str, Any]]:
+        if pool is None:
+            return None
+        size, idle, max_size = pool.get_size(), pool.get_idle_size(), pool.get_max_size()
+        return {
+            'size': size,
+            'idle': idle,
+            'in_use': size - idle,
+            'max_size': max_size,
+            'saturation': round((size - idle) / max_size, 3) if max_size else 0.0,
+        }
+
+    def metrics(self) -> Dict[str, Any]:
+        """Pool and per-subsystem usage, for /health and metrics endpoints"""
+        return {
+            'started': self.started,
+            'primary': self._pool_metrics(self.pool),
+            'replica': self._pool_metrics(self.replica),
+            'replica_healthy': self.replica_healthy,
+            'replica_fallbacks': self.replica_fallbacks,
+            'subsystems': {name: stats.snapshot() for name, stats in sorted(self._stats.items())},
+        }
+
+    async def health(self, timeout: float = 5.0) -> Dict[str, Any]:
+        """Round-trip SELECT 1 on each pool; re-enables a recovered replica"""
+        result: Dict[str, Any] = {'status': 'healthy'}
+        try:
+            await self.start()
+        except RuntimeError as e:
+            return {'status': 'unhealthy', 'error': str(e)}
+
+        for name, pool in (('primary', self.pool), ('replica', self.replica)):
+            if pool is None:
+                continue
+            started = time.monotonic()
+            try:
+                conn = await pool.acquire(timeout=timeout)
+                try:
+                    await conn.fetchval("SELECT 1", timeout=timeout)
+                finally:
+                    await pool.release(conn)
+                result[name] = {'status': 'healthy', 'latency_ms': round(1000 * (time.monotonic() - started), 2)}
+                if name == 'replica':
+                    self.replica_healthy = True
+            except Exception as e:
+                result[name] = {'status': 'unhealthy', 'error': str(e)}
+                if name == 'primary':
+                    result['status'] = 'unhealthy'
+                else:
+                    self.replica_healthy = False
+                    result['status'] = 'degraded' if result['status'] == 'healthy' else result['status']
+        result['metrics'] = self.metrics()
+        return result
+
+
+class PooledConnection:
+    """A pooled connection standing in for one from asyncpg.connect()"""
+
+    def __init__(self, manager: DatabaseManager, conn):
+        self._manager = manager
+        self._conn = conn
+
+    def __getattr__(self, name):
+        if self._conn is None:
+            raise asyncpg.InterfaceError("connection has been released back to the pool")
+        return getattr(self._conn, name)
+
+    async def close(self, timeout: Optional[float] = None):
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            await self._manager.release_connection(conn)
+
+    def is_closed(self) -> bool:
+        return self._conn is None or self._conn.is_closed()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+        return False
+
+
+class _AcquireContext:
+    """Result of SubsystemPool.acquire(): `async with` it, or await it and release()"""
+
+    def __init__(self, pool: 'SubsystemPool', timeout: Optional[float]):
+        self._pool = pool
+        self._timeout = timeout
+        self._conn = None
+
+    def _acquire(self):
+        return self._pool.manager.acquire_connection(self._pool.name, self._pool.readonly, self._timeout)
+
+    def __await__(self):
+        return self._acquire().__await__()
+
+    async def __aenter__(self):
+        self._conn = await self._acquire()
+        return self._conn
+
+    async def __aexit__(self, *exc):
+        conn, self._conn = self._conn, None
+        await self._pool.manager.release_connection(conn)
+        return False
+
+
+class SubsystemPool:
+    """asyncpg.Pool-compatible view of the shared pool under one budget"""
+
+    def __init__(self, manager: DatabaseManager, name: str, readonly: bool = False):
+        self.manager = manager
+        self.name = name
+        self.readonly = readonly
+
+    def acquire(self, *, timeout: Optional[float] = None) -> _AcquireContext:
+        return _AcquireContext(self, timeout)
+
+    async def release(self, conn, *, timeout: Optional[float] = None):
+        await self.manager.release_connection(conn)
+
+    async def fetch(self, query, *args, timeout=None):
+        async with self.acquire() as conn:
+            return await conn.fetch(query, *args, timeout=timeout)
+
+    async def fetchrow(self, query, *args, timeout=None):
+        async with self.acquire() as conn:
+            return await conn.fetchrow(query, *args, timeout=timeout)
+
+    async def fetchval(self, query, *args, column=0, timeout=None):
+        async with self.acquire() as conn:
+            return await conn.fetchval(query, *args, column=column, timeout=timeout)
+
+    async def execute(self, query, *args, timeout=None):
+        async with self.acquire() as conn:
+            return await conn.execute(query, *args, timeout=timeout)
+
+    async def executemany(self, command, args, *, timeout=None):
+        async with self.acquire() as conn:
+            return await conn.executemany(command, args, timeout=timeout)
+
+    async def close(self):
+        """No-op: the shared pool is closed by db_manager.close() at shutdown"""
+
+    def terminate(self):
+        """No-op, see close()"""
+
+    def get_size(self) -> int:
+        return self.manager.pool.get_size() if self.manager.pool else 0
+
+    def get_idle_size(self) -> int:
+        return self.manager.pool.get_idle_size() if self.manager.pool else 0
+
+    def get_min_size(self) -> int:
+        return self.manager.min_size
+
+    def get_max_size(self) -> int:
+        return self.manager._stats_for(self.name).budget
+
+    def __repr__(self) -> str:
+        return f"<SubsystemPool {self.name}{' readonly' if self.readonly else ''}>"
+
+
+# Global instance
+db_manager = DatabaseManager()
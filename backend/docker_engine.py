@@ -0,0 +1,474 @@
+"""
+Shared Async Docker Engine Client
+
+One non-blocking Docker Engine API client (HTTP over the unix socket)
+for the whole process, plus a container-state cache that API handlers
+read instead of calling `docker.from_env()` or shelling out to the CLI.
+
+- DockerEngineClient: thin async wrapper over the Engine REST API
+- DockerState: container inventory kept current from the events stream,
+  and a background sampler holding the latest CPU/memory per container
+
+Usage:
+    from docker_engine import docker_state
+
+    await docker_state.ensure_started()
+    for container in docker_state.containers():
+        stats = docker_state.stats(container.id)
+"""
+
+import os
+import json
+import time
+import struct
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SOCKET = "/var/run/docker.sock"
+
+# Container events that can change what we cache about a container
+STATE_EVENTS = {
+    "create", "start", "restart", "stop", "die", "kill", "pause", "unpause",
+    "rename", "update", "health_status", "oom",
+}
+
+
+class DockerEngineError(Exception):
+    """Raised when the Docker Engine API returns an error"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"Docker API error {status}: {message}")
+        self.status = status
+
+
+def _socket_path() -> str:
+    docker_host = os.getenv("DOCKER_HOST", "")
+    if docker_host.startswith("unix://"):
+        return docker_host[len("unix://"):]
+    return DEFAULT_SOCKET
+
+
+class DockerEngineClient:
+    """Async Docker Engine API client over the unix socket"""
+
+    def __init__(self, socket_path: Optional[str] = None, timeout: float = 10.0):
+        self.socket_path = socket_path or _socket_path()
+        self.timeout = timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.UnixConnector(path=self.socket_path, limit=32),
+                base_url="http://docker",
+            )
+        return self._session
+
+    async def close(self):
+        if self._session and not self._session.closed:
+            await self._session.close()
+
+    async def _request(self, method: str, path: str, **params) -> Any:
+        session = await self._get_session()
+        query = {k: _param(v) for k, v in params.items() if v is not None}
+        async with session.request(
+            method, path, params=query,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        ) as response:
+            if response.status >= 400:
+                raise DockerEngineError(response.status, await response.text())
+            if response.content_type == "application/json":
+                return await response.json()
+            return await response.text()
+
+    # ------------------------------------------------------------------
+    # Containers
+    # ------------------------------------------------------------------
+
+    async def ping(self) -> bool:
+        return (await self._request("GET", "/_ping")) == "OK"
+
+    async def list_containers(self, all: bool = True, filters: Optional[Dict] = None) -> List[Dict]:
+        return await self._request("GET", "/containers/json", all=all, filters=filters)
+
+    async def inspect_container(self, container_id: str) -> Dict:
+        return await self._request("GET", f"/containers/{container_id}/json")
+
+    async def container_stats(self, container_id: str) -> Dict:
+        """Single stats snapshot without waiting for a second sample"""
+        return await self._request(
+            "GET", f"/containers/{container_id}/stats", stream=False, **{"one-shot": True}
+        )
+
+    async def events(self, since: Optional[float] = None, filters: Optional[Dict] = None) -> AsyncIterator[Dict]:
+        """Stream Engine events as dicts until the connection drops"""
+        session = await self._get_session()
+        query = {"filters": _param(filters or {})}
+        if since:
+            query["since"] = f"{since:.3f}"
+        async with session.get(
+            "/events", params=query,
+            timeout=aiohttp.ClientTimeout(total=None, sock_read=None),
+        ) as response:
+            if response.status >= 400:
+                raise DockerEngineError(response.status, await response.text())
+            async for line in response.content:
+                if line.strip():
+                    yield json.loads(line)
+
+    async def logs(
+        self,
+        container_id: str,
+        follow: bool = False,
+        since: Optional[float] = None,
+        tail: Optional[int] = None,
+        timestamps: bool = True,
+        tty: bool = False,
+    ) -> AsyncIterator[Tuple[str, str]]:
+        """
+        Stream container log lines as (stream, line) tuples.
+
+        Non-TTY containers use Docker's multiplexed framing (8-byte header
+        per frame); TTY containers return a raw stream.
+        """
+        session = await self._get_session()
+        query = {
+            "stdout": "1", "stderr": "1",
+            "follow": _param(follow), "timestamps": _param(timestamps),
+        }
+        if since:
+            query["since"] = f"{since:.6f}"
+        if tail is not None:
+            query["tail"] = str(tail)
+
+        async with session.get(
+            f"/containers/{container_id}/logs", params=query,
+            timeout=aiohttp.ClientTimeout(total=None if follow else self.timeout, sock_read=None),
+        ) as response:
+            if response.status >= 400:
+                raise DockerEngineError(response.status, await response.text())
+
+            if tty:
+                async for line in response.content:
+                    yield "stdout", line.decode(errors="replace").rstrip("\n")
+                return
+
+            pending = {"stdout": b"", "stderr": b""}
+            while True:
+                try:
+                    header = await response.content.readexactly(8)
+                except asyncio.IncompleteReadError:
+                    break
+                stream_type, size = struct.unpack(">BxxxL", header)
+                payload = await response.content.readexactly(size)
+                stream = "stderr" if stream_type == 2 else "stdout"
+                *lines, pending[stream] = (pending[stream] + payload).split(b"\n")
+                for line in lines:
+                    yield stream, line.decode(errors="replace")
+            for stream, rest in pending.items():
+                if rest:
+                    yield stream, rest.decode(errors="replace")
+
+
+def _param(value: Any) -> str:
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return str(value)
+
+
+@dataclass
+class ContainerInfo:
+    """Cached view of one container"""
+    id: str
+    name: str
+    image: str
+    status: str
+    health: Optional[str]
+    started_at: Optional[str]
+    labels: Dict[str, str] = field(default_factory=dict)
+    ports: Dict[str, Any] = field(default_factory=dict)
+    networks: Dict[str, Any] = field(default_factory=dict)
+    tty: bool = False
+    updated_at: float = 0.0
+
+    @classmethod
+    def from_inspect(cls, data: Dict) -> "ContainerInfo":
+        state = data.get("State") or {}
+        config = data.get("Config") or {}
+        started_at = state.get("StartedAt")
+        if started_at and started_at.startswith("0001-01-01"):
+            started_at = None
+        return cls(
+            id=data["Id"],
+            name=data.get("Name", "").lstrip("/"),
+            image=config.get("Image") or data.get("Image", "unknown"),
+            status=state.get("Status", "unknown"),
+            health=(state.get("Health") or {}).get("Status"),
+            started_at=started_at,
+            labels=config.get("Labels") or {},
+            ports=(data.get("NetworkSettings") or {}).get("Ports") or {},
+            networks=(data.get("NetworkSettings") or {}).get("Networks") or {},
+            tty=bool(config.get("Tty")),
+            updated_at=time.time(),
+        )
+
+    @property
+    def running(self) -> bool:
+        return self.status == "running"
+
+    def uptime_seconds(self) -> Optional[float]:
+        if not self.running or not self.started_at:
+            return None
+        # Engine timestamps carry nanoseconds; trim to microseconds
+        started = self.started_at.replace("Z", "+00:00")
+        if "." in started:
+            head, _, rest = started.partition(".")
+            frac, sign, tz = rest[:-6], rest[-6], rest[-5:]
+            started = f"{head}.{frac[:6]}{sign}{tz}"
+        start_time = datetime.fromisoformat(started)
+        return (datetime.now(start_time.tzinfo) - start_time).total_seconds()
+
+
+@dataclass
+class ContainerStats:
+    """Latest sampled resource usage of one container"""
+    cpu_percent: float
+    memory_bytes: int
+    memory_limit: int
+    sampled_at: float
+
+    @property
+    def memory_mb(self) -> float:
+        return round(self.memory_bytes / (1024 ** 2), 2)
+
+
+def cpu_percent_between(previous: Dict, current: Dict) -> float:
+    """CPU% of host capacity between two raw stats samples"""
+    try:
+        cpu_delta = current["cpu_stats"]["cpu_usage"]["total_usage"] - previous["cpu_stats"]["cpu_usage"]["total_usage"]
+        system_delta = current["cpu_stats"]["system_cpu_usage"] - previous["cpu_stats"]["system_cpu_usage"]
+    except (KeyError, TypeError):
+        return 0.0
+    if system_delta <= 0 or cpu_delta < 0:
+        return 0.0
+    return (cpu_delta / system_delta) * 100.0
+
+
+class DockerState:
+    """
+    Process-wide container inventory and stats cache.
+
+    The inventory is loaded once, then kept current from the Engine events
+    stream (re-inspecting only the container an event refers to). A sampler
+    takes one-shot stats of running containers on an interval and derives
+    CPU% from consecutive samples, so readers never wait on the Engine.
+    """
+
+    def __init__(
+        self,
+        client: Optional[DockerEngineClient] = None,
+        stats_interval: float = 10.0,
+        stats_concurrency: int = 8,
+    ):
+        self.client = client or DockerEngineClient()
+        self.stats_interval = stats_interval
+        self.stats_concurrency = stats_concurrency
+
+        self._containers: Dict[str, ContainerInfo] = {}
+        self._stats: Dict[str, ContainerStats] = {}
+        self._raw_stats: Dict[str, Dict] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._ready = asyncio.Event()
+        self._start_lock = asyncio.Lock()
+        self.last_event_at: Optional[float] = None
+        self.last_sync_at: Optional[float] = None
+        self.error: Optional[str] = None
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    @property
+    def running(self) -> bool:
+        return any(not t.done() for t in self._tasks)
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    async def start(self):
+        async with self._start_lock:
+            if self.running:
+                return
+            self._ready = asyncio.Event()
+            self._tasks = [
+                asyncio.create_task(self._watch_events()),
+                asyncio.create_task(self._sample_stats()),
+            ]
+            logger.info(f"Docker state cache started ({self.client.socket_path})")
+
+    async def ensure_started(self, timeout: float = 5.0) -> bool:
+        """Start if needed and wait for the first inventory load"""
+        if not self.running:
+            await self.start()
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self.client.close()
+
+    # ------------------------------------------------------------------
+    # Readers (no I/O)
+    # ------------------------------------------------------------------
+
+    def containers(self, all: bool = True) -> List[ContainerInfo]:
+        items = list(self._containers.values())
+        if not all:
+            items = [c for c in items if c.running]
+        return sorted(items, key=lambda c: c.name)
+
+    def get(self, name_or_id: str) -> Optional[ContainerInfo]:
+        container = self._containers.get(name_or_id)
+        if container:
+            return container
+        for container in self._containers.values():
+            if container.name == name_or_id or container.id.startswith(name_or_id):
+                return container
+        return None
+
+    def stats(self, container_id: str) -> Optional[ContainerStats]:
+        return self._stats.get(container_id)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "containers": len(self._containers),
+            "sampled": len(self._stats),
+            "last_sync_at": self.last_sync_at,
+            "last_event_at": self.last_event_at,
+            "error": self.error,
+        }
+
+    # ------------------------------------------------------------------
+    # Inventory
+    # ------------------------------------------------------------------
+
+    async def resync(self):
+        """Full inventory reload (startup and after the events stream drops)"""
+        listed = await self.client.list_containers(all=True)
+        semaphore = asyncio.Semaphore(self.stats_concurrency)
+
+        async def inspect(container_id: str):
+            async with semaphore:
+                try:
+                    return ContainerInfo.from_inspect(await self.client.inspect_container(container_id))
+                except DockerEngineError as e:
+                    if e.status != 404:
+                        raise
+                    return None
+
+        inspected = await asyncio.gather(*(inspect(c["Id"]) for c in listed))
+        self._containers = {c.id: c for c in inspected if c}
+        for stale in set(self._stats) - set(self._containers):
+            self._stats.pop(stale, None)
+            self._raw_stats.pop(stale, None)
+        self.last_sync_at = time.time()
+        self._ready.set()
+
+    async def _refresh_container(self, container_id: str):
+        try:
+            info = ContainerInfo.from_inspect(await self.client.inspect_container(container_id))
+            self._containers[info.id] = info
+        except DockerEngineError as e:
+            if e.status == 404:
+                self._forget(container_id)
+            else:
+                raise
+
+    def _forget(self, container_id: str):
+        self._containers.pop(container_id, None)
+        self._stats.pop(container_id, None)
+        self._raw_stats.pop(container_id, None)
+
+    async def _watch_events(self):
+        backoff = 1.0
+        while True:
+            try:
+                since = time.time()
+                await self.resync()
+                self.error = None
+                backoff = 1.0
+                async for event in self.client.events(since=since, filters={"type": ["container"]}):
+                    self.last_event_at = time.time()
+                    action = (event.get("Action") or event.get("status") or "").split(":")[0]
+                    container_id = event.get("id") or (event.get("Actor") or {}).get("ID")
+                    if not container_id:
+                        continue
+                    if action == "destroy":
+                        self._forget(container_id)
+                    elif action in STATE_EVENTS:
+                        await self._refresh_container(container_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.error = str(e)
+                logger.warning(f"Docker events stream interrupted ({e}), reconnecting in {backoff:.0f}s")
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 60.0)
+
+    # ------------------------------------------------------------------
+    # Stats sampler
+    # ------------------------------------------------------------------
+
+    async def _sample_stats(self):
+        semaphore = asyncio.Semaphore(self.stats_concurrency)
+
+        async def sample(container: ContainerInfo):
+            async with semaphore:
+                try:
+                    raw = await self.client.container_stats(container.id)
+                except Exception as e:
+                    logger.debug(f"Stats sample failed for {container.name}: {e}")
+                    return
+            previous = self._raw_stats.get(container.id)
+            self._raw_stats[container.id] = raw
+            memory = raw.get("memory_stats") or {}
+            self._stats[container.id] = ContainerStats(
+                cpu_percent=cpu_percent_between(previous, raw) if previous else 0.0,
+                memory_bytes=memory.get("usage", 0),
+                memory_limit=memory.get("limit", 0),
+                sampled_at=time.time(),
+            )
+
+        await self._ready.wait()
+        while True:
+            started = time.monotonic()
+            try:
+                await asyncio.gather(*(sample(c) for c in self.containers(all=False)))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Docker stats sampling failed: {e}")
+            elapsed = time.monotonic() - started
+            await asyncio.sleep(max(1.0, self.stats_interval - elapsed))
+
+
+docker_state = DockerState(
+    stats_interval=float(os.getenv("DOCKER_STATS_INTERVAL_SECONDS", "10")),
+)
@@ -10,11 +10,16 @@ from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any
 from uuid import UUID
-from datetime import datetime
+from datetime import datetime, timezone
+import json
 import logging
+import zlib
+
+import asyncpg
 
 from auth_dependencies import require_authenticated_user, require_admin_user
 from database import get_db_connection
+from edge_heartbeat_ingest import SAMPLE_COLUMNS, flatten_metrics, heartbeat_ingestor
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +27,9 @@ logger = logging.getLogger(__name__)
 device_router = APIRouter(prefix="/api/v1/edge/devices", tags=["Edge Devices"])
 admin_router = APIRouter(prefix="/api/v1/admin/edge", tags=["Admin - Edge Management"])
 
+# Upper bound for a decompressed telemetry envelope
+MAX_ENVELOPE_BYTES = 16 * 1024 * 1024
+
 
 # ==================== Pydantic Models ====================
 
@@ -95,7 +103,7 @@ async def register_device(request: DeviceRegistrationRequest):
     try:
         from edge_device_manager import EdgeDeviceManager
         
-        conn = await get_db_connection()
+        conn = await get_db_connection('fleet')
         try:
             # Create manager (note: we'll need to adapt this for asyncpg)
             # For now, we'll use raw SQL
@@ -169,85 +177,34 @@ async def device_heartbeat(device_id: UUID, request: DeviceHeartbeatRequest):
     
     Devices should send heartbeats every 30 seconds.
     Response may include pending configuration updates.
+    
+    Heartbeats are acknowledged from memory and written in batches by
+    the heartbeat ingestor.
     """
     try:
-        conn = await get_db_connection()
-        try:
-            # Update device status
-            await conn.execute(
-                """
-                UPDATE edge_devices 
-                SET status = $1, 
-                    last_seen = NOW(),
-                    ip_address = $2,
-                    metadata = jsonb_set(
-                        COALESCE(metadata, '{}'::jsonb),
-                        '{uptime}',
-                        $3::text::jsonb
-                    )
-                WHERE id = $4
-                """,
-                request.status,
-                request.ip_address,
-                request.uptime or 0,
-                device_id
-            )
-            
-            # Store metrics if provided
-            if request.metrics:
-                for metric_type, value in request.metrics.items():
-                    await conn.execute(
-                        """
-                        INSERT INTO device_metrics (device_id, metric_type, metric_value, timestamp)
-                        VALUES ($1, $2, $3, NOW())
-                        """,
-                        device_id,
-                        metric_type,
-                        value if isinstance(value, dict) else {"value": value}
-                    )
-            
-            # Check for pending config
-            pending_config = await conn.fetchrow(
-                """
-                SELECT id, config_version, config_data
-                FROM device_configurations
-                WHERE device_id = $1 
-                  AND is_active = true 
-                  AND applied_at IS NULL
-                ORDER BY created_at DESC
-                LIMIT 1
-                """,
-                device_id
-            )
-            
-            response = {
-                "ack": True,
-                "timestamp": datetime.utcnow().isoformat(),
-                "next_heartbeat": 30
-            }
-            
-            if pending_config:
-                response["pending_config"] = {
-                    "config_id": str(pending_config['id']),
-                    "version": pending_config['config_version'],
-                    "data": pending_config['config_data']
-                }
-            
-            return response
-            
-        finally:
-            await conn.close()
-            
+        response = await heartbeat_ingestor.submit(
+            device_id,
+            request.status,
+            uptime=request.uptime,
+            services=request.services,
+            metrics=request.metrics,
+            ip_address=request.ip_address
+        )
     except Exception as e:
         logger.error(f"Heartbeat processing failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    
+    if response is None:
+        raise HTTPException(status_code=404, detail="Device not found")
+    
+    return response
 
 
 @device_router.get("/{device_id}/config")
 async def get_device_config(device_id: UUID):
     """Get current active configuration for device"""
     try:
-        conn = await get_db_connection()
+        conn = await get_db_connection('fleet')
         try:
             config = await conn.fetchrow(
                 """
@@ -281,7 +238,7 @@ async def get_device_config(device_id: UUID):
 async def mark_config_applied(device_id: UUID, request: ConfigAppliedRequest):
     """Device notifies that configuration was applied"""
     try:
-        conn = await get_db_connection()
+        conn = await get_db_connection('fleet')
         try:
             await conn.execute(
                 """
@@ -292,6 +249,7 @@ async def mark_config_applied(device_id: UUID, request: ConfigAppliedRequest):
                 request.config_id,
                 device_id
             )
+            heartbeat_ingestor.config_applied(device_id, request.config_id)
             
             logger.info(f"Config {request.config_id} applied on device {device_id}")
             
@@ -309,7 +267,7 @@ async def mark_config_applied(device_id: UUID, request: ConfigAppliedRequest):
 async def submit_device_logs(device_id: UUID, request: DeviceLogRequest):
     """Device submits log entries"""
     try:
-        conn = await get_db_connection()
+        conn = await get_db_connection('fleet')
         try:
             await conn.execute(
                 """
@@ -337,7 +295,7 @@ async def submit_device_logs(device_id: UUID, request: DeviceLogRequest):
 async def submit_metrics(device_id: UUID, request: MetricsRequest):
     """Device submits batch metrics"""
     try:
-        conn = await get_db_connection()
+        conn = await get_db_connection('fleet')
         try:
             for metric in request.metrics:
                 await conn.execute(
@@ -361,6 +319,127 @@ async def submit_metrics(device_id: UUID, request: MetricsRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def decode_envelope(body: bytes, content_encoding: Optional[str] = None) -> Dict[str, Any]:
+    """Decode a (optionally gzip-compressed) telemetry envelope from an edge agent"""
+    if (content_encoding or "").lower() == "gzip":
+        # Bounded inflate so a small body cannot expand without limit
+        inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        try:
+            body = inflater.decompress(body, MAX_ENVELOPE_BYTES + 1)
+        except zlib.error:
+            raise HTTPException(status_code=400, detail="Invalid gzip body")
+        if len(body) > MAX_ENVELOPE_BYTES or inflater.unconsumed_tail:
+            raise HTTPException(status_code=413, detail="Envelope too large")
+    
+    try:
+        envelope = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON envelope")
+    
+    if (not isinstance(envelope, dict)
+            or not isinstance(envelope.get("metrics", []), list)
+            or not isinstance(envelope.get("logs", []), list)):
+        raise HTTPException(status_code=400, detail="Envelope must contain metrics and logs lists")
+    
+    return envelope
+
+
+def _envelope_timestamp(value: Any) -> datetime:
+    """Parse an agent timestamp; naive values are UTC, bad ones become now"""
+    try:
+        ts = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return datetime.now(timezone.utc)
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+def envelope_rows(device_id: UUID, envelope: Dict[str, Any]):
+    """
+    Split an envelope into device_metric_samples, device_metrics and
+    device_logs rows. As with heartbeats, metric types whose values are all
+    numeric become samples; anything else is kept as JSONB.
+    """
+    sample_rows = []
+    metric_rows = []
+    for m in envelope.get("metrics", []):
+        if not isinstance(m, dict):
+            continue
+        metric_type = str(m.get('metric_type') or 'unknown')[:50]
+        value = m.get('value', {})
+        timestamp = _envelope_timestamp(m.get('timestamp'))
+        samples, structured = flatten_metrics({metric_type: value})
+        sample_rows.extend((device_id, timestamp, name, number) for name, number in samples)
+        if structured:
+            metric_rows.append((device_id, metric_type, json.dumps(value), timestamp))
+    log_rows = [
+        (
+            device_id,
+            str(entry.get('log_level') or 'info')[:20],
+            entry.get('service_name'),
+            str(entry.get('message', '')),
+            json.dumps(entry.get('metadata') or {}),
+            _envelope_timestamp(entry.get('timestamp'))
+        )
+        for entry in envelope.get("logs", [])
+        if isinstance(entry, dict)
+    ]
+    return sample_rows, metric_rows, log_rows
+
+
+@device_router.post("/{device_id}/batch")
+async def submit_device_batch(device_id: UUID, request: Request):
+    """
+    Device submits a batch envelope of buffered logs and metrics.
+    
+    The edge agent seals logs and metric samples into gzip-compressed
+    envelopes (replaying any spooled while offline), so one request and
+    one transaction replace a request per log line and metric type.
+    """
+    envelope = decode_envelope(await request.body(), request.headers.get("content-encoding"))
+    sample_rows, metric_rows, log_rows = envelope_rows(device_id, envelope)
+    
+    try:
+        conn = await get_db_connection('fleet')
+        try:
+            async with conn.transaction():
+                if sample_rows:
+                    await conn.copy_records_to_table(
+                        'device_metric_samples', records=sample_rows, columns=SAMPLE_COLUMNS
+                    )
+                if metric_rows:
+                    await conn.executemany(
+                        """
+                        INSERT INTO device_metrics (device_id, metric_type, metric_value, timestamp)
+                        VALUES ($1, $2, $3::jsonb, $4)
+                        """,
+                        metric_rows
+                    )
+                if log_rows:
+                    await conn.executemany(
+                        """
+                        INSERT INTO device_logs (device_id, log_level, service_name, message, metadata, timestamp)
+                        VALUES ($1, $2, $3, $4, $5::jsonb, $6)
+                        """,
+                        log_rows
+                    )
+            
+            return {
+                "status": "stored",
+                "samples": len(sample_rows),
+                "metrics": len(metric_rows),
+                "logs": len(log_rows)
+            }
+            
+        finally:
+            await conn.close()
+            
+    except asyncpg.ForeignKeyViolationError:
+        raise HTTPException(status_code=404, detail="Device not found")
+    except Exception as e:
+        logger.error(f"Failed to store device batch: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 # ==================== Admin Endpoints ====================
 
 @admin_router.post("/devices/generate-token")
@@ -374,7 +453,7 @@ async def generate_registration_token(
     Admin endpoint to create pre-registered devices with tokens.
     """
     try:
-        conn = await get_db_connection()
+        conn = await get_db_connection('fleet')
         try:
             import secrets
             
@@ -435,7 +514,7 @@ async def list_devices(
 ):
     """List devices with filtering and pagination"""
     try:
-        conn = await get_db_connection()
+        conn = await get_db_connection('fleet')
         try:
             # Build query filters
             filters = []
@@ -525,7 +604,7 @@ async def get_device_detail(
 ):
     """Get detailed device information"""
     try:
-        conn = await get_db_connection()
+        conn = await get_db_connection('fleet')
         try:
             device = await conn.fetchrow(
                 """
@@ -553,12 +632,21 @@ async def get_device_detail(
                 device_id
             )
             
-            # Get recent metrics
+            # Get recent metrics (heartbeat samples and batch-submitted metrics)
             recent_metrics = await conn.fetch(
                 """
-                SELECT timestamp, metric_type, metric_value
-                FROM device_metrics
-                WHERE device_id = $1
+                (SELECT timestamp, metric_name AS metric_type,
+                        jsonb_build_object('value', value) AS metric_value
+                 FROM device_metric_samples
+                 WHERE device_id = $1
+                 ORDER BY timestamp DESC
+                 LIMIT 10)
+                UNION ALL
+                (SELECT timestamp, metric_type, metric_value
+                 FROM device_metrics
+                 WHERE device_id = $1
+                 ORDER BY timestamp DESC
+                 LIMIT 10)
                 ORDER BY timestamp DESC
                 LIMIT 10
                 """,
@@ -611,7 +699,7 @@ async def push_device_config(
 ):
     """Push new configuration to a device"""
     try:
-        conn = await get_db_connection()
+        conn = await get_db_connection('fleet')
         try:
             # Get current max version
             max_version = await conn.fetchval(
@@ -640,6 +728,8 @@ async def push_device_config(
                 UUID(current_user.get('sub'))
             )
             
+            heartbeat_ingestor.config_pushed(device_id, config_id, max_version + 1, request.config_data)
+            
             logger.info(f"Configuration v{max_version + 1} pushed to device {device_id}")
             
             return {
@@ -665,7 +755,7 @@ async def update_device(
 ):
     """Update device properties"""
     try:
-        conn = await get_db_connection()
+        conn = await get_db_connection('fleet')
         try:
             updates = []
             params = []
@@ -700,6 +790,7 @@ async def update_device(
                 """,
                 *params
             )
+            heartbeat_ingestor.device_updated(device_id, request.device_name, request.status)
             
             return {"status": "updated"}
             
@@ -720,7 +811,7 @@ async def delete_device(
 ):
     """Delete a device and all associated data"""
     try:
-        conn = await get_db_connection()
+        conn = await get_db_connection('fleet')
         try:
             result = await conn.execute(
                 "DELETE FROM edge_devices WHERE id = $1",
@@ -730,6 +821,13 @@ async def delete_device(
             if result == "DELETE 0":
                 raise HTTPException(status_code=404, detail="Device not found")
             
+            # Heartbeat samples carry no foreign key to cascade from
+            await conn.execute(
+                "DELETE FROM device_metric_samples WHERE device_id = $1",
+                device_id
+            )
+            heartbeat_ingestor.forget_device(device_id)
+            
             logger.info(f"Device deleted: {device_id}")
             
             return {"status": "deleted"}
@@ -754,7 +852,7 @@ async def get_device_logs(
 ):
     """Get device logs with filtering"""
     try:
-        conn = await get_db_connection()
+        conn = await get_db_connection('fleet')
         try:
             filters = ["device_id = $1"]
             params = [device_id]
@@ -811,7 +909,7 @@ async def get_device_statistics(
 ):
     """Get device statistics and health summary"""
     try:
-        conn = await get_db_connection()
+        conn = await get_db_connection('fleet')
         try:
             where_clause = "WHERE organization_id = $1" if organization_id else ""
             params = [organization_id] if organization_id else []
@@ -9,8 +9,6 @@ configuration management, and device lifecycle management.
 import secrets
 import hashlib
 import logging
-import os
-import asyncpg
 from datetime import datetime, timedelta
 from typing import Optional, List, Dict, Any
 from uuid import UUID, uuid4
@@ -18,7 +16,8 @@ from uuid import UUID, uuid4
 from fastapi import HTTPException
 from sqlalchemy import select, and_, or_, desc, func
 from sqlalchemy.ext.asyncio import AsyncSession
-from webhook_manager import WebhookManager
+from edge_heartbeat_ingest import heartbeat_ingestor
+from webhook_manager import webhook_manager
 
 logger = logging.getLogger(__name__)
 
@@ -142,22 +141,17 @@ class EdgeDeviceManager:
         
         # Trigger webhook for device.registered event
         try:
-            db_url = os.getenv("DATABASE_URL")
-            if db_url and db_url.startswith("postgresql://"):
-                pool = await asyncpg.create_pool(db_url)
-                webhook_manager = WebhookManager(pool)
-                await webhook_manager.trigger_event(
-                    org_id=str(device.organization_id),
-                    event='device.registered',
-                    data={
-                        'device_id': str(device.id),
-                        'device_name': device.device_name,
-                        'hardware_id': hardware_id,
-                        'firmware_version': firmware_version,
-                        'registered_at': datetime.utcnow().isoformat()
-                    }
-                )
-                await pool.close()
+            await webhook_manager.trigger_event(
+                event_type='device.registered',
+                organization_id=str(device.organization_id),
+                payload={
+                    'device_id': str(device.id),
+                    'device_name': device.device_name,
+                    'hardware_id': hardware_id,
+                    'firmware_version': firmware_version,
+                    'registered_at': datetime.utcnow().isoformat()
+                }
+            )
         except Exception as e:
             logger.warning(f"Webhook trigger failed for device.registered: {e}")
         
@@ -201,121 +195,24 @@ class EdgeDeviceManager:
             
         Returns:
             Response with pending config updates or commands
-        """
-        from database import EdgeDevice
         
-        result = await self.db.execute(
-            select(EdgeDevice).where(EdgeDevice.id == device_id)
+        Status, metrics and webhooks are handled by the heartbeat ingestor,
+        which answers from memory and writes heartbeats in batches.
+        """
+        response = await heartbeat_ingestor.submit(
+            device_id,
+            status,
+            uptime=uptime,
+            services=services,
+            metrics=metrics,
+            ip_address=ip_address
         )
-        device = result.scalar_one_or_none()
         
-        if not device:
+        if response is None:
             raise HTTPException(status_code=404, detail="Device not found")
         
-        # Update device status
-        old_status = device.status
-        device.status = status
-        device.last_seen = datetime.utcnow()
-        
-        # Trigger webhook if status changed to online/offline
-        if old_status != status and status in ['online', 'offline']:
-            try:
-                db_url = os.getenv("DATABASE_URL")
-                if db_url and db_url.startswith("postgresql://"):
-                    pool = await asyncpg.create_pool(db_url)
-                    webhook_manager = WebhookManager(pool)
-                    event_name = f'device.{status}'
-                    await webhook_manager.trigger_event(
-                        org_id=str(device.organization_id),
-                        event=event_name,
-                        data={
-                            'device_id': str(device.id),
-                            'device_name': device.device_name,
-                            'status': status,
-                            'previous_status': old_status,
-                            'timestamp': datetime.utcnow().isoformat()
-                        }
-                    )
-                    await pool.close()
-            except Exception as e:
-                logger.warning(f"Webhook trigger failed for {event_name}: {e}")
-        
-        if ip_address:
-            device.ip_address = ip_address
-        
-        if uptime or services:
-            device.metadata = device.metadata or {}
-            if uptime:
-                device.metadata["uptime"] = uptime
-            if services:
-                device.metadata["services"] = services
-        
-        # Store metrics if provided
-        if metrics:
-            await self._store_metrics(device_id, metrics)
-        
-        await self.db.commit()
-        
-        # Check for pending configuration updates
-        pending_config = await self._get_pending_config(device_id)
-        
-        response = {
-            "ack": True,
-            "timestamp": datetime.utcnow().isoformat(),
-            "next_heartbeat": 30
-        }
-        
-        if pending_config:
-            response["pending_config"] = pending_config
-        
         return response
     
-    async def _store_metrics(self, device_id: UUID, metrics: Dict[str, Any]):
-        """Store device metrics in time-series table"""
-        from database import DeviceMetric
-        
-        timestamp = datetime.utcnow()
-        
-        # Store each metric type separately
-        for metric_type, value in metrics.items():
-            metric = DeviceMetric(
-                device_id=device_id,
-                timestamp=timestamp,
-                metric_type=metric_type,
-                metric_value=value if isinstance(value, dict) else {"value": value}
-            )
-            self.db.add(metric)
-        
-        await self.db.commit()
-    
-    async def _get_pending_config(self, device_id: UUID) -> Optional[Dict[str, Any]]:
-        """Check if there's a pending configuration update for the device"""
-        from database import DeviceConfiguration
-        
-        result = await self.db.execute(
-            select(DeviceConfiguration)
-            .where(
-                and_(
-                    DeviceConfiguration.device_id == device_id,
-                    DeviceConfiguration.is_active == True,
-                    DeviceConfiguration.applied_at.is_(None)
-                )
-            )
-            .order_by(desc(DeviceConfiguration.created_at))
-            .limit(1)
-        )
-        
-        config = result.scalar_one_or_none()
-        
-        if config:
-            return {
-                "config_id": str(config.id),
-                "version": config.config_version,
-                "data": config.config_data
-            }
-        
-        return None
-    
     # ==================== Device Listing & Queries ====================
     
     async def list_devices(
@@ -534,6 +431,8 @@ class EdgeDeviceManager:
         await self.db.commit()
         await self.db.refresh(config)
         
+        heartbeat_ingestor.config_pushed(device_id, config.id, config.config_version, config_data)
+        
         logger.info(f"Configuration pushed to device {device_id}: version {config.config_version}")
         
         return {
@@ -561,6 +460,7 @@ class EdgeDeviceManager:
         if config:
             config.applied_at = datetime.utcnow()
             await self.db.commit()
+            heartbeat_ingestor.config_applied(device_id, config_id)
             logger.info(f"Configuration {config_id} marked as applied for device {device_id}")
     
     # ==================== Device Logs ====================
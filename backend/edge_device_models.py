@@ -111,6 +111,7 @@ class OTADeployment(Base):
     rollout_strategy = Column(String(50), default='manual', nullable=False)
     rollout_percentage = Column(Integer, default=100, nullable=False)
     status = Column(String(20), default='pending', nullable=False)
+    current_wave = Column(Integer, default=0, nullable=False)  # highest released rollout wave
     started_at = Column(DateTime(timezone=True), nullable=True)
     completed_at = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -131,6 +132,7 @@ class OTADeploymentDevice(Base):
     deployment_id = Column(UUID(as_uuid=True), ForeignKey('ota_deployments.id', ondelete='CASCADE'), primary_key=True)
     device_id = Column(UUID(as_uuid=True), ForeignKey('edge_devices.id', ondelete='CASCADE'), primary_key=True)
     status = Column(String(20), default='pending', nullable=False)
+    wave = Column(Integer, default=0, nullable=False)
     started_at = Column(DateTime(timezone=True), nullable=True)
     completed_at = Column(DateTime(timezone=True), nullable=True)
     error_message = Column(Text, nullable=True)
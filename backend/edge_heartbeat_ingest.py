@@ -0,0 +1,402 @@
+"""
+Edge Device Heartbeat Ingest
+Epic 7.1: Edge Device Management
+
+High-throughput path for device heartbeats. A heartbeat is answered from
+memory and buffered; a background flush writes everything received in the
+last window (EDGE_HEARTBEAT_FLUSH_SECONDS) with a fixed number of
+statements, whatever the number of devices:
+
+- Device status: heartbeats are coalesced per device (latest wins) and
+  applied with one UPDATE ... FROM unnest(...)
+- Metrics: numeric values (nested dicts flattened to "cpu.percent" style
+  names) are COPYed into the narrow device_metric_samples table; metric
+  types with non-numeric values still go to device_metrics as JSONB
+- Pending configuration: answered from an in-memory map of unapplied
+  configs per device, updated on push/apply and reloaded periodically so
+  other processes' pushes are picked up
+
+At 10k devices on 30s heartbeats that is ~330 heartbeats/s answered
+without a database round-trip, and a handful of statements per second.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from webhook_manager import webhook_manager
+
+logger = logging.getLogger(__name__)
+
+FLUSH_SECONDS = float(os.getenv('EDGE_HEARTBEAT_FLUSH_SECONDS', '1.0'))
+MAX_BUFFERED = int(os.getenv('EDGE_HEARTBEAT_MAX_BUFFERED', '20000'))
+REFRESH_SECONDS = float(os.getenv('EDGE_HEARTBEAT_REFRESH_SECONDS', '30'))
+HEARTBEAT_INTERVAL = 30
+
+SAMPLE_COLUMNS = ('device_id', 'timestamp', 'metric_name', 'value')
+
+
+def flatten_metrics(metrics: Dict[str, Any]) -> Tuple[List[Tuple[str, float]], Dict[str, Any]]:
+    """
+    Split heartbeat metrics into numeric samples and leftover structured values.
+
+    {"cpu": {"percent": 12.5}, "uptime": 9, "gpu": {"model": "x"}} gives
+    samples [("cpu.percent", 12.5), ("uptime", 9.0)] and leftovers
+    {"gpu": {"model": "x"}}; a metric type is only split into samples if
+    every leaf is numeric.
+    """
+    samples: List[Tuple[str, float]] = []
+    leftovers: Dict[str, Any] = {}
+    for metric_type, value in metrics.items():
+        leaves: List[Tuple[str, float]] = []
+        if _numeric_leaves(metric_type, value, leaves):
+            samples.extend(leaves)
+        else:
+            leftovers[metric_type] = value
+    return samples, leftovers
+
+
+def _numeric_leaves(prefix: str, value: Any, out: List[Tuple[str, float]]) -> bool:
+    if isinstance(value, bool):
+        out.append((prefix, float(value)))
+        return True
+    if isinstance(value, (int, float)):
+        out.append((prefix, float(value)))
+        return True
+    if isinstance(value, dict) and value:
+        return all(_numeric_leaves(f"{prefix}.{key}", v, out) for key, v in value.items())
+    return False
+
+
+def _json_value(value: Any) -> Any:
+    return json.loads(value) if isinstance(value, str) else value
+
+
+class HeartbeatIngestor:
+    """Buffers heartbeats and writes them in batches (see module docstring)"""
+
+    def __init__(self, flush_seconds: float = FLUSH_SECONDS, max_buffered: int = MAX_BUFFERED,
+                 refresh_seconds: float = REFRESH_SECONDS):
+        self.flush_seconds = flush_seconds
+        self.max_buffered = max_buffered
+        self.refresh_seconds = refresh_seconds
+        self.db_pool = None
+
+        # device id -> {"organization_id", "device_name", "status"}
+        self.devices: Dict[UUID, Dict[str, Any]] = {}
+        # device id -> latest unapplied active config
+        self.pending_configs: Dict[UUID, Dict[str, Any]] = {}
+
+        self._status: Dict[UUID, Tuple] = {}
+        self._samples: List[Tuple] = []
+        self._structured: List[Tuple] = []
+        self._flush_now = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._start_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._webhook_tasks: set = set()
+        self._refreshed_at = 0.0
+
+        # Statistics
+        self.heartbeats_received = 0
+        self.heartbeats_written = 0
+        self.samples_written = 0
+        self.flushes = 0
+        self.flush_errors = 0
+        self.last_flush_duration: Optional[float] = None
+
+    # ---------- lifecycle ----------
+
+    async def start(self, db_pool):
+        async with self._start_lock:
+            if self._task is not None:
+                return
+            self.db_pool = db_pool
+            await self.refresh()
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"Edge heartbeat ingest started (flush every {self.flush_seconds}s)")
+
+    async def ensure_started(self):
+        if self._task is None:
+            from db_manager import db_manager
+            await db_manager.start()
+            await self.start(db_manager.subsystem('fleet'))
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        await self.flush()
+        logger.info("Edge heartbeat ingest stopped")
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_now.wait(), self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_now.clear()
+            await self.flush()
+            if time.monotonic() - self._refreshed_at >= self.refresh_seconds:
+                try:
+                    await self.refresh()
+                except Exception as e:
+                    logger.error(f"Failed to refresh edge device state: {e}")
+
+    async def refresh(self):
+        """Reload known devices and pending configurations"""
+        async with self.db_pool.acquire() as conn:
+            devices = await conn.fetch(
+                "SELECT id, organization_id, device_name, status FROM edge_devices"
+            )
+            configs = await conn.fetch(
+                """
+                SELECT DISTINCT ON (device_id) device_id, id, config_version, config_data
+                FROM device_configurations
+                WHERE is_active = true AND applied_at IS NULL
+                ORDER BY device_id, created_at DESC
+                """
+            )
+
+        known = {}
+        for row in devices:
+            previous = self.devices.get(row['id'])
+            known[row['id']] = {
+                'organization_id': row['organization_id'],
+                'device_name': row['device_name'],
+                # A buffered heartbeat is newer than the database
+                'status': previous['status'] if previous and row['id'] in self._status else row['status'],
+            }
+        self.devices = known
+        self.pending_configs = {
+            row['device_id']: {
+                "config_id": str(row['id']),
+                "version": row['config_version'],
+                "data": _json_value(row['config_data'])
+            }
+            for row in configs
+        }
+        self._refreshed_at = time.monotonic()
+
+    # ---------- heartbeats ----------
+
+    async def _lookup_device(self, device_id: UUID) -> Optional[Dict[str, Any]]:
+        device = self.devices.get(device_id)
+        if device is None:
+            # Registered since the last refresh
+            async with self.db_pool.acquire() as conn:
+                row = await conn.fetchrow(
+                    "SELECT organization_id, device_name, status FROM edge_devices WHERE id = $1",
+                    device_id
+                )
+            if row is None:
+                return None
+            device = self.devices[device_id] = dict(row)
+        return device
+
+    async def submit(
+        self,
+        device_id: UUID,
+        status: str,
+        uptime: Optional[int] = None,
+        services: Optional[List[Dict[str, Any]]] = None,
+        metrics: Optional[Dict[str, Any]] = None,
+        ip_address: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Accept a heartbeat; returns the heartbeat response, or None if the
+        device is not registered.
+        """
+        await self.ensure_started()
+        device = await self._lookup_device(device_id)
+        if device is None:
+            return None
+
+        now = datetime.now(timezone.utc)
+        self.heartbeats_received += 1
+
+        previous_status = device['status']
+        device['status'] = status
+        if previous_status != status and status in ('online', 'offline'):
+            self._status_changed(device_id, device, previous_status, status, now)
+
+        queued = self._status.get(device_id)
+        self._status[device_id] = (
+            status,
+            now,
+            ip_address or (queued[2] if queued else None),
+            uptime or 0,
+            json.dumps(services) if services else (queued[4] if queued else None),
+        )
+
+        if metrics:
+            samples, structured = flatten_metrics(metrics)
+            self._samples.extend((device_id, now, name, value) for name, value in samples)
+            self._structured.extend(
+                (device_id, metric_type, json.dumps(value if isinstance(value, dict) else {"value": value}), now)
+                for metric_type, value in structured.items()
+            )
+
+        if len(self._status) + len(self._samples) >= self.max_buffered:
+            self._flush_now.set()
+
+        response = {
+            "ack": True,
+            "timestamp": now.replace(tzinfo=None).isoformat(),
+            "next_heartbeat": HEARTBEAT_INTERVAL
+        }
+        pending = self.pending_configs.get(device_id)
+        if pending:
+            response["pending_config"] = pending
+        return response
+
+    def _status_changed(self, device_id: UUID, device: Dict[str, Any], previous: str, status: str,
+                        now: datetime):
+        event_name = f'device.{status}'
+
+        async def trigger():
+            try:
+                await webhook_manager.trigger_event(
+                    event_name,
+                    device['organization_id'],
+                    {
+                        'device_id': str(device_id),
+                        'device_name': device['device_name'],
+                        'status': status,
+                        'previous_status': previous,
+                        'timestamp': now.replace(tzinfo=None).isoformat()
+                    }
+                )
+            except Exception as e:
+                logger.warning(f"Webhook trigger failed for {event_name}: {e}")
+
+        task = asyncio.create_task(trigger())
+        self._webhook_tasks.add(task)
+        task.add_done_callback(self._webhook_tasks.discard)
+
+    # ---------- configuration ----------
+
+    def config_pushed(self, device_id: UUID, config_id: Any, version: int, data: Any):
+        self.pending_configs[device_id] = {
+            "config_id": str(config_id),
+            "version": version,
+            "data": _json_value(data)
+        }
+
+    def config_applied(self, device_id: UUID, config_id: Any):
+        pending = self.pending_configs.get(device_id)
+        if pending and pending["config_id"] == str(config_id):
+            del self.pending_configs[device_id]
+
+    def device_updated(self, device_id: UUID, device_name: Optional[str] = None,
+                       status: Optional[str] = None):
+        device = self.devices.get(device_id)
+        if device is not None:
+            if device_name is not None:
+                device['device_name'] = device_name
+            if status is not None:
+                device['status'] = status
+
+    def forget_device(self, device_id: UUID):
+        self.devices.pop(device_id, None)
+        self.pending_configs.pop(device_id, None)
+        self._status.pop(device_id, None)
+
+    # ---------- writes ----------
+
+    async def flush(self):
+        """Write everything buffered so far"""
+        async with self._flush_lock:
+            if not (self._status or self._samples or self._structured):
+                return
+            status, self._status = self._status, {}
+            samples, self._samples = self._samples, []
+            structured, self._structured = self._structured, []
+
+            started = time.monotonic()
+            try:
+                await self._write(status, samples, structured)
+                self.flushes += 1
+                self.heartbeats_written += len(status)
+                self.samples_written += len(samples)
+            except Exception as e:
+                self.flush_errors += 1
+                logger.error(
+                    f"Failed to write {len(status)} heartbeats / {len(samples)} samples: {e}"
+                )
+                # Keep the newest status per device for the next attempt;
+                # metric samples are dropped rather than piling up
+                for device_id, values in status.items():
+                    self._status.setdefault(device_id, values)
+            self.last_flush_duration = time.monotonic() - started
+
+    async def _write(self, status: Dict[UUID, Tuple], samples: List[Tuple], structured: List[Tuple]):
+        async with self.db_pool.acquire() as conn:
+            async with conn.transaction():
+                if status:
+                    ids = list(status)
+                    rows = [status[device_id] for device_id in ids]
+                    await conn.execute(
+                        """
+                        UPDATE edge_devices d
+                        SET status = v.status,
+                            last_seen = v.last_seen,
+                            ip_address = COALESCE(v.ip_address::inet, d.ip_address),
+                            metadata = COALESCE(d.metadata, '{}'::jsonb)
+                                || jsonb_build_object('uptime', v.uptime)
+                                || CASE WHEN v.services IS NULL THEN '{}'::jsonb
+                                        ELSE jsonb_build_object('services', v.services::jsonb) END
+                        FROM unnest($1::uuid[], $2::text[], $3::timestamptz[], $4::text[], $5::bigint[], $6::text[])
+                            AS v(id, status, last_seen, ip_address, uptime, services)
+                        WHERE d.id = v.id
+                        """,
+                        ids,
+                        [r[0] for r in rows],
+                        [r[1] for r in rows],
+                        [r[2] for r in rows],
+                        [r[3] for r in rows],
+                        [r[4] for r in rows],
+                    )
+
+                if samples:
+                    await conn.copy_records_to_table(
+                        'device_metric_samples', records=samples, columns=SAMPLE_COLUMNS
+                    )
+
+                if structured:
+                    await conn.executemany(
+                        """
+                        INSERT INTO device_metrics (device_id, metric_type, metric_value, timestamp)
+                        VALUES ($1, $2, $3::jsonb, $4)
+                        """,
+                        structured
+                    )
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None,
+            "known_devices": len(self.devices),
+            "pending_configs": len(self.pending_configs),
+            "buffered_heartbeats": len(self._status),
+            "buffered_samples": len(self._samples),
+            "heartbeats_received": self.heartbeats_received,
+            "heartbeats_written": self.heartbeats_written,
+            "samples_written": self.samples_written,
+            "flushes": self.flushes,
+            "flush_errors": self.flush_errors,
+            "last_flush_duration_seconds": self.last_flush_duration,
+        }
+
+
+# Global instance
+heartbeat_ingestor = HeartbeatIngestor()
@@ -34,6 +34,7 @@ import asyncpg
 from email_service import email_service
 from keycloak_integration import get_user_by_id
 from audit_logger import audit_logger
+from db_manager import db_manager
 
 # Logging setup
 logger = logging.getLogger(__name__)
@@ -65,15 +66,8 @@ class EmailNotificationService:
             return
 
         try:
-            self.db_pool = await asyncpg.create_pool(
-                host=os.getenv("POSTGRES_HOST", "unicorn-postgresql"),
-                port=int(os.getenv("POSTGRES_PORT", 5432)),
-                user=os.getenv("POSTGRES_USER", "unicorn"),
-                password=os.getenv("POSTGRES_PASSWORD", "unicorn"),
-                database=os.getenv("POSTGRES_DB", "unicorn_db"),
-                min_size=2,
-                max_size=10
-            )
+            await db_manager.start()
+            self.db_pool = db_manager.subsystem('email')
             logger.info("EmailNotificationService initialized")
         except Exception as e:
             logger.error(f"Failed to initialize EmailNotificationService: {e}")
@@ -24,11 +24,11 @@ from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 from apscheduler.events import EVENT_JOB_EXECUTED, EVENT_JOB_ERROR
 import asyncpg
-import os
 
 from email_notifications import email_notification_service
 from credit_system import credit_manager
 from audit_logger import audit_logger
+from db_manager import db_manager
 
 # Logging setup
 logger = logging.getLogger(__name__)
@@ -58,15 +58,8 @@ class EmailScheduler:
 
         try:
             # Initialize database connection
-            self.db_pool = await asyncpg.create_pool(
-                host=os.getenv("POSTGRES_HOST", "unicorn-postgresql"),
-                port=int(os.getenv("POSTGRES_PORT", 5432)),
-                user=os.getenv("POSTGRES_USER", "unicorn"),
-                password=os.getenv("POSTGRES_PASSWORD", "unicorn"),
-                database=os.getenv("POSTGRES_DB", "unicorn_db"),
-                min_size=2,
-                max_size=10
-            )
+            await db_manager.start()
+            self.db_pool = db_manager.subsystem('email')
 
             # Initialize services
             await email_notification_service.initialize()
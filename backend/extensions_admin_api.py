@@ -6,7 +6,6 @@ Admin-only endpoints for managing add-ons, analytics, and promotional codes.
 Requires admin role verification through Keycloak session.
 """
 
-import os
 import asyncpg
 from typing import List, Optional, Dict, Any
 from fastapi import APIRouter, HTTPException, Request, Depends
@@ -15,6 +14,7 @@ from decimal import Decimal
 from datetime import datetime, timedelta
 import logging
 import json
+from db_manager import db_manager
 
 logger = logging.getLogger(__name__)
 
@@ -26,13 +26,7 @@ router = APIRouter(prefix="/api/v1/admin/extensions", tags=["extensions-admin"])
 
 async def get_db_connection():
     """Create asyncpg connection to PostgreSQL database"""
-    return await asyncpg.connect(
-        host=os.getenv("POSTGRES_HOST", "unicorn-postgresql"),
-        port=int(os.getenv("POSTGRES_PORT", "5432")),
-        user=os.getenv("POSTGRES_USER", "unicorn"),
-        password=os.getenv("POSTGRES_PASSWORD", "unicorn"),
-        database=os.getenv("POSTGRES_DB", "unicorn_db")
-    )
+    return await db_manager.connect('extensions')
 
 # ============================================================================
 # AUTHENTICATION & AUTHORIZATION
@@ -11,7 +11,6 @@ Endpoints:
 - POST /api/v1/cart/save-for-later - Save cart (Phase 2)
 """
 
-import os
 import asyncpg
 from typing import List, Optional
 from fastapi import APIRouter, HTTPException, Request, Depends, Query
@@ -19,6 +18,7 @@ from pydantic import BaseModel, Field
 from decimal import Decimal
 from datetime import datetime
 import logging
+from db_manager import db_manager
 
 logger = logging.getLogger(__name__)
 
@@ -32,13 +32,7 @@ router = APIRouter(prefix="/api/v1/cart", tags=["extensions-cart"])
 async def get_db_connection():
     """Get asyncpg database connection"""
     try:
-        return await asyncpg.connect(
-            host=os.getenv("POSTGRES_HOST", "unicorn-postgresql"),
-            port=int(os.getenv("POSTGRES_PORT", "5432")),
-            user=os.getenv("POSTGRES_USER", "unicorn"),
-            password=os.getenv("POSTGRES_PASSWORD", "unicorn"),
-            database=os.getenv("POSTGRES_DB", "unicorn_db")
-        )
+        return await db_manager.connect('extensions')
     except Exception as e:
         logger.error(f"Database connection failed: {e}")
         raise HTTPException(status_code=503, detail="Database connection failed")
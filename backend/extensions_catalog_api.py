@@ -3,7 +3,6 @@ Extensions Catalog API
 Browse and search marketplace extensions with filtering and categorization.
 """
 
-import os
 from typing import List, Optional
 from datetime import datetime
 from decimal import Decimal
@@ -11,6 +10,7 @@ from decimal import Decimal
 import asyncpg
 from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
+from db_manager import db_manager
 
 # Router configuration
 router = APIRouter(prefix="/api/v1/extensions", tags=["extensions-catalog"])
@@ -48,13 +48,7 @@ class CategoryResponse(BaseModel):
 
 async def get_db_connection():
     """Create database connection."""
-    return await asyncpg.connect(
-        host=os.getenv("POSTGRES_HOST", "unicorn-postgresql"),
-        port=int(os.getenv("POSTGRES_PORT", "5432")),
-        user=os.getenv("POSTGRES_USER", "unicorn"),
-        password=os.getenv("POSTGRES_PASSWORD", "unicorn"),
-        database=os.getenv("POSTGRES_DB", "unicorn_db")
-    )
+    return await db_manager.connect('extensions')
 
 
 # =============================================================================
@@ -4,7 +4,6 @@ Phase 1: Purchase and checkout endpoints with Stripe integration
 """
 
 import os
-import asyncpg
 import stripe
 from typing import List, Optional, Dict, Any
 from fastapi import APIRouter, HTTPException, Request, Header, Depends
@@ -13,6 +12,7 @@ from decimal import Decimal
 from datetime import datetime
 import logging
 import json
+from db_manager import db_manager
 
 logger = logging.getLogger(__name__)
 
@@ -23,19 +23,10 @@ stripe.api_key = os.getenv("STRIPE_SECRET_KEY", "sk_test_...")
 STRIPE_WEBHOOK_SECRET = os.getenv("STRIPE_WEBHOOK_SECRET", "whsec_...")
 STRIPE_PUBLISHABLE_KEY = os.getenv("STRIPE_PUBLISHABLE_KEY", "pk_test_...")
 
-# Database connection configuration
-DB_CONFIG = {
-    "host": os.getenv("POSTGRES_HOST", "unicorn-postgresql"),
-    "port": int(os.getenv("POSTGRES_PORT", "5432")),
-    "user": os.getenv("POSTGRES_USER", "unicorn"),
-    "password": os.getenv("POSTGRES_PASSWORD", "unicorn"),
-    "database": os.getenv("POSTGRES_DB", "unicorn_db")
-}
-
-
+# Database connection
 async def get_db_connection():
     """Create database connection"""
-    return await asyncpg.connect(**DB_CONFIG)
+    return await db_manager.connect('extensions')
 
 
 async def get_current_user(request: Request) -> str:
@@ -732,9 +723,8 @@ async def apply_promo_code(
 async def purchase_health_check():
     """Health check for purchase API"""
     try:
-        conn = await get_db_connection()
-        await conn.execute("SELECT 1")
-        await conn.close()
+        async with await get_db_connection() as conn:
+            await conn.execute("SELECT 1")
 
         return {
             "status": "healthy",
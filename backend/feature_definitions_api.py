@@ -3,13 +3,12 @@ Feature Definitions API
 Management endpoints for feature definitions and toggles.
 """
 
-import os
 from typing import List, Optional
 from datetime import datetime
 
-import asyncpg
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from pydantic import BaseModel, Field
+from db_manager import db_manager
 
 # Router configuration
 router = APIRouter(prefix="/api/v1/admin/features", tags=["admin", "features"])
@@ -142,13 +141,7 @@ class FeatureReorderRequest(BaseModel):
 
 async def get_db_connection():
     """Create database connection."""
-    return await asyncpg.connect(
-        host=os.getenv("POSTGRES_HOST", "unicorn-postgresql"),
-        port=int(os.getenv("POSTGRES_PORT", "5432")),
-        user=os.getenv("POSTGRES_USER", "unicorn"),
-        password=os.getenv("POSTGRES_PASSWORD", "unicorn"),
-        database=os.getenv("POSTGRES_DB", "unicorn_db")
-    )
+    return await db_manager.connect('default')
 
 
 # =============================================================================
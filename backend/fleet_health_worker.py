@@ -1,6 +1,7 @@
 """
 Epic 15: Multi-Server Management - Health Check Background Worker
-Runs every 30 seconds to check health of all active managed servers
+Checks every active managed server once per interval (default 30s),
+spread evenly across the interval by the fleet poll scheduler
 """
 
 import asyncio
@@ -9,6 +10,7 @@ from datetime import datetime
 from typing import Optional
 
 import asyncpg
+from fleet_poller import FleetPoller, HostState
 from multi_server_manager import MultiServerManager
 
 logger = logging.getLogger(__name__)
@@ -37,6 +39,14 @@ class FleetHealthWorker:
         self.checks_failed = 0
         self.last_run = None
         self.last_duration = None
+        
+        self.poller = FleetPoller(
+            "fleet-health",
+            interval,
+            poll=self._check_server_health,
+            flush=self._record_results,
+            load_targets=self._load_servers
+        )
     
     async def initialize(self):
         """Initialize the manager"""
@@ -50,153 +60,66 @@ class FleetHealthWorker:
             await self.manager.cleanup()
             self.manager = None
     
-    async def _check_server_health(
-        self,
-        server_id: str,
-        api_url: str,
-        api_token_hash: str,
-        organization_id: str
-    ) -> dict:
+    async def _load_servers(self):
+        """All active servers across all organizations"""
+        async with self.db_pool.acquire() as conn:
+            return await conn.fetch(
+                """
+                SELECT id, api_url, api_token_hash, organization_id, name
+                FROM managed_servers
+                WHERE status = 'active'
+                """
+            )
+    
+    async def _check_server_health(self, host: HostState, timeout: float) -> dict:
         """
         Check health of a single server
         
         Note: In production, you'd retrieve the actual API token from secure storage
         using the token_hash as a key. For now, we'll attempt to check if possible.
         """
-        try:
-            # TODO: Retrieve actual API token from secure storage using token_hash
-            # For now, we'll attempt a basic health check
-            
-            result = await self.manager._perform_health_check(
-                server_id=server_id,
-                api_url=api_url,
-                api_token="SECURE_TOKEN_PLACEHOLDER"  # Would come from secrets manager
-            )
-            
-            return {
-                "server_id": server_id,
-                "status": "success",
-                "health_status": result.get("status"),
-                "response_time_ms": result.get("response_time_ms")
-            }
-        
-        except Exception as e:
-            logger.error(f"Health check failed for server {server_id}: {e}")
-            return {
-                "server_id": server_id,
-                "status": "error",
-                "error": str(e)
-            }
+        # TODO: Retrieve actual API token from secure storage using token_hash
+        return await self.manager.fetch_health(
+            server_id=host.server_id,
+            api_url=host.api_url,
+            api_token="SECURE_TOKEN_PLACEHOLDER",  # Would come from secrets manager
+            timeout=timeout
+        )
     
-    async def _perform_health_checks(self):
-        """Perform health checks on all active servers across all organizations"""
+    async def _record_results(self, results: list):
+        """Write one tick's health checks in a single batch"""
         start_time = datetime.utcnow()
         
-        try:
-            # Get all active servers from all organizations
-            async with self.db_pool.acquire() as conn:
-                servers = await conn.fetch(
-                    """
-                    SELECT 
-                        id, 
-                        api_url, 
-                        api_token_hash,
-                        organization_id,
-                        name
-                    FROM managed_servers
-                    WHERE status = 'active'
-                    ORDER BY last_health_check_at ASC NULLS FIRST
-                    """
-                )
-            
-            server_count = len(servers)
-            
-            if server_count == 0:
-                logger.debug("No active servers to check")
-                return
-            
-            logger.info(f"Starting health checks for {server_count} servers")
-            
-            # Check servers in batches to avoid overwhelming the system
-            batch_size = 10
-            results = []
-            
-            for i in range(0, server_count, batch_size):
-                batch = servers[i:i + batch_size]
-                
-                # Run health checks concurrently within the batch
-                batch_tasks = [
-                    self._check_server_health(
-                        server['id'],
-                        server['api_url'],
-                        server['api_token_hash'],
-                        server['organization_id']
-                    )
-                    for server in batch
-                ]
-                
-                batch_results = await asyncio.gather(*batch_tasks, return_exceptions=True)
-                
-                for result in batch_results:
-                    if isinstance(result, Exception):
-                        logger.error(f"Health check exception: {result}")
-                        self.checks_failed += 1
-                    else:
-                        results.append(result)
-                        if result.get('status') == 'success':
-                            self.checks_successful += 1
-                        else:
-                            self.checks_failed += 1
-                
-                # Small delay between batches to avoid rate limiting
-                if i + batch_size < server_count:
-                    await asyncio.sleep(0.5)
-            
-            self.checks_performed += server_count
-            
-            # Calculate statistics
-            healthy = len([r for r in results if r.get('health_status') == 'healthy'])
-            degraded = len([r for r in results if r.get('health_status') == 'degraded'])
-            critical = len([r for r in results if r.get('health_status') == 'critical'])
-            unreachable = len([r for r in results if r.get('health_status') == 'unreachable'])
-            
-            duration = (datetime.utcnow() - start_time).total_seconds()
-            self.last_duration = duration
-            
-            logger.info(
-                f"Health checks complete: {server_count} servers checked in {duration:.2f}s "
-                f"(✓{healthy} 🔶{degraded} ⚠️{critical} ❌{unreachable})"
-            )
-            
-            # Alert on critical issues (integrate with Epic 13: Smart Alerts in future)
-            if critical > 0 or unreachable > 0:
-                logger.warning(
-                    f"Fleet health alert: {critical} critical, {unreachable} unreachable servers"
-                )
+        # Results from the poller's own timeout guard carry no health status
+        for result in results:
+            result.setdefault("timestamp", start_time)
+            result.setdefault("status", "unreachable")
+        
+        await self.manager.record_health_checks(results)
         
-        except Exception as e:
-            logger.error(f"Health check worker error: {e}", exc_info=True)
+        failed = [r for r in results if r.get("error")]
+        self.checks_performed += len(results)
+        self.checks_successful += len(results) - len(failed)
+        self.checks_failed += len(failed)
+        self.last_run = start_time
+        self.last_duration = (datetime.utcnow() - start_time).total_seconds()
+        
+        # Alert on critical issues (integrate with Epic 13: Smart Alerts in future)
+        critical = sum(1 for r in results if r.get("status") == "critical")
+        unreachable = sum(1 for r in results if r.get("status") == "unreachable")
+        if critical or unreachable:
+            logger.warning(
+                f"Fleet health alert: {critical} critical, {unreachable} unreachable servers"
+            )
     
     async def _worker_loop(self):
         """Main worker loop"""
         logger.info(f"🏥 Fleet health worker started (checking every {self.interval}s)")
         
-        while self.running:
-            try:
-                self.last_run = datetime.utcnow()
-                await self._perform_health_checks()
-                
-                # Wait for next interval
-                await asyncio.sleep(self.interval)
-            
-            except asyncio.CancelledError:
-                logger.info("Health worker received cancellation signal")
-                break
-            
-            except Exception as e:
-                logger.error(f"Health worker loop error: {e}", exc_info=True)
-                # Continue after error, wait a bit longer
-                await asyncio.sleep(self.interval * 2)
+        try:
+            await self.poller.run(lambda: self.running)
+        except asyncio.CancelledError:
+            logger.info("Health worker received cancellation signal")
         
         logger.info("🏥 Fleet health worker stopped")
     
@@ -226,6 +149,7 @@ class FleetHealthWorker:
                 pass
             self.task = None
         
+        await self.poller.cancel()
         await self.cleanup()
         logger.info("Fleet health worker stopped")
     
@@ -242,7 +166,8 @@ class FleetHealthWorker:
                 if self.checks_performed > 0 else 0
             ),
             "last_run": self.last_run.isoformat() if self.last_run else None,
-            "last_duration_seconds": self.last_duration
+            "last_duration_seconds": self.last_duration,
+            **self.poller.stats()
         }
 
 
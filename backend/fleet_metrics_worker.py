@@ -1,6 +1,7 @@
 """
 Epic 15: Multi-Server Management - Metrics Collection Background Worker
-Runs every 60 seconds to collect metrics from all active managed servers
+Collects metrics from every active managed server once per interval
+(default 60s), spread evenly across the interval by the fleet poll scheduler
 """
 
 import asyncio
@@ -9,6 +10,7 @@ from datetime import datetime
 from typing import Optional
 
 import asyncpg
+from fleet_poller import FleetPoller, HostState
 from multi_server_manager import MultiServerManager
 
 logger = logging.getLogger(__name__)
@@ -38,6 +40,15 @@ class FleetMetricsWorker:
         self.last_run = None
         self.last_duration = None
         self.total_metrics_collected = 0
+        self._partition_checked_at: Optional[datetime] = None
+        
+        self.poller = FleetPoller(
+            "fleet-metrics",
+            interval,
+            poll=self._collect_server_metrics,
+            flush=self._record_results,
+            load_targets=self._load_servers
+        )
     
     async def initialize(self):
         """Initialize the manager"""
@@ -51,141 +62,58 @@ class FleetMetricsWorker:
             await self.manager.cleanup()
             self.manager = None
     
-    async def _collect_server_metrics(
-        self,
-        server_id: str,
-        api_url: str,
-        api_token_hash: str,
-        server_name: str
-    ) -> dict:
+    async def _load_servers(self):
+        """All active servers; unhealthy ones are backed off by the poller"""
+        async with self.db_pool.acquire() as conn:
+            return await conn.fetch(
+                """
+                SELECT id, api_url, api_token_hash, organization_id, name
+                FROM managed_servers
+                WHERE status = 'active'
+                """
+            )
+    
+    async def _collect_server_metrics(self, host: HostState, timeout: float) -> dict:
         """
         Collect metrics from a single server
         
         Note: In production, retrieve actual API token from secure storage
         """
-        try:
-            # TODO: Retrieve actual API token from secure storage
-            result = await self.manager.collect_server_metrics(
-                server_id=server_id,
-                api_url=api_url,
-                api_token="SECURE_TOKEN_PLACEHOLDER"  # From secrets manager
-            )
-            
-            if result.get("status") == "success":
-                self.total_metrics_collected += 1
-                return {
-                    "server_id": server_id,
-                    "server_name": server_name,
-                    "status": "success"
-                }
-            else:
-                return {
-                    "server_id": server_id,
-                    "server_name": server_name,
-                    "status": "error",
-                    "error": result.get("error")
-                }
-        
-        except Exception as e:
-            logger.error(f"Metrics collection failed for server {server_name} ({server_id}): {e}")
-            return {
-                "server_id": server_id,
-                "server_name": server_name,
-                "status": "error",
-                "error": str(e)
-            }
+        # TODO: Retrieve actual API token from secure storage
+        return await self.manager.fetch_metrics(
+            server_id=host.server_id,
+            api_url=host.api_url,
+            api_token="SECURE_TOKEN_PLACEHOLDER",  # From secrets manager
+            timeout=timeout
+        )
     
-    async def _perform_metrics_collection(self):
-        """Collect metrics from all active servers across all organizations"""
+    async def _record_results(self, results: list):
+        """Write one tick's metrics in a single batch"""
         start_time = datetime.utcnow()
         
-        try:
-            # Get all active servers from all organizations
-            # Only collect from servers that are healthy or degraded (skip critical/unreachable)
-            async with self.db_pool.acquire() as conn:
-                servers = await conn.fetch(
-                    """
-                    SELECT 
-                        id, 
-                        api_url, 
-                        api_token_hash,
-                        organization_id,
-                        name,
-                        health_status
-                    FROM managed_servers
-                    WHERE status = 'active'
-                      AND health_status IN ('healthy', 'degraded')
-                    ORDER BY last_seen_at DESC NULLS LAST
-                    """
-                )
-            
-            server_count = len(servers)
-            
-            if server_count == 0:
-                logger.debug("No active healthy servers to collect metrics from")
-                return
-            
-            logger.info(f"Starting metrics collection for {server_count} servers")
-            
-            # Collect metrics in batches to manage load
-            batch_size = 5  # Smaller batches than health checks (metrics are heavier)
-            results = []
-            
-            for i in range(0, server_count, batch_size):
-                batch = servers[i:i + batch_size]
-                
-                # Run metrics collection concurrently within the batch
-                batch_tasks = [
-                    self._collect_server_metrics(
-                        server['id'],
-                        server['api_url'],
-                        server['api_token_hash'],
-                        server['name']
-                    )
-                    for server in batch
-                ]
-                
-                batch_results = await asyncio.gather(*batch_tasks, return_exceptions=True)
-                
-                for result in batch_results:
-                    if isinstance(result, Exception):
-                        logger.error(f"Metrics collection exception: {result}")
-                        self.collections_failed += 1
-                    else:
-                        results.append(result)
-                        if result.get('status') == 'success':
-                            self.collections_successful += 1
-                        else:
-                            self.collections_failed += 1
-                
-                # Delay between batches to avoid overwhelming servers
-                if i + batch_size < server_count:
-                    await asyncio.sleep(1.0)
-            
-            self.collections_performed += server_count
-            
-            # Calculate statistics
-            successful = len([r for r in results if r.get('status') == 'success'])
-            failed = len([r for r in results if r.get('status') == 'error'])
-            
-            duration = (datetime.utcnow() - start_time).total_seconds()
-            self.last_duration = duration
-            
-            logger.info(
-                f"Metrics collection complete: {server_count} servers in {duration:.2f}s "
-                f"(✓{successful} ❌{failed})"
-            )
-            
-            # Log failed collections for investigation
-            if failed > 0:
-                failed_servers = [r['server_name'] for r in results if r.get('status') == 'error']
-                logger.warning(f"Failed to collect metrics from: {', '.join(failed_servers[:5])}")
-            
-            # Check for partition health (ensure current month partition exists)
-            await self._check_partition_health()
+        await self.manager.record_metrics(results)
         
-        except Exception as e:
-            logger.error(f"Metrics collection worker error: {e}", exc_info=True)
+        failed = [r for r in results if r.get("error")]
+        self.collections_performed += len(results)
+        self.collections_successful += len(results) - len(failed)
+        self.collections_failed += len(failed)
+        self.total_metrics_collected += len(results) - len(failed)
+        self.last_run = start_time
+        self.last_duration = (datetime.utcnow() - start_time).total_seconds()
+        
+        if failed:
+            names = [
+                self.poller.hosts[r["server_id"]].name
+                for r in failed if r["server_id"] in self.poller.hosts
+            ]
+            logger.warning(f"Failed to collect metrics from: {', '.join(names[:5])}")
+        
+        # Check for partition health (ensure current month partition exists)
+        if self._partition_checked_at is None or (
+            start_time - self._partition_checked_at
+        ).total_seconds() >= self.interval:
+            self._partition_checked_at = start_time
+            await self._check_partition_health()
     
     async def _check_partition_health(self):
         """Check if current month partition exists, log warning if not"""
@@ -217,22 +145,10 @@ class FleetMetricsWorker:
         """Main worker loop"""
         logger.info(f"📊 Fleet metrics worker started (collecting every {self.interval}s)")
         
-        while self.running:
-            try:
-                self.last_run = datetime.utcnow()
-                await self._perform_metrics_collection()
-                
-                # Wait for next interval
-                await asyncio.sleep(self.interval)
-            
-            except asyncio.CancelledError:
-                logger.info("Metrics worker received cancellation signal")
-                break
-            
-            except Exception as e:
-                logger.error(f"Metrics worker loop error: {e}", exc_info=True)
-                # Continue after error, wait a bit longer
-                await asyncio.sleep(self.interval * 2)
+        try:
+            await self.poller.run(lambda: self.running)
+        except asyncio.CancelledError:
+            logger.info("Metrics worker received cancellation signal")
         
         logger.info("📊 Fleet metrics worker stopped")
     
@@ -262,6 +178,7 @@ class FleetMetricsWorker:
                 pass
             self.task = None
         
+        await self.poller.cancel()
         await self.cleanup()
         logger.info("Fleet metrics worker stopped")
     
@@ -279,7 +196,8 @@ class FleetMetricsWorker:
             ),
             "total_metrics_collected": self.total_metrics_collected,
             "last_run": self.last_run.isoformat() if self.last_run else None,
-            "last_duration_seconds": self.last_duration
+            "last_duration_seconds": self.last_duration,
+            **self.poller.stats()
         }
 
 
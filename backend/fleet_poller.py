@@ -0,0 +1,283 @@
+"""
+Epic 15: Multi-Server Management - Fleet Poll Scheduler
+
+Shared scheduler behind the fleet health and metrics workers. Instead of
+walking the whole fleet in fixed batches every interval, each server gets
+its own slot in the interval (a stable phase derived from its id), so
+polls are spread evenly over time like a timer wheel:
+
+- A tick (default 1s) starts every server whose slot is due, bounded by a
+  global concurrency limit
+- Per-host adaptive timeouts: a smoothed response time sets the timeout,
+  and consecutive failures stretch it up to max_timeout
+- Failing hosts back off exponentially (interval x 2^(failures-1), capped)
+  instead of being skipped by health status
+- Results collected during a tick are handed to one flush() call, so the
+  database sees one batched write per tick regardless of fleet size
+"""
+
+import asyncio
+import hashlib
+import heapq
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+FLEET_POLL_CONCURRENCY = int(os.getenv('FLEET_POLL_CONCURRENCY', '50'))
+FLEET_POLL_MIN_TIMEOUT = float(os.getenv('FLEET_POLL_MIN_TIMEOUT', '2'))
+FLEET_POLL_MAX_TIMEOUT = float(os.getenv('FLEET_POLL_MAX_TIMEOUT', '30'))
+FLEET_POLL_MAX_BACKOFF = int(os.getenv('FLEET_POLL_MAX_BACKOFF', '16'))
+
+RTT_SMOOTHING = 0.3  # weight of the newest sample in the response time EWMA
+TIMEOUT_RTT_MULTIPLIER = 4
+
+
+def slot_phase(server_id: Any, interval: float) -> float:
+    """Stable offset of a server inside the interval"""
+    digest = hashlib.blake2b(str(server_id).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') / 2 ** 64 * interval
+
+
+@dataclass
+class HostState:
+    """Scheduling state of one polled server"""
+    server_id: Any
+    name: str
+    api_url: str
+    phase: float
+    next_due: float
+    row: Any = None
+    rtt_ewma: Optional[float] = None
+    failures: int = 0
+    in_flight: bool = False
+    polls: int = 0
+    errors: int = 0
+    last_error: Optional[str] = None
+
+    def timeout(self, min_timeout: float, max_timeout: float) -> float:
+        if self.rtt_ewma is None:
+            base = max_timeout
+        else:
+            base = max(min_timeout, self.rtt_ewma * TIMEOUT_RTT_MULTIPLIER)
+        return min(max_timeout, base * 2 ** self.failures)
+
+    def succeeded(self, rtt: float):
+        self.rtt_ewma = rtt if self.rtt_ewma is None else (
+            RTT_SMOOTHING * rtt + (1 - RTT_SMOOTHING) * self.rtt_ewma
+        )
+        self.failures = 0
+        self.last_error = None
+
+    def failed(self, error: str):
+        self.failures += 1
+        self.errors += 1
+        self.last_error = error
+
+    def backoff_factor(self, max_backoff: int) -> int:
+        return min(2 ** (self.failures - 1), max_backoff) if self.failures else 1
+
+
+PollFunc = Callable[[HostState, float], Awaitable[Dict[str, Any]]]
+FlushFunc = Callable[[List[Dict[str, Any]]], Awaitable[None]]
+LoadFunc = Callable[[], Awaitable[Iterable[Any]]]
+
+
+class FleetPoller:
+    """
+    Per-server scheduled polling with batched result writes.
+
+    poll(host, timeout) returns a result dict; a result with an "error"
+    key counts as a failure for backoff. load_targets() returns rows with
+    id, name and api_url and is re-read every refresh_interval.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        interval: float,
+        poll: PollFunc,
+        flush: FlushFunc,
+        load_targets: LoadFunc,
+        concurrency: int = FLEET_POLL_CONCURRENCY,
+        tick: float = 1.0,
+        min_timeout: float = FLEET_POLL_MIN_TIMEOUT,
+        max_timeout: float = FLEET_POLL_MAX_TIMEOUT,
+        max_backoff: int = FLEET_POLL_MAX_BACKOFF,
+        refresh_interval: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.name = name
+        self.interval = interval
+        self.poll = poll
+        self.flush = flush
+        self.load_targets = load_targets
+        self.tick_seconds = tick
+        self.min_timeout = min_timeout
+        self.max_timeout = min(max_timeout, interval)
+        self.max_backoff = max_backoff
+        self.refresh_interval = refresh_interval or interval
+        self.clock = clock
+
+        self.hosts: Dict[Any, HostState] = {}
+        self._due: List[Tuple[float, str, Any]] = []  # (next_due, str(id), id)
+        self._results: List[Dict[str, Any]] = []
+        self._tasks: set = set()
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._refreshed_at: Optional[float] = None
+
+        # Statistics
+        self.polls_started = 0
+        self.polls_succeeded = 0
+        self.polls_failed = 0
+        self.flushes = 0
+        self.flush_errors = 0
+        self.last_flush_at: Optional[float] = None
+        self.last_flush_size = 0
+        self.last_flush_duration: Optional[float] = None
+
+    # ---------- targets ----------
+
+    async def refresh(self):
+        """Re-read the server list; new servers are slotted, removed ones dropped"""
+        rows = await self.load_targets()
+        now = self.clock()
+        seen = set()
+        for row in rows:
+            server_id = row['id']
+            seen.add(server_id)
+            host = self.hosts.get(server_id)
+            if host is None:
+                phase = slot_phase(server_id, self.interval)
+                host = HostState(
+                    server_id=server_id,
+                    name=row['name'],
+                    api_url=row['api_url'],
+                    phase=phase,
+                    next_due=now + (phase - now) % self.interval,
+                    row=row,
+                )
+                self.hosts[server_id] = host
+                heapq.heappush(self._due, (host.next_due, str(server_id), server_id))
+            else:
+                host.name = row['name']
+                host.api_url = row['api_url']
+                host.row = row
+
+        for server_id in [s for s in self.hosts if s not in seen]:
+            del self.hosts[server_id]  # its heap entry is skipped when popped
+        self._refreshed_at = now
+
+    # ---------- scheduling ----------
+
+    async def tick(self) -> int:
+        """Start every due poll and flush finished results; returns polls started"""
+        now = self.clock()
+        if self._refreshed_at is None or now - self._refreshed_at >= self.refresh_interval:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"{self.name}: failed to load servers: {e}")
+
+        started = 0
+        while self._due and self._due[0][0] <= now:
+            due, _, server_id = heapq.heappop(self._due)
+            host = self.hosts.get(server_id)
+            if host is None or host.next_due != due:
+                continue  # removed or rescheduled
+            if host.in_flight:
+                # Previous poll still running (slow host); take the next slot
+                self._schedule(host, due + self.interval)
+                continue
+            host.in_flight = True
+            task = asyncio.create_task(self._run_poll(host, due))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            started += 1
+
+        await self._flush()
+        return started
+
+    def _schedule(self, host: HostState, due: float):
+        host.next_due = due
+        heapq.heappush(self._due, (due, str(host.server_id), host.server_id))
+
+    async def _run_poll(self, host: HostState, due: float):
+        timeout = host.timeout(self.min_timeout, self.max_timeout)
+        try:
+            async with self._semaphore:
+                self.polls_started += 1
+                host.polls += 1
+                started = self.clock()
+                try:
+                    result = await asyncio.wait_for(self.poll(host, timeout), timeout + 1)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    result = {'server_id': host.server_id, 'error': str(e) or type(e).__name__}
+                rtt = self.clock() - started
+
+            if result.get('error'):
+                host.failed(result['error'])
+                self.polls_failed += 1
+            else:
+                host.succeeded(rtt)
+                self.polls_succeeded += 1
+            self._results.append(result)
+        finally:
+            host.in_flight = False
+            if self.hosts.get(host.server_id) is host:
+                # Keep the slot's phase: next due is a whole number of intervals later
+                self._schedule(host, due + self.interval * host.backoff_factor(self.max_backoff))
+
+    async def _flush(self):
+        if not self._results:
+            return
+        results, self._results = self._results, []
+        started = self.clock()
+        try:
+            await self.flush(results)
+            self.flushes += 1
+        except Exception as e:
+            self.flush_errors += 1
+            logger.error(f"{self.name}: failed to write {len(results)} results: {e}")
+        self.last_flush_at = self.clock()
+        self.last_flush_size = len(results)
+        self.last_flush_duration = self.last_flush_at - started
+
+    async def run(self, running: Callable[[], bool]):
+        """Tick until running() is false"""
+        while running():
+            try:
+                await self.tick()
+            except Exception as e:
+                logger.error(f"{self.name}: tick failed: {e}", exc_info=True)
+            await asyncio.sleep(self.tick_seconds)
+
+    async def drain(self):
+        """Wait for in-flight polls and write their results"""
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+        await self._flush()
+
+    async def cancel(self):
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "servers_scheduled": len(self.hosts),
+            "in_flight": sum(1 for h in self.hosts.values() if h.in_flight),
+            "backing_off": sum(1 for h in self.hosts.values() if h.failures > 1),
+            "polls_started": self.polls_started,
+            "polls_succeeded": self.polls_succeeded,
+            "polls_failed": self.polls_failed,
+            "flushes": self.flushes,
+            "flush_errors": self.flush_errors,
+            "last_flush_size": self.last_flush_size,
+        }
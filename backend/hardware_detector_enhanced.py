@@ -8,6 +8,8 @@ import os
 import json
 import platform
 import psutil
+
+from host_telemetry import host_telemetry
 from typing import Dict, Any, Optional, List
 from dataclasses import dataclass, asdict
 
@@ -77,14 +79,15 @@ class EnhancedHardwareDetector:
     
     def _detect_cpu(self) -> Dict[str, Any]:
         """Enhanced CPU detection"""
+        telemetry = host_telemetry.latest()
         cpu_info = {
             "physical_cores": psutil.cpu_count(logical=False),
             "logical_cores": psutil.cpu_count(logical=True),
             "max_frequency": psutil.cpu_freq().max if psutil.cpu_freq() else 0,
             "min_frequency": psutil.cpu_freq().min if psutil.cpu_freq() else 0,
             "current_frequency": psutil.cpu_freq().current if psutil.cpu_freq() else 0,
-            "cpu_usage": psutil.cpu_percent(interval=1),
-            "per_cpu_usage": psutil.cpu_percent(interval=1, percpu=True)
+            "cpu_usage": telemetry.cpu_percent,
+            "per_cpu_usage": telemetry.per_cpu
         }
         
         # Get detailed CPU info from /proc/cpuinfo
@@ -11,8 +11,9 @@ from typing import Dict, Any, List
 from fastapi import APIRouter, HTTPException, status
 import asyncpg
 import redis.asyncio as aioredis
-import docker
-import psutil
+
+from docker_engine import docker_state
+from host_telemetry import host_telemetry
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/v1/health", tags=["Health"])
@@ -24,11 +25,6 @@ class HealthChecker:
     def __init__(self, db_pool: asyncpg.Pool = None, redis_client: aioredis.Redis = None):
         self.db_pool = db_pool
         self.redis_client = redis_client
-        self.docker_client = None
-        try:
-            self.docker_client = docker.from_env()
-        except:
-            logger.warning("Docker client not available for health checks")
     
     async def check_postgres(self) -> Dict[str, Any]:
         """Check PostgreSQL health"""
@@ -82,7 +78,7 @@ class HealthChecker:
     async def check_docker_services(self) -> Dict[str, Any]:
         """Check Docker services health"""
         try:
-            if not self.docker_client:
+            if not await docker_state.ensure_started():
                 return {"status": "unknown", "message": "Docker not available"}
             
             services = {}
@@ -94,26 +90,20 @@ class HealthChecker:
             
             all_healthy = True
             for service_name in critical_services:
-                try:
-                    container = self.docker_client.containers.get(service_name)
-                    is_running = container.status == "running"
-                    
-                    # Check container health if available
-                    health_status = "unknown"
-                    if "Health" in container.attrs.get("State", {}):
-                        health_status = container.attrs["State"]["Health"]["Status"]
-                    
-                    services[service_name] = {
-                        "status": "healthy" if is_running else "unhealthy",
-                        "running": is_running,
-                        "health": health_status
-                    }
-                    
-                    if not is_running:
-                        all_healthy = False
-                except docker.errors.NotFound:
+                container = docker_state.get(service_name)
+                if container is None:
                     services[service_name] = {"status": "not_found"}
                     all_healthy = False
+                    continue
+                
+                services[service_name] = {
+                    "status": "healthy" if container.running else "unhealthy",
+                    "running": container.running,
+                    "health": container.health or "unknown"
+                }
+                
+                if not container.running:
+                    all_healthy = False
             
             return {
                 "status": "healthy" if all_healthy else "degraded",
@@ -126,9 +116,10 @@ class HealthChecker:
     async def check_system_resources(self) -> Dict[str, Any]:
         """Check system resource utilization"""
         try:
-            cpu_percent = psutil.cpu_percent(interval=1)
-            memory = psutil.virtual_memory()
-            disk = psutil.disk_usage('/')
+            sample = host_telemetry.latest()
+            cpu_percent = sample.cpu_percent
+            memory = sample.memory
+            disk = sample.disk
             
             # Determine health based on thresholds
             status = "healthy"
@@ -369,9 +360,49 @@ async def health_metrics():
     metrics.append(f"system_memory_percent {system.get('memory_percent', 0)}")
     metrics.append(f"system_disk_percent {system.get('disk_percent', 0)}")
     
+    # Background job metrics (all processes, from the job leases)
+    from job_runner import job_runner
+    for lease in (await job_runner.snapshot())["leases"]:
+        label = '{job="%s"}' % lease['name']
+        metrics.append(f"job_runs_total{label} {lease['runs']}")
+        metrics.append(f"job_failures_total{label} {lease['failures']}")
+        metrics.append(f"job_running{label} {int(bool(lease['running']))}")
+        if lease.get('last_duration_ms') is not None:
+            metrics.append(f"job_last_duration_ms{label} {lease['last_duration_ms']}")
+    
+    # API router imports of this worker (router_registry.py)
+    from router_registry import router_registry
+    for entry in router_registry.get_stats()["routers"]:
+        label = '{router="%s"}' % entry['name']
+        metrics.append(f"router_loaded{label} {int(entry['state'] == 'loaded')}")
+        if entry['import_seconds'] is not None:
+            metrics.append(f"router_import_seconds{label} {entry['import_seconds']}")
+    
     return "\n".join(metrics) + "\n"
 
 
+@router.get("/jobs")
+async def jobs_health():
+    """
+    Background job status
+    Leases, run counts and last durations of every job across all processes,
+    plus the statistics of the jobs run by this process
+    """
+    from job_runner import job_runner
+    return await job_runner.snapshot()
+
+
+@router.get("/routers")
+async def routers_health():
+    """
+    API router load status
+    Which routers this worker has imported, when, and the import time and
+    RSS growth of each; pending routers load on their first request
+    """
+    from router_registry import router_registry
+    return router_registry.get_stats()
+
+
 @router.get("/services")
 async def services_health():
     """
@@ -7,11 +7,13 @@ Calculates overall system health (0-100) based on weighted components.
 
 from typing import Dict, Tuple, Optional
 from datetime import datetime
-import psutil
 import docker
 import logging
 import subprocess
 
+from docker_engine import docker_state
+from host_telemetry import host_telemetry
+
 logger = logging.getLogger(__name__)
 
 
@@ -150,8 +152,9 @@ class HealthScoreCalculator:
             Tuple of (score, details)
         """
         try:
-            cpu_percent = psutil.cpu_percent(interval=0.5)
-            cpu_count = psutil.cpu_count()
+            sample = host_telemetry.latest()
+            cpu_percent = sample.cpu_percent
+            cpu_count = sample.cpu_count
 
             # Base score: 100 when idle, 0 when maxed
             if cpu_percent < self.CPU_WARNING:
@@ -167,9 +170,8 @@ class HealthScoreCalculator:
 
             # Adjust for load average if available
             load_penalty = 0
-            load_avg = None
-            if hasattr(psutil, 'getloadavg'):
-                load_avg = psutil.getloadavg()
+            load_avg = sample.load_avg
+            if load_avg:
                 # Load average > CPU count is concerning
                 if load_avg[0] > cpu_count:
                     load_penalty = min(20, (load_avg[0] - cpu_count) * 5)
@@ -203,8 +205,9 @@ class HealthScoreCalculator:
             Tuple of (score, details)
         """
         try:
-            mem = psutil.virtual_memory()
-            swap = psutil.swap_memory()
+            sample = host_telemetry.latest()
+            mem = sample.memory
+            swap = sample.swap
 
             # Base score from memory usage
             mem_percent = mem.percent
@@ -254,7 +257,7 @@ class HealthScoreCalculator:
             Tuple of (score, details)
         """
         try:
-            disk = psutil.disk_usage('/')
+            disk = host_telemetry.latest().disk
             disk_percent = disk.percent
 
             # Base score from disk usage
@@ -299,8 +302,15 @@ class HealthScoreCalculator:
             Tuple of (score, details)
         """
         try:
-            client = docker.from_env()
-            containers = client.containers.list(all=True)
+            if docker_state.ready:
+                # Shared state cache (kept current from Docker events)
+                containers = [(c.status, c.health) for c in docker_state.containers(all=True)]
+            else:
+                client = docker.from_env()
+                containers = [
+                    (c.status, c.attrs.get('State', {}).get('Health', {}).get('Status'))
+                    for c in client.containers.list(all=True)
+                ]
 
             if not containers:
                 return 100, {"containers": 0, "message": "No containers to monitor"}
@@ -310,13 +320,11 @@ class HealthScoreCalculator:
             unhealthy = 0
             stopped = 0
 
-            for container in containers:
-                status = container.status
+            for status, health in containers:
                 if status == 'running':
                     running += 1
 
                     # Check health if available
-                    health = container.attrs.get('State', {}).get('Health', {}).get('Status')
                     if health == 'healthy':
                         healthy += 1
                     elif health == 'unhealthy':
@@ -368,7 +376,7 @@ class HealthScoreCalculator:
             Tuple of (score, details)
         """
         try:
-            net_io = psutil.net_io_counters()
+            net_io = host_telemetry.latest().net_io
 
             # Base score starts at 100
             base_score = 100
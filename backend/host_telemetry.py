@@ -0,0 +1,237 @@
+"""
+Host Telemetry Sampler
+
+A single background thread samples CPU, per-core, memory, disk, network
+and temperature readings at a fixed rate and keeps them in a ring buffer.
+API handlers, the alert manager and the metrics collector read the latest
+sample instead of calling psutil themselves, so no request ever waits on
+`psutil.cpu_percent(interval=...)`.
+
+CPU percentages are taken with `interval=None`, i.e. relative to the
+previous sample, so the sampler never sleeps inside psutil either.
+
+Usage:
+    from host_telemetry import host_telemetry
+
+    sample = host_telemetry.latest()
+    sample.cpu_percent, sample.memory.percent, sample.net_recv_bps
+"""
+
+import os
+import time
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TelemetrySample:
+    """One host telemetry reading; psutil structures are kept as-is"""
+    timestamp: float
+    cpu_percent: float
+    per_cpu: List[float]
+    cpu_count: int
+    load_avg: Optional[Tuple[float, float, float]]
+    memory: Any
+    swap: Any
+    disk: Any
+    disk_io: Any
+    net_io: Any
+    net_io_pernic: Dict[str, Any] = field(default_factory=dict)
+    temperatures: Dict[str, List[Any]] = field(default_factory=dict)
+    temperatures_at: Optional[float] = None
+    # Rates derived from the previous sample (0 for the first one)
+    disk_read_bps: float = 0.0
+    disk_write_bps: float = 0.0
+    net_sent_bps: float = 0.0
+    net_recv_bps: float = 0.0
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.timestamp
+
+
+def _rate(current: Optional[int], previous: Optional[int], elapsed: float) -> float:
+    if current is None or previous is None or elapsed <= 0 or current < previous:
+        return 0.0
+    return (current - previous) / elapsed
+
+
+class HostTelemetrySampler:
+    """
+    Background host sampler with a fixed-size ring buffer.
+
+    There is one writer (the sampler thread). It fills a slot and then
+    advances the write counter, so readers only ever see complete samples
+    and never take a lock.
+    """
+
+    def __init__(
+        self,
+        interval: float = 2.0,
+        history_size: int = 900,
+        temperature_every: int = 5,
+        disk_path: str = "/",
+    ):
+        self.interval = interval
+        self.history_size = history_size
+        self.temperature_every = max(1, temperature_every)
+        self.disk_path = disk_path
+
+        self._ring: List[Optional[TelemetrySample]] = [None] * history_size
+        self._written = 0
+
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._start_lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start the sampler thread (idempotent)"""
+        with self._start_lock:
+            if self.running:
+                return
+            # Prime psutil's CPU counters so the first sample has a baseline
+            psutil.cpu_percent(interval=None)
+            psutil.cpu_percent(interval=None, percpu=True)
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="host-telemetry", daemon=True
+            )
+            self._thread.start()
+            logger.info(f"Host telemetry sampler started ({self.interval}s interval)")
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        # First reading shortly after priming, then on the regular cadence
+        self._stop.wait(min(self.interval, 0.25))
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                self._record(self.sample())
+            except Exception as e:
+                logger.error(f"Host telemetry sample failed: {e}")
+            self._stop.wait(max(0.0, self.interval - (time.monotonic() - started)))
+
+    # ------------------------------------------------------------------
+    # Readers (never block)
+    # ------------------------------------------------------------------
+
+    def latest(self) -> TelemetrySample:
+        """
+        Most recent sample.
+
+        Starts the sampler on first use; until the thread has produced a
+        reading, one is taken inline (non-blocking, but CPU% covers only
+        the time since priming).
+        """
+        written = self._written
+        if written:
+            return self._ring[(written - 1) % self.history_size]
+        self.start()
+        sample = self.sample()
+        if not self._written:
+            self._record(sample)
+        return sample
+
+    def history(self, seconds: Optional[float] = None) -> List[TelemetrySample]:
+        """Samples in the ring buffer, oldest first"""
+        written = self._written
+        count = min(written, self.history_size)
+        samples = [self._ring[i % self.history_size] for i in range(written - count, written)]
+        if seconds is not None:
+            cutoff = time.time() - seconds
+            samples = [s for s in samples if s.timestamp >= cutoff]
+        return samples
+
+    def status(self) -> Dict[str, Any]:
+        latest = self._ring[(self._written - 1) % self.history_size] if self._written else None
+        return {
+            "running": self.running,
+            "interval": self.interval,
+            "samples": min(self._written, self.history_size),
+            "last_sample_age": round(latest.age, 3) if latest else None,
+        }
+
+    # ------------------------------------------------------------------
+    # Sampling
+    # ------------------------------------------------------------------
+
+    def sample(self) -> TelemetrySample:
+        """Take one reading now without sleeping"""
+        now = time.time()
+        previous = self._ring[(self._written - 1) % self.history_size] if self._written else None
+
+        try:
+            disk_io = psutil.disk_io_counters()
+        except Exception:
+            disk_io = None
+        try:
+            net_io_pernic = psutil.net_io_counters(pernic=True)
+        except Exception:
+            net_io_pernic = {}
+
+        temperatures, temperatures_at = self._sample_temperatures(previous, now)
+
+        sample = TelemetrySample(
+            timestamp=now,
+            cpu_percent=psutil.cpu_percent(interval=None),
+            per_cpu=psutil.cpu_percent(interval=None, percpu=True),
+            cpu_count=psutil.cpu_count() or 1,
+            load_avg=psutil.getloadavg() if hasattr(psutil, "getloadavg") else None,
+            memory=psutil.virtual_memory(),
+            swap=psutil.swap_memory(),
+            disk=psutil.disk_usage(self.disk_path),
+            disk_io=disk_io,
+            net_io=psutil.net_io_counters(),
+            net_io_pernic=net_io_pernic,
+            temperatures=temperatures,
+            temperatures_at=temperatures_at,
+        )
+
+        if previous:
+            elapsed = now - previous.timestamp
+            if sample.disk_io and previous.disk_io:
+                sample.disk_read_bps = _rate(sample.disk_io.read_bytes, previous.disk_io.read_bytes, elapsed)
+                sample.disk_write_bps = _rate(sample.disk_io.write_bytes, previous.disk_io.write_bytes, elapsed)
+            sample.net_sent_bps = _rate(sample.net_io.bytes_sent, previous.net_io.bytes_sent, elapsed)
+            sample.net_recv_bps = _rate(sample.net_io.bytes_recv, previous.net_io.bytes_recv, elapsed)
+
+        return sample
+
+    def _sample_temperatures(self, previous: Optional[TelemetrySample], now: float):
+        # Sensor reads are comparatively slow; refresh every N ticks
+        if previous is not None and self._written % self.temperature_every:
+            return previous.temperatures, previous.temperatures_at
+        if not hasattr(psutil, "sensors_temperatures"):
+            return {}, None
+        try:
+            return psutil.sensors_temperatures() or {}, now
+        except Exception as e:
+            logger.debug(f"Temperature sensors unavailable: {e}")
+            return {}, None
+
+    def _record(self, sample: TelemetrySample):
+        self._ring[self._written % self.history_size] = sample
+        self._written += 1
+
+
+host_telemetry = HostTelemetrySampler(
+    interval=float(os.getenv("HOST_TELEMETRY_INTERVAL_SECONDS", "2")),
+    history_size=int(os.getenv("HOST_TELEMETRY_HISTORY_SIZE", "900")),
+    temperature_every=int(os.getenv("HOST_TELEMETRY_TEMPERATURE_EVERY", "5")),
+)
@@ -17,6 +17,7 @@ import string
 
 # Import Keycloak integration for user tier updates
 from keycloak_integration import update_user_attributes, get_user_by_id
+from db_manager import db_manager
 
 logger = logging.getLogger(__name__)
 
@@ -99,15 +100,8 @@ class ValidateCodeResponse(BaseModel):
 
 async def get_db_connection():
     """Get PostgreSQL database connection"""
-    import os
     try:
-        conn = await asyncpg.connect(
-            host=os.getenv("POSTGRES_HOST", "uchub-postgres"),
-            port=int(os.getenv("POSTGRES_PORT", 5432)),
-            user=os.getenv("POSTGRES_USER", "unicorn"),
-            password=os.getenv("POSTGRES_PASSWORD", "unicorn"),
-            database=os.getenv("POSTGRES_DB", "unicorn_db")
-        )
+        conn = await db_manager.connect('default')
         yield conn
     finally:
         if conn:
@@ -0,0 +1,553 @@
+"""
+Background Job Runner
+
+Registry of the app's periodic and long-running background jobs with
+lease-based single execution, so any number of API processes and
+`ops-center worker` processes can run side by side without every process
+running every job.
+
+Each registered job is driven by its own loop in every runner process; a
+lease decides which process actually runs it:
+
+- periodic jobs (interval or cron) take the lease, run once, and release it
+  with an expiry at their next due time. The process that ran a job is
+  first in line for the next run; others only take over once the lease has
+  been expired for JOB_TAKEOVER_SECONDS, i.e. when that process is gone.
+- singleton jobs (long-running loops such as the fleet pollers) hold the
+  lease for as long as they run and are cancelled if it is lost.
+- host-scoped jobs (local metrics sampling) lease per hostname, so they run
+  once per node instead of once per cluster.
+
+Leases are renewed every JOB_LEASE_SECONDS / 3 while a job runs; a run
+never overlaps the previous one and the next run is scheduled after it
+finishes. Wake-ups are spread by per-job jitter.
+
+Leases, run counts and durations are kept in Postgres (job_leases) or in
+Redis (JOB_LEASE_BACKEND=redis); without either, in this process only.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import socket
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+JOB_RUNNER_MODE = os.getenv('JOB_RUNNER_MODE', 'embedded')  # embedded | off
+JOB_LEASE_BACKEND = os.getenv('JOB_LEASE_BACKEND', 'postgres')  # postgres | redis
+JOB_LEASE_SECONDS = float(os.getenv('JOB_LEASE_SECONDS', '60'))
+JOB_TAKEOVER_SECONDS = float(os.getenv('JOB_TAKEOVER_SECONDS', '15'))
+JOB_JITTER = float(os.getenv('JOB_JITTER', '0.1'))  # fraction of the interval
+
+HOSTNAME = socket.gethostname()
+
+# Delay before a singleton job that returned or crashed is started again,
+# doubled per consecutive failure up to the maximum
+SINGLETON_RESTART_SECONDS = 5.0
+SINGLETON_RESTART_MAX_SECONDS = 300.0
+
+
+@dataclass
+class Job:
+    """A registered background job and its run statistics in this process"""
+    name: str
+    run: Callable[[], Awaitable[Any]]
+    interval: Optional[float] = None      # periodic: seconds between runs
+    cron: Optional[Dict[str, Any]] = None  # periodic: CronTrigger fields
+    scope: str = 'cluster'                # 'cluster' or 'host'
+    timeout: Optional[float] = None
+    jitter: Optional[float] = None        # max seconds added to wake-ups
+
+    runs: int = 0
+    failures: int = 0
+    timeouts: int = 0
+    deferrals: int = 0                    # wake-ups where another process held the lease
+    lost_leases: int = 0
+    consecutive_failures: int = 0
+    running: bool = False
+    last_started: Optional[datetime] = None
+    last_duration: Optional[float] = None
+    max_duration: float = 0.0
+    total_duration: float = 0.0
+    last_error: Optional[str] = None
+    _trigger: Any = field(default=None, repr=False)
+
+    def __post_init__(self):
+        if self.scope not in ('cluster', 'host'):
+            raise ValueError(f"Unknown job scope: {self.scope}")
+        if self.jitter is None:
+            self.jitter = min(self.interval * JOB_JITTER, 60.0) if self.interval else 5.0
+        if self.cron is not None:
+            from apscheduler.triggers.cron import CronTrigger
+            self._trigger = CronTrigger(**self.cron)
+
+    @property
+    def kind(self) -> str:
+        if self.interval is not None or self.cron is not None:
+            return 'periodic'
+        return 'singleton'
+
+    @property
+    def lease_name(self) -> str:
+        return self.name if self.scope == 'cluster' else f"{self.name}@{HOSTNAME}"
+
+    def next_delay(self) -> float:
+        """Seconds from now until the next run is due"""
+        if self._trigger is not None:
+            now = datetime.now(self._trigger.timezone)
+            return max((self._trigger.get_next_fire_time(None, now) - now).total_seconds(), 1.0)
+        if self.interval is not None:
+            return self.interval
+        return min(SINGLETON_RESTART_SECONDS * 2 ** self.consecutive_failures,
+                   SINGLETON_RESTART_MAX_SECONDS)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "scope": self.scope,
+            "interval_seconds": self.interval,
+            "cron": self.cron,
+            "running": self.running,
+            "runs": self.runs,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "deferrals": self.deferrals,
+            "lost_leases": self.lost_leases,
+            "last_started": self.last_started.isoformat() if self.last_started else None,
+            "last_duration_seconds": self.last_duration,
+            "avg_duration_seconds": self.total_duration / self.runs if self.runs else None,
+            "max_duration_seconds": self.max_duration,
+            "last_error": self.last_error,
+        }
+
+
+# ==================== Lease stores ====================
+
+class PostgresLeases:
+    """Leases in the job_leases table, timed by the database clock"""
+
+    def __init__(self, db_pool):
+        self.db_pool = db_pool
+
+    async def acquire(self, name: str, owner: str, ttl: float, takeover: float) -> Tuple[bool, float]:
+        """Take the lease if it is free; otherwise seconds until it may be"""
+        async with self.db_pool.acquire() as conn:
+            acquired = await conn.fetchval(
+                """
+                INSERT INTO job_leases (name, owner, expires_at, running, last_started_at)
+                VALUES ($1, $2, NOW() + make_interval(secs => $3), TRUE, NOW())
+                ON CONFLICT (name) DO UPDATE SET
+                    owner = EXCLUDED.owner,
+                    expires_at = EXCLUDED.expires_at,
+                    running = TRUE,
+                    last_started_at = NOW()
+                WHERE job_leases.expires_at <= NOW()
+                  AND (job_leases.owner = EXCLUDED.owner
+                       OR job_leases.expires_at + make_interval(secs => $4) <= NOW())
+                RETURNING TRUE
+                """,
+                name, owner, ttl, takeover
+            )
+            if acquired:
+                return True, 0.0
+            wait = await conn.fetchval(
+                """
+                SELECT EXTRACT(EPOCH FROM (expires_at - NOW()))
+                       + CASE WHEN owner = $2 THEN 0 ELSE $3 END
+                FROM job_leases WHERE name = $1
+                """,
+                name, owner, takeover
+            )
+        return False, float(wait or 0.0)
+
+    async def renew(self, name: str, owner: str, ttl: float) -> bool:
+        async with self.db_pool.acquire() as conn:
+            status = await conn.execute(
+                """
+                UPDATE job_leases SET expires_at = NOW() + make_interval(secs => $3)
+                WHERE name = $1 AND owner = $2 AND running
+                """,
+                name, owner, ttl
+            )
+        return int(status.split()[-1]) == 1
+
+    async def release(self, name: str, owner: str, next_in: float, duration: float,
+                      status: str, error: Optional[str]):
+        """Record the run and keep the lease until the next run is due"""
+        async with self.db_pool.acquire() as conn:
+            await conn.execute(
+                """
+                UPDATE job_leases SET
+                    expires_at = NOW() + make_interval(secs => $3),
+                    running = FALSE,
+                    last_finished_at = NOW(),
+                    last_duration_ms = $4,
+                    last_status = $5,
+                    last_error = $6,
+                    runs = runs + 1,
+                    failures = failures + CASE WHEN $5 = 'ok' THEN 0 ELSE 1 END
+                WHERE name = $1 AND owner = $2
+                """,
+                name, owner, next_in, int(duration * 1000), status, error
+            )
+
+    async def snapshot(self) -> List[Dict[str, Any]]:
+        async with self.db_pool.acquire() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT name, owner, running, runs, failures, last_status, last_error,
+                       last_duration_ms, last_started_at, last_finished_at,
+                       EXTRACT(EPOCH FROM (expires_at - NOW())) AS expires_in
+                FROM job_leases
+                ORDER BY name
+                """
+            )
+        return [
+            {
+                **dict(row),
+                "expires_in": float(row['expires_in']),
+                "last_started_at": row['last_started_at'].isoformat() if row['last_started_at'] else None,
+                "last_finished_at": row['last_finished_at'].isoformat() if row['last_finished_at'] else None,
+            }
+            for row in rows
+        ]
+
+
+# Lease hash fields: owner, until (ms, Redis clock), running, runs, failures, last_*
+_REDIS_ACQUIRE = """
+local t = redis.call('TIME')
+local now = t[1] * 1000 + math.floor(t[2] / 1000)
+local owner = redis.call('HGET', KEYS[1], 'owner')
+local expires = tonumber(redis.call('HGET', KEYS[1], 'until') or '0')
+local takeover = tonumber(ARGV[3])
+if owner and owner ~= ARGV[1] then
+    expires = expires + takeover
+end
+if expires > now then
+    return {0, tostring(expires - now)}
+end
+redis.call('HSET', KEYS[1], 'owner', ARGV[1], 'until', now + tonumber(ARGV[2]),
+           'running', 1, 'last_started_at', now)
+redis.call('SADD', KEYS[2], ARGV[4])
+return {1, '0'}
+"""
+
+_REDIS_RENEW = """
+local t = redis.call('TIME')
+local now = t[1] * 1000 + math.floor(t[2] / 1000)
+if redis.call('HGET', KEYS[1], 'owner') ~= ARGV[1] or redis.call('HGET', KEYS[1], 'running') ~= '1' then
+    return 0
+end
+redis.call('HSET', KEYS[1], 'until', now + tonumber(ARGV[2]))
+return 1
+"""
+
+_REDIS_RELEASE = """
+local t = redis.call('TIME')
+local now = t[1] * 1000 + math.floor(t[2] / 1000)
+if redis.call('HGET', KEYS[1], 'owner') ~= ARGV[1] then
+    return 0
+end
+redis.call('HSET', KEYS[1], 'until', now + tonumber(ARGV[2]), 'running', 0,
+           'last_finished_at', now, 'last_duration_ms', ARGV[3],
+           'last_status', ARGV[4], 'last_error', ARGV[5])
+redis.call('HINCRBY', KEYS[1], 'runs', 1)
+if ARGV[4] ~= 'ok' then
+    redis.call('HINCRBY', KEYS[1], 'failures', 1)
+end
+return 1
+"""
+
+
+class RedisLeases:
+    """Leases in Redis hashes, timed by the Redis clock"""
+
+    KEY = 'job:lease:{}'
+    NAMES_KEY = 'job:leases'
+
+    def __init__(self, redis_client):
+        self.redis = redis_client
+
+    async def acquire(self, name: str, owner: str, ttl: float, takeover: float) -> Tuple[bool, float]:
+        acquired, wait_ms = await self.redis.eval(
+            _REDIS_ACQUIRE, 2, self.KEY.format(name), self.NAMES_KEY,
+            owner, int(ttl * 1000), int(takeover * 1000), name
+        )
+        return bool(int(acquired)), float(wait_ms) / 1000
+
+    async def renew(self, name: str, owner: str, ttl: float) -> bool:
+        return bool(await self.redis.eval(_REDIS_RENEW, 1, self.KEY.format(name), owner, int(ttl * 1000)))
+
+    async def release(self, name: str, owner: str, next_in: float, duration: float,
+                      status: str, error: Optional[str]):
+        await self.redis.eval(
+            _REDIS_RELEASE, 1, self.KEY.format(name),
+            owner, int(next_in * 1000), int(duration * 1000), status, error or ''
+        )
+
+    async def snapshot(self) -> List[Dict[str, Any]]:
+        names = sorted(await self.redis.smembers(self.NAMES_KEY))
+        now_ms = time.time() * 1000
+        leases = []
+        for name in names:
+            data = await self.redis.hgetall(self.KEY.format(name))
+            if not data:
+                continue
+            stamp = lambda key: (
+                datetime.fromtimestamp(int(data[key]) / 1000).isoformat() if data.get(key) else None
+            )
+            leases.append({
+                "name": name,
+                "owner": data.get('owner'),
+                "running": data.get('running') == '1',
+                "runs": int(data.get('runs', 0)),
+                "failures": int(data.get('failures', 0)),
+                "last_status": data.get('last_status'),
+                "last_error": data.get('last_error') or None,
+                "last_duration_ms": int(data['last_duration_ms']) if data.get('last_duration_ms') else None,
+                "last_started_at": stamp('last_started_at'),
+                "last_finished_at": stamp('last_finished_at'),
+                "expires_in": (int(data.get('until', 0)) - now_ms) / 1000,
+            })
+        return leases
+
+
+class LocalLeases:
+    """In-process leases, for a single process without Postgres or Redis"""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self.leases: Dict[str, Dict[str, Any]] = {}
+
+    async def acquire(self, name: str, owner: str, ttl: float, takeover: float) -> Tuple[bool, float]:
+        now = self.clock()
+        lease = self.leases.setdefault(name, {"name": name, "owner": None, "until": 0.0,
+                                              "running": False, "runs": 0, "failures": 0})
+        expires = lease["until"]
+        if lease["owner"] not in (None, owner):
+            expires += takeover
+        if expires > now:
+            return False, expires - now
+        lease.update(owner=owner, until=now + ttl, running=True)
+        return True, 0.0
+
+    async def renew(self, name: str, owner: str, ttl: float) -> bool:
+        lease = self.leases.get(name)
+        if not lease or lease["owner"] != owner or not lease["running"]:
+            return False
+        lease["until"] = self.clock() + ttl
+        return True
+
+    async def release(self, name: str, owner: str, next_in: float, duration: float,
+                      status: str, error: Optional[str]):
+        lease = self.leases.get(name)
+        if not lease or lease["owner"] != owner:
+            return
+        lease.update(until=self.clock() + next_in, running=False, last_status=status,
+                     last_error=error, last_duration_ms=int(duration * 1000))
+        lease["runs"] += 1
+        lease["failures"] += status != 'ok'
+
+    async def snapshot(self) -> List[Dict[str, Any]]:
+        now = self.clock()
+        return [
+            {**{k: v for k, v in lease.items() if k != 'until'}, "expires_in": lease["until"] - now}
+            for _, lease in sorted(self.leases.items())
+        ]
+
+
+# ==================== Runner ====================
+
+class JobRunner:
+    """Runs the registered jobs that this process wins the lease for"""
+
+    def __init__(
+        self,
+        lease_seconds: float = JOB_LEASE_SECONDS,
+        takeover_seconds: float = JOB_TAKEOVER_SECONDS
+    ):
+        self.lease_seconds = lease_seconds
+        self.takeover_seconds = takeover_seconds
+        self.owner = f"{HOSTNAME}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.jobs: Dict[str, Job] = {}
+        self.leases = None
+
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._start_lock = asyncio.Lock()
+
+    def register(self, name: str, run: Callable[[], Awaitable[Any]], **options) -> Job:
+        """
+        Register a job
+
+        Pass interval (seconds) or cron (CronTrigger fields) for a periodic
+        job; with neither, run is a long-running coroutine kept running in
+        exactly one process. Other options: scope, timeout, jitter.
+        """
+        if name in self.jobs:
+            raise ValueError(f"Job already registered: {name}")
+        job = Job(name=name, run=run, **options)
+        self.jobs[name] = job
+        return job
+
+    def configure(self, db_pool=None, redis_client=None):
+        """Choose the lease store; also used by processes that only read job stats"""
+        if JOB_LEASE_BACKEND == 'redis' and redis_client is not None:
+            self.leases = RedisLeases(redis_client)
+        elif db_pool is not None:
+            self.leases = PostgresLeases(db_pool)
+        else:
+            logger.warning("No shared lease store; background jobs are leased in this process only")
+            self.leases = LocalLeases()
+
+    async def start(self, db_pool=None, redis_client=None):
+        async with self._start_lock:
+            if self._tasks:
+                return
+            if self.leases is None or db_pool is not None or redis_client is not None:
+                self.configure(db_pool, redis_client)
+            for job in self.jobs.values():
+                self._tasks[job.name] = asyncio.create_task(self._loop(job))
+            logger.info(
+                f"Job runner started: {len(self.jobs)} jobs, "
+                f"{type(self.leases).__name__}, owner {self.owner}"
+            )
+
+    async def stop(self):
+        """Cancel all job loops; running jobs are cancelled and their leases lapse"""
+        tasks = list(self._tasks.values())
+        self._tasks = {}
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+            logger.info("Job runner stopped")
+
+    async def _loop(self, job: Job):
+        if job.cron is not None:
+            # Cron jobs run at their fire times, not when a process starts
+            await asyncio.sleep(job.next_delay() + random.uniform(0, job.jitter))
+        while True:
+            try:
+                acquired, wait = await self.leases.acquire(
+                    job.lease_name, self.owner, self.lease_seconds, self.takeover_seconds
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job {job.name}: lease check failed: {e}")
+                acquired, wait = False, self.takeover_seconds
+
+            if acquired:
+                await self._execute(job)
+                wait = job.next_delay()
+            else:
+                job.deferrals += 1
+            await asyncio.sleep(max(wait, 0.0) + random.uniform(0, job.jitter))
+
+    async def _execute(self, job: Job):
+        """Run the job once while renewing its lease, then record the run"""
+        run_task = asyncio.create_task(self._timed(job))
+        renew_task = asyncio.create_task(self._renew(job, run_task))
+        job.running = True
+        job.last_started = datetime.now()
+        started = time.monotonic()
+        status, error = 'ok', None
+        try:
+            await run_task
+        except asyncio.CancelledError:
+            if not (renew_task.done() and not renew_task.cancelled() and renew_task.result()):
+                # The runner is stopping: let the job clean up, expire the
+                # lease so another process can pick the job up, then stop
+                renew_task.cancel()
+                run_task.cancel()
+                await asyncio.gather(run_task, return_exceptions=True)
+                job.running = False
+                try:
+                    await self.leases.renew(job.lease_name, self.owner, 0)
+                except Exception as e:
+                    logger.warning(f"Job {job.name}: failed to expire lease: {e}")
+                raise
+            status, error = 'lost', 'lease lost'
+        except asyncio.TimeoutError:
+            job.timeouts += 1
+            status, error = 'timeout', f"timed out after {job.timeout}s"
+        except Exception as e:
+            status, error = 'failed', str(e)
+            logger.error(f"Job {job.name} failed: {e}", exc_info=True)
+        finally:
+            renew_task.cancel()
+            job.running = False
+
+        duration = time.monotonic() - started
+        job.runs += 1
+        job.failures += status != 'ok'
+        job.consecutive_failures = 0 if status == 'ok' else job.consecutive_failures + 1
+        job.last_duration = duration
+        job.max_duration = max(job.max_duration, duration)
+        job.total_duration += duration
+        job.last_error = error
+        try:
+            await self.leases.release(
+                job.lease_name, self.owner, job.next_delay(), duration, status, error
+            )
+        except Exception as e:
+            logger.error(f"Job {job.name}: failed to record run: {e}")
+
+    async def _timed(self, job: Job):
+        if job.timeout:
+            return await asyncio.wait_for(job.run(), job.timeout)
+        return await job.run()
+
+    async def _renew(self, job: Job, run_task: asyncio.Task) -> bool:
+        """
+        Extend the lease while the job runs; cancel the job and return True
+        if it is lost, or if no renewal has succeeded for lease_seconds (the
+        lease has expired and another process may already have taken over)
+        """
+        last_renewed = time.monotonic()
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                renewed = await self.leases.renew(job.lease_name, self.owner, self.lease_seconds)
+            except Exception as e:
+                if time.monotonic() - last_renewed < self.lease_seconds:
+                    logger.warning(f"Job {job.name}: lease renewal failed: {e}")
+                    continue
+                job.lost_leases += 1
+                logger.error(f"Job {job.name}: lease not renewed for {self.lease_seconds}s ({e}), cancelling")
+                run_task.cancel()
+                return True
+            if not renewed:
+                job.lost_leases += 1
+                logger.warning(f"Job {job.name}: lease lost to another process, cancelling")
+                run_task.cancel()
+                return True
+            last_renewed = time.monotonic()
+
+    async def snapshot(self) -> Dict[str, Any]:
+        """Cluster-wide lease state plus this process's job statistics"""
+        leases = []
+        if self.leases is not None:
+            try:
+                leases = await self.leases.snapshot()
+            except Exception as e:
+                logger.warning(f"Failed to read job leases: {e}")
+        return {"leases": leases, **self.get_stats()}
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "owner": self.owner,
+            "running": bool(self._tasks),
+            "lease_store": type(self.leases).__name__ if self.leases else None,
+            "jobs": {name: job.stats() for name, job in self.jobs.items()},
+        }
+
+
+# Global instance
+job_runner = JobRunner()
@@ -0,0 +1,70 @@
+"""
+Background Job Worker
+
+Runs the background jobs (background_jobs.py) in a process of its own:
+
+    ops-center worker
+    python job_worker.py
+
+Start API processes with JOB_RUNNER_MODE=off and one or more of these per
+host or cluster; the API can then run as many uvicorn workers as needed
+without every worker running every job.
+"""
+
+import asyncio
+import logging
+import os
+import signal
+
+import redis.asyncio as aioredis
+
+from background_jobs import register_jobs
+from db_manager import db_manager
+from job_runner import job_runner
+
+logger = logging.getLogger(__name__)
+
+
+async def run_worker():
+    """Run the job runner until SIGINT/SIGTERM"""
+    await db_manager.start()
+
+    redis_url = os.getenv(
+        'REDIS_URL',
+        f"redis://{os.getenv('REDIS_HOST', 'unicorn-lago-redis')}:{os.getenv('REDIS_PORT', '6379')}"
+    )
+    redis_client = aioredis.from_url(redis_url, encoding="utf-8", decode_responses=True)
+    try:
+        await redis_client.ping()
+    except Exception as e:
+        logger.warning(f"Redis unavailable ({e}); job leases use PostgreSQL")
+        await redis_client.close()
+        redis_client = None
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+
+    register_jobs(job_runner)
+    await job_runner.start(db_manager.subsystem('jobs'), redis_client)
+    try:
+        await stopping.wait()
+    finally:
+        logger.info("Stopping job worker...")
+        await job_runner.stop()
+        if redis_client is not None:
+            await redis_client.close()
+        await db_manager.close()
+
+
+def main():
+    logging.basicConfig(
+        level=os.getenv('LOG_LEVEL', 'INFO'),
+        format='%(asctime)s %(levelname)s %(name)s: %(message)s'
+    )
+    asyncio.run(run_worker())
+
+
+if __name__ == '__main__':
+    main()
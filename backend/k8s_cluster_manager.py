@@ -15,8 +15,9 @@ from datetime import datetime
 from cryptography.fernet import Fernet
 import yaml
 
-from kubernetes import client, config
-from kubernetes.client.rest import ApiException
+from kubernetes import client
+
+from k8s_inventory import new_api_client, watcher_registry
 
 logger = logging.getLogger(__name__)
 
@@ -141,18 +142,10 @@ class KubernetesClusterManager:
     async def _detect_cluster_info(self, kubeconfig_content: str) -> tuple:
         """Detect cluster version and provider from kubeconfig"""
         try:
-            # Create temporary kubeconfig file
-            import tempfile
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.yaml', delete=False) as f:
-                f.write(kubeconfig_content)
-                kubeconfig_path = f.name
+            api_client = await self._get_k8s_client(kubeconfig_content)
             
             try:
-                # Load kubeconfig
-                config.load_kube_config(config_file=kubeconfig_path)
-                
-                # Create API client
-                v1 = client.CoreV1Api()
+                v1 = client.CoreV1Api(api_client)
                 
                 # Get cluster version
                 version_info = await asyncio.to_thread(v1.get_api_resources)
@@ -188,8 +181,7 @@ class KubernetesClusterManager:
                 return version, provider
             
             finally:
-                # Clean up temp file
-                os.unlink(kubeconfig_path)
+                api_client.close()
         
         except Exception as e:
             logger.warning(f"Could not detect cluster info: {e}")
@@ -318,56 +310,67 @@ class KubernetesClusterManager:
     
     async def sync_cluster(self, cluster_id: str) -> Dict[str, Any]:
         """
-        Full cluster synchronization.
+        Write the cluster's inventory changes to the database.
         
-        Syncs:
-        - Cluster health
-        - Namespaces
-        - Nodes
-        - Deployments
-        - Pods (summary)
+        Namespaces, nodes and deployments are kept current by the cluster's
+        watcher (see k8s_inventory); a sync writes only the rows that
+        changed since the previous one, in a single transaction, then
+        updates the cluster's counts and health from the inventory.
         """
         try:
-            # Get cluster
             async with self.db_pool.acquire() as conn:
                 cluster = await conn.fetchrow("""
-                    SELECT * FROM k8s_clusters WHERE id = $1
+                    SELECT id, name, organization_id, kubeconfig_encrypted
+                    FROM k8s_clusters WHERE id = $1
                 """, cluster_id)
+            
+            if not cluster:
+                raise ValueError("Cluster not found")
+            
+            watcher = await watcher_registry.get(
+                cluster['id'], cluster['kubeconfig_encrypted'], self._decrypt_kubeconfig
+            )
+            
+            async with watcher.sync_lock:
+                components_healthy = await watcher.check_components()
+                delta = watcher.store.drain()
                 
-                if not cluster:
-                    raise ValueError("Cluster not found")
-                
-                # Decrypt kubeconfig
-                kubeconfig_content = self.cipher.decrypt(
-                    cluster['kubeconfig_encrypted'].encode()
-                ).decode()
-                
-                # Create K8s client
-                k8s_client = await self._get_k8s_client(kubeconfig_content)
-                
-                # Sync components
-                health_status = await self._sync_cluster_health(k8s_client, cluster_id, conn)
-                await self._sync_namespaces(k8s_client, cluster_id, cluster['organization_id'], conn)
-                await self._sync_nodes(k8s_client, cluster_id, conn)
-                await self._sync_deployments(k8s_client, cluster_id, conn)
-                
-                # Update cluster sync timestamp
-                await conn.execute("""
-                    UPDATE k8s_clusters
-                    SET last_sync_at = NOW(),
-                        health_status = $2,
-                        last_error = NULL,
-                        updated_at = NOW()
-                    WHERE id = $1
-                """, cluster_id, health_status)
-                
-                logger.info(f"✅ Synced cluster {cluster['name']} ({cluster_id})")
-                
-                return {
-                    'cluster_id': cluster_id,
-                    'synced_at': datetime.utcnow().isoformat(),
-                    'health_status': health_status
-                }
+                try:
+                    async with self.db_pool.acquire() as conn:
+                        async with conn.transaction():
+                            changes = await self._write_inventory(conn, watcher, cluster, delta)
+                            health_status = self._cluster_health(watcher.store, components_healthy)
+                            deployments = watcher.store.rows('deployments')
+                            
+                            await conn.execute("""
+                                UPDATE k8s_clusters
+                                SET last_sync_at = NOW(),
+                                    health_status = $2,
+                                    total_namespaces = $3,
+                                    total_nodes = $4,
+                                    total_deployments = $5,
+                                    total_pods = $6,
+                                    last_error = NULL,
+                                    updated_at = NOW()
+                                WHERE id = $1
+                            """, cluster['id'], health_status,
+                                watcher.store.count('namespaces'), watcher.store.count('nodes'),
+                                len(deployments), sum(d['replicas_ready'] for d in deployments))
+                except Exception:
+                    watcher.store.requeue(delta)
+                    raise
+            
+            if changes:
+                logger.info(f"✅ Synced cluster {cluster['name']} ({cluster_id}): {changes} changes")
+            else:
+                logger.debug(f"Synced cluster {cluster['name']} ({cluster_id}): no changes")
+            
+            return {
+                'cluster_id': cluster_id,
+                'synced_at': datetime.utcnow().isoformat(),
+                'health_status': health_status,
+                'changes': changes
+            }
         
         except Exception as e:
             logger.error(f"❌ Failed to sync cluster {cluster_id}: {e}")
@@ -384,255 +387,204 @@ class KubernetesClusterManager:
             
             raise
     
-    async def _get_k8s_client(self, kubeconfig_content: str):
-        """Create Kubernetes API client from kubeconfig"""
-        import tempfile
-        
-        # Create temporary kubeconfig file
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.yaml', delete=False) as f:
-            f.write(kubeconfig_content)
-            kubeconfig_path = f.name
+    def _decrypt_kubeconfig(self, kubeconfig_encrypted: str) -> str:
+        return self.cipher.decrypt(kubeconfig_encrypted.encode()).decode()
+    
+    async def _get_k8s_client(self, kubeconfig_content: str) -> client.ApiClient:
+        """Create an API client for one cluster without touching the global kube config"""
+        return await asyncio.to_thread(new_api_client, kubeconfig_content)
+    
+    @staticmethod
+    def _cluster_health(store, components_healthy: bool) -> str:
+        """Cluster health from control plane components and node readiness"""
+        nodes = store.rows('nodes')
+        healthy_nodes = sum(1 for node in nodes if node['status'] == 'Ready')
+        total_nodes = len(nodes)
         
-        try:
-            # Load kubeconfig
-            config.load_kube_config(config_file=kubeconfig_path)
-            return client
-        finally:
-            os.unlink(kubeconfig_path)
+        if components_healthy and healthy_nodes == total_nodes:
+            return 'healthy'
+        elif healthy_nodes >= total_nodes * 0.8:
+            return 'degraded'
+        return 'critical'
     
-    async def _sync_cluster_health(self, k8s_client, cluster_id: str, conn) -> str:
-        """Check cluster health"""
-        try:
-            v1 = k8s_client.CoreV1Api()
-            
-            # Get component statuses
-            components = await asyncio.to_thread(v1.list_component_status)
-            
-            # Check if all components are healthy
-            all_healthy = all(
-                c.conditions and any(cond.type == 'Healthy' and cond.status == 'True' 
-                                   for cond in c.conditions)
-                for c in components.items
-            )
-            
-            # Get node health
-            nodes = await asyncio.to_thread(v1.list_node)
-            healthy_nodes = sum(
-                1 for node in nodes.items
-                if any(cond.type == 'Ready' and cond.status == 'True' 
-                      for cond in node.status.conditions)
-            )
-            total_nodes = len(nodes.items)
-            
-            # Determine health status
-            if all_healthy and healthy_nodes == total_nodes:
-                health_status = 'healthy'
-            elif healthy_nodes >= total_nodes * 0.8:
-                health_status = 'degraded'
-            else:
-                health_status = 'critical'
-            
-            # Update cluster counts
+    async def _write_inventory(self, conn, watcher, cluster, delta) -> int:
+        """
+        Apply an inventory delta: bulk upserts for changed objects, and
+        status = 'Deleted' for objects that are gone (rows are kept because
+        cost records reference them).
+        
+        Deployments whose namespace has no row yet are left dirty for the
+        next sync. Returns the number of rows written.
+        """
+        cluster_id = cluster['id']
+        changes = 0
+        
+        # Namespaces
+        namespaces = delta.changed.get('namespaces', {})
+        if namespaces:
+            await conn.executemany("""
+                INSERT INTO k8s_namespaces (
+                    cluster_id, organization_id, name, namespace_uid, status,
+                    team_name, cost_center, labels, last_sync_at
+                ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, NOW())
+                ON CONFLICT (cluster_id, name) DO UPDATE
+                SET status = EXCLUDED.status,
+                    team_name = EXCLUDED.team_name,
+                    cost_center = EXCLUDED.cost_center,
+                    labels = EXCLUDED.labels,
+                    last_sync_at = NOW(),
+                    updated_at = NOW()
+            """, [
+                (cluster_id, cluster['organization_id'], ns['name'], ns['uid'], ns['status'],
+                 ns['team_name'], ns['cost_center'], json.dumps(ns['labels']))
+                for ns in namespaces.values()
+            ])
+            changes += len(namespaces)
+        
+        deleted = delta.deleted.get('namespaces')
+        if deleted:
             await conn.execute("""
-                UPDATE k8s_clusters
-                SET total_nodes = $2
-                WHERE id = $1
-            """, cluster_id, total_nodes)
-            
-            return health_status
+                UPDATE k8s_namespaces
+                SET status = 'Deleted', last_sync_at = NOW(), updated_at = NOW()
+                WHERE cluster_id = $1 AND name = ANY($2::text[])
+            """, cluster_id, list(deleted))
+            changes += len(deleted)
         
-        except Exception as e:
-            logger.error(f"Failed to check cluster health: {e}")
-            return 'unknown'
-    
-    async def _sync_namespaces(self, k8s_client, cluster_id: str, organization_id: str, conn):
-        """Sync namespaces"""
-        try:
-            v1 = k8s_client.CoreV1Api()
-            namespaces = await asyncio.to_thread(v1.list_namespace)
-            
-            for ns in namespaces.items:
-                # Extract team and cost center from labels
-                labels = ns.metadata.labels or {}
-                team_name = labels.get('team', labels.get('owner'))
-                cost_center = labels.get('cost-center', labels.get('costCenter'))
-                
-                # Upsert namespace
-                await conn.execute("""
-                    INSERT INTO k8s_namespaces (
-                        cluster_id, organization_id, name, namespace_uid, status,
-                        team_name, cost_center, labels, last_sync_at
-                    ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, NOW())
-                    ON CONFLICT (cluster_id, name) DO UPDATE
-                    SET status = EXCLUDED.status,
-                        team_name = EXCLUDED.team_name,
-                        cost_center = EXCLUDED.cost_center,
-                        labels = EXCLUDED.labels,
-                        last_sync_at = NOW(),
-                        updated_at = NOW()
-                """, cluster_id, organization_id, ns.metadata.name, ns.metadata.uid,
-                    ns.status.phase, team_name, cost_center, json.dumps(labels))
-            
-            # Update cluster namespace count
-            count = len(namespaces.items)
+        if namespaces or not watcher.namespace_ids:
+            rows = await conn.fetch("""
+                SELECT id, name, organization_id FROM k8s_namespaces WHERE cluster_id = $1
+            """, cluster_id)
+            watcher.namespace_ids = {r['name']: (r['id'], r['organization_id']) for r in rows}
+        
+        # Nodes
+        nodes = delta.changed.get('nodes', {})
+        if nodes:
+            await conn.executemany("""
+                INSERT INTO k8s_nodes (
+                    cluster_id, name, node_uid, node_type, instance_type,
+                    cpu_capacity, memory_capacity, pod_capacity,
+                    cpu_allocatable, memory_allocatable,
+                    status, conditions, labels, last_sync_at
+                ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, NOW())
+                ON CONFLICT (cluster_id, name) DO UPDATE
+                SET status = EXCLUDED.status,
+                    cpu_capacity = EXCLUDED.cpu_capacity,
+                    memory_capacity = EXCLUDED.memory_capacity,
+                    pod_capacity = EXCLUDED.pod_capacity,
+                    cpu_allocatable = EXCLUDED.cpu_allocatable,
+                    memory_allocatable = EXCLUDED.memory_allocatable,
+                    conditions = EXCLUDED.conditions,
+                    labels = EXCLUDED.labels,
+                    last_sync_at = NOW(),
+                    updated_at = NOW()
+            """, [
+                (cluster_id, node['name'], node['uid'], node['node_type'], node['instance_type'],
+                 node['cpu_capacity'], node['memory_capacity'], node['pod_capacity'],
+                 node['cpu_allocatable'], node['memory_allocatable'],
+                 node['status'], json.dumps(node['conditions']), json.dumps(node['labels']))
+                for node in nodes.values()
+            ])
+            changes += len(nodes)
+        
+        deleted = delta.deleted.get('nodes')
+        if deleted:
             await conn.execute("""
-                UPDATE k8s_clusters SET total_namespaces = $2 WHERE id = $1
-            """, cluster_id, count)
-            
-            logger.debug(f"Synced {count} namespaces for cluster {cluster_id}")
+                UPDATE k8s_nodes
+                SET status = 'Deleted', last_sync_at = NOW(), updated_at = NOW()
+                WHERE cluster_id = $1 AND name = ANY($2::text[])
+            """, cluster_id, list(deleted))
+            changes += len(deleted)
         
-        except Exception as e:
-            logger.error(f"Failed to sync namespaces: {e}")
-    
-    async def _sync_nodes(self, k8s_client, cluster_id: str, conn):
-        """Sync nodes"""
-        try:
-            v1 = k8s_client.CoreV1Api()
-            nodes = await asyncio.to_thread(v1.list_node)
-            
-            for node in nodes.items:
-                # Get node status
-                ready_condition = next(
-                    (c for c in node.status.conditions if c.type == 'Ready'),
-                    None
-                )
-                status = 'Ready' if ready_condition and ready_condition.status == 'True' else 'NotReady'
-                
-                # Get capacity
-                capacity = node.status.capacity
-                allocatable = node.status.allocatable
-                
-                # Determine node type
-                labels = node.metadata.labels or {}
-                node_type = 'master' if 'node-role.kubernetes.io/master' in labels else 'worker'
-                
-                # Get instance type
-                instance_type = labels.get('node.kubernetes.io/instance-type', 
-                                         labels.get('beta.kubernetes.io/instance-type', 'unknown'))
-                
-                # Upsert node
-                await conn.execute("""
-                    INSERT INTO k8s_nodes (
-                        cluster_id, name, node_uid, node_type, instance_type,
-                        cpu_capacity, memory_capacity, pod_capacity,
-                        cpu_allocatable, memory_allocatable,
-                        status, conditions, labels, last_sync_at
-                    ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, NOW())
-                    ON CONFLICT (cluster_id, name) DO UPDATE
-                    SET status = EXCLUDED.status,
-                        cpu_capacity = EXCLUDED.cpu_capacity,
-                        memory_capacity = EXCLUDED.memory_capacity,
-                        pod_capacity = EXCLUDED.pod_capacity,
-                        cpu_allocatable = EXCLUDED.cpu_allocatable,
-                        memory_allocatable = EXCLUDED.memory_allocatable,
-                        conditions = EXCLUDED.conditions,
-                        labels = EXCLUDED.labels,
-                        last_sync_at = NOW(),
-                        updated_at = NOW()
-                """, cluster_id, node.metadata.name, node.metadata.uid, node_type, instance_type,
-                    capacity.get('cpu'), capacity.get('memory'), capacity.get('pods'),
-                    allocatable.get('cpu'), allocatable.get('memory'),
-                    status, json.dumps([c.to_dict() for c in node.status.conditions]),
-                    json.dumps(labels))
-            
-            logger.debug(f"Synced {len(nodes.items)} nodes for cluster {cluster_id}")
+        # Deployments
+        upserts, pending = [], []
+        for key, deploy in delta.changed.get('deployments', {}).items():
+            namespace = watcher.namespace_ids.get(deploy['namespace'])
+            if namespace is None:
+                pending.append(key)
+                continue
+            namespace_id, org_id = namespace
+            upserts.append((
+                cluster_id, namespace_id, org_id,
+                deploy['name'], deploy['uid'],
+                deploy['replicas_desired'], deploy['replicas_current'], deploy['replicas_ready'],
+                deploy['replicas_available'], deploy['replicas_unavailable'],
+                json.dumps(deploy['containers']), 'Running', deploy['health_status'],
+                deploy['strategy'], json.dumps(deploy['labels']), json.dumps(deploy['annotations'])
+            ))
         
-        except Exception as e:
-            logger.error(f"Failed to sync nodes: {e}")
+        if upserts:
+            await conn.executemany("""
+                INSERT INTO k8s_deployments (
+                    cluster_id, namespace_id, organization_id,
+                    name, deployment_uid,
+                    replicas_desired, replicas_current, replicas_ready,
+                    replicas_available, replicas_unavailable,
+                    containers, status, health_status,
+                    strategy, labels, annotations, last_sync_at
+                ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16, NOW())
+                ON CONFLICT (namespace_id, name) DO UPDATE
+                SET replicas_desired = EXCLUDED.replicas_desired,
+                    replicas_current = EXCLUDED.replicas_current,
+                    replicas_ready = EXCLUDED.replicas_ready,
+                    replicas_available = EXCLUDED.replicas_available,
+                    replicas_unavailable = EXCLUDED.replicas_unavailable,
+                    containers = EXCLUDED.containers,
+                    status = EXCLUDED.status,
+                    health_status = EXCLUDED.health_status,
+                    labels = EXCLUDED.labels,
+                    annotations = EXCLUDED.annotations,
+                    last_sync_at = NOW(),
+                    updated_at = NOW()
+            """, upserts)
+            changes += len(upserts)
+        if pending:
+            watcher.store.mark_dirty('deployments', pending)
+            logger.debug(f"{len(pending)} deployments in cluster {cluster_id} wait for their namespace")
+        
+        removed = [
+            (watcher.namespace_ids[namespace][0], name)
+            for namespace, name in delta.deleted.get('deployments', ())
+            if namespace in watcher.namespace_ids
+        ]
+        if removed:
+            await conn.executemany("""
+                UPDATE k8s_deployments
+                SET status = 'Deleted', last_sync_at = NOW(), updated_at = NOW()
+                WHERE namespace_id = $1 AND name = $2
+            """, removed)
+            changes += len(removed)
+        
+        # Objects deleted while nothing was watching (first sync of a watcher)
+        if not watcher.reconciled:
+            changes += await self._reconcile_deleted(conn, watcher, cluster_id)
+            watcher.reconciled = True
+        
+        return changes
     
-    async def _sync_deployments(self, k8s_client, cluster_id: str, conn):
-        """Sync deployments across all namespaces"""
-        try:
-            apps_v1 = k8s_client.AppsV1Api()
-            deployments = await asyncio.to_thread(apps_v1.list_deployment_for_all_namespaces)
-            
-            total_pods = 0
-            
-            for deploy in deployments.items:
-                # Get namespace ID
-                namespace_id = await conn.fetchval("""
-                    SELECT id FROM k8s_namespaces
-                    WHERE cluster_id = $1 AND name = $2
-                """, cluster_id, deploy.metadata.namespace)
-                
-                if not namespace_id:
-                    continue
-                
-                # Get organization from namespace
-                org_id = await conn.fetchval("""
-                    SELECT organization_id FROM k8s_namespaces WHERE id = $1
-                """, namespace_id)
-                
-                # Extract container info
-                containers = [
-                    {
-                        'name': c.name,
-                        'image': c.image,
-                        'resources': {
-                            'requests': c.resources.requests if c.resources and c.resources.requests else {},
-                            'limits': c.resources.limits if c.resources and c.resources.limits else {}
-                        }
-                    }
-                    for c in deploy.spec.template.spec.containers
-                ]
-                
-                # Determine health status
-                ready = deploy.status.ready_replicas or 0
-                desired = deploy.spec.replicas or 0
-                
-                if ready == desired and ready > 0:
-                    health_status = 'healthy'
-                elif ready >= desired * 0.5:
-                    health_status = 'degraded'
-                else:
-                    health_status = 'failed'
-                
-                # Upsert deployment
-                await conn.execute("""
-                    INSERT INTO k8s_deployments (
-                        cluster_id, namespace_id, organization_id,
-                        name, deployment_uid,
-                        replicas_desired, replicas_current, replicas_ready,
-                        replicas_available, replicas_unavailable,
-                        containers, status, health_status,
-                        strategy, labels, annotations, last_sync_at
-                    ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16, NOW())
-                    ON CONFLICT (namespace_id, name) DO UPDATE
-                    SET replicas_desired = EXCLUDED.replicas_desired,
-                        replicas_current = EXCLUDED.replicas_current,
-                        replicas_ready = EXCLUDED.replicas_ready,
-                        replicas_available = EXCLUDED.replicas_available,
-                        replicas_unavailable = EXCLUDED.replicas_unavailable,
-                        containers = EXCLUDED.containers,
-                        status = EXCLUDED.status,
-                        health_status = EXCLUDED.health_status,
-                        labels = EXCLUDED.labels,
-                        annotations = EXCLUDED.annotations,
-                        last_sync_at = NOW(),
-                        updated_at = NOW()
-                """, cluster_id, namespace_id, org_id,
-                    deploy.metadata.name, deploy.metadata.uid,
-                    desired, deploy.status.replicas, ready,
-                    deploy.status.available_replicas, deploy.status.unavailable_replicas,
-                    json.dumps(containers), 'Running', health_status,
-                    deploy.spec.strategy.type if deploy.spec.strategy else None,
-                    json.dumps(deploy.metadata.labels or {}),
-                    json.dumps(deploy.metadata.annotations or {}))
-                
-                total_pods += ready
-            
-            # Update cluster deployment and pod counts
+    async def _reconcile_deleted(self, conn, watcher, cluster_id) -> int:
+        """Mark rows the inventory no longer has as Deleted"""
+        store = watcher.store
+        results = [
             await conn.execute("""
-                UPDATE k8s_clusters
-                SET total_deployments = $2, total_pods = $3
-                WHERE id = $1
-            """, cluster_id, len(deployments.items), total_pods)
-            
-            logger.debug(f"Synced {len(deployments.items)} deployments for cluster {cluster_id}")
-        
-        except Exception as e:
-            logger.error(f"Failed to sync deployments: {e}")
+                UPDATE k8s_namespaces
+                SET status = 'Deleted', updated_at = NOW()
+                WHERE cluster_id = $1 AND status <> 'Deleted' AND NOT (name = ANY($2::text[]))
+            """, cluster_id, store.keys('namespaces')),
+            await conn.execute("""
+                UPDATE k8s_nodes
+                SET status = 'Deleted', updated_at = NOW()
+                WHERE cluster_id = $1 AND status <> 'Deleted' AND NOT (name = ANY($2::text[]))
+            """, cluster_id, store.keys('nodes')),
+            await conn.execute("""
+                UPDATE k8s_deployments d
+                SET status = 'Deleted', updated_at = NOW()
+                FROM k8s_namespaces n
+                WHERE d.namespace_id = n.id AND d.cluster_id = $1 AND d.status <> 'Deleted'
+                  AND NOT (n.name || '/' || d.name = ANY($2::text[]))
+            """, cluster_id, [f"{namespace}/{name}" for namespace, name in store.keys('deployments')]),
+        ]
+        return sum(int(r.split()[-1]) for r in results if r and r.split()[-1].isdigit())
     
     async def cleanup(self):
-        """Cleanup resources"""
-        pass
+        """Stop all cluster watchers"""
+        watcher_registry.stop_all()
@@ -0,0 +1,481 @@
+"""
+Epic 16: Kubernetes Integration - Watch-based Inventory
+
+Keeps an in-memory copy of each cluster's namespaces, nodes and
+deployments current with list+watch informers, so a sync only has to
+write what changed since the last one:
+
+- Every cluster gets its own ApiClient built from its kubeconfig; the
+  process-global kubernetes configuration is never touched, so clusters
+  synced concurrently cannot pick up each other's credentials
+- Each resource kind is listed once, then watched from the list's
+  resourceVersion; the watch resumes from the last seen version and only
+  relists when the server answers 410 Gone
+- Objects are reduced to the columns stored in Postgres and
+  fingerprinted; events that leave the stored row unchanged (status
+  heartbeats, managedFields churn, ...) are dropped
+- InventoryStore.drain() returns the changed and deleted keys since the
+  previous drain, and requeue() puts them back if the write failed
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+import yaml
+from kubernetes import client, config, watch
+from kubernetes.client.rest import ApiException
+
+logger = logging.getLogger(__name__)
+
+HTTP_GONE = 410
+WATCH_TIMEOUT_SECONDS = 300
+COMPONENT_CHECK_INTERVAL = 300
+INITIAL_SYNC_TIMEOUT = 60
+MAX_BACKOFF_SECONDS = 60
+
+
+# =========================================================================
+# Row extraction
+# =========================================================================
+
+def namespace_row(ns) -> Dict[str, Any]:
+    """Columns of k8s_namespaces for a V1Namespace"""
+    labels = ns.metadata.labels or {}
+    return {
+        'name': ns.metadata.name,
+        'uid': ns.metadata.uid,
+        'status': ns.status.phase if ns.status else None,
+        'team_name': labels.get('team', labels.get('owner')),
+        'cost_center': labels.get('cost-center', labels.get('costCenter')),
+        'labels': labels,
+    }
+
+
+def node_row(node) -> Dict[str, Any]:
+    """Columns of k8s_nodes for a V1Node"""
+    conditions = node.status.conditions or []
+    ready_condition = next((c for c in conditions if c.type == 'Ready'), None)
+    labels = node.metadata.labels or {}
+    capacity = node.status.capacity or {}
+    allocatable = node.status.allocatable or {}
+    return {
+        'name': node.metadata.name,
+        'uid': node.metadata.uid,
+        'node_type': 'master' if 'node-role.kubernetes.io/master' in labels else 'worker',
+        'instance_type': labels.get('node.kubernetes.io/instance-type',
+                                    labels.get('beta.kubernetes.io/instance-type', 'unknown')),
+        'cpu_capacity': capacity.get('cpu'),
+        'memory_capacity': capacity.get('memory'),
+        'pod_capacity': capacity.get('pods'),
+        'cpu_allocatable': allocatable.get('cpu'),
+        'memory_allocatable': allocatable.get('memory'),
+        'status': 'Ready' if ready_condition and ready_condition.status == 'True' else 'NotReady',
+        # Heartbeat timestamps change every few seconds; keep them out of
+        # the row so they do not count as changes
+        'conditions': [
+            {'type': c.type, 'status': c.status, 'reason': c.reason, 'message': c.message}
+            for c in conditions
+        ],
+        'labels': labels,
+    }
+
+
+def deployment_row(deploy) -> Dict[str, Any]:
+    """Columns of k8s_deployments for a V1Deployment"""
+    containers = [
+        {
+            'name': c.name,
+            'image': c.image,
+            'resources': {
+                'requests': c.resources.requests if c.resources and c.resources.requests else {},
+                'limits': c.resources.limits if c.resources and c.resources.limits else {}
+            }
+        }
+        for c in deploy.spec.template.spec.containers
+    ]
+
+    ready = deploy.status.ready_replicas or 0
+    desired = deploy.spec.replicas or 0
+    if ready == desired and ready > 0:
+        health_status = 'healthy'
+    elif ready >= desired * 0.5:
+        health_status = 'degraded'
+    else:
+        health_status = 'failed'
+
+    return {
+        'namespace': deploy.metadata.namespace,
+        'name': deploy.metadata.name,
+        'uid': deploy.metadata.uid,
+        'replicas_desired': desired,
+        'replicas_current': deploy.status.replicas,
+        'replicas_ready': ready,
+        'replicas_available': deploy.status.available_replicas,
+        'replicas_unavailable': deploy.status.unavailable_replicas,
+        'containers': containers,
+        'health_status': health_status,
+        'strategy': deploy.spec.strategy.type if deploy.spec.strategy else None,
+        'labels': deploy.metadata.labels or {},
+        'annotations': deploy.metadata.annotations or {},
+    }
+
+
+def _name_key(obj) -> Hashable:
+    return obj.metadata.name
+
+
+def _namespaced_key(obj) -> Hashable:
+    return (obj.metadata.namespace, obj.metadata.name)
+
+
+# kind -> (api class, list method, key function, row function)
+RESOURCE_KINDS: Dict[str, Tuple[Any, str, Callable, Callable]] = {
+    'namespaces': (client.CoreV1Api, 'list_namespace', _name_key, namespace_row),
+    'nodes': (client.CoreV1Api, 'list_node', _name_key, node_row),
+    'deployments': (client.AppsV1Api, 'list_deployment_for_all_namespaces', _namespaced_key, deployment_row),
+}
+
+
+def new_api_client(kubeconfig_content: str) -> client.ApiClient:
+    """ApiClient for one cluster, independent of the global kube config"""
+    return config.new_client_from_config_dict(
+        yaml.safe_load(kubeconfig_content), persist_config=False
+    )
+
+
+# =========================================================================
+# Inventory store
+# =========================================================================
+
+@dataclass
+class InventoryDelta:
+    """Rows changed and keys deleted since the previous drain"""
+    changed: Dict[str, Dict[Hashable, Dict[str, Any]]] = field(default_factory=dict)
+    deleted: Dict[str, Set[Hashable]] = field(default_factory=dict)
+
+    @property
+    def size(self) -> int:
+        return sum(map(len, self.changed.values())) + sum(map(len, self.deleted.values()))
+
+
+def _fingerprint(row: Dict[str, Any]) -> bytes:
+    return hashlib.blake2b(
+        json.dumps(row, sort_keys=True, default=str).encode(), digest_size=16
+    ).digest()
+
+
+class InventoryStore:
+    """Thread-safe current state per kind plus the keys dirtied since the last drain"""
+
+    def __init__(self, kinds: Iterable[str] = RESOURCE_KINDS):
+        self._lock = threading.Lock()
+        self._rows: Dict[str, Dict[Hashable, Dict[str, Any]]] = {k: {} for k in kinds}
+        self._fingerprints: Dict[str, Dict[Hashable, bytes]] = {k: {} for k in self._rows}
+        self._dirty: Dict[str, Set[Hashable]] = {k: set() for k in self._rows}
+        self._deleted: Dict[str, Set[Hashable]] = {k: set() for k in self._rows}
+
+    def upsert(self, kind: str, key: Hashable, row: Dict[str, Any]) -> bool:
+        """Store a row; True if it differs from what was stored"""
+        fingerprint = _fingerprint(row)
+        with self._lock:
+            return self._upsert(kind, key, row, fingerprint)
+
+    def _upsert(self, kind, key, row, fingerprint) -> bool:
+        self._rows[kind][key] = row
+        if self._fingerprints[kind].get(key) == fingerprint:
+            return False
+        self._fingerprints[kind][key] = fingerprint
+        self._dirty[kind].add(key)
+        self._deleted[kind].discard(key)
+        return True
+
+    def delete(self, kind: str, key: Hashable) -> bool:
+        with self._lock:
+            return self._delete(kind, key)
+
+    def _delete(self, kind, key) -> bool:
+        if self._rows[kind].pop(key, None) is None:
+            return False
+        self._fingerprints[kind].pop(key, None)
+        self._dirty[kind].discard(key)
+        self._deleted[kind].add(key)
+        return True
+
+    def replace(self, kind: str, rows: Dict[Hashable, Dict[str, Any]]) -> int:
+        """Adopt a full (re)list: changed rows become dirty, missing ones deleted"""
+        fingerprints = {key: _fingerprint(row) for key, row in rows.items()}
+        changes = 0
+        with self._lock:
+            for key in set(self._rows[kind]) - set(rows):
+                changes += self._delete(kind, key)
+            for key, row in rows.items():
+                changes += self._upsert(kind, key, row, fingerprints[key])
+        return changes
+
+    def drain(self) -> InventoryDelta:
+        delta = InventoryDelta()
+        with self._lock:
+            for kind, keys in self._dirty.items():
+                delta.changed[kind] = {key: self._rows[kind][key] for key in keys}
+                keys.clear()
+            for kind, keys in self._deleted.items():
+                delta.deleted[kind] = set(keys)
+                keys.clear()
+        return delta
+
+    def requeue(self, delta: InventoryDelta, kinds: Optional[Iterable[str]] = None):
+        """Mark a delta's keys dirty again (e.g. after a failed write)"""
+        with self._lock:
+            for kind in kinds or delta.changed:
+                for key in delta.changed.get(kind, ()):
+                    if key in self._rows[kind]:
+                        self._dirty[kind].add(key)
+            for kind in kinds or delta.deleted:
+                for key in delta.deleted.get(kind, ()):
+                    if key not in self._rows[kind]:
+                        self._deleted[kind].add(key)
+
+    def mark_dirty(self, kind: str, keys: Iterable[Hashable]):
+        with self._lock:
+            self._dirty[kind].update(k for k in keys if k in self._rows[kind])
+
+    def rows(self, kind: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._rows[kind].values())
+
+    def keys(self, kind: str) -> List[Hashable]:
+        with self._lock:
+            return list(self._rows[kind])
+
+    def count(self, kind: str) -> int:
+        return len(self._rows[kind])
+
+
+# =========================================================================
+# Informers
+# =========================================================================
+
+class ResourceInformer:
+    """List+watch loop for one resource kind, run in its own thread"""
+
+    def __init__(self, kind: str, list_func: Callable, store: InventoryStore,
+                 key_func: Callable, row_func: Callable,
+                 watch_timeout: int = WATCH_TIMEOUT_SECONDS):
+        self.kind = kind
+        self.list_func = list_func
+        self.store = store
+        self.key_func = key_func
+        self.row_func = row_func
+        self.watch_timeout = watch_timeout
+
+        self.resource_version: Optional[str] = None
+        self.synced = threading.Event()
+        self.last_error: Optional[str] = None
+        self.stats = {'lists': 0, 'events': 0, 'changes': 0}
+
+        self._stop = threading.Event()
+        self._watch: Optional[watch.Watch] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, name: str):
+        self._thread = threading.Thread(target=self.run, name=name, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._watch is not None:
+            self._watch.stop()
+
+    @property
+    def alive(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def list(self):
+        response = self.list_func()
+        rows = {self.key_func(obj): self.row_func(obj) for obj in response.items}
+        self.stats['changes'] += self.store.replace(self.kind, rows)
+        self.stats['lists'] += 1
+        self.resource_version = response.metadata.resource_version
+        self.synced.set()
+
+    def apply(self, event: Dict[str, Any]):
+        """Apply one watch event to the store"""
+        obj = event['object']
+        event_type = event['type']
+        self.resource_version = obj.metadata.resource_version
+        if event_type == 'BOOKMARK':
+            return
+        self.stats['events'] += 1
+        key = self.key_func(obj)
+        if event_type == 'DELETED':
+            changed = self.store.delete(self.kind, key)
+        else:
+            changed = self.store.upsert(self.kind, key, self.row_func(obj))
+        self.stats['changes'] += changed
+
+    def run(self):
+        backoff = 1
+        while not self._stop.is_set():
+            try:
+                if self.resource_version is None:
+                    self.list()
+                self._watch = watch.Watch()
+                for event in self._watch.stream(
+                    self.list_func,
+                    resource_version=self.resource_version,
+                    timeout_seconds=self.watch_timeout,
+                    allow_watch_bookmarks=True,
+                ):
+                    self.apply(event)
+                    if self._stop.is_set():
+                        break
+                backoff = 1
+                self.last_error = None
+            except ApiException as e:
+                if e.status == HTTP_GONE:
+                    logger.info(f"K8s {self.kind} watch expired, relisting")
+                    self.resource_version = None
+                    continue
+                self._failed(e)
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, MAX_BACKOFF_SECONDS)
+            except Exception as e:
+                self._failed(e)
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, MAX_BACKOFF_SECONDS)
+
+    def _failed(self, error: Exception):
+        self.last_error = str(error)
+        logger.warning(f"K8s {self.kind} informer error: {error}")
+
+
+class ClusterWatcher:
+    """Informers for one cluster sharing an isolated ApiClient and one store"""
+
+    def __init__(self, cluster_id: Any, kubeconfig_content: str,
+                 watch_timeout: int = WATCH_TIMEOUT_SECONDS):
+        self.cluster_id = cluster_id
+        self.api_client = new_api_client(kubeconfig_content)
+        self.store = InventoryStore()
+        self.informers: Dict[str, ResourceInformer] = {}
+        for kind, (api_class, method, key_func, row_func) in RESOURCE_KINDS.items():
+            api = api_class(self.api_client)
+            self.informers[kind] = ResourceInformer(
+                kind, getattr(api, method), self.store, key_func, row_func, watch_timeout
+            )
+
+        # State the sync keeps alongside the inventory
+        self.namespace_ids: Dict[str, Tuple[Any, Any]] = {}  # name -> (id, organization_id)
+        self.reconciled = False
+        self.components_healthy = True
+        self.components_checked_at = 0.0
+        self.sync_lock = asyncio.Lock()
+        self._started = False
+
+    async def start(self, timeout: float = INITIAL_SYNC_TIMEOUT):
+        """Start the informers and wait for every kind's initial list"""
+        if not self._started:
+            for kind, informer in self.informers.items():
+                informer.start(f"k8s-{kind}-{self.cluster_id}")
+            self._started = True
+
+        deadline = time.monotonic() + timeout
+        for informer in self.informers.values():
+            remaining = max(deadline - time.monotonic(), 0)
+            if not await asyncio.to_thread(informer.synced.wait, remaining):
+                raise RuntimeError(
+                    f"Initial {informer.kind} list did not complete: {informer.last_error or 'timeout'}"
+                )
+
+    def stop(self):
+        for informer in self.informers.values():
+            informer.stop()
+        try:
+            self.api_client.close()
+        except Exception:
+            pass
+
+    @property
+    def alive(self) -> bool:
+        return self._started and all(i.alive for i in self.informers.values())
+
+    async def check_components(self) -> bool:
+        """Control plane component health, refreshed every COMPONENT_CHECK_INTERVAL"""
+        if time.monotonic() - self.components_checked_at >= COMPONENT_CHECK_INTERVAL:
+            v1 = client.CoreV1Api(self.api_client)
+            try:
+                components = await asyncio.to_thread(v1.list_component_status)
+                self.components_healthy = all(
+                    c.conditions and any(cond.type == 'Healthy' and cond.status == 'True'
+                                         for cond in c.conditions)
+                    for c in components.items
+                )
+            except Exception as e:
+                logger.debug(f"Component status unavailable for cluster {self.cluster_id}: {e}")
+            self.components_checked_at = time.monotonic()
+        return self.components_healthy
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            kind: {
+                **informer.stats,
+                'objects': self.store.count(kind),
+                'resource_version': informer.resource_version,
+                'last_error': informer.last_error,
+                'alive': informer.alive,
+            }
+            for kind, informer in self.informers.items()
+        }
+
+
+class WatcherRegistry:
+    """Process-wide ClusterWatchers, shared by every KubernetesClusterManager"""
+
+    def __init__(self):
+        self._watchers: Dict[Any, Tuple[str, ClusterWatcher]] = {}
+        self._locks: Dict[Any, asyncio.Lock] = {}
+
+    async def get(self, cluster_id: Any, kubeconfig_encrypted: str,
+                  decrypt: Callable[[str], str]) -> ClusterWatcher:
+        """Running watcher for the cluster; rebuilt if its kubeconfig changed or it died"""
+        lock = self._locks.setdefault(cluster_id, asyncio.Lock())
+        async with lock:
+            entry = self._watchers.get(cluster_id)
+            if entry is not None:
+                secret, watcher = entry
+                if secret == kubeconfig_encrypted and watcher.alive:
+                    return watcher
+                watcher.stop()
+                del self._watchers[cluster_id]
+
+            watcher = ClusterWatcher(cluster_id, decrypt(kubeconfig_encrypted))
+            try:
+                await watcher.start()
+            except Exception:
+                watcher.stop()
+                raise
+            self._watchers[cluster_id] = (kubeconfig_encrypted, watcher)
+            return watcher
+
+    def retain(self, cluster_ids: Iterable[Any]):
+        """Stop watchers for clusters that are no longer synced"""
+        keep = set(cluster_ids)
+        for cluster_id in [c for c in self._watchers if c not in keep]:
+            self._watchers.pop(cluster_id)[1].stop()
+            self._locks.pop(cluster_id, None)
+
+    def stop_all(self):
+        self.retain(())
+
+    def stats(self) -> Dict[str, Any]:
+        return {str(cluster_id): watcher.stats() for cluster_id, (_, watcher) in self._watchers.items()}
+
+
+# Global instance
+watcher_registry = WatcherRegistry()
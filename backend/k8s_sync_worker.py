@@ -2,7 +2,7 @@
 Epic 16: Kubernetes Integration - Sync Worker
 
 Background worker to synchronize Kubernetes clusters.
-Runs every 30 seconds to keep cluster state up-to-date.
+Runs every 30 seconds to write each cluster's watched inventory changes.
 """
 
 import asyncio
@@ -11,6 +11,7 @@ from datetime import datetime
 from typing import Optional
 
 from k8s_cluster_manager import KubernetesClusterManager
+from k8s_inventory import watcher_registry
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +25,7 @@ class KubernetesSyncWorker:
     - Batch processes multiple clusters (5 at a time)
     - Per-cluster error handling (doesn't fail entire batch)
     - Health status tracking
+    - Stops the watchers of clusters that are no longer active
     - Graceful shutdown
     """
     
@@ -75,6 +77,7 @@ class KubernetesSyncWorker:
             except asyncio.CancelledError:
                 pass
         
+        await self.k8s_manager.cleanup()
         logger.info("✅ K8s sync worker stopped")
     
     async def _run(self):
@@ -104,6 +107,8 @@ class KubernetesSyncWorker:
                     ORDER BY last_sync_at NULLS FIRST, id
                 """)
             
+            watcher_registry.retain(cluster['id'] for cluster in clusters)
+            
             if not clusters:
                 logger.debug("No active K8s clusters to sync")
                 return
@@ -169,7 +174,8 @@ class KubernetesSyncWorker:
         return {
             **self.stats,
             'running': self.running,
-            'interval': self.interval
+            'interval': self.interval,
+            'watchers': watcher_registry.stats()
         }
 
 
@@ -27,6 +27,7 @@ import stripe
 
 from litellm_credit_system import CreditSystem, POWER_LEVELS
 from byok_manager import BYOKManager
+from model_list_cache import model_list_cache
 from usage_metering import usage_meter
 from cryptography.fernet import Fernet
 
@@ -2219,68 +2220,48 @@ CURATED_MODELS = [
 ]
 
 
-async def get_curated_models_from_db(request: Request, app_slug: str = None, user_tier: str = None):
+CURATED_TIER_COLUMNS = {
+    'trial', 'starter', 'professional', 'enterprise', 'vip_founder', 'byok'
+}
+
+
+async def get_curated_models_from_db(db_pool, app_slug: str = None, user_tier: str = None):
     """Fetch curated models from database for the specified app."""
     try:
-        db_pool = request.app.state.db_pool
         if not db_pool:
             return None
 
-        async with db_pool.acquire() as conn:
-            list_row = None
-
-            # Find the list (app-specific or global)
-            if app_slug:
-                list_query = """
-                    SELECT id, name, slug FROM app_model_lists
-                    WHERE (slug = $1 OR app_identifier = $1) AND is_active = TRUE
-                    ORDER BY is_default DESC LIMIT 1
-                """
-                list_row = await conn.fetchrow(list_query, app_slug)
-
-            if not list_row:
-                # Fall back to global list
-                list_query = "SELECT id, name, slug FROM app_model_lists WHERE slug = 'global' AND is_active = TRUE"
-                list_row = await conn.fetchrow(list_query)
+        # Unknown tiers see the whole list
+        tier_filter = ""
+        if user_tier:
+            tier_key = user_tier.replace('-', '_').replace(' ', '_').lower()
+            if tier_key in CURATED_TIER_COLUMNS:
+                tier_filter = f"AND i.tier_{tier_key}"
 
-            if not list_row:
+        async with db_pool.acquire() as conn:
+            # Find the list (app-specific, else global) and its models in one round trip
+            rows = await conn.fetch(f"""
+                WITH chosen AS (
+                    SELECT id FROM app_model_lists
+                    WHERE is_active = TRUE
+                      AND ((slug = $1 OR app_identifier = $1) OR slug = 'global')
+                    ORDER BY (slug = $1 OR app_identifier = $1) DESC, is_default DESC
+                    LIMIT 1
+                )
+                SELECT i.model_id, i.display_name, i.description, i.category, i.is_free,
+                       i.context_length
+                FROM chosen
+                LEFT JOIN app_model_list_items i
+                  ON i.list_id = chosen.id
+                 {tier_filter}
+                ORDER BY i.sort_order ASC
+            """, app_slug or 'global')
+
+            if not rows:
                 return None  # No database list, use hardcoded
 
-            # Get models from the list
-            models_query = """
-                SELECT model_id, display_name, description, category, is_free, context_length,
-                       tier_trial, tier_starter, tier_professional, tier_enterprise,
-                       tier_vip_founder, tier_byok
-                FROM app_model_list_items
-                WHERE list_id = $1
-                ORDER BY sort_order ASC
-            """
-
-            rows = await conn.fetch(models_query, list_row['id'])
-
-            models = []
-            for row in rows:
-                # Apply tier filtering if specified
-                if user_tier:
-                    tier_col_name = f"tier_{user_tier.replace('-', '_').replace(' ', '_').lower()}"
-                    tier_enabled = True
-                    if tier_col_name == 'tier_trial':
-                        tier_enabled = row['tier_trial']
-                    elif tier_col_name == 'tier_starter':
-                        tier_enabled = row['tier_starter']
-                    elif tier_col_name == 'tier_professional':
-                        tier_enabled = row['tier_professional']
-                    elif tier_col_name == 'tier_enterprise':
-                        tier_enabled = row['tier_enterprise']
-                    elif tier_col_name == 'tier_vip_founder':
-                        tier_enabled = row['tier_vip_founder']
-                    elif tier_col_name == 'tier_byok':
-                        tier_enabled = row['tier_byok']
-
-                    if not tier_enabled:
-                        continue
-
-                models.append({
+            return [
+                {
                     'id': row['model_id'],
                     'object': 'model',
                     'name': row['display_name'] or row['model_id'],
@@ -2289,15 +2270,54 @@ async def get_curated_models_from_db(request: Request, app_slug: str = None, use
                     'category': row['category'] or 'general',
                     'description': row['description'],
                     'free': row['is_free'] if row['is_free'] is not None else False
-                })
-
-            return models
+                }
+                for row in rows
+                if row['model_id'] is not None
+            ]
 
     except Exception as e:
         logger.error(f"Error fetching curated models from database: {e}")
         return None
 
 
+async def build_curated_models(db_pool, app: Optional[str], tier: Optional[str]) -> Dict:
+    """Curated model list response body for an app and tier"""
+    db_models = await get_curated_models_from_db(db_pool, app, tier)
+
+    if db_models is not None and len(db_models) > 0:
+        models = db_models
+        source = 'database'
+    else:
+        # Fall back to hardcoded CURATED_MODELS
+        models = CURATED_MODELS
+        source = 'hardcoded'
+
+    # Group models by category
+    by_category = {}
+    for model in models:
+        category = model.get('category', 'general')
+        if category not in by_category:
+            by_category[category] = []
+        by_category[category].append(model)
+
+    # Count FREE models
+    free_count = sum(1 for m in models if m.get('free', False))
+
+    return {
+        'object': 'list',
+        'data': models,
+        'by_category': by_category,
+        'app': app,
+        'source': source,
+        'summary': {
+            'total': len(models),
+            'free_count': free_count,
+            'categories': list(by_category.keys()),
+            'last_updated': datetime.now().isoformat()
+        }
+    }
+
+
 @router.get("/models/curated")
 async def list_curated_models(
     request: Request,
@@ -2316,51 +2336,64 @@ async def list_curated_models(
 
     Use these models as the default for "Unicorn Commander (Curated)" provider.
     For access to all 1,300+ models, use /models/categorized endpoint.
+
+    Served from the materialized model list cache (ETag / If-None-Match).
     """
     try:
-        # Try to get from database first
-        db_models = await get_curated_models_from_db(request, app, tier)
+        db_pool = getattr(request.app.state, 'db_pool', None)
+        return await model_list_cache.respond(
+            request,
+            ('curated', app, tier.lower() if tier else None),
+            lambda: build_curated_models(db_pool, app, tier)
+        )
 
-        if db_models is not None and len(db_models) > 0:
-            models = db_models
-            source = 'database'
-        else:
-            # Fall back to hardcoded CURATED_MODELS
-            models = CURATED_MODELS
-            source = 'hardcoded'
+    except Exception as e:
+        logger.error(f"Error listing curated models: {e}")
+        raise HTTPException(status_code=500, detail="Failed to list curated models")
 
-        # Group models by category
-        by_category = {}
-        for model in models:
-            category = model.get('category', 'general')
-            if category not in by_category:
-                by_category[category] = []
-            by_category[category].append(model)
 
-        # Count FREE models
-        free_count = sum(1 for m in models if m.get('free', False))
+# Models by tier; each tier also sees every lower tier's models
+MODELS_BY_TIER = {
+    'free': [
+        {'id': 'llama3-8b-local', 'object': 'model', 'owned_by': 'local', 'tier': 'free'},
+        {'id': 'qwen-32b-local', 'object': 'model', 'owned_by': 'local', 'tier': 'free'},
+        {'id': 'llama3-70b-groq', 'object': 'model', 'owned_by': 'groq', 'tier': 'free'},
+        {'id': 'mixtral-8x7b-hf', 'object': 'model', 'owned_by': 'huggingface', 'tier': 'free'},
+    ],
+    'starter': [
+        {'id': 'mixtral-8x22b-together', 'object': 'model', 'owned_by': 'together', 'tier': 'starter'},
+        {'id': 'llama3-70b-deepinfra', 'object': 'model', 'owned_by': 'deepinfra', 'tier': 'starter'},
+        {'id': 'qwen-72b-fireworks', 'object': 'model', 'owned_by': 'fireworks', 'tier': 'starter'},
+    ],
+    'professional': [
+        {'id': 'claude-3.5-sonnet-openrouter', 'object': 'model', 'owned_by': 'openrouter', 'tier': 'professional'},
+        {'id': 'gpt-4o-openrouter', 'object': 'model', 'owned_by': 'openrouter', 'tier': 'professional'},
+    ],
+    'enterprise': [
+        {'id': 'claude-3.5-sonnet', 'object': 'model', 'owned_by': 'anthropic', 'tier': 'enterprise'},
+        {'id': 'gpt-4o', 'object': 'model', 'owned_by': 'openai', 'tier': 'enterprise'},
+    ]
+}
+TIER_ORDER = ['free', 'starter', 'professional', 'enterprise']
 
-        return {
-            'object': 'list',
-            'data': models,
-            'by_category': by_category,
-            'app': app,
-            'source': source,
-            'summary': {
-                'total': len(models),
-                'free_count': free_count,
-                'categories': list(by_category.keys()),
-                'last_updated': datetime.now().isoformat()
-            }
-        }
 
-    except Exception as e:
-        logger.error(f"Error listing curated models: {e}")
-        raise HTTPException(status_code=500, detail="Failed to list curated models")
+async def build_tier_models(tier: str) -> Dict:
+    """OpenAI-compatible model list response body for a tier"""
+    user_tier_index = TIER_ORDER.index(tier) if tier in TIER_ORDER else 0
+
+    available_models = []
+    for i in range(user_tier_index + 1):
+        available_models.extend(MODELS_BY_TIER.get(TIER_ORDER[i], []))
+
+    return {
+        'object': 'list',
+        'data': available_models
+    }
 
 
 @router.get("/models")
 async def list_models(
+    request: Request,
     user_id: str = Depends(get_user_id),
     credit_system: CreditSystem = Depends(get_credit_system)
 ):
@@ -2371,42 +2404,12 @@ async def list_models(
     """
     try:
         tier = await credit_system.get_user_tier(user_id)
+        if tier not in TIER_ORDER:
+            tier = 'free'
 
-        # Define models by tier
-        models_by_tier = {
-            'free': [
-                {'id': 'llama3-8b-local', 'object': 'model', 'owned_by': 'local', 'tier': 'free'},
-                {'id': 'qwen-32b-local', 'object': 'model', 'owned_by': 'local', 'tier': 'free'},
-                {'id': 'llama3-70b-groq', 'object': 'model', 'owned_by': 'groq', 'tier': 'free'},
-                {'id': 'mixtral-8x7b-hf', 'object': 'model', 'owned_by': 'huggingface', 'tier': 'free'},
-            ],
-            'starter': [
-                {'id': 'mixtral-8x22b-together', 'object': 'model', 'owned_by': 'together', 'tier': 'starter'},
-                {'id': 'llama3-70b-deepinfra', 'object': 'model', 'owned_by': 'deepinfra', 'tier': 'starter'},
-                {'id': 'qwen-72b-fireworks', 'object': 'model', 'owned_by': 'fireworks', 'tier': 'starter'},
-            ],
-            'professional': [
-                {'id': 'claude-3.5-sonnet-openrouter', 'object': 'model', 'owned_by': 'openrouter', 'tier': 'professional'},
-                {'id': 'gpt-4o-openrouter', 'object': 'model', 'owned_by': 'openrouter', 'tier': 'professional'},
-            ],
-            'enterprise': [
-                {'id': 'claude-3.5-sonnet', 'object': 'model', 'owned_by': 'anthropic', 'tier': 'enterprise'},
-                {'id': 'gpt-4o', 'object': 'model', 'owned_by': 'openai', 'tier': 'enterprise'},
-            ]
-        }
-
-        # Collect all models up to user's tier
-        tier_order = ['free', 'starter', 'professional', 'enterprise']
-        user_tier_index = tier_order.index(tier) if tier in tier_order else 0
-
-        available_models = []
-        for i in range(user_tier_index + 1):
-            available_models.extend(models_by_tier.get(tier_order[i], []))
-
-        return {
-            'object': 'list',
-            'data': available_models
-        }
+        return await model_list_cache.respond(
+            request, ('models', tier), lambda: build_tier_models(tier)
+        )
 
     except Exception as e:
         logger.error(f"Error listing models: {e}")
@@ -2470,8 +2473,164 @@ def get_model_pricing(model_id: str, model_info: dict, tier_markup: float) -> di
         }
 
 
+async def get_tier_markup(db_pool, user_tier: str) -> float:
+    """LLM markup percentage for a subscription tier (0 when unknown)"""
+    try:
+        async with db_pool.acquire() as conn:
+            tier_result = await conn.fetchrow(
+                "SELECT llm_markup_percentage FROM subscription_tiers WHERE tier_code = $1",
+                user_tier
+            )
+            if tier_result:
+                return float(tier_result['llm_markup_percentage'])
+    except Exception as e:
+        logger.warning(f"Failed to fetch tier markup for {user_tier}: {e}")
+    return 0.0
+
+
+async def build_categorized_models(db_pool, user_tier: Optional[str], byok_provider_names: frozenset) -> Dict:
+    """
+    Categorized model list response body
+
+    user_tier is None for unauthenticated requests (no markup, no BYOK).
+    """
+    tier_markup = await get_tier_markup(db_pool, user_tier) if user_tier else 0.0
+    if user_tier:
+        logger.info(f"Tier {user_tier} has markup {tier_markup}%")
+
+    # Fetch models from database
+    async with db_pool.acquire() as conn:
+        # Query models with provider information
+        query = """
+            SELECT 
+                m.id,
+                m.name,
+                m.display_name,
+                m.cost_per_1m_input_tokens,
+                m.cost_per_1m_output_tokens,
+                m.context_length,
+                m.enabled,
+                m.avg_latency_ms,
+                m.power_level,
+                m.quality_score,
+                p.id as provider_id,
+                p.name as provider_name,
+                p.type as provider_type,
+                p.enabled as provider_enabled
+            FROM llm_models m
+            JOIN llm_providers p ON m.provider_id = p.id
+            WHERE m.enabled = true
+            ORDER BY p.name, m.name
+        """
+        rows = await conn.fetch(query)
+        
+    logger.info(f"Fetched {len(rows)} models from database")
+
+    # Group models by provider
+    provider_models = {}
+    for row in rows:
+        provider_key = (row['provider_type'] or row['provider_name']).lower()
+        
+        if provider_key not in provider_models:
+            provider_models[provider_key] = {
+                'provider': row['provider_name'],
+                'provider_type': provider_key,
+                'models': [],
+                'provider_id': str(row['provider_id'])
+            }
+        
+        # Build model info
+        model_info = {
+            'id': row['name'],  # Use name as id for compatibility
+            'object': 'model',
+            'name': row['name'],
+            'display_name': row['display_name'] or row['name'],
+            'created': 0,
+            'context_length': row['context_length'] or 0,
+            'enabled': row['enabled'],
+            'provider': row['provider_name'],
+            'provider_type': provider_key
+        }
+        
+        # Add pricing if available
+        if row['cost_per_1m_input_tokens'] is not None:
+            model_info['cost_per_1m_input'] = float(row['cost_per_1m_input_tokens'])
+            model_info['cost_per_1m_output'] = float(row['cost_per_1m_output_tokens'] or 0)
+            
+            # Add tier markup for platform models
+            input_cost = float(row['cost_per_1m_input_tokens'])
+            output_cost = float(row['cost_per_1m_output_tokens'] or 0)
+            markup_multiplier = 1 + (tier_markup / 100.0)
+            
+            model_info['tier_pricing'] = {
+                'input': input_cost * markup_multiplier,
+                'output': output_cost * markup_multiplier,
+                'markup_percentage': tier_markup
+            }
+        
+        # Add performance metrics if available
+        if row['avg_latency_ms'] is not None:
+            model_info['avg_latency_ms'] = float(row['avg_latency_ms'])
+        if row['power_level'] is not None:
+            # power_level can be string (eco, balanced, precision) or int
+            model_info['power_level'] = str(row['power_level'])
+        if row['quality_score'] is not None:
+            model_info['quality_score'] = float(row['quality_score'])
+        
+        provider_models[provider_key]['models'].append(model_info)
+
+    # Categorize by BYOK vs Platform
+    byok_models = []
+    platform_models = []
+
+    for provider_key, provider_data in provider_models.items():
+        models_list = provider_data['models']
+        if not models_list:
+            continue
+
+        provider_display = provider_data['provider']
+        is_byok = provider_key in byok_provider_names
+
+        provider_info = {
+            'provider': provider_display,
+            'provider_type': provider_key,
+            'models': models_list,
+            'count': len(models_list),
+            'tier_markup': tier_markup if not is_byok else 0
+        }
+
+        if is_byok:
+            provider_info['free'] = True
+            provider_info['note'] = f"Using your {provider_display} API key - no credits charged"
+            provider_info['source'] = 'byok'
+            byok_models.append(provider_info)
+        else:
+            provider_info['note'] = f"Charged with credits from your account (tier markup: {tier_markup}%)"
+            provider_info['source'] = 'platform'
+            platform_models.append(provider_info)
+
+    # Build summary
+    total_byok = sum(p['count'] for p in byok_models)
+    total_platform = sum(p['count'] for p in platform_models)
+
+    logger.info(f"Categorized models: {total_byok} BYOK, {total_platform} platform")
+
+    return {
+        'byok_models': byok_models,
+        'platform_models': platform_models,
+        'summary': {
+            'total_models': total_byok + total_platform,
+            'byok_count': total_byok,
+            'platform_count': total_platform,
+            'has_byok_keys': len(byok_provider_names) > 0,
+            'byok_providers': sorted(byok_provider_names)
+        }
+    }
+
+
 @router.get("/models/categorized")
 async def list_models_categorized(
+    request: Request,
     user_id: Optional[str] = Depends(get_optional_user_id),
     byok_manager: BYOKManager = Depends(get_byok_manager),
     credit_system: CreditSystem = Depends(get_credit_system)
@@ -2482,6 +2641,9 @@ async def list_models_categorized(
     Fetches models from database and categorizes them based on
     user's BYOK providers (OpenRouter, HuggingFace, Groq, etc.)
 
+    One response is materialized per (tier, BYOK provider set) and served
+    with an ETag; If-None-Match requests get a 304.
+
     Returns:
         {
             "byok_models": [...],    # Models using user's API keys (free)
@@ -2490,164 +2652,20 @@ async def list_models_categorized(
         }
     """
     try:
-        # Set defaults for unauthenticated users
-        user_tier = "free"
-        tier_markup = 0.0
-        byok_provider_names = set()
+        # Defaults for unauthenticated users
+        user_tier = None
+        byok_provider_names = frozenset()
 
         # If user is authenticated, get their tier and BYOK providers
         if user_id:
-            # Get user's tier and tier markup percentage
             user_tier = await credit_system.get_user_tier(user_id)
+            byok_provider_names = frozenset(await byok_manager.list_enabled_providers(user_id))
 
-            # Fetch tier markup from database
-            try:
-                async with credit_system.db_pool.acquire() as conn:
-                    tier_result = await conn.fetchrow(
-                        "SELECT llm_markup_percentage FROM subscription_tiers WHERE tier_code = $1",
-                        user_tier
-                    )
-                    if tier_result:
-                        tier_markup = float(tier_result['llm_markup_percentage'])
-                        logger.info(f"User {user_id} tier {user_tier} has markup {tier_markup}%")
-            except Exception as e:
-                logger.warning(f"Failed to fetch tier markup for {user_tier}: {e}")
-                tier_markup = 0.0
-
-            # Get user's BYOK providers
-            byok_providers_list = await byok_manager.list_user_providers(user_id)
-            byok_provider_names = {p['provider'].lower() for p in byok_providers_list if p.get('enabled')}
-        else:
-            logger.info("Unauthenticated request - showing all models as platform models")
-
-        # Fetch models from database
-        async with credit_system.db_pool.acquire() as conn:
-            # Query models with provider information
-            query = """
-                SELECT 
-                    m.id,
-                    m.name,
-                    m.display_name,
-                    m.cost_per_1m_input_tokens,
-                    m.cost_per_1m_output_tokens,
-                    m.context_length,
-                    m.enabled,
-                    m.avg_latency_ms,
-                    m.power_level,
-                    m.quality_score,
-                    p.id as provider_id,
-                    p.name as provider_name,
-                    p.type as provider_type,
-                    p.enabled as provider_enabled
-                FROM llm_models m
-                JOIN llm_providers p ON m.provider_id = p.id
-                WHERE m.enabled = true
-                ORDER BY p.name, m.name
-            """
-            rows = await conn.fetch(query)
-            
-        logger.info(f"Fetched {len(rows)} models from database")
-
-        # Group models by provider
-        provider_models = {}
-        for row in rows:
-            provider_key = (row['provider_type'] or row['provider_name']).lower()
-            
-            if provider_key not in provider_models:
-                provider_models[provider_key] = {
-                    'provider': row['provider_name'],
-                    'provider_type': provider_key,
-                    'models': [],
-                    'provider_id': str(row['provider_id'])
-                }
-            
-            # Build model info
-            model_info = {
-                'id': row['name'],  # Use name as id for compatibility
-                'object': 'model',
-                'name': row['name'],
-                'display_name': row['display_name'] or row['name'],
-                'created': 0,
-                'context_length': row['context_length'] or 0,
-                'enabled': row['enabled'],
-                'provider': row['provider_name'],
-                'provider_type': provider_key
-            }
-            
-            # Add pricing if available
-            if row['cost_per_1m_input_tokens'] is not None:
-                model_info['cost_per_1m_input'] = float(row['cost_per_1m_input_tokens'])
-                model_info['cost_per_1m_output'] = float(row['cost_per_1m_output_tokens'] or 0)
-                
-                # Add tier markup for platform models
-                input_cost = float(row['cost_per_1m_input_tokens'])
-                output_cost = float(row['cost_per_1m_output_tokens'] or 0)
-                markup_multiplier = 1 + (tier_markup / 100.0)
-                
-                model_info['tier_pricing'] = {
-                    'input': input_cost * markup_multiplier,
-                    'output': output_cost * markup_multiplier,
-                    'markup_percentage': tier_markup
-                }
-            
-            # Add performance metrics if available
-            if row['avg_latency_ms'] is not None:
-                model_info['avg_latency_ms'] = float(row['avg_latency_ms'])
-            if row['power_level'] is not None:
-                # power_level can be string (eco, balanced, precision) or int
-                model_info['power_level'] = str(row['power_level'])
-            if row['quality_score'] is not None:
-                model_info['quality_score'] = float(row['quality_score'])
-            
-            provider_models[provider_key]['models'].append(model_info)
-
-        # Categorize by BYOK vs Platform
-        byok_models = []
-        platform_models = []
-
-        for provider_key, provider_data in provider_models.items():
-            models_list = provider_data['models']
-            if not models_list:
-                continue
-
-            provider_display = provider_data['provider']
-            is_byok = provider_key in byok_provider_names
-
-            provider_info = {
-                'provider': provider_display,
-                'provider_type': provider_key,
-                'models': models_list,
-                'count': len(models_list),
-                'tier_markup': tier_markup if not is_byok else 0
-            }
-
-            if is_byok:
-                provider_info['free'] = True
-                provider_info['note'] = f"Using your {provider_display} API key - no credits charged"
-                provider_info['source'] = 'byok'
-                byok_models.append(provider_info)
-            else:
-                provider_info['note'] = f"Charged with credits from your account (tier markup: {tier_markup}%)"
-                provider_info['source'] = 'platform'
-                platform_models.append(provider_info)
-
-        # Build summary
-        total_byok = sum(p['count'] for p in byok_models)
-        total_platform = sum(p['count'] for p in platform_models)
-
-        logger.info(f"Categorized models: {total_byok} BYOK, {total_platform} platform")
-
-        return {
-            'byok_models': byok_models,
-            'platform_models': platform_models,
-            'summary': {
-                'total_models': total_byok + total_platform,
-                'byok_count': total_byok,
-                'platform_count': total_platform,
-                'has_byok_keys': len(byok_provider_names) > 0,
-                'byok_providers': list(byok_provider_names)
-            }
-        }
+        return await model_list_cache.respond(
+            request,
+            ('categorized', user_tier, tuple(sorted(byok_provider_names))),
+            lambda: build_categorized_models(credit_system.db_pool, user_tier, byok_provider_names)
+        )
 
     except Exception as e:
         logger.error(f"Error categorizing models: {e}", exc_info=True)
@@ -3620,6 +3638,7 @@ async def bulk_update_models(
                 updated_count += 1
 
         logger.info(f"Admin {user_id} bulk updated {updated_count} models to enabled={enabled}")
+        await model_list_cache.invalidate("models bulk-updated")
 
         return {
             'success': True,
@@ -3676,6 +3695,7 @@ async def toggle_model_status(
                 """, new_status, model_id)
 
                 logger.info(f"Admin {user_id} set model {model_id} to {'enabled' if new_status else 'disabled'}")
+                await model_list_cache.invalidate(f"model {model_id} toggled")
 
                 return {
                     'success': True,
@@ -3704,6 +3724,7 @@ async def toggle_model_status(
                 """, provider['id'], model_id)
 
                 logger.info(f"Admin {user_id} enabled new model {model_id}")
+                await model_list_cache.invalidate(f"model {model_id} added")
 
                 return {
                     'success': True,
@@ -361,13 +361,13 @@ class CreditSystem:
             # Invalidate cache
             await self.redis.delete(f"credits:balance:{user_id}")
 
+            # Get user's org_id from metadata or database
+            org_id = metadata.get('org_id')
+
             # NEW: Send metering event to Lago (non-blocking)
             try:
                 from lago_integration import record_api_call
 
-                # Get user's org_id from metadata or database
-                org_id = metadata.get('org_id')
-
                 if not org_id:
                     # Query database to get org_id for user
                     async with self.db_pool.acquire() as conn_org:
@@ -412,6 +412,11 @@ class CreditSystem:
                 # Non-blocking: Don't fail credit deduction if Lago is down
                 logger.warning(f"Failed to record Lago event (non-blocking): {e}")
 
+            # Stream the charge into the organization's budget totals
+            from budget_tracker import budget_tracker
+            budget_org_id = user_id[4:] if user_id.startswith('org_') else (org_id or user_id)
+            await budget_tracker.record_spend(budget_org_id, metadata.get('cost', amount))
+
             logger.info(f"Debited {amount} credits from {user_id}. New balance: {new_balance}")
             return new_balance, str(transaction_id)
 
@@ -29,6 +29,8 @@ import psycopg2
 from psycopg2.extras import RealDictCursor, Json
 import redis
 
+from model_list_cache import model_list_cache
+
 logger = logging.getLogger(__name__)
 
 # Router
@@ -509,6 +511,7 @@ async def update_provider(provider_id: str, update: ProviderUpdate):
             raise HTTPException(status_code=404, detail="Provider not found")
 
         conn.commit()
+        await model_list_cache.invalidate(f"provider {provider_id} updated")
 
         return {
             "id": str(result['id']),
@@ -552,6 +555,7 @@ async def delete_provider(provider_id: str):
             raise HTTPException(status_code=404, detail="Provider not found")
 
         conn.commit()
+        await model_list_cache.invalidate(f"provider {provider_id} deleted")
 
         return {"message": "Provider deleted successfully", "id": provider_id}
 
@@ -751,6 +755,7 @@ async def create_model(model: ModelCreate):
 
         result = cursor.fetchone()
         conn.commit()
+        await model_list_cache.invalidate(f"model {model.name} created")
 
         return {
             "id": str(result['id']),
@@ -28,6 +28,7 @@ import httpx
 from auth_dependencies import require_authenticated_user, require_admin_user
 from byok_manager import BYOKManager
 from llm_routing_manager import LLMRoutingManager, PowerLevel, RoutingConfig, ModelScore
+from db_manager import SubsystemPool, db_manager
 
 logger = logging.getLogger(__name__)
 
@@ -35,16 +36,10 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/v2/llm", tags=["LLM Routing v2"])
 
 # Environment variables
-POSTGRES_HOST = os.getenv("POSTGRES_HOST", "ops-center-postgresql")
-POSTGRES_PORT = os.getenv("POSTGRES_PORT", "5432")
-POSTGRES_USER = os.getenv("POSTGRES_USER", "unicorn")
-POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD", "password")
-POSTGRES_DB = os.getenv("POSTGRES_DB", "unicorn_db")
-
 LITELLM_PROXY_URL = os.getenv("LITELLM_PROXY_URL", "http://unicorn-litellm:4000")
 
 # Database pool (initialized at startup)
-db_pool: Optional[asyncpg.Pool] = None
+db_pool: Optional[SubsystemPool] = None
 
 
 # ===============================
@@ -833,16 +828,8 @@ async def init_db_pool():
     global db_pool
     
     try:
-        db_pool = await asyncpg.create_pool(
-            host=POSTGRES_HOST,
-            port=int(POSTGRES_PORT),
-            user=POSTGRES_USER,
-            password=POSTGRES_PASSWORD,
-            database=POSTGRES_DB,
-            min_size=5,
-            max_size=20,
-            command_timeout=60
-        )
+        await db_manager.start()
+        db_pool = db_manager.subsystem('llm_routing')
         logger.info("Database pool initialized for LLM Routing API v2")
     except Exception as e:
         logger.error(f"Failed to initialize database pool: {e}", exc_info=True)
@@ -854,5 +841,6 @@ async def close_db_pool():
     global db_pool
     
     if db_pool:
-        await db_pool.close()
+        # The shared pool itself is closed by db_manager at shutdown
+        db_pool = None
         logger.info("Database pool closed for LLM Routing API v2")
@@ -14,6 +14,8 @@ from datetime import datetime, timedelta
 import aiofiles
 from pydantic import BaseModel, Field
 
+from docker_engine import docker_state
+
 class LogEntry(BaseModel):
     """Individual log entry model"""
     timestamp: str
@@ -61,29 +63,25 @@ class LogManager:
         
         # Container name mapping
         self.container_map = {}
-        self._update_container_map()
     
-    def _update_container_map(self):
-        """Update container ID to name mapping"""
-        try:
-            result = subprocess.run(
-                ["docker", "ps", "--format", "json"],
-                capture_output=True,
-                text=True
-            )
-            
-            if result.returncode == 0 and result.stdout:
-                for line in result.stdout.strip().split('\n'):
-                    try:
-                        container = json.loads(line)
-                        container_id = container.get("ID", "")
-                        container_name = container.get("Names", "")
-                        if container_id and container_name:
-                            self.container_map[container_id] = container_name
-                    except:
-                        continue
-        except:
-            pass
+    async def _update_container_map(self):
+        """Update container ID to name mapping from the shared Docker state cache"""
+        if not await docker_state.ensure_started():
+            return
+        for container in docker_state.containers(all=False):
+            self.container_map[container.id[:12]] = container.name
+    
+    async def _docker_log_lines(self, container_name: str, follow: bool = False, tail: int = 100) -> AsyncGenerator[str, None]:
+        """Container log lines via the shared Engine API client"""
+        container = docker_state.get(container_name)
+        async for _, line in docker_state.client.logs(
+            container.id if container else container_name,
+            follow=follow,
+            tail=tail,
+            timestamps=False,
+            tty=container.tty if container else False
+        ):
+            yield line
     
     def _parse_log_level(self, message: str) -> str:
         """Extract log level from message"""
@@ -147,7 +145,7 @@ class LogManager:
                 })
         
         # Docker container logs
-        self._update_container_map()
+        await self._update_container_map()
         for container_id, container_name in self.container_map.items():
             sources.append({
                 "id": f"docker:{container_name}",
@@ -178,17 +176,10 @@ class LogManager:
         if source_type == "docker":
             # Stream Docker container logs
             container_name = ':'.join(source_parts)
-            cmd = ["docker", "logs", "-f", "--tail", "100", container_name]
-            
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.STDOUT
-            )
             
-            async for line in process.stdout:
+            async for line in self._docker_log_lines(container_name, follow=True, tail=100):
                 try:
-                    log_line = line.decode('utf-8').strip()
+                    log_line = line.strip()
                     if log_line:
                         entry = self._parse_log_line(log_line, source_id)
                         if entry and self._matches_filters(entry, filters):
@@ -269,17 +260,14 @@ class LogManager:
             if source_type == "docker":
                 # Search Docker logs
                 container_name = source["name"]
-                cmd = ["docker", "logs", "--tail", str(filters.limit), container_name]
                 
                 try:
-                    result = subprocess.run(cmd, capture_output=True, text=True)
-                    if result.returncode == 0:
-                        for line in result.stdout.splitlines():
-                            entry = self._parse_log_line(line, source_id)
-                            if entry and self._matches_filters(entry, filters):
-                                results.append(entry)
-                                if len(results) >= filters.limit:
-                                    return results
+                    async for line in self._docker_log_lines(container_name, tail=filters.limit):
+                        entry = self._parse_log_line(line, source_id)
+                        if entry and self._matches_filters(entry, filters):
+                            results.append(entry)
+                            if len(results) >= filters.limit:
+                                return results
                 except:
                     continue
                     
@@ -290,7 +278,7 @@ class LogManager:
                     try:
                         # Read last N lines
                         cmd = ["tail", "-n", str(filters.limit * 2), str(log_path)]
-                        result = subprocess.run(cmd, capture_output=True, text=True)
+                        result = await asyncio.to_thread(subprocess.run, cmd, capture_output=True, text=True)
                         
                         if result.returncode == 0:
                             for line in result.stdout.splitlines():
@@ -0,0 +1,591 @@
+"""Indexed Local Log Store
+
+Continuously ingests container logs (through the shared Docker Engine
+client) into time-bucketed segments so log search never has to call
+docker at query time.
+
+- Entries are grouped into fixed time buckets (default 5 minutes).
+- Each segment carries postings lists for service, severity and message
+  tokens, so queries only touch entries that can match.
+- Closed segments are written to disk zlib-compressed; only a small
+  summary (time range and per service/severity counts) stays in memory,
+  and decoded segments are kept in a small LRU cache.
+- Results are returned newest first with keyset pagination on
+  (timestamp, sequence).
+"""
+
+import os
+import re
+import json
+import time
+import zlib
+import asyncio
+import logging
+import itertools
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from docker_engine import docker_state, ContainerInfo
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r"[a-z0-9_]+")
+MAX_TOKENS_PER_ENTRY = 64
+OVERFLOW_TOKEN = ""  # never produced by TOKEN_RE
+
+# (timestamp, sequence, service, severity, message)
+Entry = Tuple[float, int, str, str, str]
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens used by the inverted index"""
+    return TOKEN_RE.findall(text.lower())[:MAX_TOKENS_PER_ENTRY]
+
+
+def detect_severity(message: str) -> str:
+    """Severity heuristic shared with the legacy docker-logs search path"""
+    message_upper = message.upper()
+    if "ERROR" in message_upper or "CRITICAL" in message_upper:
+        return "ERROR"
+    elif "WARN" in message_upper:
+        return "WARN"
+    elif "DEBUG" in message_upper:
+        return "DEBUG"
+    return "INFO"
+
+
+def parse_docker_log_line(line: str) -> Tuple[datetime, str]:
+    """Split a `docker logs --timestamps` line into (timestamp, message)"""
+    parts = line.split(maxsplit=1)
+    if len(parts) == 2:
+        timestamp_str, message = parts
+        try:
+            # Docker emits nanoseconds; fromisoformat handles at most microseconds
+            timestamp_str = re.sub(r"(\.\d{6})\d+", r"\1", timestamp_str)
+            return datetime.fromisoformat(timestamp_str.replace('Z', '+00:00')), message
+        except ValueError:
+            pass
+    return datetime.now(timezone.utc), line
+
+
+@dataclass
+class LogQuery:
+    """Normalized search parameters for LogStore.search"""
+    text: Optional[str] = None
+    regex: Optional[str] = None
+    severities: Optional[Set[str]] = None
+    services: Optional[Set[str]] = None
+    start_ts: Optional[float] = None
+    end_ts: Optional[float] = None
+    limit: int = 100
+    offset: int = 0
+    cursor: Optional[Tuple[float, int]] = None
+
+
+@dataclass
+class SegmentSummary:
+    """In-memory summary of a closed, on-disk segment"""
+    bucket: int
+    path: str
+    min_ts: float
+    max_ts: float
+    count: int
+    counts: Dict[str, Dict[str, int]]  # service -> severity -> count
+
+
+class Segment:
+    """Entries of one time bucket plus their postings lists"""
+
+    def __init__(self, bucket: int):
+        self.bucket = bucket
+        self.entries: List[Entry] = []
+        self.services: Dict[str, List[int]] = {}
+        self.severities: Dict[str, List[int]] = {}
+        self.tokens: Dict[str, List[int]] = {}
+
+    def add(self, entry: Entry):
+        pos = len(self.entries)
+        self.entries.append(entry)
+        _, _, service, severity, message = entry
+        self.services.setdefault(service, []).append(pos)
+        self.severities.setdefault(severity, []).append(pos)
+        tokens = TOKEN_RE.findall(message.lower())
+        if len(tokens) > MAX_TOKENS_PER_ENTRY:
+            # Only a prefix is indexed; such entries are always re-checked
+            self.tokens.setdefault(OVERFLOW_TOKEN, []).append(pos)
+        for token in set(tokens[:MAX_TOKENS_PER_ENTRY]):
+            self.tokens.setdefault(token, []).append(pos)
+
+    def summary(self, path: str) -> SegmentSummary:
+        counts: Dict[str, Dict[str, int]] = {}
+        for _, _, service, severity, _ in self.entries:
+            by_severity = counts.setdefault(service, {})
+            by_severity[severity] = by_severity.get(severity, 0) + 1
+        return SegmentSummary(
+            bucket=self.bucket,
+            path=path,
+            min_ts=min(e[0] for e in self.entries),
+            max_ts=max(e[0] for e in self.entries),
+            count=len(self.entries),
+            counts=counts,
+        )
+
+    def encode(self) -> bytes:
+        payload = {
+            "bucket": self.bucket,
+            "entries": self.entries,
+            "services": self.services,
+            "severities": self.severities,
+            "tokens": self.tokens,
+        }
+        return zlib.compress(json.dumps(payload, separators=(",", ":")).encode(), 6)
+
+    @classmethod
+    def decode(cls, data: bytes) -> "Segment":
+        payload = json.loads(zlib.decompress(data))
+        segment = cls(payload["bucket"])
+        segment.entries = [tuple(e) for e in payload["entries"]]
+        segment.services = payload["services"]
+        segment.severities = payload["severities"]
+        segment.tokens = payload["tokens"]
+        return segment
+
+    # ------------------------------------------------------------------
+    # Matching
+    # ------------------------------------------------------------------
+
+    def match(self, query: LogQuery, pattern: Optional[re.Pattern]) -> List[Entry]:
+        """
+        Entries of this segment matching the query (unordered).
+
+        Safe to call while another thread appends to an open segment: only
+        the entries present when the call started are considered.
+        """
+        size = len(self.entries)
+        candidates: Optional[Set[int]] = None
+
+        if query.services:
+            candidates = _union(self.services.get(s, ()) for s in query.services)
+        if query.severities:
+            candidates = _intersect(candidates, _union(self.severities.get(s, ()) for s in query.severities))
+
+        needs_text_check = False
+        if query.text:
+            text = query.text.lower()
+            text_tokens = tokenize(text)
+            if text_tokens:
+                # Any substring match of a word lies inside one token, so the
+                # union of postings of vocabulary tokens containing it is
+                # exact for single-token queries and a superset otherwise.
+                longest = max(text_tokens, key=len)
+                vocabulary = list(self.tokens.items())
+                text_hits = _union(p for t, p in vocabulary if t and longest in t)
+                overflow = self.tokens.get(OVERFLOW_TOKEN)
+                needs_text_check = len(text_tokens) > 1 or text != longest or bool(overflow)
+                if overflow:
+                    text_hits.update(overflow)
+            else:
+                text_hits = set(range(size))
+                needs_text_check = True
+            # The legacy search also matched on service name
+            text_hits |= _union(p for s, p in list(self.services.items()) if text in s.lower())
+            candidates = _intersect(candidates, text_hits)
+
+        if candidates is None:
+            positions: Iterable[int] = range(size)
+        else:
+            positions = candidates
+
+        results = []
+        for pos in positions:
+            if pos >= size:
+                continue
+            entry = self.entries[pos]
+            ts, _, service, _, message = entry
+            if query.start_ts is not None and ts < query.start_ts:
+                continue
+            if query.end_ts is not None and ts >= query.end_ts:
+                continue
+            if needs_text_check and text not in message.lower() and text not in service.lower():
+                continue
+            if pattern and not pattern.search(message):
+                continue
+            results.append(entry)
+        return results
+
+
+def _union(postings: Iterable[Iterable[int]]) -> Set[int]:
+    result: Set[int] = set()
+    for p in postings:
+        result.update(p)
+    return result
+
+
+def _intersect(current: Optional[Set[int]], other: Set[int]) -> Set[int]:
+    return other if current is None else current & other
+
+
+class LogStore:
+    """Time-bucketed, indexed log segments with on-disk persistence"""
+
+    def __init__(
+        self,
+        data_dir: str,
+        bucket_seconds: int = 300,
+        retention_hours: float = 24,
+        cache_segments: int = 16,
+    ):
+        self.data_dir = Path(data_dir)
+        self.bucket_seconds = bucket_seconds
+        self.retention_seconds = retention_hours * 3600
+        self.cache_segments = cache_segments
+
+        self._open: Dict[int, Segment] = {}
+        self._closed: List[SegmentSummary] = []
+        self._cache: "OrderedDict[str, Segment]" = OrderedDict()
+        self._sealing: Dict[int, List[Segment]] = {}
+        self._seq = itertools.count(time.time_ns())
+        self._lock = threading.Lock()
+        self.last_seen: Dict[str, float] = {}
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def load(self):
+        """Load summaries of segments persisted by a previous process"""
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        for path in sorted(self.data_dir.glob("*.seg")):
+            try:
+                segment = Segment.decode(path.read_bytes())
+            except Exception as e:
+                logger.warning(f"Skipping unreadable log segment {path}: {e}")
+                continue
+            if not segment.entries:
+                continue
+            summary = segment.summary(str(path))
+            self._closed.append(summary)
+            for service in summary.counts:
+                self.last_seen[service] = max(self.last_seen.get(service, 0), summary.max_ts)
+        self._closed.sort(key=lambda s: s.bucket)
+        logger.info(f"Log store loaded {len(self._closed)} segments from {self.data_dir}")
+
+    def _write_segment(self, segment: Segment) -> SegmentSummary:
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        index = sum(1 for s in self._closed if s.bucket == segment.bucket)
+        path = self.data_dir / f"{segment.bucket}-{index}.seg"
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_bytes(segment.encode())
+        os.replace(tmp_path, path)
+        return segment.summary(str(path))
+
+    def _load_segment(self, summary: SegmentSummary) -> Segment:
+        with self._lock:
+            segment = self._cache.get(summary.path)
+            if segment is not None:
+                self._cache.move_to_end(summary.path)
+                return segment
+        # Read and decode outside the lock; a concurrent miss may decode twice
+        segment = Segment.decode(Path(summary.path).read_bytes())
+        with self._lock:
+            self._cache[summary.path] = segment
+            while len(self._cache) > self.cache_segments:
+                self._cache.popitem(last=False)
+        return segment
+
+    # ------------------------------------------------------------------
+    # Ingest
+    # ------------------------------------------------------------------
+
+    def append(self, service: str, timestamp: datetime, message: str, severity: Optional[str] = None):
+        ts = timestamp.timestamp()
+        if ts < time.time() - self.retention_seconds:
+            return
+        bucket = int(ts // self.bucket_seconds) * self.bucket_seconds
+        with self._lock:
+            segment = self._open.get(bucket)
+            if segment is None:
+                segment = self._open[bucket] = Segment(bucket)
+        segment.add((ts, next(self._seq), service, severity or detect_severity(message), message))
+        if ts > self.last_seen.get(service, 0):
+            self.last_seen[service] = ts
+
+    def maintain(self, grace_seconds: float = 60, now: Optional[float] = None, close_all: bool = False):
+        """
+        Close finished buckets to disk and expire old segments.
+
+        Runs off the event loop; appends that arrive for a bucket while it
+        is being written start a new open segment for that bucket.
+        """
+        now = now or time.time()
+        with self._lock:
+            finished = [
+                self._open.pop(bucket) for bucket in sorted(self._open)
+                if close_all or bucket + self.bucket_seconds + grace_seconds <= now
+            ]
+            for segment in finished:
+                self._sealing.setdefault(segment.bucket, []).append(segment)
+
+        for segment in finished:
+            summary = self._write_segment(segment) if segment.entries else None
+            with self._lock:
+                self._sealing[segment.bucket].remove(segment)
+                if not self._sealing[segment.bucket]:
+                    del self._sealing[segment.bucket]
+                if summary:
+                    self._closed.append(summary)
+                    self._closed.sort(key=lambda s: s.bucket)
+
+        cutoff = now - self.retention_seconds
+        expired = []
+        with self._lock:
+            while self._closed and self._closed[0].max_ts < cutoff:
+                summary = self._closed.pop(0)
+                self._cache.pop(summary.path, None)
+                expired.append(summary)
+        for summary in expired:
+            Path(summary.path).unlink(missing_ok=True)
+
+    def flush(self):
+        """Close every open segment (used on shutdown)"""
+        self.maintain(close_all=True)
+
+    # ------------------------------------------------------------------
+    # Query
+    # ------------------------------------------------------------------
+
+    def _buckets_newest_first(self, query: LogQuery) -> List[Tuple[int, list]]:
+        groups: Dict[int, list] = {}
+        with self._lock:
+            closed = list(self._closed)
+            open_segments = list(self._open.items())
+            open_segments += [(b, seg) for b, segs in self._sealing.items() for seg in segs]
+        for summary in closed:
+            if query.start_ts is not None and summary.max_ts < query.start_ts:
+                continue
+            if query.end_ts is not None and summary.min_ts >= query.end_ts:
+                continue
+            if not self._summary_may_match(summary, query):
+                continue
+            groups.setdefault(summary.bucket, []).append(summary)
+        for bucket, segment in open_segments:
+            if query.start_ts is not None and bucket + self.bucket_seconds <= query.start_ts:
+                continue
+            if query.end_ts is not None and bucket >= query.end_ts:
+                continue
+            groups.setdefault(bucket, []).append(segment)
+        return sorted(groups.items(), key=lambda g: g[0], reverse=True)
+
+    @staticmethod
+    def _summary_may_match(summary: SegmentSummary, query: LogQuery) -> bool:
+        services = summary.counts.keys()
+        if query.services and not (query.services & set(services)):
+            return False
+        if query.severities:
+            present = {sev for by_sev in summary.counts.values() for sev in by_sev}
+            if not (query.severities & present):
+                return False
+        return True
+
+    def _summary_count(self, summary: SegmentSummary, query: LogQuery) -> Optional[int]:
+        """Exact match count from the summary alone, if the query allows it"""
+        if query.text or query.regex:
+            return None
+        if query.start_ts is not None and summary.min_ts < query.start_ts:
+            return None
+        if query.end_ts is not None and summary.max_ts >= query.end_ts:
+            return None
+        total = 0
+        for service, by_severity in summary.counts.items():
+            if query.services and service not in query.services:
+                continue
+            for severity, count in by_severity.items():
+                if query.severities and severity not in query.severities:
+                    continue
+                total += count
+        return total
+
+    def search(self, query: LogQuery) -> Dict[str, Any]:
+        """
+        Run a query newest-first.
+
+        Returns:
+            Dict with `logs` (page of entries), `total` matches, and
+            `next_cursor` for keyset pagination (None on the last page).
+        """
+        pattern = re.compile(query.regex) if query.regex else None
+        cursor = query.cursor
+        skip = query.offset if cursor is None else 0
+        page: List[Entry] = []
+        total = 0
+        segments_scanned = 0
+
+        for bucket, members in self._buckets_newest_first(query):
+            need_entries = len(page) < query.limit + 1 and (
+                cursor is None or bucket <= cursor[0]
+            )
+
+            # Counting without decoding is possible for closed segments when
+            # no text filter applies and no entries are needed from them.
+            if not need_entries:
+                counts = [
+                    self._summary_count(m, query) if isinstance(m, SegmentSummary) else None
+                    for m in members
+                ]
+                if all(c is not None for c in counts):
+                    total += sum(counts)
+                    continue
+
+            matches: List[Entry] = []
+            for member in members:
+                segment = self._load_segment(member) if isinstance(member, SegmentSummary) else member
+                matches.extend(segment.match(query, pattern))
+                segments_scanned += 1
+            total += len(matches)
+
+            if not need_entries:
+                continue
+            matches.sort(key=lambda e: (e[0], e[1]), reverse=True)
+            for entry in matches:
+                if cursor is not None and (entry[0], entry[1]) >= cursor:
+                    continue
+                if skip:
+                    skip -= 1
+                    continue
+                if len(page) <= query.limit:
+                    page.append(entry)
+
+        next_cursor = None
+        if len(page) > query.limit:
+            page = page[:query.limit]
+            last = page[-1]
+            next_cursor = f"{last[0]!r}:{last[1]}"
+
+        return {
+            "logs": [
+                {
+                    "timestamp": datetime.fromtimestamp(ts, timezone.utc).isoformat(),
+                    "severity": severity,
+                    "service": service,
+                    "message": message,
+                    "metadata": {"seq": seq},
+                }
+                for ts, seq, service, severity, message in page
+            ],
+            "total": total,
+            "next_cursor": next_cursor,
+            "segments_scanned": segments_scanned,
+        }
+
+    def severity_counts(self, since_ts: float) -> Dict[str, int]:
+        """Per-severity counts since a timestamp, from summaries where possible"""
+        counts: Dict[str, int] = {}
+        query = LogQuery(start_ts=since_ts)
+        for _, members in self._buckets_newest_first(query):
+            for member in members:
+                if isinstance(member, SegmentSummary) and member.min_ts >= since_ts:
+                    for by_severity in member.counts.values():
+                        for severity, count in by_severity.items():
+                            counts[severity] = counts.get(severity, 0) + count
+                    continue
+                segment = self._load_segment(member) if isinstance(member, SegmentSummary) else member
+                for entry in segment.match(query, None):
+                    counts[entry[3]] = counts.get(entry[3], 0) + 1
+        return counts
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "open_segments": len(self._open),
+                "closed_segments": len(self._closed),
+                "cached_segments": len(self._cache),
+                "entries": sum(s.count for s in self._closed) + sum(len(s.entries) for s in self._open.values()),
+                "services": len(self.last_seen),
+            }
+
+
+def parse_cursor(cursor: Optional[str]) -> Optional[Tuple[float, int]]:
+    """Parse a `next_cursor` value returned by LogStore.search"""
+    if not cursor:
+        return None
+    ts, _, seq = cursor.partition(":")
+    return float(ts), int(seq)
+
+
+class LogIngestor:
+    """Follows every running container's logs into a LogStore via the Engine API"""
+
+    def __init__(self, store: LogStore, discover_interval: float = 30.0):
+        self.store = store
+        self.discover_interval = discover_interval
+        self._followers: Dict[str, asyncio.Task] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        if self.running:
+            return
+        await asyncio.to_thread(self.store.load)
+        self._task = asyncio.create_task(self._run())
+        logger.info("Log ingestor started")
+
+    async def stop(self):
+        for task in list(self._followers.values()) + [self._task]:
+            if task:
+                task.cancel()
+        await asyncio.gather(*self._followers.values(), return_exceptions=True)
+        self._followers.clear()
+        self._task = None
+        await asyncio.to_thread(self.store.flush)
+        logger.info("Log ingestor stopped")
+
+    async def _run(self):
+        while True:
+            try:
+                await docker_state.ensure_started()
+                containers = {c.name: c for c in docker_state.containers(all=False)}
+                for name, container in containers.items():
+                    task = self._followers.get(name)
+                    if task is None or task.done():
+                        self._followers[name] = asyncio.create_task(self._follow(container))
+                for name in set(self._followers) - set(containers):
+                    self._followers.pop(name).cancel()
+                await asyncio.to_thread(self.store.maintain)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Log ingestor discovery failed: {e}")
+            await asyncio.sleep(self.discover_interval)
+
+    async def _follow(self, container: ContainerInfo):
+        since = self.store.last_seen.get(container.name) or time.time() - self.store.retention_seconds
+        try:
+            async for _, line in docker_state.client.logs(
+                container.id, follow=True, since=since, tty=container.tty
+            ):
+                if not line.strip():
+                    continue
+                timestamp, message = parse_docker_log_line(line)
+                # since is inclusive; skip lines already stored before a restart
+                if timestamp.timestamp() <= since:
+                    continue
+                self.store.append(container.name, timestamp, message)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Log follower for {container.name} stopped: {e}")
+
+
+log_store = LogStore(
+    data_dir=os.getenv("LOG_STORE_DIR", "/app/data/log-store"),
+    bucket_seconds=int(os.getenv("LOG_STORE_BUCKET_SECONDS", "300")),
+    retention_hours=float(os.getenv("LOG_STORE_RETENTION_HOURS", "24")),
+)
+log_ingestor = LogIngestor(log_store)
@@ -2,22 +2,30 @@
 
 This module provides comprehensive log search capabilities with:
 - Multi-filter support (severity, service, date range, regex)
-- Efficient pagination
-- Redis caching for performance
-- Docker log aggregation
+- Efficient pagination (offset or keyset cursor)
+- Indexed local log store fed by a background ingestor (see log_store)
+- Redis caching for the docker-logs fallback path
 - Real-time rate limiting
 """
 
 import re
 import json
 import asyncio
-import subprocess
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Optional, Any
 from fastapi import APIRouter, HTTPException, Depends, Query
 from pydantic import BaseModel, Field, validator
 import redis.asyncio as aioredis
 from log_manager import log_manager, LogFilter, LogEntry
+from docker_engine import docker_state
+from log_store import (
+    log_store,
+    log_ingestor,
+    LogQuery,
+    parse_cursor,
+    detect_severity,
+    parse_docker_log_line
+)
 
 router = APIRouter(prefix="/api/v1/logs", tags=["logs"])
 
@@ -34,6 +42,7 @@ class AdvancedLogSearchRequest(BaseModel):
     regex: Optional[str] = Field(None, description="Regex pattern for message matching")
     limit: int = Field(100, ge=1, le=10000, description="Maximum results (1-10000)")
     offset: int = Field(0, ge=0, description="Pagination offset")
+    cursor: Optional[str] = Field(None, description="Keyset cursor from a previous response's next_cursor")
 
     @validator('severity')
     def validate_severity(cls, v):
@@ -54,6 +63,15 @@ class AdvancedLogSearchRequest(BaseModel):
                 raise ValueError(f"Invalid regex pattern: {str(e)}")
         return v
 
+    @validator('cursor')
+    def validate_cursor(cls, v):
+        if v:
+            try:
+                parse_cursor(v)
+            except ValueError:
+                raise ValueError(f"Invalid cursor: {v}")
+        return v
+
     @validator('start_date', 'end_date')
     def validate_date(cls, v):
         if v:
@@ -72,6 +90,7 @@ class LogSearchResponse(BaseModel):
     limit: int
     query_time_ms: float
     cache_hit: bool = False
+    next_cursor: Optional[str] = None
 
 
 class ServiceInfo(BaseModel):
@@ -99,34 +118,19 @@ async def get_redis_client():
 
 
 async def get_docker_services() -> List[ServiceInfo]:
-    """Get list of running Docker services"""
-    services = []
-    try:
-        result = subprocess.run(
-            ["docker", "ps", "--format", "json"],
-            capture_output=True,
-            text=True,
-            timeout=5
+    """Get list of running Docker services (from the shared Docker state cache)"""
+    if not await docker_state.ensure_started():
+        raise HTTPException(status_code=503, detail=f"Docker API error: {docker_state.error or 'not ready'}")
+
+    return [
+        ServiceInfo(
+            name=container.name,
+            container_id=container.id[:12],
+            status=container.status,
+            image=container.image
         )
-
-        if result.returncode == 0 and result.stdout:
-            for line in result.stdout.strip().split('\n'):
-                try:
-                    container = json.loads(line)
-                    services.append(ServiceInfo(
-                        name=container.get("Names", ""),
-                        container_id=container.get("ID", ""),
-                        status=container.get("State", ""),
-                        image=container.get("Image", "")
-                    ))
-                except json.JSONDecodeError:
-                    continue
-    except subprocess.TimeoutExpired:
-        raise HTTPException(status_code=503, detail="Docker API timeout")
-    except Exception as e:
-        raise HTTPException(status_code=503, detail=f"Docker API error: {str(e)}")
-
-    return services
+        for container in docker_state.containers(all=False)
+    ]
 
 
 async def fetch_docker_logs(
@@ -134,53 +138,29 @@ async def fetch_docker_logs(
     limit: int,
     since: Optional[str] = None
 ) -> List[Dict[str, Any]]:
-    """Fetch logs from a Docker container"""
-    cmd = ["docker", "logs", "--tail", str(limit * 2), "--timestamps"]
-
+    """Fetch logs from a Docker container via the shared Engine API client"""
+    since_ts = None
     if since:
-        cmd.extend(["--since", since])
+        since_ts = datetime.strptime(since, '%Y-%m-%d').replace(tzinfo=timezone.utc).timestamp()
 
-    cmd.append(container_name)
+    container = docker_state.get(container_name)
 
     try:
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=10
-        )
-
         logs = []
-        for line in result.stdout.splitlines() + result.stderr.splitlines():
+        async for _, line in docker_state.client.logs(
+            container.id if container else container_name,
+            tail=limit * 2,
+            since=since_ts,
+            tty=container.tty if container else False
+        ):
             if not line.strip():
                 continue
 
-            # Parse timestamp and message
-            parts = line.split(maxsplit=1)
-            if len(parts) == 2:
-                timestamp_str, message = parts
-                try:
-                    timestamp = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
-                except ValueError:
-                    timestamp = datetime.now()
-                    message = line
-            else:
-                timestamp = datetime.now()
-                message = line
-
-            # Determine severity level
-            severity = "INFO"
-            message_upper = message.upper()
-            if "ERROR" in message_upper or "CRITICAL" in message_upper:
-                severity = "ERROR"
-            elif "WARN" in message_upper:
-                severity = "WARN"
-            elif "DEBUG" in message_upper:
-                severity = "DEBUG"
+            timestamp, message = parse_docker_log_line(line)
 
             logs.append({
                 "timestamp": timestamp.isoformat(),
-                "severity": severity,
+                "severity": detect_severity(message),
                 "service": container_name,
                 "message": message,
                 "metadata": {}
@@ -188,8 +168,6 @@ async def fetch_docker_logs(
 
         return logs
 
-    except subprocess.TimeoutExpired:
-        return []
     except Exception as e:
         print(f"Error fetching logs from {container_name}: {e}")
         return []
@@ -271,12 +249,56 @@ def generate_cache_key(request: AdvancedLogSearchRequest) -> str:
         f"end:{request.end_date or ''}",
         f"regex:{request.regex or ''}",
         f"limit:{request.limit}",
-        f"offset:{request.offset}"
+        f"offset:{request.offset}",
+        f"cursor:{request.cursor or ''}"
     ]
     key_str = "|".join(key_parts)
     return f"logs:search:{hash(key_str)}"
 
 
+def build_store_query(request: AdvancedLogSearchRequest) -> LogQuery:
+    """Translate a search request into a log store query (dates are UTC days)"""
+    start_ts = None
+    end_ts = None
+    if request.start_date:
+        start_ts = datetime.strptime(request.start_date, '%Y-%m-%d').replace(tzinfo=timezone.utc).timestamp()
+    if request.end_date:
+        end_dt = datetime.strptime(request.end_date, '%Y-%m-%d') + timedelta(days=1)
+        end_ts = end_dt.replace(tzinfo=timezone.utc).timestamp()
+
+    severities = None
+    if request.severity:
+        # The store records WARN; accept WARNING as an alias
+        severities = {'WARN' if s == 'WARNING' else s for s in request.severity}
+
+    return LogQuery(
+        text=request.query,
+        regex=request.regex,
+        severities=severities,
+        services=set(request.services) if request.services else None,
+        start_ts=start_ts,
+        end_ts=end_ts,
+        limit=request.limit,
+        offset=request.offset,
+        cursor=parse_cursor(request.cursor)
+    )
+
+
+async def search_log_store(request: AdvancedLogSearchRequest, start_time: datetime) -> LogSearchResponse:
+    """Answer a search from the indexed local log store"""
+    result = await asyncio.to_thread(log_store.search, build_store_query(request))
+    query_time = (datetime.now() - start_time).total_seconds() * 1000
+
+    return LogSearchResponse(
+        logs=result["logs"],
+        total=result["total"],
+        offset=request.offset,
+        limit=request.limit,
+        query_time_ms=round(query_time, 2),
+        next_cursor=result["next_cursor"]
+    )
+
+
 @router.post("/search/advanced", response_model=LogSearchResponse)
 async def advanced_log_search(request: AdvancedLogSearchRequest):
     """
@@ -288,16 +310,19 @@ async def advanced_log_search(request: AdvancedLogSearchRequest):
     - Service name filtering
     - Date range filtering
     - Regex pattern matching
-    - Pagination support
-    - Redis caching (5-minute TTL)
+    - Pagination support (offset, or keyset via `cursor`/`next_cursor`)
+    - Redis caching (5-minute TTL) on the fallback path
 
     Performance:
-    - Handles 100K+ log lines efficiently
-    - Cached queries return in <10ms
-    - Uncached queries complete in <2 seconds
+    - Served from the indexed local log store while the ingestor runs:
+      only segments that can match are scanned, no docker calls
+    - Falls back to `docker logs` per container when the ingestor is off
     """
     start_time = datetime.now()
 
+    if log_ingestor.running:
+        return await search_log_store(request, start_time)
+
     # Check cache first
     redis = await get_redis_client()
     cache_hit = False
@@ -397,6 +422,26 @@ async def get_log_stats():
     """
     services = await get_docker_services()
 
+    # Count by service status
+    status_counts = {}
+    for service in services:
+        status = service.status
+        status_counts[status] = status_counts.get(status, 0) + 1
+
+    if log_ingestor.running:
+        since = datetime.now(timezone.utc) - timedelta(hours=1)
+        counts = await asyncio.to_thread(log_store.severity_counts, since.timestamp())
+        return {
+            "total_services": len(services),
+            "severity_distribution": {
+                level: counts.get(level, 0) for level in ("ERROR", "WARN", "INFO", "DEBUG")
+            },
+            "service_status": status_counts,
+            "sample_size": sum(counts.values()),
+            "window": "1h",
+            "store": log_store.stats()
+        }
+
     # Fetch recent logs for statistics
     all_logs = []
     for service in services[:10]:  # Sample first 10 services
@@ -416,12 +461,6 @@ async def get_log_stats():
         if severity in severity_counts:
             severity_counts[severity] += 1
 
-    # Count by service status
-    status_counts = {}
-    for service in services:
-        status = service.status
-        status_counts[status] = status_counts.get(status, 0) + 1
-
     return {
         "total_services": len(services),
         "severity_distribution": severity_counts,
@@ -8,12 +8,13 @@ them in Redis for historical data retrieval.
 import asyncio
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
-import psutil
-import docker
 import redis
 import json
 import logging
 
+from docker_engine import docker_state
+from host_telemetry import host_telemetry
+
 logger = logging.getLogger(__name__)
 
 
@@ -139,7 +140,7 @@ class MetricsCollector:
         memory_metrics = self._collect_memory_metrics()
         disk_metrics = self._collect_disk_metrics()
         network_metrics = self._collect_network_metrics()
-        gpu_metrics = self._collect_gpu_metrics()
+        gpu_metrics = await asyncio.to_thread(self._collect_gpu_metrics)
         docker_metrics = await self._collect_docker_metrics()
 
         return {
@@ -156,10 +157,11 @@ class MetricsCollector:
     def _collect_cpu_metrics(self) -> Dict:
         """Collect CPU metrics."""
         try:
+            sample = host_telemetry.latest()
             return {
-                "percent": round(psutil.cpu_percent(interval=0.1), 2),
-                "per_cpu": [round(p, 2) for p in psutil.cpu_percent(interval=0.1, percpu=True)],
-                "load_avg": [round(x, 2) for x in psutil.getloadavg()] if hasattr(psutil, 'getloadavg') else []
+                "percent": round(sample.cpu_percent, 2),
+                "per_cpu": [round(p, 2) for p in sample.per_cpu],
+                "load_avg": [round(x, 2) for x in sample.load_avg] if sample.load_avg else []
             }
         except Exception as e:
             logger.debug(f"CPU metrics error: {e}")
@@ -168,8 +170,9 @@ class MetricsCollector:
     def _collect_memory_metrics(self) -> Dict:
         """Collect memory metrics."""
         try:
-            mem = psutil.virtual_memory()
-            swap = psutil.swap_memory()
+            sample = host_telemetry.latest()
+            mem = sample.memory
+            swap = sample.swap
 
             return {
                 "percent": round(mem.percent, 2),
@@ -184,8 +187,9 @@ class MetricsCollector:
     def _collect_disk_metrics(self) -> Dict:
         """Collect disk metrics."""
         try:
-            root_usage = psutil.disk_usage('/')
-            io_counters = psutil.disk_io_counters()
+            sample = host_telemetry.latest()
+            root_usage = sample.disk
+            io_counters = sample.disk_io
 
             return {
                 "percent": round(root_usage.percent, 2),
@@ -201,7 +205,8 @@ class MetricsCollector:
     def _collect_network_metrics(self) -> Dict:
         """Collect network metrics."""
         try:
-            net_io = psutil.net_io_counters()
+            sample = host_telemetry.latest()
+            net_io = sample.net_io
 
             return {
                 "sent_mb": round(net_io.bytes_sent / (1024**2), 2),
@@ -253,11 +258,12 @@ class MetricsCollector:
     async def _collect_docker_metrics(self) -> Dict:
         """Collect Docker container metrics."""
         try:
-            client = docker.from_env()
-            containers = client.containers.list()
+            if not await docker_state.ensure_started():
+                raise RuntimeError(docker_state.error or "Docker state not ready")
+            containers = docker_state.containers(all=True)
 
-            running = len([c for c in containers if c.status == 'running'])
-            total = len(client.containers.list(all=True))
+            running = len([c for c in containers if c.running])
+            total = len(containers)
 
             return {
                 "running": running,
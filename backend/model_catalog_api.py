@@ -8,12 +8,13 @@ This module provides comprehensive model catalog endpoints:
 - Toggle model enable/disable status
 - Model usage statistics and analytics
 - Provider aggregation and management
-- Model caching for performance
+- Model catalog cache (stale-while-revalidate, shared across workers via Redis)
 
 Author: Backend Developer
 Date: October 27, 2025
 """
 
+import asyncio
 import logging
 import os
 from typing import Dict, List, Optional, Any
@@ -27,6 +28,8 @@ from fastapi import APIRouter, HTTPException, Request, Depends, Query
 from pydantic import BaseModel, Field
 from cryptography.fernet import Fernet
 
+from model_list_cache import model_list_cache
+
 logger = logging.getLogger(__name__)
 
 # Router
@@ -246,116 +249,119 @@ async def get_model_usage_stats(pool, days: int = 30) -> Dict[str, int]:
 # Provider Fetching Functions
 # ============================================================================
 
-async def fetch_openrouter_models() -> List[Dict]:
-    """Fetch models from OpenRouter API"""
+class ProviderFetchError(Exception):
+    """A provider's model list could not be fetched"""
+
+
+async def _provider_get(
+    client: httpx.AsyncClient,
+    provider: str,
+    url: str,
+    timeout: float = 10.0,
+    **kwargs
+) -> httpx.Response:
+    """GET a provider's model list; raises ProviderFetchError unless it returns 200"""
     try:
-        async with httpx.AsyncClient(timeout=15.0) as client:
-            response = await client.get(
-                PROVIDER_CONFIGS['openrouter']['api_url'],
-                headers=PROVIDER_CONFIGS['openrouter']['default_headers']
-            )
+        response = await client.get(url, timeout=timeout, **kwargs)
+    except httpx.HTTPError as e:
+        raise ProviderFetchError(f"{provider}: {e.__class__.__name__}: {e}") from e
 
-            if response.status_code != 200:
-                logger.error(f"OpenRouter API error: {response.status_code}")
-                return []
-
-            data = response.json().get('data', [])
-
-            models = []
-            for model in data:
-                pricing = model.get('pricing', {})
-                architecture = model.get('architecture', {})
-
-                # Parse capabilities from architecture
-                capabilities = ['text']  # All models support text
-                modality = architecture.get('modality', '').lower()
-                if 'vision' in modality or 'multimodal' in modality:
-                    capabilities.append('vision')
-                if 'tool' in modality or 'function' in modality:
-                    capabilities.append('function_calling')
-
-                models.append({
-                    'id': f"openrouter/{model.get('id')}",
-                    'provider': 'openrouter',
-                    'name': model.get('name', model.get('id')),
-                    'description': model.get('description', ''),
-                    'context_length': model.get('context_length', 0),
-                    'pricing': {
-                        'input': float(pricing.get('prompt', 0)) * 1_000_000,  # Convert to per 1M
-                        'output': float(pricing.get('completion', 0)) * 1_000_000
-                    },
-                    'capabilities': capabilities,
-                    'top_provider': model.get('top_provider', {}),
-                    'architecture': architecture.get('modality', 'text')
-                })
-
-            logger.info(f"Fetched {len(models)} models from OpenRouter")
-            return models
+    if response.status_code != 200:
+        raise ProviderFetchError(f"{provider}: HTTP {response.status_code}")
+    return response
 
-    except Exception as e:
-        logger.error(f"Failed to fetch OpenRouter models: {e}")
-        return []
+
+async def fetch_openrouter_models(client: httpx.AsyncClient) -> List[Dict]:
+    """Fetch models from OpenRouter API"""
+    response = await _provider_get(
+        client, 'openrouter',
+        PROVIDER_CONFIGS['openrouter']['api_url'],
+        headers=PROVIDER_CONFIGS['openrouter']['default_headers'],
+        timeout=15.0
+    )
+    data = response.json().get('data', [])
+
+    models = []
+    for model in data:
+        pricing = model.get('pricing', {})
+        architecture = model.get('architecture', {})
+
+        # Parse capabilities from architecture
+        capabilities = ['text']  # All models support text
+        modality = architecture.get('modality', '').lower()
+        if 'vision' in modality or 'multimodal' in modality:
+            capabilities.append('vision')
+        if 'tool' in modality or 'function' in modality:
+            capabilities.append('function_calling')
+
+        models.append({
+            'id': f"openrouter/{model.get('id')}",
+            'provider': 'openrouter',
+            'name': model.get('name', model.get('id')),
+            'description': model.get('description', ''),
+            'context_length': model.get('context_length', 0),
+            'pricing': {
+                'input': float(pricing.get('prompt', 0)) * 1_000_000,  # Convert to per 1M
+                'output': float(pricing.get('completion', 0)) * 1_000_000
+            },
+            'capabilities': capabilities,
+            'top_provider': model.get('top_provider', {}),
+            'architecture': architecture.get('modality', 'text')
+        })
+
+    logger.info(f"Fetched {len(models)} models from OpenRouter")
+    return models
 
 
-async def fetch_openai_models(api_key: str) -> List[Dict]:
+async def fetch_openai_models(client: httpx.AsyncClient, api_key: str) -> List[Dict]:
     """Fetch models from OpenAI API (if key configured)"""
-    try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(
-                PROVIDER_CONFIGS['openai']['api_url'],
-                headers={'Authorization': f'Bearer {api_key}'}
-            )
+    response = await _provider_get(
+        client, 'openai',
+        PROVIDER_CONFIGS['openai']['api_url'],
+        headers={'Authorization': f'Bearer {api_key}'}
+    )
+    data = response.json().get('data', [])
 
-            if response.status_code != 200:
-                logger.warning(f"OpenAI API error: {response.status_code}")
-                return []
-
-            data = response.json().get('data', [])
-
-            models = []
-            for model in data:
-                model_id = model.get('id')
-
-                # Only include chat models
-                if not any(x in model_id for x in ['gpt-', 'o1-', 'o3-']):
-                    continue
-
-                # Determine capabilities
-                capabilities = ['text']
-                if 'vision' in model_id or 'gpt-4o' in model_id:
-                    capabilities.append('vision')
-                if 'gpt-4' in model_id or 'gpt-3.5' in model_id:
-                    capabilities.append('function_calling')
-
-                # Estimate pricing (hardcoded - OpenAI doesn't provide this via API)
-                pricing = {'input': 0, 'output': 0}
-                if 'gpt-4o' in model_id:
-                    pricing = {'input': 5.00, 'output': 15.00}
-                elif 'gpt-4' in model_id:
-                    pricing = {'input': 30.00, 'output': 60.00}
-                elif 'gpt-3.5' in model_id:
-                    pricing = {'input': 0.50, 'output': 1.50}
-                elif 'o1' in model_id:
-                    pricing = {'input': 15.00, 'output': 60.00}
-
-                models.append({
-                    'id': f"openai/{model_id}",
-                    'provider': 'openai',
-                    'name': model_id,
-                    'description': f"OpenAI {model_id}",
-                    'context_length': model.get('context_length', 8192),
-                    'pricing': pricing,
-                    'capabilities': capabilities,
-                    'top_provider': None,
-                    'architecture': 'text'
-                })
-
-            logger.info(f"Fetched {len(models)} models from OpenAI")
-            return models
+    models = []
+    for model in data:
+        model_id = model.get('id')
+
+        # Only include chat models
+        if not any(x in model_id for x in ['gpt-', 'o1-', 'o3-']):
+            continue
+
+        # Determine capabilities
+        capabilities = ['text']
+        if 'vision' in model_id or 'gpt-4o' in model_id:
+            capabilities.append('vision')
+        if 'gpt-4' in model_id or 'gpt-3.5' in model_id:
+            capabilities.append('function_calling')
+
+        # Estimate pricing (hardcoded - OpenAI doesn't provide this via API)
+        pricing = {'input': 0, 'output': 0}
+        if 'gpt-4o' in model_id:
+            pricing = {'input': 5.00, 'output': 15.00}
+        elif 'gpt-4' in model_id:
+            pricing = {'input': 30.00, 'output': 60.00}
+        elif 'gpt-3.5' in model_id:
+            pricing = {'input': 0.50, 'output': 1.50}
+        elif 'o1' in model_id:
+            pricing = {'input': 15.00, 'output': 60.00}
 
-    except Exception as e:
-        logger.error(f"Failed to fetch OpenAI models: {e}")
-        return []
+        models.append({
+            'id': f"openai/{model_id}",
+            'provider': 'openai',
+            'name': model_id,
+            'description': f"OpenAI {model_id}",
+            'context_length': model.get('context_length', 8192),
+            'pricing': pricing,
+            'capabilities': capabilities,
+            'top_provider': None,
+            'architecture': 'text'
+        })
+
+    logger.info(f"Fetched {len(models)} models from OpenAI")
+    return models
 
 
 async def fetch_anthropic_models() -> List[Dict]:
@@ -381,61 +387,52 @@ async def fetch_anthropic_models() -> List[Dict]:
     return models
 
 
-async def fetch_google_models(api_key: str) -> List[Dict]:
+async def fetch_google_models(client: httpx.AsyncClient, api_key: str) -> List[Dict]:
     """Fetch models from Google AI API (if key configured)"""
-    try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(
-                f"{PROVIDER_CONFIGS['google']['api_url']}?key={api_key}"
-            )
+    response = await _provider_get(
+        client, 'google',
+        PROVIDER_CONFIGS['google']['api_url'],
+        params={'key': api_key}
+    )
+    data = response.json().get('models', [])
 
-            if response.status_code != 200:
-                logger.warning(f"Google AI API error: {response.status_code}")
-                return []
-
-            data = response.json().get('models', [])
-
-            models = []
-            for model in data:
-                model_id = model.get('name', '').replace('models/', '')
-
-                # Only include Gemini models
-                if not model_id.startswith('gemini'):
-                    continue
-
-                # Determine capabilities
-                capabilities = ['text']
-                supported_methods = model.get('supportedGenerationMethods', [])
-                if 'generateContent' in supported_methods:
-                    capabilities.append('vision')
-
-                # Estimate pricing (hardcoded)
-                pricing = {'input': 0, 'output': 0}
-                if 'gemini-2.0' in model_id:
-                    pricing = {'input': 0.075, 'output': 0.30}
-                elif 'gemini-1.5-pro' in model_id:
-                    pricing = {'input': 3.50, 'output': 10.50}
-                elif 'gemini-1.5-flash' in model_id:
-                    pricing = {'input': 0.075, 'output': 0.30}
-
-                models.append({
-                    'id': f"google/{model_id}",
-                    'provider': 'google',
-                    'name': model.get('displayName', model_id),
-                    'description': model.get('description', ''),
-                    'context_length': model.get('inputTokenLimit', 32768),
-                    'pricing': pricing,
-                    'capabilities': capabilities,
-                    'top_provider': None,
-                    'architecture': 'multimodal'
-                })
-
-            logger.info(f"Fetched {len(models)} models from Google AI")
-            return models
+    models = []
+    for model in data:
+        model_id = model.get('name', '').replace('models/', '')
+
+        # Only include Gemini models
+        if not model_id.startswith('gemini'):
+            continue
+
+        # Determine capabilities
+        capabilities = ['text']
+        supported_methods = model.get('supportedGenerationMethods', [])
+        if 'generateContent' in supported_methods:
+            capabilities.append('vision')
+
+        # Estimate pricing (hardcoded)
+        pricing = {'input': 0, 'output': 0}
+        if 'gemini-2.0' in model_id:
+            pricing = {'input': 0.075, 'output': 0.30}
+        elif 'gemini-1.5-pro' in model_id:
+            pricing = {'input': 3.50, 'output': 10.50}
+        elif 'gemini-1.5-flash' in model_id:
+            pricing = {'input': 0.075, 'output': 0.30}
 
-    except Exception as e:
-        logger.error(f"Failed to fetch Google AI models: {e}")
-        return []
+        models.append({
+            'id': f"google/{model_id}",
+            'provider': 'google',
+            'name': model.get('displayName', model_id),
+            'description': model.get('description', ''),
+            'context_length': model.get('inputTokenLimit', 32768),
+            'pricing': pricing,
+            'capabilities': capabilities,
+            'top_provider': None,
+            'architecture': 'multimodal'
+        })
+
+    logger.info(f"Fetched {len(models)} models from Google AI")
+    return models
 
 
 async def get_provider_api_key(pool, provider_name: str) -> Optional[str]:
@@ -471,77 +468,269 @@ async def get_provider_api_key(pool, provider_name: str) -> Optional[str]:
 # Caching Layer
 # ============================================================================
 
-# Cache for model catalog (5-minute TTL)
-_model_cache = {
-    'timestamp': 0,
-    'models': [],
-    'ttl': 300  # 5 minutes
-}
+# The catalog is served from memory and revalidated in the background
+# (stale-while-revalidate): a request never waits on an upstream model list
+# except on a cold start, and then all concurrent callers share one refresh.
+# Providers are fetched concurrently over one HTTP client; a provider that
+# fails keeps serving its last good list. Refreshed snapshots are published
+# to Redis, so one worker refreshes and the others pick up its result.
+
+CATALOG_TTL = float(os.getenv('MODEL_CATALOG_TTL', '300'))
+CATALOG_SYNC_INTERVAL = float(os.getenv('MODEL_CATALOG_SYNC_INTERVAL', '15'))
+
+CATALOG_REDIS_KEY = 'llm:model_catalog'
+CATALOG_VERSION_KEY = 'llm:model_catalog:version'
+CATALOG_LOCK_KEY = 'llm:model_catalog:refresh_lock'
+CATALOG_LOCK_TTL = 60
+CATALOG_SNAPSHOT_TTL = 7 * 24 * 3600
+
+
+def merge_db_status(model: Dict, db_models: Dict[str, Dict]) -> Dict:
+    """Copy of a provider model with enabled status and pricing overrides from llm_models"""
+    model_id = model['id']
+    model_name = model_id.split('/', 1)[1] if '/' in model_id else model_id
+    db_match = db_models.get(model_id) or db_models.get(model_name)
+
+    merged = {**model, 'pricing': dict(model['pricing'])}
+    if db_match:
+        merged['enabled'] = db_match['enabled']
+        # Override pricing if set in DB
+        if db_match['cost_per_1m_input'] > 0:
+            merged['pricing']['input'] = db_match['cost_per_1m_input']
+        if db_match['cost_per_1m_output'] > 0:
+            merged['pricing']['output'] = db_match['cost_per_1m_output']
+    else:
+        # Not in DB yet - default to disabled
+        merged['enabled'] = False
+    return merged
+
+
+class ModelCatalog:
+    """Stale-while-revalidate model catalog shared across workers through Redis"""
+
+    def __init__(self, ttl: float = CATALOG_TTL, sync_interval: float = CATALOG_SYNC_INTERVAL):
+        self.ttl = ttl
+        self.sync_interval = sync_interval
+        self.db_pool = None
+        self.redis = None
+
+        # provider -> {'models', 'fetched_at', 'error'}
+        self.providers: Dict[str, Dict[str, Any]] = {}
+        self.models: List[Dict] = []
+        self.fetched_at = 0.0  # last upstream fetch, by any worker
+        self.version = 0.0  # when self.models was last rebuilt
+        self.synced_at = 0.0
+
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._revalidate_task: Optional[asyncio.Task] = None
+        self._merge_lock = asyncio.Lock()
+
+        self.refreshes = 0
+        self.shared_loads = 0
+        self.provider_failures: Dict[str, int] = {}
+
+    def start(self, db_pool, redis_client=None):
+        """Attach the pool and Redis client and warm the catalog in the background"""
+        self.db_pool = db_pool
+        self.redis = redis_client
+        self._revalidate(db_pool)
+        logger.info("Model catalog started")
+
+    async def stop(self):
+        for task in (self._revalidate_task, self._refresh_task):
+            if task and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except (asyncio.CancelledError, Exception):
+                    pass
+
+    async def get_models(self, pool, force_refresh: bool = False) -> List[Dict]:
+        """Current catalog; stale entries are returned while a refresh runs in the background"""
+        if force_refresh:
+            return await self.refresh(pool)
+
+        if not self.models:
+            await self._load_shared()
+            if not self.models:
+                return await self.refresh(pool)
+
+        now = time.time()
+        if now - self.fetched_at >= self.ttl or now - self.synced_at >= self.sync_interval:
+            self._revalidate(pool)
+        return self.models
+
+    async def refresh(self, pool) -> List[Dict]:
+        """Refetch every provider now; concurrent callers share a single refresh"""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh(pool))
+        # A caller giving up must not cancel the refresh the others are waiting on
+        return await asyncio.shield(self._refresh_task)
+
+    async def apply_db_changes(self, pool):
+        """Re-merge enabled status and pricing after llm_models was edited (no upstream calls)"""
+        if not self.providers:
+            return
+        await self._merge(pool)
+        await self._publish()
+
+    async def _refresh(self, pool) -> List[Dict]:
+        started = time.time()
+        logger.info("Fetching fresh model catalog...")
+
+        names = list(PROVIDER_CONFIGS)
+        async with httpx.AsyncClient() as client:
+            results = await asyncio.gather(
+                *(self._fetch_provider(pool, client, name) for name in names),
+                return_exceptions=True
+            )
+
+        for name, result in zip(names, results):
+            if isinstance(result, Exception):
+                # Keep serving the last good list for this provider
+                self.provider_failures[name] = self.provider_failures.get(name, 0) + 1
+                if name in self.providers:
+                    self.providers[name]['error'] = str(result)
+                logger.warning(f"Model list refresh failed for {name}, keeping previous list: {result}")
+            elif result is None:
+                # No API key configured
+                self.providers.pop(name, None)
+            else:
+                self.providers[name] = {'models': result, 'fetched_at': started, 'error': None}
+
+        self.fetched_at = started
+        self.refreshes += 1
+        await self._merge(pool)
+        await self._publish()
+
+        logger.info(f"Cached {len(self.models)} models from all providers "
+                    f"in {time.time() - started:.2f}s")
+        return self.models
+
+    async def _fetch_provider(self, pool, client: httpx.AsyncClient, name: str) -> Optional[List[Dict]]:
+        if name == 'openrouter':
+            return await fetch_openrouter_models(client)
+        if name == 'anthropic':
+            return await fetch_anthropic_models()
+
+        api_key = await get_provider_api_key(pool, name)
+        if not api_key:
+            return None
+        if name == 'openai':
+            return await fetch_openai_models(client, api_key)
+        return await fetch_google_models(client, api_key)
+
+    async def _merge(self, pool):
+        # Serialized so a merge that read llm_models earlier never overwrites a later one
+        async with self._merge_lock:
+            db_models = {m['name']: m for m in await get_models_from_db(pool)}
+            self.models = [
+                merge_db_status(model, db_models)
+                for name in PROVIDER_CONFIGS
+                for model in self.providers.get(name, {}).get('models', [])
+            ]
+            self.version = time.time()
+
+    async def _publish(self):
+        if self.redis is None:
+            return
+        snapshot = json.dumps({
+            'version': self.version,
+            'fetched_at': self.fetched_at,
+            'providers': self.providers,
+            'models': self.models,
+        })
+        try:
+            await self.redis.set(CATALOG_REDIS_KEY, snapshot, ex=CATALOG_SNAPSHOT_TTL)
+            await self.redis.set(CATALOG_VERSION_KEY, repr(self.version), ex=CATALOG_SNAPSHOT_TTL)
+        except Exception as e:
+            logger.warning(f"Failed to publish model catalog to Redis: {e}")
+
+    async def _load_shared(self) -> bool:
+        """Adopt the snapshot another worker published, if it is newer than ours"""
+        if self.redis is None:
+            return False
+        self.synced_at = time.time()
+        try:
+            version = await self.redis.get(CATALOG_VERSION_KEY)
+            if not version or float(version) <= self.version:
+                return False
+            raw = await self.redis.get(CATALOG_REDIS_KEY)
+        except Exception as e:
+            logger.warning(f"Failed to read model catalog from Redis: {e}")
+            return False
+        if not raw:
+            return False
+
+        snapshot = json.loads(raw)
+        if snapshot['version'] <= self.version:
+            return False
+        async with self._merge_lock:
+            self.providers = snapshot['providers']
+            self.models = snapshot['models']
+            self.fetched_at = snapshot['fetched_at']
+            self.version = snapshot['version']
+        self.shared_loads += 1
+        return True
+
+    async def _acquire_refresh_lock(self) -> bool:
+        """One worker refreshes per lock period; the rest adopt its snapshot"""
+        if self.redis is None:
+            return True
+        try:
+            return bool(await self.redis.set(CATALOG_LOCK_KEY, '1', nx=True, ex=CATALOG_LOCK_TTL))
+        except Exception as e:
+            logger.warning(f"Model catalog refresh lock unavailable, refreshing locally: {e}")
+            return True
+
+    def _revalidate(self, pool):
+        if self._revalidate_task is not None and not self._revalidate_task.done():
+            return
+        self._revalidate_task = asyncio.create_task(self._run_revalidate(pool))
+
+    async def _run_revalidate(self, pool):
+        try:
+            await self._load_shared()
+            if time.time() - self.fetched_at < self.ttl:
+                return
+            if not await self._acquire_refresh_lock():
+                return
+            await self.refresh(pool)
+        except Exception as e:
+            logger.error(f"Model catalog revalidation failed: {e}", exc_info=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        now = time.time()
+        return {
+            'models': len(self.models),
+            'age_seconds': round(now - self.fetched_at, 1) if self.fetched_at else None,
+            'refreshing': self._refresh_task is not None and not self._refresh_task.done(),
+            'refreshes': self.refreshes,
+            'shared_loads': self.shared_loads,
+            'providers': {
+                name: {
+                    'models': len(entry['models']),
+                    'age_seconds': round(now - entry['fetched_at'], 1),
+                    'error': entry.get('error'),
+                    'failures': self.provider_failures.get(name, 0),
+                }
+                for name, entry in self.providers.items()
+            },
+        }
+
+
+# Global instance
+model_catalog = ModelCatalog()
 
 
 async def get_all_models_cached(pool, force_refresh: bool = False) -> List[Dict]:
     """
     Get all models from all providers with caching
 
-    Cache TTL: 5 minutes
+    Served from the shared ModelCatalog; refreshed every CATALOG_TTL seconds
+    in the background
     """
-    global _model_cache
-
-    now = time.time()
-    cache_valid = (now - _model_cache['timestamp']) < _model_cache['ttl']
-
-    if cache_valid and not force_refresh and _model_cache['models']:
-        logger.info(f"Using cached models ({len(_model_cache['models'])} models)")
-        return _model_cache['models']
-
-    # Fetch fresh data
-    logger.info("Fetching fresh model catalog...")
-    models = []
-
-    # Always fetch OpenRouter (public API)
-    models.extend(await fetch_openrouter_models())
-
-    # Always fetch Anthropic (hardcoded)
-    models.extend(await fetch_anthropic_models())
-
-    # Fetch OpenAI if key configured
-    openai_key = await get_provider_api_key(pool, 'openai')
-    if openai_key:
-        models.extend(await fetch_openai_models(openai_key))
-
-    # Fetch Google if key configured
-    google_key = await get_provider_api_key(pool, 'google')
-    if google_key:
-        models.extend(await fetch_google_models(google_key))
-
-    # Merge with database status (enabled/disabled)
-    db_models = await get_models_from_db(pool)
-    db_models_dict = {m['name']: m for m in db_models}
-
-    for model in models:
-        # Try to match by full ID or just the model part
-        model_id = model['id']
-        model_name = model_id.split('/', 1)[1] if '/' in model_id else model_id
-
-        db_match = db_models_dict.get(model_id) or db_models_dict.get(model_name)
-
-        if db_match:
-            model['enabled'] = db_match['enabled']
-            # Override pricing if set in DB
-            if db_match['cost_per_1m_input'] > 0:
-                model['pricing']['input'] = db_match['cost_per_1m_input']
-            if db_match['cost_per_1m_output'] > 0:
-                model['pricing']['output'] = db_match['cost_per_1m_output']
-        else:
-            # Not in DB yet - default to disabled
-            model['enabled'] = False
-
-    # Update cache
-    _model_cache['timestamp'] = now
-    _model_cache['models'] = models
-
-    logger.info(f"Cached {len(models)} models from all providers")
-    return models
+    return await model_catalog.get_models(pool, force_refresh=force_refresh)
 
 
 # ============================================================================
@@ -843,9 +1032,9 @@ async def toggle_model(
 
                 logger.info(f"Admin {admin.get('email')} created and {'enabled' if enabled else 'disabled'} model {model_id}")
 
-        # Clear cache to force refresh
-        global _model_cache
-        _model_cache['timestamp'] = 0
+        # Apply the new status to the cached catalog (no upstream refetch)
+        await model_catalog.apply_db_changes(pool)
+        await model_list_cache.invalidate(f"model {model_id} toggled")
 
         return {
             'success': True,
@@ -886,6 +1075,7 @@ async def refresh_model_catalog(
         return {
             'success': True,
             'total_models': len(models),
+            'catalog': model_catalog.get_stats(),
             'message': 'Model catalog refreshed successfully'
         }
 
@@ -911,6 +1101,8 @@ async def list_providers(request: Request):
     try:
         pool = await get_db_pool(request)
 
+        all_models = await get_all_models_cached(pool)
+
         providers = []
         for provider_key, config in PROVIDER_CONFIGS.items():
             # Check if API key is configured
@@ -918,7 +1110,6 @@ async def list_providers(request: Request):
             has_key = api_key is not None
 
             # Get model count for this provider
-            all_models = await get_all_models_cached(pool)
             model_count = sum(1 for m in all_models if m['provider'] == provider_key)
             enabled_count = sum(1 for m in all_models if m['provider'] == provider_key and m['enabled'])
 
@@ -18,6 +18,7 @@ import logging
 from typing import List, Dict, Any, Optional
 from fastapi import APIRouter, HTTPException, Depends, Request, Query
 from pydantic import BaseModel, Field
+from db_manager import db_manager
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -645,19 +646,12 @@ async def get_default_models_for_app(
     curated model list based on the user's subscription tier.
     """
     from model_list_manager import get_model_list_manager
-    import asyncpg
 
     try:
         manager = get_model_list_manager()
 
         # Get connection for custom query
-        conn = await asyncpg.connect(
-            host=os.getenv("POSTGRES_HOST", "unicorn-postgresql"),
-            port=int(os.getenv("POSTGRES_PORT", "5432")),
-            user=os.getenv("POSTGRES_USER", "unicorn"),
-            password=os.getenv("POSTGRES_PASSWORD", "unicorn"),
-            database=os.getenv("POSTGRES_DB", "unicorn_db")
-        )
+        conn = await db_manager.connect('default')
 
         try:
             # Find the default list for this app
@@ -0,0 +1,181 @@
+"""
+Materialized Model List Responses
+
+The SDK-facing model list endpoints (/api/v1/llm/models, /models/curated and
+/models/categorized) only change when an admin edits a curated list, a
+model, or a tier's pricing, yet clients poll them constantly. This module
+keeps each distinct response as pre-serialized JSON bytes with a strong
+ETag, keyed by what the response depends on (endpoint, app slug, tier,
+BYOK provider set):
+
+- a hit is a dict lookup; a client sending If-None-Match gets a bodyless 304
+- concurrent misses for the same key share one build
+- writers (model_list_manager, the tier/pricing admin APIs and the model
+  admin endpoints) call invalidate(), which clears this worker and bumps a
+  Redis generation counter that other workers check every
+  MODEL_LIST_SYNC_INTERVAL seconds
+- entries also expire after MODEL_LIST_CACHE_TTL seconds as a safety net
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from fastapi import Request, Response
+
+logger = logging.getLogger(__name__)
+
+MODEL_LIST_CACHE_TTL = float(os.getenv('MODEL_LIST_CACHE_TTL', '300'))
+MODEL_LIST_SYNC_INTERVAL = float(os.getenv('MODEL_LIST_SYNC_INTERVAL', '5'))
+
+GENERATION_KEY = 'llm:model_lists:generation'
+
+
+@dataclass
+class CachedResponse:
+    """One serialized model list response"""
+    body: bytes
+    etag: str
+    built_at: float
+
+
+def serialize(payload: Any) -> CachedResponse:
+    """JSON-encode a payload once and derive its strong ETag from the bytes"""
+    body = json.dumps(payload, separators=(',', ':'), default=str).encode()
+    etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+    return CachedResponse(body=body, etag=etag, built_at=time.time())
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check (weak comparison, as RFC 9110 requires for GET)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    candidates = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+    return etag in candidates
+
+
+class ModelListCache:
+    """Per-key serialized responses with single-flight builds and shared invalidation"""
+
+    def __init__(self, ttl: float = MODEL_LIST_CACHE_TTL, sync_interval: float = MODEL_LIST_SYNC_INTERVAL):
+        self.ttl = ttl
+        self.sync_interval = sync_interval
+        self.redis = None
+
+        self.entries: Dict[Hashable, CachedResponse] = {}
+        self._building: Dict[Hashable, asyncio.Task] = {}
+        self._local_generation = 0  # bumped on every invalidation seen here
+        self._shared_generation: Optional[str] = None
+        self._synced_at = 0.0
+
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.invalidations = 0
+
+    def attach(self, redis_client):
+        """Share invalidations with the other workers through Redis"""
+        self.redis = redis_client
+
+    async def get(self, key: Hashable, build: Callable[[], Awaitable[Any]]) -> CachedResponse:
+        """Cached response for key, building it from build() on a miss"""
+        await self._sync()
+
+        entry = self.entries.get(key)
+        if entry is not None and time.time() - entry.built_at < self.ttl:
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        task = self._building.get(key)
+        if task is None:
+            task = asyncio.create_task(self._build(key, build, self._local_generation))
+            self._building[key] = task
+            task.add_done_callback(lambda done, key=key: self._forget_build(key, done))
+        return await asyncio.shield(task)
+
+    async def respond(
+        self,
+        request: Request,
+        key: Hashable,
+        build: Callable[[], Awaitable[Any]]
+    ) -> Response:
+        """The cached response for key as a 200, or a 304 when the client already has it"""
+        entry = await self.get(key, build)
+        headers = {'ETag': entry.etag, 'Cache-Control': 'private, no-cache'}
+        if etag_matches(request.headers.get('if-none-match'), entry.etag):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry.body, media_type='application/json', headers=headers)
+
+    async def invalidate(self, reason: str = ''):
+        """Drop every cached response here and on the other workers"""
+        self._clear()
+        self.invalidations += 1
+        logger.info(f"Model list responses invalidated{f' ({reason})' if reason else ''}")
+
+        if self.redis is None:
+            return
+        try:
+            self._shared_generation = str(await self.redis.incr(GENERATION_KEY))
+            self._synced_at = time.time()
+        except Exception as e:
+            logger.warning(f"Failed to publish model list invalidation: {e}")
+
+    async def _build(
+        self,
+        key: Hashable,
+        build: Callable[[], Awaitable[Any]],
+        generation: int
+    ) -> CachedResponse:
+        entry = serialize(await build())
+        # An invalidation during the build means the data read may be stale
+        if generation == self._local_generation:
+            self.entries[key] = entry
+        return entry
+
+    async def _sync(self):
+        if self.redis is None or time.time() - self._synced_at < self.sync_interval:
+            return
+        self._synced_at = time.time()
+        try:
+            generation = await self.redis.get(GENERATION_KEY)
+        except Exception as e:
+            logger.warning(f"Failed to read model list generation: {e}")
+            return
+        generation = None if generation is None else str(generation)
+        if generation != self._shared_generation:
+            if self._shared_generation is not None or generation is not None:
+                self._clear()
+            self._shared_generation = generation
+
+    def _forget_build(self, key: Hashable, task: asyncio.Task):
+        if self._building.get(key) is task:
+            del self._building[key]
+
+    def _clear(self):
+        self._local_generation += 1
+        self.entries.clear()
+        # Requests after an invalidation must not join builds started before it
+        self._building.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'entries': len(self.entries),
+            'bytes': sum(len(e.body) for e in self.entries.values()),
+            'hits': self.hits,
+            'misses': self.misses,
+            'not_modified': self.not_modified,
+            'invalidations': self.invalidations,
+        }
+
+
+# Global instance
+model_list_cache = ModelListCache()
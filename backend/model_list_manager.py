@@ -12,7 +12,6 @@ Classes:
 - ModelListManager: Core business logic for model list management
 """
 
-import os
 import sys
 import logging
 from typing import List, Dict, Any, Optional
@@ -20,6 +19,8 @@ from datetime import datetime
 from decimal import Decimal
 import asyncpg
 import json
+from db_manager import db_manager
+from model_list_cache import model_list_cache
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -58,6 +59,8 @@ class ModelListManager:
     - Model management within lists
     - User preferences (favorites, hidden)
     - Audit logging for all changes
+    - Invalidating the materialized model list responses (model_list_cache)
+      after every list or list item write
     """
 
     def __init__(self, pool: Optional[asyncpg.Pool] = None):
@@ -74,13 +77,7 @@ class ModelListManager:
         if self.pool:
             return await self.pool.acquire()
 
-        return await asyncpg.connect(
-            host=os.getenv("POSTGRES_HOST", "unicorn-postgresql"),
-            port=int(os.getenv("POSTGRES_PORT", "5432")),
-            user=os.getenv("POSTGRES_USER", "unicorn"),
-            password=os.getenv("POSTGRES_PASSWORD", "unicorn"),
-            database=os.getenv("POSTGRES_DB", "unicorn_db")
-        )
+        return await db_manager.connect('default')
 
     async def _release_connection(self, conn):
         """Release a database connection."""
@@ -274,6 +271,8 @@ class ModelListManager:
                 conn=conn
             )
 
+            await model_list_cache.invalidate("create_list")
+
             return {
                 "id": row["id"],
                 "name": row["name"],
@@ -394,6 +393,8 @@ class ModelListManager:
                 conn=conn
             )
 
+            await model_list_cache.invalidate("update_list")
+
             result = {
                 "id": row["id"],
                 "name": row["name"],
@@ -465,6 +466,8 @@ class ModelListManager:
                 conn=conn
             )
 
+            await model_list_cache.invalidate("delete_list")
+
             return True
         finally:
             await self._release_connection(conn)
@@ -638,6 +641,8 @@ class ModelListManager:
                 conn=conn
             )
 
+            await model_list_cache.invalidate("add_model")
+
             return {
                 "id": row["id"],
                 "list_id": row["list_id"],
@@ -759,6 +764,8 @@ class ModelListManager:
                 conn=conn
             )
 
+            await model_list_cache.invalidate("update_model")
+
             return {
                 "id": row["id"],
                 "list_id": row["list_id"],
@@ -832,6 +839,8 @@ class ModelListManager:
                 conn=conn
             )
 
+            await model_list_cache.invalidate("remove_model")
+
             return True
         finally:
             await self._release_connection(conn)
@@ -884,6 +893,8 @@ class ModelListManager:
                 conn=conn
             )
 
+            await model_list_cache.invalidate("reorder_models")
+
             return True
         finally:
             await self._release_connection(conn)
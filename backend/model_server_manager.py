@@ -11,10 +11,10 @@ import logging
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
-import asyncpg
 from cryptography.fernet import Fernet
 import base64
 from model_adapters import create_adapter, ServerAdapter, ModelInfo, ServerMetrics
+from db_manager import db_manager
 
 logger = logging.getLogger(__name__)
 
@@ -65,21 +65,15 @@ class ModelRouteCreate(BaseModel):
 class ModelServerManager:
     """Manages model servers and routing"""
 
-    def __init__(self, db_url: str = None):
-        self.db_url = db_url or os.environ.get(
-            'DATABASE_URL',
-            f"postgresql://{os.environ.get('POSTGRES_USER', 'unicorn')}:"
-            f"{os.environ.get('POSTGRES_PASSWORD', 'password')}@"
-            f"{os.environ.get('POSTGRES_HOST', 'unicorn-postgresql')}:5432/"
-            f"{os.environ.get('POSTGRES_DB', 'unicorn_db')}"
-        )
+    def __init__(self):
         self.db_pool = None
         self.adapters: Dict[str, ServerAdapter] = {}
 
     async def initialize(self):
         """Initialize database connection pool and run migrations"""
         try:
-            self.db_pool = await asyncpg.create_pool(self.db_url, min_size=1, max_size=10)
+            await db_manager.start()
+            self.db_pool = db_manager.subsystem('default')
             await self._run_migrations()
             logger.info("Model server manager initialized")
         except Exception as e:
@@ -305,6 +305,23 @@ class ChurnPredictor:
 
         return predictions
 
+    def predict_proba_matrix(self, features: np.ndarray) -> np.ndarray:
+        """
+        Churn probabilities (0-1) for a prepared feature matrix.
+
+        Args:
+            features: Array of shape (users, len(FEATURE_COLUMNS)), columns
+                in FEATURE_COLUMNS order
+
+        Returns:
+            Array of probabilities, one per row
+        """
+        if not self.trained and not self.load_model():
+            raise RuntimeError("No trained churn model available")
+
+        X = pd.DataFrame(features, columns=self.FEATURE_COLUMNS).fillna(0)
+        return self.model.predict_proba(self.scaler.transform(X))[:, 1]
+
     def save_model(self) -> bool:
         """
         Persist trained model and scaler to disk.
@@ -234,24 +234,32 @@ class MultiServerManager:
     
     # ========== HEALTH CHECKS ==========
     
-    async def _perform_health_check(
+    async def fetch_health(
         self,
         server_id: str,
         api_url: str,
-        api_token: str
+        api_token: str,
+        timeout: Optional[float] = None
     ) -> Dict[str, Any]:
-        """Perform health check on a managed server"""
+        """
+        Query a managed server's /health endpoint without writing anything.
+        
+        Returns a health check record for record_health_checks(); connection
+        errors and timeouts give status 'unreachable' with an "error".
+        """
         
         await self.initialize()
         
         start_time = datetime.utcnow()
+        record = {"server_id": server_id, "timestamp": start_time}
         
         try:
             async with self.http_session.get(
                 f"{api_url}/health",
-                headers={"Authorization": f"Bearer {api_token}"}
+                headers={"Authorization": f"Bearer {api_token}"},
+                timeout=aiohttp.ClientTimeout(total=timeout) if timeout else None
             ) as response:
-                response_time_ms = int((datetime.utcnow() - start_time).total_seconds() * 1000)
+                record["response_time_ms"] = int((datetime.utcnow() - start_time).total_seconds() * 1000)
                 
                 if response.status == 200:
                     data = await response.json()
@@ -266,101 +274,88 @@ class MultiServerManager:
                     elif not services_healthy:
                         health_status = "degraded"
                     
-                    # Record health check
-                    async with self.db.acquire() as conn:
-                        await conn.execute(
-                            """
-                            INSERT INTO server_health_checks (
-                                id, server_id, timestamp, status, response_time_ms,
-                                database_healthy, redis_healthy, services_healthy
-                            )
-                            VALUES (DEFAULT, $1, $2, $3, $4, $5, $6, $7)
-                            """,
-                            server_id, start_time, health_status, response_time_ms,
-                            database_healthy, redis_healthy, services_healthy
-                        )
-                        
-                        # Update server health status
-                        await conn.execute(
-                            """
-                            UPDATE managed_servers
-                            SET health_status = $1, last_health_check_at = $2, last_seen_at = $2
-                            WHERE id = $3
-                            """,
-                            health_status, start_time, server_id
-                        )
-                    
-                    return {
-                        "server_id": server_id,
-                        "status": health_status,
-                        "response_time_ms": response_time_ms,
-                        "timestamp": start_time.isoformat()
-                    }
-                
+                    record.update(
+                        status=health_status,
+                        database_healthy=database_healthy,
+                        redis_healthy=redis_healthy,
+                        services_healthy=services_healthy
+                    )
                 else:
                     # Unhealthy response
-                    error_message = f"HTTP {response.status}"
-                    
-                    async with self.db.acquire() as conn:
-                        await conn.execute(
-                            """
-                            INSERT INTO server_health_checks (
-                                id, server_id, timestamp, status, response_time_ms,
-                                error_message
-                            )
-                            VALUES (DEFAULT, $1, $2, 'critical', $3, $4)
-                            """,
-                            server_id, start_time, response_time_ms, error_message
-                        )
-                        
-                        await conn.execute(
-                            """
-                            UPDATE managed_servers
-                            SET health_status = 'critical', last_health_check_at = $1
-                            WHERE id = $2
-                            """,
-                            start_time, server_id
-                        )
-                    
-                    return {
-                        "server_id": server_id,
-                        "status": "critical",
-                        "error": error_message,
-                        "timestamp": start_time.isoformat()
-                    }
+                    record.update(status="critical", error=f"HTTP {response.status}")
         
         except Exception as e:
             # Connection error or timeout
-            error_message = str(e)
-            
-            async with self.db.acquire() as conn:
-                await conn.execute(
+            record.update(status="unreachable", error=str(e) or type(e).__name__)
+        
+        return record
+    
+    async def record_health_checks(self, records: List[Dict[str, Any]]):
+        """Store health check records and server health in one batch"""
+        if not records:
+            return
+        
+        async with self.db.acquire() as conn:
+            async with conn.transaction():
+                await conn.executemany(
                     """
                     INSERT INTO server_health_checks (
-                        id, server_id, timestamp, status, error_message
+                        id, server_id, timestamp, status, response_time_ms,
+                        database_healthy, redis_healthy, services_healthy,
+                        error_message
                     )
-                    VALUES (DEFAULT, $1, $2, 'unreachable', $3)
+                    VALUES (DEFAULT, $1, $2, $3, $4, $5, $6, $7, $8)
                     """,
-                    server_id, start_time, error_message
+                    [
+                        (
+                            r["server_id"], r["timestamp"], r["status"], r.get("response_time_ms"),
+                            r.get("database_healthy"), r.get("redis_healthy"), r.get("services_healthy"),
+                            r.get("error")
+                        )
+                        for r in records
+                    ]
                 )
                 
+                # Only a successful response counts as the server being seen
                 await conn.execute(
                     """
-                    UPDATE managed_servers
-                    SET health_status = 'unreachable', last_health_check_at = $1
-                    WHERE id = $2
+                    UPDATE managed_servers m
+                    SET health_status = u.status,
+                        last_health_check_at = u.checked_at,
+                        last_seen_at = COALESCE(u.seen_at, m.last_seen_at)
+                    FROM unnest($1::text[], $2::text[], $3::timestamptz[], $4::timestamptz[])
+                        AS u(id, status, checked_at, seen_at)
+                    WHERE m.id = u.id
                     """,
-                    start_time, server_id
+                    [str(r["server_id"]) for r in records],
+                    [r["status"] for r in records],
+                    [r["timestamp"] for r in records],
+                    [None if r.get("error") else r["timestamp"] for r in records]
                 )
-            
-            logger.error(f"Health check failed for server {server_id}: {error_message}")
-            
-            return {
-                "server_id": server_id,
-                "status": "unreachable",
-                "error": error_message,
-                "timestamp": start_time.isoformat()
-            }
+    
+    async def _perform_health_check(
+        self,
+        server_id: str,
+        api_url: str,
+        api_token: str
+    ) -> Dict[str, Any]:
+        """Perform health check on a managed server"""
+        
+        record = await self.fetch_health(server_id, api_url, api_token)
+        await self.record_health_checks([record])
+        
+        result = {
+            "server_id": server_id,
+            "status": record["status"],
+            "timestamp": record["timestamp"].isoformat()
+        }
+        if record.get("error"):
+            result["error"] = record["error"]
+            if record["status"] == "unreachable":
+                logger.error(f"Health check failed for server {server_id}: {record['error']}")
+        else:
+            result["response_time_ms"] = record["response_time_ms"]
+        return result
     
     async def check_all_servers_health(self, organization_id: str) -> List[Dict[str, Any]]:
         """Check health of all active servers in organization"""
@@ -437,65 +432,99 @@ class MultiServerManager:
     
     # ========== METRICS COLLECTION ==========
     
-    async def collect_server_metrics(
+    async def fetch_metrics(
         self,
         server_id: str,
         api_url: str,
-        api_token: str
+        api_token: str,
+        timeout: Optional[float] = None
     ) -> Dict[str, Any]:
-        """Collect metrics from a managed server"""
+        """
+        Fetch a managed server's current metrics without writing anything.
+        
+        Returns a record for record_metrics(), or one with an "error".
+        """
         
         await self.initialize()
         
         try:
             async with self.http_session.get(
                 f"{api_url}/api/v1/metrics/current",
-                headers={"Authorization": f"Bearer {api_token}"}
+                headers={"Authorization": f"Bearer {api_token}"},
+                timeout=aiohttp.ClientTimeout(total=timeout) if timeout else None
             ) as response:
                 if response.status == 200:
                     data = await response.json()
-                    
-                    # Store in aggregated metrics
-                    async with self.db.acquire() as conn:
-                        await conn.execute(
-                            """
-                            INSERT INTO server_metrics_aggregated (
-                                id, server_id, timestamp, period,
-                                cpu_percent, memory_percent, disk_percent,
-                                network_rx_bytes, network_tx_bytes,
-                                active_services, failed_services, total_services,
-                                llm_requests, llm_cost_usd,
-                                active_users, total_users
-                            )
-                            VALUES (
-                                DEFAULT, $1, $2, '1m',
-                                $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14
-                            )
-                            """,
-                            server_id,
-                            datetime.utcnow(),
-                            data.get("cpu_percent"),
-                            data.get("memory_percent"),
-                            data.get("disk_percent"),
-                            data.get("network_rx_bytes"),
-                            data.get("network_tx_bytes"),
-                            data.get("active_services"),
-                            data.get("failed_services"),
-                            data.get("total_services"),
-                            data.get("llm_requests"),
-                            data.get("llm_cost_usd"),
-                            data.get("active_users"),
-                            data.get("total_users")
-                        )
-                    
-                    return {"status": "success", "server_id": server_id}
+                    return {"server_id": server_id, "timestamp": datetime.utcnow(), "data": data}
                 
-                else:
-                    return {"status": "error", "server_id": server_id, "error": f"HTTP {response.status}"}
+                return {"server_id": server_id, "error": f"HTTP {response.status}"}
         
+        except Exception as e:
+            return {"server_id": server_id, "error": str(e) or type(e).__name__}
+    
+    async def record_metrics(self, records: List[Dict[str, Any]]):
+        """Store fetched metrics in server_metrics_aggregated in one batch"""
+        rows = [
+            (
+                r["server_id"],
+                r["timestamp"],
+                r["data"].get("cpu_percent"),
+                r["data"].get("memory_percent"),
+                r["data"].get("disk_percent"),
+                r["data"].get("network_rx_bytes"),
+                r["data"].get("network_tx_bytes"),
+                r["data"].get("active_services"),
+                r["data"].get("failed_services"),
+                r["data"].get("total_services"),
+                r["data"].get("llm_requests"),
+                r["data"].get("llm_cost_usd"),
+                r["data"].get("active_users"),
+                r["data"].get("total_users")
+            )
+            for r in records if not r.get("error")
+        ]
+        if not rows:
+            return
+        
+        async with self.db.acquire() as conn:
+            await conn.executemany(
+                """
+                INSERT INTO server_metrics_aggregated (
+                    id, server_id, timestamp, period,
+                    cpu_percent, memory_percent, disk_percent,
+                    network_rx_bytes, network_tx_bytes,
+                    active_services, failed_services, total_services,
+                    llm_requests, llm_cost_usd,
+                    active_users, total_users
+                )
+                VALUES (
+                    DEFAULT, $1, $2, '1m',
+                    $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14
+                )
+                """,
+                rows
+            )
+    
+    async def collect_server_metrics(
+        self,
+        server_id: str,
+        api_url: str,
+        api_token: str
+    ) -> Dict[str, Any]:
+        """Collect metrics from a managed server"""
+        
+        record = await self.fetch_metrics(server_id, api_url, api_token)
+        if record.get("error"):
+            logger.error(f"Metrics collection failed for {server_id}: {record['error']}")
+            return {"status": "error", "server_id": server_id, "error": record["error"]}
+        
+        try:
+            await self.record_metrics([record])
         except Exception as e:
             logger.error(f"Metrics collection failed for {server_id}: {e}")
             return {"status": "error", "server_id": server_id, "error": str(e)}
+        
+        return {"status": "success", "server_id": server_id}
     
     async def get_server_metrics(
         self,
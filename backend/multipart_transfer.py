@@ -0,0 +1,465 @@
+"""
+Multipart Transfer Engine for Ops-Center Cloud Backups
+
+Concurrent, resumable multipart uploads and parallel ranged downloads for
+S3-compatible storage. All blocking client calls run in a bounded thread
+pool so the API event loop stays responsive while large backups move.
+
+The engine only relies on the following client methods, so it works with
+boto3 as well as any local S3 stand-in used in tests:
+
+    create_multipart_upload, upload_part, list_parts,
+    complete_multipart_upload, abort_multipart_upload,
+    head_object, get_object
+"""
+
+import os
+import json
+import math
+import time
+import base64
+import hashlib
+import logging
+import asyncio
+import threading
+from dataclasses import dataclass, field, asdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MiB = 1024 * 1024
+
+# S3 protocol limits
+S3_MIN_PART_SIZE = 5 * MiB
+S3_MAX_PART_SIZE = 5 * 1024 * MiB
+S3_MAX_PARTS = 10000
+
+# Aim for roughly this many parts per object; small files get MIN parts
+TARGET_PART_COUNT = 1000
+
+PART_RETRIES = 3
+RETRY_BACKOFF_SECONDS = 1.0
+
+
+@dataclass
+class UploadState:
+    """Persisted progress of one multipart upload"""
+    bucket: str
+    key: str
+    upload_id: str
+    file_size: int
+    file_mtime: float
+    part_size: int
+    parts: Dict[int, Dict[str, str]] = field(default_factory=dict)
+    created_at: float = field(default_factory=time.time)
+
+    def matches(self, size: int, mtime: float, part_size: int) -> bool:
+        """True if the local file is unchanged since the upload started"""
+        return (
+            self.file_size == size
+            and abs(self.file_mtime - mtime) < 1e-6
+            and self.part_size == part_size
+        )
+
+    def to_json(self) -> str:
+        data = asdict(self)
+        data["parts"] = {str(n): p for n, p in self.parts.items()}
+        return json.dumps(data)
+
+    @classmethod
+    def from_json(cls, raw: str) -> "UploadState":
+        data = json.loads(raw)
+        data["parts"] = {int(n): p for n, p in data.get("parts", {}).items()}
+        return cls(**data)
+
+
+class UploadStateStore:
+    """Stores UploadState records as small JSON files, one per object key"""
+
+    def __init__(self, state_dir: str):
+        self.state_dir = Path(state_dir)
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _path(self, bucket: str, key: str) -> Path:
+        digest = hashlib.sha1(f"{bucket}/{key}".encode()).hexdigest()
+        return self.state_dir / f"{digest}.json"
+
+    def load(self, bucket: str, key: str) -> Optional[UploadState]:
+        path = self._path(bucket, key)
+        try:
+            return UploadState.from_json(path.read_text())
+        except FileNotFoundError:
+            return None
+        except (ValueError, TypeError) as e:
+            logger.warning(f"Discarding corrupt upload state {path}: {e}")
+            path.unlink(missing_ok=True)
+            return None
+
+    def save(self, state: UploadState):
+        """Atomically replace the state file (safe against crashes mid-write)"""
+        path = self._path(state.bucket, state.key)
+        with self._lock:
+            tmp_path = path.with_suffix(".tmp")
+            tmp_path.write_text(state.to_json())
+            os.replace(tmp_path, path)
+
+    def delete(self, bucket: str, key: str):
+        self._path(bucket, key).unlink(missing_ok=True)
+
+
+class MultipartTransferEngine:
+    """Bounded-concurrency multipart transfers for an S3-compatible bucket"""
+
+    def __init__(
+        self,
+        s3_client: Any,
+        bucket: str,
+        state_dir: str,
+        concurrency: int = 4,
+        min_part_size: int = 8 * MiB,
+        max_buffer_bytes: int = 256 * MiB,
+    ):
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.concurrency = max(1, concurrency)
+        self.min_part_size = max(S3_MIN_PART_SIZE, min_part_size)
+        self.max_buffer_bytes = max_buffer_bytes
+        self.state_store = UploadStateStore(state_dir)
+        self._state_lock = threading.Lock()
+        # One reader/writer thread plus one thread per in-flight part
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.concurrency + 1,
+            thread_name_prefix="s3-transfer",
+        )
+
+    # ------------------------------------------------------------------
+    # Sizing
+    # ------------------------------------------------------------------
+
+    def choose_part_size(self, file_size: int) -> int:
+        """
+        Pick a part size for a file: at least min_part_size, large enough to
+        stay under the S3 part limit, and rounded up to a whole MiB.
+        """
+        target = math.ceil(file_size / TARGET_PART_COUNT)
+        part_size = max(self.min_part_size, math.ceil(target / MiB) * MiB)
+        part_size = max(part_size, math.ceil(file_size / S3_MAX_PARTS))
+        return min(part_size, S3_MAX_PART_SIZE)
+
+    def effective_concurrency(self, part_size: int) -> int:
+        """Limit in-flight parts so buffered data stays within max_buffer_bytes"""
+        return max(1, min(self.concurrency, self.max_buffer_bytes // part_size))
+
+    async def run_in_pool(self, func: Callable, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, lambda: func(*args, **kwargs))
+
+    # ------------------------------------------------------------------
+    # Upload
+    # ------------------------------------------------------------------
+
+    async def upload_file(
+        self,
+        local_path: str,
+        key: str,
+        metadata: Optional[Dict[str, str]] = None,
+        progress_callback: Optional[Callable] = None,
+    ) -> Dict[str, Any]:
+        """
+        Upload a file with concurrent multipart parts, resuming a previous
+        interrupted upload of the same key when the local file is unchanged.
+
+        Returns:
+            Dict with upload_id, part count, resumed part count and the
+            SHA-256 of the whole file (computed while streaming).
+        """
+        stat = os.stat(local_path)
+        file_size = stat.st_size
+        part_size = self.choose_part_size(file_size)
+        part_count = max(1, math.ceil(file_size / part_size))
+
+        state = await self._load_resumable_state(key, file_size, stat.st_mtime, part_size)
+        if state is None:
+            response = await self.run_in_pool(
+                self.s3_client.create_multipart_upload,
+                Bucket=self.bucket,
+                Key=key,
+                Metadata=metadata or {},
+            )
+            state = UploadState(
+                bucket=self.bucket,
+                key=key,
+                upload_id=response["UploadId"],
+                file_size=file_size,
+                file_mtime=stat.st_mtime,
+                part_size=part_size,
+            )
+            await self.run_in_pool(self.state_store.save, state)
+
+        resumed = len(state.parts)
+        sha256 = hashlib.sha256()
+        semaphore = asyncio.Semaphore(self.effective_concurrency(part_size))
+        tasks: List[asyncio.Task] = []
+        progress = {"bytes": 0}
+
+        async def report(nbytes: int):
+            progress["bytes"] += nbytes
+            if progress_callback:
+                await progress_callback(progress["bytes"])
+
+        async def upload_one(part_number: int, data: bytes, md5_digest: bytes):
+            try:
+                etag = await self.run_in_pool(
+                    self._upload_part_sync, state, part_number, data, md5_digest
+                )
+                logger.debug(f"Uploaded part {part_number}/{part_count} of {key} ({etag})")
+                await report(len(data))
+            finally:
+                semaphore.release()
+
+        with open(local_path, "rb") as f:
+            for part_number in range(1, part_count + 1):
+                await semaphore.acquire()
+
+                if any(t.done() and t.exception() for t in tasks):
+                    semaphore.release()
+                    break
+
+                data, md5_digest = await self.run_in_pool(self._read_part, f, part_size, sha256)
+                uploaded = state.parts.get(part_number)
+                if uploaded and uploaded.get("md5") == md5_digest.hex():
+                    semaphore.release()
+                    await report(len(data))
+                    continue
+
+                tasks.append(asyncio.create_task(upload_one(part_number, data, md5_digest)))
+
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if errors:
+            # Keep the upload and its state so the next attempt resumes
+            logger.error(
+                f"Multipart upload of {key} interrupted after "
+                f"{len(state.parts)}/{part_count} parts: {errors[0]}"
+            )
+            raise errors[0]
+
+        parts = [
+            {"PartNumber": n, "ETag": state.parts[n]["etag"]}
+            for n in sorted(state.parts)
+        ]
+        response = await self.run_in_pool(
+            self.s3_client.complete_multipart_upload,
+            Bucket=self.bucket,
+            Key=key,
+            UploadId=state.upload_id,
+            MultipartUpload={"Parts": parts},
+        )
+        await self.run_in_pool(self.state_store.delete, self.bucket, key)
+
+        logger.info(
+            f"Multipart upload completed: {key} ({part_count} parts of "
+            f"{part_size // MiB}MiB, {resumed} resumed)"
+        )
+
+        return {
+            "key": key,
+            "upload_id": state.upload_id,
+            "size": file_size,
+            "part_size": part_size,
+            "parts": part_count,
+            "resumed_parts": resumed,
+            "sha256": sha256.hexdigest(),
+            "etag": (response or {}).get("ETag", "").strip('"'),
+        }
+
+    async def _load_resumable_state(
+        self, key: str, file_size: int, mtime: float, part_size: int
+    ) -> Optional[UploadState]:
+        """Load saved state and reconcile it with the parts S3 actually holds"""
+        state = await self.run_in_pool(self.state_store.load, self.bucket, key)
+        if state is None:
+            return None
+
+        if not state.matches(file_size, mtime, part_size):
+            logger.info(f"Local file changed since upload of {key} started, restarting")
+            await self.abort_upload(key, state.upload_id)
+            return None
+
+        try:
+            remote_parts = await self.run_in_pool(self._list_parts_sync, key, state.upload_id)
+        except Exception as e:
+            logger.info(f"Previous upload of {key} is no longer resumable ({e}), restarting")
+            await self.run_in_pool(self.state_store.delete, self.bucket, key)
+            return None
+
+        state.parts = {
+            n: p for n, p in state.parts.items()
+            if remote_parts.get(n) == p["etag"]
+        }
+        logger.info(f"Resuming upload of {key}: {len(state.parts)} parts already stored")
+        return state
+
+    async def abort_upload(self, key: str, upload_id: Optional[str] = None):
+        """Abort an in-progress multipart upload and forget its saved state"""
+        if upload_id is None:
+            state = await self.run_in_pool(self.state_store.load, self.bucket, key)
+            upload_id = state.upload_id if state else None
+        if upload_id:
+            try:
+                await self.run_in_pool(
+                    self.s3_client.abort_multipart_upload,
+                    Bucket=self.bucket,
+                    Key=key,
+                    UploadId=upload_id,
+                )
+            except Exception as e:
+                logger.warning(f"Failed to abort multipart upload {upload_id}: {e}")
+        await self.run_in_pool(self.state_store.delete, self.bucket, key)
+
+    @staticmethod
+    def _read_part(f, part_size: int, sha256) -> Tuple[bytes, bytes]:
+        """Read the next part sequentially, feeding the whole-file checksum"""
+        data = f.read(part_size)
+        sha256.update(data)
+        return data, hashlib.md5(data).digest()
+
+    def _upload_part_sync(
+        self, state: UploadState, part_number: int, data: bytes, md5_digest: bytes
+    ) -> str:
+        for attempt in range(1, PART_RETRIES + 1):
+            try:
+                response = self.s3_client.upload_part(
+                    Bucket=self.bucket,
+                    Key=state.key,
+                    PartNumber=part_number,
+                    UploadId=state.upload_id,
+                    Body=data,
+                    ContentMD5=base64.b64encode(md5_digest).decode(),
+                )
+                break
+            except Exception as e:
+                if attempt == PART_RETRIES:
+                    raise
+                logger.warning(f"Part {part_number} of {state.key} failed ({e}), retrying")
+                time.sleep(RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+
+        etag = response["ETag"]
+        with self._state_lock:
+            state.parts[part_number] = {"etag": etag, "md5": md5_digest.hex()}
+            self.state_store.save(state)
+        return etag
+
+    def _list_parts_sync(self, key: str, upload_id: str) -> Dict[int, str]:
+        parts: Dict[int, str] = {}
+        kwargs = {"Bucket": self.bucket, "Key": key, "UploadId": upload_id}
+        while True:
+            response = self.s3_client.list_parts(**kwargs)
+            for part in response.get("Parts", []):
+                parts[part["PartNumber"]] = part["ETag"]
+            if not response.get("IsTruncated"):
+                return parts
+            kwargs["PartNumberMarker"] = response["NextPartNumberMarker"]
+
+    # ------------------------------------------------------------------
+    # Download
+    # ------------------------------------------------------------------
+
+    async def download_file(
+        self,
+        key: str,
+        local_path: str,
+        expected_sha256: Optional[str] = None,
+        progress_callback: Optional[Callable] = None,
+    ) -> Dict[str, Any]:
+        """
+        Download an object with concurrent ranged GETs into a temporary file,
+        then move it into place once complete (and verified, if a checksum
+        is given).
+        """
+        head = await self.run_in_pool(self.s3_client.head_object, Bucket=self.bucket, Key=key)
+        size = head["ContentLength"]
+        range_size = self.choose_part_size(size)
+        ranges = [
+            (start, min(start + range_size, size) - 1)
+            for start in range(0, size, range_size)
+        ]
+
+        tmp_path = f"{local_path}.partial"
+        fd = os.open(tmp_path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            try:
+                os.ftruncate(fd, size)
+                semaphore = asyncio.Semaphore(self.effective_concurrency(range_size))
+                progress = {"bytes": 0}
+
+                async def fetch(start: int, end: int):
+                    async with semaphore:
+                        written = await self.run_in_pool(self._download_range_sync, key, fd, start, end)
+                    progress["bytes"] += written
+                    if progress_callback:
+                        await progress_callback(progress["bytes"])
+
+                await asyncio.gather(*(fetch(start, end) for start, end in ranges))
+                await self.run_in_pool(os.fsync, fd)
+            finally:
+                os.close(fd)
+
+            sha256 = None
+            if expected_sha256:
+                sha256 = await self.run_in_pool(file_sha256, tmp_path)
+                if sha256 != expected_sha256:
+                    raise ValueError(
+                        f"Checksum mismatch for {key}: expected {expected_sha256}, got {sha256}"
+                    )
+
+            os.replace(tmp_path, local_path)
+        except BaseException:
+            # Never leave a half-written .partial behind
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+        logger.info(f"Downloaded {key} in {len(ranges)} ranged parts")
+
+        return {"key": key, "size": size, "ranges": len(ranges), "sha256": sha256}
+
+    def _download_range_sync(self, key: str, fd: int, start: int, end: int) -> int:
+        for attempt in range(1, PART_RETRIES + 1):
+            try:
+                response = self.s3_client.get_object(
+                    Bucket=self.bucket, Key=key, Range=f"bytes={start}-{end}"
+                )
+                body = response["Body"]
+                offset = start
+                while True:
+                    chunk = body.read(MiB)
+                    if not chunk:
+                        break
+                    os.pwrite(fd, chunk, offset)
+                    offset += len(chunk)
+                if offset != end + 1:
+                    raise IOError(f"Short read for bytes {start}-{end} of {key}")
+                return offset - start
+            except Exception as e:
+                if attempt == PART_RETRIES:
+                    raise
+                logger.warning(f"Range {start}-{end} of {key} failed ({e}), retrying")
+                time.sleep(RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+
+def file_sha256(path: str, chunk_size: int = MiB) -> str:
+    """SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
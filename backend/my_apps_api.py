@@ -9,6 +9,7 @@ from typing import List, Optional
 from fastapi import APIRouter, HTTPException, Depends, Request
 from pydantic import BaseModel
 import asyncpg
+from db_manager import db_manager
 
 # Router configuration
 router = APIRouter(prefix="/api/v1/my-apps", tags=["my-apps"])
@@ -39,13 +40,7 @@ class AppResponse(BaseModel):
 
 async def get_db_connection():
     """Create database connection."""
-    return await asyncpg.connect(
-        host=os.getenv("POSTGRES_HOST", "unicorn-postgresql"),
-        port=int(os.getenv("POSTGRES_PORT", "5432")),
-        user=os.getenv("POSTGRES_USER", "unicorn"),
-        password=os.getenv("POSTGRES_PASSWORD", "unicorn"),
-        database=os.getenv("POSTGRES_DB", "unicorn_db")
-    )
+    return await db_manager.connect('default')
 
 
 # =============================================================================
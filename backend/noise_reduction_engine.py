@@ -14,7 +14,8 @@ from datetime import datetime, timedelta
 from typing import Optional, List, Dict, Set, Tuple, Any
 from uuid import UUID, uuid4
 import json
-from collections import defaultdict
+
+from alert_noise_index import FingerprintCache, FlapTracker, RateLimiter, SuppressionRuleIndex
 
 logger = logging.getLogger(__name__)
 
@@ -73,6 +74,10 @@ class NoiseReductionEngine:
     3. Duplicate Detection - Prevent duplicate alerts
     4. Rate Limiting - Throttle high-frequency alerts
     5. Smart Grouping - Group similar alerts to reduce volume
+    
+    All per-alert checks run against in-memory indexes (alert_noise_index);
+    the database is only read when the rule cache or the flapping history
+    is refreshed, once per cache_ttl.
     """
     
     def __init__(self, db_pool):
@@ -82,17 +87,21 @@ class NoiseReductionEngine:
         self.flapping_threshold = 5  # Alert must flip 5+ times
         self.flapping_window = timedelta(minutes=30)  # Within 30 minutes
         
-        # Duplicate detection cache
-        self.recent_alerts_cache: Dict[str, datetime] = {}
+        self.flap_tracker = FlapTracker(self.flapping_threshold, self.flapping_window)
+        self.last_flapping_refresh = datetime.min
+        
+        # Duplicate detection cache (hashed fingerprints with a TTL)
         self.duplicate_window = timedelta(minutes=5)
+        self.recent_alerts_cache = FingerprintCache(self.duplicate_window)
         
         # Rate limiting
         self.rate_limit_window = timedelta(minutes=60)
         self.rate_limit_threshold = 10  # Max 10 similar alerts per hour
-        self.rate_limit_counters: Dict[str, List[datetime]] = defaultdict(list)
+        self.rate_limiter = RateLimiter(self.rate_limit_threshold, self.rate_limit_window)
         
         # Suppression rules cache
         self.suppression_rules_cache: List[SuppressionRule] = []
+        self.suppression_index = SuppressionRuleIndex()
         self.cache_ttl = timedelta(minutes=5)
         self.last_cache_update = datetime.min
     
@@ -101,7 +110,8 @@ class NoiseReductionEngine:
         device_id: UUID,
         alert_type: str,
         alert_message: str,
-        severity: str
+        severity: str,
+        metric_name: Optional[str] = None
     ) -> Tuple[bool, Optional[str]]:
         """
         Determine if alert should be suppressed.
@@ -111,13 +121,14 @@ class NoiseReductionEngine:
             alert_type: Type of alert
             alert_message: Alert message
             severity: Alert severity
+            metric_name: Metric the alert is about, if any
             
         Returns:
             (should_suppress, reason) tuple
         """
         # Check suppression rules
         suppressed, reason = await self._check_suppression_rules(
-            device_id, alert_type, alert_message
+            device_id, alert_type, alert_message, metric_name, severity
         )
         if suppressed:
             return True, reason
@@ -141,49 +152,27 @@ class NoiseReductionEngine:
         self,
         device_id: UUID,
         alert_type: str,
-        alert_message: str
+        alert_message: str,
+        metric_name: Optional[str] = None,
+        severity: Optional[str] = None
     ) -> Tuple[bool, Optional[str]]:
-        """Check if alert matches any active suppression rule"""
+        """
+        Check if alert matches any active suppression rule.
+        
+        Rules may also be scoped to a metric or severity through
+        metadata.metric_name / metadata.severity.
+        """
         # Refresh cache if stale
         if datetime.utcnow() - self.last_cache_update > self.cache_ttl:
             await self._refresh_suppression_rules()
         
-        now = datetime.utcnow()
-        current_day = now.weekday()  # 0=Monday
-        
-        for rule in self.suppression_rules_cache:
-            if not rule.is_active:
-                continue
-            
-            # Check device match
-            if rule.device_id and rule.device_id != device_id:
-                continue
-            
-            # Check time window
-            if rule.start_time and rule.end_time:
-                if not (rule.start_time <= now <= rule.end_time):
-                    continue
-            
-            # Check day of week
-            if rule.days_of_week:
-                if current_day not in rule.days_of_week:
-                    continue
-            
-            # Check alert pattern (regex or substring)
-            if rule.alert_pattern:
-                import re
-                if rule.rule_type == 'regex':
-                    if not re.search(rule.alert_pattern, alert_message, re.IGNORECASE):
-                        continue
-                else:
-                    if rule.alert_pattern.lower() not in alert_message.lower():
-                        continue
-            
-            # Rule matched - suppress alert
-            logger.info(f"Alert suppressed by rule: {rule.rule_name}")
-            return True, rule.rule_name
+        rule = self.suppression_index.match(device_id, alert_message, metric_name, severity)
+        if rule is None:
+            return False, None
         
-        return False, None
+        # Rule matched - suppress alert
+        logger.info(f"Alert suppressed by rule: {rule.rule_name}")
+        return True, rule.rule_name
     
     def _is_duplicate(
         self,
@@ -194,40 +183,16 @@ class NoiseReductionEngine:
         """
         Check if alert is a duplicate of recent alert.
         
-        Uses cache of recent alerts within duplicate_window.
+        Uses hashed fingerprints of recent alerts within duplicate_window.
         """
-        # Create cache key
-        cache_key = f"{device_id}:{alert_type}:{alert_message}"
-        
-        # Check cache
-        if cache_key in self.recent_alerts_cache:
-            last_occurrence = self.recent_alerts_cache[cache_key]
-            time_since_last = datetime.utcnow() - last_occurrence
-            
-            if time_since_last < self.duplicate_window:
-                logger.info(f"Duplicate alert detected: {cache_key}")
-                return True
-        
-        # Not a duplicate - update cache
-        self.recent_alerts_cache[cache_key] = datetime.utcnow()
+        fingerprint = FingerprintCache.fingerprint(device_id, alert_type, alert_message)
         
-        # Clean old cache entries
-        self._clean_duplicate_cache()
+        if self.recent_alerts_cache.seen(fingerprint):
+            logger.info(f"Duplicate alert detected: {device_id}:{alert_type}")
+            return True
         
         return False
     
-    def _clean_duplicate_cache(self):
-        """Remove old entries from duplicate cache"""
-        now = datetime.utcnow()
-        keys_to_remove = []
-        
-        for key, timestamp in self.recent_alerts_cache.items():
-            if now - timestamp > self.duplicate_window:
-                keys_to_remove.append(key)
-        
-        for key in keys_to_remove:
-            del self.recent_alerts_cache[key]
-    
     def _is_rate_limited(
         self,
         device_id: UUID,
@@ -238,29 +203,16 @@ class NoiseReductionEngine:
         
         Prevents alert storms by limiting alerts per device/type.
         """
-        rate_key = f"{device_id}:{alert_type}"
-        now = datetime.utcnow()
-        
-        # Get recent alerts for this key
-        recent_alerts = self.rate_limit_counters[rate_key]
-        
-        # Remove old timestamps
-        recent_alerts = [ts for ts in recent_alerts 
-                        if now - ts < self.rate_limit_window]
-        self.rate_limit_counters[rate_key] = recent_alerts
+        rate_key = (device_id, alert_type)
+        limited, count = self.rate_limiter.hit(rate_key)
         
-        # Check if rate limit exceeded
-        if len(recent_alerts) >= self.rate_limit_threshold:
+        if limited:
             logger.warning(
-                f"Rate limit exceeded for {rate_key}: "
-                f"{len(recent_alerts)} alerts in {self.rate_limit_window.total_seconds()/60:.0f}min"
+                f"Rate limit exceeded for {device_id}:{alert_type}: "
+                f"{count} alerts in {self.rate_limit_window.total_seconds()/60:.0f}min"
             )
-            return True
-        
-        # Add current timestamp
-        recent_alerts.append(now)
         
-        return False
+        return limited
     
     async def _is_flapping(
         self,
@@ -270,47 +222,58 @@ class NoiseReductionEngine:
         """
         Check if alert is flapping (rapidly opening/closing).
         
-        Queries recent alert history to detect oscillation.
+        Uses the in-memory transition ring for this device/alert type,
+        which is rebuilt from alert history once per cache_ttl.
         """
+        if datetime.utcnow() - self.last_flapping_refresh > self.cache_ttl:
+            await self._refresh_flapping_state()
+        
+        key = (device_id, alert_type)
+        if self.flap_tracker.is_flapping(key):
+            logger.warning(
+                f"Flapping detected: {device_id}/{alert_type} - "
+                f"{self.flap_tracker.transitions(key)} transitions in {self.flapping_window}"
+            )
+            return True
+        
+        return False
+    
+    def record_alert_status(
+        self,
+        device_id: UUID,
+        alert_type: str,
+        status: str
+    ) -> None:
+        """
+        Feed an alert status change to flapping detection: 'open' when an
+        alert is actually raised, 'resolved'/'closed' when it is cleared.
+        """
+        self.flap_tracker.observe((device_id, alert_type), status)
+    
+    async def _refresh_flapping_state(self):
+        """Rebuild flapping rings for every device/alert type from one history query"""
+        since = self.last_flapping_refresh = datetime.utcnow()
         try:
             async with self.db_pool.acquire() as conn:
-                # Get recent status changes for this device/alert
                 rows = await conn.fetch("""
-                    SELECT status, created_at, resolved_at
+                    SELECT device_id, alert_type, status, created_at
                     FROM alerts
-                    WHERE device_id = $1
-                      AND alert_type = $2
-                      AND created_at > NOW() - INTERVAL '%s minutes'
-                    ORDER BY created_at DESC
-                """ % int(self.flapping_window.total_seconds() / 60),
-                    device_id, alert_type
-                )
-                
-                if len(rows) < self.flapping_threshold:
-                    return False
-                
-                # Count transitions
-                transitions = 0
-                prev_status = None
-                
-                for row in rows:
-                    current_status = row['status']
-                    if prev_status and prev_status != current_status:
-                        transitions += 1
-                    prev_status = current_status
-                
-                if transitions >= self.flapping_threshold:
-                    logger.warning(
-                        f"Flapping detected: {device_id}/{alert_type} - "
-                        f"{transitions} transitions in {self.flapping_window}"
-                    )
-                    return True
-                
-                return False
-                
+                    WHERE created_at > NOW() - INTERVAL '%s minutes'
+                    ORDER BY created_at
+                """ % int(self.flapping_window.total_seconds() / 60))
+            
+            tracker = FlapTracker(self.flapping_threshold, self.flapping_window)
+            for row in rows:
+                created_at = row['created_at']
+                if created_at.tzinfo is not None:
+                    created_at = created_at.replace(tzinfo=None) - (created_at.utcoffset() or timedelta())
+                tracker.observe((row['device_id'], row['alert_type']), row['status'], created_at)
+            # Keep transitions recorded live while the history was loading
+            self.flap_tracker.merge(tracker, since)
+            
+            logger.debug(f"Refreshed flapping state: {len(tracker)} alert keys")
         except Exception as e:
-            logger.error(f"Error checking flapping: {e}")
-            return False
+            logger.error(f"Error refreshing flapping state: {e}")
     
     async def detect_flapping_alerts(
         self,
@@ -516,6 +479,7 @@ class NoiseReductionEngine:
                     
                     self.suppression_rules_cache.append(rule)
                 
+                self.suppression_index.build(self.suppression_rules_cache)
                 self.last_cache_update = datetime.utcnow()
                 logger.info(f"Refreshed suppression rules cache: {len(self.suppression_rules_cache)} rules")
                 
@@ -19,9 +19,9 @@ import os
 import time
 
 try:
-    import asyncpg
+    from db_manager import db_manager
 except ImportError:
-    asyncpg = None
+    db_manager = None
 
 try:
     import redis.asyncio as aioredis
@@ -185,7 +185,7 @@ class HealthChecker:
 
     async def _check_database(self) -> Dict[str, Any]:
         """Check PostgreSQL database connection."""
-        if not self.db_pool and not asyncpg:
+        if not self.db_pool and not db_manager:
             return {
                 "status": "unknown",
                 "message": "Database pool not configured"
@@ -199,31 +199,20 @@ class HealthChecker:
                 async with self.db_pool.acquire() as conn:
                     await conn.fetchval("SELECT 1")
             else:
-                # Create temporary connection
-                db_host = os.getenv("POSTGRES_HOST", "unicorn-postgresql")
-                db_port = int(os.getenv("POSTGRES_PORT", "5432"))
-                db_user = os.getenv("POSTGRES_USER", "unicorn")
-                db_password = os.getenv("POSTGRES_PASSWORD", "unicorn")
-                db_name = os.getenv("POSTGRES_DB", "unicorn_db")
-
-                conn = await asyncpg.connect(
-                    host=db_host,
-                    port=db_port,
-                    user=db_user,
-                    password=db_password,
-                    database=db_name,
-                    timeout=5.0
-                )
-                await conn.fetchval("SELECT 1")
-                await conn.close()
+                # Borrow from the app-wide pool
+                async with db_manager.acquire(timeout=5.0) as conn:
+                    await conn.fetchval("SELECT 1")
 
             duration_ms = (time.time() - start_time) * 1000
 
-            return {
+            result = {
                 "status": "healthy",
                 "response_time_ms": round(duration_ms, 2),
                 "message": "Database connection successful"
             }
+            if db_manager is not None and db_manager.started:
+                result["pool"] = db_manager.metrics()
+            return result
 
         except Exception as e:
             return {
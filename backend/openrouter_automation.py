@@ -20,6 +20,7 @@ from cryptography.fernet import Fernet
 import base64
 from audit_logger import audit_logger
 from openrouter_client import OpenRouterClient, OpenRouterAPIError, OpenRouterAuthError
+from db_manager import db_manager
 
 # Logging setup
 logger = logging.getLogger(__name__)
@@ -95,15 +96,8 @@ class OpenRouterManager:
         """Initialize database connection pool and OpenRouter API client"""
         if not self.db_pool:
             try:
-                self.db_pool = await asyncpg.create_pool(
-                    host=os.getenv("POSTGRES_HOST", "unicorn-postgresql"),
-                    port=int(os.getenv("POSTGRES_PORT", 5432)),
-                    user=os.getenv("POSTGRES_USER", "unicorn"),
-                    password=os.getenv("POSTGRES_PASSWORD", "unicorn"),
-                    database=os.getenv("POSTGRES_DB", "unicorn_db"),
-                    min_size=5,
-                    max_size=20
-                )
+                await db_manager.start()
+                self.db_pool = db_manager.subsystem('llm_routing')
                 logger.info("OpenRouterManager database pool initialized")
             except Exception as e:
                 logger.error(f"Failed to initialize database pool: {e}")
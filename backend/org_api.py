@@ -11,8 +11,7 @@ import json
 from datetime import datetime
 import sys
 import os
-import asyncpg
-from webhook_manager import WebhookManager
+from webhook_manager import webhook_manager
 
 # Add parent directory to path to import from server.py
 if '/app' not in sys.path:
@@ -458,23 +457,18 @@ async def create_organization(
 
         # Trigger webhook for organization.created event
         try:
-            db_url = os.getenv("DATABASE_URL")
-            if db_url and db_url.startswith("postgresql://"):
-                pool = await asyncpg.create_pool(db_url)
-                webhook_manager = WebhookManager(pool)
-                await webhook_manager.trigger_event(
-                    org_id=org_id,
-                    event='organization.created',
-                    data={
-                        'organization_id': org.id,
-                        'name': org.name,
-                        'plan_tier': org.plan_tier,
-                        'owner': user_id,
-                        'created_at': org.created_at.isoformat(),
-                        'member_count': len(members)
-                    }
-                )
-                await pool.close()
+            await webhook_manager.trigger_event(
+                event_type='organization.created',
+                organization_id=org_id,
+                payload={
+                    'organization_id': org.id,
+                    'name': org.name,
+                    'plan_tier': org.plan_tier,
+                    'owner': user_id,
+                    'created_at': org.created_at.isoformat(),
+                    'member_count': len(members)
+                }
+            )
         except Exception as e:
             logger.warning(f"Webhook trigger failed for organization.created: {e}")
 
@@ -12,7 +12,7 @@ Date: November 12, 2025
 import logging
 from typing import Optional, Dict, Tuple
 import asyncpg
-import os
+from db_manager import db_manager
 
 logger = logging.getLogger(__name__)
 
@@ -37,13 +37,7 @@ class OrgCreditIntegration:
             return await self.db_pool.acquire()
 
         # Create one-off connection if no pool provided
-        return await asyncpg.connect(
-            host=os.getenv("POSTGRES_HOST", "unicorn-postgresql"),
-            port=int(os.getenv("POSTGRES_PORT", "5432")),
-            user=os.getenv("POSTGRES_USER", "unicorn"),
-            password=os.getenv("POSTGRES_PASSWORD", "unicorn"),
-            database=os.getenv("POSTGRES_DB", "unicorn_db")
-        )
+        return await db_manager.connect('billing')
 
     async def get_user_org_id(self, user_id: str, request_state: Optional[Dict] = None) -> Optional[str]:
         """
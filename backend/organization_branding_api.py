@@ -9,10 +9,10 @@ from typing import Optional, List, Dict, Any
 from datetime import datetime
 import asyncpg
 import json
-import os
 import uuid
 import aiofiles
 from pathlib import Path
+from db_manager import db_manager
 
 router = APIRouter(prefix="/api/v1/organizations", tags=["Organization Branding"])
 
@@ -178,13 +178,7 @@ async def get_current_user(request: Request) -> Dict[str, Any]:
 
 async def get_db_connection():
     """Get database connection"""
-    return await asyncpg.connect(
-        host=os.getenv("POSTGRES_HOST", "unicorn-postgresql"),
-        port=int(os.getenv("POSTGRES_PORT", "5432")),
-        database=os.getenv("POSTGRES_DB", "unicorn_db"),
-        user=os.getenv("POSTGRES_USER", "unicorn"),
-        password=os.getenv("POSTGRES_PASSWORD", "unicorn")
-    )
+    return await db_manager.connect('default')
 
 async def get_organization_tier(conn: asyncpg.Connection, org_id: int) -> Optional[str]:
     """Get organization's subscription tier"""
@@ -7,6 +7,7 @@ Provides REST API for managing OTA deployments:
 - Control deployment lifecycle (start, pause, resume, cancel)
 - Track deployment progress
 - Monitor per-device update status
+- Release staged rollout waves
 """
 
 import logging
@@ -18,7 +19,10 @@ from fastapi import APIRouter, Depends, HTTPException, Query, Body
 from pydantic import BaseModel, Field
 
 from auth_dependencies import require_admin_user
-from ota_manager import OTAManager, RolloutStrategy, DeploymentStatus, DeviceUpdateStatus
+from ota_manager import (
+    OTAManager, RolloutStrategy, DeploymentStatus, DeviceUpdateStatus,
+    DEFAULT_MAX_FAILURE_PERCENTAGE
+)
 
 logger = logging.getLogger(__name__)
 
@@ -39,6 +43,11 @@ class CreateDeploymentRequest(BaseModel):
     update_package_url: Optional[str] = Field(default=None, description="URL to update package")
     checksum: Optional[str] = Field(default=None, description="SHA256 checksum")
     release_notes: Optional[str] = Field(default=None, description="Release notes")
+    waves: Optional[List[int]] = Field(default=None, description="Staged rollout plan as cumulative percentages, e.g. [1, 10, 50, 100]")
+    max_failure_percentage: float = Field(default=DEFAULT_MAX_FAILURE_PERCENTAGE, ge=0, le=100, description="Failure rate that pauses the rollout between waves")
+    delta_package_url: Optional[str] = Field(default=None, description="URL to a binary delta from a previous package")
+    delta_checksum: Optional[str] = Field(default=None, description="SHA256 checksum of the delta")
+    delta_base_checksum: Optional[str] = Field(default=None, description="SHA256 checksum of the package the delta applies to")
 
 
 class DeploymentResponse(BaseModel):
@@ -48,6 +57,7 @@ class DeploymentResponse(BaseModel):
     target_version: str
     target_devices: int
     rollout_strategy: str
+    wave_sizes: List[int] = []
     status: str
     created_at: str
 
@@ -63,6 +73,8 @@ class DeploymentStatusResponse(BaseModel):
     completed_at: Optional[str]
     created_at: str
     metadata: Dict[str, Any]
+    current_wave: int = 0
+    waves: List[Dict[str, Any]] = []
     progress: Dict[str, Any]
     status_breakdown: Dict[str, int]
     devices: List[Dict[str, Any]]
@@ -82,6 +94,9 @@ class CheckUpdateResponse(BaseModel):
     update_package_url: Optional[str] = None
     checksum: Optional[str] = None
     release_notes: Optional[str] = None
+    delta_package_url: Optional[str] = None
+    delta_checksum: Optional[str] = None
+    delta_base_checksum: Optional[str] = None
 
 
 # ==================== Admin Endpoints ====================
@@ -100,6 +115,11 @@ async def create_deployment(
     - canary: Deploy to small percentage first, then expand
     - rolling: Gradual rollout in batches
     
+    Every matching device is assigned a rollout wave (``waves`` overrides
+    the strategy's default plan). The next wave is released when the
+    current one finishes within ``max_failure_percentage``; otherwise the
+    deployment pauses.
+    
     Device filters support:
     - device_type: Filter by device type
     - current_version: Filter by current version (with operator)
@@ -121,7 +141,12 @@ async def create_deployment(
                 device_filters=request.device_filters,
                 update_package_url=request.update_package_url,
                 checksum=request.checksum,
-                release_notes=request.release_notes
+                release_notes=request.release_notes,
+                waves=request.waves,
+                max_failure_percentage=request.max_failure_percentage,
+                delta_package_url=request.delta_package_url,
+                delta_checksum=request.delta_checksum,
+                delta_base_checksum=request.delta_base_checksum
             )
             
             return DeploymentResponse(**deployment)
@@ -318,6 +343,46 @@ async def resume_deployment(
         raise HTTPException(status_code=500, detail="Failed to resume deployment")
 
 
+@ota_admin_router.post("/deployments/{deployment_id}/advance-wave", dependencies=[Depends(require_admin_user)])
+async def advance_deployment_wave(
+    deployment_id: str,
+    user: dict = Depends(require_admin_user)
+) -> Dict[str, Any]:
+    """
+    Release the next rollout wave.
+    
+    Waves are released automatically when the current wave succeeds; use this
+    to continue a deployment paused by its failure threshold or to skip the
+    wait for slow devices.
+    """
+    try:
+        from database import AsyncSessionLocal
+        async with AsyncSessionLocal() as db:
+            manager = OTAManager(db)
+            
+            # Verify organization access
+            from database import get_db_connection
+            conn = await get_db_connection()
+            try:
+                deployment_org = await conn.fetchval(
+                    "SELECT organization_id FROM ota_deployments WHERE id = $1",
+                    UUID(deployment_id)
+                )
+                if not deployment_org or str(user['organization_id']) != str(deployment_org):
+                    raise HTTPException(status_code=403, detail="Access denied")
+            finally:
+                await conn.close()
+            
+            result = await manager.advance_wave(UUID(deployment_id))
+            return result
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error advancing deployment wave: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Failed to advance deployment wave")
+
+
 @ota_admin_router.post("/deployments/{deployment_id}/cancel", dependencies=[Depends(require_admin_user)])
 async def cancel_deployment(
     deployment_id: str,
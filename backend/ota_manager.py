@@ -7,9 +7,11 @@ Manages firmware and software updates for edge devices with support for:
 - Update verification and automatic rollback
 - Deployment progress tracking
 - Per-device status monitoring
+- Staged rollout waves gated on the failure rate of earlier waves
 """
 
 import asyncio
+import json
 import logging
 from datetime import datetime, timedelta
 from typing import Optional, List, Dict, Any, Tuple
@@ -22,6 +24,13 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 logger = logging.getLogger(__name__)
 
+# Default wave plans, as cumulative percentages of the target devices
+ROLLING_WAVES = [20, 40, 60, 80, 100]
+ROLLING_MIN_WAVE_SIZE = 5
+
+# A finished wave with more failures than this pauses the deployment
+DEFAULT_MAX_FAILURE_PERCENTAGE = 10.0
+
 
 class RolloutStrategy(str, Enum):
     """OTA deployment rollout strategies"""
@@ -53,6 +62,61 @@ class DeviceUpdateStatus(str, Enum):
     ROLLED_BACK = "rolled_back"
 
 
+def plan_waves(
+    device_count: int,
+    rollout_strategy: "RolloutStrategy",
+    rollout_percentage: int = 100,
+    waves: Optional[List[int]] = None
+) -> List[int]:
+    """
+    Assign each of ``device_count`` ordered target devices to a rollout wave.
+    
+    Args:
+        device_count: Number of target devices
+        rollout_strategy: Strategy used to derive a default plan
+        rollout_percentage: First wave size for canary deployments
+        waves: Explicit plan as cumulative percentages, e.g. [1, 10, 50, 100]
+        
+    Returns:
+        Wave number per device, in target order
+    """
+    min_wave_size = 1
+    if waves is None:
+        if rollout_strategy == RolloutStrategy.CANARY and rollout_percentage < 100:
+            waves = [rollout_percentage, 100]
+        elif rollout_strategy == RolloutStrategy.ROLLING:
+            waves = ROLLING_WAVES
+            min_wave_size = ROLLING_MIN_WAVE_SIZE
+        else:
+            waves = [100]
+    
+    if not waves or any(not 0 < p <= 100 for p in waves) or list(waves) != sorted(set(waves)):
+        raise ValueError("waves must be strictly increasing percentages between 1 and 100")
+    if waves[-1] != 100:
+        waves = list(waves) + [100]
+    
+    # Cumulative upper bound (exclusive) of each non-empty wave
+    bounds = []
+    start = 0
+    for percentage in waves:
+        end = min(device_count, max(device_count * percentage // 100, start + min_wave_size))
+        if end > start:
+            bounds.append(end)
+            start = end
+    
+    plan = []
+    for wave, end in enumerate(bounds):
+        plan.extend([wave] * (end - len(plan)))
+    return plan
+
+
+def _metadata(value: Any) -> Dict[str, Any]:
+    """JSONB columns come back as text without a registered codec"""
+    if isinstance(value, str):
+        return json.loads(value)
+    return value or {}
+
+
 class OTAManager:
     """Manages OTA deployments and updates"""
     
@@ -72,7 +136,12 @@ class OTAManager:
         device_filters: Optional[Dict[str, Any]] = None,
         update_package_url: Optional[str] = None,
         checksum: Optional[str] = None,
-        release_notes: Optional[str] = None
+        release_notes: Optional[str] = None,
+        waves: Optional[List[int]] = None,
+        max_failure_percentage: float = DEFAULT_MAX_FAILURE_PERCENTAGE,
+        delta_package_url: Optional[str] = None,
+        delta_checksum: Optional[str] = None,
+        delta_base_checksum: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Create a new OTA deployment.
@@ -88,62 +157,74 @@ class OTAManager:
             update_package_url: URL to download update package
             checksum: SHA256 checksum for verification
             release_notes: Update release notes
+            waves: Staged rollout plan as cumulative percentages
+            max_failure_percentage: Failure rate that pauses the rollout between waves
+            delta_package_url: Optional binary delta from a previous package
+            delta_checksum: SHA256 of the delta file
+            delta_base_checksum: SHA256 of the package the delta applies to
             
         Returns:
             Deployment metadata
         """
         from database import get_db_connection
         
-        conn = await get_db_connection()
+        conn = await get_db_connection('fleet')
         try:
-            # Create deployment record
-            deployment_id = await conn.fetchval(
-                """
-                INSERT INTO ota_deployments (
-                    deployment_name, organization_id, target_version,
-                    rollout_strategy, rollout_percentage, status,
-                    created_by, metadata
+            async with conn.transaction():
+                # Select target devices based on filters; every match gets a wave
+                target_devices = await self._select_target_devices(
+                    conn, organization_id, device_filters
                 )
-                VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
-                RETURNING id
-                """,
-                deployment_name,
-                organization_id,
-                target_version,
-                rollout_strategy.value,
-                rollout_percentage,
-                DeploymentStatus.PENDING.value,
-                created_by,
-                {
-                    "device_filters": device_filters or {},
-                    "update_package_url": update_package_url,
-                    "checksum": checksum,
-                    "release_notes": release_notes
-                }
-            )
-            
-            # Select target devices based on filters
-            target_devices = await self._select_target_devices(
-                conn, organization_id, device_filters, rollout_strategy, rollout_percentage
-            )
-            
-            # Create deployment-device records
-            for device_id in target_devices:
-                await conn.execute(
+                wave_plan = plan_waves(
+                    len(target_devices), rollout_strategy, rollout_percentage, waves
+                )
+                
+                # Create deployment record
+                deployment_id = await conn.fetchval(
                     """
-                    INSERT INTO ota_deployment_devices (
-                        deployment_id, device_id, status
+                    INSERT INTO ota_deployments (
+                        deployment_name, organization_id, target_version,
+                        rollout_strategy, rollout_percentage, status,
+                        created_by, metadata
                     )
-                    VALUES ($1, $2, $3)
+                    VALUES ($1, $2, $3, $4, $5, $6, $7, $8::jsonb)
+                    RETURNING id
                     """,
-                    deployment_id,
-                    device_id,
-                    DeviceUpdateStatus.PENDING.value
+                    deployment_name,
+                    organization_id,
+                    target_version,
+                    rollout_strategy.value,
+                    rollout_percentage,
+                    DeploymentStatus.PENDING.value,
+                    created_by,
+                    json.dumps({
+                        "device_filters": device_filters or {},
+                        "update_package_url": update_package_url,
+                        "checksum": checksum,
+                        "release_notes": release_notes,
+                        "waves": waves,
+                        "max_failure_percentage": max_failure_percentage,
+                        "delta_package_url": delta_package_url,
+                        "delta_checksum": delta_checksum,
+                        "delta_base_checksum": delta_base_checksum
+                    })
+                )
+                
+                # Create deployment-device records in one COPY
+                await conn.copy_records_to_table(
+                    'ota_deployment_devices',
+                    records=[
+                        (deployment_id, device_id, DeviceUpdateStatus.PENDING.value, wave)
+                        for device_id, wave in zip(target_devices, wave_plan)
+                    ],
+                    columns=['deployment_id', 'device_id', 'status', 'wave']
                 )
             
+            wave_sizes = [wave_plan.count(wave) for wave in range(wave_plan[-1] + 1)] if wave_plan else []
+            
             logger.info(
                 f"Created OTA deployment {deployment_id}: {deployment_name} "
-                f"targeting {len(target_devices)} devices"
+                f"targeting {len(target_devices)} devices in {len(wave_sizes)} wave(s)"
             )
             
             return {
@@ -152,6 +233,7 @@ class OTAManager:
                 "target_version": target_version,
                 "target_devices": len(target_devices),
                 "rollout_strategy": rollout_strategy.value,
+                "wave_sizes": wave_sizes,
                 "status": DeploymentStatus.PENDING.value,
                 "created_at": datetime.utcnow().isoformat()
             }
@@ -163,11 +245,9 @@ class OTAManager:
         self,
         conn,
         organization_id: UUID,
-        device_filters: Optional[Dict[str, Any]],
-        rollout_strategy: RolloutStrategy,
-        rollout_percentage: int
+        device_filters: Optional[Dict[str, Any]]
     ) -> List[UUID]:
-        """Select devices for deployment based on filters and strategy"""
+        """Select devices for deployment based on filters, oldest first"""
         
         # Build query filters
         filters = ["organization_id = $1", "status != 'pending'"]
@@ -202,20 +282,7 @@ class OTAManager:
         """
         
         rows = await conn.fetch(query, *params)
-        all_devices = [row['id'] for row in rows]
-        
-        # Apply rollout strategy
-        if rollout_strategy == RolloutStrategy.CANARY and rollout_percentage < 100:
-            # Select percentage of devices for canary
-            canary_count = max(1, int(len(all_devices) * rollout_percentage / 100))
-            return all_devices[:canary_count]
-        elif rollout_strategy == RolloutStrategy.ROLLING:
-            # Start with first batch (20% or min 5 devices)
-            batch_size = max(5, int(len(all_devices) * 0.2))
-            return all_devices[:batch_size]
-        else:
-            # Manual or immediate - select all matching devices
-            return all_devices
+        return [row['id'] for row in rows]
     
     # ==================== Deployment Control ====================
     
@@ -223,7 +290,7 @@ class OTAManager:
         """Start an OTA deployment"""
         from database import get_db_connection
         
-        conn = await get_db_connection()
+        conn = await get_db_connection('fleet')
         try:
             # Update deployment status
             await conn.execute(
@@ -248,7 +315,7 @@ class OTAManager:
         """Pause an ongoing deployment"""
         from database import get_db_connection
         
-        conn = await get_db_connection()
+        conn = await get_db_connection('fleet')
         try:
             await conn.execute(
                 """
@@ -272,7 +339,7 @@ class OTAManager:
         """Resume a paused deployment"""
         from database import get_db_connection
         
-        conn = await get_db_connection()
+        conn = await get_db_connection('fleet')
         try:
             await conn.execute(
                 """
@@ -292,11 +359,50 @@ class OTAManager:
         finally:
             await conn.close()
     
+    async def advance_wave(self, deployment_id: UUID) -> Dict[str, Any]:
+        """
+        Release the next rollout wave now.
+        
+        Used to push past a wave that paused the deployment on its failure
+        threshold, or to skip the wait for stragglers in the current wave.
+        """
+        from database import get_db_connection
+        
+        conn = await get_db_connection('fleet')
+        try:
+            next_wave = await conn.fetchval(
+                """
+                UPDATE ota_deployments dep
+                SET current_wave = nxt.wave, status = $2
+                FROM (
+                    SELECT MIN(dd.wave) AS wave
+                    FROM ota_deployment_devices dd
+                    JOIN ota_deployments d ON d.id = dd.deployment_id
+                    WHERE dd.deployment_id = $1 AND dd.wave > d.current_wave
+                ) nxt
+                WHERE dep.id = $1 AND nxt.wave IS NOT NULL AND dep.status IN ($2, $3)
+                RETURNING dep.current_wave
+                """,
+                deployment_id,
+                DeploymentStatus.IN_PROGRESS.value,
+                DeploymentStatus.PAUSED.value
+            )
+            
+            if next_wave is None:
+                raise HTTPException(status_code=409, detail="No further wave to release")
+            
+            logger.info(f"Released wave {next_wave} of OTA deployment {deployment_id}")
+            
+            return await self.get_deployment_status(deployment_id)
+            
+        finally:
+            await conn.close()
+    
     async def cancel_deployment(self, deployment_id: UUID) -> Dict[str, Any]:
         """Cancel a deployment"""
         from database import get_db_connection
         
-        conn = await get_db_connection()
+        conn = await get_db_connection('fleet')
         try:
             # Cancel pending device updates
             await conn.execute(
@@ -334,13 +440,13 @@ class OTAManager:
         """Get detailed deployment status"""
         from database import get_db_connection
         
-        conn = await get_db_connection()
+        conn = await get_db_connection('fleet')
         try:
             # Get deployment info
             deployment = await conn.fetchrow(
                 """
                 SELECT id, deployment_name, organization_id, target_version,
-                       rollout_strategy, rollout_percentage, status,
+                       rollout_strategy, rollout_percentage, status, current_wave,
                        started_at, completed_at, created_at, metadata
                 FROM ota_deployments
                 WHERE id = $1
@@ -351,18 +457,30 @@ class OTAManager:
             if not deployment:
                 raise HTTPException(status_code=404, detail="Deployment not found")
             
-            # Get device status breakdown
+            # Get device status breakdown per wave
             device_stats = await conn.fetch(
                 """
-                SELECT status, COUNT(*) as count
+                SELECT wave, status, COUNT(*) as count
                 FROM ota_deployment_devices
                 WHERE deployment_id = $1
-                GROUP BY status
+                GROUP BY wave, status
+                ORDER BY wave
                 """,
                 deployment_id
             )
             
-            status_counts = {row['status']: row['count'] for row in device_stats}
+            status_counts: Dict[str, int] = {}
+            waves: Dict[int, Dict[str, Any]] = {}
+            for row in device_stats:
+                status_counts[row['status']] = status_counts.get(row['status'], 0) + row['count']
+                wave = waves.setdefault(row['wave'], {
+                    "wave": row['wave'],
+                    "released": row['wave'] <= deployment['current_wave'],
+                    "total_devices": 0,
+                    "status_breakdown": {}
+                })
+                wave["total_devices"] += row['count']
+                wave["status_breakdown"][row['status']] = row['count']
             total_devices = sum(status_counts.values())
             
             # Get device details
@@ -398,7 +516,9 @@ class OTAManager:
                 "started_at": deployment['started_at'].isoformat() if deployment['started_at'] else None,
                 "completed_at": deployment['completed_at'].isoformat() if deployment['completed_at'] else None,
                 "created_at": deployment['created_at'].isoformat(),
-                "metadata": deployment['metadata'],
+                "metadata": _metadata(deployment['metadata']),
+                "current_wave": deployment['current_wave'],
+                "waves": list(waves.values()),
                 "progress": {
                     "total_devices": total_devices,
                     "completed": completed,
@@ -436,7 +556,7 @@ class OTAManager:
         """List OTA deployments"""
         from database import get_db_connection
         
-        conn = await get_db_connection()
+        conn = await get_db_connection('fleet')
         try:
             filters = []
             params = []
@@ -524,9 +644,9 @@ class OTAManager:
         """Check if device has pending updates"""
         from database import get_db_connection
         
-        conn = await get_db_connection()
+        conn = await get_db_connection('fleet')
         try:
-            # Find active deployment for this device
+            # Find active deployment for this device in a released wave
             update = await conn.fetchrow(
                 """
                 SELECT 
@@ -540,6 +660,7 @@ class OTAManager:
                 WHERE dd.device_id = $1
                   AND dd.status = $2
                   AND dep.status = $3
+                  AND dd.wave <= dep.current_wave
                 ORDER BY dep.created_at DESC
                 LIMIT 1
                 """,
@@ -551,14 +672,17 @@ class OTAManager:
             if not update:
                 return None
             
-            metadata = update['metadata'] or {}
+            metadata = _metadata(update['metadata'])
             
             return {
                 "deployment_id": str(update['deployment_id']),
                 "target_version": update['target_version'],
                 "update_package_url": metadata.get('update_package_url'),
                 "checksum": metadata.get('checksum'),
-                "release_notes": metadata.get('release_notes')
+                "release_notes": metadata.get('release_notes'),
+                "delta_package_url": metadata.get('delta_package_url'),
+                "delta_checksum": metadata.get('delta_checksum'),
+                "delta_base_checksum": metadata.get('delta_base_checksum')
             }
             
         finally:
@@ -574,7 +698,7 @@ class OTAManager:
         """Update device update status"""
         from database import get_db_connection
         
-        conn = await get_db_connection()
+        conn = await get_db_connection('fleet')
         try:
             # Update device status
             if status == DeviceUpdateStatus.DOWNLOADING:
@@ -614,34 +738,81 @@ class OTAManager:
             await conn.close()
     
     async def _check_deployment_completion(self, conn, deployment_id: UUID):
-        """Check if deployment is complete and update status"""
+        """Advance to the next wave or finish the deployment once the released waves are done"""
         
-        # Count pending/in-progress devices
-        pending_count = await conn.fetchval(
+        # Progress of the released waves, in one pass
+        progress = await conn.fetchrow(
             """
-            SELECT COUNT(*) FROM ota_deployment_devices
-            WHERE deployment_id = $1
-              AND status IN ($2, $3, $4, $5)
+            SELECT
+                dep.status,
+                dep.current_wave,
+                dep.metadata,
+                COUNT(*) FILTER (WHERE dd.wave <= dep.current_wave) AS released,
+                COUNT(*) FILTER (
+                    WHERE dd.wave <= dep.current_wave AND dd.status IN ($2, $3, $4, $5)
+                ) AS active,
+                COUNT(*) FILTER (
+                    WHERE dd.wave <= dep.current_wave AND dd.status IN ($6, $7)
+                ) AS failed,
+                MAX(dd.wave) AS last_wave
+            FROM ota_deployments dep
+            JOIN ota_deployment_devices dd ON dd.deployment_id = dep.id
+            WHERE dep.id = $1
+            GROUP BY dep.id
             """,
             deployment_id,
             DeviceUpdateStatus.PENDING.value,
             DeviceUpdateStatus.DOWNLOADING.value,
             DeviceUpdateStatus.INSTALLING.value,
-            DeviceUpdateStatus.VERIFYING.value
+            DeviceUpdateStatus.VERIFYING.value,
+            DeviceUpdateStatus.FAILED.value,
+            DeviceUpdateStatus.ROLLED_BACK.value
         )
         
-        if pending_count == 0:
-            # All devices complete - check if any failed
-            failed_count = await conn.fetchval(
+        if not progress or progress['active'] > 0:
+            return
+        
+        if progress['current_wave'] < progress['last_wave']:
+            if progress['status'] != DeploymentStatus.IN_PROGRESS.value:
+                return
+            
+            max_failure = _metadata(progress['metadata']).get(
+                'max_failure_percentage', DEFAULT_MAX_FAILURE_PERCENTAGE
+            )
+            failure_percentage = progress['failed'] / progress['released'] * 100
+            
+            if failure_percentage > max_failure:
+                await conn.execute(
+                    "UPDATE ota_deployments SET status = $1 WHERE id = $2 AND status = $3",
+                    DeploymentStatus.PAUSED.value,
+                    deployment_id,
+                    DeploymentStatus.IN_PROGRESS.value
+                )
+                logger.warning(
+                    f"Deployment {deployment_id} paused after wave {progress['current_wave']}: "
+                    f"{failure_percentage:.1f}% failed (limit {max_failure}%)"
+                )
+                return
+            
+            # Guarded on current_wave so concurrent reports release a wave once
+            await conn.execute(
                 """
-                SELECT COUNT(*) FROM ota_deployment_devices
-                WHERE deployment_id = $1 AND status = $2
+                UPDATE ota_deployments
+                SET current_wave = (
+                    SELECT MIN(wave) FROM ota_deployment_devices
+                    WHERE deployment_id = $1 AND wave > $2
+                )
+                WHERE id = $1 AND current_wave = $2
                 """,
                 deployment_id,
-                DeviceUpdateStatus.FAILED.value
+                progress['current_wave']
             )
-            
-            final_status = DeploymentStatus.FAILED if failed_count > 0 else DeploymentStatus.COMPLETED
+            logger.info(f"Deployment {deployment_id} released wave after {progress['current_wave']}")
+            return
+        
+        if progress['released']:
+            # All devices complete - check if any failed
+            final_status = DeploymentStatus.FAILED if progress['failed'] > 0 else DeploymentStatus.COMPLETED
             
             await conn.execute(
                 """
@@ -666,7 +837,7 @@ class OTAManager:
         """Rollback a device to previous version"""
         from database import get_db_connection
         
-        conn = await get_db_connection()
+        conn = await get_db_connection('fleet')
         try:
             # Mark update as rolled back
             await self.update_device_status(
@@ -10,15 +10,15 @@ Epic 13: Smart Alerts - Prediction Engine
 import asyncio
 import logging
 from dataclasses import dataclass
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Optional, List, Dict, Any, Tuple
 from uuid import UUID
 import json
 
 import numpy as np
-from scipy import stats
-from sklearn.linear_model import LinearRegression
-import pickle
+
+import batch_forecaster
+from batch_forecaster import SeriesBatch, align_series, batch_from_series
 
 logger = logging.getLogger(__name__)
 
@@ -89,7 +89,9 @@ class PredictionEngine:
     Uses multiple forecasting models:
     - Linear regression for trending metrics
     - Exponential smoothing for volatile metrics
-    - ARIMA for complex time series patterns
+    
+    Fleet-wide cycles use the *_batch methods, which fit every
+    (device, metric) series as one numpy matrix (see batch_forecaster).
     """
     
     def __init__(self, db_pool):
@@ -105,6 +107,13 @@ class PredictionEngine:
             'network_latency': {'warning': 100, 'critical': 200},  # ms
             'error_rate': {'warning': 5, 'critical': 10},  # percentage
         }
+        
+        # Resources checked for exhaustion, with their critical levels
+        self.exhaustion_thresholds = {
+            'disk_usage': 95,
+            'memory_usage': 90,
+            'connection_pool_usage': 90,
+        }
     
     async def predict_metric(
         self,
@@ -136,19 +145,9 @@ class PredictionEngine:
                 )
                 return []
             
-            # Select best forecasting model
-            model_type = self._select_model_type(historical_data)
-            
-            predictions = []
-            for horizon in forecast_horizons:
-                pred = await self._forecast(
-                    historical_data, horizon, model_type, device_id, metric_name
-                )
-                if pred:
-                    predictions.append(pred)
-                    
-                    # Save to database
-                    await self._save_prediction(pred, device_id)
+            batch = batch_from_series(historical_data, (device_id, metric_name))
+            predictions = self._forecast_batch(batch, forecast_horizons)
+            await self._save_predictions(predictions)
             
             return predictions
             
@@ -174,11 +173,6 @@ class PredictionEngine:
             ThresholdCrossing if crossing predicted, None otherwise
         """
         try:
-            # Get thresholds
-            thresholds = custom_thresholds or self.default_thresholds.get(
-                metric_name, {'warning': 80, 'critical': 90}
-            )
-            
             # Fetch recent data
             historical_data = await self._fetch_historical_data(
                 device_id, metric_name, days=3
@@ -187,52 +181,11 @@ class PredictionEngine:
             if len(historical_data) < 10:
                 return None
             
-            # Calculate trend
-            current_value = historical_data[-1][1]
-            trend_info = self._calculate_trend(historical_data)
-            
-            if trend_info['trend'] == 'stable':
-                return None
-            
-            # Determine which threshold to check
-            if trend_info['trend'] == 'increasing':
-                threshold_value = thresholds.get('critical', 90)
-                threshold_type = 'upper'
-            else:  # decreasing
-                threshold_value = thresholds.get('lower', 10)
-                threshold_type = 'lower'
-            
-            # Check if already crossed
-            if trend_info['trend'] == 'increasing' and current_value >= threshold_value:
-                return None
-            if trend_info['trend'] == 'decreasing' and current_value <= threshold_value:
-                return None
-            
-            # Predict crossing time
-            crossing_time = self._predict_crossing_time(
-                historical_data, threshold_value, threshold_type
+            batch = batch_from_series(historical_data, (device_id, metric_name))
+            crossings = self._threshold_crossings(
+                batch, {metric_name: custom_thresholds} if custom_thresholds else None
             )
-            
-            if not crossing_time:
-                return None
-            
-            # Only alert if crossing within 6 hours
-            if crossing_time > datetime.utcnow() + timedelta(hours=6):
-                return None
-            
-            crossing = ThresholdCrossing(
-                metric_name=metric_name,
-                device_id=device_id,
-                threshold_value=threshold_value,
-                threshold_type=threshold_type,
-                estimated_crossing_time=crossing_time,
-                confidence=trend_info['confidence'],
-                current_value=current_value,
-                trend=trend_info['trend'],
-                growth_rate=trend_info['rate_per_hour']
-            )
-            
-            return crossing
+            return crossings[0] if crossings else None
             
         except Exception as e:
             logger.error(
@@ -252,184 +205,201 @@ class PredictionEngine:
         Returns:
             List of exhaustion predictions with time estimates
         """
-        exhaustion_warnings = []
-        
-        # Check critical metrics
-        critical_metrics = [
-            ('disk_usage', 95),  # Critical at 95%
-            ('memory_usage', 90),  # Critical at 90%
-            ('connection_pool_usage', 90),
-        ]
-        
-        for metric_name, critical_threshold in critical_metrics:
-            crossing = await self.predict_threshold_crossing(
-                device_id,
-                metric_name,
-                custom_thresholds={'critical': critical_threshold}
-            )
-            
-            if crossing:
-                time_remaining = crossing.time_until_crossing()
-                
-                exhaustion_warnings.append({
-                    'resource': metric_name,
-                    'current_usage': crossing.current_value,
-                    'threshold': crossing.threshold_value,
-                    'time_until_exhaustion': str(time_remaining),
-                    'time_until_exhaustion_seconds': time_remaining.total_seconds(),
-                    'estimated_exhaustion_time': crossing.estimated_crossing_time,
-                    'growth_rate_per_hour': crossing.growth_rate,
-                    'confidence': crossing.confidence,
-                    'severity': self._calculate_exhaustion_severity(time_remaining)
-                })
+        warnings = await self.detect_resource_exhaustion_batch([device_id])
+        return warnings.get(device_id, [])
+    
+    # ------------------------------------------------------------------
+    # Fleet-wide (batched) predictions
+    # ------------------------------------------------------------------
+    
+    async def forecast_batch(
+        self,
+        device_ids: List[UUID],
+        metric_names: List[str],
+        forecast_horizons: List[int] = [60, 180, 360],
+        history: Optional[SeriesBatch] = None
+    ) -> List[Prediction]:
+        """
+        Forecast every (device, metric) pair in one pass.
         
-        return exhaustion_warnings
+        History for all pairs is loaded with one query (or taken from
+        `history` when the caller already has it), fitted as one matrix,
+        and the predictions are saved with a single bulk insert.
+        
+        Returns:
+            Predictions for every series with enough data
+        """
+        if history is None:
+            history = await self.fetch_history_batch(device_ids, metric_names, days=7)
+        
+        predictions = self._forecast_batch(history, forecast_horizons)
+        await self._save_predictions(predictions)
+        return predictions
     
-    def _select_model_type(self, data: List[Tuple[datetime, float]]) -> str:
+    async def predict_threshold_crossings_batch(
+        self,
+        device_ids: List[UUID],
+        metric_names: List[str],
+        custom_thresholds: Optional[Dict[str, Dict[str, float]]] = None,
+        history: Optional[SeriesBatch] = None
+    ) -> List[ThresholdCrossing]:
         """
-        Select best forecasting model based on data characteristics.
+        Threshold crossings (within 6 hours) for every (device, metric) pair.
         
         Args:
-            data: Historical time series data
-            
-        Returns:
-            Model type ('linear', 'exponential', 'arima')
+            custom_thresholds: Optional per-metric thresholds, e.g.
+                {'disk_usage': {'critical': 95}}
+            history: Already loaded history; only its last 3 days are used
         """
-        values = [v for _, v in data]
+        if history is None:
+            history = await self.fetch_history_batch(device_ids, metric_names, days=3)
         
-        # Calculate coefficient of variation
-        cv = np.std(values) / (np.mean(values) + 1e-10)
+        return self._threshold_crossings(history.tail(3 * 86400), custom_thresholds)
+    
+    async def detect_resource_exhaustion_batch(
+        self,
+        device_ids: List[UUID],
+        history: Optional[SeriesBatch] = None
+    ) -> Dict[UUID, List[Dict[str, Any]]]:
+        """
+        Resource exhaustion warnings for many devices at once.
         
-        # Calculate autocorrelation at lag 1
-        if len(values) > 10:
-            autocorr = np.corrcoef(values[:-1], values[1:])[0, 1]
+        Returns:
+            device_id -> list of exhaustion predictions (devices without
+            warnings are omitted)
+        """
+        thresholds = {
+            metric: {'critical': critical}
+            for metric, critical in self.exhaustion_thresholds.items()
+        }
+        
+        if history is None:
+            history = await self.fetch_history_batch(
+                device_ids, list(thresholds), days=3
+            )
         else:
-            autocorr = 0
+            wanted = np.array([metric in thresholds for _, metric in history.keys], dtype=bool)
+            history = history.select(wanted)
         
-        # Check for trend
-        x = np.arange(len(values))
-        slope, _, r_value, _, _ = stats.linregress(x, values)
+        crossings = await self.predict_threshold_crossings_batch(
+            device_ids, list(thresholds), custom_thresholds=thresholds, history=history
+        )
         
-        # Decision logic
-        if abs(r_value) > 0.7:  # Strong linear trend
-            return 'linear'
-        elif cv > 0.3:  # High volatility
-            return 'exponential'
-        else:
-            return 'linear'  # Default to linear (ARIMA too complex for now)
+        exhaustion_warnings: Dict[UUID, List[Dict[str, Any]]] = {}
+        for crossing in crossings:
+            time_remaining = crossing.time_until_crossing()
+            exhaustion_warnings.setdefault(crossing.device_id, []).append({
+                'resource': crossing.metric_name,
+                'current_usage': crossing.current_value,
+                'threshold': crossing.threshold_value,
+                'time_until_exhaustion': str(time_remaining),
+                'time_until_exhaustion_seconds': time_remaining.total_seconds(),
+                'estimated_exhaustion_time': crossing.estimated_crossing_time,
+                'growth_rate_per_hour': crossing.growth_rate,
+                'confidence': crossing.confidence,
+                'severity': self._calculate_exhaustion_severity(time_remaining)
+            })
+        
+        return exhaustion_warnings
     
-    async def _forecast(
+    # ------------------------------------------------------------------
+    # Vectorized internals
+    # ------------------------------------------------------------------
+    
+    def _forecast_batch(
         self,
-        historical_data: List[Tuple[datetime, float]],
-        horizon_minutes: int,
-        model_type: str,
-        device_id: UUID,
-        metric_name: str
-    ) -> Optional[Prediction]:
+        batch: SeriesBatch,
+        horizons: List[int]
+    ) -> List[Prediction]:
+        """Forecast all rows of `batch` with at least 20 points"""
+        enough = batch.counts >= 20
+        for i in np.flatnonzero(~enough):
+            device_id, metric_name = batch.keys[i]
+            logger.debug(
+                f"Insufficient data for prediction: {device_id}/{metric_name} "
+                f"({int(batch.counts[i])} points)"
+            )
+        if not enough.any():
+            return []
+        
+        batch = batch.select(enough)
+        result = batch_forecaster.forecast(batch, horizons)
+        predicted_at = datetime.utcnow()
+        
+        predictions = []
+        for i, (device_id, metric_name) in enumerate(batch.keys):
+            model_type = str(result['model_type'][i])
+            for h, horizon in enumerate(horizons):
+                predicted_value = result['predicted'][i, h]
+                if not np.isfinite(predicted_value):
+                    continue
+                predictions.append(Prediction(
+                    metric_name=metric_name,
+                    device_id=device_id,
+                    forecast_horizon_minutes=horizon,
+                    predicted_value=float(predicted_value),
+                    confidence_lower=float(result['lower'][i, h]),
+                    confidence_upper=float(result['upper'][i, h]),
+                    confidence_level=0.95,
+                    model_type=model_type,
+                    predicted_at=predicted_at
+                ))
+        return predictions
+    
+    def _threshold_crossings(
+        self,
+        batch: SeriesBatch,
+        custom_thresholds: Optional[Dict[str, Dict[str, float]]] = None
+    ) -> List[ThresholdCrossing]:
+        """Crossings within the next 6 hours for rows with at least 10 points"""
+        enough = batch.counts >= 10
+        if not enough.any():
+            return []
+        batch = batch.select(enough)
+        
+        upper = np.empty(len(batch.keys))
+        lower = np.empty(len(batch.keys))
+        for i, (_, metric_name) in enumerate(batch.keys):
+            thresholds = (custom_thresholds or {}).get(metric_name) or self.default_thresholds.get(
+                metric_name, {'warning': 80, 'critical': 90}
+            )
+            upper[i] = thresholds.get('critical', 90)
+            lower[i] = thresholds.get('lower', 10)
+        
+        fit = batch_forecaster.linear_fit(batch.hours, batch.values)
+        result = batch_forecaster.crossing_hours(batch, fit, upper, lower)
+        
+        now = datetime.utcnow()
+        crossings = []
+        # Only alert if crossing within 6 hours
+        for i in np.flatnonzero(result['hours'] <= 6):
+            device_id, metric_name = batch.keys[i]
+            crossings.append(ThresholdCrossing(
+                metric_name=metric_name,
+                device_id=device_id,
+                threshold_value=float(result['threshold'][i]),
+                threshold_type=str(result['threshold_type'][i]),
+                estimated_crossing_time=now + timedelta(hours=float(result['hours'][i])),
+                confidence=abs(float(fit['r_value'][i])),
+                current_value=float(result['current'][i]),
+                trend=str(result['trend'][i]),
+                growth_rate=float(fit['slope'][i])
+            ))
+        return crossings
+    
+    def _select_model_type(self, data: List[Tuple[datetime, float]]) -> str:
         """
-        Generate forecast using specified model.
+        Select best forecasting model based on data characteristics.
         
         Args:
-            historical_data: Historical time series
-            horizon_minutes: Minutes into future to predict
-            model_type: Type of model to use
-            device_id: Device ID
-            metric_name: Metric name
+            data: Historical time series data
             
         Returns:
-            Prediction object
+            Model type ('linear', 'exponential')
         """
-        try:
-            if model_type == 'linear':
-                return self._forecast_linear(
-                    historical_data, horizon_minutes, device_id, metric_name
-                )
-            elif model_type == 'exponential':
-                return self._forecast_exponential(
-                    historical_data, horizon_minutes, device_id, metric_name
-                )
-            else:
-                return self._forecast_linear(
-                    historical_data, horizon_minutes, device_id, metric_name
-                )
-        except Exception as e:
-            logger.error(f"Error in forecast: {e}")
-            return None
-    
-    def _forecast_linear(
-        self,
-        historical_data: List[Tuple[datetime, float]],
-        horizon_minutes: int,
-        device_id: UUID,
-        metric_name: str
-    ) -> Prediction:
-        """Linear regression forecast"""
-        times = np.array([(t - historical_data[0][0]).total_seconds() 
-                         for t, _ in historical_data]).reshape(-1, 1)
-        values = np.array([v for _, v in historical_data])
-        
-        # Train linear model
-        model = LinearRegression()
-        model.fit(times, values)
-        
-        # Predict
-        future_time = times[-1][0] + (horizon_minutes * 60)
-        predicted_value = model.predict([[future_time]])[0]
-        
-        # Calculate prediction interval (95% confidence)
-        residuals = values - model.predict(times)
-        mse = np.mean(residuals ** 2)
-        std_error = np.sqrt(mse * (1 + 1/len(times)))
-        margin = 1.96 * std_error  # 95% CI
-        
-        return Prediction(
-            metric_name=metric_name,
-            device_id=device_id,
-            forecast_horizon_minutes=horizon_minutes,
-            predicted_value=float(predicted_value),
-            confidence_lower=float(predicted_value - margin),
-            confidence_upper=float(predicted_value + margin),
-            confidence_level=0.95,
-            model_type='linear',
-            predicted_at=datetime.utcnow()
-        )
-    
-    def _forecast_exponential(
-        self,
-        historical_data: List[Tuple[datetime, float]],
-        horizon_minutes: int,
-        device_id: UUID,
-        metric_name: str
-    ) -> Prediction:
-        """Exponential smoothing forecast"""
-        values = np.array([v for _, v in historical_data])
-        
-        # Simple exponential smoothing
-        alpha = 0.3  # Smoothing parameter
-        smoothed = [values[0]]
-        
-        for i in range(1, len(values)):
-            smoothed.append(alpha * values[i] + (1 - alpha) * smoothed[-1])
-        
-        # Forecast: use last smoothed value
-        predicted_value = smoothed[-1]
-        
-        # Calculate prediction interval
-        residuals = values[1:] - np.array(smoothed[1:])
-        std = np.std(residuals)
-        margin = 1.96 * std
-        
-        return Prediction(
-            metric_name=metric_name,
-            device_id=device_id,
-            forecast_horizon_minutes=horizon_minutes,
-            predicted_value=float(predicted_value),
-            confidence_lower=float(predicted_value - margin),
-            confidence_upper=float(predicted_value + margin),
-            confidence_level=0.95,
-            model_type='exponential',
-            predicted_at=datetime.utcnow()
-        )
+        batch = batch_from_series(data)
+        fit = batch_forecaster.linear_fit(batch.hours, batch.values)
+        return str(batch_forecaster.select_models(batch.values, fit)[0])
     
     def _calculate_trend(
         self,
@@ -441,76 +411,16 @@ class PredictionEngine:
         Returns:
             Dict with trend, rate_per_hour, confidence
         """
-        times = np.array([(t - historical_data[0][0]).total_seconds() / 3600 
-                         for t, _ in historical_data])
-        values = np.array([v for _, v in historical_data])
-        
-        # Linear regression
-        slope, intercept, r_value, p_value, std_err = stats.linregress(times, values)
-        
-        # Determine trend
-        if abs(slope) < 0.1:
-            trend = 'stable'
-        elif slope > 0:
-            trend = 'increasing'
-        else:
-            trend = 'decreasing'
+        batch = batch_from_series(historical_data)
+        fit = batch_forecaster.linear_fit(batch.hours, batch.values)
         
         return {
-            'trend': trend,
-            'rate_per_hour': float(slope),
-            'confidence': abs(float(r_value)),
-            'p_value': float(p_value)
+            'trend': str(batch_forecaster.trend_labels(fit['slope'])[0]),
+            'rate_per_hour': float(fit['slope'][0]),
+            'confidence': abs(float(fit['r_value'][0])),
+            'p_value': float(fit['p_value'][0])
         }
     
-    def _predict_crossing_time(
-        self,
-        historical_data: List[Tuple[datetime, float]],
-        threshold: float,
-        threshold_type: str
-    ) -> Optional[datetime]:
-        """
-        Predict when metric will cross threshold based on trend.
-        
-        Args:
-            historical_data: Time series data
-            threshold: Threshold value
-            threshold_type: 'upper' or 'lower'
-            
-        Returns:
-            Estimated crossing time or None
-        """
-        times = np.array([(t - historical_data[0][0]).total_seconds() / 3600 
-                         for t, _ in historical_data])
-        values = np.array([v for _, v in historical_data])
-        
-        # Linear regression
-        slope, intercept, r_value, _, _ = stats.linregress(times, values)
-        
-        # Check if trend is in right direction
-        if threshold_type == 'upper' and slope <= 0:
-            return None
-        if threshold_type == 'lower' and slope >= 0:
-            return None
-        
-        # Low confidence in trend
-        if abs(r_value) < 0.5:
-            return None
-        
-        # Calculate crossing time
-        current_value = values[-1]
-        current_time = times[-1]
-        
-        # Solve: threshold = slope * t + intercept
-        hours_until_crossing = (threshold - intercept) / slope - current_time
-        
-        if hours_until_crossing <= 0:
-            return None
-        
-        crossing_time = datetime.utcnow() + timedelta(hours=hours_until_crossing)
-        
-        return crossing_time
-    
     def _calculate_exhaustion_severity(self, time_remaining: timedelta) -> str:
         """Calculate severity based on time until exhaustion"""
         hours = time_remaining.total_seconds() / 3600
@@ -531,29 +441,49 @@ class PredictionEngine:
         days: int = 7
     ) -> List[Tuple[datetime, float]]:
         """
-        Fetch historical metric data.
-        
-        TODO: Replace with actual metrics database query
+        Fetch historical metric data for one series.
         
         Returns:
             List of (timestamp, value) tuples
         """
-        # Simulated data for now
-        # In production, query from metrics database
+        batch = await self.fetch_history_batch([device_id], [metric_name], days=days)
+        return batch.series(0)
+    
+    async def fetch_history_batch(
+        self,
+        device_ids: List[UUID],
+        metric_names: List[str],
+        days: int = 7
+    ) -> SeriesBatch:
+        """
+        Fetch hourly history for every (device, metric) pair as one matrix.
+        
+        The samples the edge ingest writes to device_metric_samples are
+        loaded for the whole fleet in one round trip and bucketed by
+        align_series; hours without a sample are NaN.
         
+        Returns:
+            SeriesBatch with one row per (device_id, metric_name)
+        """
+        keys = [(device_id, metric) for device_id in device_ids for metric in metric_names]
         end_time = datetime.utcnow()
         start_time = end_time - timedelta(days=days)
         
-        # Generate realistic time series with trend
-        num_points = days * 24  # Hourly data
-        times = [start_time + timedelta(hours=i) for i in range(num_points)]
-        
-        # Simulate trending data with noise
-        trend = np.linspace(50, 75, num_points)  # Increasing trend
-        noise = np.random.normal(0, 5, num_points)
-        values = np.maximum(0, np.minimum(100, trend + noise))
-        
-        return list(zip(times, values.tolist()))
+        async with self.db_pool.acquire() as conn:
+            rows = await conn.fetch("""
+                SELECT device_id, metric_name,
+                       timestamp AT TIME ZONE 'UTC' AS timestamp, value
+                FROM device_metric_samples
+                WHERE device_id = ANY($1) AND metric_name = ANY($2)
+                  AND timestamp >= $3 AND timestamp < $4
+                ORDER BY timestamp
+            """, list(device_ids), list(metric_names),
+                start_time.replace(tzinfo=timezone.utc), end_time.replace(tzinfo=timezone.utc))
+        
+        return align_series(
+            ((r['device_id'], r['metric_name'], r['timestamp'], r['value']) for r in rows),
+            keys, start_time, end_time
+        )
     
     async def _save_prediction(
         self,
@@ -561,29 +491,39 @@ class PredictionEngine:
         device_id: UUID
     ) -> None:
         """Save prediction to database"""
+        await self._save_predictions([prediction])
+    
+    async def _save_predictions(self, predictions: List[Prediction]) -> None:
+        """Save predictions to database in one bulk insert"""
+        if not predictions:
+            return
         try:
             async with self.db_pool.acquire() as conn:
-                await conn.execute("""
+                await conn.executemany("""
                     INSERT INTO alert_predictions (
                         device_id, metric_name, forecast_horizon_minutes,
                         predicted_value, confidence_lower, confidence_upper,
                         confidence_level, model_type, predicted_at, metadata
                     ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)
-                """,
-                    device_id,
-                    prediction.metric_name,
-                    prediction.forecast_horizon_minutes,
-                    prediction.predicted_value,
-                    prediction.confidence_lower,
-                    prediction.confidence_upper,
-                    prediction.confidence_level,
-                    prediction.model_type,
-                    prediction.predicted_at,
-                    json.dumps(prediction.to_dict())
-                )
+                """, [
+                    (
+                        prediction.device_id,
+                        prediction.metric_name,
+                        prediction.forecast_horizon_minutes,
+                        prediction.predicted_value,
+                        prediction.confidence_lower,
+                        prediction.confidence_upper,
+                        prediction.confidence_level,
+                        prediction.model_type,
+                        prediction.predicted_at,
+                        json.dumps(prediction.to_dict())
+                    )
+                    for prediction in predictions
+                ])
         except Exception as e:
-            logger.error(f"Error saving prediction: {e}")
+            logger.error(f"Error saving predictions: {e}")
     
+
     async def get_predictions(
         self,
         device_id: Optional[UUID] = None,
@@ -0,0 +1,540 @@
+"""
+Router Registry
+
+Mounts the API routers listed in ROUTER_MANIFEST without importing their
+modules at startup. Each manifest entry names the module, its APIRouter
+attributes and the path prefixes they serve; until the first request for
+one of those prefixes only a placeholder sits in the route table. The
+request then imports the module (in a worker thread), its routes replace
+the placeholder - so the route order, and with it which of two overlapping
+routes wins, is the same as with eager imports - and the request is routed
+as usual.
+
+Every import is profiled: wall time and the process RSS growth while the
+module was imported (approximate when other work runs concurrently). See
+get_stats(), GET /api/v1/health/routers, and for a whole-manifest report:
+
+    python router_registry.py [--isolated] [--json]
+
+Configuration:
+    ROUTER_LOADING=lazy|eager   eager imports every router at startup
+    ROUTERS_EAGER=credit,k8s    entries imported at startup anyway
+    ROUTERS_DISABLED=atlas,k8s  entries not mounted at all
+"""
+
+import asyncio
+import importlib
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+import psutil
+from starlette.routing import BaseRoute, Match, NoMatchFound
+
+logger = logging.getLogger(__name__)
+
+ROUTER_LOADING = os.getenv('ROUTER_LOADING', 'lazy').lower()
+
+
+def _names(value: str) -> set:
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+ROUTERS_EAGER = _names(os.getenv('ROUTERS_EAGER', ''))
+ROUTERS_DISABLED = _names(os.getenv('ROUTERS_DISABLED', ''))
+
+# Requests that need the complete route table: the OpenAPI schema and the
+# API documentation endpoints (api_docs.py) built from it
+DOCS_PREFIXES = ('/openapi.json', '/docs', '/redoc', '/api/v1/docs')
+
+
+@dataclass(frozen=True)
+class RouterSpec:
+    """One module's routers and the path prefixes they serve"""
+
+    name: str
+    module: str
+    prefixes: Tuple[str, ...]
+    routers: Tuple[str, ...] = ('router',)
+    # Needed at startup: router startup hooks that other modules rely on,
+    # or the module is imported by server.py anyway
+    eager: bool = False
+    # Environment toggle that must be "true" (default true) to mount it
+    flag: Optional[str] = None
+    # Import failures are logged instead of failing an eager startup
+    optional: bool = False
+
+
+# Mount order = route precedence; keep it as it was with app.include_router()
+ROUTER_MANIFEST: Tuple[RouterSpec, ...] = (
+    # Model Access Control FIRST - Epic 3.3 (HIGH PRIORITY). model_management_api
+    # is not mounted: it also uses /api/v1/models and its "/" route interferes
+    RouterSpec('model_access', 'model_access_api', ('/api/v1/models',)),
+
+    # E-commerce, self-service checkout and subscriptions (Epic 5.0)
+    RouterSpec('public', 'public_api', ('/api/v1/public',)),
+    RouterSpec('public_checkout', 'public_checkout_api', ('/api/v1/checkout',)),
+    RouterSpec('my_subscription', 'my_subscription_api', ('/api/v1/my-subscription',)),
+    RouterSpec('trials', 'trial_api', ('/api/v1/admin/trials',)),
+    RouterSpec('public_signup', 'public_signup_api', ('/api/v1/public/signup',)),
+    RouterSpec('invoices', 'invoice_api', ('/api/v1/invoices',)),
+
+    # API Key & Usage Management (Epic 7.0)
+    RouterSpec('api_keys', 'api_key_usage_endpoints', ('/api/v1/keys', '/api/v1/usage'),
+               routers=('router', 'usage_router'), optional=True),
+
+    RouterSpec('audit', 'audit_endpoints', ('/api/v1/audit',), flag='AUDIT_ENABLED'),
+    RouterSpec('byok', 'byok_api', ('/api/v1/byok',)),
+    RouterSpec('lago_webhooks', 'lago_webhooks', ('/api/v1/webhooks',)),
+    RouterSpec('stripe_webhooks', 'webhooks', ('/api/v1/webhooks',)),
+    RouterSpec('usage', 'usage_api', ('/api/v1/usage',)),
+    RouterSpec('admin_subscriptions', 'admin_subscriptions_api', ('/api/v1/admin/subscriptions',)),
+    # Traefik ForwardAuth
+    RouterSpec('tier_check', 'tier_check_middleware', ('/api/v1/tier-check',)),
+    RouterSpec('subscriptions', 'subscription_api', ('/api/v1/subscriptions',)),
+    RouterSpec('subscription_management', 'subscription_management_api', ('/api/v1/subscriptions',)),
+    RouterSpec('stripe', 'stripe_api', ('/api/v1/billing',)),
+    RouterSpec('billing', 'billing_api', ('/api/v1/billing',)),
+    RouterSpec('payment_methods', 'payment_methods_api', ('/api/v1/payment-methods',)),
+
+    # Extensions Marketplace: purchase & admin BEFORE the catalog's /{addon_id}
+    RouterSpec('extensions_purchase', 'extensions_purchase_api', ('/api/v1/extensions',)),
+    RouterSpec('extensions_admin', 'extensions_admin_api', ('/api/v1/admin/extensions',)),
+    RouterSpec('extensions_cart', 'extensions_cart_api', ('/api/v1/cart',)),
+    RouterSpec('extensions_catalog', 'extensions_catalog_api', ('/api/v1/extensions',)),
+    RouterSpec('my_apps', 'my_apps_api', ('/api/v1/my-apps',)),
+
+    RouterSpec('logs_search', 'logs_search_api', ('/api/v1/logs',)),
+    RouterSpec('backups', 'backup_api', ('/api/backups',)),
+    RouterSpec('centerdeep_search', 'centerdeep_api', ('/api/v1/search',), optional=True),
+
+    # Credits (Epic 1.8): its startup hook initializes the shared credit_manager
+    RouterSpec('credits', 'credit_api', ('/api/v1/credits',), eager=True),
+    RouterSpec('credit_purchase', 'credit_purchase_api', ('/api/v1/billing/credits',)),
+    RouterSpec('cost_optimization', 'cost_optimization_api', ('/api/v1/costs',)),
+    RouterSpec('local_users', 'local_user_api', ('/api/v1/local-users',)),
+    RouterSpec('org', 'org_api', ('/api/v1/org',)),
+    RouterSpec('org_billing', 'org_billing_api', ('/api/v1/org-billing',)),
+    RouterSpec('firewall', 'firewall_api', ('/api/v1/network/firewall',)),
+    RouterSpec('cloudflare', 'cloudflare_api', ('/api/v1/cloudflare',)),
+    RouterSpec('migration', 'migration_api', ('/api/v1/migration',)),
+    RouterSpec('credentials', 'credential_api', ('/api/v1/credentials',)),
+    RouterSpec('invite_codes', 'invite_codes_api', ('/api/v1/admin/invite-codes', '/api/v1/invite-codes'),
+               routers=('admin_router', 'user_router')),
+
+    # Edge devices, OTA and webhooks (Epic 7.1 / 7.2 / 8.1)
+    RouterSpec('edge_devices', 'edge_device_api', ('/api/v1/edge/devices', '/api/v1/admin/edge'),
+               routers=('device_router', 'admin_router')),
+    RouterSpec('ota', 'ota_api', ('/api/v1/ota', '/api/v1/admin/ota'),
+               routers=('ota_device_router', 'ota_admin_router')),
+    RouterSpec('webhooks', 'webhook_api', ('/api/v1/webhooks',)),
+
+    # Multi-Tenant Management (Epic 10)
+    RouterSpec('tenants', 'tenant_management_api', ('/api/v1/admin/tenants',)),
+    RouterSpec('cross_tenant_analytics', 'cross_tenant_analytics_api', ('/api/v1/admin/analytics',)),
+
+    RouterSpec('keycloak_status', 'keycloak_status_api', ('/api/v1/system/keycloak',)),
+    RouterSpec('user_management', 'user_management_api', ('/api/v1/admin/users',)),
+    RouterSpec('account_management', 'account_management_api', (
+        '/api/v1/account-management', '/api/v1/admin/system-settings',
+        '/api/v1/admin/system/local-users/groups', '/api/v1/admin/users',
+        '/api/v1/auth', '/api/v1/cloudflare/account', '/api/v1/notifications/preferences',
+        '/api/v1/organizations', '/api/v1/services/status', '/api/v1/tiers/features',
+    )),
+    RouterSpec('avatars', 'avatar_storage', ('/api/v1/users',)),
+    RouterSpec('subscription_tiers', 'subscription_tiers_api', ('/api/v1/admin/tiers',)),
+    RouterSpec('organization_branding', 'organization_branding_api', ('/api/v1/organizations',)),
+    RouterSpec('tier_features', 'tier_features_api', ('/api/v1/admin/tiers', '/api/v1/tiers')),
+    RouterSpec('app_definitions', 'app_definitions_api', ('/api/v1/admin/apps',)),
+    RouterSpec('admin_local_users', 'local_users_api', ('/api/v1/admin/system/local-users',)),
+
+    # LLM routing, models and providers
+    RouterSpec('litellm_routing', 'litellm_routing_api', ('/api/v1/llm',)),
+    RouterSpec('llm_routing_v2', 'llm_routing_api_v2', ('/api/v2/llm',)),
+    RouterSpec('forgejo', 'routers.forgejo', ('/api/v1/forgejo',)),
+    RouterSpec('model_lists', 'model_list_api', (
+        '/api/v1/admin/model-lists', '/api/v1/user/model-preferences', '/api/v1/app-model-lists',
+    ), routers=('admin_router', 'user_router', 'public_router')),
+    RouterSpec('litellm', 'litellm_api', ('/api/v1/llm',)),
+    RouterSpec('model_catalog', 'model_catalog_api', ('/api/v1/llm',)),
+    RouterSpec('provider_keys', 'provider_keys_api', ('/api/v1/llm/providers',)),
+    RouterSpec('testing_lab', 'testing_lab_api', ('/api/v1/llm/test',)),
+    RouterSpec('uc_api_keys', 'uc_api_keys', ('/api/v1/account/uc-api-keys',)),
+    RouterSpec('platform_keys', 'platform_keys_api', ('/api/v1/admin/platform-keys',)),
+    RouterSpec('platform_settings', 'platform_settings_api', ('/api/v1/platform',)),
+
+    # Traefik (Epic 1.3): comprehensive and live APIs, then the legacy ones
+    RouterSpec('traefik', 'traefik_api', ('/api/v1/traefik',)),
+    RouterSpec('traefik_live', 'traefik_live_api', ('/api/v1/traefik/live',)),
+    RouterSpec('traefik_routes', 'traefik_routes_api', ('/api/v1/traefik/routes',)),
+    RouterSpec('traefik_services', 'traefik_services_api', ('/api/v1/traefik/services',)),
+    RouterSpec('traefik_ssl', 'traefik_ssl_manager', ('/api/v1/traefik/ssl', '/api/v1/traefik/certificates'),
+               routers=('router', 'legacy_router')),
+    RouterSpec('traefik_metrics', 'traefik_metrics_api', ('/api/v1/traefik/metrics',)),
+    RouterSpec('traefik_middlewares', 'traefik_middlewares_api', ('/api/v1/traefik/middlewares',)),
+
+    RouterSpec('brigade', 'brigade_api', ('/api/v1/brigade',)),
+    RouterSpec('claude_agents', 'routers.claude_agents', ('/api/v1/claude-agents',)),
+    RouterSpec('atlas', 'atlas.atlas_api', ('/api/v1/atlas',)),
+    RouterSpec('fleet', 'multi_server_api', ('/api/v1/fleet',)),
+    RouterSpec('k8s', 'k8s_api', ('/api/v1/k8s',)),
+    RouterSpec('rbac', 'rbac_api', ('/api/v1/rbac',)),
+    # Probed by orchestrators; server.py imports it for init_health_checker
+    RouterSpec('health', 'health_check_api', ('/api/v1/health',), eager=True),
+    RouterSpec('compliance', 'compliance_api', ('/api/v1/compliance',)),
+    RouterSpec('terraform', 'terraform_api', ('/api/v1/terraform',)),
+    RouterSpec('saml', 'saml_api', ('/api/v1/saml',)),
+    RouterSpec('storage_backup', 'storage_backup_api', ('/api/v1/storage', '/api/v1/backups')),
+    RouterSpec('restic_backup', 'restic_api_endpoints', ('/api/v1/backups/restic',)),
+
+    # Notifications, 2FA and alerting (Epic 2.3 / 2.5)
+    RouterSpec('notifications', 'email_notification_api', ('/api/v1/notifications',)),
+    RouterSpec('two_factor', 'two_factor_api', ('/api/v1/admin/2fa',)),
+    RouterSpec('email_provider', 'email_provider_api', ('/api/v1/email-provider',)),
+    RouterSpec('email_alerts', 'email_alerts_api', ('/api/v1/alerts',)),
+    RouterSpec('alert_triggers', 'alert_triggers_api', ('/api/v1/alert-triggers',)),
+
+    # Monitoring (Epic 2.5 / 3.1)
+    RouterSpec('system_metrics', 'system_metrics_api', ('/api/v1/system',)),
+    RouterSpec('grafana', 'grafana_api', ('/api/v1/monitoring/grafana',)),
+    RouterSpec('umami', 'umami_api', ('/api/v1/monitoring/umami',)),
+    RouterSpec('prometheus', 'prometheus_api', ('/api/v1/monitoring/prometheus',)),
+
+    # Supplementary analytics FIRST: its mock endpoints override the old DB ones
+    RouterSpec('analytics', 'routers.analytics', ('/api/v1/analytics',), routers=(
+        'revenue_router', 'users_router', 'services_router',
+        'metrics_router', 'performance_router', 'main_router',
+    )),
+    RouterSpec('metering', 'routers.metering', (
+        '/api/v1/billing/analytics', '/api/v1/llm/cache-stats', '/api/v1/llm/costs',
+        '/api/v1/llm/usage', '/api/v1/metering',
+    )),
+    # Analytics (Epic 2.6)
+    RouterSpec('revenue_analytics', 'revenue_analytics', ('/api/v1/analytics/revenue',)),
+    RouterSpec('user_analytics', 'user_analytics', ('/api/v1/analytics/users',)),
+    # Its startup hook runs the usage log aggregation
+    RouterSpec('usage_analytics', 'usage_analytics', ('/api/v1/analytics/usage',), eager=True),
+
+    # Sprint 6-7
+    RouterSpec('permissions', 'permissions_management_api', ('/api/v1/permissions',)),
+    RouterSpec('llm_usage', 'llm_usage_api', ('/api/v1/llm/usage',)),
+    RouterSpec('llm_provider_settings', 'llm_provider_settings_api', ('/api/v1/llm/providers',)),
+    RouterSpec('traefik_services_detail', 'traefik_services_detail_api', ('/api/v1/traefik/services',)),
+
+    RouterSpec('api_docs', 'api_docs', ('/api/v1/docs',)),
+    RouterSpec('white_label', 'white_label_api', ('/api/v1/admin/white-label',)),
+    RouterSpec('landing_settings', 'landing_page_settings_api', ('/api/v1/system/settings', '/api/v1/admin/settings')),
+    RouterSpec('dynamic_pricing', 'dynamic_pricing_api', ('/api/v1/pricing',)),
+    RouterSpec('pricing_packages', 'pricing_packages_api', ('/api/v1/public/pricing',)),
+)
+
+
+def _rss() -> int:
+    return psutil.Process().memory_info().rss
+
+
+def profile_import(module_name: str) -> Tuple[object, float, int]:
+    """Import module_name; returns (module, seconds, RSS growth in bytes)"""
+    rss_before = _rss()
+    started = time.perf_counter()
+    module = importlib.import_module(module_name)
+    return module, time.perf_counter() - started, _rss() - rss_before
+
+
+class _Placeholder(BaseRoute):
+    """Keeps an unloaded entry's place in the route table; never matches"""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def matches(self, scope):
+        return Match.NONE, {}
+
+    def url_path_for(self, name, **path_params):
+        raise NoMatchFound(name, path_params)
+
+    async def handle(self, scope, receive, send):  # pragma: no cover - never matched
+        raise RuntimeError(f"placeholder for router {self.name} was routed to")
+
+
+@dataclass
+class _Entry:
+    spec: RouterSpec
+    placeholder: _Placeholder
+    state: str = 'pending'  # pending | loaded | failed
+    trigger: Optional[str] = None
+    import_seconds: Optional[float] = None
+    rss_delta_bytes: Optional[int] = None
+    routes: int = 0
+    loaded_at: Optional[float] = None
+    error: Optional[str] = None
+    on_load: List[Callable] = field(default_factory=list)
+
+    def stats(self) -> Dict:
+        return {
+            "name": self.spec.name,
+            "module": self.spec.module,
+            "state": self.state,
+            "trigger": self.trigger,
+            "import_seconds": round(self.import_seconds, 4) if self.import_seconds is not None else None,
+            "rss_delta_mb": round(self.rss_delta_bytes / 1048576, 1) if self.rss_delta_bytes is not None else None,
+            "routes": self.routes,
+            "loaded_at": self.loaded_at,
+            "error": self.error,
+        }
+
+
+class LazyRouterMiddleware:
+    """Loads the routers serving a request's path before it is routed"""
+
+    def __init__(self, app, registry: 'RouterRegistry'):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] in ('http', 'websocket') and self.registry.pending:
+            await self.registry.load_for_path(scope['path'])
+        await self.app(scope, receive, send)
+
+
+class RouterRegistry:
+    """Mounts manifest routers on an app, importing them on first use"""
+
+    def __init__(self, manifest=ROUTER_MANIFEST, mode: str = ROUTER_LOADING,
+                 eager=ROUTERS_EAGER, disabled=ROUTERS_DISABLED):
+        self.manifest = tuple(manifest)
+        self.mode = mode
+        self.eager = set(eager)
+        self.disabled = set(disabled)
+        self.app = None
+        self.entries: Dict[str, _Entry] = {}
+        self.skipped: List[str] = []
+        self.started = False
+        self._lock = asyncio.Lock()
+        self._startup_rss: Optional[int] = None
+
+    @property
+    def pending(self) -> bool:
+        return any(entry.state == 'pending' for entry in self.entries.values())
+
+    def on_load(self, name: str, callback: Callable):
+        """Call callback(module) once the entry's module is imported"""
+        entry = self.entries.get(name)
+        if entry is None:
+            return
+        if entry.state == 'loaded':
+            callback(sys.modules[entry.spec.module])
+        else:
+            entry.on_load.append(callback)
+
+    def mount(self, app):
+        """Add the manifest to app's routes at this point of the route table"""
+        self.app = app
+        app.add_middleware(LazyRouterMiddleware, registry=self)
+        app.router.on_startup.append(self._startup)
+
+        for spec in self.manifest:
+            if spec.name in self.disabled or (
+                spec.flag and os.getenv(spec.flag, 'true').lower() != 'true'
+            ):
+                self.skipped.append(spec.name)
+                continue
+            entry = _Entry(spec, _Placeholder(spec.name))
+            self.entries[spec.name] = entry
+            app.router.routes.append(entry.placeholder)
+
+        for entry in self.entries.values():
+            if self.mode == 'eager' or entry.spec.eager or entry.spec.name in self.eager:
+                try:
+                    module, seconds, rss_delta = profile_import(entry.spec.module)
+                    self._include(entry, module, 'startup', seconds, rss_delta)
+                except Exception as e:
+                    self._failed(entry, 'startup', e)
+                    if not entry.spec.optional:
+                        raise
+
+        deferred = sum(entry.state == 'pending' for entry in self.entries.values())
+        logger.info(
+            f"Router registry: {len(self.entries)} routers mounted ({self.mode}), "
+            f"{deferred} deferred until first request, {len(self.skipped)} disabled"
+        )
+
+    async def _startup(self):
+        self.started = True
+        self._startup_rss = _rss()
+        loaded = [entry for entry in self.entries.values() if entry.state == 'loaded']
+        logger.info(
+            f"Routers imported at startup: {len(loaded)} in "
+            f"{sum(entry.import_seconds for entry in loaded):.2f}s; "
+            f"process RSS {self._startup_rss / 1048576:.0f} MB"
+        )
+
+    def _matching(self, path: str) -> List[_Entry]:
+        everything = path.startswith(DOCS_PREFIXES)
+        return [
+            entry for entry in self.entries.values()
+            if entry.state == 'pending'
+            and (everything or any(path.startswith(prefix) for prefix in entry.spec.prefixes))
+        ]
+
+    async def load_for_path(self, path: str):
+        """Import and mount every pending entry that may serve path"""
+        if not self._matching(path):
+            return
+        async with self._lock:
+            for entry in self._matching(path):
+                try:
+                    module, seconds, rss_delta = await asyncio.to_thread(profile_import, entry.spec.module)
+                    self._include(entry, module, 'request', seconds, rss_delta)
+                except Exception as e:
+                    self._failed(entry, 'request', e)
+                    continue
+                await self._run_startup_hooks(entry, module)
+
+    def _include(self, entry: _Entry, module, trigger: str, seconds: float, rss_delta: int):
+        """Replace entry's placeholder with the routes of its routers"""
+        routers = [getattr(module, attr) for attr in entry.spec.routers]
+        routes = self.app.router.routes
+        end = len(routes)
+        for router in routers:
+            self.app.include_router(router)
+        added = routes[end:]
+        del routes[end:]
+        index = routes.index(entry.placeholder)
+        routes[index:index + 1] = added
+        # The cached OpenAPI schema no longer lists every route
+        self.app.openapi_schema = None
+
+        entry.state = 'loaded'
+        entry.trigger = trigger
+        entry.import_seconds = seconds
+        entry.rss_delta_bytes = rss_delta
+        entry.routes = sum(len(router.routes) for router in routers)
+        entry.loaded_at = time.time()
+        logger.info(
+            f"Router {entry.spec.name} ({entry.spec.module}) loaded on {trigger}: "
+            f"{entry.routes} routes, import {seconds * 1000:.0f} ms, RSS +{rss_delta / 1048576:.1f} MB"
+        )
+        for callback in entry.on_load:
+            try:
+                callback(module)
+            except Exception as e:
+                logger.error(f"on_load callback of router {entry.spec.name} failed: {e}")
+
+    async def _run_startup_hooks(self, entry: _Entry, module):
+        """Routers loaded after startup missed their startup hooks; run them now"""
+        if not self.started:
+            return
+        for attr in entry.spec.routers:
+            for handler in getattr(module, attr).on_startup:
+                try:
+                    result = handler()
+                    if asyncio.iscoroutine(result):
+                        await result
+                except Exception as e:
+                    logger.error(f"Startup hook of router {entry.spec.name} failed: {e}")
+
+    def _failed(self, entry: _Entry, trigger: str, error: Exception):
+        entry.state = 'failed'
+        entry.trigger = trigger
+        entry.error = str(error)
+        logger.error(f"Failed to load router {entry.spec.name} ({entry.spec.module}): {error}")
+
+    def get_stats(self) -> Dict:
+        """Load state, import time and RSS growth per router"""
+        entries = [entry.stats() for entry in self.entries.values()]
+        loaded = [entry for entry in self.entries.values() if entry.state == 'loaded']
+        return {
+            "mode": self.mode,
+            "mounted": len(entries),
+            "loaded": len(loaded),
+            "pending": sum(entry["state"] == 'pending' for entry in entries),
+            "failed": sum(entry["state"] == 'failed' for entry in entries),
+            "disabled": self.skipped,
+            "import_seconds_total": round(sum(entry.import_seconds for entry in loaded), 3),
+            "rss_mb": round(_rss() / 1048576, 1),
+            "rss_at_startup_mb": round(self._startup_rss / 1048576, 1) if self._startup_rss else None,
+            "routers": sorted(entries, key=lambda entry: -(entry["import_seconds"] or 0)),
+        }
+
+
+# Global registry used by server.py
+router_registry = RouterRegistry()
+
+
+def _profile_isolated(spec: RouterSpec) -> Dict:
+    """Import cost of spec's module alone, in a fresh interpreter"""
+    code = (
+        "import json, sys; sys.path.insert(0, sys.argv[1]);"
+        "from router_registry import profile_import;"
+        "_, seconds, rss = profile_import(sys.argv[2]);"
+        "print(json.dumps([seconds, rss]))"
+    )
+    result = subprocess.run(
+        [sys.executable, '-c', code, os.path.dirname(os.path.abspath(__file__)), spec.module],
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        return {"error": result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "failed"}
+    seconds, rss = json.loads(result.stdout.strip().splitlines()[-1])
+    return {"import_seconds": seconds, "rss_delta_bytes": rss}
+
+
+def profile_manifest(isolated: bool = False) -> List[Dict]:
+    """
+    Import cost of every manifest module
+
+    In one process (default) each module is charged for the dependencies it
+    is the first to import, in mount order; isolated imports each module in a
+    fresh interpreter - what a worker saves by never loading it.
+    """
+    report = []
+    for spec in ROUTER_MANIFEST:
+        row = {"name": spec.name, "module": spec.module}
+        if isolated:
+            row.update(_profile_isolated(spec))
+        else:
+            try:
+                _, seconds, rss = profile_import(spec.module)
+                row.update(import_seconds=seconds, rss_delta_bytes=rss)
+            except Exception as e:
+                row["error"] = str(e)
+        report.append(row)
+    return report
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Profile import time and RSS of the API routers")
+    parser.add_argument('--isolated', action='store_true', help="import each module in a fresh interpreter")
+    parser.add_argument('--json', action='store_true', help="print the report as JSON")
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    baseline = _rss()
+    report = profile_manifest(isolated=args.isolated)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    report.sort(key=lambda row: -row.get("import_seconds", 0))
+    print(f"{'router':<26} {'module':<32} {'import ms':>10} {'RSS MB':>8}")
+    for row in report:
+        if "error" in row:
+            print(f"{row['name']:<26} {row['module']:<32} {'error':>10}  {row['error']}")
+            continue
+        print(f"{row['name']:<26} {row['module']:<32} "
+              f"{row['import_seconds'] * 1000:>10.0f} {row['rss_delta_bytes'] / 1048576:>8.1f}")
+    if not args.isolated:
+        total = sum(row.get("import_seconds", 0) for row in report)
+        print(f"\ntotal import {total:.2f}s, RSS {baseline / 1048576:.0f} -> {_rss() / 1048576:.0f} MB")
+
+
+if __name__ == '__main__':
+    main()
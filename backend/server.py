@@ -56,7 +56,6 @@ from csrf_protection import create_csrf_protection, get_csrf_token
 from rate_limiter import rate_limiter, rate_limit, check_rate_limit_manual
 from audit_logger import audit_logger
 from request_id_middleware import RequestIDMiddleware
-from audit_endpoints import router as audit_router
 from audit_helpers import (
     log_auth_success, log_auth_failure, log_logout,
     log_service_operation, log_permission_denied,
@@ -64,164 +63,19 @@ from audit_helpers import (
 )
 from password_policy import validate_password, check_password_strength, get_password_requirements
 from service_discovery import service_discovery
-from lago_webhooks import router as lago_webhook_router
-from webhooks import router as stripe_webhooks_router
-from byok_api import router as byok_router
 from tier_enforcement_middleware import TierEnforcementMiddleware
 from credit_deduction_middleware import CreditDeductionMiddleware
-from usage_api import router as usage_router
-from admin_subscriptions_api import router as admin_subscriptions_router
-from tier_check_middleware import router as tier_check_router
-from subscription_api import router as subscription_router
-from subscription_management_api import router as subscription_management_router
-from stripe_api import router as stripe_router
-from billing_api import router as billing_router
-from payment_methods_api import router as payment_methods_router
-from credit_api import router as credit_router
-from credit_purchase_api import router as credit_purchase_router
-from cost_optimization_api import router as cost_optimization_router
-from local_user_api import router as local_user_router
-from org_api import router as org_router
 from org_manager import org_manager
-from org_billing_api import router as org_billing_router
-from firewall_api import router as firewall_router
-from cloudflare_api import router as cloudflare_router
-from migration_api import router as migration_router
-from credential_api import router as credential_router
-from keycloak_status_api import router as keycloak_status_router
-from litellm_routing_api import router as litellm_routing_router
-from llm_routing_api_v2 import router as litellm_routing_router_v2  # Epic 3.1 Multi-Provider Routing
-from litellm_api import router as litellm_api_router  # Chat completions, credits, BYOK
-from model_catalog_api import router as model_catalog_router  # Model catalog API
-from model_access_api import router as model_access_router  # Model access control (Epic 3.3)
 from litellm_credit_system import CreditSystem
 from byok_manager import BYOKManager
 import asyncpg
+from db_manager import db_manager
 import redis.asyncio as aioredis
-from local_users_api import router as admin_local_users_router
-from tenant_management_api import router as tenant_management_router
-from cross_tenant_analytics_api import router as cross_tenant_analytics_router
-from public_api import router as public_api_router
-from public_checkout_api import router as public_checkout_router
-from my_subscription_api import router as my_subscription_router
-from trial_api import router as trial_router
-from public_signup_api import router as public_signup_router
-from invoice_api import router as invoice_router
-from platform_settings_api import router as platform_settings_router
-from user_management_api import router as user_management_router
-# Avatar Storage API (November 2025 - CORS fix for bolt.diy)
-from avatar_storage import router as avatar_storage_router  # Avatar storage & caching
 from redis_session import redis_session_manager
-from account_management_api import router as account_management_router
-from subscription_tiers_api import router as subscription_tiers_router
-from tier_features_api import router as tier_features_router
-from app_definitions_api import router as app_definitions_router
-from organization_branding_api import router as organization_branding_router
-from routers.forgejo import router as forgejo_router
-
-# Model List Management API
-from model_list_api import admin_router as model_list_admin_router
-from model_list_api import user_router as model_list_user_router
-from model_list_api import public_router as model_list_public_router
-
-# Invite Code System (VIP Founder)
-from invite_codes_api import admin_router as invite_codes_admin_router
-from invite_codes_api import user_router as invite_codes_user_router
-
-# Email Notification System (Epic 2.3)
-from email_scheduler import EmailScheduler
-from email_notification_api import router as notification_router
-from email_provider_api import router as email_provider_router
-
-# Email Alert System (Epic 2.5 - Agent 2)
-from email_alerts_api import router as email_alerts_router
-
-# Alert Trigger System (Epic 2.5 - Agent 3)
-from alert_triggers_api import router as alert_triggers_router
-
-# Extensions Marketplace API - Phase 1 MVP (NEW)
-from extensions_catalog_api import router as extensions_catalog_router
-from my_apps_api import router as my_apps_router
-from extensions_cart_api import router as extensions_cart_router
-from extensions_purchase_api import router as extensions_purchase_router
-from extensions_admin_api import router as extensions_admin_api_router
-
-# Advanced Log Search API (Epic 2.5)
-from logs_search_api import router as logs_search_router
-
-# Database Backup API
-from backup_api import router as backup_router
-
-# System Metrics & Health Monitoring (Epic 2.5)
-from system_metrics_api import router as system_metrics_router
-from metrics_collector import MetricsCollector
-from alert_manager import AlertManager
-# Grafana Integration (Monitoring Team)
-from grafana_api import router as grafana_router
-
-# Umami Analytics Integration (Epic 2.5 - Monitoring)
-from umami_api import router as umami_router
-
-# Prometheus Monitoring API (Epic 3.1)
-from prometheus_api import router as prometheus_router
-
-# Revenue Analytics (Epic 2.6)
-from revenue_analytics import router as revenue_analytics_router
-
-# User Analytics (Epic 2.6)
-from user_analytics import router as user_analytics_router
-
-# Usage Analytics (Epic 2.6)
-from usage_analytics import router as usage_analytics_router
-
-# Supplementary Analytics & Metering (November 2025)
-from routers.analytics import (
-    revenue_router as analytics_revenue_router,
-    users_router as analytics_users_router,
-    services_router as analytics_services_router,
-    metrics_router as analytics_metrics_router,
-    performance_router as analytics_performance_router,
-    main_router as analytics_main_router
-)
-from routers.metering import router as metering_router
-
-# Model Management API (Sprint 6-7)
-from model_management_api import router as model_management_router
-
-# Permissions Management API (Sprint 6-7)
-from permissions_management_api import router as permissions_management_router
-
-# LLM Usage API (Sprint 6-7)
-from llm_usage_api import router as llm_usage_router
-
-# LLM Provider Settings API (Sprint 6-7)
-from llm_provider_settings_api import router as llm_provider_settings_router
-
-# LLM Provider Keys API (Epic 3.2 - Unified LLM Management)
-from provider_keys_api import router as provider_keys_router
-
-# UC API Keys & Platform Keys Management (November 2025)
-from uc_api_keys import router as uc_api_keys_router
-from platform_keys_api import router as platform_keys_router
-
-# Edge Device Management (Epic 7.1 - January 2026)
-from edge_device_api import device_router as edge_device_router
-from edge_device_api import admin_router as edge_admin_router
-
-# OTA Update Management (Epic 7.2 - January 2026)
-from ota_api import ota_admin_router, ota_device_router
 
-# Webhook System (Epic 8.1 - January 2026)
-from webhook_api import router as webhook_router
-
-# LLM Testing Lab API (Epic 3.2 - Unified LLM Management)
-from testing_lab_api import router as testing_lab_router
-
-# Traefik Services Detail API (Sprint 6-7)
-from traefik_services_detail_api import router as traefik_services_detail_router
-
-# API Documentation (Epic 2.8)
-from api_docs import router as api_docs_router
+# API routers are mounted from the manifest in router_registry.py and
+# imported on their first request (ROUTER_LOADING=eager restores startup imports)
+from router_registry import router_registry
 
 # Performance Optimization (Epic 3.1)
 from cache_middleware import CacheHeaderMiddleware, CompressionMiddleware
@@ -230,60 +84,10 @@ from cache_middleware import CacheHeaderMiddleware, CompressionMiddleware
 # Input Validation Middleware (P1 Security Fix)
 from middleware.validation import InputValidationMiddleware
 
-# Storage & Backup Management
-from storage_backup_api import router as storage_backup_router
-from restic_api_endpoints import router as restic_backup_router
 # from backup_scheduler import backup_scheduler  # TODO: Install apscheduler in container first
 
-# Traefik management APIs
-from traefik_api import router as traefik_router
-from traefik_routes_api import router as traefik_routes_router
-from traefik_services_api import router as traefik_services_router
-from traefik_ssl_manager import router as traefik_ssl_router
-from traefik_ssl_manager import legacy_router as traefik_ssl_legacy_router
-from traefik_metrics_api import router as traefik_metrics_router
-from traefik_middlewares_api import router as traefik_middlewares_router
-from traefik_live_api import router as traefik_live_router  # NEW: Live data from Docker labels
-
-# Brigade Integration API (H23)
-from brigade_api import router as brigade_router
-
-# Claude Agent SDK Integration
-from routers.claude_agents import router as claude_agents_router
-
-# Lt. Colonel Atlas - AI Infrastructure Assistant (Epic 6.1)
-from atlas.atlas_api import router as atlas_router
-
-# Multi-Server Fleet Management (Epic 15)
-from multi_server_api import router as fleet_router
-
-# Kubernetes Integration (Epic 16)
-from k8s_api import router as k8s_router
-
-# Advanced RBAC (Epic 17)
-from rbac_api import router as rbac_router
-
 # Health Check & Monitoring (Epic 17 HA)
-from health_check_api import router as health_router, init_health_checker
-
-# SOC2 Compliance Reporting (Epic 18)
-from compliance_api import router as compliance_router
-
-# Terraform/IaC Integration (Epic 19)
-from terraform_api import router as terraform_router
-
-# SAML Support (Epic 20)
-from saml_api import router as saml_router
-
-# System Metrics & Analytics (Epic 2.5)
-from system_metrics_api import router as system_metrics_router
-from metrics_collector import MetricsCollector
-
-# White-Label Configuration API
-from white_label_api import router as white_label_router
-
-# Landing Page Settings API
-from landing_page_settings_api import router as landing_settings_router
+from health_check_api import init_health_checker
 
 # Keycloak SSO integration
 try:
@@ -299,9 +103,6 @@ except ImportError:
     print("Keycloak integration not available")
     KEYCLOAK_ENABLED = False
 
-# Two-Factor Authentication Management API (Priority 1 Polish)
-from two_factor_api import router as two_factor_router
-
 # OAuth settings from environment
 EXTERNAL_HOST = os.environ.get("EXTERNAL_HOST", "192.168.1.135")
 EXTERNAL_PROTOCOL = os.environ.get("EXTERNAL_PROTOCOL", "http")
@@ -572,16 +373,10 @@ async def startup_event():
 
     # Initialize LiteLLM credit system (CRITICAL for Brigade integration)
     try:
-        # Create PostgreSQL connection pool
-        db_pool = await asyncpg.create_pool(
-            host=os.getenv('POSTGRES_HOST', 'unicorn-postgresql'),
-            port=int(os.getenv('POSTGRES_PORT', '5432')),
-            user=os.getenv('POSTGRES_USER', 'unicorn'),
-            password=os.getenv('POSTGRES_PASSWORD', 'unicorn'),
-            database=os.getenv('POSTGRES_DB', 'unicorn_db'),
-            min_size=2,
-            max_size=10
-        )
+        # Start the app-wide PostgreSQL pool (db_manager); every module
+        # borrows from it under its own subsystem budget
+        await db_manager.start()
+        db_pool = db_manager.subsystem('core')
         logger.info("PostgreSQL connection pool created")
 
         # Create Redis client
@@ -607,6 +402,18 @@ async def startup_event():
         app.state.byok_manager = byok_manager
         logger.info("BYOK manager initialized successfully")
 
+        # Warm the LLM model catalog; refreshed snapshots are shared via Redis
+        from model_catalog_api import model_catalog
+        model_catalog.start(db_pool, redis_client)
+
+        # Model list responses are invalidated across workers through Redis
+        from model_list_cache import model_list_cache
+        model_list_cache.attach(redis_client)
+
+        # Budget spend is streamed from credit debits; totals shared via Redis
+        from budget_tracker import budget_tracker
+        await budget_tracker.start(db_manager.subsystem('billing'), redis_client)
+
         # Initialize LiteLLM Routing API v2 (Epic 3.1)
         from llm_routing_api_v2 import init_db_pool as init_llm_routing_v2_pool
         await init_llm_routing_v2_pool()
@@ -652,46 +459,12 @@ async def startup_event():
         # init_landing_settings(db_pool, redis_client)
         # logger.info("Landing Page Settings API initialized successfully")
         
-        # Initialize Database Backup Service (scheduled backups)
-        from database_backup_service import get_backup_service
-        backup_service = get_backup_service()
-        # Start scheduled backup task in background
-        asyncio.create_task(backup_service.run_scheduled_backups())
-        logger.info(f"Database Backup Service initialized (interval: {backup_service.auto_backup_interval_hours}h)")
-        
     except Exception as e:
         logger.error(f"Failed to initialize credit system / BYOK / API keys: {e}")
         # Don't block startup, but credit-based features will fail
         app.state.credit_system = None
         app.state.byok_manager = None
 
-    # Start email scheduler (Epic 2.3)
-    try:
-        email_scheduler = EmailScheduler()
-        await email_scheduler.start()
-        logger.info("Email scheduler started successfully")
-    except Exception as e:
-        logger.error(f"Failed to start email scheduler: {e}")
-        # Don't block startup if email fails
-
-    # Start trial expiration scheduler (Epic 5.0 Phase 4)
-    try:
-        from trial_scheduler import trial_scheduler
-        await trial_scheduler.start()
-        logger.info("Trial expiration scheduler started successfully")
-    except Exception as e:
-        logger.error(f"Failed to start trial scheduler: {e}")
-        # Don't block startup if trial scheduler fails
-
-    # Start dunning scheduler (Epic 6.0 Phase 4)
-    try:
-        from dunning_scheduler import dunning_scheduler
-        await dunning_scheduler.start()
-        logger.info("Dunning scheduler started successfully")
-    except Exception as e:
-        logger.error(f"Failed to start dunning scheduler: {e}")
-        # Don't block startup if dunning scheduler fails
-
     # Start backup scheduler (TODO: Install apscheduler in container first)
     # try:
     #     backup_scheduler.start()
@@ -699,80 +472,101 @@ async def startup_event():
     # except Exception as e:
     #     logger.error(f"Failed to start backup scheduler: {e}")
 
-    # Start metrics collector (Epic 2.5)
+    # Start host telemetry sampler (shared by health, alerts and metrics)
     try:
-        metrics_collector = MetricsCollector()
-        asyncio.create_task(metrics_collector.start())
-        logger.info("Metrics collector started successfully")
+        from host_telemetry import host_telemetry
+        host_telemetry.start()
     except Exception as e:
-        logger.error(f"Failed to start metrics collector: {e}")
-        # Don't block startup if metrics collection fails
+        logger.error(f"Failed to start host telemetry sampler: {e}")
 
-    # Start alert checker (Epic 2.5)
+    # Start shared Docker state cache (container inventory + stats)
     try:
-        from alert_manager import alert_manager
-        asyncio.create_task(check_alerts_periodically())
-        logger.info("Alert checker started successfully")
+        from docker_engine import docker_state
+        await docker_state.start()
+        logger.info("Docker state cache started successfully")
     except Exception as e:
-        logger.error(f"Failed to start alert checker: {e}")
-        # Don't block startup if alert checking fails
+        logger.error(f"Failed to start Docker state cache: {e}")
 
-    # Start Fleet Management workers (Epic 15)
+    # Start container log ingestor for indexed log search
+    if os.getenv("LOG_INGEST_ENABLED", "true").lower() == "true":
+        try:
+            from log_store import log_ingestor
+            await log_ingestor.start()
+            logger.info("Log ingestor started successfully")
+        except Exception as e:
+            logger.error(f"Failed to start log ingestor: {e}")
+            # Log search falls back to docker logs if the ingestor is down
+
+    # Start database-backed ingest and rollup services
     if hasattr(app.state, 'db_pool') and app.state.db_pool:
+        # Start edge device heartbeat ingest (Epic 7.1)
         try:
-            from fleet_health_worker import start_health_worker
-            from fleet_metrics_worker import start_metrics_worker
-            
-            # Start health check worker (30s interval)
-            await start_health_worker(app.state.db_pool, interval=30)
-            logger.info("🏥 Fleet health worker started (30s interval)")
+            from edge_heartbeat_ingest import heartbeat_ingestor
             
-            # Start metrics collection worker (60s interval)
-            await start_metrics_worker(app.state.db_pool, interval=60)
-            logger.info("📊 Fleet metrics worker started (60s interval)")
+            await heartbeat_ingestor.start(db_manager.subsystem('fleet'))
         except Exception as e:
-            logger.error(f"Failed to start fleet workers: {e}")
-            # Don't block startup if fleet workers fail
+            logger.error(f"Failed to start edge heartbeat ingest: {e}")
+            # Started lazily on the first heartbeat instead
         
-        # Start Kubernetes workers (Epic 16)
+        # Start cross-tenant analytics rollups
         try:
-            from k8s_sync_worker import start_k8s_sync_worker
-            from k8s_cost_calculator import start_k8s_cost_calculator
+            from tenant_rollups import tenant_rollups
             
-            # Start K8s sync worker (30s interval)
-            await start_k8s_sync_worker(app.state.db_pool, interval=30)
-            logger.info("☸️  K8s sync worker started (30s interval)")
-            
-            # Start cost calculator (1 hour interval)
-            await start_k8s_cost_calculator(app.state.db_pool, interval=3600)
-            logger.info("💰 K8s cost calculator started (1h interval)")
+            await tenant_rollups.start(db_manager.subsystem('analytics'))
         except Exception as e:
-            logger.error(f"Failed to start K8s workers: {e}")
-            # Don't block startup if K8s workers fail
-
-
-async def check_alerts_periodically():
-    """
-    Background task that checks for system alerts every 60 seconds.
-    Epic 2.5: Admin Dashboard Polish - Analytics Lead
-    """
-    from alert_manager import alert_manager
-
-    while True:
+            logger.error(f"Failed to start tenant analytics rollups: {e}")
+            # Started lazily by the analytics endpoints instead
+        
+        # Start incremental cost cube rollups (Epic 14)
         try:
-            await alert_manager.check_alerts()
-            await asyncio.sleep(60)
-        except asyncio.CancelledError:
-            logger.info("Alert checker stopped")
-            break
+            from cost_cubes import cost_cubes
+            
+            await cost_cubes.start(db_manager.subsystem('analytics'))
         except Exception as e:
-            logger.error(f"Alert check error: {e}")
-            await asyncio.sleep(60)
+            logger.error(f"Failed to start cost cube rollups: {e}")
+        
+    # Start background jobs (email/trial/dunning schedulers, backups, host
+    # monitoring, fleet and K8s workers). Every job is leased, so it runs in
+    # one process however many API workers there are; with
+    # JOB_RUNNER_MODE=off they run in `ops-center worker` processes instead.
+    try:
+        from job_runner import job_runner, JOB_RUNNER_MODE
+        from background_jobs import register_jobs
+        
+        jobs_pool = db_manager.subsystem('jobs') if getattr(app.state, 'db_pool', None) else None
+        job_runner.configure(jobs_pool, getattr(app.state, 'redis_client', None))
+        if JOB_RUNNER_MODE == 'embedded':
+            register_jobs(job_runner)
+            await job_runner.start()
+        else:
+            logger.info("Background jobs run in separate worker processes (JOB_RUNNER_MODE=off)")
+    except Exception as e:
+        logger.error(f"Failed to start background jobs: {e}")
+
 
 # Shutdown event handler
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown"""
+    try:
+        from log_store import log_ingestor
+        if log_ingestor.running:
+            await log_ingestor.stop()
+    except Exception as e:
+        logger.error(f"Error stopping log ingestor: {e}")
+
+    try:
+        from docker_engine import docker_state
+        await docker_state.stop()
+    except Exception as e:
+        logger.error(f"Error stopping Docker state cache: {e}")
+
+    try:
+        from host_telemetry import host_telemetry
+        host_telemetry.stop()
+    except Exception as e:
+        logger.error(f"Error stopping host telemetry sampler: {e}")
+
     if RATE_LIMIT_ENABLED:
         try:
             await rate_limiter.close()
@@ -788,32 +582,67 @@ async def shutdown_event():
     except Exception as e:
         logger.error(f"Error closing LiteLLM Routing v2 pool: {e}")
 
+    # Stop background jobs (schedulers, fleet/K8s workers) while the pools are open
+    try:
+        from job_runner import job_runner
+        await job_runner.stop()
+    except Exception as e:
+        logger.error(f"Error stopping background jobs: {e}")
+
     # Close credit system connections
     if hasattr(app.state, 'db_pool') and app.state.db_pool:
+        # Flush buffered edge device heartbeats (Epic 7.1)
         try:
-            # Stop fleet workers (Epic 15)
-            from fleet_health_worker import stop_health_worker
-            from fleet_metrics_worker import stop_metrics_worker
+            from edge_heartbeat_ingest import heartbeat_ingestor
             
-            await stop_health_worker()
-            await stop_metrics_worker()
-            logger.info("Fleet workers stopped")
+            await heartbeat_ingestor.stop()
         except Exception as e:
-            logger.error(f"Error stopping fleet workers: {e}")
+            logger.error(f"Error stopping edge heartbeat ingest: {e}")
         
-        # Stop K8s workers (Epic 16)
         try:
-            from k8s_sync_worker import stop_k8s_sync_worker
-            from k8s_cost_calculator import stop_k8s_cost_calculator
+            from tenant_rollups import tenant_rollups
             
-            await stop_k8s_sync_worker()
-            await stop_k8s_cost_calculator()
-            logger.info("K8s workers stopped")
+            await tenant_rollups.stop()
         except Exception as e:
-            logger.error(f"Error stopping K8s workers: {e}")
+            logger.error(f"Error stopping tenant analytics rollups: {e}")
         
         try:
-            await app.state.db_pool.close()
+            from cost_cubes import cost_cubes
+            
+            await cost_cubes.stop()
+        except Exception as e:
+            logger.error(f"Error stopping cost cube rollups: {e}")
+        
+        try:
+            from budget_tracker import budget_tracker
+            
+            await budget_tracker.stop()
+        except Exception as e:
+            logger.error(f"Error stopping budget tracker: {e}")
+        
+        try:
+            from usage_log_aggregator import usage_log_aggregator
+            
+            await usage_log_aggregator.stop()
+        except Exception as e:
+            logger.error(f"Error stopping usage log aggregation: {e}")
+        
+        try:
+            from churn_feature_store import churn_feature_store
+            
+            await churn_feature_store.stop()
+        except Exception as e:
+            logger.error(f"Error stopping churn feature store: {e}")
+        
+        try:
+            from model_catalog_api import model_catalog
+            
+            await model_catalog.stop()
+        except Exception as e:
+            logger.error(f"Error stopping model catalog: {e}")
+        
+        try:
+            await db_manager.close()
             logger.info("PostgreSQL connection pool closed")
         except Exception as e:
             logger.error(f"Error closing database pool: {e}")
@@ -832,451 +661,14 @@ async def shutdown_event():
     # except Exception as e:
     #     logger.error(f"Error stopping backup scheduler: {e}")
 
-# Register Model Access Control FIRST - Epic 3.3 (HIGH PRIORITY)
-app.include_router(model_access_router)
-logger.info("⭐ Model Access Control API registered at /api/v1/models (PRIORITY ROUTE)")
-
-# Register Public API endpoints (Epic 5.0 - E-commerce)
-app.include_router(public_api_router)
-logger.info("Public API endpoints registered at /api/v1/public (no auth required)")
-
-# Register Public Checkout API (Epic 5.0 - Self-Service Checkout)
-app.include_router(public_checkout_router)
-logger.info("Public Checkout API registered at /api/v1/checkout (Stripe integration)")
-
-# Register My Subscription API (Epic 5.0 - Subscription Management)
-app.include_router(my_subscription_router)
-logger.info("My Subscription API registered at /api/v1/my-subscription (authenticated)")
-
-app.include_router(trial_router)
-logger.info("Trial Management API registered at /api/v1/admin/trials (admin only)")
-
-app.include_router(public_signup_router)
-logger.info("Public Signup API registered at /api/v1/public/signup")
-
-app.include_router(invoice_router)
-logger.info("Invoice API registered at /api/v1/invoices (authenticated)")
-
-# Epic 7.0: API Key & Usage Management
-try:
-    from api_key_usage_endpoints import router as api_keys_router, usage_router as usage_dashboard_router
-    app.include_router(api_keys_router)
-    app.include_router(usage_dashboard_router)
-    logger.info("✅ Epic 7.0: API Keys registered at /api/v1/keys")
-    logger.info("✅ Epic 7.0: Usage Dashboard registered at /api/v1/usage")
-except Exception as e:
-    logger.error(f"❌ Failed to load Epic 7.0 endpoints: {e}")
-
-# Register audit logs router
-if AUDIT_ENABLED:
-    app.include_router(audit_router)
-    logger.info("Audit logs API endpoints registered at /api/v1/audit")
-
-# Register BYOK router
-app.include_router(byok_router)
-
-# Pass sessions store to BYOK router for authentication
-from byok_api import set_sessions_store
-set_sessions_store(sessions)
-logger.info("BYOK API endpoints registered at /api/v1/keys")
-
-# Register Lago webhooks router
-app.include_router(lago_webhook_router)
-logger.info("Lago webhooks registered at /api/v1/webhooks/lago")
-
-# Register Stripe webhooks router (Epic 2.4)
-app.include_router(stripe_webhooks_router)
-logger.info("Stripe webhooks registered at /api/v1/webhooks/stripe/*")
-
-# Register usage tracking API (always enabled for tier info)
-app.include_router(usage_router)
-logger.info("Usage tracking API endpoints registered at /api/v1/usage")
-
-# Register admin subscription management router
-app.include_router(admin_subscriptions_router)
-logger.info("Admin subscription management registered at /api/v1/admin/subscriptions")
-
-# Note: Admin apps management is handled by app_definitions_api (registered below)
-
-# Register tier check ForwardAuth router (for Traefik middleware)
-app.include_router(tier_check_router)
-logger.info("Tier check ForwardAuth endpoints registered at /api/v1/tier-check")
-
-# Register user-facing subscription management router
-app.include_router(subscription_router)
-logger.info("Subscription management API endpoints registered at /api/v1/subscriptions")
-
-# Register subscription change management (upgrade/downgrade/cancel)
-app.include_router(subscription_management_router)
-logger.info("Subscription change management endpoints registered at /api/v1/subscriptions (upgrade/downgrade/cancel)")
-
-# Register Stripe payment integration router
-app.include_router(stripe_router)
-logger.info("Stripe payment API endpoints registered at /api/v1/billing")
-
-# Register Lago billing/invoice endpoints
-app.include_router(billing_router)
-logger.info("Lago billing/invoice API endpoints registered at /api/v1/billing")
-
-# Register payment methods management
-app.include_router(payment_methods_router)
-logger.info("Payment methods API endpoints registered at /api/v1/payment-methods")
-
-# Extensions Marketplace API - Phase 1 MVP (NEW)
-# NOTE: Purchase & Admin routers registered BEFORE catalog to avoid /{addon_id} catching specific routes
-app.include_router(extensions_purchase_router)
-logger.info("Extensions Purchase API endpoints registered at /api/v1/extensions/checkout, /api/v1/extensions/purchases")
-app.include_router(extensions_admin_api_router)
-logger.info("Extensions Admin API endpoints registered at /api/v1/admin/extensions")
-app.include_router(extensions_cart_router)
-logger.info("Extensions Cart API endpoints registered at /api/v1/cart")
-app.include_router(extensions_catalog_router)
-logger.info("Extensions Catalog API endpoints registered at /api/v1/extensions (includes /{addon_id})")
-
-# My Apps API - Tier-filtered apps for authenticated users
-app.include_router(my_apps_router)
-logger.info("My Apps API endpoints registered at /api/v1/my-apps (RBAC-filtered)")
-
-# Advanced Log Search API (Epic 2.5)
-app.include_router(logs_search_router)
-logger.info("Advanced Log Search API endpoints registered at /api/v1/logs/search/advanced, /api/v1/logs/services, /api/v1/logs/stats")
-
-# Database Backup API
-app.include_router(backup_router)
-logger.info("Database Backup API endpoints registered at /api/backups")
-
-# Center-Deep Search API
-try:
-    from centerdeep_api import router as centerdeep_search_router
-    app.include_router(centerdeep_search_router)
-    logger.info("🔍 Center-Deep Search API registered at /api/v1/search")
-except Exception as e:
-    logger.warning(f"Center-Deep Search API not loaded: {e}")
-
-# Epic 1.8: Credit & Usage Metering System
-app.include_router(credit_router)
-logger.info("Credit & Usage Metering API endpoints registered at /api/v1/credits")
-
-## Credit Purchase System (One-time purchases via Stripe)
-app.include_router(credit_purchase_router)
-logger.info("Credit Purchase API endpoints registered at /api/v1/billing/credits")
-
-# Cost Optimization Dashboard
-app.include_router(cost_optimization_router)
-logger.info("Cost Optimization API endpoints registered at /api/v1/costs")
-
-# Register Local User Management endpoints
-app.include_router(local_user_router)
-logger.info("Local User Management API endpoints registered at /api/v1/local-users")
-
-# Register Organization Management endpoints
-app.include_router(org_router)
-logger.info("Organization Management API endpoints registered at /api/v1/org")
-
-# Register Organization Billing endpoints
-app.include_router(org_billing_router)
-logger.info("Organization Billing API endpoints registered at /api/v1/org-billing")
-
-# Register Firewall Management endpoints
-app.include_router(firewall_router)
-logger.info("Firewall Management API endpoints registered at /api/v1/network/firewall")
-
-# Register Cloudflare DNS API endpoints
-app.include_router(cloudflare_router)
-logger.info("Cloudflare DNS API endpoints registered at /api/v1/cloudflare")
-
-# Epic 1.7: NameCheap Migration Wizard
-app.include_router(migration_router)
-logger.info("Migration API endpoints registered at /api/v1/migration")
-
-# Epic 1.6/1.7: Service Credential Management
-app.include_router(credential_router)
-logger.info("Credential management API endpoints registered at /api/v1/credentials")
-
-# Invite Code System (Admin & User)
-app.include_router(invite_codes_admin_router)
-logger.info("Invite Codes Admin API endpoints registered at /api/v1/admin/invite-codes")
-app.include_router(invite_codes_user_router)
-logger.info("Invite Codes User API endpoints registered at /api/v1/invite-codes")
-
-# Edge Device Management (Epic 7.1)
-app.include_router(edge_device_router)
-logger.info("Edge Device API endpoints registered at /api/v1/edge/devices")
-app.include_router(edge_admin_router)
-logger.info("Edge Device Admin API endpoints registered at /api/v1/admin/edge")
-
-# OTA Update Management (Epic 7.2)
-app.include_router(ota_device_router)
-logger.info("OTA Device API endpoints registered at /api/v1/ota")
-app.include_router(ota_admin_router)
-logger.info("OTA Admin API endpoints registered at /api/v1/admin/ota")
-
-# Webhook System (Epic 8.1)
-app.include_router(webhook_router)
-logger.info("Webhook API endpoints registered at /api/v1/webhooks")
-
-# Multi-Tenant Management (Epic 10)
-app.include_router(tenant_management_router)
-logger.info("Tenant Management API endpoints registered at /api/v1/admin/tenants")
-app.include_router(cross_tenant_analytics_router)
-logger.info("Cross-Tenant Analytics API endpoints registered at /api/v1/admin/analytics")
-
-# Keycloak Status API
-app.include_router(keycloak_status_router)
-logger.info("Keycloak status API endpoints registered at /api/v1/system/keycloak")
-
-# User Management API (Keycloak users)
-app.include_router(user_management_router)
-logger.info("User Management API endpoints registered at /api/v1/admin/users")
-
-# Account & System Management API (Missing endpoints fix - November 2025)
-app.include_router(account_management_router)
-logger.info("Account & System Management API endpoints registered")
-
-# Avatar Storage API (November 2025 - CORS fix for bolt.diy)
-app.include_router(avatar_storage_router)
-logger.info("Avatar storage API endpoints registered at /api/v1/users/{user_id}/avatar")
-
-# Subscription Tier Management API (Epic 4.4)
-app.include_router(subscription_tiers_router)
-logger.info("Subscription Tier Management API endpoints registered at /api/v1/admin/tiers")
-
-# Organization Branding API (Epic 4.5)
-app.include_router(organization_branding_router)
-logger.info("Organization Branding API endpoints registered at /api/v1/organizations/{org_id}/branding")
-
-# Tier Features Association API
-app.include_router(tier_features_router)
-logger.info("Tier Features API endpoints registered at /api/v1/tiers/features")
-
-# App Definitions Management API
-app.include_router(app_definitions_router)
-logger.info("App Definitions API endpoints registered at /api/v1/admin/apps")
-
-# LiteLLM Routing and Provider Management API
-app.include_router(admin_local_users_router)
-logger.info("Admin Local User Management API endpoints registered at /api/v1/admin/system/local-users")
-app.include_router(litellm_routing_router)
-logger.info("LiteLLM routing API endpoints registered at /api/v1/llm")
-app.include_router(litellm_routing_router_v2)
-logger.info("LiteLLM routing API v2 (Epic 3.1) endpoints registered at /api/v2/llm")
-
-# Forgejo integration
-app.include_router(forgejo_router)
-logger.info("Forgejo API endpoints registered at /api/v1/forgejo")
-
-# Model List Management API
-app.include_router(model_list_admin_router)
-app.include_router(model_list_user_router)
-app.include_router(model_list_public_router)
-logger.info("Model List Management API endpoints registered")
-
-# Register LiteLLM API router
-app.include_router(litellm_api_router)
-
-# Pass sessions store to LiteLLM router for session-based authentication
-from litellm_api import set_sessions_store as litellm_set_sessions_store
-litellm_set_sessions_store(sessions)
-logger.info("LiteLLM chat completions API endpoints registered at /api/v1/llm (chat/completions, credits, BYOK)")
-app.include_router(model_catalog_router)
-logger.info("Model Catalog API endpoints registered at /api/v1/llm (models, providers)")
-# model_access_router already registered earlier (line ~547) - REMOVED DUPLICATE
-app.include_router(provider_keys_router)
-logger.info("Provider Keys API endpoints registered at /api/v1/llm/providers (keys management)")
-app.include_router(testing_lab_router)
-logger.info("Testing Lab API endpoints registered at /api/v1/llm/test (interactive testing)")
-
-# UC API Keys & Platform Keys Management (November 2025)
-app.include_router(uc_api_keys_router)
-logger.info("UC API Keys endpoints registered at /api/v1/account/uc-api-keys")
-app.include_router(platform_keys_router)
-logger.info("Platform Keys Management endpoints registered at /api/v1/admin/platform-keys (Admin only)")
-
-# Platform Settings API
-app.include_router(platform_settings_router)
-logger.info("Platform Settings API endpoints registered at /api/v1/platform")
-
-# Traefik Configuration Management APIs (Epic 1.3)
-app.include_router(traefik_router)
-logger.info("Traefik Comprehensive API endpoints registered at /api/v1/traefik (Epic 1.3)")
-
-# Traefik Live Data API (NEW - reads real Docker labels)
-app.include_router(traefik_live_router)
-logger.info("Traefik Live Data API endpoints registered at /api/v1/traefik/live")
-
-# Legacy Traefik APIs (keep for backward compatibility)
-app.include_router(traefik_routes_router)
-logger.info("Traefik Routes API endpoints registered at /api/v1/traefik/routes")
-app.include_router(traefik_services_router)
-logger.info("Traefik Services API endpoints registered at /api/v1/traefik/services")
-app.include_router(traefik_ssl_router)
-app.include_router(traefik_ssl_legacy_router)
-logger.info("Traefik SSL Management API endpoints registered at /api/v1/traefik/ssl")
-app.include_router(traefik_metrics_router)
-logger.info("Traefik Metrics API endpoints registered at /api/v1/traefik/metrics")
-app.include_router(traefik_middlewares_router)
-logger.info("Traefik Middlewares API endpoints registered at /api/v1/traefik/middlewares")
-
-# Brigade Integration API (H23)
-app.include_router(brigade_router)
-logger.info("Brigade Proxy API endpoints registered at /api/v1/brigade (H23)")
-
-# Claude Agent SDK Integration
-app.include_router(claude_agents_router)
-logger.info("🤖 Claude Agent SDK API registered at /api/v1/claude-agents")
-
-# Lt. Colonel Atlas - AI Infrastructure Assistant (Epic 6.1)
-app.include_router(atlas_router)
-logger.info("🎖️  Lt. Colonel Atlas AI Assistant registered at /api/v1/atlas (Epic 6.1)")
-
-# Multi-Server Fleet Management (Epic 15)
-app.include_router(fleet_router)
-logger.info("🚢 Fleet Management API registered at /api/v1/fleet (Epic 15)")
-
-# Kubernetes Integration (Epic 16)
-app.include_router(k8s_router)
-logger.info("☸️  Kubernetes API registered at /api/v1/k8s (Epic 16)")
-
-# Advanced RBAC (Epic 17)
-app.include_router(rbac_router)
-logger.info("🔐 Advanced RBAC API registered at /api/v1/rbac (Epic 17)")
+# Register the API routers (router_registry.ROUTER_MANIFEST, in priority order).
+# Most are imported on the first request under their prefix; see
+# GET /api/v1/health/routers for import time and RSS per router.
+router_registry.mount(app)
 
-# Health Check & Monitoring (Epic 17 HA)
-app.include_router(health_router)
-logger.info("💚 Health Check API registered at /api/v1/health (Epic 17 HA)")
-
-# SOC2 Compliance Reporting (Epic 18)
-app.include_router(compliance_router)
-logger.info("📋 SOC2 Compliance API registered at /api/v1/compliance (Epic 18)")
-
-# Terraform/IaC Integration (Epic 19)
-app.include_router(terraform_router)
-logger.info("🏗️  Terraform/IaC API registered at /api/v1/terraform (Epic 19)")
-
-# SAML Support (Epic 20)
-app.include_router(saml_router)
-logger.info("🔐 SAML SSO API registered at /api/v1/saml (Epic 20)")
-
-# Storage & Backup Management
-app.include_router(storage_backup_router)
-logger.info("Storage & Backup API endpoints registered at /api/v1/storage and /api/v1/backups")
-app.include_router(restic_backup_router)
-logger.info("Restic Backup API endpoints registered at /api/v1/backups/restic")
-
-# Email Notification API (Epic 2.3)
-app.include_router(notification_router)
-logger.info("Email Notification API endpoints registered at /api/v1/notifications")
-
-# Two-Factor Authentication Management API (Priority 1 Polish)
-app.include_router(two_factor_router)
-logger.info("Two-Factor Authentication API endpoints registered at /api/v1/admin/2fa")
-
-# Email Provider Management API
-app.include_router(email_provider_router)
-logger.info("Email Provider API endpoints registered at /api/v1/email-provider")
-
-# Email Alert System (Epic 2.5 - Agent 2)
-app.include_router(email_alerts_router)
-logger.info("Email Alert System API endpoints registered at /api/v1/alerts")
-
-# Alert Trigger System (Epic 2.5 - Agent 3)
-app.include_router(alert_triggers_router)
-logger.info("Alert Trigger System API endpoints registered at /api/v1/alert-triggers")
-
-# System Metrics API (Epic 2.5 - Admin Dashboard Polish)
-app.include_router(system_metrics_router)
-# Grafana API
-app.include_router(grafana_router)
-logger.info("Grafana API endpoints registered at /api/v1/monitoring/grafana")
-logger.info("System Metrics API endpoints registered at /api/v1/system")
-
-# Umami Analytics API (Epic 2.5 - Monitoring)
-app.include_router(umami_router)
-logger.info("Umami Analytics API endpoints registered at /api/v1/monitoring/umami")
-
-# Prometheus Monitoring API (Epic 3.1)
-app.include_router(prometheus_router)
-logger.info("Prometheus Monitoring API endpoints registered at /api/v1/monitoring/prometheus")
-
-# Supplementary Analytics & Metering (November 2025) - REGISTERED FIRST for priority
-# Priority registration ensures mock data endpoints override old database-dependent endpoints
-app.include_router(analytics_revenue_router)
-app.include_router(analytics_users_router)  # PRIORITY: Mock endpoints (cohorts, growth) override old DB endpoints
-app.include_router(analytics_services_router)
-app.include_router(analytics_metrics_router)
-app.include_router(analytics_performance_router)
-app.include_router(analytics_main_router)
-app.include_router(metering_router)
-logger.info("Supplementary Analytics endpoints registered (PRIORITY - mock data):")
-logger.info("  - Revenue: /api/v1/analytics/revenue/* (mrr, arr, growth, churn, forecast, by-tier)")
-logger.info("  - Users: /api/v1/analytics/users/* (ltv, churn, acquisition, cohorts, growth)")
-logger.info("  - Services: /api/v1/analytics/services/* (popularity, cost-per-user, adoption, performance, uptime, latency, errors)")
-logger.info("  - Metrics: /api/v1/analytics/metrics/* (summary, kpis, alerts)")
-logger.info("  - Performance: /api/v1/analytics/performance/* (metrics)")
-logger.info("  - Main: /api/v1/analytics/summary")
-logger.info("Metering endpoints registered (/api/v1/llm/usage/summary, /api/v1/llm/costs, /api/v1/metering/*)")
-
-# Revenue Analytics API (Epic 2.6)
-app.include_router(revenue_analytics_router)
-logger.info("Revenue Analytics API endpoints registered at /api/v1/analytics/revenue")
-
-# User Analytics API (Epic 2.6) - AFTER new router (non-conflicting endpoints only)
-app.include_router(user_analytics_router)
-logger.info("User Analytics API endpoints registered at /api/v1/analytics/users (non-conflicting only)")
-
-# Usage Analytics API (Epic 2.6)
-app.include_router(usage_analytics_router)
-logger.info("Usage Analytics API endpoints registered at /api/v1/analytics/usage")
-
-# Model Management API (Sprint 6-7) - TEMPORARILY DISABLED for Epic 3.3 testing
-# CONFLICT: Both model_management_router and model_access_router use /api/v1/models prefix
-# model_management_router has root route "/" which may interfere with model_access_router
-# TODO: After Epic 3.3 works, either change prefix or merge routers
-# app.include_router(model_management_router)
-# logger.info("Model Management API endpoints registered at /api/v1/models")
-
-# Permissions Management API (Sprint 6-7)
-app.include_router(permissions_management_router)
-logger.info("Permissions Management API endpoints registered at /api/v1/permissions")
-
-# LLM Usage API (Sprint 6-7)
-app.include_router(llm_usage_router)
-logger.info("LLM Usage API endpoints registered at /api/v1/llm/usage")
-
-# LLM Provider Settings API (Sprint 6-7)
-app.include_router(llm_provider_settings_router)
-logger.info("LLM Provider Settings API endpoints registered at /api/v1/llm/providers")
-
-# Traefik Services Detail API (Sprint 6-7)
-app.include_router(traefik_services_detail_router)
-logger.info("Traefik Services Detail API endpoints registered at /api/v1/traefik/services")
-
-# API Documentation (Epic 2.8)
-app.include_router(api_docs_router)
-logger.info("API Documentation endpoints registered at /api/v1/docs (Epic 2.8)")
-logger.info("API Documentation endpoints registered at /api/v1/docs (Epic 2.8)")
-
-# API Documentation (Epic 2.8)
-app.include_router(api_docs_router)
-logger.info("API Documentation endpoints registered at /api/v1/docs (Epic 2.8)")
-logger.info("API Documentation endpoints registered at /api/v1/docs")
-
-# White-Label Configuration API
-app.include_router(white_label_router)
-logger.info("White-Label Configuration API endpoints registered at /api/v1/admin/white-label")
-
-# Landing Page Settings API
-app.include_router(landing_settings_router)
-logger.info("Landing Page Settings API endpoints registered at /api/v1/system/settings (public) and /api/v1/admin/settings (admin)")
-
-# Dynamic Pricing Management API
-from dynamic_pricing_api import router as dynamic_pricing_router
-app.include_router(dynamic_pricing_router)
-
-# Pricing Packages API (public pricing information)
-from pricing_packages_api import router as pricing_packages_router
-app.include_router(pricing_packages_router)
-logger.info("Dynamic Pricing Management API endpoints registered at /api/v1/pricing")
+# Pass sessions store to the BYOK and LiteLLM routers for session-based authentication
+router_registry.on_load('byok', lambda module: module.set_sessions_store(sessions))
+router_registry.on_load('litellm', lambda module: module.set_sessions_store(sessions))
 
 # CSRF Token Endpoint removed - see line 2897 for the full implementation that handles unauthenticated users
 
@@ -1440,13 +832,6 @@ async def root_redirect(request: Request):
     # Fallback if no HTML found
     raise HTTPException(status_code=404, detail="Frontend not found")
 
-# Initialize Docker client
-try:
-    docker_client = docker.from_env()
-except Exception as e:
-    print(f"Warning: Docker client initialization failed: {e}")
-    docker_client = None
-
 # Model registry storage
 MODEL_REGISTRY_PATH = "/home/ucadmin/UC-1-Pro/volumes/model_registry.json"
 MODELS_DIR = os.environ.get("MODELS_DIR", "/home/ucadmin/UC-1-Pro/volumes/vllm_models")
@@ -2449,7 +1834,6 @@ async def get_hardware_history(hours: int = 1, current_user: dict = Depends(get_
         hours: Number of hours of history to retrieve (1, 6, or 24)
     """
     try:
-        import psutil
         from datetime import datetime, timedelta
         
         # For now, generate sample historical data
@@ -2462,9 +1846,11 @@ async def get_hardware_history(hours: int = 1, current_user: dict = Depends(get_
         
         # Get current stats as baseline
         hw_info = hardware_detector.get_all_hardware_info()
-        cpu_percent = psutil.cpu_percent(interval=0.1)
-        mem = psutil.virtual_memory()
-        disk = psutil.disk_usage('/')
+        from host_telemetry import host_telemetry
+        sample = host_telemetry.latest()
+        cpu_percent = sample.cpu_percent
+        mem = sample.memory
+        disk = sample.disk
         
         # Generate historical data points
         for i in range(num_points):
@@ -3151,6 +2537,49 @@ async def delete_model(
     
     raise HTTPException(status_code=404, detail="Model not found")
 
+def _switch_vllm_model(model_id: str) -> bool:
+    """Recreate the vLLM container with MODEL=model_id; False if Docker is unavailable"""
+    try:
+        docker_client = docker.from_env()
+    except Exception as e:
+        print(f"Warning: Docker client initialization failed: {e}")
+        return False
+    
+    try:
+        # Get vLLM container
+        vllm_container = docker_client.containers.get("unicorn-vllm")
+        
+        # Update environment variable
+        env_vars = vllm_container.attrs['Config']['Env']
+        new_env = []
+        
+        for env in env_vars:
+            if not env.startswith("MODEL="):
+                new_env.append(env)
+        
+        new_env.append(f"MODEL={model_id}")
+        
+        # Restart container with new model
+        vllm_container.stop()
+        vllm_container.remove()
+        
+        # Get original run config
+        config = vllm_container.attrs
+        
+        # Start new container with updated model
+        docker_client.containers.run(
+            image=config['Config']['Image'],
+            name="unicorn-vllm",
+            environment=new_env,
+            ports={"8000/tcp": 8000},
+            volumes=config['Mounts'],
+            detach=True,
+            restart_policy={"Name": "unless-stopped"}
+        )
+        return True
+    finally:
+        docker_client.close()
+
 @app.post("/api/v1/models/active")
 async def set_active_model(
     request: ActiveModel,
@@ -3169,44 +2598,14 @@ async def set_active_model(
     model_registry["active_model"] = model_id
     save_model_registry(model_registry)
     
-    # Update vLLM configuration
-    if docker_client:
-        try:
-            # Get vLLM container
-            vllm_container = docker_client.containers.get("unicorn-vllm")
-            
-            # Update environment variable
-            env_vars = vllm_container.attrs['Config']['Env']
-            new_env = []
-            
-            for env in env_vars:
-                if not env.startswith("MODEL="):
-                    new_env.append(env)
-            
-            new_env.append(f"MODEL={model_id}")
-            
-            # Restart container with new model
-            vllm_container.stop()
-            vllm_container.remove()
-            
-            # Get original run config
-            config = vllm_container.attrs
-            
-            # Start new container with updated model
-            docker_client.containers.run(
-                image=config['Config']['Image'],
-                name="unicorn-vllm",
-                environment=new_env,
-                ports={"8000/tcp": 8000},
-                volumes=config['Mounts'],
-                detach=True,
-                restart_policy={"Name": "unless-stopped"}
-            )
-            
-            return {"status": "activated", "model_id": model_id}
-        
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Failed to switch model: {str(e)}")
+    # Update vLLM configuration (docker-py blocks, so run it off the event loop)
+    try:
+        switched = await asyncio.to_thread(_switch_vllm_model, model_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to switch model: {str(e)}")
+    
+    if switched:
+        return {"status": "activated", "model_id": model_id}
     
     return {"status": "activated", "model_id": model_id, "note": "Docker not available, model marked as active"}
 
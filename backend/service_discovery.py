@@ -26,10 +26,12 @@ Environment Variables:
 
 import os
 import logging
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 import docker
 from docker.errors import DockerException
 
+from docker_engine import docker_state, ContainerInfo
+
 logger = logging.getLogger(__name__)
 
 
@@ -93,6 +95,14 @@ class ServiceDiscovery:
             logger.warning(f"Docker client unavailable: {e}. Using environment/defaults only.")
             self.docker_client = None
 
+    def _list_running_containers(self) -> List[ContainerInfo]:
+        """Running containers, from the shared Docker state cache when it is up"""
+        if docker_state.ready:
+            return docker_state.containers(all=False)
+        if not self.docker_client:
+            return []
+        return [ContainerInfo.from_inspect(c.attrs) for c in self.docker_client.containers.list()]
+
     def _get_from_env(self, service: str) -> Optional[str]:
         """Get service URL from environment variable."""
         env_map = {
@@ -121,7 +131,7 @@ class ServiceDiscovery:
         Looks for running containers matching service name patterns
         and extracts their network addresses and ports.
         """
-        if not self.docker_client:
+        if not self.docker_client and not docker_state.ready:
             return None
 
         container_patterns = {
@@ -143,20 +153,20 @@ class ServiceDiscovery:
         patterns = container_patterns.get(service, [service])
 
         try:
-            containers = self.docker_client.containers.list()
+            containers = self._list_running_containers()
             for container in containers:
                 container_name = container.name.lower()
 
                 # Check if container matches any pattern
                 if any(pattern.lower() in container_name for pattern in patterns):
                     # Get first network
-                    networks = container.attrs.get('NetworkSettings', {}).get('Networks', {})
+                    networks = container.networks
                     if networks:
                         network_name = list(networks.keys())[0]
                         ip_address = networks[network_name].get('IPAddress')
 
                         # Get exposed ports
-                        ports = container.attrs.get('NetworkSettings', {}).get('Ports', {})
+                        ports = container.ports
                         if ports:
                             # Get first exposed port
                             for port_spec, bindings in ports.items():
@@ -294,14 +304,14 @@ class ServiceDiscovery:
         Returns:
             True if service is reachable, False otherwise
         """
-        if not self.docker_client:
+        if not self.docker_client and not docker_state.ready:
             return False
 
         try:
-            containers = self.docker_client.containers.list()
+            containers = self._list_running_containers()
             for container in containers:
                 if service in container.name.lower():
-                    return container.status == 'running'
+                    return container.running
         except DockerException as e:
             logger.error(f"Error checking service health: {e}")
 
@@ -258,6 +258,21 @@ async def mark_false_positive(
     return {"message": "Anomaly marked as false positive"}
 
 
+@router.post("/alerts/{alert_id}/resolve")
+async def resolve_alert(
+    alert_id: UUID,
+    current_user: dict = Depends(get_current_user),
+    db_pool = Depends(get_db_pool)
+):
+    """Resolve an open alert"""
+    service = await get_smart_alerts_service(db_pool)
+    
+    if not await service.resolve_alert(alert_id, current_user['id']):
+        raise HTTPException(status_code=404, detail="Open alert not found")
+    
+    return {"message": "Alert resolved"}
+
+
 @router.get("/anomalies/stats", response_model=AnomalyStatsResponse)
 async def get_anomaly_stats(
     device_id: Optional[UUID] = Query(None),
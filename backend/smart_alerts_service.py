@@ -9,11 +9,13 @@ Epic 13: Smart Alerts
 
 import asyncio
 import logging
+import os
 import json
 from datetime import datetime, timedelta
 from typing import Optional, Dict, List, Any
 from uuid import UUID
 import asyncpg
+import numpy as np
 
 from anomaly_detector import AnomalyDetector, AnomalyResult
 from prediction_engine import get_prediction_engine
@@ -22,6 +24,9 @@ from noise_reduction_engine import get_noise_reduction_engine
 
 logger = logging.getLogger(__name__)
 
+# Devices forecast per history load in the prediction cycle
+PREDICTION_BATCH_SIZE = int(os.getenv("PREDICTION_BATCH_SIZE", "500"))
+
 
 class SmartAlertsService:
     """
@@ -170,7 +175,8 @@ class SmartAlertsService:
                 device_id=device_id,
                 alert_type='anomaly',
                 alert_message=message,
-                severity=result.severity
+                severity=result.severity,
+                metric_name=metric_name
             )
             
             # Calculate priority score (0-100)
@@ -195,6 +201,8 @@ class SmartAlertsService:
                     f"Alert {alert_id} created but suppressed (reason: {suppression_reason})"
                 )
             else:
+                if self.noise_reduction_engine:
+                    self.noise_reduction_engine.record_alert_status(device_id, 'anomaly', 'open')
                 logger.info(f"Created smart alert {alert_id} for anomaly {anomaly_id}")
                 # TODO: Trigger webhook/notification only for visible alerts
     
@@ -419,9 +427,10 @@ class SmartAlertsService:
             """, anomaly_id)
             
             # Get associated alert
-            alert_id = await conn.fetchval("""
-                SELECT id FROM alerts WHERE anomaly_id = $1
+            alert = await conn.fetchrow("""
+                SELECT id, device_id, alert_type FROM alerts WHERE anomaly_id = $1
             """, anomaly_id)
+            alert_id = alert['id'] if alert else None
             
             if alert_id:
                 # Add feedback
@@ -438,62 +447,105 @@ class SmartAlertsService:
                         noise_score = 1.0
                     WHERE id = $1
                 """, alert_id)
+                
+                if self.noise_reduction_engine:
+                    self.noise_reduction_engine.record_alert_status(
+                        alert['device_id'], alert['alert_type'] or 'anomaly', 'closed'
+                    )
             
             logger.info(f"Marked anomaly {anomaly_id} as false positive")
     
+    async def resolve_alert(
+        self,
+        alert_id: UUID,
+        user_id: UUID
+    ) -> bool:
+        """Resolve an open alert; False if it does not exist or is already cleared"""
+        async with self.db_pool.acquire() as conn:
+            alert = await conn.fetchrow("""
+                UPDATE alerts
+                SET status = 'resolved',
+                    resolved_at = NOW(),
+                    resolved_by = $2
+                WHERE id = $1
+                  AND status NOT IN ('resolved', 'closed')
+                RETURNING device_id, alert_type
+            """, alert_id, user_id)
+        
+        if not alert:
+            return False
+        
+        if self.noise_reduction_engine:
+            self.noise_reduction_engine.record_alert_status(
+                alert['device_id'], alert['alert_type'] or 'anomaly', 'resolved'
+            )
+        
+        logger.info(f"Resolved alert {alert_id}")
+        return True
+    
     async def _prediction_loop(self):
         """
         Background task: Generate predictions and predictive alerts.
         Runs every hour to forecast metrics and detect threshold crossings.
+        
+        Devices are processed in batches: one history load per batch feeds
+        the exhaustion check, the forecasts and the crossing detection.
         """
         while self.running:
             try:
                 logger.info("Starting prediction cycle...")
+                started = datetime.utcnow()
                 
                 # Get active devices
                 async with self.db_pool.acquire() as conn:
                     devices = await conn.fetch("""
-                        SELECT DISTINCT id FROM devices WHERE status = 'active' LIMIT 100
+                        SELECT DISTINCT id FROM devices WHERE status = 'active'
                     """)
+                device_ids = [device['id'] for device in devices]
                 
                 predictions_created = 0
                 alerts_created = 0
                 
                 critical_metrics = ['disk_usage', 'memory_usage', 'cpu_usage', 'error_rate']
+                engine = self.prediction_engine
+                history_metrics = list(dict.fromkeys(critical_metrics + list(engine.exhaustion_thresholds)))
                 
-                for device in devices:
-                    device_id = device['id']
-                    
-                    # Check resource exhaustion
-                    exhaustion_warnings = await self.prediction_engine.detect_resource_exhaustion(device_id)
-                    
-                    for warning in exhaustion_warnings:
-                        if warning['severity'] in ['critical', 'error']:
-                            await self._create_predictive_alert(device_id, warning)
-                            alerts_created += 1
-                    
-                    # Generate forecasts
-                    for metric_name in critical_metrics:
-                        try:
-                            predictions = await self.prediction_engine.predict_metric(
-                                device_id, metric_name, [60, 180, 360]
-                            )
-                            predictions_created += len(predictions)
-                            
-                            # Check threshold crossings
-                            crossing = await self.prediction_engine.predict_threshold_crossing(
-                                device_id, metric_name
-                            )
-                            
-                            if crossing:
-                                time_remaining = crossing.time_until_crossing()
-                                if time_remaining.total_seconds() < 21600:  # < 6 hours
-                                    await self._create_threshold_crossing_alert(device_id, crossing)
+                for offset in range(0, len(device_ids), PREDICTION_BATCH_SIZE):
+                    chunk = device_ids[offset:offset + PREDICTION_BATCH_SIZE]
+                    try:
+                        history = await engine.fetch_history_batch(chunk, history_metrics, days=7)
+                        
+                        # Check resource exhaustion
+                        exhaustion = await engine.detect_resource_exhaustion_batch(chunk, history=history)
+                        for device_id, warnings in exhaustion.items():
+                            for warning in warnings:
+                                if warning['severity'] in ['critical', 'error']:
+                                    await self._create_predictive_alert(device_id, warning)
                                     alerts_created += 1
-                        except Exception as e:
-                            logger.error(f"Error predicting {metric_name} for {device_id}: {e}")
+                        
+                        # Generate forecasts
+                        forecast_rows = np.array([m in critical_metrics for _, m in history.keys], dtype=bool)
+                        forecast_history = history.select(forecast_rows)
+                        predictions = await engine.forecast_batch(
+                            chunk, critical_metrics, [60, 180, 360], history=forecast_history
+                        )
+                        predictions_created += len(predictions)
+                        
+                        # Check threshold crossings (already limited to < 6 hours)
+                        crossings = await engine.predict_threshold_crossings_batch(
+                            chunk, critical_metrics, history=forecast_history
+                        )
+                        for crossing in crossings:
+                            await self._create_threshold_crossing_alert(crossing.device_id, crossing)
+                            alerts_created += 1
+                    except Exception as e:
+                        logger.error(f"Error predicting batch of {len(chunk)} devices: {e}")
                 
-                logger.info(f"Prediction cycle: {predictions_created} predictions, {alerts_created} alerts")
+                elapsed = (datetime.utcnow() - started).total_seconds()
+                logger.info(
+                    f"Prediction cycle: {len(device_ids)} devices, {predictions_created} predictions, "
+                    f"{alerts_created} alerts in {elapsed:.1f}s"
+                )
             except Exception as e:
                 logger.error(f"Error in prediction loop: {e}")
             
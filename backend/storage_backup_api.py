@@ -272,6 +272,21 @@ async def get_volume_details(
         logger.error(f"Error getting volume details: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/storage/refresh")
+async def refresh_storage_index(current_user: Dict = Depends(require_admin)):
+    """
+    Trigger an immediate background re-index of volume sizes
+
+    Sizes are recomputed incrementally (only changed directories are
+    re-listed). Poll `/storage/info` and watch `sizes_updated_at`.
+    """
+    storage_backup_manager.refresh_storage_index()
+    return {
+        "success": True,
+        "message": "Storage size re-index scheduled",
+        "last_pass_at": storage_backup_manager.size_indexer.stats["last_pass_at"]
+    }
+
 @router.post("/storage/cleanup", response_model=CleanupResponse)
 async def cleanup_storage(
     request: CleanupRequest,
@@ -335,6 +350,9 @@ async def cleanup_storage(
             except Exception as e:
                 errors.append(f"Backup cleanup failed: {str(e)}")
 
+        # Volume sizes changed; re-index in the background
+        storage_backup_manager.refresh_storage_index()
+
         return CleanupResponse(
             success=len(errors) == 0,
             freed_space=freed_space,
@@ -17,6 +17,8 @@ from pydantic import BaseModel
 import logging
 import psutil
 
+from storage_size_indexer import DirectorySizeIndexer
+
 logger = logging.getLogger(__name__)
 
 # Dynamic path detection - works across different users
@@ -55,12 +57,15 @@ class VolumeInfo(BaseModel):
     type: str
     health: str
     last_accessed: str
+    files_count: Optional[int] = None
+    size_updated_at: Optional[str] = None  # None while the first index pass is running
 
 class StorageInfo(BaseModel):
     total_space: int
     used_space: int
     free_space: int
     volumes: List[VolumeInfo]
+    sizes_updated_at: Optional[str] = None
 
 class BackupConfig(BaseModel):
     backup_enabled: bool = True
@@ -93,6 +98,12 @@ class StorageBackupManager:
         self.storage_config = self._load_storage_config()
         self.backup_config = self._load_backup_config()
         self._ensure_backup_directory()
+        # Volume sizes come from a background index instead of per-request walks
+        self.size_indexer = DirectorySizeIndexer(
+            roots=[VOLUMES_PATH],
+            refresh_interval=float(os.getenv("STORAGE_INDEX_REFRESH_SECONDS", "300")),
+            full_rescan_interval=float(os.getenv("STORAGE_INDEX_FULL_RESCAN_SECONDS", "3600"))
+        )
         
     def _load_storage_config(self) -> Dict:
         """Load storage configuration from disk"""
@@ -145,7 +156,14 @@ class StorageBackupManager:
         os.makedirs(self.backup_config.backup_location, exist_ok=True)
     
     def get_storage_info(self) -> StorageInfo:
-        """Get comprehensive storage information"""
+        """
+        Get comprehensive storage information.
+
+        Volume sizes are served from the background size index and return
+        immediately; `size_updated_at` tells the caller how fresh they are.
+        """
+        self.size_indexer.start()
+
         # Get overall disk usage
         disk_usage = shutil.disk_usage("/")
         total_space = disk_usage.total
@@ -154,40 +172,44 @@ class StorageBackupManager:
         
         # Get volume information
         volumes = []
+        oldest_update = None
         if os.path.exists(VOLUMES_PATH):
             for item in Path(VOLUMES_PATH).iterdir():
                 if item.is_dir():
-                    size = self._get_directory_size(item)
+                    indexed = self.size_indexer.get_total(str(item))
                     volume_type = self._determine_volume_type(item.name)
                     health = self._check_volume_health(item)
                     last_accessed = datetime.fromtimestamp(item.stat().st_atime).isoformat()
+
+                    size_updated_at = None
+                    if indexed:
+                        size_updated_at = datetime.fromtimestamp(indexed.updated_at).isoformat()
+                        if oldest_update is None or size_updated_at < oldest_update:
+                            oldest_update = size_updated_at
                     
                     volumes.append(VolumeInfo(
                         name=item.name,
                         path=str(item),
-                        size=size,
+                        size=indexed.size if indexed else 0,
                         type=volume_type,
                         health=health,
-                        last_accessed=last_accessed
+                        last_accessed=last_accessed,
+                        files_count=indexed.files if indexed else None,
+                        size_updated_at=size_updated_at
                     ))
         
         return StorageInfo(
             total_space=total_space,
             used_space=used_space,
             free_space=free_space,
-            volumes=volumes
+            volumes=volumes,
+            sizes_updated_at=oldest_update
         )
     
-    def _get_directory_size(self, path: Path) -> int:
-        """Get total size of a directory"""
-        total = 0
-        try:
-            for entry in path.rglob('*'):
-                if entry.is_file():
-                    total += entry.stat().st_size
-        except Exception as e:
-            logger.warning(f"Error calculating size for {path}: {e}")
-        return total
+    def refresh_storage_index(self):
+        """Request an immediate background re-index of volume sizes"""
+        self.size_indexer.start()
+        self.size_indexer.request_refresh()
     
     def _determine_volume_type(self, volume_name: str) -> str:
         """Determine volume type based on name"""
@@ -446,33 +468,26 @@ class StorageBackupManager:
         if not volume_path.exists():
             return None
         
+        self.size_indexer.start()
+
         # Get basic info
-        size = self._get_directory_size(volume_path)
         health = self._check_volume_health(volume_path)
         last_accessed = datetime.fromtimestamp(volume_path.stat().st_atime).isoformat()
         
-        # Get file count and largest files
-        files = []
-        total_files = 0
+        # Size, file count and largest files come from the size index
+        indexed = self.size_indexer.get_total(str(volume_path))
+        size = indexed.size if indexed else 0
+        total_files = indexed.files if indexed else 0
+        largest_files = []
         
-        try:
-            for entry in volume_path.rglob('*'):
-                if entry.is_file():
-                    total_files += 1
-                    files.append({
-                        'name': entry.name,
-                        'path': str(entry.relative_to(volume_path)),
-                        'size': entry.stat().st_size,
-                        'modified': datetime.fromtimestamp(entry.stat().st_mtime).isoformat()
-                    })
-            
-            # Sort by size (largest first) and take top 10
-            files.sort(key=lambda f: f['size'], reverse=True)
-            largest_files = files[:10]
-            
-        except Exception as e:
-            logger.warning(f"Error analyzing volume {volume_name}: {e}")
-            largest_files = []
+        if indexed:
+            for file_size, file_path, modified in indexed.largest:
+                largest_files.append({
+                    'name': os.path.basename(file_path),
+                    'path': os.path.relpath(file_path, volume_path),
+                    'size': file_size,
+                    'modified': datetime.fromtimestamp(modified).isoformat()
+                })
         
         return {
             'name': volume_name,
@@ -482,7 +497,8 @@ class StorageBackupManager:
             'health': health,
             'last_accessed': last_accessed,
             'total_files': total_files,
-            'largest_files': largest_files
+            'largest_files': largest_files,
+            'size_updated_at': datetime.fromtimestamp(indexed.updated_at).isoformat() if indexed else None
         }
 
 # Create singleton instance
@@ -0,0 +1,231 @@
+"""
+Incremental Directory Size Indexer for UC-1 Pro Admin Dashboard
+
+Keeps per-directory size totals for the storage page in a background
+thread so API calls never walk volumes themselves.
+
+Each directory is cached with the mtime it had when it was last listed.
+A directory's mtime only changes when entries are added, removed or
+renamed, so on a refresh unchanged directories are not listed again:
+only their subdirectories are stat()ed to find changed subtrees. In-place
+growth of existing files does not touch the directory mtime, so a forced
+full rescan runs every `full_rescan_interval` seconds to pick that up.
+"""
+
+import os
+import time
+import heapq
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+LARGEST_FILES_TRACKED = 10
+
+# Pause briefly every N directory entries so a full scan does not
+# monopolise the disk
+ENTRIES_PER_BATCH = 5000
+BATCH_PAUSE_SECONDS = 0.005
+
+# (size, path, mtime)
+FileRecord = Tuple[int, str, float]
+
+
+@dataclass
+class DirectoryListing:
+    """Cached listing of a single directory (own files only)"""
+    mtime_ns: int
+    file_bytes: int
+    file_count: int
+    subdirs: List[str]
+    largest: List[FileRecord]
+
+
+@dataclass
+class SubtreeTotal:
+    """Aggregated totals for a directory and everything below it"""
+    size: int
+    files: int
+    largest: List[FileRecord] = field(default_factory=list)
+    updated_at: float = 0.0
+
+
+class DirectorySizeIndexer:
+    """Background size index over one or more root directories"""
+
+    def __init__(
+        self,
+        roots: Optional[List[str]] = None,
+        refresh_interval: float = 300.0,
+        full_rescan_interval: float = 3600.0,
+    ):
+        self.roots = list(roots or [])
+        self.refresh_interval = refresh_interval
+        self.full_rescan_interval = full_rescan_interval
+
+        self._listings: Dict[str, DirectoryListing] = {}
+        self._totals: Dict[str, SubtreeTotal] = {}
+        self._last_full_scan = 0.0
+        self._entries_since_pause = 0
+
+        self._thread: Optional[threading.Thread] = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._scan_lock = threading.Lock()
+
+        self.stats = {
+            "passes": 0,
+            "dirs_listed": 0,
+            "dirs_reused": 0,
+            "last_pass_seconds": 0.0,
+            "last_pass_at": None,
+        }
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """Start the background indexing thread (idempotent)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="storage-size-indexer", daemon=True
+        )
+        self._thread.start()
+        logger.info(f"Storage size indexer started for {self.roots}")
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def request_refresh(self):
+        """Ask the background thread to run a pass now instead of waiting"""
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Storage size index pass failed: {e}")
+            self._wake.wait(self.refresh_interval)
+            self._wake.clear()
+
+    # ------------------------------------------------------------------
+    # Queries (never touch the disk)
+    # ------------------------------------------------------------------
+
+    def get_total(self, path: str) -> Optional[SubtreeTotal]:
+        """Cached totals for a directory, or None if not indexed yet"""
+        return self._totals.get(os.path.normpath(path))
+
+    @property
+    def ready(self) -> bool:
+        return self.stats["passes"] > 0
+
+    # ------------------------------------------------------------------
+    # Indexing
+    # ------------------------------------------------------------------
+
+    def refresh(self, force_full: bool = False):
+        """Run one indexing pass over all roots"""
+        with self._scan_lock:
+            started = time.time()
+            full = force_full or started - self._last_full_scan >= self.full_rescan_interval
+            visited: set = set()
+
+            for root in self.roots:
+                root = os.path.normpath(root)
+                if os.path.isdir(root):
+                    self._index_dir(root, full, visited)
+
+            # Forget directories that disappeared since the last pass
+            for path in set(self._listings) - visited:
+                self._listings.pop(path, None)
+                self._totals.pop(path, None)
+
+            if full:
+                self._last_full_scan = started
+            self.stats["passes"] += 1
+            self.stats["last_pass_seconds"] = round(time.time() - started, 3)
+            self.stats["last_pass_at"] = time.time()
+
+            logger.debug(
+                f"Storage size index pass ({'full' if full else 'incremental'}) "
+                f"took {self.stats['last_pass_seconds']}s"
+            )
+
+    def _index_dir(self, path: str, full: bool, visited: set) -> SubtreeTotal:
+        visited.add(path)
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            return SubtreeTotal(size=0, files=0, updated_at=time.time())
+
+        listing = self._listings.get(path)
+        if full or listing is None or listing.mtime_ns != mtime_ns:
+            listing = self._list_dir(path, mtime_ns)
+            self._listings[path] = listing
+            self.stats["dirs_listed"] += 1
+        else:
+            self.stats["dirs_reused"] += 1
+
+        size = listing.file_bytes
+        files = listing.file_count
+        largest = list(listing.largest)
+
+        for name in listing.subdirs:
+            child = self._index_dir(os.path.join(path, name), full, visited)
+            size += child.size
+            files += child.files
+            largest.extend(child.largest)
+
+        total = SubtreeTotal(
+            size=size,
+            files=files,
+            largest=heapq.nlargest(LARGEST_FILES_TRACKED, largest),
+            updated_at=time.time(),
+        )
+        self._totals[path] = total
+        return total
+
+    def _list_dir(self, path: str, mtime_ns: int) -> DirectoryListing:
+        file_bytes = 0
+        file_count = 0
+        subdirs: List[str] = []
+        records: List[FileRecord] = []
+
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    self._throttle()
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.name)
+                        elif entry.is_file(follow_symlinks=False):
+                            st = entry.stat(follow_symlinks=False)
+                            file_bytes += st.st_size
+                            file_count += 1
+                            records.append((st.st_size, entry.path, st.st_mtime))
+                    except OSError:
+                        continue
+        except OSError as e:
+            logger.warning(f"Error listing {path}: {e}")
+
+        return DirectoryListing(
+            mtime_ns=mtime_ns,
+            file_bytes=file_bytes,
+            file_count=file_count,
+            subdirs=subdirs,
+            largest=heapq.nlargest(LARGEST_FILES_TRACKED, records),
+        )
+
+    def _throttle(self):
+        self._entries_since_pause += 1
+        if self._entries_since_pause >= ENTRIES_PER_BATCH:
+            self._entries_since_pause = 0
+            time.sleep(BATCH_PAUSE_SECONDS)
@@ -631,28 +631,25 @@ async def initiate_downgrade(
         current_period_end = current_subscription.get("subscription_at") or current_subscription.get("terminated_at")
 
         # Import database for tracking subscription change
-        from sqlalchemy import text
         from database.connection import get_db_connection
 
-        async with get_db_connection() as db:
+        async with await get_db_connection() as db:
             # Record subscription change in database
             change_id = f"{org_id}_{int(datetime.now().timestamp())}"
 
             await db.execute(
-                text("""
-                    INSERT INTO subscription_changes
-                    (id, user_id, old_tier, new_tier, change_type, effective_date)
-                    VALUES (:id, :user_id, :old_tier, :new_tier, 'downgrade', :effective_date)
-                """),
-                {
-                    "id": change_id,
-                    "user_id": user.get("id"),
-                    "old_tier": current_tier,
-                    "new_tier": target_tier,
-                    "effective_date": current_period_end
-                }
+                """
+                INSERT INTO subscription_changes
+                (id, user_id, old_tier, new_tier, change_type, effective_date)
+                VALUES ($1, $2, $3, $4, 'downgrade', $5)
+                """,
+                change_id,
+                user.get("id"),
+                current_tier,
+                target_tier,
+                datetime.fromisoformat(current_period_end.replace("Z", "+00:00"))
+                if isinstance(current_period_end, str) else current_period_end
             )
-            await db.commit()
 
         # 5. Send downgrade scheduled email (don't fail if email fails)
         try:
@@ -9,7 +9,6 @@ from pydantic import BaseModel, Field, validator
 from typing import List, Dict, Optional, Any
 from datetime import datetime
 import logging
-import asyncpg
 import json
 
 # Import Lago integration for plan synchronization
@@ -25,6 +24,8 @@ from keycloak_integration import (
     update_user_attributes,
     get_user_by_id
 )
+from db_manager import db_manager
+from model_list_cache import model_list_cache
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/v1/admin/tiers", tags=["subscription-tiers"])
@@ -143,15 +144,8 @@ class TierAnalytics(BaseModel):
 
 async def get_db_connection():
     """Get PostgreSQL database connection"""
-    import os
     try:
-        conn = await asyncpg.connect(
-            host=os.getenv("POSTGRES_HOST", "unicorn-postgresql"),
-            port=int(os.getenv("POSTGRES_PORT", 5432)),
-            user=os.getenv("POSTGRES_USER", "unicorn"),
-            password=os.getenv("POSTGRES_PASSWORD", "unicorn"),
-            database=os.getenv("POSTGRES_DB", "unicorn_db")
-        )
+        conn = await db_manager.connect('default')
         yield conn
     finally:
         if conn:
@@ -356,6 +350,7 @@ async def create_tier(
         )
 
         logger.info(f"Created tier: {tier.tier_code} by {admin}")
+        await model_list_cache.invalidate(f"tier {tier.tier_code} created")
         return created_tier
 
     except HTTPException:
@@ -420,6 +415,7 @@ async def update_tier(
         row = await conn.fetchrow(query, *params)
 
         logger.info(f"Updated tier {tier_id} by {admin}")
+        await model_list_cache.invalidate(f"tier {tier_id} updated")
 
         # Return updated tier
         return await get_tier(tier_id, conn)
@@ -463,6 +459,7 @@ async def delete_tier(
         )
 
         logger.info(f"Soft deleted tier {tier_id} ({existing['tier_code']}) by {admin}")
+        await model_list_cache.invalidate(f"tier {tier_id} deleted")
 
         return {
             "success": True,
@@ -603,6 +600,7 @@ async def clone_tier(
             updated_by=admin
         )
 
+        await model_list_cache.invalidate(f"tier {tier_code} cloned")
         return created_tier
 
     except HTTPException:
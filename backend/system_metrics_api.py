@@ -9,7 +9,6 @@ from fastapi import APIRouter, HTTPException, Query
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 import psutil
-import docker
 import asyncio
 import logging
 import redis
@@ -18,6 +17,8 @@ from enum import Enum
 
 from health_score import HealthScoreCalculator
 from alert_manager import AlertManager
+from docker_engine import docker_state
+from host_telemetry import host_telemetry
 
 logger = logging.getLogger(__name__)
 
@@ -108,15 +109,16 @@ metrics_cache = MetricsCache()
 def get_cpu_metrics() -> Dict:
     """Get current CPU metrics."""
     try:
-        cpu_percent = psutil.cpu_percent(interval=0.1, percpu=False)
-        cpu_count = psutil.cpu_count()
+        sample = host_telemetry.latest()
+        cpu_percent = sample.cpu_percent
+        cpu_count = sample.cpu_count
         cpu_freq = psutil.cpu_freq()
 
         return {
             "current": round(cpu_percent, 2),
             "cores": cpu_count,
             "frequency": round(cpu_freq.current / 1000, 2) if cpu_freq else 0,
-            "per_cpu": [round(p, 2) for p in psutil.cpu_percent(interval=0.1, percpu=True)]
+            "per_cpu": [round(p, 2) for p in sample.per_cpu]
         }
     except Exception as e:
         logger.error(f"Error getting CPU metrics: {e}")
@@ -131,8 +133,9 @@ def get_cpu_metrics() -> Dict:
 def get_memory_metrics() -> Dict:
     """Get current memory metrics."""
     try:
-        mem = psutil.virtual_memory()
-        swap = psutil.swap_memory()
+        sample = host_telemetry.latest()
+        mem = sample.memory
+        swap = sample.swap
 
         return {
             "current": round(mem.percent, 2),
@@ -180,14 +183,17 @@ def get_disk_metrics() -> Dict:
                 continue
 
         # Get I/O stats
-        io_counters = psutil.disk_io_counters()
+        sample = host_telemetry.latest()
+        io_counters = sample.disk_io
         io_stats = {
             "read_bytes": io_counters.read_bytes,
             "write_bytes": io_counters.write_bytes,
             "read_count": io_counters.read_count,
             "write_count": io_counters.write_count,
             "read_mb": round(io_counters.read_bytes / (1024**2), 2),
-            "write_mb": round(io_counters.write_bytes / (1024**2), 2)
+            "write_mb": round(io_counters.write_bytes / (1024**2), 2),
+            "read_bps": round(sample.disk_read_bps, 1),
+            "write_bps": round(sample.disk_write_bps, 1)
         }
 
         return {
@@ -212,7 +218,7 @@ def get_disk_metrics() -> Dict:
 def get_network_metrics() -> Dict:
     """Get current network metrics."""
     try:
-        net_io = psutil.net_io_counters(pernic=True)
+        net_io = host_telemetry.latest().net_io_pernic
         interfaces = []
 
         for interface, counters in net_io.items():
@@ -344,79 +350,48 @@ async def get_services_status() -> Dict:
 
     Returns detailed information about each Docker container including
     resource usage, health status, and uptime.
+
+    Served from the shared Docker state cache: the inventory is kept
+    current from the Engine events stream and CPU/memory come from the
+    background stats sampler, so no per-container stats calls are made here.
     """
     try:
-        client = docker.from_env()
-        containers = client.containers.list(all=True)
+        if not await docker_state.ensure_started():
+            raise RuntimeError(docker_state.error or "Docker state cache not ready")
+
+        containers = docker_state.containers(all=True)
 
         services = []
         running_count = 0
         stopped_count = 0
 
         for container in containers:
-            try:
-                # Get container stats (non-blocking)
-                stats = container.stats(stream=False)
-
-                # Calculate CPU percentage
-                cpu_delta = stats['cpu_stats']['cpu_usage']['total_usage'] - \
-                           stats['precpu_stats']['cpu_usage']['total_usage']
-                system_delta = stats['cpu_stats']['system_cpu_usage'] - \
-                              stats['precpu_stats']['system_cpu_usage']
-                cpu_percent = (cpu_delta / system_delta) * 100.0 if system_delta > 0 else 0.0
-
-                # Calculate memory usage
-                memory_usage = stats['memory_stats'].get('usage', 0)
-                memory_mb = round(memory_usage / (1024**2), 2)
-
-                # Get uptime
-                started_at = container.attrs['State']['StartedAt']
-                if started_at != '0001-01-01T00:00:00Z':
-                    start_time = datetime.fromisoformat(started_at.replace('Z', '+00:00'))
-                    uptime_seconds = (datetime.now(start_time.tzinfo) - start_time).total_seconds()
-                    uptime = format_uptime(uptime_seconds)
-                else:
-                    uptime = "N/A"
-
-                # Get health status
-                health_status = container.attrs['State'].get('Health', {}).get('Status')
-
-                status = container.status
-                if status == 'running':
-                    running_count += 1
-                else:
-                    stopped_count += 1
-
-                services.append({
-                    "id": container.id[:12],
-                    "name": container.name,
-                    "status": status,
-                    "uptime": uptime,
-                    "health": health_status,
-                    "cpu_percent": round(cpu_percent, 2),
-                    "memory_mb": memory_mb,
-                    "image": container.image.tags[0] if container.image.tags else "unknown",
-                    "ports": [f"{k}/{v[0]['HostPort']}" for k, v in (container.ports or {}).items() if v]
-                })
-            except Exception as e:
-                logger.warning(f"Error getting stats for container {container.name}: {e}")
-                services.append({
-                    "id": container.id[:12],
-                    "name": container.name,
-                    "status": container.status,
-                    "uptime": "N/A",
-                    "health": None,
-                    "cpu_percent": 0,
-                    "memory_mb": 0,
-                    "image": "unknown",
-                    "ports": []
-                })
+            stats = docker_state.stats(container.id)
+            uptime_seconds = container.uptime_seconds()
+
+            if container.running:
+                running_count += 1
+            else:
+                stopped_count += 1
+
+            services.append({
+                "id": container.id[:12],
+                "name": container.name,
+                "status": container.status,
+                "uptime": format_uptime(uptime_seconds) if uptime_seconds is not None else "N/A",
+                "health": container.health,
+                "cpu_percent": round(stats.cpu_percent, 2) if stats else 0,
+                "memory_mb": stats.memory_mb if stats else 0,
+                "image": container.image,
+                "ports": [f"{k}/{v[0]['HostPort']}" for k, v in container.ports.items() if v],
+                "stats_sampled_at": stats.sampled_at if stats else None
+            })
 
         return {
             "total": len(containers),
             "running": running_count,
             "stopped": stopped_count,
-            "services": sorted(services, key=lambda x: x['name'])
+            "services": services
         }
     except Exception as e:
         logger.error(f"Error getting services status: {e}")
@@ -494,7 +469,7 @@ async def get_system_temperature() -> Dict:
 
         # Try to get CPU temperatures
         try:
-            sensors = psutil.sensors_temperatures()
+            sensors = host_telemetry.latest().temperatures
             for name, entries in sensors.items():
                 temps[name] = [
                     {
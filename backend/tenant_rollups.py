@@ -0,0 +1,423 @@
+"""
+Cross-Tenant Analytics Rollups
+
+Precomputed aggregates behind the cross-tenant analytics endpoints, so a
+request reads a handful of rows whatever the number of tenants:
+
+- tenant_rollups: one row per organization with its plan tier and
+  member/device/webhook/API key counters; top-tenant rankings are an
+  index scan with LIMIT
+- tenant_rollup_daily: one row per (day, plan tier) with the tier's totals
+  as of that day and the tenants/users/devices added (and tenants churned)
+  that day; platform stats, tier comparison and resource utilization read
+  the latest day, growth metrics sum a few days
+
+A background refresh (every ANALYTICS_ROLLUP_INTERVAL seconds) counts each
+source table with one grouped query and writes only what changed: tenants
+whose counters moved are upserted, deleted organizations are removed, and
+only today's and yesterday's daily rows are rewritten (the first refresh
+of a process backfills ANALYTICS_ROLLUP_HISTORY_DAYS of daily counts).
+A Postgres advisory lock keeps concurrent app instances from refreshing at
+the same time.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+REFRESH_INTERVAL = float(os.getenv('ANALYTICS_ROLLUP_INTERVAL', '300'))
+HISTORY_DAYS = int(os.getenv('ANALYTICS_ROLLUP_HISTORY_DAYS', '62'))
+
+ADVISORY_LOCK_KEY = 0x7E4A47  # arbitrary, shared by all app instances
+
+# Counter name -> (source table, creation timestamp column)
+COUNTERS = {
+    'users': ('organization_members', 'joined_at'),
+    'devices': ('edge_devices', 'registered_at'),
+    'webhooks': ('webhooks', None),
+    'api_keys': ('api_keys', None),
+}
+
+TIER_ORDER = ['trial', 'starter', 'professional', 'enterprise']
+
+
+def plan_tier(metadata: Any) -> str:
+    """Plan tier from organizations.metadata_json (trial when absent)"""
+    if isinstance(metadata, str):
+        try:
+            metadata = json.loads(metadata)
+        except ValueError:
+            return 'trial'
+    if isinstance(metadata, dict):
+        return metadata.get('plan_tier') or 'trial'
+    return 'trial'
+
+
+def _day(value: Optional[datetime]) -> Optional[date]:
+    if value is None:
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.date()
+
+
+def build_daily(
+    tenants: Dict[str, Dict[str, Any]],
+    organizations: List[Dict[str, Any]],
+    new_by_org_day: Dict[str, Dict[Tuple[str, date], int]],
+    today: date,
+    since: date
+) -> Dict[Tuple[date, str], Dict[str, Optional[int]]]:
+    """
+    Daily tier rows for `since`..`today`.
+
+    Today's rows carry the tier totals; earlier days only their new/churned
+    counts (their totals were frozen by the refreshes on those days and are
+    passed as None so the upsert leaves them alone).
+    """
+    def row(day: date, tier: str) -> Dict[str, Optional[int]]:
+        key = (day, tier)
+        if key not in daily:
+            totals = 0 if day == today else None
+            daily[key] = {
+                'tenants': totals, 'active_tenants': totals, 'users': totals,
+                'devices': totals, 'webhooks': totals, 'api_keys': totals,
+                'new_tenants': 0, 'churned_tenants': 0, 'new_users': 0, 'new_devices': 0,
+            }
+        return daily[key]
+
+    daily: Dict[Tuple[date, str], Dict[str, Optional[int]]] = {}
+
+    for tenant in tenants.values():
+        today_row = row(today, tenant['plan_tier'])
+        today_row['tenants'] += 1
+        today_row['active_tenants'] += 1 if tenant['is_active'] else 0
+        for counter in COUNTERS:
+            today_row[counter] += tenant[counter]
+
+    for org in organizations:
+        tier = tenants[org['id']]['plan_tier']
+        created = _day(org['created_at'])
+        if created is not None and since <= created <= today:
+            row(created, tier)['new_tenants'] += 1
+        updated = _day(org['updated_at'])
+        if not org['is_active'] and updated is not None and since <= updated <= today:
+            row(updated, tier)['churned_tenants'] += 1
+
+    for counter, field in (('users', 'new_users'), ('devices', 'new_devices')):
+        for (org_id, day), count in new_by_org_day.get(counter, {}).items():
+            tenant = tenants.get(org_id)
+            if tenant is not None and since <= day <= today:
+                row(day, tenant['plan_tier'])[field] += count
+
+    return daily
+
+
+class TenantRollups:
+    """Maintains and serves the cross-tenant analytics rollups"""
+
+    def __init__(self, refresh_interval: float = REFRESH_INTERVAL, history_days: int = HISTORY_DAYS):
+        self.refresh_interval = refresh_interval
+        self.history_days = history_days
+        self.db_pool = None
+
+        self.tenants: Dict[str, Dict[str, Any]] = {}
+        self._loaded = False
+        self._backfilled = False
+        self._task: Optional[asyncio.Task] = None
+        self._start_lock = asyncio.Lock()
+        self._refresh_lock = asyncio.Lock()
+        self._first_attempt = asyncio.Event()
+
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.tenants_written = 0
+        self.last_refresh: Optional[datetime] = None
+        self.last_refresh_duration: Optional[float] = None
+
+    async def start(self, db_pool):
+        async with self._start_lock:
+            if self._task is not None:
+                return
+            self.db_pool = db_pool
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"Tenant analytics rollups started (refresh every {self.refresh_interval}s)")
+
+    async def ensure_ready(self, timeout: float = 30.0):
+        """Start lazily and wait for the first refresh attempt"""
+        if self._task is None:
+            from db_manager import db_manager
+            await db_manager.start()
+            await self.start(db_manager.subsystem('analytics'))
+        if not self._first_attempt.is_set():
+            try:
+                await asyncio.wait_for(self._first_attempt.wait(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning("Tenant rollups not refreshed yet, serving previous snapshot")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        logger.info("Tenant analytics rollups stopped")
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Tenant rollup refresh failed: {e}")
+            self._first_attempt.set()
+            await asyncio.sleep(self.refresh_interval)
+
+    # ==================== Refresh ====================
+
+    async def refresh(self) -> bool:
+        """Recount the source tables and write the rollup deltas; False if another instance holds the lock"""
+        async with self._refresh_lock:
+            started = time.monotonic()
+            try:
+                async with self.db_pool.acquire() as conn:
+                    if not await conn.fetchval("SELECT pg_try_advisory_lock($1)", ADVISORY_LOCK_KEY):
+                        return False
+                    try:
+                        await self._refresh(conn)
+                    finally:
+                        await conn.execute("SELECT pg_advisory_unlock($1)", ADVISORY_LOCK_KEY)
+            except Exception:
+                self.refresh_errors += 1
+                raise
+            self.refreshes += 1
+            self.last_refresh = datetime.now(timezone.utc)
+            self.last_refresh_duration = time.monotonic() - started
+            return True
+
+    async def _refresh(self, conn):
+        today = datetime.now(timezone.utc).date()
+        since = today - timedelta(days=self.history_days if not self._backfilled else 1)
+        since_ts = datetime.combine(since, datetime.min.time())
+
+        if not self._loaded:
+            rows = await conn.fetch("SELECT * FROM tenant_rollups")
+            self.tenants = {row['organization_id']: self._tenant(row) for row in rows}
+            self._loaded = True
+
+        organizations = [dict(row) for row in await conn.fetch(
+            """
+            SELECT id::text AS id, name, COALESCE(is_active, true) AS is_active,
+                   metadata_json, created_at, updated_at
+            FROM organizations
+            """
+        )]
+
+        counts: Dict[str, Dict[str, int]] = {}
+        new_by_org_day: Dict[str, Dict[Tuple[str, date], int]] = {}
+        for counter, (table, created_column) in COUNTERS.items():
+            counts[counter], new_by_org_day[counter] = await self._count(
+                conn, table, created_column, since_ts
+            )
+
+        tenants = {
+            org['id']: {
+                'organization_name': org['name'],
+                'plan_tier': plan_tier(org['metadata_json']),
+                'is_active': org['is_active'],
+                **{counter: counts[counter].get(org['id'], 0) for counter in COUNTERS},
+                'created_at': org['created_at'],
+            }
+            for org in organizations
+        }
+
+        changed = [
+            (org_id, t['organization_name'], t['plan_tier'], t['is_active'],
+             t['users'], t['devices'], t['webhooks'], t['api_keys'], t['created_at'])
+            for org_id, t in tenants.items()
+            if self.tenants.get(org_id) != t
+        ]
+        daily = build_daily(tenants, organizations, new_by_org_day, today, since)
+
+        async with conn.transaction():
+            if changed:
+                await conn.executemany(
+                    """
+                    INSERT INTO tenant_rollups (
+                        organization_id, organization_name, plan_tier, is_active,
+                        users, devices, webhooks, api_keys, created_at, refreshed_at
+                    )
+                    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, NOW())
+                    ON CONFLICT (organization_id) DO UPDATE SET
+                        organization_name = EXCLUDED.organization_name,
+                        plan_tier = EXCLUDED.plan_tier,
+                        is_active = EXCLUDED.is_active,
+                        users = EXCLUDED.users,
+                        devices = EXCLUDED.devices,
+                        webhooks = EXCLUDED.webhooks,
+                        api_keys = EXCLUDED.api_keys,
+                        created_at = EXCLUDED.created_at,
+                        refreshed_at = NOW()
+                    """,
+                    changed
+                )
+            # Decided in SQL, not from self.tenants: rows left behind by a
+            # failed refresh or another instance are cleaned up too
+            status = await conn.execute(
+                "DELETE FROM tenant_rollups WHERE organization_id NOT IN (SELECT id::text FROM organizations)"
+            )
+            removed = int(status.split()[-1]) if status else 0
+
+            # Tiers with no tenants left must not keep today's old totals
+            await conn.execute(
+                "DELETE FROM tenant_rollup_daily WHERE snapshot_date = $1 AND plan_tier <> ALL($2::text[])",
+                today,
+                sorted({tier for day, tier in daily if day == today})
+            )
+            await conn.executemany(
+                """
+                INSERT INTO tenant_rollup_daily (
+                    snapshot_date, plan_tier, tenants, active_tenants,
+                    users, devices, webhooks, api_keys,
+                    new_tenants, churned_tenants, new_users, new_devices, refreshed_at
+                )
+                VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, NOW())
+                ON CONFLICT (snapshot_date, plan_tier) DO UPDATE SET
+                    tenants = COALESCE(EXCLUDED.tenants, tenant_rollup_daily.tenants),
+                    active_tenants = COALESCE(EXCLUDED.active_tenants, tenant_rollup_daily.active_tenants),
+                    users = COALESCE(EXCLUDED.users, tenant_rollup_daily.users),
+                    devices = COALESCE(EXCLUDED.devices, tenant_rollup_daily.devices),
+                    webhooks = COALESCE(EXCLUDED.webhooks, tenant_rollup_daily.webhooks),
+                    api_keys = COALESCE(EXCLUDED.api_keys, tenant_rollup_daily.api_keys),
+                    new_tenants = EXCLUDED.new_tenants,
+                    churned_tenants = EXCLUDED.churned_tenants,
+                    new_users = EXCLUDED.new_users,
+                    new_devices = EXCLUDED.new_devices,
+                    refreshed_at = NOW()
+                """,
+                [
+                    (day, tier, r['tenants'], r['active_tenants'], r['users'], r['devices'],
+                     r['webhooks'], r['api_keys'], r['new_tenants'], r['churned_tenants'],
+                     r['new_users'], r['new_devices'])
+                    for (day, tier), r in sorted(daily.items())
+                ]
+            )
+
+        self.tenants = tenants
+        self._backfilled = True
+        self.tenants_written += len(changed)
+        if changed or removed:
+            logger.info(f"Tenant rollups: {len(changed)} tenants updated, {removed} removed")
+
+    async def _count(self, conn, table: str, created_column: Optional[str], since: datetime):
+        """Per-organization totals, and per-day creations since `since`"""
+        try:
+            rows = await conn.fetch(
+                f"SELECT organization_id::text AS organization_id, COUNT(*) AS count "
+                f"FROM {table} WHERE organization_id IS NOT NULL GROUP BY organization_id"
+            )
+            totals = {row['organization_id']: row['count'] for row in rows}
+
+            new: Dict[Tuple[str, date], int] = {}
+            if created_column:
+                rows = await conn.fetch(
+                    f"""
+                    SELECT organization_id::text AS organization_id,
+                           {created_column}::date AS day, COUNT(*) AS count
+                    FROM {table}
+                    WHERE {created_column} >= $1 AND organization_id IS NOT NULL
+                    GROUP BY 1, 2
+                    """,
+                    since
+                )
+                new = {(row['organization_id'], row['day']): row['count'] for row in rows}
+        except asyncpg.UndefinedTableError:
+            # Optional feature tables (edge devices, webhooks) may not exist
+            return {}, {}
+        return totals, new
+
+    @staticmethod
+    def _tenant(row) -> Dict[str, Any]:
+        return {
+            'organization_name': row['organization_name'],
+            'plan_tier': row['plan_tier'],
+            'is_active': row['is_active'],
+            **{counter: row[counter] for counter in COUNTERS},
+            'created_at': row['created_at'],
+        }
+
+    # ==================== Reads ====================
+
+    @staticmethod
+    async def latest_tiers(conn) -> List[Dict[str, Any]]:
+        """Tier rows of the most recent snapshot day"""
+        rows = await conn.fetch(
+            """
+            SELECT * FROM tenant_rollup_daily
+            WHERE snapshot_date = (
+                SELECT MAX(snapshot_date) FROM tenant_rollup_daily WHERE tenants IS NOT NULL
+            )
+            """
+        )
+        order = {tier: i for i, tier in enumerate(TIER_ORDER)}
+        return sorted((dict(row) for row in rows), key=lambda r: (order.get(r['plan_tier'], len(order)), r['plan_tier']))
+
+    @staticmethod
+    async def growth(conn, start: date, end: date) -> Dict[str, int]:
+        """New/churned counts summed over snapshot days in (start, end]"""
+        row = await conn.fetchrow(
+            """
+            SELECT COALESCE(SUM(new_tenants), 0) AS new_tenants,
+                   COALESCE(SUM(churned_tenants), 0) AS churned_tenants,
+                   COALESCE(SUM(new_users), 0) AS new_users,
+                   COALESCE(SUM(new_devices), 0) AS new_devices
+            FROM tenant_rollup_daily
+            WHERE snapshot_date > $1 AND snapshot_date <= $2
+            """,
+            start,
+            end
+        )
+        return {key: int(value) for key, value in dict(row).items()}
+
+    @staticmethod
+    async def top_tenants(conn, metric: str, limit: int) -> List[Dict[str, Any]]:
+        if metric not in COUNTERS:
+            raise ValueError(f"Unknown metric: {metric}")
+        rows = await conn.fetch(
+            f"""
+            SELECT organization_id, organization_name, plan_tier, {metric} AS metric_value
+            FROM tenant_rollups
+            WHERE is_active = true
+            ORDER BY {metric} DESC
+            LIMIT $1
+            """,
+            limit
+        )
+        return [dict(row, rank=rank) for rank, row in enumerate(rows, start=1)]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None,
+            "tenants": len(self.tenants),
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "tenants_written": self.tenants_written,
+            "last_refresh": self.last_refresh.isoformat() if self.last_refresh else None,
+            "last_refresh_duration_seconds": self.last_refresh_duration,
+        }
+
+
+# Global instance
+tenant_rollups = TenantRollups()
@@ -7,6 +7,7 @@ from pathlib import Path
 from datetime import datetime, timedelta
 from unittest.mock import Mock, patch
 from typing import Dict, List
+from contextlib import asynccontextmanager
 
 # Test data directory
 TEST_DATA_DIR = Path(__file__).parent / "test_data"
@@ -324,6 +325,27 @@ def create_test_cart_item(addon: Dict, quantity: int = 1) -> Dict:
     }
 
 
+# asyncpg fakes
+
+class FakeAsyncpgConnection:
+    """Base for hand-written asyncpg connection fakes; tests add the queries they need"""
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield
+
+
+class FakePool:
+    """asyncpg pool stand-in that hands out the same connection on every acquire"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self.conn
+
+
 # Pytest hooks
 
 def pytest_configure(config):
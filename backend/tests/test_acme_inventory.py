@@ -0,0 +1,115 @@
+"""Tests for the cached ACME certificate inventory"""
+
+import os
+import sys
+import json
+import base64
+from datetime import datetime, timedelta
+
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from acme_inventory import AcmeInventory
+from traefik_manager import TraefikManager
+
+KEY = ec.generate_private_key(ec.SECP256R1())
+
+
+def make_cert(domain: str, days_valid: int) -> str:
+    """Self-signed certificate, base64 PEM as Traefik stores it"""
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, domain)])
+    now = datetime.utcnow()
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(KEY.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - timedelta(days=1))
+        .not_valid_after(now + timedelta(days=days_valid))
+        .sign(KEY, hashes.SHA256())
+    )
+    return base64.b64encode(cert.public_bytes(serialization.Encoding.PEM)).decode()
+
+
+def write_acme(path, certs):
+    data = {
+        "letsencrypt": {
+            "Email": "ops@example.com",
+            "Certificates": [
+                {"domain": {"main": domain, "sans": sans}, "certificate": blob, "key": "k"}
+                for domain, sans, blob in certs
+            ],
+        }
+    }
+    path.write_text(json.dumps(data))
+
+
+@pytest.fixture
+def certs():
+    return {
+        "a.example.com": make_cert("a.example.com", 90),
+        "b.example.com": make_cert("b.example.com", 10),
+        "c.example.com": make_cert("c.example.com", 20),
+    }
+
+
+def test_each_certificate_is_decoded_once(tmp_path, certs):
+    acme = tmp_path / "acme.json"
+    write_acme(acme, [(d, [], blob) for d, blob in certs.items()])
+    decoded = []
+    inventory = AcmeInventory(acme, lambda blob: decoded.append(blob) or {"not_after": None})
+
+    inventory.certificates()
+    inventory.certificates()
+    assert len(decoded) == 3
+    assert inventory.stats["loads"] == 1
+
+    # Renew one certificate: only the new blob is decoded
+    renewed = make_cert("b.example.com", 90)
+    write_acme(acme, [
+        ("a.example.com", [], certs["a.example.com"]),
+        ("b.example.com", [], renewed),
+        ("c.example.com", [], certs["c.example.com"]),
+    ])
+    inventory.certificates()
+    assert decoded[-1] == renewed
+    assert len(decoded) == 4
+
+
+def test_domain_index_and_expiry_order(tmp_path, certs):
+    acme = tmp_path / "acme.json"
+    write_acme(acme, [
+        ("a.example.com", ["www.a.example.com"], certs["a.example.com"]),
+        ("b.example.com", [], certs["b.example.com"]),
+        ("c.example.com", [], certs["c.example.com"]),
+    ])
+    manager = TraefikManager(traefik_dir=str(tmp_path / "traefik"))
+    inventory = AcmeInventory(acme, manager._extract_certificate_metadata)
+
+    assert inventory.find("www.a.example.com").domain == "a.example.com"
+    assert inventory.find("missing.example.com") is None
+    assert [c.domain for c in inventory.expiring_within(30)] == ["b.example.com", "c.example.com"]
+    assert inventory.expired(datetime.utcnow() + timedelta(days=15))[0].domain == "b.example.com"
+
+
+def test_manager_reads_from_inventory(tmp_path, certs):
+    manager = TraefikManager(traefik_dir=str(tmp_path / "traefik"))
+    write_acme(manager.acme_file, [(d, [], blob) for d, blob in certs.items()])
+
+    assert len(manager.list_certificates()) == 3
+    info = manager.get_certificate_info("c.example.com")
+    assert info["days_remaining"] in (19, 20)
+    assert [c["domain"] for c in manager.get_expiring_certificates(days=30)] == [
+        "b.example.com", "c.example.com"
+    ]
+    assert manager.get_acme_status()["total_certificates"] == 3
+    assert manager.certificate_inventory.stats["decodes"] == 3
+
+    manager.acme_file.unlink()
+    assert manager.list_certificates() == []
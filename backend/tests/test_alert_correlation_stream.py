@@ -0,0 +1,145 @@
+"""Tests for the streaming alert correlator"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from conftest import FakePool
+from alert_correlation_stream import StreamingCorrelator, TopologyIndex
+from alert_correlation_engine import AlertCorrelationEngine
+
+T0 = datetime(2026, 1, 1, 12, 0)
+
+
+def alert(minutes, device="d1", severity="warning", category="infrastructure", message="cpu high"):
+    return {
+        "id": uuid4(),
+        "device_id": device,
+        "severity": severity,
+        "alert_category": category,
+        "priority_score": 50,
+        "alert_message": message,
+        "created_at": T0 + timedelta(minutes=minutes),
+        "metadata": {},
+    }
+
+
+@pytest.fixture
+def topology():
+    index = TopologyIndex()
+    index.update({
+        "d1": {"rack_id": "r1", "network_segment": "n1", "service": "api"},
+        "d2": {"rack_id": "r1", "network_segment": "n2", "service": "db"},
+        "d3": {"rack_id": "r2", "network_segment": "n2", "service": "web"},
+    })
+    return index
+
+
+def correlator(topology, metric=lambda a: None):
+    return StreamingCorrelator(topology, metric)
+
+
+def test_topology_index_adjacency(topology):
+    assert topology.keys_for("d1") == ("rack_r1", "network_n1", "service_api")
+    assert topology.neighbours("d2") == {"d1", "d3"}
+    assert topology.devices_in("rack_r1") == {"d1", "d2"}
+    assert topology.keys_for("missing")[0] == "rack_unknown"
+
+
+def test_temporal_buckets_match_anchored_windows(topology):
+    stream = correlator(topology)
+    # Bucket anchored at 0 takes 0, 2, 5; 7 opens a new bucket with 9
+    for minutes, device in [(0, "d1"), (2, "d3"), (5, "d3"), (7, "d1"), (9, "d1"), (20, "d3")]:
+        stream.add(alert(minutes, device))
+
+    temporal = sorted(
+        (s for s in stream.drain() if s.correlation_type == "temporal"),
+        key=lambda s: s.window_start,
+    )
+    assert [len(s.alert_ids) for s in temporal] == [3, 2]
+    assert temporal[0].window_end == T0 + timedelta(minutes=5)
+
+
+def test_only_changed_groups_are_emitted_with_stable_ids(topology):
+    stream = correlator(topology)
+    stream.add_many([alert(0, "d1", severity="critical"), alert(1, "d2")])
+
+    first = {s.group_key: s for s in stream.drain() if s.correlation_type == "device_cascade"}
+    assert set(first) == {"rack_r1"}
+    assert first["rack_r1"].root_cause_alert_id is not None
+    assert stream.drain() == []
+
+    stream.add(alert(2, "d2"))
+    grown = {s.group_key: s for s in stream.drain() if s.correlation_type == "device_cascade"}
+    assert grown["rack_r1"].id == first["rack_r1"].id
+    assert len(grown["rack_r1"].alert_ids) == 3
+    assert "network_n2" in grown  # both d2 alerts now share its network segment
+
+
+def test_duplicates_and_expiry(topology):
+    stream = correlator(topology)
+    early = alert(0, "d1")
+    stream.add(early)
+    assert stream.add(early) is False
+
+    stream.add(alert(3, "d2"))
+    stream.add(alert(30, "d2"))
+    assert stream.expire() == 2
+    assert len(stream) == 1
+    # Expired alerts no longer count towards their groups
+    stream.drain()
+    stream.add(alert(31, "d1"))
+    cascade = [s for s in stream.drain() if s.group_key == "rack_r1"]
+    assert len(cascade[0].alert_ids) == 2
+
+
+def test_metric_pattern_needs_three_alerts(topology):
+    stream = correlator(topology, metric=lambda a: "cpu_usage" if "cpu" in a["alert_message"] else None)
+    stream.add_many([alert(0, "d1"), alert(1, "d2")])
+    assert not [s for s in stream.drain() if s.correlation_type == "metric_pattern"]
+
+    stream.add(alert(2, "d3"))
+    [pattern] = [s for s in stream.drain() if s.correlation_type == "metric_pattern"]
+    assert pattern.metadata["metric_name"] == "cpu_usage"
+    assert pattern.metadata["unique_devices"] == 3
+    assert pattern.confidence == pytest.approx(0.8)
+
+
+class FakeConnection:
+    def __init__(self, alerts):
+        self.alerts = alerts
+        self.fetch_args = []
+        self.executed = []
+
+    async def fetch(self, query, *args):
+        self.fetch_args.append(args)
+        if "FROM devices" in query:
+            return []
+        since = args[0] if args else None
+        return [a for a in self.alerts if since is None or a["created_at"] > since]
+
+    async def execute(self, query, *args):
+        self.executed.append(query)
+
+
+@pytest.mark.asyncio
+async def test_engine_only_reads_and_emits_new_alerts():
+    conn = FakeConnection([alert(0, "d1"), alert(1, "d2")])
+    engine = AlertCorrelationEngine(FakePool(conn))
+
+    first = await engine.correlate_alerts()
+    assert {c.correlation_type for c in first} >= {"temporal"}
+
+    # Nothing new: no correlations re-emitted, and the query starts at the
+    # newest alert seen (minus the late-arrival slack)
+    assert await engine.correlate_alerts() == []
+    assert conn.fetch_args[-1] == (T0 + timedelta(minutes=1) - engine.late_arrival_slack,)
+
+    conn.alerts.append(alert(2, "d1"))
+    [temporal] = [c for c in await engine.correlate_alerts() if c.correlation_type == "temporal"]
+    assert len(temporal.alert_ids) == 3
@@ -0,0 +1,207 @@
+"""Tests for the noise reduction indexes and the engine's in-memory suppression path"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from conftest import FakePool
+from alert_noise_index import FingerprintCache, FlapTracker, RateLimiter, SuppressionRuleIndex
+from noise_reduction_engine import NoiseReductionEngine, SuppressionRule
+
+NOW = datetime(2026, 3, 2, 12, 0)  # a Monday
+
+
+def rule(name, rule_type="known_issue", device_id=None, pattern=None, days=None,
+         start=None, end=None, active=True, **metadata):
+    return SuppressionRule(
+        id=uuid4(), rule_name=name, rule_type=rule_type, device_id=device_id,
+        alert_pattern=pattern, start_time=start, end_time=end, days_of_week=days,
+        is_active=active, created_by=uuid4(), metadata=metadata,
+    )
+
+
+def test_rule_index_scopes_and_order():
+    device = uuid4()
+    index = SuppressionRuleIndex([
+        rule("device-disk", device_id=device, pattern="disk"),
+        rule("cpu-metric", pattern="high", metric_name="cpu_usage"),
+        rule("info-only", severity="info"),
+        rule("regex", rule_type="regex", pattern=r"timeout \d+ms"),
+        rule("inactive", pattern="disk", active=False),
+        rule("weekends", pattern="backup", days=[5, 6]),
+    ])
+
+    assert index.size == 5
+    assert index.match(device, "Disk almost full", now=NOW).rule_name == "device-disk"
+    assert index.match(uuid4(), "Disk almost full", now=NOW) is None
+    assert index.match(uuid4(), "CPU high", metric_name="cpu_usage", now=NOW).rule_name == "cpu-metric"
+    assert index.match(uuid4(), "CPU high", metric_name="memory_usage", now=NOW) is None
+    assert index.match(uuid4(), "anything", severity="info", now=NOW).rule_name == "info-only"
+    assert index.match(uuid4(), "Upstream TIMEOUT 300ms", now=NOW).rule_name == "regex"
+    assert index.match(uuid4(), "backup running", now=NOW) is None
+
+
+def test_rule_index_prefers_earlier_rule_across_buckets():
+    device = uuid4()
+    index = SuppressionRuleIndex([
+        rule("global-first", pattern="disk"),
+        rule("device-second", device_id=device, pattern="disk"),
+    ])
+    assert index.match(device, "disk full", now=NOW).rule_name == "global-first"
+
+
+def test_maintenance_window_and_bad_regex():
+    index = SuppressionRuleIndex([
+        rule("broken", rule_type="regex", pattern="(unclosed"),
+        rule("maintenance", start=NOW - timedelta(hours=1), end=NOW + timedelta(hours=1)),
+    ])
+    assert index.size == 1
+    assert index.match(uuid4(), "x", now=NOW).rule_name == "maintenance"
+    assert index.match(uuid4(), "x", now=NOW + timedelta(hours=2)) is None
+
+
+def test_fingerprint_cache_expires_in_insertion_order():
+    cache = FingerprintCache(timedelta(minutes=5))
+    a = FingerprintCache.fingerprint("dev", "anomaly", "cpu high")
+    b = FingerprintCache.fingerprint("dev", "anomaly", "disk full")
+
+    assert cache.seen(a, NOW) is False
+    assert cache.seen(a, NOW + timedelta(minutes=1)) is True
+    assert cache.seen(b, NOW + timedelta(minutes=3)) is False
+    assert cache.seen(a, NOW + timedelta(minutes=5)) is False  # expired and re-added
+    assert len(cache) == 2
+    cache.seen(FingerprintCache.fingerprint("other"), NOW + timedelta(minutes=20))
+    assert len(cache) == 1
+
+
+def test_rate_limiter_window_and_idle_keys():
+    limiter = RateLimiter(threshold=3, window=timedelta(minutes=60))
+    results = [limiter.hit("k", NOW + timedelta(minutes=i))[0] for i in range(4)]
+    assert results == [False, False, False, True]
+
+    # Oldest event leaves the window
+    assert limiter.hit("k", NOW + timedelta(minutes=61))[0] is False
+    limiter.hit("other", NOW + timedelta(hours=5))
+    assert len(limiter) == 1
+
+
+def test_flap_tracker_ring():
+    tracker = FlapTracker(threshold=4, window=timedelta(minutes=30))
+    states = ["open", "closed"] * 3
+    for i, state in enumerate(states):
+        tracker.observe("k", state, NOW + timedelta(minutes=i))
+
+    assert tracker.is_flapping("k", NOW + timedelta(minutes=6))
+    assert tracker.transitions("k", NOW + timedelta(minutes=6)) == 4
+    assert not tracker.is_flapping("k", NOW + timedelta(minutes=40))
+    assert not tracker.is_flapping("unknown", NOW)
+
+
+def test_flap_tracker_merge_keeps_live_transitions():
+    live = FlapTracker(threshold=4, window=timedelta(minutes=30))
+    for i, state in enumerate(["open", "closed", "open"]):
+        live.observe("k", state, NOW + timedelta(minutes=i))
+    live.observe("quiet", "open", NOW)
+    since = NOW + timedelta(minutes=2, seconds=30)
+    live.observe("k", "closed", NOW + timedelta(minutes=3))
+    live.observe("new", "open", NOW + timedelta(minutes=3))
+
+    # History loaded at `since` already holds the first two transitions of "k"
+    history = FlapTracker(threshold=4, window=timedelta(minutes=30))
+    for i, state in enumerate(["open", "closed", "open"]):
+        history.observe("k", state, NOW + timedelta(minutes=i))
+    history.observe("other", "open", NOW)
+
+    live.merge(history, since)
+
+    assert live.transitions("k", NOW + timedelta(minutes=4)) == 3
+    assert len(live) == 3  # "quiet" aged out of the history, "new" arrived after it
+    live.observe("k", "open", NOW + timedelta(minutes=4))
+    assert live.is_flapping("k", NOW + timedelta(minutes=5))
+
+
+class FakeConnection:
+    def __init__(self, rules, alerts=()):
+        self.rules = rules
+        self.alerts = list(alerts)
+        self.queries = 0
+
+    async def fetch(self, query, *args):
+        self.queries += 1
+        if "alert_suppression_rules" in query:
+            return self.rules
+        return self.alerts
+
+
+@pytest.mark.asyncio
+async def test_engine_alert_storm_does_not_query_per_alert():
+    maintenance = {
+        "id": uuid4(), "rule_name": "maintenance", "rule_type": "maintenance",
+        "device_id": None, "alert_pattern": "planned", "start_time": None, "end_time": None,
+        "days_of_week": None, "is_active": True, "created_by": uuid4(), "metadata": "{}",
+    }
+    conn = FakeConnection([maintenance])
+    engine = NoiseReductionEngine(FakePool(conn))
+    devices = [uuid4() for _ in range(200)]
+
+    reasons = []
+    for i in range(2000):
+        device = devices[i % len(devices)]
+        suppressed, reason = await engine.should_suppress_alert(
+            device, "anomaly", f"cpu high #{i}", "warning", metric_name="cpu_usage"
+        )
+        reasons.append(reason)
+
+    # One rules load and one flapping history load for the whole storm
+    assert conn.queries == 2
+    assert reasons == [None] * 2000
+    # 10 alerts per device per hour, then rate limited
+    assert await engine.should_suppress_alert(devices[0], "anomaly", "cpu high #new", "warning") == (
+        True, "rate_limited"
+    )
+
+    assert await engine.should_suppress_alert(uuid4(), "anomaly", "planned work", "info") == (True, "maintenance")
+    assert await engine.should_suppress_alert(devices[0], "anomaly", "cpu high #0", "warning") == (True, "duplicate_alert")
+
+
+@pytest.mark.asyncio
+async def test_engine_flapping_from_history_and_live_updates():
+    device = uuid4()
+    start = datetime.utcnow() - timedelta(minutes=10)
+    history = [
+        {"device_id": device, "alert_type": "anomaly", "status": status,
+         "created_at": start + timedelta(minutes=i)}
+        for i, status in enumerate(["open", "closed", "open", "closed"])
+    ]
+    conn = FakeConnection([], history)
+    engine = NoiseReductionEngine(FakePool(conn))
+
+    # 3 transitions replayed from history; evaluating alerts is not a transition
+    assert await engine.should_suppress_alert(device, "anomaly", "flappy 1", "warning") == (False, None)
+    assert await engine.should_suppress_alert(device, "anomaly", "flappy 2", "warning") == (False, None)
+    assert engine.flap_tracker.transitions((device, "anomaly")) == 3
+
+    # Raising (4th transition) and resolving (5th) tips it over
+    engine.record_alert_status(device, "anomaly", "open")
+    engine.record_alert_status(device, "anomaly", "resolved")
+    assert await engine.should_suppress_alert(device, "anomaly", "flappy 3", "warning") == (
+        True, "flapping_detected"
+    )
+
+    # A reload takes the persisted history (3 transitions here) but keeps a
+    # transition recorded while its query was running
+    load_history = conn.fetch
+
+    async def fetch(query, *args):
+        rows = await load_history(query, *args)
+        engine.record_alert_status(device, "anomaly", "open")
+        return rows
+
+    conn.fetch = fetch
+    await engine._refresh_flapping_state()
+    assert engine.flap_tracker.transitions((device, "anomaly")) == 4
@@ -0,0 +1,178 @@
+"""Tests for the vectorized batch forecaster and the batched prediction engine"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import numpy as np
+import pytest
+from scipy import stats
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from conftest import FakePool
+import batch_forecaster
+from batch_forecaster import SeriesBatch, align_series
+from prediction_engine import PredictionEngine
+
+
+def make_batch(values, step_seconds=3600):
+    values = np.asarray(values, dtype=float)
+    keys = [(f"dev{i}", "disk_usage") for i in range(values.shape[0])]
+    return SeriesBatch(keys, datetime(2026, 1, 1), step_seconds, values)
+
+
+def test_linear_fit_matches_linregress_per_row():
+    rng = np.random.default_rng(1)
+    x = np.arange(48, dtype=float)
+    values = rng.normal(50, 5, (4, 48)) + np.outer([0.5, -0.3, 0.0, 2.0], x)
+    values[2, 10:20] = np.nan  # gaps are ignored
+
+    fit = batch_forecaster.linear_fit(x, values)
+
+    for i in range(4):
+        keep = ~np.isnan(values[i])
+        expected = stats.linregress(x[keep], values[i, keep])
+        assert fit['slope'][i] == pytest.approx(expected.slope)
+        assert fit['intercept'][i] == pytest.approx(expected.intercept)
+        assert fit['r_value'][i] == pytest.approx(expected.rvalue)
+        assert fit['p_value'][i] == pytest.approx(expected.pvalue, abs=1e-12)
+
+
+def test_exponential_smooth_matches_recursive_definition():
+    rng = np.random.default_rng(2)
+    values = rng.normal(50, 10, (3, 30))
+
+    smoothed = batch_forecaster.exponential_smooth(values, alpha=0.3)
+
+    for row, result in zip(values, smoothed):
+        expected = [row[0]]
+        for v in row[1:]:
+            expected.append(0.3 * v + 0.7 * expected[-1])
+        np.testing.assert_allclose(result, expected)
+
+
+def test_crossing_hours_vectorized():
+    hours = np.arange(24, dtype=float)
+    values = np.vstack([
+        50 + 2 * hours,   # rising 2/h, last value 96 -> already past 90
+        40 + 2 * hours,   # rising 2/h, last value 86 -> hits 90 in 2h
+        80 - 3 * hours,   # falling 3/h, last value 11 -> hits 10 in 1/3h
+        np.full(24, 60),  # flat
+    ])
+    batch = make_batch(values)
+    fit = batch_forecaster.linear_fit(batch.hours, batch.values)
+
+    result = batch_forecaster.crossing_hours(batch, fit, np.full(4, 90.0), np.full(4, 10.0))
+
+    assert np.isnan(result['hours'][0])
+    assert result['hours'][1] == pytest.approx(2.0)
+    assert result['hours'][2] == pytest.approx(1 / 3)
+    assert np.isnan(result['hours'][3])
+    assert list(result['trend']) == ['increasing', 'increasing', 'decreasing', 'stable']
+
+
+def test_align_series_buckets_rows_from_one_query():
+    start = datetime(2026, 1, 1)
+    keys = [("a", "cpu_usage"), ("b", "cpu_usage")]
+    rows = [
+        ("a", "cpu_usage", start + timedelta(minutes=5), 10.0),
+        ("b", "cpu_usage", start + timedelta(minutes=30), 20.0),
+        ("a", "cpu_usage", start + timedelta(minutes=50), 11.0),  # same bucket, later wins
+        ("a", "cpu_usage", start + timedelta(hours=2), 12.0),
+        ("c", "cpu_usage", start, 99.0),  # not requested
+    ]
+
+    batch = align_series(rows, keys, start, start + timedelta(hours=3))
+
+    assert batch.values.shape == (2, 3)
+    np.testing.assert_array_equal(batch.values[0], [11.0, np.nan, 12.0])
+    assert list(batch.last_values()) == [12.0, 20.0]
+    assert batch.counts.tolist() == [2, 1]
+
+
+class FakeConnection:
+    def __init__(self, samples=()):
+        self.samples = list(samples)
+        self.fetch_calls = []
+        self.executemany_calls = []
+
+    async def fetch(self, query, device_ids, metric_names, start, end):
+        self.fetch_calls.append((device_ids, metric_names))
+        start, end = start.replace(tzinfo=None), end.replace(tzinfo=None)
+        return [
+            {'device_id': d, 'metric_name': m, 'timestamp': ts, 'value': v}
+            for d, m, ts, v in self.samples
+            if d in device_ids and m in metric_names and start <= ts < end
+        ]
+
+    async def executemany(self, query, args):
+        self.executemany_calls.append(list(args))
+
+
+def hourly_samples(devices, metrics, hours):
+    rng = np.random.default_rng(7)
+    now = datetime.utcnow()
+    return [
+        (device_id, metric, now - timedelta(hours=hours - h, minutes=30), 50 + 0.2 * h + rng.normal(0, 2))
+        for device_id in devices for metric in metrics for h in range(hours)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_fetch_history_batch_loads_fleet_in_one_query():
+    devices = [uuid4(), uuid4()]
+    samples = hourly_samples(devices[:1], ['cpu_usage'], 48)
+    samples.append((devices[1], 'cpu_usage', datetime.utcnow() - timedelta(days=9), 99.0))
+    conn = FakeConnection(samples)
+    engine = PredictionEngine(FakePool(conn))
+
+    batch = await engine.fetch_history_batch(devices, ['cpu_usage', 'disk_usage'], days=7)
+
+    assert len(conn.fetch_calls) == 1
+    assert batch.keys == [(d, m) for d in devices for m in ['cpu_usage', 'disk_usage']]
+    assert batch.values.shape == (4, 7 * 24)
+    # Samples older than the window are dropped; series without samples stay empty
+    assert batch.counts.tolist() == [48, 0, 0, 0]
+
+
+@pytest.mark.asyncio
+async def test_forecast_batch_saves_with_one_bulk_insert():
+    devices = [uuid4() for _ in range(25)]
+    pool = FakePool(FakeConnection(hourly_samples(devices, ['cpu_usage', 'disk_usage'], 7 * 24)))
+    engine = PredictionEngine(pool)
+
+    predictions = await engine.forecast_batch(devices, ['cpu_usage', 'disk_usage'], [60, 180])
+
+    assert len(pool.conn.fetch_calls) == 1
+    assert len(predictions) == 25 * 2 * 2
+    assert len(pool.conn.executemany_calls) == 1
+    assert len(pool.conn.executemany_calls[0]) == len(predictions)
+    assert {p.model_type for p in predictions} <= {'linear', 'exponential'}
+    assert all(p.confidence_lower <= p.predicted_value <= p.confidence_upper for p in predictions)
+
+
+@pytest.mark.asyncio
+async def test_exhaustion_batch_uses_per_resource_thresholds():
+    engine = PredictionEngine(FakePool(FakeConnection()))
+    devices = [uuid4(), uuid4()]
+    hours = np.arange(72, dtype=float)
+
+    async def fetch(device_ids, metric_names, days=7):
+        keys = [(d, m) for d in device_ids for m in metric_names]
+        # First device: disk climbing 1%/h towards 95% (reached in ~4h);
+        # everything else flat
+        values = np.tile(np.full(72, 40.0), (len(keys), 1))
+        values[keys.index((devices[0], 'disk_usage'))] = 20 + hours
+        return SeriesBatch(keys, datetime.utcnow() - timedelta(days=3), 3600, values)
+
+    engine.fetch_history_batch = fetch
+    warnings = await engine.detect_resource_exhaustion_batch(devices)
+
+    assert list(warnings) == [devices[0]]
+    [warning] = warnings[devices[0]]
+    assert warning['resource'] == 'disk_usage'
+    assert warning['threshold'] == 95
+    assert warning['growth_rate_per_hour'] == pytest.approx(1.0)
+    assert warning['severity'] == 'error'
@@ -0,0 +1,205 @@
+"""Tests for the streaming budget tracker"""
+
+import asyncio
+import os
+import sys
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from conftest import FakePool
+import budget_tracker as budget_tracker_module
+from budget_tracker import BudgetTracker
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    async def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = str(value)
+        return True
+
+    async def incrbyfloat(self, key, amount):
+        value = float(self.data.get(key, 0)) + amount
+        self.data[key] = str(value)
+        return value
+
+    async def eval(self, script, numkeys, key, amount, seed, ttl):
+        # budget_tracker._REDIS_ADD
+        self.data.setdefault(key, str(seed))
+        return await self.incrbyfloat(key, amount)
+
+    async def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1)
+        return int(self.data[key])
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+
+class FakeConnection:
+    def __init__(self, rows):
+        self.rows = rows
+        self.fetches = 0
+
+    async def fetch(self, query, *args):
+        self.fetches += 1
+        return self.rows
+
+    async def executemany(self, query, args):
+        spend = {budget_id: total for budget_id, total in args}
+        for row in self.rows:
+            if row['id'] not in spend:
+                continue
+            if "current_spend + $2" in query:
+                row['current_spend'] += spend[row['id']]
+            elif "GREATEST" in query:
+                row['current_spend'] = max(row['current_spend'], spend[row['id']])
+            else:
+                row['current_spend'] = spend[row['id']]
+
+
+class FakeManager:
+    def __init__(self):
+        self.alerts = []
+
+    async def trigger_budget_alerts(self, budget_id):
+        self.alerts.append(budget_id)
+        return {"budget_id": budget_id}
+
+
+def budget_row(budget_id, org, limit, spend="0", alert_enabled=True):
+    return {
+        'id': budget_id, 'organization_id': org, 'total_limit': Decimal(limit),
+        'warning_threshold': Decimal("0.75"), 'critical_threshold': Decimal("0.90"),
+        'start_date': date.today() - timedelta(days=3), 'end_date': date.today() + timedelta(days=27),
+        'current_spend': Decimal(spend), 'alert_enabled': alert_enabled, 'is_active': True,
+    }
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    manager = FakeManager()
+
+    async def get_budget_manager(pool):
+        return manager
+
+    monkeypatch.setattr(budget_tracker_module, "get_budget_manager", get_budget_manager)
+    return manager
+
+
+async def make_tracker(rows, redis=None):
+    tracker = BudgetTracker()
+    tracker.db_pool = FakePool(FakeConnection(rows))
+    tracker.redis = redis
+    await tracker.reconcile()
+    return tracker
+
+
+@pytest.mark.asyncio
+async def test_alert_fires_once_per_threshold_crossing(manager):
+    tracker = await make_tracker([budget_row("b1", "org-1", "100", spend="70")])
+
+    await tracker.record_spend("org-1", 4.0)     # 74: below warning
+    await tracker.record_spend("org-other", 50)  # no budget
+    assert manager.alerts == []
+
+    await tracker.record_spend("org-1", 2.0)     # 76: warning
+    await tracker.record_spend("org-1", 1.0)     # 77: still warning
+    await asyncio.gather(*tracker._alert_tasks)
+    assert manager.alerts == ["b1"]
+
+    await tracker.record_spend("org-1", 30.0)    # 107: straight to exceeded
+    await asyncio.gather(*tracker._alert_tasks)
+    assert manager.alerts == ["b1", "b1"]
+    assert tracker.crossings == 2
+
+    # The alert path wrote the running total back first
+    assert tracker.db_pool.conn.rows[0]['current_spend'] == Decimal("107.0")
+    live = await tracker.live_spend(["b1", "unknown"])
+    assert live == {"b1": Decimal("107.0")}
+
+
+@pytest.mark.asyncio
+async def test_workers_share_totals_and_reload_budgets(manager):
+    redis = FakeRedis()
+    rows = [budget_row("b1", "org-1", "100", spend="10", alert_enabled=False)]
+    worker_a = await make_tracker(rows, redis)
+    worker_b = await make_tracker(rows, redis)
+
+    await worker_a.record_spend("org-1", 5)
+    await worker_b.record_spend("org-1", 5)
+    assert (await worker_b.live_spend(["b1"]))["b1"] == Decimal("20.0")
+
+    # Reseeding on reconcile keeps the shared total
+    await worker_b.reconcile()
+    assert rows[0]['current_spend'] == Decimal("20.0")
+    assert redis.data["budget:spend:b1"] == "20.0"
+
+    # A budget created on worker A reaches worker B through the generation
+    new_row = budget_row("b2", "org-2", "50")
+    rows.append(new_row)
+    await worker_a.budget_changed(new_row)
+    assert await worker_b._generation_changed()
+    await worker_b.reconcile()
+    await worker_b.record_spend("org-2", 45)
+    await asyncio.gather(*worker_b._alert_tasks)
+    assert manager.alerts == ["b2"]
+
+    await worker_a.budget_changed(budget_id="b2")
+    assert "b2" not in worker_a.budgets
+    assert "budget:spend:b2" not in redis.data
+
+
+@pytest.mark.asyncio
+async def test_lost_redis_total_is_reseeded_and_never_lowers_stored_spend(manager):
+    redis = FakeRedis()
+    rows = [budget_row("b1", "org-1", "100", spend="40", alert_enabled=False)]
+    tracker = await make_tracker(rows, redis)
+    await tracker.record_spend("org-1", 5)
+    await tracker.flush()
+    assert rows[0]['current_spend'] == Decimal("45.0")
+
+    # Redis restarted: the next charge continues from the stored spend
+    redis.data.clear()
+    await tracker.record_spend("org-1", 1)
+    assert redis.data["budget:spend:b1"] == "46.0"
+
+    # A total that still ended up low is not written over the stored spend
+    redis.data["budget:spend:b1"] = "2.0"
+    await tracker.flush()
+    assert rows[0]['current_spend'] == Decimal("45.0")
+
+    # ...except by an explicit reset after a recalculation
+    await tracker.reset("b1", Decimal("30"))
+    assert rows[0]['current_spend'] == Decimal("30.0")
+
+
+@pytest.mark.asyncio
+async def test_workers_without_redis_add_their_own_spend(manager):
+    rows = [budget_row("b1", "org-1", "100", spend="10", alert_enabled=False)]
+    worker_a = await make_tracker(rows)
+    worker_b = await make_tracker(rows)
+
+    await worker_a.record_spend("org-1", 5)
+    await worker_b.record_spend("org-1", 7)
+    await worker_a.flush()
+    await worker_b.flush()
+    await worker_b.flush()
+    assert rows[0]['current_spend'] == Decimal("22.0")
+
+    # Reconciling picks up the other worker's spend
+    await worker_a.reconcile()
+    assert (await worker_a.live_spend(["b1"]))["b1"] == Decimal("22.0")
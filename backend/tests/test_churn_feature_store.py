@@ -0,0 +1,110 @@
+"""Tests for the churn feature store"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import churn_feature_store as store_module
+from churn_feature_store import ChurnFeatureStore, FeatureMatrix, build_feature_matrix, score_matrix
+
+
+NOW = datetime.now()
+
+
+def user(user_id, signup_days, login_days=None):
+    return {
+        "user_id": user_id,
+        "username": user_id,
+        "created_at": NOW - timedelta(days=signup_days),
+        "last_login": NOW - timedelta(days=login_days) if login_days is not None else None,
+        "login_count": 0,
+    }
+
+
+USERS = [
+    user("active", 200, 2),
+    user("fading", 200, 45),
+    user("gone", 400, 100),
+    user("never", 35),          # no login: idle since signup
+    {"user_id": "no-signup", "username": "x", "created_at": None},
+]
+
+
+class FakePredictor:
+    def __init__(self):
+        self.calls = 0
+
+    def predict_proba_matrix(self, features):
+        self.calls += 1
+        # last_login_days_ago column, never-logged-in users at 999
+        return np.clip(features[:, 4] / 100, 0, 1)
+
+
+def test_vectorized_heuristic_matches_the_per_user_rules():
+    matrix = build_feature_matrix(USERS, {"active": {"total_actions": 60, "active_days": 10}})
+    scores = score_matrix(matrix, now=NOW.timestamp())
+
+    assert len(matrix) == 4
+    assert matrix.column("feature_usage_score")[0] == 100
+    assert scores.method == "heuristic"
+    rows = {row["user_id"]: row for row in map(scores.row, range(len(matrix)))}
+    assert rows["active"]["churn_probability"] == 1.0 and rows["active"]["risk_level"] == "low"
+    assert rows["fading"]["churn_probability"] == 45.0 and rows["fading"]["risk_level"] == "medium"
+    assert rows["gone"]["churn_probability"] == 70.0 and rows["gone"]["risk_level"] == "high"
+    assert rows["never"]["last_login_days_ago"] == 35 and rows["never"]["churn_probability"] == 35.0
+    assert list(matrix.user_ids[scores.order]) == ["gone", "fading", "never", "active"]
+
+
+def test_model_scores_use_the_same_matrix():
+    matrix = build_feature_matrix(USERS, {})
+    predictor = FakePredictor()
+    scores = score_matrix(matrix, predictor, now=NOW.timestamp())
+
+    assert scores.method == "model"
+    assert predictor.calls == 1
+    # Never logged in maps to 999 days like ChurnPredictor.prepare_features
+    assert scores.probability[list(matrix.user_ids).index("never")] == 100.0
+    assert list(scores.by_risk) == ["low", "medium", "high"]
+    assert list(matrix.user_ids[scores.by_risk["high"]]) == ["gone", "never"]
+
+
+@pytest.mark.asyncio
+async def test_store_builds_once_and_pages_precomputed_scores(tmp_path, monkeypatch):
+    monkeypatch.setattr(store_module, "MODEL_FILE", tmp_path / "churn_model.pkl")
+    fetches = []
+
+    async def fetch_users():
+        fetches.append(1)
+        return USERS
+
+    async def no_activity(self):
+        return {}
+
+    monkeypatch.setattr(ChurnFeatureStore, "_fetch_activity", no_activity)
+    path = tmp_path / "churn_features.npz"
+
+    worker_a = ChurnFeatureStore(path=path)
+    await worker_a.ensure_scored(fetch_users)
+    assert path.exists() and len(fetches) == 1
+
+    assert [p["user_id"] for p in worker_a.page(limit=2)] == ["gone", "fading"]
+    assert [p["user_id"] for p in worker_a.page(offset=2, limit=2)] == ["never", "active"]
+    assert [p["user_id"] for p in worker_a.page("medium")] == ["fading", "never"]
+    assert worker_a.count("high") == 1
+    assert worker_a.get_user("active")["risk_level"] == "low"
+    assert worker_a.get_user("no-signup") is None
+
+    # Another worker loads the fresh file instead of fetching users again
+    worker_b = ChurnFeatureStore(path=path)
+    await worker_b.ensure_scored(fetch_users)
+    assert len(fetches) == 1
+    assert worker_b.page() == worker_a.page()
+
+    loaded = FeatureMatrix.load(path)
+    assert list(loaded.user_ids) == list(worker_a.matrix.user_ids)
+    assert np.array_equal(np.isnan(loaded.raw), np.isnan(worker_a.matrix.raw))
@@ -0,0 +1,139 @@
+"""Tests for the cost cube statistics and their use in CostAnalysisEngine"""
+
+import os
+import re
+import sys
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from cost_analysis_engine import CostAnalysisEngine, PeriodType
+from cost_cubes import ROLLUP_QUERY, cube_grain, score_anomalies, series_stats
+
+
+class FakePool:
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    async def fetch(self, query, *args):
+        self.queries.append((query, args))
+        return self.rows
+
+
+def test_series_stats_match_the_python_formulas():
+    values = np.array([10.0, 12.0, 11.0, 20.0, 22.0, 21.0])
+    stats = series_stats(values)
+    assert stats.total == 96.0
+    assert stats.mean == 16.0
+    assert stats.std == pytest.approx(np.sqrt(np.mean((values - 16.0) ** 2)))
+    assert stats.trend_percentage == pytest.approx((21.0 - 11.0) / 11.0 * 100)
+    assert stats.growth_rate == pytest.approx((21.0 - 10.0) / 6)
+
+
+def test_anomaly_scores_ignore_missing_days_and_flat_series():
+    nan = np.nan
+    costs = np.array([
+        [10, 10, 11, 9, 10, 10, 10, 60],    # spike on the last day
+        [5, 5, 5, 5, 5, 5, 5, 5],           # no variation
+        [nan, nan, nan, nan, nan, nan, 4, 40],  # too few points
+        [10, nan, 10, 11, nan, 9, 10, 10],  # gaps, steady
+    ], dtype=float)
+    scores = score_anomalies(costs)
+    assert scores.z.shape == (4, 2)
+    assert scores.z[0, 1] > 2.5
+    assert np.isnan(scores.z[1]).all()
+    assert np.isnan(scores.z[2]).all()
+    assert scores.mean[3] == pytest.approx(10.0)
+    assert scores.z[3, 1] < 1
+
+
+def test_cube_grain():
+    now = datetime(2026, 10, 18)
+    assert cube_grain(now - timedelta(days=1), now) == "hourly"
+    assert cube_grain(now - timedelta(days=30), now) == "daily"
+
+
+@pytest.mark.asyncio
+async def test_detect_cost_anomalies_over_the_daily_cube():
+    start = datetime(2026, 10, 1)
+    rows = []
+    for day in range(20):
+        spike = day == 19
+        rows.append({
+            "period_start": start + timedelta(days=day), "model_name": "gpt-4",
+            "daily_cost": Decimal("500") if spike else Decimal("20") + day % 2,
+            "daily_requests": 5000 if spike else 200,
+        })
+        rows.append({
+            "period_start": start + timedelta(days=day), "model_name": "claude-3-haiku",
+            "daily_cost": Decimal("3") + day % 2, "daily_requests": 100,
+        })
+    engine = CostAnalysisEngine(FakePool(rows))
+
+    anomalies = await engine.detect_cost_anomalies("org-1", lookback_days=20)
+
+    assert len(anomalies) == 1
+    anomaly = anomalies[0]
+    assert anomaly.model_name == "gpt-4"
+    assert anomaly.timestamp == start + timedelta(days=19)
+    assert anomaly.actual_cost == Decimal("500.0")
+    # A single spike among n points scores sqrt(n - 1) ~ 4.36
+    assert anomaly.severity == "high"
+    assert set(anomaly.contributing_factors) == {"Unusually high cost", "High request volume"}
+
+
+@pytest.mark.asyncio
+async def test_cost_trends_read_one_grain_and_reject_unknown_metrics():
+    start = datetime(2026, 10, 1)
+    rows = [{"period_start": start + timedelta(days=i), "value": Decimal(v)}
+            for i, v in enumerate(["10", "10", "20", "20"])]
+    pool = FakePool(rows)
+    engine = CostAnalysisEngine(pool)
+
+    trend = await engine.get_cost_trends("org-1", days=4, period_type=PeriodType.WEEKLY)
+    query, args = pool.queries[0]
+    assert "date_trunc('week', period_start)" in query
+    assert args[-1] == "daily"
+    assert trend.trend_direction == "increasing"
+    assert trend.total == Decimal("60.0")
+    assert trend.predicted_next_period == Decimal("22.5")
+
+    with pytest.raises(ValueError):
+        await engine.get_cost_trends("org-1", metric="1; DROP TABLE budgets")
+
+
+def _rollup_parts():
+    columns = [c.strip() for c in re.search(r"INSERT INTO cost_analysis \((.*?)\)", ROLLUP_QUERY, re.S).group(1).split(",")]
+    select = re.search(r"SELECT\n(.*?)\n    FROM credit_transactions", ROLLUP_QUERY, re.S).group(1)
+    expressions = [e.strip() for e in re.split(r",\n", select)]
+    # The trailing constants share a line
+    expressions = expressions[:-1] + [e.strip() for e in expressions[-1].split(",")]
+    group_by = [int(p) for p in re.search(r"GROUP BY ([\d, ]+)", ROLLUP_QUERY).group(1).split(",")]
+    conflict = [c.strip() for c in re.search(r"ON CONFLICT \((.*?)\)", ROLLUP_QUERY).group(1).split(",")]
+    return columns, expressions, group_by, conflict
+
+
+def test_rollup_emits_one_row_per_conflict_key_across_providers():
+    columns, expressions, group_by, conflict = _rollup_parts()
+    assert len(columns) == len(expressions)
+    grouped = {columns[position - 1] for position in group_by}
+    # period_end is derived from period_start; everything else is the unique key,
+    # so debits of one model under two providers cannot hit the same row twice
+    assert grouped - {"period_end"} == set(conflict)
+    provider = expressions[columns.index("provider")]
+    assert provider.startswith("MIN(")
+
+
+def test_rollup_only_casts_uuid_ids():
+    _, expressions, _, _ = _rollup_parts()
+    assert expressions[0] == "org.org_id::uuid" and expressions[1] == "ct.user_id::uuid"
+    pattern = re.search(r"org\.org_id ~\* '(.*?)'", ROLLUP_QUERY).group(1)
+    assert re.search(r"ct\.user_id::text ~\* '" + re.escape(pattern) + "'", ROLLUP_QUERY)
+    assert re.match(pattern, "3F2504E0-4F89-11D3-9A0C-0305E82C3301", re.I)
+    assert not re.match(pattern, "org_1234567890abcdef", re.I)
+    assert not re.match(pattern, "keycloak-user-17", re.I)
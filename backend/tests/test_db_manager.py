@@ -0,0 +1,221 @@
+"""Tests for the app-wide database connection manager"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import db_manager as db_manager_module
+from db_manager import DatabaseManager, _parse_budgets, _primary_dsn
+
+
+class FakeConnection:
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def fetchval(self, query, *args, **kwargs):
+        return 1
+
+    async def fetch(self, query, *args, **kwargs):
+        return [{"pool": self.pool.name}]
+
+    def is_closed(self):
+        return False
+
+
+class FakePool:
+    def __init__(self, name, fail=False):
+        self.name = name
+        self.fail = fail
+        self.in_use = 0
+        self.closed = False
+
+    async def acquire(self, timeout=None):
+        if self.fail:
+            raise OSError("connection refused")
+        self.in_use += 1
+        return FakeConnection(self)
+
+    async def release(self, conn):
+        self.in_use -= 1
+
+    async def close(self):
+        self.closed = True
+
+    def get_size(self):
+        return 4
+
+    def get_idle_size(self):
+        return 4 - self.in_use
+
+    def get_max_size(self):
+        return 10
+
+
+@pytest.fixture
+def pools(monkeypatch):
+    created = {}
+
+    async def create_pool(dsn, **kwargs):
+        created[dsn] = FakePool(dsn, fail="broken" in dsn)
+        created[dsn].kwargs = kwargs
+        return created[dsn]
+
+    monkeypatch.setattr(db_manager_module.asyncpg, "create_pool", create_pool)
+    return created
+
+
+def make_manager(**kwargs):
+    kwargs.setdefault("dsn", "postgresql://primary/db")
+    kwargs.setdefault("replica_dsn", "")
+    kwargs.setdefault("max_size", 10)
+    return DatabaseManager(**kwargs)
+
+
+def test_primary_dsn_and_budget_parsing(monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", "postgresql+asyncpg://u:p@db:5432/app")
+    assert _primary_dsn() == "postgresql://u:p@db:5432/app"
+
+    monkeypatch.setenv("DATABASE_URL", "sqlite:///local.db")
+    monkeypatch.setenv("POSTGRES_HOST", "pg")
+    monkeypatch.setenv("POSTGRES_PASSWORD", "p@ss/word")
+    assert _primary_dsn() == "postgresql://unicorn:p%40ss%2Fword@pg:5432/unicorn_db"
+
+    assert _parse_budgets("analytics=2, billing=12,bogus,x=0") == {"analytics": 2, "billing": 12, "x": 1}
+
+
+@pytest.mark.asyncio
+async def test_one_pool_shared_with_statement_cache(pools):
+    manager = make_manager(statement_cache_size=0)
+
+    await asyncio.gather(manager.start(), manager.start())
+    async with manager.acquire("billing"):
+        pass
+    await manager.connect("fleet")
+
+    assert list(pools) == ["postgresql://primary/db"]
+    assert pools["postgresql://primary/db"].kwargs["statement_cache_size"] == 0
+    assert pools["postgresql://primary/db"].kwargs["max_size"] == 10
+
+
+@pytest.mark.asyncio
+async def test_subsystem_budget_bounds_concurrency(pools):
+    manager = make_manager(budgets={"email": 2})
+    release = asyncio.Event()
+    peak = 0
+
+    async def worker():
+        nonlocal peak
+        async with manager.acquire("email"):
+            peak = max(peak, manager.metrics()["subsystems"]["email"]["in_use"])
+            await release.wait()
+
+    tasks = [asyncio.create_task(worker()) for _ in range(5)]
+    await asyncio.sleep(0.01)
+    # Other subsystems are not held back by a saturated one
+    async with manager.acquire("billing") as conn:
+        assert await conn.fetchval("SELECT 1") == 1
+    release.set()
+    await asyncio.gather(*tasks)
+
+    email = manager.metrics()["subsystems"]["email"]
+    assert peak == 2
+    assert email["peak"] == 2
+    assert email["acquired"] == 5
+    assert email["waits"] == 3
+    assert email["in_use"] == 0
+
+
+@pytest.mark.asyncio
+async def test_budget_timeout_is_counted(pools):
+    manager = make_manager(budgets={"email": 1})
+    held = await manager.acquire_connection("email")
+
+    with pytest.raises(asyncio.TimeoutError):
+        await manager.acquire_connection("email", timeout=0.01)
+
+    await manager.release_connection(held)
+    stats = manager.metrics()["subsystems"]["email"]
+    assert stats["timeouts"] == 1
+    assert stats["in_use"] == 0
+
+
+@pytest.mark.asyncio
+async def test_pooled_connection_close_returns_to_pool(pools):
+    manager = make_manager()
+
+    conn = await manager.connect("fleet")
+    assert await conn.fetchval("SELECT 1") == 1
+    await conn.close()
+    await conn.close()  # idempotent
+
+    async with await manager.connect("fleet") as conn:
+        await conn.fetch("SELECT 1")
+
+    pool = pools["postgresql://primary/db"]
+    assert pool.in_use == 0
+    assert manager.metrics()["subsystems"]["fleet"]["in_use"] == 0
+    with pytest.raises(Exception):
+        await conn.fetch("SELECT 1")
+
+
+@pytest.mark.asyncio
+async def test_subsystem_pool_supports_both_acquire_styles(pools):
+    manager = make_manager()
+    pool = manager.subsystem("analytics")
+
+    async with pool.acquire() as conn:
+        assert await conn.fetchval("SELECT 1") == 1
+    conn = await pool.acquire()
+    await pool.release(conn)
+    assert await pool.fetch("SELECT 1") == [{"pool": "postgresql://primary/db"}]
+    await pool.close()  # does not close the shared pool
+
+    assert not pools["postgresql://primary/db"].closed
+    assert manager.metrics()["subsystems"]["analytics"]["acquired"] == 3
+    assert manager.metrics()["primary"]["in_use"] == 0
+
+
+@pytest.mark.asyncio
+async def test_readonly_routes_to_replica_and_falls_back(pools):
+    manager = make_manager(replica_dsn="postgresql://replica/db")
+    analytics = manager.subsystem("analytics", readonly=True)
+
+    assert await analytics.fetch("SELECT 1") == [{"pool": "postgresql://replica/db"}]
+    assert await manager.subsystem("billing").fetch("SELECT 1") == [{"pool": "postgresql://primary/db"}]
+
+    pools["postgresql://replica/db"].fail = True
+    assert await analytics.fetch("SELECT 1") == [{"pool": "postgresql://primary/db"}]
+    assert manager.replica_fallbacks == 1
+    assert manager.replica_healthy is False
+
+    pools["postgresql://replica/db"].fail = False
+    health = await manager.health()
+    assert health["status"] == "healthy"
+    assert manager.replica_healthy is True
+    assert manager.metrics()["subsystems"]["analytics"]["replica_acquired"] == 1
+
+
+@pytest.mark.asyncio
+async def test_unavailable_replica_does_not_block_startup(pools, monkeypatch):
+    manager = make_manager(replica_dsn="postgresql://broken-replica/db")
+
+    async def create_pool(dsn, **kwargs):
+        if "broken" in dsn:
+            raise OSError("no route to host")
+        pools[dsn] = FakePool(dsn)
+        return pools[dsn]
+
+    monkeypatch.setattr(db_manager_module.asyncpg, "create_pool", create_pool)
+    await manager.start()
+
+    assert manager.replica is None
+    async with manager.acquire("analytics", readonly=True) as conn:
+        assert (await conn.fetch("SELECT 1"))[0]["pool"] == "postgresql://primary/db"
+
+    await manager.close()
+    assert pools["postgresql://primary/db"].closed
+    assert not manager.started
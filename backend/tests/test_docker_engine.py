@@ -0,0 +1,169 @@
+"""Tests for the shared Docker Engine client and container-state cache"""
+
+import os
+import sys
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from docker_engine import (
+    ContainerInfo,
+    DockerEngineError,
+    DockerState,
+    cpu_percent_between,
+)
+
+
+def inspect_payload(container_id, name, status="running", started_at=None, labels=None):
+    return {
+        "Id": container_id,
+        "Name": f"/{name}",
+        "State": {"Status": status, "StartedAt": started_at or "0001-01-01T00:00:00Z"},
+        "Config": {"Image": f"{name}:latest", "Labels": labels or {}, "Tty": False},
+        "NetworkSettings": {
+            "Ports": {"8084/tcp": [{"HostPort": "8084"}]},
+            "Networks": {"unicorn-network": {"IPAddress": "172.20.0.5"}},
+        },
+    }
+
+
+class FakeEngine:
+    """In-memory stand-in for DockerEngineClient"""
+
+    socket_path = "/fake/docker.sock"
+
+    def __init__(self, containers):
+        self.containers = {c["Id"]: c for c in containers}
+        self.events_queue: asyncio.Queue = asyncio.Queue()
+        self.inspect_calls = 0
+
+    async def list_containers(self, all=True, filters=None):
+        return [{"Id": cid} for cid in self.containers]
+
+    async def inspect_container(self, container_id):
+        self.inspect_calls += 1
+        if container_id not in self.containers:
+            raise DockerEngineError(404, "no such container")
+        return self.containers[container_id]
+
+    async def container_stats(self, container_id):
+        return {
+            "cpu_stats": {"cpu_usage": {"total_usage": 100}, "system_cpu_usage": 1000},
+            "memory_stats": {"usage": 50 * 1024 ** 2, "limit": 1024 ** 3},
+        }
+
+    async def events(self, since=None, filters=None):
+        while True:
+            yield await self.events_queue.get()
+
+    async def logs(self, container_id, follow=False, since=None, tail=None, timestamps=True, tty=False):
+        for line in self.containers[container_id].get("Logs", []):
+            yield "stdout", line
+
+    async def close(self):
+        pass
+
+
+def test_container_info_from_inspect():
+    started = (datetime.now(timezone.utc) - timedelta(seconds=90)).strftime("%Y-%m-%dT%H:%M:%S.%f") + "123Z"
+    info = ContainerInfo.from_inspect(
+        inspect_payload("abc123", "ops-center", started_at=started, labels={"traefik.enable": "true"})
+    )
+
+    assert info.name == "ops-center"
+    assert info.image == "ops-center:latest"
+    assert info.running
+    assert info.labels["traefik.enable"] == "true"
+    assert "unicorn-network" in info.networks
+    assert 89 <= info.uptime_seconds() <= 95
+
+
+def test_never_started_container_has_no_uptime():
+    info = ContainerInfo.from_inspect(inspect_payload("abc123", "worker", status="created"))
+
+    assert info.started_at is None
+    assert info.uptime_seconds() is None
+
+
+def test_cpu_percent_between_samples():
+    previous = {"cpu_stats": {"cpu_usage": {"total_usage": 1000}, "system_cpu_usage": 10000}}
+    current = {"cpu_stats": {"cpu_usage": {"total_usage": 1500}, "system_cpu_usage": 20000}}
+
+    assert cpu_percent_between(previous, current) == pytest.approx(5.0)
+    assert cpu_percent_between(current, previous) == 0.0
+    assert cpu_percent_between({}, current) == 0.0
+
+
+@pytest.mark.asyncio
+async def test_state_follows_events_without_relisting():
+    engine = FakeEngine([
+        inspect_payload("aaa", "postgres"),
+        inspect_payload("bbb", "redis", status="exited"),
+    ])
+    state = DockerState(client=engine, stats_interval=60)
+
+    assert await state.ensure_started(timeout=1)
+    assert [c.name for c in state.containers()] == ["postgres", "redis"]
+    assert [c.name for c in state.containers(all=False)] == ["postgres"]
+    inspects_after_sync = engine.inspect_calls
+
+    engine.containers["bbb"] = inspect_payload("bbb", "redis", status="running")
+    await engine.events_queue.put({"Action": "start", "id": "bbb"})
+    await engine.events_queue.put({"Action": "destroy", "id": "aaa"})
+    for _ in range(50):
+        await asyncio.sleep(0.01)
+        if state.get("aaa") is None:
+            break
+
+    assert state.get("redis").running
+    assert state.get("postgres") is None
+    assert engine.inspect_calls == inspects_after_sync + 1
+
+    await state.stop()
+    assert not state.running
+
+
+@pytest.mark.asyncio
+async def test_stats_sampler_fills_cache():
+    engine = FakeEngine([inspect_payload("aaa", "postgres")])
+    state = DockerState(client=engine, stats_interval=60)
+
+    await state.ensure_started(timeout=1)
+    for _ in range(50):
+        await asyncio.sleep(0.01)
+        if state.stats("aaa"):
+            break
+
+    stats = state.stats("aaa")
+    assert stats.memory_mb == 50.0
+    assert stats.cpu_percent == 0.0
+    await state.stop()
+
+
+@pytest.mark.asyncio
+async def test_alerts_and_log_manager_read_the_state_cache(monkeypatch, tmp_path):
+    import alert_manager
+    import log_manager
+
+    postgres = inspect_payload("aaa", "postgres")
+    postgres["State"]["Health"] = {"Status": "unhealthy"}
+    postgres["Logs"] = ["2026-01-01 00:00:00 ERROR connection refused", "2026-01-01 00:00:01 INFO ready"]
+    engine = FakeEngine([postgres, inspect_payload("bbb", "redis", status="exited")])
+    state = DockerState(client=engine, stats_interval=60)
+    monkeypatch.setattr(alert_manager, "docker_state", state)
+    monkeypatch.setattr(log_manager, "docker_state", state)
+
+    alerts = await alert_manager.AlertManager()._check_service_alerts()
+    assert {a.type: a.details["services"] for a in alerts} == {
+        alert_manager.AlertType.SERVICE_DOWN: ["redis"],
+        alert_manager.AlertType.SERVICE_UNHEALTHY: ["postgres"],
+    }
+
+    manager = log_manager.LogManager()
+    manager.log_dirs = {"system": tmp_path / "system", "services": tmp_path / "services"}
+    results = await manager.search_logs(log_manager.LogFilter(sources=["docker:postgres"], levels=["ERROR"]))
+    assert [entry.message for entry in results] == ["ERROR connection refused"]
+    await state.stop()
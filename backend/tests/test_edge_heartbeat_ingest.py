@@ -0,0 +1,153 @@
+"""Tests for the batched edge device heartbeat ingest"""
+
+import asyncio
+import inspect
+import os
+import sys
+from uuid import uuid4
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from conftest import FakeAsyncpgConnection, FakePool
+import edge_heartbeat_ingest
+from edge_heartbeat_ingest import HeartbeatIngestor, flatten_metrics
+
+
+class FakeConnection(FakeAsyncpgConnection):
+    def __init__(self, devices, configs=()):
+        self.devices = devices
+        self.configs = list(configs)
+        self.executes = []
+        self.copies = []
+        self.executemany_calls = []
+        self.lookups = 0
+        self.fail = False
+
+    async def fetch(self, query, *args):
+        if "FROM edge_devices" in query:
+            return [
+                {"id": device_id, "organization_id": "org", "device_name": f"dev-{i}", "status": "offline"}
+                for i, device_id in enumerate(self.devices)
+            ]
+        return self.configs
+
+    async def fetchrow(self, query, *args):
+        self.lookups += 1
+        return None
+
+    async def execute(self, query, *args):
+        if self.fail:
+            raise OSError("connection lost")
+        self.executes.append((query, args))
+
+    async def copy_records_to_table(self, table, records, columns):
+        self.copies.append((table, list(records), columns))
+
+    async def executemany(self, query, args):
+        self.executemany_calls.append(list(args))
+
+
+@pytest.fixture
+def webhooks(monkeypatch):
+    events = []
+    manager = edge_heartbeat_ingest.webhook_manager
+    signature = inspect.signature(manager.trigger_event)
+
+    async def trigger_event(*args, **kwargs):
+        # Bind against the real method so a call with the wrong arguments fails here
+        bound = signature.bind(*args, **kwargs)
+        events.append((bound.arguments["event_type"], bound.arguments["payload"]["previous_status"]))
+
+    monkeypatch.setattr(manager, "trigger_event", trigger_event)
+    return events
+
+
+async def make_ingestor(devices, configs=()):
+    conn = FakeConnection(devices, configs)
+    ingestor = HeartbeatIngestor()
+    ingestor.db_pool = FakePool(conn)
+    await ingestor.refresh()
+    ingestor._task = object()  # background flush loop not needed; tests flush explicitly
+    return ingestor, conn
+
+
+def test_flatten_metrics():
+    samples, leftovers = flatten_metrics({
+        "cpu": {"percent": 12.5, "cores": 4},
+        "uptime": 9,
+        "gpu": {"model": "a100", "util": 3},
+        "empty": {},
+    })
+    assert samples == [("cpu.percent", 12.5), ("cpu.cores", 4.0), ("uptime", 9.0)]
+    assert leftovers == {"gpu": {"model": "a100", "util": 3}, "empty": {}}
+
+
+@pytest.mark.asyncio
+async def test_heartbeats_coalesce_into_one_batch(webhooks):
+    devices = [uuid4() for _ in range(1000)]
+    ingestor, conn = await make_ingestor(devices)
+
+    for round_ in range(3):
+        for device_id in devices:
+            response = await ingestor.submit(
+                device_id, "online", uptime=round_, metrics={"cpu": {"percent": 1.0}, "mem": 2}
+            )
+            assert response["ack"] is True
+            assert "pending_config" not in response
+    await ingestor.flush()
+
+    # One status UPDATE covering every device, latest heartbeat wins
+    assert len(conn.executes) == 1
+    query, args = conn.executes[0]
+    assert "unnest" in query
+    assert args[0] == devices
+    assert set(args[4]) == {2}
+
+    # All samples in one COPY
+    table, records, columns = conn.copies[0]
+    assert table == "device_metric_samples"
+    assert len(records) == 1000 * 3 * 2
+    assert conn.executemany_calls == []
+
+    # offline -> online once per device, not per heartbeat
+    await asyncio.sleep(0)
+    assert len(webhooks) == 1000
+    assert ingestor.get_stats()["heartbeats_written"] == 1000
+
+
+@pytest.mark.asyncio
+async def test_pending_config_served_from_memory():
+    device = uuid4()
+    config_id = uuid4()
+    ingestor, conn = await make_ingestor([device], configs=[
+        {"device_id": device, "id": config_id, "config_version": 3, "config_data": '{"mode": "eco"}'}
+    ])
+
+    response = await ingestor.submit(device, "online")
+    assert response["pending_config"] == {"config_id": str(config_id), "version": 3, "data": {"mode": "eco"}}
+
+    ingestor.config_applied(device, config_id)
+    assert "pending_config" not in await ingestor.submit(device, "online")
+
+    ingestor.config_pushed(device, "new-id", 4, {"mode": "perf"})
+    assert (await ingestor.submit(device, "online"))["pending_config"]["version"] == 4
+
+
+@pytest.mark.asyncio
+async def test_unknown_device_and_failed_flush():
+    device = uuid4()
+    ingestor, conn = await make_ingestor([device])
+
+    assert await ingestor.submit(uuid4(), "online") is None
+    assert conn.lookups == 1
+
+    await ingestor.submit(device, "error", metrics={"gpu": {"model": "x"}})
+    conn.fail = True
+    await ingestor.flush()
+    assert ingestor.flush_errors == 1
+    # Status is retried with the next batch
+    conn.fail = False
+    await ingestor.flush()
+    assert conn.executes[0][1][1] == ["error"]
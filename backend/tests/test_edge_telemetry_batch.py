@@ -0,0 +1,154 @@
+"""Tests for edge agent envelope batching, the offline spool and batch decoding"""
+
+import gzip
+import json
+import os
+import sys
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(os.path.dirname(BACKEND_DIR), "edge-agent"))
+
+import edge_agent
+from edge_agent import EdgeAgent, EnvelopeSpool
+from edge_device_api import decode_envelope, envelope_rows
+
+
+class FakeResponse:
+    def __init__(self, status, headers=None):
+        self.status = status
+        self.headers = headers or {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeSession:
+    """Records uploads; `statuses` is consumed one per request (200 when empty)"""
+
+    def __init__(self, statuses=()):
+        self.statuses = list(statuses)
+        self.bodies = []
+
+    def post(self, url, data=None, headers=None, **kwargs):
+        status = self.statuses.pop(0) if self.statuses else 200
+        if isinstance(status, Exception):
+            raise status
+        assert headers["Content-Encoding"] == "gzip"
+        self.bodies.append(data)
+        return FakeResponse(status)
+
+
+def make_agent(tmp_path, statuses=()):
+    agent = EdgeAgent("dev-1", "token", "https://cloud", spool_dir=str(tmp_path))
+    agent.session = FakeSession(statuses)
+    return agent
+
+
+def test_spool_is_fifo_bounded_and_survives_restart(tmp_path):
+    spool = EnvelopeSpool(str(tmp_path), max_bytes=1000)
+    for i in range(5):
+        spool.put(bytes([i]) * 300)
+
+    # Oldest envelopes are dropped to stay within the byte budget
+    assert len(spool) == 3
+    assert spool.dropped == 2
+    assert spool.peek().read_bytes()[0] == 2
+
+    (tmp_path / "000000000099.tmp").write_bytes(b"partial")
+    reopened = EnvelopeSpool(str(tmp_path), max_bytes=1000)
+    assert not list(tmp_path.glob("*.tmp"))
+    assert reopened.put(b"x").name == "000000000005.json.gz"
+
+
+@pytest.mark.asyncio
+async def test_logs_and_metrics_share_one_compressed_envelope(tmp_path):
+    agent = make_agent(tmp_path)
+    for i in range(100):
+        await agent.send_log("info", f"line {i}", service_name="vllm")
+    agent.record_metrics({"cpu": {"percent": 3.0}, "memory": {"percent": 40}})
+
+    agent.seal_envelope()
+    assert await agent.replay_spool() == 1
+    assert len(agent.spool) == 0
+
+    [body] = agent.session.bodies
+    envelope = decode_envelope(body, "gzip")
+    assert len(envelope["logs"]) == 100
+    assert [m["metric_type"] for m in envelope["metrics"]] == ["cpu", "memory"]
+    assert len(body) < len(json.dumps(envelope)) / 4
+
+
+@pytest.mark.asyncio
+async def test_offline_envelopes_replay_in_order_after_backoff(tmp_path, monkeypatch):
+    monkeypatch.setattr(edge_agent, "REPLAY_MAX_PER_CYCLE", 2)
+    agent = make_agent(tmp_path, statuses=[edge_agent.aiohttp.ClientConnectionError("offline")])
+
+    for i in range(3):
+        await agent.send_log("error", f"offline {i}")
+        agent.seal_envelope()
+
+    # Unreachable: nothing is lost and the uploader backs off
+    assert await agent.replay_spool() == 0
+    assert len(agent.spool) == 3
+    assert agent.retry_delay == edge_agent.RETRY_MIN_DELAY
+    assert await agent.replay_spool() == 0
+
+    # Back online: replay oldest-first, a bounded number per cycle
+    agent.retry_at = 0
+    assert await agent.replay_spool() == 2
+    assert await agent.replay_spool() == 1
+    messages = [decode_envelope(b, "gzip")["logs"][0]["message"] for b in agent.session.bodies]
+    assert messages == ["offline 0", "offline 1", "offline 2"]
+    assert agent.retry_delay == 0
+
+
+@pytest.mark.asyncio
+async def test_poisoned_envelope_is_dropped_after_repeated_server_errors(tmp_path):
+    failures = edge_agent.MAX_ENVELOPE_FAILURES
+    agent = make_agent(tmp_path, statuses=[500] * failures)
+    await agent.send_log("info", "bad")
+    agent.seal_envelope()
+
+    for _ in range(failures - 1):
+        agent.retry_at = 0
+        assert await agent.replay_spool() == 0
+        assert len(agent.spool) == 1
+
+    agent.retry_at = 0
+    await agent.replay_spool()
+    assert len(agent.spool) == 0
+
+
+def test_envelope_rows_and_decoding_limits():
+    device_id = uuid4()
+    sample_rows, metric_rows, log_rows = envelope_rows(device_id, {
+        "metrics": [
+            {"metric_type": "cpu", "value": {"percent": 1, "load": 0.5}, "timestamp": "2026-10-18T10:00:00"},
+            {"metric_type": "gpu", "value": {"model": "x", "percent": 2}},
+        ],
+        "logs": [{"log_level": "warning", "message": "disk", "timestamp": "not a time"}, "junk"],
+    })
+    # Numeric metrics take the device_metric_samples COPY path, the rest stays JSONB
+    assert [(r[0], r[2], r[3]) for r in sample_rows] == [
+        (device_id, "cpu.percent", 1.0), (device_id, "cpu.load", 0.5)
+    ]
+    assert sample_rows[0][1].tzinfo is not None
+    assert [r[:3] for r in metric_rows] == [(device_id, "gpu", '{"model": "x", "percent": 2}')]
+    assert len(log_rows) == 1 and log_rows[0][1:4] == ("warning", None, "disk")
+
+    with pytest.raises(HTTPException) as exc:
+        decode_envelope(b"not gzip", "gzip")
+    assert exc.value.status_code == 400
+
+    bomb = gzip.compress(b" " * (17 * 1024 * 1024))
+    with pytest.raises(HTTPException) as exc:
+        decode_envelope(bomb, "gzip")
+    assert exc.value.status_code == 413
@@ -0,0 +1,157 @@
+"""Tests for the fleet poll scheduler"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from fleet_poller import FleetPoller, HostState, slot_phase
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def servers(n):
+    return [{"id": f"srv-{i}", "name": f"server-{i}", "api_url": f"http://10.0.0.{i}"} for i in range(n)]
+
+
+def make_poller(targets, poll, interval=60, **kwargs):
+    clock = Clock()
+    flushed = []
+
+    async def load():
+        return targets
+
+    async def flush(results):
+        flushed.append(list(results))
+
+    poller = FleetPoller("test", interval, poll, flush, load, clock=clock, **kwargs)
+    return poller, clock, flushed
+
+
+async def ok_poll(host, timeout):
+    return {"server_id": host.server_id}
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_slot_phase_is_stable_and_spread():
+    phases = [slot_phase(f"srv-{i}", 60) for i in range(1000)]
+    assert phases[0] == slot_phase("srv-0", 60)
+    assert all(0 <= p < 60 for p in phases)
+    # Roughly uniform: every 6s bucket gets a share of the fleet
+    buckets = [0] * 10
+    for p in phases:
+        buckets[int(p // 6)] += 1
+    assert min(buckets) > 60
+
+
+def test_host_timeout_adapts():
+    host = HostState("a", "a", "http://a", phase=0, next_due=0)
+    assert host.timeout(2, 30) == 30  # no samples yet
+    host.succeeded(0.1)
+    assert host.timeout(2, 30) == 2
+    host.succeeded(3.0)
+    assert host.timeout(2, 30) == pytest.approx(4 * (0.3 * 3.0 + 0.7 * 0.1))
+    host.failed("timeout")
+    assert host.timeout(2, 30) == pytest.approx(2 * 4 * (0.3 * 3.0 + 0.7 * 0.1))
+    host.failed("timeout")
+    host.failed("timeout")
+    assert host.timeout(2, 30) == 30
+    assert host.backoff_factor(16) == 4
+    host.succeeded(0.5)
+    assert host.failures == 0 and host.backoff_factor(16) == 1
+
+
+@pytest.mark.asyncio
+async def test_polls_are_spread_and_flushed_once_per_tick():
+    poller, clock, flushed = make_poller(servers(600), ok_poll)
+
+    per_tick = []
+    for _ in range(61):
+        per_tick.append(await poller.tick())
+        await settle()
+        clock.now += 1
+    await poller.drain()
+
+    # Every server polled exactly once in the interval, ~10 per second
+    assert sum(per_tick) == 600
+    assert max(per_tick) < 40
+    # One batched write per tick
+    assert len(flushed) <= 61
+    assert sum(len(batch) for batch in flushed) == 600
+
+    # Next interval: the same slots come round again
+    for _ in range(60):
+        await poller.tick()
+        await settle()
+        clock.now += 1
+    assert poller.polls_started == 1200
+
+
+@pytest.mark.asyncio
+async def test_failing_host_backs_off():
+    attempts = []
+
+    async def poll(host, timeout):
+        attempts.append(clock.now)
+        return {"server_id": host.server_id, "error": "connection refused"}
+
+    poller, clock, flushed = make_poller(servers(1), poll, interval=10)
+    for _ in range(80):
+        await poller.tick()
+        await settle()
+        clock.now += 1
+
+    gaps = [round(b - a) for a, b in zip(attempts, attempts[1:])]
+    assert gaps == [10, 20, 40]
+    assert all(r["error"] for batch in flushed for r in batch)
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limit_and_removed_servers():
+    targets = servers(20)
+    release = asyncio.Event()
+    running = 0
+    peak = 0
+
+    async def poll(host, timeout):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await release.wait()
+        running -= 1
+        return {"server_id": host.server_id}
+
+    poller, clock, flushed = make_poller(targets, poll, interval=5, concurrency=3)
+    for _ in range(6):
+        await poller.tick()
+        await settle()
+        clock.now += 1
+    assert peak == 3
+
+    release.set()
+    await poller.drain()
+    assert sum(len(b) for b in flushed) == 20
+
+    # Servers that disappear from the list stop being polled
+    del targets[10:]
+    await poller.refresh()
+    for _ in range(5):
+        await poller.tick()
+        await settle()
+        clock.now += 1
+    await poller.drain()
+    assert len(poller.hosts) == 10
+    assert poller.polls_started == 30
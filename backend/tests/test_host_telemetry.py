@@ -0,0 +1,77 @@
+"""Tests for the background host telemetry sampler"""
+
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import host_telemetry as telemetry_module
+from host_telemetry import HostTelemetrySampler
+
+
+def test_latest_is_available_without_waiting():
+    sampler = HostTelemetrySampler(interval=60)
+    started = time.monotonic()
+    sample = sampler.latest()
+    sampler.stop()
+
+    assert time.monotonic() - started < 0.5
+    assert 0.0 <= sample.cpu_percent <= 100.0
+    assert len(sample.per_cpu) >= 1
+    assert sample.memory.total > 0
+    assert sample.disk.total > 0
+
+
+def test_ring_buffer_keeps_most_recent_samples():
+    sampler = HostTelemetrySampler(interval=60, history_size=3)
+    for _ in range(5):
+        sampler._record(sampler.sample())
+
+    history = sampler.history()
+    assert len(history) == 3
+    assert [s.timestamp for s in history] == sorted(s.timestamp for s in history)
+    assert sampler.latest() is history[-1]
+    assert sampler.status()["samples"] == 3
+
+
+def test_history_window_filters_old_samples():
+    sampler = HostTelemetrySampler(interval=60, history_size=10)
+    old = sampler.sample()
+    old.timestamp -= 600
+    sampler._record(old)
+    sampler._record(sampler.sample())
+
+    assert len(sampler.history()) == 2
+    assert len(sampler.history(seconds=60)) == 1
+
+
+def test_rates_derived_from_previous_sample(monkeypatch):
+    sampler = HostTelemetrySampler(interval=60)
+    first = sampler.sample()
+    first.timestamp -= 2
+    sampler._record(first)
+
+    class Counters:
+        bytes_sent = first.net_io.bytes_sent + 2000
+        bytes_recv = first.net_io.bytes_recv + 4000
+
+    monkeypatch.setattr(telemetry_module.psutil, "net_io_counters",
+                        lambda pernic=False: {} if pernic else Counters)
+    second = sampler.sample()
+
+    assert second.net_sent_bps == pytest.approx(1000, rel=0.05)
+    assert second.net_recv_bps == pytest.approx(2000, rel=0.05)
+
+
+def test_temperatures_refreshed_every_n_samples(monkeypatch):
+    calls = []
+    monkeypatch.setattr(telemetry_module.psutil, "sensors_temperatures",
+                        lambda: calls.append(1) or {}, raising=False)
+    sampler = HostTelemetrySampler(interval=60, temperature_every=3)
+    for _ in range(6):
+        sampler._record(sampler.sample())
+
+    assert len(calls) == 2
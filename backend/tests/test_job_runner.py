@@ -0,0 +1,156 @@
+"""Tests for the leased background job runner"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from job_runner import JobRunner, LocalLeases
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.asyncio
+async def test_lease_stays_with_the_last_owner_until_takeover():
+    clock = FakeClock()
+    leases = LocalLeases(clock)
+
+    assert await leases.acquire("job", "a", ttl=60, takeover=15) == (True, 0.0)
+    acquired, wait = await leases.acquire("job", "b", ttl=60, takeover=15)
+    assert not acquired and wait == 75
+
+    await leases.release("job", "a", next_in=10, duration=1.5, status="ok", error=None)
+    clock.now += 10
+    # Due again: the previous owner may run it, others wait out the takeover window
+    assert (await leases.acquire("job", "b", ttl=60, takeover=15))[0] is False
+    assert (await leases.acquire("job", "a", ttl=60, takeover=15))[0] is True
+    assert await leases.renew("job", "a", ttl=60)
+    assert not await leases.renew("job", "b", ttl=60)
+
+    # Owner gone: b takes over after the window
+    clock.now += 60 + 15
+    assert (await leases.acquire("job", "b", ttl=60, takeover=15))[0] is True
+    assert not await leases.renew("job", "a", ttl=60)
+
+    snapshot = await leases.snapshot()
+    assert snapshot[0]["runs"] == 1 and snapshot[0]["last_duration_ms"] == 1500
+
+
+@pytest.mark.asyncio
+async def test_periodic_job_runs_in_one_process_without_overlap():
+    leases = LocalLeases()
+    active, max_active, owners = [0], [0], []
+
+    def make_runner():
+        runner = JobRunner(lease_seconds=0.3, takeover_seconds=0.1)
+
+        async def tick():
+            active[0] += 1
+            max_active[0] = max(max_active[0], active[0])
+            owners.append(runner.owner)
+            await asyncio.sleep(0.02)
+            active[0] -= 1
+
+        runner.register("tick", tick, interval=0.05, jitter=0)
+        runner.leases = leases
+        return runner
+
+    worker_a, worker_b = make_runner(), make_runner()
+    await worker_a.start()
+    await asyncio.sleep(0.01)
+    await worker_b.start()
+    await asyncio.sleep(0.4)
+
+    assert max_active[0] == 1
+    assert set(owners) == {worker_a.owner}
+    assert worker_b.jobs["tick"].runs == 0 and worker_b.jobs["tick"].deferrals > 0
+
+    # Worker A goes away; B picks the job up after the takeover window
+    await worker_a.stop()
+    runs_before = len(owners)
+    await asyncio.sleep(0.5)
+    await worker_b.stop()
+    assert owners[runs_before:] and set(owners[runs_before:]) == {worker_b.owner}
+    assert max_active[0] == 1
+
+    stats = worker_a.get_stats()["jobs"]["tick"]
+    assert stats["kind"] == "periodic"
+    assert stats["failures"] == 0
+    assert 0.02 <= stats["avg_duration_seconds"] <= stats["max_duration_seconds"]
+
+
+@pytest.mark.asyncio
+async def test_failures_timeouts_and_lost_leases_are_recorded():
+    runner = JobRunner(lease_seconds=0.09, takeover_seconds=0)
+    runner.leases = LocalLeases()
+
+    async def broken():
+        raise RuntimeError("boom")
+
+    async def slow():
+        await asyncio.sleep(1)
+
+    cancelled = []
+
+    async def service():
+        try:
+            await asyncio.sleep(10)
+        finally:
+            cancelled.append(True)
+
+    failing = runner.register("broken", broken, interval=60)
+    stuck = runner.register("slow", slow, interval=60, timeout=0.05)
+    singleton = runner.register("service", service)
+
+    for job in (failing, stuck):
+        await runner.leases.acquire(job.lease_name, runner.owner, 1, 0)
+        await runner._execute(job)
+    assert failing.failures == 1 and failing.last_error == "boom"
+    assert stuck.timeouts == 1 and stuck.last_error.startswith("timed out")
+
+    # Another process steals the singleton's lease: the job is cancelled
+    await runner.leases.acquire(singleton.lease_name, runner.owner, 1, 0)
+    execution = asyncio.create_task(runner._execute(singleton))
+    await asyncio.sleep(0.01)
+    runner.leases.leases["service"]["owner"] = "someone-else"
+    await asyncio.wait_for(execution, 1)
+    assert cancelled == [True]
+    assert singleton.lost_leases == 1 and singleton.last_error == "lease lost"
+    # Restarts back off after consecutive failures
+    assert singleton.next_delay() == 10.0
+
+    leases = {lease["name"]: lease for lease in await runner.leases.snapshot()}
+    assert leases["broken"]["failures"] == 1 and leases["slow"]["last_status"] == "timeout"
+
+
+@pytest.mark.asyncio
+async def test_job_is_cancelled_when_renewals_keep_failing():
+    class UnreachableLeases(LocalLeases):
+        async def renew(self, name, owner, lease_seconds):
+            raise ConnectionError("lease store unreachable")
+
+    runner = JobRunner(lease_seconds=0.09, takeover_seconds=0)
+    runner.leases = UnreachableLeases()
+    cancelled = []
+
+    async def service():
+        try:
+            await asyncio.sleep(10)
+        finally:
+            cancelled.append(True)
+
+    job = runner.register("service", service)
+    await runner.leases.acquire(job.lease_name, runner.owner, 1, 0)
+    await asyncio.wait_for(runner._execute(job), 1)
+
+    assert cancelled == [True]
+    assert job.lost_leases == 1 and job.last_error == "lease lost"
@@ -0,0 +1,236 @@
+"""Tests for the watch-based Kubernetes inventory and delta sync"""
+
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from kubernetes import client
+from kubernetes.client.rest import ApiException
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from conftest import FakeAsyncpgConnection, FakePool
+import k8s_inventory
+from k8s_cluster_manager import KubernetesClusterManager
+from k8s_inventory import InventoryStore, ResourceInformer, deployment_row, namespace_row
+
+
+def make_namespace(name, rv="1", team=None):
+    return client.V1Namespace(
+        metadata=client.V1ObjectMeta(name=name, uid=f"uid-{name}", resource_version=rv,
+                                     labels={"team": team} if team else None),
+        status=client.V1NamespaceStatus(phase="Active"),
+    )
+
+
+def make_deployment(namespace, name, ready=1, desired=1):
+    return client.V1Deployment(
+        metadata=client.V1ObjectMeta(name=name, namespace=namespace, uid=f"uid-{name}"),
+        spec=client.V1DeploymentSpec(
+            replicas=desired,
+            selector=client.V1LabelSelector(),
+            template=client.V1PodTemplateSpec(spec=client.V1PodSpec(
+                containers=[client.V1Container(name="app", image="app:1")]
+            )),
+        ),
+        status=client.V1DeploymentStatus(replicas=desired, ready_replicas=ready),
+    )
+
+
+def node(name, status="Ready"):
+    return {"name": name, "uid": name, "node_type": "worker", "instance_type": "m5",
+            "cpu_capacity": "4", "memory_capacity": "16Gi", "pod_capacity": "110",
+            "cpu_allocatable": "4", "memory_allocatable": "15Gi", "status": status,
+            "conditions": [], "labels": {}}
+
+
+def namespace_list(items, rv):
+    return client.V1NamespaceList(items=items, metadata=client.V1ListMeta(resource_version=rv))
+
+
+def test_store_only_reports_changes():
+    store = InventoryStore()
+    assert store.replace("namespaces", {"a": {"v": 1}, "b": {"v": 1}}) == 2
+    delta = store.drain()
+    assert set(delta.changed["namespaces"]) == {"a", "b"}
+
+    # Identical rows are not changes
+    assert store.upsert("namespaces", "a", {"v": 1}) is False
+    assert store.drain().size == 0
+
+    store.upsert("namespaces", "a", {"v": 2})
+    store.replace("namespaces", {"a": {"v": 2}, "c": {"v": 1}})
+    delta = store.drain()
+    assert set(delta.changed["namespaces"]) == {"a", "c"}
+    assert delta.deleted["namespaces"] == {"b"}
+
+    # A failed write puts the delta back, except keys that changed meanwhile
+    store.delete("namespaces", "c")
+    store.requeue(delta)
+    delta = store.drain()
+    assert set(delta.changed["namespaces"]) == {"a"}
+    assert delta.deleted["namespaces"] == {"b", "c"}
+
+
+def test_row_extraction():
+    row = namespace_row(make_namespace("payments", team="billing"))
+    assert row["team_name"] == "billing"
+    assert row["status"] == "Active"
+
+    row = deployment_row(make_deployment("payments", "api", ready=1, desired=4))
+    assert row["health_status"] == "failed"
+    assert row["containers"][0]["image"] == "app:1"
+
+
+class FakeWatch:
+    """Yields scripted events per stream() call, raising any exception entries"""
+
+    scripts = []
+    calls = []
+    on_exhausted = None
+
+    def __init__(self):
+        self.stopped = False
+
+    def stream(self, func, **kwargs):
+        FakeWatch.calls.append(kwargs["resource_version"])
+        for item in FakeWatch.scripts.pop(0):
+            if isinstance(item, Exception):
+                raise item
+            yield item
+        if not FakeWatch.scripts:
+            FakeWatch.on_exhausted()
+
+    def stop(self):
+        self.stopped = True
+
+
+def test_informer_resumes_watch_and_relists_on_gone(monkeypatch):
+    store = InventoryStore()
+    lists = [
+        namespace_list([make_namespace("a"), make_namespace("b")], "10"),
+        namespace_list([make_namespace("a"), make_namespace("c", rv="40")], "40"),
+    ]
+    informer = ResourceInformer(
+        "namespaces", lambda: lists.pop(0), store, lambda o: o.metadata.name, namespace_row
+    )
+    FakeWatch.calls = []
+    FakeWatch.scripts = [
+        [{"type": "MODIFIED", "object": make_namespace("a", rv="11", team="x")},
+         {"type": "BOOKMARK", "object": make_namespace("", rv="20")}],
+        [ApiException(status=410)],
+        [{"type": "DELETED", "object": make_namespace("a", rv="41")}],
+    ]
+
+    FakeWatch.on_exhausted = informer.stop
+    monkeypatch.setattr(k8s_inventory.watch, "Watch", FakeWatch)
+    informer.run()
+
+    # Watch resumed from the list's and then the bookmark's version, relisted after 410
+    assert FakeWatch.calls == ["10", "20", "40"]
+    assert informer.stats["lists"] == 2
+    assert store.keys("namespaces") == ["c"]
+    delta = store.drain()
+    assert set(delta.changed["namespaces"]) == {"c"}
+    assert delta.deleted["namespaces"] == {"a", "b"}
+
+
+class FakeConnection(FakeAsyncpgConnection):
+    def __init__(self):
+        self.executemany_calls = []
+        self.executes = []
+        self.fail = False
+
+    async def fetchrow(self, query, *args):
+        return {"id": args[0], "name": "prod", "organization_id": "org-1", "kubeconfig_encrypted": "x"}
+
+    async def fetch(self, query, *args):
+        return [{"id": f"ns-{name}", "name": name, "organization_id": "org-1"} for name in ("default", "web")]
+
+    async def execute(self, query, *args):
+        self.executes.append((" ".join(query.split()), args))
+        return "UPDATE 0"
+
+    async def executemany(self, query, args):
+        if self.fail:
+            raise OSError("connection lost")
+        self.executemany_calls.append((" ".join(query.split()[:3]), list(args)))
+
+
+@pytest.fixture
+def watcher(monkeypatch):
+    async def check_components():
+        return True
+
+    fake = SimpleNamespace(
+        store=InventoryStore(), namespace_ids={}, reconciled=True,
+        sync_lock=asyncio.Lock(), check_components=check_components,
+    )
+
+    async def get(cluster_id, kubeconfig_encrypted, decrypt):
+        return fake
+
+    monkeypatch.setattr(k8s_inventory.watcher_registry, "get", get)
+    return fake
+
+
+@pytest.mark.asyncio
+async def test_sync_writes_only_the_delta(watcher):
+    conn = FakeConnection()
+    manager = KubernetesClusterManager(FakePool(conn))
+    cluster_id = uuid4()
+    store = watcher.store
+
+    store.replace("namespaces", {n: namespace_row(make_namespace(n)) for n in ("default", "web")})
+    store.replace("nodes", {"n1": node("n1"), "n2": node("n2", "NotReady")})
+    store.replace("deployments", {
+        ("web", "api"): deployment_row(make_deployment("web", "api", ready=3, desired=3)),
+        ("new", "job"): deployment_row(make_deployment("new", "job")),
+    })
+
+    result = await manager.sync_cluster(cluster_id)
+    assert result["changes"] == 5
+    assert result["health_status"] == "critical"  # 1 of 2 nodes ready
+    assert [(q, len(rows)) for q, rows in conn.executemany_calls] == [
+        ("INSERT INTO k8s_namespaces", 2), ("INSERT INTO k8s_nodes", 2),
+        ("INSERT INTO k8s_deployments", 1),
+    ]
+    counts = conn.executes[-1][1]
+    assert counts == (cluster_id, "critical", 2, 2, 2, 4)
+
+    # Nothing changed: no row writes, just the cluster update
+    conn.executemany_calls.clear()
+    store.upsert("nodes", "n2", node("n2", "NotReady"))
+    result = await manager.sync_cluster(cluster_id)
+    assert result["changes"] == 0
+    assert conn.executemany_calls == []
+
+    # Deletions mark rows instead of removing them; "new/job" is still waiting on its namespace
+    store.delete("nodes", "n2")
+    store.delete("deployments", ("web", "api"))
+    result = await manager.sync_cluster(cluster_id)
+    assert result["health_status"] == "healthy"
+    assert conn.executemany_calls == [
+        ("UPDATE k8s_deployments SET", [("ns-web", "api")]),
+    ]
+    assert any("k8s_nodes SET status = 'Deleted'" in q and args[1] == ["n2"] for q, args in conn.executes)
+    assert store.drain().changed["deployments"].keys() == {("new", "job")}
+
+
+@pytest.mark.asyncio
+async def test_failed_write_requeues_delta(watcher):
+    conn = FakeConnection()
+    manager = KubernetesClusterManager(FakePool(conn))
+    watcher.store.replace("nodes", {"n1": node("n1")})
+
+    conn.fail = True
+    with pytest.raises(OSError):
+        await manager.sync_cluster(uuid4())
+    assert "critical" in conn.executes[-1][0]
+
+    conn.fail = False
+    result = await manager.sync_cluster(uuid4())
+    assert result["changes"] == 1
@@ -0,0 +1,125 @@
+"""Tests for the indexed local log store behind advanced log search"""
+
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from log_store import LogStore, LogQuery, parse_cursor, parse_docker_log_line
+
+
+NOW = time.time()
+
+
+def ts(seconds_ago: float) -> datetime:
+    return datetime.fromtimestamp(NOW - seconds_ago, timezone.utc)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = LogStore(str(tmp_path / "segments"), bucket_seconds=60, retention_hours=1)
+    store.append("ops-center", ts(600), "User login failed for user@example.com")
+    store.append("ops-center", ts(500), "High memory usage: WARN 85%")
+    store.append("litellm", ts(400), "API request completed successfully")
+    store.append("litellm", ts(300), "DEBUG cache hit for model list")
+    store.append("keycloak", ts(200), "ERROR failed to connect to database")
+    store.append("keycloak", ts(10), "Server started")
+    return store
+
+
+def messages(result):
+    return [log["message"] for log in result["logs"]]
+
+
+def test_text_search_matches_substrings(store):
+    result = store.search(LogQuery(text="fail"))
+
+    assert result["total"] == 2
+    assert messages(result) == [
+        "ERROR failed to connect to database",
+        "User login failed for user@example.com",
+    ]
+
+
+def test_multi_word_text_and_service_name(store):
+    assert store.search(LogQuery(text="connect to data"))["total"] == 1
+    assert store.search(LogQuery(text="keycloak"))["total"] == 2
+
+
+def test_severity_service_and_regex_filters(store):
+    assert store.search(LogQuery(severities={"ERROR"}))["total"] == 1
+    assert store.search(LogQuery(severities={"INFO"}))["total"] == 3
+    assert store.search(LogQuery(services={"litellm"}, severities={"DEBUG"}))["total"] == 1
+    result = store.search(LogQuery(regex=r"\d+%"))
+    assert messages(result) == ["High memory usage: WARN 85%"]
+
+
+def test_time_range_filter(store):
+    result = store.search(LogQuery(start_ts=NOW - 450, end_ts=NOW - 100))
+    assert result["total"] == 3
+
+
+def test_keyset_pagination_walks_all_results(store):
+    seen = []
+    cursor = None
+    while True:
+        result = store.search(LogQuery(limit=2, cursor=parse_cursor(cursor)))
+        seen.extend(messages(result))
+        cursor = result["next_cursor"]
+        if cursor is None:
+            break
+
+    assert len(seen) == 6
+    assert seen[0] == "Server started"
+    assert seen[-1] == "User login failed for user@example.com"
+
+
+def test_closed_segments_survive_restart(store, tmp_path):
+    store.maintain(grace_seconds=0)
+    assert store.stats()["closed_segments"] >= 5
+
+    reloaded = LogStore(str(tmp_path / "segments"), bucket_seconds=60, retention_hours=1)
+    reloaded.load()
+
+    result = reloaded.search(LogQuery(text="fail"))
+    assert result["total"] == 2
+    assert reloaded.last_seen["keycloak"] == pytest.approx(NOW - 200)
+
+
+def test_counts_without_text_skip_decoding(store):
+    store.maintain(grace_seconds=0)
+    result = store.search(LogQuery(severities={"INFO"}, limit=1))
+
+    assert result["total"] == 3
+    assert messages(result) == ["Server started"]
+    assert result["segments_scanned"] < store.stats()["closed_segments"]
+
+
+def test_expired_segments_are_removed(store, tmp_path):
+    store.maintain(grace_seconds=0, now=NOW + 7200)
+
+    assert store.search(LogQuery())["total"] == 0
+    assert not list((tmp_path / "segments").glob("*.seg"))
+
+
+def test_concurrent_searches_share_a_bounded_cache(store):
+    store.maintain(grace_seconds=0)
+    store.cache_segments = 2
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        totals = list(pool.map(lambda _: store.search(LogQuery(text="fail"))["total"], range(200)))
+
+    assert set(totals) == {2}
+    assert store.stats()["cached_segments"] <= 2
+
+
+def test_parse_docker_log_line_with_nanoseconds():
+    timestamp, message = parse_docker_log_line("2025-11-29T10:00:00.123456789Z hello world")
+
+    assert message == "hello world"
+    assert timestamp == datetime(2025, 11, 29, 10, 0, 0, 123456, tzinfo=timezone.utc)
@@ -0,0 +1,133 @@
+"""Tests for the stale-while-revalidate model catalog"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import model_catalog_api
+from model_catalog_api import ModelCatalog, ProviderFetchError
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+
+class FakeUpstream:
+    """Patches the provider fetchers; records calls and peak concurrency"""
+
+    def __init__(self, monkeypatch, db_models=()):
+        self.calls = []
+        self.failing = set()
+        self.in_flight = 0
+        self.peak = 0
+        self.db_models = list(db_models)
+
+        def fetcher(provider):
+            async def fetch(*args):
+                self.calls.append(provider)
+                self.in_flight += 1
+                self.peak = max(self.peak, self.in_flight)
+                await asyncio.sleep(0.01)
+                self.in_flight -= 1
+                if provider in self.failing:
+                    raise ProviderFetchError(f"{provider}: HTTP 503")
+                return [model(provider, f"{provider}-{self.calls.count(provider)}")]
+            return fetch
+
+        async def get_provider_api_key(pool, provider_name):
+            return "key"
+
+        async def get_models_from_db(pool):
+            return self.db_models
+
+        for provider in ("openrouter", "openai", "anthropic", "google"):
+            monkeypatch.setattr(model_catalog_api, f"fetch_{provider}_models", fetcher(provider))
+        monkeypatch.setattr(model_catalog_api, "get_provider_api_key", get_provider_api_key)
+        monkeypatch.setattr(model_catalog_api, "get_models_from_db", get_models_from_db)
+
+
+def model(provider, name):
+    return {
+        "id": f"{provider}/{name}", "provider": provider, "name": name, "description": "",
+        "context_length": 8192, "pricing": {"input": 1.0, "output": 2.0},
+        "capabilities": ["text"], "top_provider": None, "architecture": "text",
+    }
+
+
+@pytest.mark.asyncio
+async def test_cold_start_is_single_flight_and_concurrent(monkeypatch):
+    upstream = FakeUpstream(monkeypatch, db_models=[{
+        "name": "openai-1", "enabled": True, "cost_per_1m_input": 9.0, "cost_per_1m_output": 0,
+    }])
+    catalog = ModelCatalog()
+
+    results = await asyncio.gather(*(catalog.get_models(None) for _ in range(20)))
+
+    assert sorted(upstream.calls) == ["anthropic", "google", "openai", "openrouter"]
+    assert upstream.peak == 4
+    assert all(r is results[0] for r in results)
+    by_provider = {m["provider"]: m for m in results[0]}
+    assert by_provider["openai"]["enabled"] is True
+    assert by_provider["openai"]["pricing"] == {"input": 9.0, "output": 2.0}
+    assert by_provider["google"]["enabled"] is False
+
+
+@pytest.mark.asyncio
+async def test_stale_catalog_is_served_while_revalidating(monkeypatch):
+    upstream = FakeUpstream(monkeypatch)
+    catalog = ModelCatalog(ttl=300)
+    first = await catalog.get_models(None)
+
+    # Expired: the old list comes back immediately, the refresh runs behind it
+    catalog.fetched_at -= 301
+    upstream.failing.add("openrouter")
+    assert await catalog.get_models(None) is first
+    assert len(upstream.calls) == 4
+    await catalog._revalidate_task
+
+    # The failing provider keeps its last good list; the others were replaced
+    names = {m["provider"]: m["name"] for m in catalog.models}
+    assert names["openrouter"] == "openrouter-1"
+    assert names["openai"] == "openai-2"
+    stats = catalog.get_stats()
+    assert stats["providers"]["openrouter"]["error"] == "openrouter: HTTP 503"
+    assert stats["providers"]["openrouter"]["failures"] == 1
+
+
+@pytest.mark.asyncio
+async def test_workers_share_the_snapshot_through_redis(monkeypatch):
+    upstream = FakeUpstream(monkeypatch)
+    redis = FakeRedis()
+
+    worker_a = ModelCatalog()
+    worker_a.redis = redis
+    await worker_a.get_models(None)
+    assert len(upstream.calls) == 4
+
+    # A second worker starts cold and adopts the published snapshot
+    worker_b = ModelCatalog()
+    worker_b.redis = redis
+    models = await worker_b.get_models(None)
+    assert len(upstream.calls) == 4
+    assert [m["id"] for m in models] == [m["id"] for m in worker_a.models]
+
+    # Both go stale: only the worker holding the refresh lock calls upstream
+    for worker in (worker_a, worker_b):
+        worker.fetched_at -= worker.ttl + 1
+        worker._revalidate(None)
+    await asyncio.gather(worker_a._revalidate_task, worker_b._revalidate_task)
+    assert len(upstream.calls) == 8
@@ -0,0 +1,115 @@
+"""Tests for the materialized model list responses"""
+
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+from starlette.requests import Request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from model_list_cache import ModelListCache, etag_matches
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def incr(self, key):
+        self.data[key] = int(self.data.get(key, 0)) + 1
+        return self.data[key]
+
+
+def make_request(if_none_match=None):
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": "/api/v1/llm/models", "headers": headers})
+
+
+class Builder:
+    def __init__(self):
+        self.calls = 0
+        self.version = 1
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return {"object": "list", "data": [{"id": "model-a", "version": self.version}]}
+
+
+def test_etag_matching():
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('W/"abc", "def"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches('"abd"', '"abc"')
+    assert not etag_matches(None, '"abc"')
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_build_and_revalidation_is_a_304():
+    cache = ModelListCache()
+    build = Builder()
+
+    responses = await asyncio.gather(*(
+        cache.respond(make_request(), ("models", "free"), build) for _ in range(10)
+    ))
+    assert build.calls == 1
+    assert {r.status_code for r in responses} == {200}
+    assert json.loads(responses[0].body)["data"][0]["id"] == "model-a"
+    etag = responses[0].headers["etag"]
+
+    response = await cache.respond(make_request(etag), ("models", "free"), build)
+    assert response.status_code == 304
+    assert response.body == b""
+    assert response.headers["etag"] == etag
+    assert build.calls == 1
+
+    # Different key, separate entry
+    await cache.respond(make_request(), ("models", "enterprise"), build)
+    assert build.calls == 2
+    assert cache.get_stats()["not_modified"] == 1
+
+
+@pytest.mark.asyncio
+async def test_invalidation_changes_the_etag_and_discards_in_flight_builds():
+    cache = ModelListCache()
+    build = Builder()
+    key = ("curated", "bolt-diy", None)
+
+    first = await cache.get(key, build)
+    build.version = 2
+    await cache.invalidate("add_model")
+    second = await cache.get(key, build)
+    assert second.etag != first.etag
+
+    # A build racing an invalidation is returned but not kept
+    build.version = 3
+    pending = asyncio.create_task(cache.get(("curated", "presenton", None), build))
+    await asyncio.sleep(0)
+    await cache.invalidate("update_model")
+    build.version = 4
+    fresh = await cache.get(("curated", "presenton", None), build)
+    await pending
+    assert b'"version":4' in fresh.body
+    assert cache.entries[("curated", "presenton", None)] is fresh
+
+
+@pytest.mark.asyncio
+async def test_invalidation_reaches_other_workers_through_redis():
+    redis = FakeRedis()
+    worker_a, worker_b = ModelListCache(sync_interval=0), ModelListCache(sync_interval=0)
+    worker_a.attach(redis)
+    worker_b.attach(redis)
+    build = Builder()
+
+    await worker_b.get(("models", "free"), build)
+    await worker_b.get(("models", "free"), build)
+    assert build.calls == 1
+
+    await worker_a.invalidate("tier 3 updated")
+    await worker_b.get(("models", "free"), build)
+    assert build.calls == 2
@@ -0,0 +1,207 @@
+"""
+Tests for the multipart transfer engine used by cloud backups
+
+Runs against an in-memory S3 stand-in implementing the subset of the
+boto3 client API the engine uses.
+"""
+
+import io
+import os
+import sys
+import uuid
+import hashlib
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import multipart_transfer
+from multipart_transfer import MultipartTransferEngine, MiB, file_sha256
+
+
+class LocalS3:
+    """Minimal thread-safe in-memory S3 stand-in"""
+
+    def __init__(self, fail_parts=None):
+        self.objects = {}
+        self.uploads = {}
+        self.upload_part_calls = 0
+        self.fail_parts = set(fail_parts or [])
+        self._lock = threading.Lock()
+
+    def create_multipart_upload(self, Bucket, Key, Metadata=None):
+        upload_id = uuid.uuid4().hex
+        self.uploads[upload_id] = {"key": Key, "parts": {}, "metadata": Metadata}
+        return {"UploadId": upload_id}
+
+    def upload_part(self, Bucket, Key, PartNumber, UploadId, Body, ContentMD5=None):
+        with self._lock:
+            self.upload_part_calls += 1
+            if PartNumber in self.fail_parts:
+                raise IOError(f"simulated failure on part {PartNumber}")
+        etag = f'"{hashlib.md5(Body).hexdigest()}"'
+        self.uploads[UploadId]["parts"][PartNumber] = (etag, Body)
+        return {"ETag": etag}
+
+    def list_parts(self, Bucket, Key, UploadId, PartNumberMarker=0):
+        if UploadId not in self.uploads:
+            raise KeyError("NoSuchUpload")
+        parts = sorted(self.uploads[UploadId]["parts"].items())
+        return {
+            "Parts": [{"PartNumber": n, "ETag": etag} for n, (etag, _) in parts],
+            "IsTruncated": False,
+        }
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        upload = self.uploads.pop(UploadId)
+        body = b"".join(
+            upload["parts"][p["PartNumber"]][1] for p in MultipartUpload["Parts"]
+        )
+        self.objects[Key] = body
+        return {"ETag": '"complete"'}
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.uploads.pop(UploadId, None)
+
+    def head_object(self, Bucket, Key):
+        return {"ContentLength": len(self.objects[Key])}
+
+    def get_object(self, Bucket, Key, Range=None):
+        body = self.objects[Key]
+        if Range:
+            start, end = Range.replace("bytes=", "").split("-")
+            body = body[int(start):int(end) + 1]
+        return {"Body": io.BytesIO(body)}
+
+
+@pytest.fixture(autouse=True)
+def no_retry_backoff(monkeypatch):
+    monkeypatch.setattr(multipart_transfer, "RETRY_BACKOFF_SECONDS", 0)
+
+
+@pytest.fixture
+def payload(tmp_path):
+    path = tmp_path / "backup.tar.gz"
+    path.write_bytes(os.urandom(23 * MiB + 123))
+    return path
+
+
+def make_engine(client, tmp_path):
+    return MultipartTransferEngine(
+        client,
+        "test-bucket",
+        state_dir=str(tmp_path / "state"),
+        concurrency=3,
+        min_part_size=5 * MiB,
+    )
+
+
+def test_part_size_respects_s3_limits(tmp_path):
+    engine = make_engine(LocalS3(), tmp_path)
+
+    assert engine.choose_part_size(1 * MiB) == 5 * MiB
+    huge = 4 * 1024 * 1024 * MiB  # 4 TiB
+    assert huge / engine.choose_part_size(huge) <= 10000
+    assert engine.choose_part_size(huge) % MiB == 0
+
+
+def test_concurrency_bounded_by_buffer_budget(tmp_path):
+    engine = make_engine(LocalS3(), tmp_path)
+    engine.max_buffer_bytes = 10 * MiB
+
+    assert engine.effective_concurrency(5 * MiB) == 2
+    assert engine.effective_concurrency(64 * MiB) == 1
+
+
+@pytest.mark.asyncio
+async def test_upload_round_trip_with_checksum(tmp_path, payload):
+    client = LocalS3()
+    engine = make_engine(client, tmp_path)
+    progress = []
+
+    async def on_progress(nbytes):
+        progress.append(nbytes)
+
+    result = await engine.upload_file(str(payload), "backups/b1.tar.gz", progress_callback=on_progress)
+
+    assert client.objects["backups/b1.tar.gz"] == payload.read_bytes()
+    assert result["parts"] == 5
+    assert result["sha256"] == file_sha256(str(payload))
+    assert progress[-1] == payload.stat().st_size
+    assert not os.listdir(tmp_path / "state")
+
+
+@pytest.mark.asyncio
+async def test_interrupted_upload_resumes(tmp_path, payload):
+    client = LocalS3(fail_parts={4})
+    engine = make_engine(client, tmp_path)
+
+    with pytest.raises(IOError):
+        await engine.upload_file(str(payload), "backups/b2.tar.gz")
+    assert "backups/b2.tar.gz" not in client.objects
+
+    # Fresh engine simulates a restarted process
+    client.fail_parts.clear()
+    client.upload_part_calls = 0
+    engine = make_engine(client, tmp_path)
+    result = await engine.upload_file(str(payload), "backups/b2.tar.gz")
+
+    assert result["resumed_parts"] >= 1
+    assert client.upload_part_calls == 5 - result["resumed_parts"]
+    assert client.objects["backups/b2.tar.gz"] == payload.read_bytes()
+
+
+@pytest.mark.asyncio
+async def test_changed_file_restarts_upload(tmp_path, payload):
+    client = LocalS3(fail_parts={2})
+    engine = make_engine(client, tmp_path)
+
+    with pytest.raises(IOError):
+        await engine.upload_file(str(payload), "backups/b3.tar.gz")
+
+    client.fail_parts.clear()
+    payload.write_bytes(os.urandom(12 * MiB))
+    result = await engine.upload_file(str(payload), "backups/b3.tar.gz")
+
+    assert result["resumed_parts"] == 0
+    assert len(client.uploads) == 0
+    assert client.objects["backups/b3.tar.gz"] == payload.read_bytes()
+
+
+@pytest.mark.asyncio
+async def test_ranged_download_verifies_checksum(tmp_path, payload):
+    client = LocalS3()
+    engine = make_engine(client, tmp_path)
+    client.objects["backups/b4.tar.gz"] = payload.read_bytes()
+    target = tmp_path / "restore" / "b4.tar.gz"
+    target.parent.mkdir()
+
+    result = await engine.download_file(
+        "backups/b4.tar.gz", str(target), expected_sha256=file_sha256(str(payload))
+    )
+
+    assert result["ranges"] == 5
+    assert target.read_bytes() == payload.read_bytes()
+
+    with pytest.raises(ValueError):
+        await engine.download_file("backups/b4.tar.gz", str(target), expected_sha256="0" * 64)
+    assert not os.path.exists(f"{target}.partial")
+
+
+@pytest.mark.asyncio
+async def test_failed_download_removes_partial_file(tmp_path, payload, monkeypatch):
+    client = LocalS3()
+    engine = make_engine(client, tmp_path)
+    client.objects["backups/b5.tar.gz"] = payload.read_bytes()
+    target = tmp_path / "b5.tar.gz"
+
+    def broken_get_object(Bucket, Key, Range=None):
+        raise IOError("connection reset")
+
+    monkeypatch.setattr(client, "get_object", broken_get_object)
+    with pytest.raises(IOError):
+        await engine.download_file("backups/b5.tar.gz", str(target))
+
+    assert not os.path.exists(f"{target}.partial")
+    assert not target.exists()
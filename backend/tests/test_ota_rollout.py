@@ -0,0 +1,219 @@
+"""Tests for staged OTA rollout waves and resumable package downloads"""
+
+import hashlib
+import os
+import sys
+from uuid import uuid4
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(__file__))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(os.path.dirname(BACKEND_DIR), "edge-agent"))
+
+import database
+import edge_agent
+from edge_agent import EdgeAgent
+from ota_manager import OTAManager, RolloutStrategy, plan_waves
+
+
+class FakeConnection:
+    def __init__(self, devices=(), progress=None):
+        self.devices = list(devices)
+        self.progress = progress
+        self.copies = []
+        self.executes = []
+
+    async def fetch(self, query, *args):
+        return [{"id": d} for d in self.devices]
+
+    async def fetchval(self, query, *args):
+        return uuid4()
+
+    async def fetchrow(self, query, *args):
+        return self.progress
+
+    async def execute(self, query, *args):
+        self.executes.append((" ".join(query.split()), args))
+
+    async def copy_records_to_table(self, table, records, columns):
+        self.copies.append((table, list(records), columns))
+
+    def transaction(self):
+        class Transaction:
+            async def __aenter__(self):
+                pass
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return Transaction()
+
+    async def close(self):
+        pass
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    holder = {}
+
+    async def get_db_connection(subsystem=None):
+        return holder["conn"]
+
+    monkeypatch.setattr(database, "get_db_connection", get_db_connection)
+    return holder
+
+
+def test_plan_waves():
+    assert plan_waves(1000, RolloutStrategy.IMMEDIATE) == [0] * 1000
+
+    canary = plan_waves(1000, RolloutStrategy.CANARY, rollout_percentage=5)
+    assert canary.count(0) == 50 and canary.count(1) == 950
+
+    rolling = plan_waves(12, RolloutStrategy.ROLLING)
+    assert rolling == [0] * 5 + [1] * 5 + [2] * 2
+
+    custom = plan_waves(1000, RolloutStrategy.MANUAL, waves=[1, 10, 50])
+    assert [custom.count(w) for w in range(4)] == [10, 90, 400, 500]
+
+    # Tiny fleets never produce empty waves
+    assert plan_waves(2, RolloutStrategy.CANARY, rollout_percentage=1) == [0, 1]
+
+    with pytest.raises(ValueError):
+        plan_waves(10, RolloutStrategy.MANUAL, waves=[50, 10])
+
+
+@pytest.mark.asyncio
+async def test_create_deployment_copies_all_targets_once(fake_db):
+    devices = [uuid4() for _ in range(2000)]
+    conn = fake_db["conn"] = FakeConnection(devices)
+
+    result = await OTAManager(None).create_deployment(
+        "fw-2", uuid4(), "2.0.0", uuid4(),
+        rollout_strategy=RolloutStrategy.CANARY, rollout_percentage=10
+    )
+
+    assert result["target_devices"] == 2000
+    assert result["wave_sizes"] == [200, 1800]
+    [(table, records, columns)] = conn.copies
+    assert table == "ota_deployment_devices"
+    assert columns == ["deployment_id", "device_id", "status", "wave"]
+    assert [r[1] for r in records] == devices
+    assert conn.executes == []
+
+
+def progress(active=0, failed=0, released=100, current_wave=0, last_wave=2, status="in_progress"):
+    return {
+        "status": status, "current_wave": current_wave, "metadata": '{"max_failure_percentage": 10}',
+        "released": released, "active": active, "failed": failed, "last_wave": last_wave,
+    }
+
+
+@pytest.mark.asyncio
+async def test_wave_release_is_gated_on_failures():
+    manager = OTAManager(None)
+    deployment_id = uuid4()
+
+    # Wave still running: nothing happens
+    conn = FakeConnection(progress=progress(active=3))
+    await manager._check_deployment_completion(conn, deployment_id)
+    assert conn.executes == []
+
+    # Finished within the failure budget: next wave released
+    conn = FakeConnection(progress=progress(failed=5))
+    await manager._check_deployment_completion(conn, deployment_id)
+    [(query, args)] = conn.executes
+    assert query.startswith("UPDATE ota_deployments SET current_wave")
+    assert args == (deployment_id, 0)
+
+    # Too many failures: deployment pauses instead
+    conn = FakeConnection(progress=progress(failed=20))
+    await manager._check_deployment_completion(conn, deployment_id)
+    [(query, args)] = conn.executes
+    assert args[0] == "paused"
+
+    # Last wave done: deployment finishes
+    conn = FakeConnection(progress=progress(current_wave=2))
+    await manager._check_deployment_completion(conn, deployment_id)
+    [(query, args)] = conn.executes
+    assert args[0] == "completed"
+
+
+class FakeContent:
+    def __init__(self, data, fail_after=None):
+        self.data = data
+        self.fail_after = fail_after
+
+    async def iter_chunked(self, size):
+        for i in range(0, len(self.data), size):
+            if self.fail_after is not None and i >= self.fail_after:
+                raise edge_agent.aiohttp.ClientPayloadError("connection reset")
+            yield self.data[i:i + size]
+
+
+class FakeResponse:
+    def __init__(self, status, data=b"", fail_after=None):
+        self.status = status
+        self.content = FakeContent(data, fail_after)
+
+    def raise_for_status(self):
+        raise edge_agent.aiohttp.ClientConnectionError(f"HTTP {self.status}")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class RangeServer:
+    """Serves a package honouring Range; the first response drops midway"""
+
+    def __init__(self, package, drop_at):
+        self.package = package
+        self.drop_at = drop_at
+        self.ranges = []
+
+    def get(self, url, headers=None, **kwargs):
+        start = int(headers["Range"][6:-1]) if headers and "Range" in headers else 0
+        self.ranges.append(start)
+        fail_after = self.drop_at if len(self.ranges) == 1 else None
+        return FakeResponse(206 if start else 200, self.package[start:], fail_after)
+
+
+@pytest.mark.asyncio
+async def test_download_resumes_and_is_content_addressed(tmp_path, monkeypatch):
+    monkeypatch.setattr(edge_agent.asyncio, "sleep", lambda delay: _noop())
+    package = os.urandom(1024 * 1024)
+    checksum = hashlib.sha256(package).hexdigest()
+
+    agent = EdgeAgent("dev-1", "token", "https://cloud", spool_dir=str(tmp_path / "spool"),
+                      package_dir=str(tmp_path / "packages"))
+    agent.session = server = RangeServer(package, drop_at=300 * 1024)
+
+    path = await agent.download_update_package("https://cdn/fw.tar.gz", checksum.upper())
+
+    # Second request only fetched the remainder
+    assert server.ranges == [0, 320 * 1024]
+    assert path.name == f"{checksum}.pkg"
+    assert path.read_bytes() == package
+    assert not list((tmp_path / "packages").glob("*.partial"))
+
+    # Cached: no further requests
+    assert await agent.download_update_package("https://cdn/fw.tar.gz", checksum) == path
+    assert len(server.ranges) == 2
+
+
+@pytest.mark.asyncio
+async def test_checksum_mismatch_discards_download(tmp_path):
+    agent = EdgeAgent("dev-1", "token", "https://cloud", spool_dir=str(tmp_path / "spool"),
+                      package_dir=str(tmp_path / "packages"))
+    agent.session = RangeServer(b"tampered", drop_at=None)
+
+    with pytest.raises(Exception, match="Checksum mismatch"):
+        await agent.download_update_package("https://cdn/fw.tar.gz", "0" * 64)
+    assert not list((tmp_path / "packages").iterdir())
+
+
+async def _noop():
+    pass
@@ -0,0 +1,146 @@
+"""Tests for lazy router mounting"""
+
+import ast
+import os
+import sys
+import textwrap
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from router_registry import ROUTER_MANIFEST, RouterRegistry, RouterSpec
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _router_paths(module: str, attr: str):
+    """Full route paths of module.attr, read from the source without importing it"""
+    base = os.path.join(BACKEND, *module.split('.'))
+    path = base + '.py' if os.path.exists(base + '.py') else os.path.join(base, '__init__.py')
+    with open(path) as f:
+        tree = ast.parse(f.read())
+
+    prefix = None
+    for node in ast.walk(tree):
+        if (isinstance(node, ast.Assign) and isinstance(node.value, ast.Call)
+                and getattr(node.value.func, 'id', None) == 'APIRouter'
+                and any(getattr(target, 'id', None) == attr for target in node.targets)):
+            prefix = next((ast.literal_eval(k.value) for k in node.value.keywords if k.arg == 'prefix'), '')
+    assert prefix is not None, f"{module}.{attr} is not an APIRouter"
+
+    paths = []
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            for decorator in node.decorator_list:
+                if (isinstance(decorator, ast.Call) and isinstance(decorator.func, ast.Attribute)
+                        and getattr(decorator.func.value, 'id', None) == attr
+                        and decorator.func.attr != 'on_event' and decorator.args):
+                    paths.append(prefix + ast.literal_eval(decorator.args[0]))
+    return paths
+
+
+def test_manifest_prefixes_cover_every_route():
+    names = [spec.name for spec in ROUTER_MANIFEST]
+    assert len(names) == len(set(names))
+
+    for spec in ROUTER_MANIFEST:
+        for attr in spec.routers:
+            for path in _router_paths(spec.module, attr):
+                assert path.startswith(spec.prefixes), f"{spec.name}: {path} not under {spec.prefixes}"
+
+
+def _write_module(directory, name, body):
+    (directory / f"{name}.py").write_text(textwrap.dedent(body))
+
+
+@pytest.mark.asyncio
+async def test_routers_load_on_first_request_in_manifest_order(tmp_path, monkeypatch):
+    monkeypatch.syspath_prepend(str(tmp_path))
+    _write_module(tmp_path, 'lazy_first', """
+        from fastapi import APIRouter
+        router = APIRouter(prefix="/api/x")
+        started = []
+        @router.on_event("startup")
+        async def startup():
+            started.append(True)
+        @router.get("/ping")
+        async def ping():
+            return {"from": "first"}
+    """)
+    _write_module(tmp_path, 'eager_second', """
+        from fastapi import APIRouter
+        router = APIRouter(prefix="/api/x")
+        @router.get("/ping")
+        async def ping():
+            return {"from": "second"}
+        @router.get("/other")
+        async def other():
+            return {"from": "second"}
+    """)
+    _write_module(tmp_path, 'lazy_unused', """
+        from fastapi import APIRouter
+        router = APIRouter(prefix="/api/unused")
+        @router.get("/")
+        async def index():
+            return {}
+    """)
+    _write_module(tmp_path, 'lazy_broken', """
+        raise ImportError("missing dependency")
+    """)
+    manifest = (
+        RouterSpec('first', 'lazy_first', ('/api/x',)),
+        RouterSpec('second', 'eager_second', ('/api/x',), eager=True),
+        RouterSpec('unused', 'lazy_unused', ('/api/unused',)),
+        RouterSpec('broken', 'lazy_broken', ('/api/broken',)),
+        RouterSpec('disabled', 'lazy_unused', ('/api/disabled',)),
+        RouterSpec('flagged', 'lazy_unused', ('/api/flagged',), flag='LAZY_TEST_FLAG'),
+    )
+    monkeypatch.setenv('LAZY_TEST_FLAG', 'false')
+
+    app = FastAPI()
+    registry = RouterRegistry(manifest, mode='lazy', eager=(), disabled={'disabled'})
+    registry.mount(app)
+    loaded = []
+    registry.on_load('first', loaded.append)
+
+    # A catch-all registered after the registry must not shadow lazy routes
+    @app.get("/{full_path:path}")
+    async def spa(full_path: str):
+        return {"from": "spa"}
+
+    assert 'eager_second' in sys.modules
+    assert 'lazy_first' not in sys.modules
+    for handler in app.router.on_startup:
+        await handler()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        # The earlier manifest entry still wins the overlapping route
+        assert (await client.get("/api/x/ping")).json() == {"from": "first"}
+        assert (await client.get("/api/x/other")).json() == {"from": "second"}
+        assert (await client.get("/api/broken")).json() == {"from": "spa"}
+
+    first = sys.modules['lazy_first']
+    assert first.started == [True]
+    assert loaded == [first]
+    assert 'lazy_unused' not in sys.modules
+
+    stats = registry.get_stats()
+    routers = {entry["name"]: entry for entry in stats["routers"]}
+    assert stats["mounted"] == 4 and set(stats["disabled"]) == {'disabled', 'flagged'}
+    assert routers["first"]["state"] == 'loaded' and routers["first"]["trigger"] == 'request'
+    assert routers["second"]["trigger"] == 'startup' and routers["second"]["routes"] == 2
+    assert routers["unused"]["state"] == 'pending'
+    assert routers["broken"]["state"] == 'failed' and "missing dependency" in routers["broken"]["error"]
+
+    # The OpenAPI schema is built with every router loaded
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        schema = (await client.get("/openapi.json")).json()
+    assert "/api/unused/" in schema["paths"]
+    assert registry.get_stats()["pending"] == 0
+
+    for name in ('lazy_first', 'eager_second', 'lazy_unused', 'lazy_broken'):
+        sys.modules.pop(name, None)
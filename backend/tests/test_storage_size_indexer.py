@@ -0,0 +1,81 @@
+"""
+Tests for the incremental directory size indexer behind the storage page
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from storage_size_indexer import DirectorySizeIndexer
+
+
+def write(path, size):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"x" * size)
+
+
+@pytest.fixture
+def volumes(tmp_path):
+    write(tmp_path / "models" / "a" / "weights.bin", 5000)
+    write(tmp_path / "models" / "a" / "config.json", 100)
+    write(tmp_path / "models" / "b" / "c" / "deep.bin", 2000)
+    write(tmp_path / "postgres" / "base.dat", 300)
+    return tmp_path
+
+
+def test_totals_cover_whole_subtree(volumes):
+    indexer = DirectorySizeIndexer(roots=[str(volumes)])
+    assert indexer.get_total(str(volumes / "models")) is None
+
+    indexer.refresh()
+
+    models = indexer.get_total(str(volumes / "models"))
+    assert models.size == 7100
+    assert models.files == 3
+    assert models.largest[0][0] == 5000
+    assert models.largest[0][1].endswith("weights.bin")
+    assert indexer.get_total(str(volumes)).size == 7400
+    assert indexer.ready
+
+
+def test_only_changed_directories_are_relisted(volumes):
+    indexer = DirectorySizeIndexer(roots=[str(volumes)])
+    indexer.refresh()
+    listed_first_pass = indexer.stats["dirs_listed"]
+
+    write(volumes / "models" / "b" / "c" / "new.bin", 1000)
+    indexer.refresh()
+
+    # Only models/b/c changed
+    assert indexer.stats["dirs_listed"] == listed_first_pass + 1
+    assert indexer.get_total(str(volumes / "models")).size == 8100
+    assert indexer.get_total(str(volumes / "postgres")).size == 300
+
+
+def test_removed_directories_are_forgotten(volumes):
+    indexer = DirectorySizeIndexer(roots=[str(volumes)])
+    indexer.refresh()
+
+    os.remove(volumes / "postgres" / "base.dat")
+    os.rmdir(volumes / "postgres")
+    indexer.refresh()
+
+    assert indexer.get_total(str(volumes / "postgres")) is None
+    assert indexer.get_total(str(volumes)).size == 7100
+
+
+def test_full_rescan_picks_up_in_place_growth(volumes):
+    indexer = DirectorySizeIndexer(roots=[str(volumes)])
+    indexer.refresh()
+
+    # Appending to an existing file does not change the directory mtime
+    with open(volumes / "postgres" / "base.dat", "ab") as f:
+        f.write(b"x" * 700)
+    indexer.refresh()
+    assert indexer.get_total(str(volumes / "postgres")).size == 300
+
+    indexer.refresh(force_full=True)
+    assert indexer.get_total(str(volumes / "postgres")).size == 1000
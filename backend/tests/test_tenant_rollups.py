@@ -0,0 +1,136 @@
+"""Tests for the cross-tenant analytics rollups"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+
+import asyncpg
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from conftest import FakeAsyncpgConnection, FakePool
+from tenant_rollups import TenantRollups, plan_tier
+
+
+NOW = datetime.utcnow()
+
+
+class FakeConnection(FakeAsyncpgConnection):
+    def __init__(self, organizations, members, devices=None):
+        self.organizations = organizations
+        self.members = members
+        self.devices = devices  # None: table does not exist
+        self.executemany_calls = []
+        self.executes = []
+        self.locked = False
+
+    async def fetchval(self, query, *args):
+        if "pg_try_advisory_lock" in query:
+            return not self.locked
+
+    async def fetch(self, query, *args):
+        if "FROM tenant_rollups" in query:
+            return []
+        if "FROM organizations" in query:
+            return self.organizations
+        if "FROM organization_members" in query:
+            return self._count(self.members, "joined_at" in query, args)
+        if "FROM edge_devices" in query:
+            if self.devices is None:
+                raise asyncpg.UndefinedTableError("relation does not exist")
+            return self._count(self.devices, "registered_at" in query, args)
+        raise asyncpg.UndefinedTableError("relation does not exist")
+
+    def _count(self, rows, by_day, args):
+        counts = {}
+        for org_id, created in rows:
+            if by_day:
+                if created < args[0]:
+                    continue
+                key = (org_id, created.date())
+            else:
+                key = (org_id,)
+            counts[key] = counts.get(key, 0) + 1
+        if by_day:
+            return [{"organization_id": k[0], "day": k[1], "count": c} for k, c in counts.items()]
+        return [{"organization_id": k[0], "count": c} for k, c in counts.items()]
+
+    async def execute(self, query, *args):
+        self.executes.append((" ".join(query.split()), args))
+        return "DELETE 0" if query.lstrip().startswith("DELETE") else "OK"
+
+    async def executemany(self, query, args):
+        self.executemany_calls.append((" ".join(query.split()), list(args)))
+
+
+def org(org_id, tier="trial", active=True, age_days=100):
+    return {
+        "id": org_id, "name": org_id, "is_active": active,
+        "metadata_json": f'{{"plan_tier": "{tier}"}}',
+        "created_at": NOW - timedelta(days=age_days), "updated_at": NOW,
+    }
+
+
+def upserts(conn, table):
+    return [rows for query, rows in conn.executemany_calls if f"INSERT INTO {table} " in query]
+
+
+def test_plan_tier():
+    assert plan_tier('{"plan_tier": "enterprise"}') == "enterprise"
+    assert plan_tier({"other": 1}) == "trial"
+    assert plan_tier(None) == "trial"
+    assert plan_tier("not json") == "trial"
+
+
+@pytest.mark.asyncio
+async def test_refresh_writes_only_changed_tenants():
+    organizations = [org(f"org-{i}", tier="starter" if i % 2 else "trial") for i in range(100)]
+    organizations.append(org("new-org", tier="enterprise", age_days=0))
+    members = [(f"org-{i}", NOW - timedelta(days=200)) for i in range(100)]
+    members += [("new-org", NOW), ("new-org", NOW - timedelta(days=3))]
+    conn = FakeConnection(organizations, members)
+    rollups = TenantRollups(history_days=30)
+    rollups.db_pool = FakePool(conn)
+
+    assert await rollups.refresh() is True
+    [tenant_rows] = upserts(conn, "tenant_rollups")
+    assert len(tenant_rows) == 101
+
+    [daily_rows] = upserts(conn, "tenant_rollup_daily")
+    today = NOW.date()
+    by_key = {(r[0], r[1]): r for r in daily_rows}
+    enterprise = by_key[(today, "enterprise")]
+    assert enterprise[2:6] == (1, 1, 2, 0)  # tenants, active, users, devices
+    assert enterprise[8] == 1 and enterprise[10] == 1  # new tenant, new user today
+    assert by_key[(today - timedelta(days=3), "enterprise")][10] == 1
+    assert by_key[(today - timedelta(days=3), "enterprise")][2] is None  # past totals untouched
+    assert by_key[(today, "starter")][2] == 50
+
+    # Nothing changed: no tenant writes; one member added and one org removed
+    conn.executemany_calls.clear()
+    await rollups.refresh()
+    assert upserts(conn, "tenant_rollups") == []
+
+    members.append(("org-1", NOW))
+    del organizations[0]
+    conn.executemany_calls.clear()
+    conn.executes.clear()
+    await rollups.refresh()
+    [tenant_rows] = upserts(conn, "tenant_rollups")
+    assert [(r[0], r[4]) for r in tenant_rows] == [("org-1", 2)]
+    deletes = [query for query, args in conn.executes if query.startswith("DELETE FROM tenant_rollups ")]
+    assert deletes == ["DELETE FROM tenant_rollups WHERE organization_id NOT IN (SELECT id::text FROM organizations)"]
+    assert rollups.get_stats()["tenants"] == 100
+
+
+@pytest.mark.asyncio
+async def test_refresh_skipped_when_another_instance_holds_the_lock():
+    conn = FakeConnection([org("a")], [])
+    conn.locked = True
+    rollups = TenantRollups()
+    rollups.db_pool = FakePool(conn)
+
+    assert await rollups.refresh() is False
+    assert conn.executemany_calls == []
+    assert rollups.refreshes == 0
@@ -0,0 +1,90 @@
+"""Tests for the cached Traefik dynamic config model"""
+
+import os
+import sys
+
+import pytest
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from traefik_dynamic_config import DynamicConfigStore
+
+
+def write_yaml(path, data):
+    with open(path, "w") as f:
+        yaml.dump(data, f)
+
+
+@pytest.fixture
+def dynamic_dir(tmp_path):
+    write_yaml(tmp_path / "routes.yml", {
+        "http": {
+            "routers": {
+                "app": {"rule": "Host(`app.example.com`)", "service": "app", "tls": {"certResolver": "le"}},
+                "api": {"rule": "Host(`api.example.com`)", "service": "api"},
+            },
+            "services": {"app": {"loadBalancer": {"servers": [{"url": "http://app:8080"}]}}},
+        }
+    })
+    write_yaml(tmp_path / "middleware.yml", {
+        "http": {"middlewares": {"limit": {"rateLimit": {"average": 100}}}}
+    })
+    return tmp_path
+
+
+@pytest.mark.parametrize("use_inotify", [True, False])
+def test_unchanged_files_are_not_reparsed(dynamic_dir, use_inotify):
+    store = DynamicConfigStore(dynamic_dir, use_inotify=use_inotify)
+
+    assert sorted(r["name"] for r in store.list("routers")) == ["api", "app"]
+    assert store.get("routers", "app")["cert_resolver"] == "le"
+    assert store.get("middlewares", "limit")["type"] == "rateLimit"
+    store.list("services")
+    assert store.stats["parses"] == 2
+
+    write_yaml(dynamic_dir / "middleware.yml", {
+        "http": {"middlewares": {"limit": {"rateLimit": {"average": 5}}, "auth": {"basicAuth": {}}}}
+    })
+
+    assert store.get("middlewares", "auth") is not None
+    assert store.get("middlewares", "limit")["config"] == {"average": 5}
+    assert store.stats["parses"] == 3
+
+
+def test_removed_file_drops_index_entries(dynamic_dir):
+    store = DynamicConfigStore(dynamic_dir)
+    assert store.get("middlewares", "limit")
+
+    os.remove(dynamic_dir / "middleware.yml")
+
+    assert store.get("middlewares", "limit") is None
+    assert store.files() == ["routes.yml"]
+
+
+def test_write_updates_model_without_reparse(dynamic_dir):
+    store = DynamicConfigStore(dynamic_dir)
+    store.refresh()
+    parses = store.stats["parses"]
+
+    config = store.load_for_edit("routes.yml")
+    config["http"]["routers"]["new"] = {"rule": "Host(`new.example.com`)", "service": "app"}
+    store.write("routes.yml", config)
+
+    assert store.get("routers", "new")["service"] == "app"
+    assert store.stats["writes"] == 1
+    assert store.stats["parses"] == parses
+    with open(dynamic_dir / "routes.yml") as f:
+        assert "new" in yaml.safe_load(f)["http"]["routers"]
+    assert not [p for p in os.listdir(dynamic_dir) if p.endswith(".tmp")]
+
+
+def test_unparseable_file_is_reported_not_fatal(dynamic_dir):
+    (dynamic_dir / "broken.yml").write_text("http: [unclosed")
+    store = DynamicConfigStore(dynamic_dir)
+
+    assert len(store.list("routers")) == 2
+    assert store.file("broken.yml").error
+    with pytest.raises(ValueError):
+        store.load_for_edit("broken.yml")
+
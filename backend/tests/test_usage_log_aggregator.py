@@ -0,0 +1,124 @@
+"""Tests for the checkpointed usage log aggregation"""
+
+import json
+import os
+import sys
+from datetime import datetime, timezone
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from conftest import FakeAsyncpgConnection, FakePool
+from usage_log_aggregator import (
+    DURATION_BOUNDS_MS, UsageLogAggregator, histogram_percentile, normalize_endpoint, parse_log_line
+)
+
+
+class FakeConnection(FakeAsyncpgConnection):
+    """Applies the aggregator's upserts to in-memory tables"""
+
+    def __init__(self):
+        self.buckets = {}
+        self.offsets = {}
+
+    async def fetchval(self, query, *args):
+        return True
+
+    async def fetch(self, query, host):
+        return [
+            {'file_path': path, 'inode': inode, 'byte_offset': offset}
+            for (h, path), (inode, offset) in self.offsets.items() if h == host
+        ]
+
+    async def executemany(self, query, rows):
+        for row in rows:
+            if 'usage_log_buckets' in query:
+                calls, total_ms, hist = row[5:]
+                old = self.buckets.get(row[:5])
+                if old:
+                    calls += old[0]
+                    total_ms += old[1]
+                    hist = [a + b for a, b in zip(old[2], hist)]
+                self.buckets[row[:5]] = (calls, total_ms, list(hist))
+            else:
+                host, path, inode, offset = row
+                self.offsets[(host, path)] = (inode, offset)
+
+
+def json_line(path, status=200, duration_ms=40, user='u1', ts='2026-10-18T09:15:00Z'):
+    return json.dumps({
+        'timestamp': ts, 'path': path, 'status': status, 'duration_ms': duration_ms, 'user_id': user
+    }) + '\n'
+
+
+def make_aggregator(tmp_path):
+    aggregator = UsageLogAggregator(log_dir=tmp_path, host='app-1')
+    aggregator.db_pool = FakePool(FakeConnection())
+    return aggregator
+
+
+def test_parse_access_log_line_and_endpoint_normalization():
+    entry = parse_log_line(
+        '10.0.0.5 - - [18/Oct/2026:09:30:12 +0000] "POST /api/v1/llm/chat?x=1 HTTP/1.1" '
+        '502 120 "-" "curl/8" 0.250'
+    )
+    assert entry['timestamp'] == datetime(2026, 10, 18, 9, 30, 12, tzinfo=timezone.utc)
+    assert entry['status'] == 502
+    assert entry['duration_ms'] == 250.0
+    assert parse_log_line('not a request') is None
+    assert normalize_endpoint('/api/v1/users/42/keys?limit=5') == '/api/v1/users/:id/keys'
+
+
+@pytest.mark.asyncio
+async def test_only_new_complete_lines_are_counted(tmp_path):
+    log = tmp_path / 'api.log'
+    log.write_text(json_line('/api/v1/llm/chat') + json_line('/api/v1/llm/chat', status=500, duration_ms=700))
+    aggregator = make_aggregator(tmp_path)
+
+    assert await aggregator.aggregate_once() == 2
+    # Nothing new: nothing counted twice
+    assert await aggregator.aggregate_once() == 0
+
+    # A partial trailing line waits until it is complete
+    with open(log, 'a') as f:
+        f.write(json_line('/api/v1/search', user='u2').rstrip('\n'))
+    assert await aggregator.aggregate_once() == 0
+    with open(log, 'a') as f:
+        f.write('\n')
+    assert await aggregator.aggregate_once() == 1
+
+    buckets = aggregator.db_pool.conn.buckets
+    hour = datetime(2026, 10, 18, 9, tzinfo=timezone.utc)
+    ok = buckets[(hour, 'llm', '/api/v1/llm/chat', 'u1', 2)]
+    failed = buckets[(hour, 'llm', '/api/v1/llm/chat', 'u1', 5)]
+    assert ok[0] == 1 and failed[0] == 1
+    assert failed[2][DURATION_BOUNDS_MS.index(1000)] == 1
+    assert (hour, 'search', '/api/v1/search', 'u2', 2) in buckets
+
+
+@pytest.mark.asyncio
+async def test_rotated_file_is_read_from_the_start(tmp_path):
+    log = tmp_path / 'api.log'
+    log.write_text(json_line('/api/v1/llm/chat') * 3)
+    aggregator = make_aggregator(tmp_path)
+    assert await aggregator.aggregate_once() == 3
+
+    # Replaced by a shorter file with a new inode
+    log.rename(tmp_path / 'api.log.1')
+    log.write_text(json_line('/api/v1/llm/chat'))
+    assert await aggregator.aggregate_once() == 1
+
+    (_, offset), = aggregator.db_pool.conn.offsets.values()
+    assert offset == log.stat().st_size
+    (calls, _, _), = aggregator.db_pool.conn.buckets.values()
+    assert calls == 4
+
+
+def test_histogram_percentiles():
+    counts = [0] * (len(DURATION_BOUNDS_MS) + 1)
+    counts[DURATION_BOUNDS_MS.index(100)] = 90   # 50-100ms
+    counts[DURATION_BOUNDS_MS.index(1000)] = 10  # 500-1000ms
+    assert 50 < histogram_percentile(counts, 0.50) <= 100
+    assert 500 < histogram_percentile(counts, 0.95) <= 1000
+    assert histogram_percentile([0] * len(counts), 0.99) == 0.0
@@ -143,8 +143,7 @@ async def create_route(route: RouteCreate):
 async def get_route(route_name: str):
     """Get details of a specific route"""
     try:
-        routes = traefik_manager.list_routes()
-        route = next((r for r in routes if r['name'] == route_name), None)
+        route = traefik_manager.get_route(route_name)
 
         if not route:
             raise HTTPException(status_code=404, detail=f"Route '{route_name}' not found")
@@ -533,8 +532,7 @@ async def create_middleware(middleware: MiddlewareCreate):
 async def get_middleware(middleware_name: str):
     """Get details of a specific middleware"""
     try:
-        middleware_list = traefik_manager.list_middleware()
-        middleware = next((m for m in middleware_list if m['name'] == middleware_name), None)
+        middleware = traefik_manager.get_middleware(middleware_name)
 
         if not middleware:
             raise HTTPException(status_code=404, detail=f"Middleware '{middleware_name}' not found")
@@ -645,23 +643,16 @@ async def get_traefik_dashboard():
         routes = traefik_manager.list_routes()
         certificates = traefik_manager.list_certificates()
 
-        # Get services by parsing all dynamic configs
-        services = []
-        for config_path in traefik_manager.dynamic_dir.glob("*.yml"):
-            try:
-                import yaml
-                with open(config_path, 'r') as f:
-                    config = yaml.safe_load(f)
-                if config and 'http' in config and 'services' in config['http']:
-                    for name, service in config['http']['services'].items():
-                        services.append({
-                            'name': name,
-                            'type': 'loadBalancer' if 'loadBalancer' in service else 'unknown',
-                            'servers': service.get('loadBalancer', {}).get('servers', []),
-                            'source_file': config_path.name
-                        })
-            except Exception as e:
-                logger.warning(f"Failed to parse {config_path.name}: {e}")
+        # Services straight from the cached dynamic config model
+        services = [
+            {
+                'name': name,
+                'type': 'loadBalancer' if 'loadBalancer' in service else 'unknown',
+                'servers': service.get('loadBalancer', {}).get('servers', []),
+                'source_file': source_file
+            }
+            for source_file, name, service in traefik_manager.config_store.raw_items('services')
+        ]
 
         # Get middleware
         middleware_list = traefik_manager.list_middleware()
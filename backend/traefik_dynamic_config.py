@@ -0,0 +1,372 @@
+"""
+Cached Traefik Dynamic Configuration Model
+
+Keeps the parsed contents of every `*.yml` file in Traefik's dynamic
+config directory in memory, together with name indexes for routers,
+services and middlewares, so listing and lookups are dictionary reads
+instead of re-parsing YAML on every request.
+
+Change detection:
+- On Linux an inotify watch on the directory tells us whether anything
+  changed since the last read; if nothing did, no file is even stat()ed.
+- Files are keyed by (mtime, ctime, size, inode); only files whose key
+  changed are re-parsed. A full stat pass also runs every
+  `rescan_interval` seconds in case an event was missed.
+
+Writes are atomic (temp file + rename) and update the cached model from
+the dict that was written, without re-reading it.
+"""
+
+import os
+import copy
+import time
+import ctypes
+import ctypes.util
+import logging
+import tempfile
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import yaml
+
+logger = logging.getLogger(__name__)
+
+SECTIONS = ("routers", "services", "middlewares")
+
+# (mtime_ns, ctime_ns, size, inode)
+FileKey = Tuple[int, int, int, int]
+
+
+# ============================================================================
+# Extraction (shape of the dicts returned by TraefikManager)
+# ============================================================================
+
+def extract_routes(config: Dict, source_file: str) -> List[Dict[str, Any]]:
+    """Extract routes from a parsed dynamic config"""
+    routes = []
+    if not config or 'http' not in config or 'routers' not in config['http']:
+        return routes
+
+    for name, router in (config['http']['routers'] or {}).items():
+        routes.append({
+            'name': name,
+            'rule': router.get('rule', ''),
+            'service': router.get('service', ''),
+            'entrypoints': router.get('entryPoints', []),
+            'middlewares': router.get('middlewares', []),
+            'priority': router.get('priority', 0),
+            'tls_enabled': 'tls' in router,
+            'cert_resolver': (router.get('tls') or {}).get('certResolver', None),
+            'source_file': source_file
+        })
+    return routes
+
+
+def extract_services(config: Dict, source_file: str) -> List[Dict[str, Any]]:
+    """Extract services from a parsed dynamic config"""
+    services = []
+    if not config or 'http' not in config or 'services' not in config['http']:
+        return services
+
+    for name, service in (config['http']['services'] or {}).items():
+        lb = service.get('loadBalancer', {})
+        healthcheck = lb.get('healthCheck', {})
+        services.append({
+            'name': name,
+            'servers': [s.get('url', '') for s in lb.get('servers', [])],
+            'healthcheck_path': healthcheck.get('path'),
+            'healthcheck_interval': healthcheck.get('interval'),
+            'source_file': source_file
+        })
+    return services
+
+
+def extract_middleware(config: Dict, source_file: str) -> List[Dict[str, Any]]:
+    """Extract middleware from a parsed dynamic config"""
+    middleware_list = []
+    if not config or 'http' not in config or 'middlewares' not in config['http']:
+        return middleware_list
+
+    for name, middleware in (config['http']['middlewares'] or {}).items():
+        # Middleware type is the first key
+        mw_type = list(middleware.keys())[0] if middleware else 'unknown'
+        middleware_list.append({
+            'name': name,
+            'type': mw_type,
+            'config': middleware.get(mw_type, {}) if middleware else {},
+            'source_file': source_file
+        })
+    return middleware_list
+
+
+EXTRACTORS = {
+    "routers": extract_routes,
+    "services": extract_services,
+    "middlewares": extract_middleware,
+}
+
+
+@dataclass
+class DynamicConfigFile:
+    """Parsed state of one dynamic config file"""
+    name: str
+    key: Optional[FileKey]
+    config: Dict[str, Any]
+    error: Optional[str] = None
+    items: Dict[str, List[Dict[str, Any]]] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, name: str, key: Optional[FileKey], config: Any, error: Optional[str] = None):
+        config = config if isinstance(config, dict) else {}
+        entry = cls(name=name, key=key, config=config, error=error)
+        entry.items = {section: EXTRACTORS[section](config, name) for section in SECTIONS}
+        return entry
+
+
+# ============================================================================
+# inotify (Linux only, optional)
+# ============================================================================
+
+class _DirectoryWatch:
+    """Non-blocking inotify watch; `changed()` is None when unavailable"""
+
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    MASK = (
+        0x00000002 | 0x00000004 | 0x00000008 |  # MODIFY, ATTRIB, CLOSE_WRITE
+        0x00000040 | 0x00000080 | 0x00000100 |  # MOVED_FROM, MOVED_TO, CREATE
+        0x00000200 | 0x00000400 | 0x00000800    # DELETE, DELETE_SELF, MOVE_SELF
+    )
+
+    def __init__(self, path: Path):
+        self.fd: Optional[int] = None
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+            if fd < 0:
+                return
+            if libc.inotify_add_watch(fd, str(path).encode(), self.MASK) < 0:
+                os.close(fd)
+                return
+            self.fd = fd
+        except (OSError, AttributeError):
+            self.fd = None
+
+    def changed(self) -> Optional[bool]:
+        """Drain queued events; True if there were any"""
+        if self.fd is None:
+            return None
+        seen = False
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return seen
+            except OSError:
+                self.close()
+                return None
+            if not data:
+                return seen
+            seen = True
+
+    def close(self):
+        if self.fd is not None:
+            try:
+                os.close(self.fd)
+            except OSError:
+                pass
+            self.fd = None
+
+    def __del__(self):
+        self.close()
+
+
+# ============================================================================
+# Store
+# ============================================================================
+
+class DynamicConfigStore:
+    """In-memory, change-aware model of Traefik's dynamic config directory"""
+
+    def __init__(self, dynamic_dir: Path, rescan_interval: float = 30.0, use_inotify: bool = True):
+        self.dynamic_dir = Path(dynamic_dir)
+        self.rescan_interval = rescan_interval
+
+        self._files: Dict[str, DynamicConfigFile] = {}
+        self._index: Dict[str, Dict[str, Dict[str, Dict[str, Any]]]] = {s: {} for s in SECTIONS}
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._last_scan = 0.0
+        self._watch = _DirectoryWatch(self.dynamic_dir) if use_inotify else None
+
+        self.stats = {"scans": 0, "parses": 0, "writes": 0}
+
+    # ------------------------------------------------------------------
+    # Change detection
+    # ------------------------------------------------------------------
+
+    def refresh(self, force: bool = False):
+        """Bring the model up to date with the directory"""
+        with self._lock:
+            changed = self._watch.changed() if self._watch else None
+            stale = time.monotonic() - self._last_scan >= self.rescan_interval
+            if self._loaded and not force and changed is False and not stale:
+                return
+            self._scan()
+
+    def invalidate(self):
+        """Force a full re-stat on the next read (e.g. after a restore)"""
+        with self._lock:
+            self._last_scan = 0.0
+            self._loaded = False
+
+    def _scan(self):
+        seen = set()
+        try:
+            entries = list(os.scandir(self.dynamic_dir))
+        except FileNotFoundError:
+            entries = []
+
+        for entry in entries:
+            if not entry.name.endswith(".yml") or not entry.is_file():
+                continue
+            seen.add(entry.name)
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            key = (st.st_mtime_ns, st.st_ctime_ns, st.st_size, st.st_ino)
+            current = self._files.get(entry.name)
+            if current is None or current.key != key:
+                self._set(self._parse(entry.name, key))
+
+        for name in set(self._files) - seen:
+            self._drop(name)
+
+        self._loaded = True
+        self._last_scan = time.monotonic()
+        self.stats["scans"] += 1
+
+    def _parse(self, name: str, key: FileKey) -> DynamicConfigFile:
+        self.stats["parses"] += 1
+        try:
+            with open(self.dynamic_dir / name, "r") as f:
+                return DynamicConfigFile.build(name, key, yaml.safe_load(f))
+        except Exception as e:
+            logger.warning(f"Failed to parse {name}: {e}")
+            return DynamicConfigFile.build(name, key, {}, error=str(e))
+
+    def _set(self, entry: DynamicConfigFile):
+        self._drop(entry.name)
+        self._files[entry.name] = entry
+        for section in SECTIONS:
+            for item in entry.items[section]:
+                self._index[section].setdefault(item['name'], {})[entry.name] = item
+
+    def _drop(self, name: str):
+        old = self._files.pop(name, None)
+        if not old:
+            return
+        for section in SECTIONS:
+            for item in old.items[section]:
+                owners = self._index[section].get(item['name'])
+                if owners is not None:
+                    owners.pop(name, None)
+                    if not owners:
+                        del self._index[section][item['name']]
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def files(self) -> List[str]:
+        self.refresh()
+        return sorted(self._files)
+
+    def file(self, name: str) -> Optional[DynamicConfigFile]:
+        self.refresh()
+        return self._files.get(name)
+
+    def list(self, section: str, config_file: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Extracted items of one section, across all files or one file"""
+        self.refresh()
+        with self._lock:
+            names = [config_file] if config_file else sorted(self._files)
+            return [
+                dict(item)
+                for name in names if name in self._files
+                for item in self._files[name].items[section]
+            ]
+
+    def get(self, section: str, name: str) -> Optional[Dict[str, Any]]:
+        """Single item by name (first file in name order on duplicates)"""
+        self.refresh()
+        with self._lock:
+            owners = self._index[section].get(name)
+            if not owners:
+                return None
+            return dict(owners[min(owners)])
+
+    def raw_items(self, section: str) -> List[Tuple[str, str, Dict[str, Any]]]:
+        """(source_file, name, raw definition) for every item in a section"""
+        self.refresh()
+        with self._lock:
+            return [
+                (file_name, name, definition)
+                for file_name in sorted(self._files)
+                for name, definition in (
+                    (self._files[file_name].config.get('http') or {}).get(section) or {}
+                ).items()
+            ]
+
+    def load_for_edit(self, name: str, default: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """Private copy of a file's parsed config to modify and write back"""
+        self.refresh()
+        with self._lock:
+            entry = self._files.get(name)
+            if entry is None:
+                return copy.deepcopy(default) if default is not None else None
+            if entry.error:
+                raise ValueError(f"{name} could not be parsed: {entry.error}")
+            return copy.deepcopy(entry.config)
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def write(self, name: str, config: Dict[str, Any]):
+        """Write one file atomically"""
+        config = copy.deepcopy(config)
+        with self._lock:
+            self._write_file(name, config)
+
+    def _write_file(self, name: str, config: Dict[str, Any]):
+        path = self.dynamic_dir / name
+        fd, tmp_path = tempfile.mkstemp(dir=self.dynamic_dir, prefix=f".{name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                yaml.dump(config, f, default_flow_style=False, sort_keys=False)
+                f.flush()
+                os.fsync(f.fileno())
+            if path.exists():
+                os.chmod(tmp_path, path.stat().st_mode & 0o7777)
+            else:
+                os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+        st = path.stat()
+        key = (st.st_mtime_ns, st.st_ctime_ns, st.st_size, st.st_ino)
+        self._set(DynamicConfigFile.build(name, key, config))
+        self.stats["writes"] += 1
+
+    def close(self):
+        if self._watch:
+            self._watch.close()
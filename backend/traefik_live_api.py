@@ -16,7 +16,8 @@ from datetime import datetime
 import json
 import logging
 import re
-import docker
+
+from docker_engine import docker_state
 
 logger = logging.getLogger(__name__)
 
@@ -197,50 +198,44 @@ def parse_traefik_labels(container_name: str, labels: Dict[str, str]) -> Dict[st
     }
 
 
-def get_docker_containers_with_traefik() -> List[Dict[str, Any]]:
+async def get_docker_containers_with_traefik() -> List[Dict[str, Any]]:
     """
     Get all Docker containers with Traefik labels.
 
+    Reads labels from the shared Docker state cache rather than querying
+    the Docker daemon on every request.
+
     Returns:
         List of containers with their Traefik configurations
     """
-    try:
-        # Initialize Docker client
-        client = docker.from_env()
-        
-        # Get all running containers
-        containers = client.containers.list()
-        containers_data = []
-
-        for container in containers:
-            try:
-                container_name = container.name
-                labels = container.labels
-
-                # Check if container has Traefik labels
-                has_traefik = any(key.startswith("traefik") for key in labels.keys())
-
-                if has_traefik and labels.get("traefik.enable") in ("true", "True", "1"):
-                    parsed = parse_traefik_labels(container_name, labels)
-                    if parsed["routers"] or parsed["services"] or parsed["middlewares"]:
-                        containers_data.append({
-                            "container": container_name,
-                            "labels": labels,
-                            "parsed": parsed
-                        })
-            except Exception as e:
-                logger.warning(f"Failed to inspect container {container.name}: {e}")
-                continue
-
-        return containers_data
-
-    except docker.errors.DockerException as e:
-        logger.error(f"Failed to connect to Docker: {e}")
-        raise HTTPException(status_code=500, detail="Failed to query Docker containers")
-    except Exception as e:
-        logger.error(f"Unexpected error querying Docker: {e}")
+    if not await docker_state.ensure_started():
+        logger.error(f"Failed to connect to Docker: {docker_state.error}")
         raise HTTPException(status_code=500, detail="Failed to query Docker containers")
 
+    containers_data = []
+
+    for container in docker_state.containers(all=False):
+        try:
+            container_name = container.name
+            labels = container.labels
+
+            # Check if container has Traefik labels
+            has_traefik = any(key.startswith("traefik") for key in labels.keys())
+
+            if has_traefik and labels.get("traefik.enable") in ("true", "True", "1"):
+                parsed = parse_traefik_labels(container_name, labels)
+                if parsed["routers"] or parsed["services"] or parsed["middlewares"]:
+                    containers_data.append({
+                        "container": container_name,
+                        "labels": labels,
+                        "parsed": parsed
+                    })
+        except Exception as e:
+            logger.warning(f"Failed to inspect container {container.name}: {e}")
+            continue
+
+    return containers_data
+
 
 @router.get("/overview", response_model=TraefikOverview)
 async def get_live_overview():
@@ -251,7 +246,7 @@ async def get_live_overview():
         Overview with route, service, and middleware counts
     """
     try:
-        containers_data = get_docker_containers_with_traefik()
+        containers_data = await get_docker_containers_with_traefik()
 
         total_routes = 0
         total_services = 0
@@ -296,7 +291,7 @@ async def get_live_routes():
         List of active routes with full configuration
     """
     try:
-        containers_data = get_docker_containers_with_traefik()
+        containers_data = await get_docker_containers_with_traefik()
 
         routes = []
 
@@ -335,7 +330,7 @@ async def get_live_services():
         List of active services
     """
     try:
-        containers_data = get_docker_containers_with_traefik()
+        containers_data = await get_docker_containers_with_traefik()
 
         services = []
 
@@ -370,7 +365,7 @@ async def get_live_middlewares():
         List of active middlewares
     """
     try:
-        containers_data = get_docker_containers_with_traefik()
+        containers_data = await get_docker_containers_with_traefik()
 
         middlewares = []
 
@@ -406,7 +401,7 @@ async def get_live_route_detail(route_name: str):
         Detailed route information
     """
     try:
-        containers_data = get_docker_containers_with_traefik()
+        containers_data = await get_docker_containers_with_traefik()
 
         for container in containers_data:
             parsed = container["parsed"]
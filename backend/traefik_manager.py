@@ -30,6 +30,14 @@ import base64
 from cryptography import x509
 from cryptography.hazmat.backends import default_backend
 
+from acme_inventory import AcmeInventory, AcmeCertificate
+from traefik_dynamic_config import (
+    DynamicConfigStore,
+    extract_routes,
+    extract_services,
+    extract_middleware,
+)
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -504,8 +512,20 @@ class TraefikManager:
         self.backup_dir.mkdir(parents=True, exist_ok=True)
         self.acme_dir.mkdir(parents=True, exist_ok=True)
 
+        # Parsed dynamic config with name indexes (re-parses only changed files)
+        self.config_store = DynamicConfigStore(self.dynamic_dir)
+        # Decoded acme.json certificates (re-read only when the file changes)
+        self.certificate_inventory = AcmeInventory(self.acme_file, self._extract_certificate_metadata)
+
         logger.info(f"TraefikManager initialized: {traefik_dir}")
 
+    def _require_config_file(self, config_file: str, error_cls: type):
+        entry = self.config_store.file(config_file)
+        if entry is None:
+            raise error_cls(f"Config file not found: {config_file}")
+        if entry.error:
+            raise error_cls(f"Failed to parse {config_file}: {entry.error}")
+
     # ========================================================================
     # SSL Certificate Management
     # ========================================================================
@@ -569,37 +589,14 @@ class TraefikManager:
             List of certificate information dictionaries
         """
         try:
-            if not self.acme_file.exists():
+            if not self.certificate_inventory.refresh():
                 logger.warning("ACME file not found, no certificates available")
                 return []
 
-            with open(self.acme_file, 'r') as f:
-                acme_data = json.load(f)
-
-            certificates = []
-
-            # Parse ACME data structure
-            for resolver_name, resolver_data in acme_data.items():
-                if 'Certificates' not in resolver_data:
-                    continue
-
-                for cert in resolver_data['Certificates']:
-                    metadata = self._extract_certificate_metadata(cert.get('certificate'))
-                    cert_info = {
-                        'domain': cert.get('domain', {}).get('main', 'unknown'),
-                        'sans': cert.get('domain', {}).get('sans', []),
-                        'resolver': resolver_name,
-                        'status': self._get_certificate_status(cert),
-                        'not_after': cert.get('notAfter', 'unknown'),
-                        'certificate': cert.get('certificate', '')[:50] + '...' if cert.get('certificate') else None,
-                        'private_key_present': bool(cert.get('key'))
-                    }
-                    if metadata:
-                        cert_info.update(metadata)
-                        cert_info['status'] = self._certificate_status_from_expiry(metadata.get('expiresAt'))
-                    certificates.append(cert_info)
-
-            return certificates
+            return [
+                self._certificate_info(cert)
+                for cert in self.certificate_inventory.certificates()
+            ]
 
         except Exception as e:
             logger.error(f"Failed to list certificates: {e}")
@@ -616,13 +613,14 @@ class TraefikManager:
             Certificate information dictionary
         """
         try:
-            certificates = self.list_certificates()
+            cert = None
+            if self.certificate_inventory.refresh():
+                cert = self.certificate_inventory.find(domain)
 
-            for cert in certificates:
-                if cert['domain'] == domain or domain in cert['sans']:
-                    return cert
+            if cert is None:
+                raise CertificateError(f"Certificate not found for domain: {domain}")
 
-            raise CertificateError(f"Certificate not found for domain: {domain}")
+            return self._certificate_info(cert)
 
         except Exception as e:
             logger.error(f"Failed to get certificate info for {domain}: {e}")
@@ -807,29 +805,15 @@ class TraefikManager:
             ACME status information
         """
         try:
-            if not self.acme_file.exists():
+            if not self.certificate_inventory.refresh():
                 return {
                     'initialized': False,
                     'total_certificates': 0,
                     'resolvers': []
                 }
 
-            with open(self.acme_file, 'r') as f:
-                acme_data = json.load(f)
-
-            resolvers = []
-            total_certs = 0
-
-            for resolver_name, resolver_data in acme_data.items():
-                cert_count = len(resolver_data.get('Certificates', []))
-                total_certs += cert_count
-
-                resolvers.append({
-                    'name': resolver_name,
-                    'certificates': cert_count,
-                    'email': resolver_data.get('Email', 'unknown'),
-                    'ca_server': resolver_data.get('CAServer', 'https://acme-v02.api.letsencrypt.org/directory')
-                })
+            resolvers = self.certificate_inventory.resolvers()
+            total_certs = sum(r['certificates'] for r in resolvers)
 
             return {
                 'initialized': True,
@@ -846,6 +830,46 @@ class TraefikManager:
             logger.error(f"Failed to get ACME status: {e}")
             raise CertificateError(f"Failed to get ACME status: {e}")
 
+    def get_expiring_certificates(self, days: int = 30) -> List[Dict[str, Any]]:
+        """
+        Certificates expiring within the next `days` days, soonest first
+
+        Args:
+            days: Look-ahead window in days
+
+        Returns:
+            List of certificate information dictionaries
+        """
+        try:
+            if not self.certificate_inventory.refresh():
+                return []
+            return [
+                self._certificate_info(cert)
+                for cert in self.certificate_inventory.expiring_within(days)
+            ]
+        except Exception as e:
+            logger.error(f"Failed to list expiring certificates: {e}")
+            raise CertificateError(f"Failed to list expiring certificates: {e}")
+
+    def _certificate_info(self, cert: AcmeCertificate) -> Dict[str, Any]:
+        """Certificate dictionary as returned by the certificate endpoints"""
+        entry = cert.entry
+        cert_info = {
+            'domain': cert.domain,
+            'sans': cert.sans,
+            'resolver': cert.resolver,
+            'status': self._get_certificate_status(entry),
+            'not_after': entry.get('notAfter', 'unknown'),
+            'certificate': entry.get('certificate', '')[:50] + '...' if entry.get('certificate') else None,
+            'private_key_present': bool(entry.get('key'))
+        }
+        if cert.decoded:
+            cert_info.update(cert.decoded)
+            # Decoded once per certificate; the countdown is computed per call
+            cert_info['days_remaining'] = cert.days_remaining()
+            cert_info['status'] = self._certificate_status_from_expiry(cert.decoded.get('expiresAt'))
+        return cert_info
+
     def _get_certificate_status(self, cert: Dict) -> CertificateStatus:
         """Determine certificate status from ACME data"""
         try:
@@ -883,31 +907,9 @@ class TraefikManager:
             List of route information dictionaries
         """
         try:
-            routes = []
-
             if config_file:
-                # Read specific file
-                config_path = self.dynamic_dir / config_file
-                if not config_path.exists():
-                    raise RouteError(f"Config file not found: {config_file}")
-
-                with open(config_path, 'r') as f:
-                    config = yaml.safe_load(f)
-
-                routes.extend(self._extract_routes(config, config_file))
-
-            else:
-                # Read all dynamic config files
-                for config_path in self.dynamic_dir.glob("*.yml"):
-                    try:
-                        with open(config_path, 'r') as f:
-                            config = yaml.safe_load(f)
-
-                        routes.extend(self._extract_routes(config, config_path.name))
-                    except Exception as e:
-                        logger.warning(f"Failed to parse {config_path.name}: {e}")
-
-            return routes
+                self._require_config_file(config_file, RouteError)
+            return self.config_store.list("routers", config_file)
 
         except Exception as e:
             logger.error(f"Failed to list routes: {e}")
@@ -962,13 +964,9 @@ class TraefikManager:
 
         try:
             # Load or create routes config file
-            routes_file = self.dynamic_dir / "routes.yml"
-
-            if routes_file.exists():
-                with open(routes_file, 'r') as f:
-                    config = yaml.safe_load(f) or {}
-            else:
-                config = {'http': {'routers': {}, 'services': {}}}
+            config = self.config_store.load_for_edit(
+                "routes.yml", default={'http': {'routers': {}, 'services': {}}}
+            ) or {}
 
             # Ensure structure
             if 'http' not in config:
@@ -1008,8 +1006,7 @@ class TraefikManager:
             self.validator.validate_traefik_config(config)
 
             # Save configuration
-            with open(routes_file, 'w') as f:
-                yaml.dump(config, f, default_flow_style=False, sort_keys=False)
+            self.config_store.write("routes.yml", config)
 
             # Reload Traefik
             self.reload_traefik()
@@ -1084,13 +1081,10 @@ class TraefikManager:
 
         try:
             # Find the route
-            routes_file = self.dynamic_dir / "routes.yml"
-            if not routes_file.exists():
+            config = self.config_store.load_for_edit("routes.yml")
+            if config is None:
                 raise RouteError("Routes configuration file not found")
 
-            with open(routes_file, 'r') as f:
-                config = yaml.safe_load(f)
-
             if 'http' not in config or 'routers' not in config['http']:
                 raise RouteError("No routes found in configuration")
 
@@ -1118,8 +1112,7 @@ class TraefikManager:
             self.validator.validate_traefik_config(config)
 
             # Save configuration
-            with open(routes_file, 'w') as f:
-                yaml.dump(config, f, default_flow_style=False, sort_keys=False)
+            self.config_store.write("routes.yml", config)
 
             # Reload Traefik
             self.reload_traefik()
@@ -1179,13 +1172,10 @@ class TraefikManager:
         self.rate_limiter.check_limit(username)
 
         try:
-            routes_file = self.dynamic_dir / "routes.yml"
-            if not routes_file.exists():
+            config = self.config_store.load_for_edit("routes.yml")
+            if config is None:
                 raise RouteError("Routes configuration file not found")
 
-            with open(routes_file, 'r') as f:
-                config = yaml.safe_load(f)
-
             if 'http' not in config or 'routers' not in config['http']:
                 raise RouteError("No routes found in configuration")
 
@@ -1199,8 +1189,7 @@ class TraefikManager:
             del config['http']['routers'][name]
 
             # Save configuration
-            with open(routes_file, 'w') as f:
-                yaml.dump(config, f, default_flow_style=False, sort_keys=False)
+            self.config_store.write("routes.yml", config)
 
             # Reload Traefik
             self.reload_traefik()
@@ -1251,37 +1240,14 @@ class TraefikManager:
             Route information dictionary or None if not found
         """
         try:
-            routes = self.list_routes()
-            for route in routes:
-                if route['name'] == name:
-                    return route
-            return None
+            return self.config_store.get("routers", name)
         except Exception as e:
             logger.error(f"Failed to get route {name}: {e}")
             return None
 
     def _extract_routes(self, config: Dict, source_file: str) -> List[Dict[str, Any]]:
         """Extract routes from configuration"""
-        routes = []
-
-        if 'http' not in config or 'routers' not in config['http']:
-            return routes
-
-        for name, router in config['http']['routers'].items():
-            route_info = {
-                'name': name,
-                'rule': router.get('rule', ''),
-                'service': router.get('service', ''),
-                'entrypoints': router.get('entryPoints', []),
-                'middlewares': router.get('middlewares', []),
-                'priority': router.get('priority', 0),
-                'tls_enabled': 'tls' in router,
-                'cert_resolver': router.get('tls', {}).get('certResolver', None),
-                'source_file': source_file
-            }
-            routes.append(route_info)
-
-        return routes
+        return extract_routes(config, source_file)
 
     # ========================================================================
     # Service Management
@@ -1298,29 +1264,9 @@ class TraefikManager:
             List of service information dictionaries
         """
         try:
-            services_list = []
-
             if config_file:
-                config_path = self.dynamic_dir / config_file
-                if not config_path.exists():
-                    raise RouteError(f"Config file not found: {config_file}")
-
-                with open(config_path, 'r') as f:
-                    config = yaml.safe_load(f)
-
-                services_list.extend(self._extract_services(config, config_file))
-
-            else:
-                for config_path in self.dynamic_dir.glob("*.yml"):
-                    try:
-                        with open(config_path, 'r') as f:
-                            config = yaml.safe_load(f)
-
-                        services_list.extend(self._extract_services(config, config_path.name))
-                    except Exception as e:
-                        logger.warning(f"Failed to parse {config_path.name}: {e}")
-
-            return services_list
+                self._require_config_file(config_file, RouteError)
+            return self.config_store.list("services", config_file)
 
         except Exception as e:
             logger.error(f"Failed to list services: {e}")
@@ -1357,13 +1303,9 @@ class TraefikManager:
             raise RouteError("Service URL must start with http:// or https://")
 
         try:
-            services_file = self.dynamic_dir / "services.yml"
-
-            if services_file.exists():
-                with open(services_file, 'r') as f:
-                    config = yaml.safe_load(f) or {}
-            else:
-                config = {'http': {'services': {}}}
+            config = self.config_store.load_for_edit(
+                "services.yml", default={'http': {'services': {}}}
+            ) or {}
 
             if 'http' not in config:
                 config['http'] = {}
@@ -1399,8 +1341,7 @@ class TraefikManager:
             self.validator.validate_traefik_config(config)
 
             # Save configuration
-            with open(services_file, 'w') as f:
-                yaml.dump(config, f, default_flow_style=False, sort_keys=False)
+            self.config_store.write("services.yml", config)
 
             # Reload Traefik
             self.reload_traefik()
@@ -1460,11 +1401,7 @@ class TraefikManager:
             Service information dictionary or None if not found
         """
         try:
-            services = self.list_services()
-            for service in services:
-                if service['name'] == name:
-                    return service
-            return None
+            return self.config_store.get("services", name)
         except Exception as e:
             logger.error(f"Failed to get service {name}: {e}")
             return None
@@ -1484,13 +1421,10 @@ class TraefikManager:
         self.rate_limiter.check_limit(username)
 
         try:
-            services_file = self.dynamic_dir / "services.yml"
-            if not services_file.exists():
+            config = self.config_store.load_for_edit("services.yml")
+            if config is None:
                 raise RouteError("Services configuration file not found")
 
-            with open(services_file, 'r') as f:
-                config = yaml.safe_load(f)
-
             if 'http' not in config or 'services' not in config['http']:
                 raise RouteError("No services found in configuration")
 
@@ -1504,8 +1438,7 @@ class TraefikManager:
             del config['http']['services'][name]
 
             # Save configuration
-            with open(services_file, 'w') as f:
-                yaml.dump(config, f, default_flow_style=False, sort_keys=False)
+            self.config_store.write("services.yml", config)
 
             # Reload Traefik
             self.reload_traefik()
@@ -1541,26 +1474,7 @@ class TraefikManager:
 
     def _extract_services(self, config: Dict, source_file: str) -> List[Dict[str, Any]]:
         """Extract services from configuration"""
-        services_list = []
-
-        if 'http' not in config or 'services' not in config['http']:
-            return services_list
-
-        for name, service in config['http']['services'].items():
-            lb = service.get('loadBalancer', {})
-            servers = lb.get('servers', [])
-            healthcheck = lb.get('healthCheck', {})
-
-            service_info = {
-                'name': name,
-                'servers': [s.get('url', '') for s in servers],
-                'healthcheck_path': healthcheck.get('path'),
-                'healthcheck_interval': healthcheck.get('interval'),
-                'source_file': source_file
-            }
-            services_list.append(service_info)
-
-        return services_list
+        return extract_services(config, source_file)
 
     # ========================================================================
     # Middleware Management
@@ -1577,29 +1491,9 @@ class TraefikManager:
             List of middleware information dictionaries
         """
         try:
-            middleware_list = []
-
             if config_file:
-                config_path = self.dynamic_dir / config_file
-                if not config_path.exists():
-                    raise MiddlewareError(f"Config file not found: {config_file}")
-
-                with open(config_path, 'r') as f:
-                    config = yaml.safe_load(f)
-
-                middleware_list.extend(self._extract_middleware(config, config_file))
-
-            else:
-                for config_path in self.dynamic_dir.glob("*.yml"):
-                    try:
-                        with open(config_path, 'r') as f:
-                            config = yaml.safe_load(f)
-
-                        middleware_list.extend(self._extract_middleware(config, config_path.name))
-                    except Exception as e:
-                        logger.warning(f"Failed to parse {config_path.name}: {e}")
-
-            return middleware_list
+                self._require_config_file(config_file, MiddlewareError)
+            return self.config_store.list("middlewares", config_file)
 
         except Exception as e:
             logger.error(f"Failed to list middleware: {e}")
@@ -1638,13 +1532,9 @@ class TraefikManager:
             raise MiddlewareError(f"Invalid middleware parameters: {e}")
 
         try:
-            middleware_file = self.dynamic_dir / "middleware.yml"
-
-            if middleware_file.exists():
-                with open(middleware_file, 'r') as f:
-                    mw_config = yaml.safe_load(f) or {}
-            else:
-                mw_config = {'http': {'middlewares': {}}}
+            mw_config = self.config_store.load_for_edit(
+                "middleware.yml", default={'http': {'middlewares': {}}}
+            ) or {}
 
             if 'http' not in mw_config:
                 mw_config['http'] = {}
@@ -1666,8 +1556,7 @@ class TraefikManager:
             self.validator.validate_traefik_config(mw_config)
 
             # Save configuration
-            with open(middleware_file, 'w') as f:
-                yaml.dump(mw_config, f, default_flow_style=False, sort_keys=False)
+            self.config_store.write("middleware.yml", mw_config)
 
             # Reload Traefik
             self.reload_traefik()
@@ -1737,13 +1626,10 @@ class TraefikManager:
         self.rate_limiter.check_limit(username)
 
         try:
-            middleware_file = self.dynamic_dir / "middleware.yml"
-            if not middleware_file.exists():
+            mw_config = self.config_store.load_for_edit("middleware.yml")
+            if mw_config is None:
                 raise MiddlewareError("Middleware configuration file not found")
 
-            with open(middleware_file, 'r') as f:
-                mw_config = yaml.safe_load(f)
-
             if 'http' not in mw_config or 'middlewares' not in mw_config['http']:
                 raise MiddlewareError("No middleware found in configuration")
 
@@ -1763,8 +1649,7 @@ class TraefikManager:
             self.validator.validate_traefik_config(mw_config)
 
             # Save configuration
-            with open(middleware_file, 'w') as f:
-                yaml.dump(mw_config, f, default_flow_style=False, sort_keys=False)
+            self.config_store.write("middleware.yml", mw_config)
 
             # Reload Traefik
             self.reload_traefik()
@@ -1823,13 +1708,10 @@ class TraefikManager:
         self.rate_limiter.check_limit(username)
 
         try:
-            middleware_file = self.dynamic_dir / "middleware.yml"
-            if not middleware_file.exists():
+            mw_config = self.config_store.load_for_edit("middleware.yml")
+            if mw_config is None:
                 raise MiddlewareError("Middleware configuration file not found")
 
-            with open(middleware_file, 'r') as f:
-                mw_config = yaml.safe_load(f)
-
             if 'http' not in mw_config or 'middlewares' not in mw_config['http']:
                 raise MiddlewareError("No middleware found in configuration")
 
@@ -1843,8 +1725,7 @@ class TraefikManager:
             del mw_config['http']['middlewares'][name]
 
             # Save configuration
-            with open(middleware_file, 'w') as f:
-                yaml.dump(mw_config, f, default_flow_style=False, sort_keys=False)
+            self.config_store.write("middleware.yml", mw_config)
 
             # Reload Traefik
             self.reload_traefik()
@@ -1906,36 +1787,14 @@ class TraefikManager:
             Middleware information dictionary or None if not found
         """
         try:
-            middlewares = self.list_middleware()
-            for middleware in middlewares:
-                if middleware['name'] == name:
-                    return middleware
-            return None
+            return self.config_store.get("middlewares", name)
         except Exception as e:
             logger.error(f"Failed to get middleware {name}: {e}")
             return None
 
     def _extract_middleware(self, config: Dict, source_file: str) -> List[Dict[str, Any]]:
         """Extract middleware from configuration"""
-        middleware_list = []
-
-        if 'http' not in config or 'middlewares' not in config['http']:
-            return middleware_list
-
-        for name, middleware in config['http']['middlewares'].items():
-            # Get middleware type (first key)
-            mw_type = list(middleware.keys())[0] if middleware else 'unknown'
-            mw_config = middleware.get(mw_type, {})
-
-            middleware_info = {
-                'name': name,
-                'type': mw_type,
-                'config': mw_config,
-                'source_file': source_file
-            }
-            middleware_list.append(middleware_info)
-
-        return middleware_list
+        return extract_middleware(config, source_file)
 
     # ========================================================================
     # Configuration Management
@@ -2231,6 +2090,9 @@ class TraefikManager:
                 for config_file in dynamic_backup.glob("*.yml"):
                     shutil.copy2(config_file, self.dynamic_dir / config_file.name)
 
+                # copy2 keeps the backup's mtimes; re-stat everything
+                self.config_store.invalidate()
+
             # Restore ACME data
             acme_backup = backup_dir / "acme.json"
             if acme_backup.exists():
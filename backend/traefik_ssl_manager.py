@@ -17,6 +17,8 @@ import os
 from cryptography import x509
 from cryptography.hazmat.backends import default_backend
 
+from acme_inventory import AcmeInventory, AcmeCertificate
+
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/v1/traefik/ssl", tags=["Traefik SSL"])
@@ -107,14 +109,6 @@ def parse_certificate_pem(cert_pem: str) -> Dict:
         # Calculate days remaining
         days_remaining = (not_after - datetime.utcnow()).days
 
-        # Determine status
-        if days_remaining < 0:
-            status = "expired"
-        elif days_remaining < 30:
-            status = "expiring_soon"
-        else:
-            status = "valid"
-
         return {
             "domain": domain,
             "sans": sans,
@@ -122,13 +116,72 @@ def parse_certificate_pem(cert_pem: str) -> Dict:
             "not_before": not_before.isoformat(),
             "not_after": not_after.isoformat(),
             "days_remaining": days_remaining,
-            "status": status
+            "status": certificate_status(days_remaining)
         }
     except Exception as e:
         logger.error(f"Error parsing certificate: {e}")
         return None
 
 
+def certificate_status(days_remaining: int) -> str:
+    if days_remaining < 0:
+        return "expired"
+    elif days_remaining < 30:
+        return "expiring_soon"
+    return "valid"
+
+
+def decode_acme_certificate(cert_data: str) -> Optional[Dict]:
+    """Decode a certificate blob as stored in acme.json (base64 PEM)"""
+    cert_pem = cert_data
+    if isinstance(cert_pem, str) and not cert_pem.startswith('-----BEGIN'):
+        try:
+            cert_pem = base64.b64decode(cert_pem).decode('utf-8')
+        except Exception:
+            pass
+    return parse_certificate_pem(cert_pem)
+
+
+# One inventory per resolved acme.json path; each decodes a certificate
+# only once and re-reads the file only when it changes
+_inventories: Dict[Path, AcmeInventory] = {}
+
+
+def get_acme_inventory() -> AcmeInventory:
+    acme_path = resolve_acme_json_path()
+    inventory = _inventories.get(acme_path)
+    if inventory is None:
+        inventory = _inventories[acme_path] = AcmeInventory(acme_path, decode_acme_certificate)
+    return inventory
+
+
+def to_certificate(cert: AcmeCertificate) -> Optional[Certificate]:
+    """Certificate model from a cached inventory entry (None if undecodable)"""
+    if not cert.decoded:
+        return None
+    days_remaining = cert.days_remaining()
+    return Certificate(**{
+        **cert.decoded,
+        "days_remaining": days_remaining,
+        "status": certificate_status(days_remaining),
+        "cert_resolver": cert.resolver,
+    })
+
+
+def _refresh_inventory(inventory: AcmeInventory) -> bool:
+    try:
+        if inventory.refresh():
+            return True
+    except Exception as e:
+        logger.error(f"Error loading acme.json from {inventory.acme_file}: {e}")
+        return False
+    logger.warning(
+        "ACME JSON file not found. Tried: %s",
+        ", ".join([str(p) for p in ACME_JSON_PATHS if p])
+    )
+    return False
+
+
 def load_acme_json() -> Dict:
     """
     Load Traefik's acme.json file.
@@ -161,32 +214,15 @@ async def list_certificates(admin: Dict = Depends(require_admin)):
         List of certificate information
     """
     try:
-        acme_data = load_acme_json()
-        certificates = []
+        inventory = get_acme_inventory()
+        if not _refresh_inventory(inventory):
+            return []
 
-        # Parse certificates from acme.json
         # Structure: acme.json -> {resolver_name} -> Certificates -> [{domain, certificate}]
-        for resolver_name, resolver_data in acme_data.items():
-            if not isinstance(resolver_data, dict):
-                continue
-
-            cert_list = resolver_data.get('Certificates', [])
-            for cert_entry in cert_list:
-                cert_pem = cert_entry.get('certificate')
-                if not cert_pem:
-                    continue
-
-                # Decode if base64
-                if isinstance(cert_pem, str) and not cert_pem.startswith('-----BEGIN'):
-                    try:
-                        cert_pem = base64.b64decode(cert_pem).decode('utf-8')
-                    except:
-                        pass
-
-                cert_info = parse_certificate_pem(cert_pem)
-                if cert_info:
-                    cert_info['cert_resolver'] = resolver_name
-                    certificates.append(Certificate(**cert_info))
+        certificates = [
+            model for model in (to_certificate(cert) for cert in inventory.certificates())
+            if model
+        ]
 
         logger.info(f"Listed {len(certificates)} certificates")
         return certificates
@@ -223,12 +259,18 @@ async def get_certificate_info(domain: str, admin: Dict = Depends(require_admin)
         Certificate information
     """
     try:
-        certificates = await list_certificates(admin)
-
-        for cert in certificates:
-            if cert.domain == domain or domain in cert.sans:
+        inventory = get_acme_inventory()
+        if _refresh_inventory(inventory):
+            indexed = inventory.find(domain)
+            cert = to_certificate(indexed) if indexed else None
+            if cert:
                 return cert
 
+            # The index uses acme.json domains; also match the decoded CN/SANs
+            for cert in await list_certificates(admin):
+                if cert.domain == domain or domain in cert.sans:
+                    return cert
+
         raise HTTPException(status_code=404, detail=f"Certificate for domain '{domain}' not found")
 
     except HTTPException:
@@ -286,10 +328,12 @@ async def get_expiring_certificates(
         List of expiring certificates
     """
     try:
-        certificates = await list_certificates(admin)
+        inventory = get_acme_inventory()
+        if not _refresh_inventory(inventory):
+            return []
         expiring = [
-            cert for cert in certificates
-            if 0 < cert.days_remaining <= days
+            model for model in (to_certificate(cert) for cert in inventory.expiring_within(days))
+            if model and model.days_remaining > 0
         ]
 
         logger.info(f"Found {len(expiring)} certificates expiring within {days} days")
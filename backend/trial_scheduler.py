@@ -42,19 +42,9 @@ class TrialScheduler:
     
     async def _run_scheduler(self):
         """Main scheduler loop"""
-        from trial_manager import trial_manager
-        
         while self.running:
             try:
-                logger.info("Running trial expiration check...")
-                
-                # Check for expired trials
-                downgraded = await trial_manager.check_trial_expiration()
-                if downgraded:
-                    logger.info(f"Downgraded {len(downgraded)} expired trials")
-                
-                # Send expiration warnings
-                await self._send_expiration_warnings()
+                await self.run_once()
                 
                 # Wait for next interval
                 await asyncio.sleep(self.check_interval)
@@ -65,6 +55,20 @@ class TrialScheduler:
                 logger.error(f"Error in trial scheduler: {e}", exc_info=True)
                 await asyncio.sleep(60)  # Wait 1 minute on error
     
+    async def run_once(self):
+        """Downgrade expired trials and send expiration warnings"""
+        from trial_manager import trial_manager
+        
+        logger.info("Running trial expiration check...")
+        
+        # Check for expired trials
+        downgraded = await trial_manager.check_trial_expiration()
+        if downgraded:
+            logger.info(f"Downgraded {len(downgraded)} expired trials")
+        
+        # Send expiration warnings
+        await self._send_expiration_warnings()
+    
     async def _send_expiration_warnings(self):
         """Send warning emails for expiring trials"""
         from trial_manager import trial_manager
@@ -14,22 +14,19 @@ Features:
 
 import os
 import json
-import asyncio
 import logging
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Tuple
-from collections import defaultdict
-import hashlib
-import re
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Any
 from pathlib import Path
 
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, Query
 from pydantic import BaseModel, Field
 import httpx
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import Session
+from sqlalchemy import create_engine
 import redis.asyncio as aioredis
 
+from usage_log_aggregator import histogram_percentile, parse_log_line, usage_log_aggregator
+
 # Logging setup
 logger = logging.getLogger(__name__)
 
@@ -44,7 +41,6 @@ REDIS_HOST = os.getenv("REDIS_HOST", "unicorn-lago-redis")
 REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
 
 LITELLM_PROXY_URL = os.getenv("LITELLM_PROXY_URL", "http://unicorn-litellm:4000")
-LOG_DIR = Path("/var/log/ops-center")
 
 # Database connection
 DATABASE_URL = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
@@ -203,48 +199,21 @@ async def cache_set(key: str, value: Any, ttl: int = 300):
         logger.warning(f"Redis set error: {e}")
 
 def parse_log_file(log_file: Path, start_date: datetime, end_date: datetime) -> List[Dict]:
-    """Parse ops-center log file for API requests"""
+    """Parse ops-center log file for API requests (naive dates are UTC)"""
     entries = []
 
     if not log_file.exists():
         return entries
 
+    start_date = start_date if start_date.tzinfo else start_date.replace(tzinfo=timezone.utc)
+    end_date = end_date if end_date.tzinfo else end_date.replace(tzinfo=timezone.utc)
     try:
         with open(log_file, 'r') as f:
             for line in f:
-                try:
-                    # Parse JSON log line
-                    if line.strip().startswith('{'):
-                        entry = json.loads(line.strip())
-                        timestamp = datetime.fromisoformat(entry.get('timestamp', '').replace('Z', '+00:00'))
-
-                        if start_date <= timestamp <= end_date:
-                            entries.append(entry)
-                    else:
-                        # Parse nginx-style access log
-                        match = re.match(
-                            r'(\d+\.\d+\.\d+\.\d+) - - \[(.*?)\] "(.*?)" (\d+) (\d+) "(.*?)" "(.*?)" ([\d.]+)',
-                            line
-                        )
-                        if match:
-                            ip, timestamp_str, request, status, size, referer, user_agent, duration = match.groups()
-                            timestamp = datetime.strptime(timestamp_str, '%d/%b/%Y:%H:%M:%S %z')
-
-                            if start_date <= timestamp <= end_date:
-                                method, path, protocol = request.split() if len(request.split()) == 3 else ('GET', request, 'HTTP/1.1')
-                                entries.append({
-                                    'timestamp': timestamp.isoformat(),
-                                    'ip_address': ip,
-                                    'method': method,
-                                    'path': path,
-                                    'status': int(status),
-                                    'size': int(size),
-                                    'duration_ms': float(duration) * 1000,
-                                    'user_agent': user_agent
-                                })
-                except (json.JSONDecodeError, ValueError) as e:
-                    logger.debug(f"Failed to parse log line: {e}")
-                    continue
+                entry = parse_log_line(line)
+                if entry and start_date <= entry['timestamp'] <= end_date:
+                    entry['timestamp'] = entry['timestamp'].isoformat()
+                    entries.append(entry)
     except Exception as e:
         logger.error(f"Error reading log file {log_file}: {e}")
 
@@ -275,92 +244,9 @@ async def get_litellm_metrics() -> Dict[str, Any]:
     return {}
 
 async def aggregate_usage_data(days: int = 7) -> Dict[str, Any]:
-    """Aggregate usage data from logs and database"""
-    end_date = datetime.utcnow()
-    start_date = end_date - timedelta(days=days)
-
-    # Parse log files
-    log_entries = []
-    if LOG_DIR.exists():
-        for log_file in LOG_DIR.glob("*.log"):
-            log_entries.extend(parse_log_file(log_file, start_date, end_date))
-
-    # Aggregate by service
-    by_service = defaultdict(lambda: {
-        "calls": 0,
-        "total_duration_ms": 0,
-        "errors": 0,
-        "users": set()
-    })
-
-    by_user = defaultdict(lambda: {
-        "calls": 0,
-        "by_service": defaultdict(int),
-        "errors": 0
-    })
-
-    by_hour = defaultdict(int)
-    by_day = defaultdict(int)
-    by_endpoint = defaultdict(lambda: {"calls": 0, "total_duration_ms": 0, "errors": 0})
-
-    for entry in log_entries:
-        timestamp = datetime.fromisoformat(entry['timestamp'])
-        path = entry.get('path', '')
-        status = entry.get('status', 200)
-        duration_ms = entry.get('duration_ms', 0)
-        user = entry.get('user_id', 'anonymous')
-
-        # Determine service from path
-        service = 'unknown'
-        if '/llm/' in path:
-            service = 'llm'
-        elif '/embeddings' in path:
-            service = 'embeddings'
-        elif '/search' in path:
-            service = 'search'
-        elif '/tts' in path:
-            service = 'tts'
-        elif '/stt' in path:
-            service = 'stt'
-        elif '/admin' in path:
-            service = 'admin'
-
-        # Aggregate data
-        by_service[service]["calls"] += 1
-        by_service[service]["total_duration_ms"] += duration_ms
-        by_service[service]["users"].add(user)
-
-        if status >= 400:
-            by_service[service]["errors"] += 1
-
-        by_user[user]["calls"] += 1
-        by_user[user]["by_service"][service] += 1
-
-        if status >= 400:
-            by_user[user]["errors"] += 1
-
-        by_hour[timestamp.hour] += 1
-        by_day[timestamp.strftime('%A')] += 1
-        by_endpoint[path]["calls"] += 1
-        by_endpoint[path]["total_duration_ms"] += duration_ms
-
-        if status >= 400:
-            by_endpoint[path]["errors"] += 1
-
-    # Convert sets to counts
-    for service_data in by_service.values():
-        service_data["unique_users"] = len(service_data["users"])
-        del service_data["users"]
-
-    return {
-        "by_service": dict(by_service),
-        "by_user": dict(by_user),
-        "by_hour": dict(by_hour),
-        "by_day": dict(by_day),
-        "by_endpoint": dict(by_endpoint),
-        "period_start": start_date.isoformat(),
-        "period_end": end_date.isoformat()
-    }
+    """Usage for the last `days` days, merged from the hourly log buckets"""
+    await usage_log_aggregator.ensure_started()
+    return await usage_log_aggregator.read_usage(days)
 
 def calculate_llm_cost(model: str, input_tokens: int, output_tokens: int) -> float:
     """Calculate LLM inference cost"""
@@ -684,15 +570,15 @@ async def get_performance_metrics(
 
     data = await aggregate_usage_data(days)
 
-    # Calculate latency percentiles (simplified - would need sorted data)
     all_calls = sum(s["calls"] for s in data["by_service"].values())
     total_duration = sum(s["total_duration_ms"] for s in data["by_service"].values())
     avg_latency = total_duration / max(all_calls, 1)
 
-    # Estimates (would need actual percentile calculation from sorted data)
-    p50_latency = avg_latency * 0.8
-    p95_latency = avg_latency * 2.5
-    p99_latency = avg_latency * 4.0
+    # Percentiles interpolated within the duration histogram bins
+    histogram = data["duration_histogram"]["counts"]
+    p50_latency = histogram_percentile(histogram, 0.50)
+    p95_latency = histogram_percentile(histogram, 0.95)
+    p99_latency = histogram_percentile(histogram, 0.99)
 
     # Calculate rates
     total_errors = sum(s["errors"] for s in data["by_service"].values())
@@ -774,32 +660,12 @@ async def get_quota_usage(
     await cache_set(cache_key, result, ttl=300)
     return result
 
-# Background task for hourly aggregation
-async def hourly_usage_aggregation():
-    """Background task to aggregate usage data hourly"""
-    while True:
-        try:
-            logger.info("Running hourly usage aggregation")
-
-            # Aggregate last hour of data
-            await aggregate_usage_data(days=1)
-
-            # Clear relevant caches
-            r = await get_redis()
-            keys = await r.keys("usage:*")
-            if keys:
-                await r.delete(*keys)
-
-            logger.info("Hourly usage aggregation complete")
-        except Exception as e:
-            logger.error(f"Error in hourly aggregation: {e}")
-
-        # Sleep for 1 hour
-        await asyncio.sleep(3600)
-
-# Initialize background task on startup
+# Start tailing the logs into hourly buckets
 @router.on_event("startup")
 async def startup_event():
     """Start background tasks on router startup"""
-    asyncio.create_task(hourly_usage_aggregation())
-    logger.info("Usage analytics background tasks started")
+    try:
+        await usage_log_aggregator.ensure_started()
+        logger.info("Usage analytics background tasks started")
+    except Exception as e:
+        logger.error(f"Failed to start usage log aggregation: {e}")
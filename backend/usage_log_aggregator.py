@@ -0,0 +1,490 @@
+"""
+Incremental Usage Log Aggregation
+
+Backs the usage analytics endpoints (usage_analytics.py) with hourly
+buckets instead of re-reading every log file in the window per request.
+
+A background task tails the *.log files under USAGE_LOG_DIR every
+USAGE_AGGREGATE_INTERVAL seconds, starting from the byte offset persisted
+for each file, and rolls the new lines into usage_log_buckets: one row per
+(hour, service, endpoint, user, status class) with the call count, total
+duration and a fixed-bin duration histogram. Bucket upserts and the new
+offsets are committed in one transaction, so every line is counted once
+even across restarts; a rotated or truncated file (new inode, or smaller
+than its offset) is read again from the start.
+
+Offsets are kept per host (USAGE_LOG_HOST, default the hostname) because
+each app host has its own log directory; buckets from all hosts add up.
+A per-host advisory lock keeps workers on the same host from tailing the
+same files concurrently.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+import socket
+import time
+from bisect import bisect_left
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+LOG_DIR = Path(os.getenv('USAGE_LOG_DIR', '/var/log/ops-center'))
+AGGREGATE_INTERVAL = float(os.getenv('USAGE_AGGREGATE_INTERVAL', '60'))
+MAX_BYTES_PER_CYCLE = int(os.getenv('USAGE_AGGREGATE_MAX_BYTES', str(64 * 1024 * 1024)))
+RETENTION_DAYS = int(os.getenv('USAGE_BUCKET_RETENTION_DAYS', '120'))
+SOURCE_HOST = os.getenv('USAGE_LOG_HOST') or socket.gethostname()
+
+ADVISORY_LOCK_CLASS = 0x55A6  # arbitrary; second key is hashtext(host)
+
+# Upper bounds of the duration histogram bins; the last bin is open-ended
+DURATION_BOUNDS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+ACCESS_LOG_RE = re.compile(
+    r'(\d+\.\d+\.\d+\.\d+) - - \[(.*?)\] "(.*?)" (\d+) (\d+) "(.*?)" "(.*?)" ([\d.]+)'
+)
+ID_SEGMENT_RE = re.compile(r'^(\d+|[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12})$')
+
+
+# ==================== Parsing ====================
+
+def parse_log_line(line: str) -> Optional[Dict[str, Any]]:
+    """
+    One request from a JSON log line or an nginx-style access log line
+
+    'timestamp' is returned as an aware datetime (naive JSON timestamps are
+    taken as UTC); None for lines that are not requests.
+    """
+    line = line.strip()
+    try:
+        if line.startswith('{'):
+            entry = json.loads(line)
+            timestamp = datetime.fromisoformat(entry.get('timestamp', '').replace('Z', '+00:00'))
+            if timestamp.tzinfo is None:
+                timestamp = timestamp.replace(tzinfo=timezone.utc)
+            entry['timestamp'] = timestamp
+            return entry
+
+        match = ACCESS_LOG_RE.match(line)
+        if not match:
+            return None
+        ip, timestamp_str, request, status, size, referer, user_agent, duration = match.groups()
+        parts = request.split()
+        method, path, protocol = parts if len(parts) == 3 else ('GET', request, 'HTTP/1.1')
+        return {
+            'timestamp': datetime.strptime(timestamp_str, '%d/%b/%Y:%H:%M:%S %z'),
+            'ip_address': ip,
+            'method': method,
+            'path': path,
+            'status': int(status),
+            'size': int(size),
+            'duration_ms': float(duration) * 1000,
+            'user_agent': user_agent
+        }
+    except (json.JSONDecodeError, ValueError, TypeError, AttributeError) as e:
+        logger.debug(f"Failed to parse log line: {e}")
+        return None
+
+
+def service_for_path(path: str) -> str:
+    """Service a request path belongs to"""
+    if '/llm/' in path:
+        return 'llm'
+    if '/embeddings' in path:
+        return 'embeddings'
+    if '/search' in path:
+        return 'search'
+    if '/tts' in path:
+        return 'tts'
+    if '/stt' in path:
+        return 'stt'
+    if '/admin' in path:
+        return 'admin'
+    return 'unknown'
+
+
+def normalize_endpoint(path: str) -> str:
+    """Path without query string, numeric and UUID segments folded to ':id'"""
+    path = path.split('?', 1)[0]
+    return '/'.join(':id' if ID_SEGMENT_RE.match(segment) else segment for segment in path.split('/'))
+
+
+def duration_bin(duration_ms: float) -> int:
+    return bisect_left(DURATION_BOUNDS_MS, duration_ms)
+
+
+def histogram_percentile(counts: List[int], fraction: float) -> float:
+    """Approximate percentile (fraction in 0..1) from histogram bin counts"""
+    total = sum(counts)
+    if total == 0:
+        return 0.0
+    target = fraction * total
+    seen = 0
+    for i, count in enumerate(counts):
+        if count and seen + count >= target:
+            low = DURATION_BOUNDS_MS[i - 1] if i > 0 else 0
+            if i >= len(DURATION_BOUNDS_MS):
+                return float(low)
+            return low + (DURATION_BOUNDS_MS[i] - low) * (target - seen) / count
+        seen += count
+    return float(DURATION_BOUNDS_MS[-1])
+
+
+class UsageBuckets:
+    """In-memory hourly buckets for one aggregation cycle"""
+
+    def __init__(self):
+        # (hour, service, endpoint, user, status class) -> [calls, total ms, histogram]
+        self.buckets: Dict[Tuple, List[Any]] = {}
+        self.lines = 0
+
+    def add(self, entry: Dict[str, Any]):
+        timestamp = entry['timestamp'].astimezone(timezone.utc)
+        path = entry.get('path', '')
+        duration_ms = float(entry.get('duration_ms') or 0)
+        key = (
+            timestamp.replace(minute=0, second=0, microsecond=0),
+            service_for_path(path),
+            normalize_endpoint(path),
+            str(entry.get('user_id') or 'anonymous'),
+            int(entry.get('status') or 200) // 100,
+        )
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = [0, 0.0, [0] * (len(DURATION_BOUNDS_MS) + 1)]
+        bucket[0] += 1
+        bucket[1] += duration_ms
+        bucket[2][duration_bin(duration_ms)] += 1
+        self.lines += 1
+
+    def add_lines(self, data: bytes):
+        for line in data.decode('utf-8', errors='replace').splitlines():
+            entry = parse_log_line(line)
+            if entry is not None:
+                self.add(entry)
+
+    def rows(self) -> List[Tuple]:
+        return [key + (calls, total_ms, hist) for key, (calls, total_ms, hist) in self.buckets.items()]
+
+    def __len__(self):
+        return len(self.buckets)
+
+
+def read_new_lines(path: Path, inode: Optional[int], offset: int, max_bytes: int) -> Optional[Tuple[int, int, bytes]]:
+    """
+    Complete lines appended to path since offset, as (inode, new offset, data)
+
+    Starts over when the file was replaced or truncated; None when there is
+    nothing new. A trailing partial line is left for the next read.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    if stat.st_ino != inode or stat.st_size < offset:
+        offset = 0
+    if stat.st_size == offset:
+        return None
+
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        data = f.read(min(stat.st_size - offset, max_bytes))
+
+    end = data.rfind(b'\n')
+    if end < 0:
+        if len(data) < max_bytes:
+            return None
+        # A single line longer than the budget: skip it rather than stall
+        return stat.st_ino, offset + len(data), b''
+    data = data[:end + 1]
+    return stat.st_ino, offset + len(data), data
+
+
+# ==================== Aggregator ====================
+
+class UsageLogAggregator:
+    """Tails the request logs into usage_log_buckets and serves window reads"""
+
+    def __init__(
+        self,
+        log_dir: Path = LOG_DIR,
+        interval: float = AGGREGATE_INTERVAL,
+        max_bytes: int = MAX_BYTES_PER_CYCLE,
+        host: str = SOURCE_HOST
+    ):
+        self.log_dir = Path(log_dir)
+        self.interval = interval
+        self.max_bytes = max_bytes
+        self.host = host
+        self.db_pool = None
+
+        self._task: Optional[asyncio.Task] = None
+        self._start_lock = asyncio.Lock()
+        self._cycle_lock = asyncio.Lock()
+        self._pruned_at = 0.0
+
+        self.cycles = 0
+        self.cycle_errors = 0
+        self.lines_aggregated = 0
+        self.bytes_read = 0
+        self.last_cycle: Optional[datetime] = None
+        self.last_cycle_duration: Optional[float] = None
+
+    async def start(self, db_pool):
+        async with self._start_lock:
+            if self._task is not None:
+                return
+            self.db_pool = db_pool
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"Usage log aggregation started ({self.log_dir}, every {self.interval}s)")
+
+    async def ensure_started(self):
+        """Start lazily on the shared pool"""
+        if self._task is None:
+            from db_manager import db_manager
+            await db_manager.start()
+            await self.start(db_manager.subsystem('analytics'))
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        logger.info("Usage log aggregation stopped")
+
+    async def _run(self):
+        while True:
+            try:
+                await self.aggregate_once()
+                if time.monotonic() - self._pruned_at > 3600:
+                    await self.prune()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.cycle_errors += 1
+                logger.error(f"Usage log aggregation failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def aggregate_once(self) -> int:
+        """Roll newly appended log lines into the buckets; returns the lines counted"""
+        if not self.log_dir.exists():
+            return 0
+
+        async with self._cycle_lock:
+            started = time.monotonic()
+            buckets = UsageBuckets()
+            offsets = []
+            budget = self.max_bytes
+
+            async with self.db_pool.acquire() as conn:
+                async with conn.transaction():
+                    if not await conn.fetchval(
+                        "SELECT pg_try_advisory_xact_lock($1, hashtext($2))",
+                        ADVISORY_LOCK_CLASS, self.host
+                    ):
+                        return 0
+
+                    known = {
+                        row['file_path']: (row['inode'], row['byte_offset'])
+                        for row in await conn.fetch(
+                            "SELECT file_path, inode, byte_offset FROM usage_log_offsets WHERE host = $1",
+                            self.host
+                        )
+                    }
+
+                    for path in sorted(self.log_dir.glob('*.log')):
+                        if budget <= 0:
+                            break
+                        inode, offset = known.get(str(path), (None, 0))
+                        chunk = await asyncio.to_thread(read_new_lines, path, inode, offset, budget)
+                        if chunk is None:
+                            continue
+                        inode, offset, data = chunk
+                        budget -= len(data)
+                        await asyncio.to_thread(buckets.add_lines, data)
+                        offsets.append((self.host, str(path), inode, offset))
+
+                    if buckets:
+                        await conn.executemany(
+                            """
+                            INSERT INTO usage_log_buckets (
+                                bucket_start, service, endpoint, user_id, status_class,
+                                calls, total_duration_ms, duration_hist
+                            )
+                            VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
+                            ON CONFLICT (bucket_start, service, endpoint, user_id, status_class) DO UPDATE SET
+                                calls = usage_log_buckets.calls + EXCLUDED.calls,
+                                total_duration_ms = usage_log_buckets.total_duration_ms + EXCLUDED.total_duration_ms,
+                                duration_hist = ARRAY(
+                                    SELECT h.a + h.b
+                                    FROM unnest(usage_log_buckets.duration_hist, EXCLUDED.duration_hist)
+                                         WITH ORDINALITY AS h(a, b, i)
+                                    ORDER BY h.i
+                                )
+                            """,
+                            buckets.rows()
+                        )
+                    if offsets:
+                        await conn.executemany(
+                            """
+                            INSERT INTO usage_log_offsets (host, file_path, inode, byte_offset, updated_at)
+                            VALUES ($1, $2, $3, $4, NOW())
+                            ON CONFLICT (host, file_path) DO UPDATE SET
+                                inode = EXCLUDED.inode,
+                                byte_offset = EXCLUDED.byte_offset,
+                                updated_at = NOW()
+                            """,
+                            offsets
+                        )
+
+            self.cycles += 1
+            self.lines_aggregated += buckets.lines
+            self.bytes_read += self.max_bytes - budget
+            self.last_cycle = datetime.now(timezone.utc)
+            self.last_cycle_duration = time.monotonic() - started
+            if buckets.lines:
+                logger.info(f"Usage log aggregation: {buckets.lines} lines into {len(buckets)} buckets")
+            return buckets.lines
+
+    async def prune(self):
+        async with self.db_pool.acquire() as conn:
+            await conn.execute(
+                "DELETE FROM usage_log_buckets WHERE bucket_start < NOW() - make_interval(days => $1)",
+                RETENTION_DAYS
+            )
+        self._pruned_at = time.monotonic()
+
+    # ==================== Reads ====================
+
+    async def read_usage(self, days: int) -> Dict[str, Any]:
+        """
+        Usage over the last `days` days, merged from the hourly buckets
+
+        Same shape as the old per-request log scan, plus the window's
+        duration histogram.
+        """
+        end_date = datetime.now(timezone.utc)
+        start_date = end_date - timedelta(days=days)
+        since = start_date.replace(minute=0, second=0, microsecond=0)
+
+        async with self.db_pool.acquire() as conn:
+            service_rows = await conn.fetch(
+                """
+                SELECT service, SUM(calls) AS calls, SUM(total_duration_ms) AS total_duration_ms,
+                       COALESCE(SUM(calls) FILTER (WHERE status_class >= 4), 0) AS errors,
+                       COUNT(DISTINCT user_id) AS unique_users
+                FROM usage_log_buckets WHERE bucket_start >= $1
+                GROUP BY service
+                """,
+                since
+            )
+            user_rows = await conn.fetch(
+                """
+                SELECT user_id, service, SUM(calls) AS calls,
+                       COALESCE(SUM(calls) FILTER (WHERE status_class >= 4), 0) AS errors
+                FROM usage_log_buckets WHERE bucket_start >= $1
+                GROUP BY user_id, service
+                """,
+                since
+            )
+            hour_rows = await conn.fetch(
+                """
+                SELECT bucket_start, SUM(calls) AS calls
+                FROM usage_log_buckets WHERE bucket_start >= $1
+                GROUP BY bucket_start
+                """,
+                since
+            )
+            endpoint_rows = await conn.fetch(
+                """
+                SELECT endpoint, SUM(calls) AS calls, SUM(total_duration_ms) AS total_duration_ms,
+                       COALESCE(SUM(calls) FILTER (WHERE status_class >= 4), 0) AS errors
+                FROM usage_log_buckets WHERE bucket_start >= $1
+                GROUP BY endpoint
+                ORDER BY calls DESC
+                """,
+                since
+            )
+            histogram_rows = await conn.fetch(
+                """
+                SELECT h.i, SUM(h.count) AS count
+                FROM usage_log_buckets, unnest(duration_hist) WITH ORDINALITY AS h(count, i)
+                WHERE bucket_start >= $1
+                GROUP BY h.i
+                """,
+                since
+            )
+
+        by_service = {
+            row['service']: {
+                "calls": int(row['calls']),
+                "total_duration_ms": float(row['total_duration_ms']),
+                "errors": int(row['errors']),
+                "unique_users": int(row['unique_users']),
+            }
+            for row in service_rows
+        }
+
+        by_user: Dict[str, Dict[str, Any]] = {}
+        for row in user_rows:
+            user = by_user.setdefault(row['user_id'], {"calls": 0, "by_service": {}, "errors": 0})
+            user["calls"] += int(row['calls'])
+            user["errors"] += int(row['errors'])
+            user["by_service"][row['service']] = int(row['calls'])
+
+        by_hour: Dict[int, int] = {}
+        by_day: Dict[str, int] = {}
+        for row in hour_rows:
+            hour = row['bucket_start']
+            by_hour[hour.hour] = by_hour.get(hour.hour, 0) + int(row['calls'])
+            weekday = hour.strftime('%A')
+            by_day[weekday] = by_day.get(weekday, 0) + int(row['calls'])
+
+        by_endpoint = {
+            row['endpoint']: {
+                "calls": int(row['calls']),
+                "total_duration_ms": float(row['total_duration_ms']),
+                "errors": int(row['errors']),
+            }
+            for row in endpoint_rows
+        }
+
+        histogram = [0] * (len(DURATION_BOUNDS_MS) + 1)
+        for row in histogram_rows:
+            histogram[row['i'] - 1] = int(row['count'])
+
+        return {
+            "by_service": by_service,
+            "by_user": by_user,
+            "by_hour": by_hour,
+            "by_day": by_day,
+            "by_endpoint": by_endpoint,
+            "duration_histogram": {"bounds_ms": list(DURATION_BOUNDS_MS), "counts": histogram},
+            "period_start": start_date.isoformat(),
+            "period_end": end_date.isoformat()
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None,
+            "host": self.host,
+            "log_dir": str(self.log_dir),
+            "cycles": self.cycles,
+            "cycle_errors": self.cycle_errors,
+            "lines_aggregated": self.lines_aggregated,
+            "bytes_read": self.bytes_read,
+            "last_cycle": self.last_cycle.isoformat() if self.last_cycle else None,
+            "last_cycle_duration_seconds": self.last_cycle_duration,
+        }
+
+
+# Global instance
+usage_log_aggregator = UsageLogAggregator()
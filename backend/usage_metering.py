@@ -14,8 +14,8 @@ import logging
 from typing import Dict, List, Optional, Any
 from datetime import datetime, timedelta
 from decimal import Decimal
-import os
 from audit_logger import audit_logger
+from db_manager import db_manager
 
 # Logging setup
 logger = logging.getLogger(__name__)
@@ -74,15 +74,8 @@ class UsageMeter:
             return
 
         try:
-            self.db_pool = await asyncpg.create_pool(
-                host=os.getenv("POSTGRES_HOST", "unicorn-postgresql"),
-                port=int(os.getenv("POSTGRES_PORT", 5432)),
-                user=os.getenv("POSTGRES_USER", "unicorn"),
-                password=os.getenv("POSTGRES_PASSWORD", "unicorn"),
-                database=os.getenv("POSTGRES_DB", "unicorn_db"),
-                min_size=5,
-                max_size=20
-            )
+            await db_manager.start()
+            self.db_pool = db_manager.subsystem('billing')
             logger.info("UsageMeter database pool initialized")
         except Exception as e:
             logger.error(f"Failed to initialize database pool: {e}")
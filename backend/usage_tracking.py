@@ -24,6 +24,7 @@ from datetime import datetime, timedelta
 from decimal import Decimal
 import os
 import json
+from db_manager import db_manager
 
 logger = logging.getLogger(__name__)
 
@@ -89,15 +90,8 @@ class UsageTracker:
 
         try:
             # PostgreSQL connection pool
-            self.db_pool = await asyncpg.create_pool(
-                host=os.getenv("POSTGRES_HOST", "uchub-postgres"),
-                port=int(os.getenv("POSTGRES_PORT", 5432)),
-                user=os.getenv("POSTGRES_USER", "unicorn"),
-                password=os.getenv("POSTGRES_PASSWORD", "unicorn"),
-                database=os.getenv("POSTGRES_DB", "unicorn_db"),
-                min_size=5,
-                max_size=20
-            )
+            await db_manager.start()
+            self.db_pool = db_manager.subsystem('usage')
 
             # Redis connection
             self.redis = await aioredis.from_url(
@@ -16,6 +16,7 @@ from pydantic import BaseModel, Field
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker, Session
 from keycloak_integration import get_all_users as keycloak_get_all_users
+from churn_feature_store import churn_feature_store
 
 logger = logging.getLogger(__name__)
 
@@ -35,16 +36,23 @@ OPS_DB_URL = os.getenv(
 REDIS_URL = "redis://unicorn-lago-redis:6379"
 CACHE_TTL = 300  # 5 minutes
 
-# Initialize database engines
-keycloak_engine = create_engine(KEYCLOAK_DB_URL, pool_pre_ping=True)
-ops_engine = create_engine(OPS_DB_URL, pool_pre_ping=True)
-KeycloakSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=keycloak_engine)
-OpsSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=ops_engine)
+# Database engines are created on first use, not at import
+_session_factories: Dict[str, sessionmaker] = {}
+
+
+def _session_factory(url: str) -> sessionmaker:
+    """Session factory bound to url, creating its engine the first time"""
+    factory = _session_factories.get(url)
+    if factory is None:
+        engine = create_engine(url, pool_pre_ping=True)
+        factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        _session_factories[url] = factory
+    return factory
 
 # Dependency for database sessions
 def get_keycloak_db():
     """Get Keycloak database session"""
-    db = KeycloakSessionLocal()
+    db = _session_factory(KEYCLOAK_DB_URL)()
     try:
         yield db
     finally:
@@ -52,16 +60,12 @@ def get_keycloak_db():
 
 def get_db():
     """Get Ops Center database session"""
-    db = OpsSessionLocal()
+    db = _session_factory(OPS_DB_URL)()
     try:
         yield db
     finally:
         db.close()
 
-# Initialize churn predictor (will load model if exists)
-# Commenting out for now since the model file doesn't exist yet
-# churn_predictor = ChurnPredictor()
-
 
 class UserOverview(BaseModel):
     """User metrics overview"""
@@ -546,65 +550,28 @@ async def get_engagement_metrics(
 @router.get("/churn/prediction", response_model=List[ChurnPrediction])
 async def get_churn_predictions(
     risk_level: Optional[str] = Query(None, description="Filter by risk level: low, medium, high"),
-    limit: int = Query(100, description="Maximum number of predictions"),
-    
-    ops_db: Session = Depends(get_db),
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of predictions"),
+    offset: int = Query(0, ge=0, description="Number of predictions to skip"),
 ):
     """
-    Get heuristic-based churn predictions for users.
+    Get churn predictions for users, highest churn probability first.
 
-    Returns churn probability and risk level for each user based on login patterns.
+    Reads the precomputed scores of the churn feature store: the trained
+    model's predictions when a model is saved, otherwise the login-recency
+    heuristic.
     """
+    await churn_feature_store.ensure_scored(query_keycloak_users)
+    return churn_feature_store.page(risk_level, offset=offset, limit=limit)
 
-    async def compute_predictions():
-        # Get users
-        users = await query_keycloak_users()
-
-        predictions = []
-        now = datetime.now()
-        
-        for user in users:
-            if not user.get('created_at'):
-                continue
-                
-            days_since_signup = (now - user['created_at']).days
-            last_login = user.get('last_login')
-            last_login_days_ago = (now - last_login).days if last_login else days_since_signup
-            
-            # Simple heuristic: users who haven't logged in for a while are more likely to churn
-            if last_login_days_ago > 60:
-                churn_prob = min(95.0, 50.0 + (last_login_days_ago - 60) * 0.5)
-                risk = 'high'
-            elif last_login_days_ago > 30:
-                churn_prob = 30.0 + (last_login_days_ago - 30)
-                risk = 'medium'
-            else:
-                churn_prob = last_login_days_ago * 0.5
-                risk = 'low'
-            
-            predictions.append({
-                "user_id": user['user_id'],
-                "username": user['username'],
-                "churn_probability": round(churn_prob, 2),
-                "risk_level": risk,
-                "days_since_signup": days_since_signup,
-                "last_login_days_ago": last_login_days_ago,
-                "login_count": user.get('login_count', 0)
-            })
-
-        # Filter by risk level if specified
-        if risk_level:
-            predictions = [p for p in predictions if p["risk_level"] == risk_level]
 
-        # Sort by churn probability (highest first)
-        predictions.sort(key=lambda x: x["churn_probability"], reverse=True)
-
-        # Limit results
-        return predictions[:limit]
-
-    return await get_cached_or_compute(
-        f"analytics:churn:{risk_level}:{limit}", compute_predictions, ttl=600
-    )
+@router.get("/churn/prediction/{user_id}", response_model=ChurnPrediction)
+async def get_user_churn_prediction(user_id: str):
+    """Get the precomputed churn prediction for one user."""
+    await churn_feature_store.ensure_scored(query_keycloak_users)
+    prediction = churn_feature_store.get_user(user_id)
+    if prediction is None:
+        raise HTTPException(status_code=404, detail="No churn prediction for this user")
+    return prediction
 
 
 @router.get("/behavior/patterns")
@@ -787,6 +754,7 @@ async def train_churn_model(
         enriched_users = await enrich_user_data(users, ops_db)
 
         # Train model
+        churn_predictor = churn_feature_store.get_predictor(create=True)
         metrics = churn_predictor.train(enriched_users)
 
         # Save model
@@ -795,10 +763,8 @@ async def train_churn_model(
         if not saved:
             raise HTTPException(status_code=500, detail="Failed to save model")
 
-        # Clear prediction cache
-        redis_client = await get_redis()
-        if redis_client:
-            await redis_client.delete("analytics:churn:*")
+        # Score all users with the new model
+        await churn_feature_store.refresh()
 
         logger.info("Churn model training complete")
 
@@ -820,7 +786,10 @@ async def get_churn_model_info():
 
     Returns model metadata, training date, and feature importance.
     """
-    return churn_predictor.get_model_info()
+    churn_predictor = churn_feature_store.get_predictor()
+    if churn_predictor is None:
+        return {"status": "not_trained", "scoring": churn_feature_store.get_stats()}
+    return {**churn_predictor.get_model_info(), "scoring": churn_feature_store.get_stats()}
 
 
 # Background task for weekly model retraining
@@ -849,15 +818,10 @@ async def weekly_model_retraining():
             await asyncio.sleep(3600)  # Retry in 1 hour
 
 
-# Startup: Load existing model
-# Commented out until ChurnPredictor model is implemented
-# @router.on_event("startup")
-# async def load_churn_model():
-#     """Load churn model on startup."""
-#     logger.info("Loading churn prediction model...")
-#     loaded = churn_predictor.load_model()
-#
-#     if not loaded:
-#         logger.warning(
-#             "No trained model found. Train the model using POST /api/v1/analytics/users/churn/train"
-#         )
+@router.on_event("startup")
+async def start_churn_feature_store():
+    """Build or load the churn feature matrix in the background."""
+    try:
+        await churn_feature_store.start(query_keycloak_users)
+    except Exception as e:
+        logger.error(f"Failed to start churn feature store: {e}")
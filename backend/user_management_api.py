@@ -463,21 +463,20 @@ async def get_user_organizations(uid: str, email: str) -> list:
     """Get user's organization memberships from database"""
     try:
         from database.connection import get_db_connection
-        conn = await get_db_connection()
-        
-        orgs = await conn.fetch("""
-            SELECT 
-                o.id,
-                o.name,
-                o.tier,
-                om.role,
-                o.status,
-                om.joined_at
-            FROM organization_members om
-            JOIN organizations o ON om.org_id = o.id
-            WHERE om.user_id = $1 OR om.user_id = $2
-            ORDER BY om.joined_at DESC
-        """, uid, email)
+        async with await get_db_connection() as conn:
+            orgs = await conn.fetch("""
+                SELECT 
+                    o.id,
+                    o.name,
+                    o.tier,
+                    om.role,
+                    o.status,
+                    om.joined_at
+                FROM organization_members om
+                JOIN organizations o ON om.org_id = o.id
+                WHERE om.user_id = $1 OR om.user_id = $2
+                ORDER BY om.joined_at DESC
+            """, uid, email)
         
         org_list = []
         for org in orgs:
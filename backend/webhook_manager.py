@@ -110,7 +110,7 @@ class WebhookManager:
         Returns:
             Webhook data
         """
-        async with await get_db_connection() as conn:
+        async with await get_db_connection('webhooks') as conn:
             webhook_id = await conn.fetchval(
                 """
                 INSERT INTO webhooks (
@@ -153,7 +153,7 @@ class WebhookManager:
         enabled: Optional[bool] = None
     ) -> Dict[str, Any]:
         """Update webhook configuration"""
-        async with await get_db_connection() as conn:
+        async with await get_db_connection('webhooks') as conn:
             updates = []
             params = []
             param_idx = 1
@@ -215,7 +215,7 @@ class WebhookManager:
     
     async def delete_webhook(self, webhook_id: UUID) -> bool:
         """Delete a webhook"""
-        async with await get_db_connection() as conn:
+        async with await get_db_connection('webhooks') as conn:
             result = await conn.execute(
                 "DELETE FROM webhooks WHERE id = $1",
                 webhook_id
@@ -235,7 +235,7 @@ class WebhookManager:
         enabled_only: bool = False
     ) -> List[Dict[str, Any]]:
         """List webhooks"""
-        async with await get_db_connection() as conn:
+        async with await get_db_connection('webhooks') as conn:
             filters = []
             params = []
             param_idx = 1
@@ -299,7 +299,7 @@ class WebhookManager:
             organization_id: Organization ID
             payload: Event data to send
         """
-        async with await get_db_connection() as conn:
+        async with await get_db_connection('webhooks') as conn:
             # Find all webhooks subscribed to this event
             webhooks = await conn.fetch(
                 """
@@ -372,7 +372,7 @@ class WebhookManager:
         signature = self._generate_signature(payload_json, secret)
         
         # Log the delivery attempt
-        async with await get_db_connection() as conn:
+        async with await get_db_connection('webhooks') as conn:
             delivery_id = await conn.fetchval(
                 """
                 INSERT INTO webhook_deliveries (
@@ -495,7 +495,7 @@ class WebhookManager:
         duration_ms: int
     ):
         """Log successful webhook delivery"""
-        async with await get_db_connection() as conn:
+        async with await get_db_connection('webhooks') as conn:
             await conn.execute(
                 """
                 UPDATE webhook_deliveries
@@ -530,7 +530,7 @@ class WebhookManager:
         duration_ms: int
     ):
         """Log failed webhook delivery"""
-        async with await get_db_connection() as conn:
+        async with await get_db_connection('webhooks') as conn:
             await conn.execute(
                 """
                 UPDATE webhook_deliveries
@@ -580,7 +580,7 @@ class WebhookManager:
         status: Optional[str] = None
     ) -> List[Dict[str, Any]]:
         """Get delivery logs for a webhook"""
-        async with await get_db_connection() as conn:
+        async with await get_db_connection('webhooks') as conn:
             filters = ["webhook_id = $1"]
             params = [webhook_id]
             param_idx = 2
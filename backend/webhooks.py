@@ -157,29 +157,25 @@ async def handle_stripe_checkout_completed(
 
         # Record subscription change in database
         try:
-            from sqlalchemy import text
             from database.connection import get_db_connection
             from datetime import datetime
 
-            async with get_db_connection() as db:
+            async with await get_db_connection() as db:
                 change_id = f"{org_id}_{int(datetime.now().timestamp())}"
 
                 await db.execute(
-                    text("""
-                        INSERT INTO subscription_changes
-                        (id, user_id, old_tier, new_tier, change_type, effective_date, stripe_session_id, lago_subscription_id)
-                        VALUES (:id, :user_id, :old_tier, :new_tier, 'upgrade', NOW(), :session_id, :lago_id)
-                    """),
-                    {
-                        "id": change_id,
-                        "user_id": user_id,
-                        "old_tier": old_tier,
-                        "new_tier": tier_name,
-                        "session_id": session.get("id"),
-                        "lago_id": new_subscription.get("lago_id") if 'new_subscription' in locals() else None
-                    }
+                    """
+                    INSERT INTO subscription_changes
+                    (id, user_id, old_tier, new_tier, change_type, effective_date, stripe_session_id, lago_subscription_id)
+                    VALUES ($1, $2, $3, $4, 'upgrade', NOW(), $5, $6)
+                    """,
+                    change_id,
+                    user_id,
+                    old_tier,
+                    tier_name,
+                    session.get("id"),
+                    new_subscription.get("lago_id") if 'new_subscription' in locals() else None
                 )
-                await db.commit()
         except Exception as e:
             logger.error(f"Failed to record subscription change: {e}")
 
@@ -30,7 +30,6 @@ import shutil
 from pathlib import Path
 from datetime import datetime
 import logging
-import asyncpg
 import hashlib
 import io
 
@@ -44,6 +43,7 @@ except ImportError:
 
 # Import landing config singleton
 from landing_config import landing_config
+from db_manager import db_manager
 
 logger = logging.getLogger(__name__)
 
@@ -233,13 +233,7 @@ async def require_admin(request: Request):
 async def get_db_connection():
     """Get PostgreSQL database connection"""
     try:
-        conn = await asyncpg.connect(
-            host=os.getenv('POSTGRES_HOST', 'unicorn-postgresql'),
-            port=int(os.getenv('POSTGRES_PORT', '5432')),
-            user=os.getenv('POSTGRES_USER', 'unicorn'),
-            password=os.getenv('POSTGRES_PASSWORD', 'unicorn'),
-            database=os.getenv('POSTGRES_DB', 'unicorn_db')
-        )
+        conn = await db_manager.connect('default')
         return conn
     except Exception as e:
         logger.error(f"Failed to connect to database: {e}")
@@ -0,0 +1,44 @@
+"""
+Background job worker command for Ops-Center CLI
+
+Runs the server's background jobs (schedulers, fleet and K8s workers) in a
+process separate from the API. Needs the backend sources and its
+environment (database, Redis) rather than an API URL and key.
+"""
+
+import sys
+from pathlib import Path
+
+import click
+from rich.console import Console
+
+console = Console()
+
+
+def _find_backend(backend_dir):
+    """Directory containing job_worker.py"""
+    candidates = [Path(backend_dir)] if backend_dir else [
+        Path.cwd(),
+        Path.cwd() / 'backend',
+        Path(__file__).resolve().parents[2] / 'backend',
+    ]
+    for candidate in candidates:
+        if (candidate / 'job_worker.py').exists():
+            return candidate
+    raise click.ClickException(
+        "Ops-Center backend not found; run from the backend directory or pass --backend-dir"
+    )
+
+
+@click.command()
+@click.option('--backend-dir', envvar='OPS_CENTER_BACKEND_DIR',
+              help='Ops-Center backend directory (default: current directory or ./backend)')
+def worker(backend_dir):
+    """Run background jobs in this process (start the API with JOB_RUNNER_MODE=off)"""
+    backend = _find_backend(backend_dir)
+    sys.path.insert(0, str(backend))
+
+    from job_worker import main
+
+    console.print(f"[cyan]Starting Ops-Center job worker ({backend})[/cyan]")
+    main()
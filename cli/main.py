@@ -20,7 +20,7 @@ from rich.table import Table
 console = Console()
 
 # Import command groups
-from cli.commands import server, users, orgs, devices, webhooks, logs, tenants
+from cli.commands import server, users, orgs, devices, webhooks, logs, tenants, worker
 
 
 @click.group()
@@ -52,6 +52,7 @@ cli.add_command(devices.devices)
 cli.add_command(webhooks.webhooks)
 cli.add_command(logs.logs)
 cli.add_command(tenants.tenants)
+cli.add_command(worker.worker)
 
 
 @cli.command()
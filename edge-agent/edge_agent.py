@@ -7,18 +7,31 @@ Lightweight Python agent that runs on edge devices to:
 - Apply configuration updates
 - Report metrics and logs
 - Handle OTA updates
+
+All requests share one keep-alive HTTP session. Logs and metric samples are
+buffered, packed into gzip-compressed envelopes and written to a bounded
+on-disk spool; the uploader replays the spool oldest-first, so nothing is
+lost while the cloud is unreachable.
+
+OTA packages are downloaded with HTTP range resume and hashed while they
+stream, into a cache addressed by SHA-256 that also serves as the base
+for binary delta updates.
 """
 
 import asyncio
 import aiohttp
+import gzip
+import hashlib
 import platform
 import psutil
 import logging
 import json
 import os
+import re
 import sys
-from datetime import datetime
-from typing import Optional, Dict, Any
+import tempfile
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, List
 from pathlib import Path
 
 # Configure logging
@@ -28,6 +41,156 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Envelope batching and offline spool
+SPOOL_DIR = os.getenv("EDGE_AGENT_SPOOL_DIR", "/var/lib/edge-agent/spool")
+SPOOL_MAX_BYTES = int(os.getenv("EDGE_AGENT_SPOOL_MAX_MB", "50")) * 1024 * 1024
+BATCH_INTERVAL = int(os.getenv("EDGE_AGENT_BATCH_INTERVAL", "60"))  # seconds
+BATCH_MAX_ITEMS = int(os.getenv("EDGE_AGENT_BATCH_MAX_ITEMS", "1000"))
+REPLAY_MAX_PER_CYCLE = 20  # envelopes uploaded per flush, one at a time
+RETRY_MIN_DELAY = 5
+RETRY_MAX_DELAY = 300
+MAX_ENVELOPE_FAILURES = 5  # server errors before a poisoned envelope is dropped
+
+# Heartbeats deliver pending configs; polling is only a fallback
+CONFIG_POLL_INTERVAL = int(os.getenv("EDGE_AGENT_CONFIG_POLL_INTERVAL", "900"))
+
+# OTA package cache and downloads
+PACKAGE_DIR = os.getenv("EDGE_AGENT_PACKAGE_DIR", "/var/lib/edge-agent/packages")
+PACKAGE_CACHE_KEEP = 3  # newest packages kept as delta bases
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+DOWNLOAD_ATTEMPTS = 8
+SHA256_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+class EnvelopeSpool:
+    """Bounded on-disk FIFO of compressed envelopes awaiting upload"""
+
+    def __init__(self, directory: str, max_bytes: int = SPOOL_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.dropped = 0
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for partial in self.directory.glob("*.tmp"):
+            partial.unlink()
+
+        files = self._files()
+        self._seq = int(files[-1].name.split('.')[0]) + 1 if files else 0
+
+    def _files(self) -> List[Path]:
+        # Zero-padded sequence numbers keep lexical order == arrival order
+        return sorted(self.directory.glob("*.json.gz"))
+
+    def put(self, payload: bytes) -> Path:
+        """Durably append an envelope, dropping the oldest ones over budget"""
+        path = self.directory / f"{self._seq:012d}.json.gz"
+        tmp = path.with_suffix('.tmp')
+        self._seq += 1
+
+        with open(tmp, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+        self._trim()
+        return path
+
+    def _trim(self):
+        files = self._files()
+        total = sum(p.stat().st_size for p in files)
+        while total > self.max_bytes and len(files) > 1:
+            oldest = files.pop(0)
+            total -= oldest.stat().st_size
+            oldest.unlink()
+            self.dropped += 1
+            logger.warning(f"Spool full, dropped oldest envelope {oldest.name}")
+
+    def peek(self) -> Optional[Path]:
+        files = self._files()
+        return files[0] if files else None
+
+    def remove(self, path: Path):
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def __len__(self) -> int:
+        return len(self._files())
+
+
+def open_spool(directory: str = SPOOL_DIR) -> EnvelopeSpool:
+    """Open the spool, falling back to a temp dir if the state dir is not writable"""
+    try:
+        return EnvelopeSpool(directory)
+    except OSError as e:
+        fallback = os.path.join(tempfile.gettempdir(), "edge-agent-spool")
+        logger.error(f"Cannot use spool dir {directory} ({e}), falling back to {fallback}")
+        return EnvelopeSpool(fallback)
+
+
+def file_sha256(path: Path, limit: Optional[int] = None):
+    """Hash a file (or its first `limit` bytes) in chunks"""
+    sha256_hash = hashlib.sha256()
+    remaining = limit
+    with open(path, 'rb') as f:
+        while remaining is None or remaining > 0:
+            size = DOWNLOAD_CHUNK_SIZE if remaining is None else min(DOWNLOAD_CHUNK_SIZE, remaining)
+            chunk = f.read(size)
+            if not chunk:
+                break
+            sha256_hash.update(chunk)
+            if remaining is not None:
+                remaining -= len(chunk)
+    return sha256_hash
+
+
+class PackageCache:
+    """OTA packages stored by SHA-256, plus resumable partial downloads"""
+
+    def __init__(self, directory: str, keep: int = PACKAGE_CACHE_KEEP):
+        self.directory = Path(directory)
+        self.keep = keep
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def path(self, checksum: str) -> Path:
+        return self.directory / f"{checksum}.pkg"
+
+    def partial(self, key: str) -> Path:
+        return self.directory / f"{key}.partial"
+
+    def get(self, checksum: Optional[str]) -> Optional[Path]:
+        if not checksum or not SHA256_RE.match(checksum):
+            return None
+        path = self.path(checksum)
+        if not path.exists():
+            return None
+        path.touch()  # most recently used survives pruning
+        return path
+
+    def commit(self, partial: Path, checksum: str) -> Path:
+        """Move a verified download into the cache"""
+        path = self.path(checksum)
+        os.replace(partial, path)
+        self.prune()
+        return path
+
+    def prune(self):
+        packages = sorted(self.directory.glob("*.pkg"), key=lambda p: p.stat().st_mtime, reverse=True)
+        for stale in packages[self.keep:]:
+            stale.unlink()
+
+
+def open_package_cache(directory: str = PACKAGE_DIR) -> PackageCache:
+    """Open the package cache, falling back to a temp dir if the state dir is not writable"""
+    try:
+        return PackageCache(directory)
+    except OSError as e:
+        fallback = os.path.join(tempfile.gettempdir(), "edge-agent-packages")
+        logger.error(f"Cannot use package dir {directory} ({e}), falling back to {fallback}")
+        return PackageCache(fallback)
+
 
 class EdgeAgent:
     """Main Edge Device Agent"""
@@ -37,7 +200,9 @@ class EdgeAgent:
         device_id: str,
         auth_token: str,
         cloud_url: str,
-        config_file: str = "/etc/edge-agent/config.json"
+        config_file: str = "/etc/edge-agent/config.json",
+        spool_dir: str = SPOOL_DIR,
+        package_dir: str = PACKAGE_DIR
     ):
         self.device_id = device_id
         self.auth_token = auth_token
@@ -47,10 +212,33 @@ class EdgeAgent:
         self.config_version = 0
         self.running = False
         
+        # Auth is passed per request so it never leaks to package download hosts
+        self.auth_headers = {"Authorization": f"Bearer {self.auth_token}"}
+        self.session: Optional[aiohttp.ClientSession] = None
+        
+        # Buffered telemetry, sealed into envelopes by the uploader
+        self.spool = open_spool(spool_dir)
+        self.pending_logs: List[Dict[str, Any]] = []
+        self.pending_metrics: List[Dict[str, Any]] = []
+        self.flush_requested: Optional[asyncio.Event] = None
+        self.retry_delay = 0
+        self.retry_at = 0.0
+        self.envelope_failures = 0
+        
+        self.packages = open_package_cache(package_dir)
+        
+        # Prime the CPU counter so later samples are non-blocking deltas
+        psutil.cpu_percent(interval=None)
+        
     async def start(self):
         """Start the agent and all background tasks"""
         logger.info(f"Starting Edge Agent for device: {self.device_id}")
         self.running = True
+        self.flush_requested = asyncio.Event()
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=4, keepalive_timeout=120),
+            timeout=aiohttp.ClientTimeout(total=30)
+        )
         
         try:
             await asyncio.gather(
@@ -58,37 +246,50 @@ class EdgeAgent:
                 self.config_watcher(),
                 self.metrics_collector(),
                 self.ota_update_checker(),
+                self.uploader_loop(),
                 return_exceptions=True
             )
         except Exception as e:
             logger.error(f"Agent crashed: {e}")
             self.running = False
+        finally:
+            # Whatever is still buffered survives the restart on disk
+            self.seal_envelope()
+            await self.session.close()
+    
+    def _url(self, path: str) -> str:
+        return f"{self.cloud_url}{path}"
     
     async def heartbeat_loop(self):
         """Send periodic heartbeats to cloud"""
         while self.running:
+            status = None
             try:
                 status = await self.collect_status()
                 
-                async with aiohttp.ClientSession() as session:
-                    async with session.post(
-                        f"{self.cloud_url}/api/v1/edge/devices/{self.device_id}/heartbeat",
-                        json=status,
-                        headers={"Authorization": f"Bearer {self.auth_token}"}
-                    ) as resp:
-                        if resp.status == 200:
-                            data = await resp.json()
-                            
-                            # Check for pending configuration updates
-                            if "pending_config" in data:
-                                logger.info(f"Pending config update detected: v{data['pending_config']['version']}")
-                                await self.apply_config(data['pending_config'])
-                        else:
-                            logger.warning(f"Heartbeat failed: HTTP {resp.status}")
-                            
+                async with self.session.post(
+                    self._url(f"/api/v1/edge/devices/{self.device_id}/heartbeat"),
+                    json=status,
+                    headers=self.auth_headers
+                ) as resp:
+                    if resp.status == 200:
+                        data = await resp.json()
+                        status = None
+                        
+                        # Check for pending configuration updates
+                        if "pending_config" in data:
+                            logger.info(f"Pending config update detected: v{data['pending_config']['version']}")
+                            await self.apply_config(data['pending_config'])
+                    else:
+                        logger.warning(f"Heartbeat failed: HTTP {resp.status}")
+                        
             except Exception as e:
                 logger.error(f"Heartbeat error: {e}")
             
+            # Keep the metrics of an undelivered heartbeat for the spool
+            if status and status.get("metrics"):
+                self.record_metrics(status["metrics"])
+            
             await asyncio.sleep(self.heartbeat_interval)
     
     async def collect_status(self) -> Dict[str, Any]:
@@ -149,8 +350,8 @@ class EdgeAgent:
     async def collect_metrics(self) -> Dict[str, Any]:
         """Collect system metrics"""
         try:
-            # CPU usage
-            cpu_percent = psutil.cpu_percent(interval=1)
+            # CPU usage since the previous sample (non-blocking)
+            cpu_percent = psutil.cpu_percent(interval=None)
             
             # Memory usage
             memory = psutil.virtual_memory()
@@ -217,22 +418,22 @@ class EdgeAgent:
         while self.running:
             try:
                 # Check if there's a new config on server
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(
-                        f"{self.cloud_url}/api/v1/edge/devices/{self.device_id}/config",
-                        headers={"Authorization": f"Bearer {self.auth_token}"}
-                    ) as resp:
-                        if resp.status == 200:
-                            config_data = await resp.json()
-                            
-                            if config_data['version'] > self.config_version:
-                                logger.info(f"New config version {config_data['version']} available")
-                                await self.apply_config(config_data)
+                async with self.session.get(
+                    self._url(f"/api/v1/edge/devices/{self.device_id}/config"),
+                    headers=self.auth_headers
+                ) as resp:
+                    if resp.status == 200:
+                        config_data = await resp.json()
+                        
+                        if config_data['version'] > self.config_version:
+                            logger.info(f"New config version {config_data['version']} available")
+                            await self.apply_config(config_data)
                 
             except Exception as e:
                 logger.error(f"Config watcher error: {e}")
             
-            await asyncio.sleep(60)  # Check every minute
+            # Heartbeat responses carry pending configs; this is a fallback
+            await asyncio.sleep(CONFIG_POLL_INTERVAL)
     
     async def apply_config(self, config_data: Dict[str, Any]):
         """Apply new configuration"""
@@ -257,33 +458,32 @@ class EdgeAgent:
             self.config_version = config_data['version']
             
             # Notify cloud that config was applied
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{self.cloud_url}/api/v1/edge/devices/{self.device_id}/config/applied",
-                    json={
-                        "config_id": config_data.get('config_id'),
-                        "success": True
-                    },
-                    headers={"Authorization": f"Bearer {self.auth_token}"}
-                ) as resp:
-                    if resp.status == 200:
-                        logger.info("Configuration applied successfully")
+            async with self.session.post(
+                self._url(f"/api/v1/edge/devices/{self.device_id}/config/applied"),
+                json={
+                    "config_id": config_data.get('config_id'),
+                    "success": True
+                },
+                headers=self.auth_headers
+            ) as resp:
+                if resp.status == 200:
+                    logger.info("Configuration applied successfully")
             
         except Exception as e:
             logger.error(f"Failed to apply config: {e}")
             
             # Notify cloud of failure
             try:
-                async with aiohttp.ClientSession() as session:
-                    await session.post(
-                        f"{self.cloud_url}/api/v1/edge/devices/{self.device_id}/config/applied",
-                        json={
-                            "config_id": config_data.get('config_id'),
-                            "success": False,
-                            "error_message": str(e)
-                        },
-                        headers={"Authorization": f"Bearer {self.auth_token}"}
-                    )
+                async with self.session.post(
+                    self._url(f"/api/v1/edge/devices/{self.device_id}/config/applied"),
+                    json={
+                        "config_id": config_data.get('config_id'),
+                        "success": False,
+                        "error_message": str(e)
+                    },
+                    headers=self.auth_headers
+                ):
+                    pass
             except:
                 pass
     
@@ -316,29 +516,11 @@ class EdgeAgent:
             logger.info(f"Would set GPU memory util to: {vllm_config['gpu_memory_util']}")
     
     async def metrics_collector(self):
-        """Collect and send detailed metrics periodically"""
+        """Collect detailed metrics periodically for the next envelope"""
         while self.running:
             try:
                 metrics = await self.collect_metrics()
-                
-                # Send to cloud
-                async with aiohttp.ClientSession() as session:
-                    async with session.post(
-                        f"{self.cloud_url}/api/v1/edge/devices/{self.device_id}/metrics",
-                        json={
-                            "metrics": [
-                                {
-                                    "timestamp": datetime.utcnow().isoformat(),
-                                    "metric_type": metric_type,
-                                    "value": value
-                                }
-                                for metric_type, value in metrics.items()
-                            ]
-                        },
-                        headers={"Authorization": f"Bearer {self.auth_token}"}
-                    ) as resp:
-                        if resp.status != 200:
-                            logger.warning(f"Failed to send metrics: HTTP {resp.status}")
+                self.record_metrics(metrics)
                 
             except Exception as e:
                 logger.error(f"Metrics collector error: {e}")
@@ -346,20 +528,136 @@ class EdgeAgent:
             await asyncio.sleep(300)  # Every 5 minutes
     
     async def send_log(self, level: str, message: str, service_name: Optional[str] = None):
-        """Send log entry to cloud"""
+        """Queue a log entry for the next envelope"""
+        self.pending_logs.append({
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "log_level": level,
+            "message": message,
+            "service_name": service_name
+        })
+        self._maybe_flush()
+    
+    # ==================== Envelope Batching ====================
+    
+    def record_metrics(self, metrics: Dict[str, Any]):
+        """Queue a metrics snapshot for the next envelope"""
+        timestamp = datetime.now(timezone.utc).isoformat()
+        self.pending_metrics.extend(
+            {"timestamp": timestamp, "metric_type": metric_type, "value": value}
+            for metric_type, value in metrics.items()
+        )
+        self._maybe_flush()
+    
+    def _maybe_flush(self):
+        if (self.flush_requested is not None
+                and len(self.pending_logs) + len(self.pending_metrics) >= BATCH_MAX_ITEMS):
+            self.flush_requested.set()
+    
+    def seal_envelope(self) -> Optional[Path]:
+        """Compress buffered logs and metrics into one envelope on the spool"""
+        if not self.pending_logs and not self.pending_metrics:
+            return None
+        
+        envelope = {
+            "device_id": self.device_id,
+            "sealed_at": datetime.now(timezone.utc).isoformat(),
+            "metrics": self.pending_metrics,
+            "logs": self.pending_logs
+        }
+        self.pending_metrics = []
+        self.pending_logs = []
+        
+        payload = gzip.compress(json.dumps(envelope, separators=(',', ':')).encode())
         try:
-            async with aiohttp.ClientSession() as session:
-                await session.post(
-                    f"{self.cloud_url}/api/v1/edge/devices/{self.device_id}/logs",
-                    json={
-                        "log_level": level,
-                        "message": message,
-                        "service_name": service_name
-                    },
-                    headers={"Authorization": f"Bearer {self.auth_token}"}
-                )
-        except Exception as e:
-            logger.error(f"Failed to send log: {e}")
+            return self.spool.put(payload)
+        except OSError as e:
+            logger.error(f"Failed to spool envelope: {e}")
+            return None
+    
+    async def uploader_loop(self):
+        """Seal buffered telemetry and replay the spool with backpressure"""
+        while self.running:
+            try:
+                await asyncio.wait_for(self.flush_requested.wait(), timeout=BATCH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self.flush_requested.clear()
+            
+            self.seal_envelope()
+            try:
+                await self.replay_spool()
+            except Exception as e:
+                logger.error(f"Spool replay error: {e}")
+    
+    async def replay_spool(self) -> int:
+        """Upload spooled envelopes oldest-first, one in flight at a time"""
+        loop = asyncio.get_running_loop()
+        sent = 0
+        
+        while sent < REPLAY_MAX_PER_CYCLE and loop.time() >= self.retry_at:
+            path = self.spool.peek()
+            if path is None:
+                break
+            
+            delivered = await self.upload_envelope(path.read_bytes())
+            if delivered is None:
+                break  # backing off; keep the envelope at the head of the queue
+            
+            self.spool.remove(path)
+            self.envelope_failures = 0
+            sent += delivered
+        
+        if sent:
+            logger.info(f"Uploaded {sent} envelope(s), {len(self.spool)} still spooled")
+        return sent
+    
+    async def upload_envelope(self, payload: bytes) -> Optional[bool]:
+        """
+        POST one envelope.
+        
+        Returns True when delivered, False when the cloud rejected it for
+        good (the envelope is dropped) and None when it should be retried.
+        """
+        try:
+            async with self.session.post(
+                self._url(f"/api/v1/edge/devices/{self.device_id}/batch"),
+                data=payload,
+                headers={
+                    **self.auth_headers,
+                    "Content-Type": "application/json",
+                    "Content-Encoding": "gzip"
+                }
+            ) as resp:
+                if resp.status == 200:
+                    self.retry_delay = 0
+                    return True
+                
+                if resp.status in (408, 429, 503):
+                    # Cloud is shedding load: honour Retry-After
+                    retry_after = resp.headers.get("Retry-After", "")
+                    self._defer(int(retry_after) if retry_after.isdigit() else None)
+                    logger.warning(f"Envelope upload throttled: HTTP {resp.status}")
+                    return None
+                
+                if resp.status >= 500:
+                    self.envelope_failures += 1
+                    if self.envelope_failures < MAX_ENVELOPE_FAILURES:
+                        self._defer()
+                        logger.warning(f"Envelope upload failed: HTTP {resp.status}")
+                        return None
+                
+                logger.error(f"Envelope rejected: HTTP {resp.status}, dropping it")
+                return False
+                
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self._defer()
+            logger.warning(f"Cloud unreachable, envelopes stay spooled: {e}")
+            return None
+    
+    def _defer(self, delay: Optional[int] = None):
+        """Exponential backoff before the next upload attempt"""
+        self.retry_delay = min(max(self.retry_delay * 2, RETRY_MIN_DELAY), RETRY_MAX_DELAY)
+        self.retry_at = asyncio.get_running_loop().time() + (delay or self.retry_delay)
     
     # ==================== OTA Update Handling ====================
     
@@ -368,25 +666,24 @@ class EdgeAgent:
         while self.running:
             try:
                 # Check for available updates
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(
-                        f"{self.cloud_url}/api/v1/ota/check-update",
-                        params={"device_id": self.device_id},
-                        headers={"Authorization": f"Bearer {self.auth_token}"}
-                    ) as resp:
-                        if resp.status == 200:
-                            update_info = await resp.json()
+                async with self.session.get(
+                    self._url("/api/v1/ota/check-update"),
+                    params={"device_id": self.device_id},
+                    headers=self.auth_headers
+                ) as resp:
+                    if resp.status == 200:
+                        update_info = await resp.json()
+                        
+                        if update_info.get('update_available'):
+                            logger.info(
+                                f"OTA update available: {update_info['target_version']} "
+                                f"(current: {platform.platform()})"
+                            )
                             
-                            if update_info.get('update_available'):
-                                logger.info(
-                                    f"OTA update available: {update_info['target_version']} "
-                                    f"(current: {platform.platform()})"
-                                )
-                                
-                                # Start update process
-                                await self.perform_ota_update(update_info)
-                        elif resp.status != 200:
-                            logger.warning(f"OTA check failed: HTTP {resp.status}")
+                            # Start update process
+                            await self.perform_ota_update(update_info)
+                    elif resp.status != 200:
+                        logger.warning(f"OTA check failed: HTTP {resp.status}")
                 
             except Exception as e:
                 logger.error(f"OTA update checker error: {e}")
@@ -398,7 +695,7 @@ class EdgeAgent:
         deployment_id = update_info['deployment_id']
         target_version = update_info['target_version']
         update_package_url = update_info.get('update_package_url')
-        checksum = update_info.get('checksum')
+        checksum = (update_info.get('checksum') or '').lower() or None
         
         logger.info(f"Starting OTA update to version {target_version}")
         
@@ -406,14 +703,25 @@ class EdgeAgent:
             # Report downloading status
             await self.report_ota_status(deployment_id, "downloading")
             
-            # Download update package
-            if not update_package_url:
-                raise Exception("No update package URL provided")
+            # Prefer a cached package, then a delta against a cached base
+            update_file = self.packages.get(checksum)
+            if update_file:
+                logger.info(f"Update package {checksum[:12]} already cached")
+            elif update_info.get('delta_package_url') and self.packages.get(update_info.get('delta_base_checksum')):
+                try:
+                    update_file = await self.apply_delta_package(update_info)
+                except Exception as e:
+                    logger.warning(f"Delta update failed ({e}), downloading full package")
             
-            update_file = await self.download_update_package(
-                update_package_url, 
-                checksum
-            )
+            # Download update package
+            if update_file is None:
+                if not update_package_url:
+                    raise Exception("No update package URL provided")
+                
+                update_file = await self.download_update_package(
+                    update_package_url, 
+                    checksum
+                )
             
             # Report installing status
             await self.report_ota_status(deployment_id, "installing")
@@ -456,49 +764,120 @@ class EdgeAgent:
         url: str, 
         expected_checksum: Optional[str] = None
     ) -> Path:
-        """Download and verify update package"""
-        import hashlib
+        """
+        Download and verify update package.
         
-        logger.info(f"Downloading update package from {url}")
+        The download resumes from the partial file with an HTTP Range request
+        after a dropped connection or an agent restart, and is hashed as it
+        streams. Verified packages land in the cache under their SHA-256.
+        """
+        if expected_checksum:
+            expected_checksum = expected_checksum.lower()
+        
+        cached = self.packages.get(expected_checksum)
+        if cached:
+            return cached
         
-        download_dir = Path("/tmp/ota-updates")
-        download_dir.mkdir(parents=True, exist_ok=True)
+        logger.info(f"Downloading update package from {url}")
         
-        update_file = download_dir / "update.tar.gz"
+        key = expected_checksum if expected_checksum and SHA256_RE.match(expected_checksum) \
+            else hashlib.sha256(url.encode()).hexdigest()
+        partial = self.packages.partial(key)
         
-        # Download file
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as resp:
-                if resp.status != 200:
-                    raise Exception(f"Download failed: HTTP {resp.status}")
-                
-                # Save to file
-                with open(update_file, 'wb') as f:
-                    async for chunk in resp.content.iter_chunked(8192):
-                        f.write(chunk)
+        for attempt in range(DOWNLOAD_ATTEMPTS):
+            try:
+                actual_checksum = await self._fetch_resumable(url, partial)
+                break
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == DOWNLOAD_ATTEMPTS - 1:
+                    raise Exception(f"Download failed after {DOWNLOAD_ATTEMPTS} attempts: {e}")
+                delay = min(2 ** attempt, 60)
+                size = partial.stat().st_size if partial.exists() else 0
+                logger.warning(f"Download interrupted at {size} bytes ({e}), resuming in {delay}s")
+                await asyncio.sleep(delay)
         
-        logger.info(f"Downloaded {update_file.stat().st_size} bytes")
+        logger.info(f"Downloaded {partial.stat().st_size} bytes")
         
         # Verify checksum if provided
+        if expected_checksum and actual_checksum != expected_checksum:
+            partial.unlink()
+            raise Exception(
+                f"Checksum mismatch! Expected: {expected_checksum}, "
+                f"Got: {actual_checksum}"
+            )
         if expected_checksum:
-            logger.info("Verifying checksum...")
-            sha256_hash = hashlib.sha256()
-            
-            with open(update_file, 'rb') as f:
-                for chunk in iter(lambda: f.read(8192), b""):
-                    sha256_hash.update(chunk)
-            
-            actual_checksum = sha256_hash.hexdigest()
+            logger.info("Checksum verified successfully")
+        
+        return self.packages.commit(partial, actual_checksum)
+    
+    async def _fetch_resumable(self, url: str, partial: Path) -> str:
+        """Fetch the rest of `url` into `partial`, returning the SHA-256 of the whole file"""
+        offset = partial.stat().st_size if partial.exists() else 0
+        sha256_hash = hashlib.sha256()
+        headers = {}
+        
+        if offset:
+            # Re-hash only the bytes already on disk, once per resume
+            loop = asyncio.get_running_loop()
+            sha256_hash = await loop.run_in_executor(None, file_sha256, partial, offset)
+            headers["Range"] = f"bytes={offset}-"
+        
+        # No overall deadline, only a stall timeout
+        async with self.session.get(
+            url,
+            headers=headers,
+            timeout=aiohttp.ClientTimeout(total=None, sock_read=60)
+        ) as resp:
+            if resp.status == 416 and offset:
+                return sha256_hash.hexdigest()  # partial file is already complete
+            if resp.status >= 500:
+                resp.raise_for_status()  # retried like a dropped connection
+            if resp.status not in (200, 206):
+                raise Exception(f"Download failed: HTTP {resp.status}")
             
-            if actual_checksum != expected_checksum:
-                raise Exception(
-                    f"Checksum mismatch! Expected: {expected_checksum}, "
-                    f"Got: {actual_checksum}"
-                )
+            if resp.status == 200 and offset:
+                logger.info("Server ignored the range request, restarting download")
+                sha256_hash = hashlib.sha256()
             
-            logger.info("Checksum verified successfully")
+            with open(partial, 'ab' if resp.status == 206 else 'wb') as f:
+                async for chunk in resp.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                    f.write(chunk)
+                    sha256_hash.update(chunk)
         
-        return update_file
+        return sha256_hash.hexdigest()
+    
+    async def apply_delta_package(self, update_info: Dict[str, Any]) -> Path:
+        """Rebuild the target package from a cached base and a binary delta (xdelta3)"""
+        checksum = (update_info.get('checksum') or '').lower()
+        if not SHA256_RE.match(checksum):
+            raise Exception("Delta updates require the target package checksum")
+        
+        base = self.packages.get(update_info['delta_base_checksum'].lower())
+        delta = await self.download_update_package(
+            update_info['delta_package_url'],
+            update_info.get('delta_checksum')
+        )
+        logger.info(f"Applying delta {delta.name} to cached package {base.name}")
+        
+        target = self.packages.partial(checksum)
+        proc = await asyncio.create_subprocess_exec(
+            'xdelta3', '-d', '-f', '-s', str(base), str(delta), str(target),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        stdout, stderr = await proc.communicate()
+        delta.unlink()
+        
+        if proc.returncode != 0:
+            raise Exception(f"Failed to apply delta: {stderr.decode()}")
+        
+        loop = asyncio.get_running_loop()
+        actual_checksum = (await loop.run_in_executor(None, file_sha256, target)).hexdigest()
+        if actual_checksum != checksum:
+            target.unlink()
+            raise Exception(f"Checksum mismatch after delta: {actual_checksum}")
+        
+        return self.packages.commit(target, checksum)
     
     async def install_update(self, update_file: Path):
         """Install the update package"""
@@ -585,14 +964,13 @@ class EdgeAgent:
             previous_version = platform.platform()
             
             # Notify cloud of rollback
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{self.cloud_url}/api/v1/admin/ota/deployments/{deployment_id}/devices/{self.device_id}/rollback",
-                    json={"previous_version": previous_version},
-                    headers={"Authorization": f"Bearer {self.auth_token}"}
-                ) as resp:
-                    if resp.status == 200:
-                        logger.info("Rollback reported to cloud")
+            async with self.session.post(
+                self._url(f"/api/v1/admin/ota/deployments/{deployment_id}/devices/{self.device_id}/rollback"),
+                json={"previous_version": previous_version},
+                headers=self.auth_headers
+            ) as resp:
+                if resp.status == 200:
+                    logger.info("Rollback reported to cloud")
             
             # Restore from backup if available
             backup_agent = Path("/etc/edge-agent/edge_agent.py.backup")
@@ -601,7 +979,8 @@ class EdgeAgent:
                 shutil.copy(backup_agent, __file__)
                 logger.info("Restored agent from backup")
                 
-                # Restart agent
+                # Restart agent, keeping buffered telemetry on disk
+                self.seal_envelope()
                 os.execv(sys.executable, [sys.executable] + sys.argv)
             else:
                 logger.warning("No backup available for rollback")
@@ -617,16 +996,16 @@ class EdgeAgent:
     ):
         """Report OTA update status to cloud"""
         try:
-            async with aiohttp.ClientSession() as session:
-                await session.post(
-                    f"{self.cloud_url}/api/v1/ota/deployments/{deployment_id}/status",
-                    params={"device_id": self.device_id},
-                    json={
-                        "status": status,
-                        "error_message": error_message
-                    },
-                    headers={"Authorization": f"Bearer {self.auth_token}"}
-                )
+            async with self.session.post(
+                self._url(f"/api/v1/ota/deployments/{deployment_id}/status"),
+                params={"device_id": self.device_id},
+                json={
+                    "status": status,
+                    "error_message": error_message
+                },
+                headers=self.auth_headers
+            ):
+                pass
                 
             logger.info(f"Reported OTA status: {status}")
             
@@ -637,6 +1016,8 @@ class EdgeAgent:
         """Stop the agent"""
         logger.info("Stopping Edge Agent")
         self.running = False
+        if self.flush_requested is not None:
+            self.flush_requested.set()
 
 
 async def register_device(cloud_url: str, registration_token: str) -> Dict[str, Any]: